@@ -242,6 +242,11 @@ typedef struct {
        
        // NOTE: Training history (loss, metrics) is stored in separate files
        // in models/<name>_history/ directory to keep model files compact
+       
+       // Memory-mapped weights (cllm_read_model_mapped): weights points into
+       // a read-only file mapping instead of a malloc'd block
+       void* weights_map;           // Mapping base, NULL if weights are owned
+       uint64_t weights_map_size;   // Mapping length in bytes
    } CLLMModel;
 
 /*
@@ -9,6 +9,7 @@
 
 #include <stdint.h>
 #include <stddef.h>
+#include "cllm_data_loader.h"
 
 /**
  * Batch Structure
@@ -55,6 +56,16 @@ CLLMBatchIterator* cllm_batch_iterator_create(uint32_t* tokens, size_t num_token
                                                uint32_t batch_size, uint32_t seq_len,
                                                int shuffle, int drop_last);
 
+/**
+ * Create Batch Iterator over a Token Dataset
+ * 
+ * Works with owned, 16-bit and memory-mapped datasets; tokens are read in
+ * place. The dataset must outlive the iterator.
+ */
+CLLMBatchIterator* cllm_batch_iterator_create_from_dataset(const TokenDataset* dataset,
+                                                            uint32_t batch_size, uint32_t seq_len,
+                                                            int shuffle, int drop_last);
+
 /**
  * Free Batch Iterator
  */
@@ -0,0 +1,150 @@
+/**
+ * CLLM Batched Inference Engine
+ * 
+ * Serves many generation requests from one model with continuous
+ * batching. Every step packs one row per token being processed - the
+ * newest token of each decoding sequence plus chunks of prompts that are
+ * still being prefilled - into a single [rows x embed_dim] activation
+ * matrix, so the QKV projections, the feed-forward layers and the
+ * vocabulary projection run as matrix-matrix products
+ * (simd_matrix_multiply) that stream each weight matrix once per step
+ * instead of once per sequence.
+ * 
+ * Sequences leave the batch as soon as they finish and queued requests
+ * take their place between steps. Each sequence has its own KV cache and
+ * RNG state: its logits match cllm_prefill / cllm_forward_cached up to
+ * floating-point rounding, so greedy decoding (top_k = 1) produces the
+ * same tokens as the single-sequence path.
+ */
+
+#ifndef CLLM_BATCH_INFERENCE_H
+#define CLLM_BATCH_INFERENCE_H
+
+#include <stdint.h>
+#include <stdbool.h>
+#include "cllm.h"
+
+#define CLLM_BATCH_DEFAULT_STEP_TOKENS 256
+
+// Request state
+typedef enum {
+    CLLM_REQUEST_FREE = 0,      // Slot unused
+    CLLM_REQUEST_QUEUED,        // Waiting for a free sequence slot
+    CLLM_REQUEST_RUNNING,       // In the batch (prefilling or decoding)
+    CLLM_REQUEST_FINISHED       // Done; tokens can be collected
+} CLLMRequestState;
+
+// Engine statistics
+typedef struct {
+    uint64_t steps;             // Batched forward steps
+    uint64_t rows;              // Token rows processed (prompt + generated)
+    uint64_t generated;         // Tokens sampled
+    uint64_t completed;         // Requests finished
+    uint32_t max_active;        // Largest number of sequences in one step
+} CLLMBatchEngineStats;
+
+// Engine handle
+typedef struct CLLMBatchEngine CLLMBatchEngine;
+
+/**
+ * Create a batched inference engine
+ * 
+ * @param model Model (not owned; must outlive the engine)
+ * @param max_sequences Sequences decoded together (KV caches allocated)
+ * @param max_seq_len Positions per sequence (prompt + generated)
+ * @param max_requests Requests that can be queued, running or uncollected
+ * @param max_step_tokens Rows per step (0 for CLLM_BATCH_DEFAULT_STEP_TOKENS)
+ * @return Engine or NULL on error
+ */
+CLLMBatchEngine* cllm_batch_engine_create(CLLMModel* model, int max_sequences, int max_seq_len,
+                                          int max_requests, int max_step_tokens);
+
+/**
+ * Free the engine (pending requests are dropped)
+ * 
+ * @param engine Engine
+ */
+void cllm_batch_engine_free(CLLMBatchEngine* engine);
+
+/**
+ * Set sampling parameters for all requests
+ * 
+ * @param engine Engine
+ * @param temperature Sampling temperature
+ * @param top_k Top-k (0 to disable)
+ * @param top_p Nucleus threshold (1.0 to disable)
+ */
+void cllm_batch_engine_set_sampling(CLLMBatchEngine* engine, float temperature, int top_k, float top_p);
+
+/**
+ * Set a token that ends a sequence when sampled (-1 for none)
+ * 
+ * @param engine Engine
+ * @param token Stop token
+ */
+void cllm_batch_engine_set_stop_token(CLLMBatchEngine* engine, int token);
+
+/**
+ * Queue a generation request
+ * 
+ * Prompts longer than max_seq_len - 1 keep only their most recent tokens.
+ * 
+ * @param engine Engine
+ * @param prompt Prompt tokens (copied)
+ * @param prompt_len Number of prompt tokens
+ * @param max_new_tokens Tokens to generate
+ * @param seed RNG seed for this request's sampling
+ * @return Request id, or -1 if the request table is full or the prompt invalid
+ */
+int cllm_batch_engine_submit(CLLMBatchEngine* engine, const uint32_t* prompt, int prompt_len,
+                             int max_new_tokens, uint64_t seed);
+
+/**
+ * Run one batched step
+ * 
+ * Admits queued requests into free sequence slots, runs one forward pass
+ * over every active sequence and samples the next token of each sequence
+ * whose prompt is complete.
+ * 
+ * @param engine Engine
+ * @return Rows processed (0 when idle), or -1 on error
+ */
+int cllm_batch_engine_step(CLLMBatchEngine* engine);
+
+/**
+ * Step until every submitted request has finished
+ * 
+ * @param engine Engine
+ * @return 0 on success, -1 on error
+ */
+int cllm_batch_engine_run(CLLMBatchEngine* engine);
+
+/**
+ * Get the state of a request
+ * 
+ * @param engine Engine
+ * @param request_id Request id
+ * @return Request state (CLLM_REQUEST_FREE for unknown ids)
+ */
+CLLMRequestState cllm_batch_engine_state(CLLMBatchEngine* engine, int request_id);
+
+/**
+ * Collect the generated tokens of a finished request and release it
+ * 
+ * @param engine Engine
+ * @param request_id Request id
+ * @param tokens Output buffer for generated tokens
+ * @param max_tokens Buffer capacity
+ * @return Tokens generated, or -1 if the request has not finished
+ */
+int cllm_batch_engine_collect(CLLMBatchEngine* engine, int request_id, uint32_t* tokens, int max_tokens);
+
+/**
+ * Get statistics snapshot
+ * 
+ * @param engine Engine
+ * @param stats Output statistics
+ */
+void cllm_batch_engine_get_stats(CLLMBatchEngine* engine, CLLMBatchEngineStats* stats);
+
+#endif /* CLLM_BATCH_INFERENCE_H */
\ No newline at end of file
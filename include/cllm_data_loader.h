@@ -27,13 +27,53 @@ typedef struct {
     int remove_numbers;
 } CLLMDataLoader;
 
+/**
+ * Token Dataset File Format (version 1)
+ * 
+ * [TokenDatasetHeader][padding to 64][tokens][padding to 8][doc index]
+ * 
+ * Tokens are stored as uint32 or, for vocabularies below 65536, uint16.
+ * The doc index is num_documents + 1 uint64 token offsets. All fields use
+ * the writer's byte order, recorded in endian_tag.
+ */
+#define TOKEN_DATASET_MAGIC "CLLMTOK"
+#define TOKEN_DATASET_VERSION 1
+#define TOKEN_DATASET_ENDIAN_TAG 0x01020304u
+
+typedef struct {
+    char magic[8];              // TOKEN_DATASET_MAGIC
+    uint32_t version;           // TOKEN_DATASET_VERSION
+    uint32_t endian_tag;        // TOKEN_DATASET_ENDIAN_TAG in writer byte order
+    uint32_t token_width;       // Bytes per token (2 or 4)
+    uint32_t vocab_hash;        // cllm_token_dataset_vocab_hash() of the tokenizer
+    uint64_t num_tokens;
+    uint64_t num_documents;
+    uint64_t tokens_offset;     // Byte offset of the token array
+    uint64_t index_offset;      // Byte offset of the doc index (0 = none)
+} TokenDatasetHeader;
+
 /**
  * Token Dataset Structure
+ * 
+ * Owned datasets (create/load) hold malloc'd arrays. Mapped datasets
+ * (cllm_token_dataset_mmap) point straight into a read-only file mapping;
+ * with 16-bit storage only tokens16 is set and tokens is NULL.
  */
 typedef struct {
     uint32_t* tokens;
     size_t num_tokens;
     size_t capacity;
+    
+    // Document boundaries: doc i spans [doc_offsets[i], doc_offsets[i + 1])
+    uint64_t* doc_offsets;      // num_documents + 1 entries, NULL if unknown
+    size_t num_documents;
+    uint32_t vocab_hash;        // 0 = unknown
+    
+    // Memory-mapped backing
+    const uint16_t* tokens16;   // 16-bit token view (mapped uint16 files only)
+    uint32_t token_width;       // Bytes per token in the backing store
+    void* map_base;             // Mapping base, NULL if not mapped
+    size_t map_size;
 } TokenDataset;
 
 /**
@@ -78,14 +118,103 @@ void cllm_token_dataset_free(TokenDataset* dataset);
 
 /**
  * Save Dataset
+ * 
+ * Writes the versioned format with 32-bit tokens.
  */
 int cllm_token_dataset_save(TokenDataset* dataset, const char* filename);
 
+/**
+ * Save Dataset with Token Width
+ * 
+ * @param token_width 2 (uint16, all token IDs must be < 65536) or 4
+ * @return 1 on success, 0 on failure
+ */
+int cllm_token_dataset_save_ex(TokenDataset* dataset, const char* filename, uint32_t token_width);
+
 /**
  * Load Dataset
+ * 
+ * Reads the whole file into memory (widening 16-bit tokens). Also accepts
+ * the legacy headerless format (size_t count + uint32 tokens).
  */
 TokenDataset* cllm_token_dataset_load(const char* filename);
 
+/**
+ * Memory-Map Dataset
+ * 
+ * Zero-copy, read-only load: tokens and doc index point into a shared
+ * file mapping, so several processes share one copy in the page cache.
+ * Free with cllm_token_dataset_free().
+ */
+TokenDataset* cllm_token_dataset_mmap(const char* filename);
+
+/**
+ * Get Token
+ * 
+ * Reads token i regardless of storage width.
+ */
+static inline uint32_t cllm_token_dataset_get(const TokenDataset* dataset, size_t i) {
+    return dataset->tokens ? dataset->tokens[i] : dataset->tokens16[i];
+}
+
+/**
+ * Vocabulary Hash
+ * 
+ * Hash of the tokenizer's token strings in ID order, stored in dataset
+ * headers so mismatched vocabularies can be detected.
+ */
+uint32_t cllm_token_dataset_vocab_hash(CLLMTokenizer* tokenizer);
+
+/**
+ * Shard Pipeline Options
+ */
+typedef struct {
+    size_t shard_tokens;        // Tokens per shard (0 = CLLM_SHARD_DEFAULT_TOKENS)
+    int num_workers;            // Clean/tokenize threads (0 = online CPUs)
+    int max_in_flight;          // Documents queued or in progress (0 = 4 per worker)
+    uint32_t token_width;       // Shard token width: 2, 4, or 0 = by vocab size
+    const char* file_list;      // Read input paths (one per line) instead of walking
+    int verbose;
+} CLLMShardOptions;
+
+#define CLLM_SHARD_DEFAULT_TOKENS (16u * 1024u * 1024u)
+#define CLLM_SHARD_MANIFEST "manifest.txt"
+
+/**
+ * Shard Pipeline Statistics
+ */
+typedef struct {
+    size_t files_processed;
+    size_t files_skipped;       // Unreadable or oversized
+    size_t bytes_read;
+    size_t tokens_written;
+    size_t shards_written;
+    size_t resumed_files;       // Files already covered by an earlier run
+} CLLMShardStats;
+
+/**
+ * Shard Directory
+ * 
+ * Streams a corpus into fixed-size TokenDataset shards without holding it
+ * in memory: a walker enumerates files in sorted order, worker threads
+ * clean and tokenize them, and the calling thread writes shard_NNNNNN.bin
+ * files in document order. Memory is bounded by max_in_flight documents
+ * plus one shard buffer.
+ * 
+ * Progress is recorded in output_dir/manifest.txt after every shard, so an
+ * interrupted run resumes from the last completed shard.
+ * 
+ * @param loader Data loader providing the tokenizer and cleaning options
+ * @param dirname Corpus root (ignored when options->file_list is set)
+ * @param output_dir Existing directory for shards and manifest
+ * @param options Pipeline options (NULL = defaults)
+ * @param stats Optional statistics output
+ * @return 0 on success, -1 on error
+ */
+int cllm_data_loader_shard_directory(CLLMDataLoader* loader, const char* dirname,
+                                     const char* output_dir, const CLLMShardOptions* options,
+                                     CLLMShardStats* stats);
+
 /**
  * Print Statistics
  */
@@ -14,6 +14,42 @@
 /* Local includes */
 #include "cllm.h"
 
+/*
+ * Model file layout (version 2, written by cllm_write_model)
+ *
+ * [CLLMHeader][CLLMTensorTable][CLLMTensorEntry x num_tensors]
+ * [padding to CLLM_TENSOR_ALIGNMENT][weights]
+ *
+ * The weights region is model->weights exactly - embeddings, per-layer
+ * Q/K/V, per-layer W1/b1/W2/b2, layer norm gamma/beta - starting on a page
+ * boundary, so cllm_read_model_mapped() can map it read-only and processes
+ * loading the same file share one copy. The table names every tensor with
+ * its offset and size; loaders check it against the configuration.
+ *
+ * Version 1 files (header followed by raw tensors, no layer norms) are
+ * still read.
+ */
+#define CLLM_FORMAT_VERSION_LEGACY 1
+#define CLLM_FORMAT_VERSION_TENSOR_TABLE 2
+#define CLLM_TENSOR_ALIGNMENT 4096
+#define CLLM_TENSOR_NAME_MAX 48
+#define CLLM_ENDIAN_TAG 0x01020304u
+
+typedef struct {
+    uint32_t num_tensors;
+    uint32_t endian_tag;        // CLLM_ENDIAN_TAG in writer byte order
+    uint32_t ff_dim;            // Feed-forward hidden dimension
+    uint32_t max_seq_len;
+    uint64_t data_offset;       // Byte offset of the weights region
+    uint64_t num_weights;       // Floats in the weights region
+} CLLMTensorTable;
+
+typedef struct {
+    char name[CLLM_TENSOR_NAME_MAX];  // e.g. "layers.0.attention.query"
+    uint64_t offset;            // Float offset within the weights region
+    uint64_t count;             // Number of floats
+} CLLMTensorEntry;
+
 /* Function declarations */
 void cllm_header_init(CLLMHeader* header, const char* model_name, const char* description);
 void cllm_prime_to_lattice(uint64_t prime, float coords[3], float* angle, float* radius);
@@ -41,6 +77,15 @@ void cllm_lattice_find_neighbors(CLLMLatticePoint* point, CLLMLatticePoint* all_
 CLLMModel* cllm_read_model(const char* filename);
 int cllm_write_model(const CLLMModel* model, const char* filepath);
 
+// Load with the weights mapped read-only from the file (version 2 files;
+// version 1 files are read into memory). Call cllm_model_make_writable()
+// before modifying the weights.
+CLLMModel* cllm_read_model_mapped(const char* filename);
+
+// Copy mapped weights into owned memory (no-op for owned weights)
+// Returns 0 on success, -1 on allocation failure
+int cllm_model_make_writable(CLLMModel* model);
+
 // DEPRECATED API REMOVED - Use cllm_read_model/cllm_write_model instead
 
 // Forward declaration for validation
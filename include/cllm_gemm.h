@@ -0,0 +1,128 @@
+#ifndef CLLM_GEMM_H
+#define CLLM_GEMM_H
+
+#include <stdbool.h>
+
+/**
+ * CLLM GEMM - Packed, Register-Blocked Matrix Multiplication
+ * 
+ * BLAS-style single-precision GEMM/GEMV for the model's dense layers:
+ * - Operands are packed into MR-row and NR-column panels so the
+ *   microkernel streams both from contiguous memory
+ * - The microkernel keeps an MR x NR tile of C in registers for a whole
+ *   KC-deep panel (6x32 AVX-512, 6x16 AVX2/FMA, 4x8 SSE, 4x4 scalar)
+ * - MC/KC/NC blocking keeps the packed A block in L2 and the B panel in L3
+ * - Large products are split along M or N across a persistent thread
+ *   pool (only one product at a time; threads that already run in
+ *   parallel can opt out with cllm_gemm_set_thread_serial)
+ * - The instruction set is detected once at startup; transposed operands
+ *   are handled while packing, so callers never transpose weights
+ * 
+ * All matrices are row-major with explicit leading dimensions.
+ */
+
+// Instruction sets with a microkernel
+typedef enum {
+    CLLM_GEMM_ISA_SCALAR = 0,
+    CLLM_GEMM_ISA_SSE,
+    CLLM_GEMM_ISA_AVX2,
+    CLLM_GEMM_ISA_AVX512
+} CLLMGemmIsa;
+
+/**
+ * General matrix multiply: C = alpha * op(A) * op(B) + beta * C
+ * 
+ * op(A) is m x k and op(B) is k x n. When beta is 0, C is not read.
+ * 
+ * @param trans_a Use A^T (A stored k x m)
+ * @param trans_b Use B^T (B stored n x k)
+ * @param m Rows of C
+ * @param n Columns of C
+ * @param k Inner dimension
+ * @param alpha Scale of the product
+ * @param A Matrix A
+ * @param lda Row stride of A
+ * @param B Matrix B
+ * @param ldb Row stride of B
+ * @param beta Scale of the existing C
+ * @param C Result matrix [m x n]
+ * @param ldc Row stride of C
+ */
+void cllm_gemm(bool trans_a, bool trans_b, int m, int n, int k,
+               float alpha, const float* A, int lda, const float* B, int ldb,
+               float beta, float* C, int ldc);
+
+/**
+ * Matrix-vector multiply: y = alpha * op(A) * x + beta * y
+ * 
+ * A is stored m x n. Without trans, x has n and y has m elements; with
+ * trans, x has m and y has n elements. When beta is 0, y is not read.
+ * 
+ * @param trans Use A^T
+ * @param m Rows of A
+ * @param n Columns of A
+ * @param alpha Scale of the product
+ * @param A Matrix A
+ * @param lda Row stride of A
+ * @param x Input vector
+ * @param beta Scale of the existing y
+ * @param y Output vector
+ */
+void cllm_gemv(bool trans, int m, int n, float alpha, const float* A, int lda,
+               const float* x, float beta, float* y);
+
+/**
+ * Rank-1 update: A += alpha * x * y^T
+ * 
+ * @param m Rows of A (length of x)
+ * @param n Columns of A (length of y)
+ * @param alpha Scale
+ * @param x Column vector [m]
+ * @param y Row vector [n]
+ * @param A Matrix [m x n]
+ * @param lda Row stride of A
+ */
+void cllm_ger(int m, int n, float alpha, const float* x, const float* y, float* A, int lda);
+
+/**
+ * Get the instruction set in use (detected on first call)
+ * 
+ * @return Instruction set
+ */
+CLLMGemmIsa cllm_gemm_get_isa(void);
+
+/**
+ * Force an instruction set (benchmarks and tests)
+ * 
+ * @param isa Instruction set
+ * @return 0 on success, -1 if the CPU does not support it
+ */
+int cllm_gemm_set_isa(CLLMGemmIsa isa);
+
+/**
+ * Get the name of an instruction set
+ * 
+ * @param isa Instruction set
+ * @return Name (e.g. "avx2")
+ */
+const char* cllm_gemm_isa_name(CLLMGemmIsa isa);
+
+/**
+ * Set the number of threads used for large products
+ * 
+ * @param num_threads Thread count (0 = number of cores, 1 = single-threaded)
+ */
+void cllm_gemm_set_threads(int num_threads);
+
+/**
+ * Keep every product on the calling thread
+ * 
+ * For threads that are already one of many workers (e.g. training
+ * threads), where splitting each product again would oversubscribe the
+ * cores. Pool workers are always serial.
+ * 
+ * @param serial true to run products on this thread only
+ */
+void cllm_gemm_set_thread_serial(bool serial);
+
+#endif /* CLLM_GEMM_H */
\ No newline at end of file
@@ -29,14 +29,24 @@ typedef struct {
     float repetition_penalty;    // Repetition penalty factor
     
     // KV cache for attention
-    int kv_cache_size;           // Size of KV cache
+    int kv_cache_size;           // Size of KV cache (positions per layer)
     int kv_cache_used;           // Number of cached positions
-    float* key_cache;            // Cached keys
-    float* value_cache;          // Cached values
+    float* key_cache;            // Cached keys [num_layers][kv_cache_size][embed_dim]
+    float* value_cache;          // Cached values [num_layers][kv_cache_size][embed_dim]
     
     // Working buffers
     float* hidden_states;        // Hidden state buffer
     float* logits;               // Output logits buffer
+    
+    // Per-step scratch (preallocated, reused by every forward call)
+    float* query_buf;            // Query projection [embed_dim]
+    float* attn_output;          // Attention output [embed_dim]
+    float* attn_scores;          // Attention weights [kv_cache_size]
+    float* ff_hidden;            // Feed-forward hidden activations [max hidden_dim]
+    
+    // Sampling state
+    IndexProb* sample_buf;       // Candidate scratch [vocab_size]
+    uint64_t rng_state;          // Per-inference RNG state (see cllm_set_seed)
 } CLLMInference;
 
 /* Function declarations */
@@ -60,6 +70,17 @@ void cllm_attention_forward(AttentionLayer* layer, float* input, float* output,
                            float* key_cache, float* value_cache, int seq_len);
 void cllm_attention_forward_hybrid(CLLMModel* model, AttentionLayer* layer, float* input, float* output,
                                    uint32_t* token_ids, float* key_cache, float* value_cache, int seq_len);
+void cllm_attention_project_qkv(AttentionLayer* layer, const float* input, float* queries,
+                                float* keys, float* values, int seq_len);
+void cllm_attention_forward_tiled(AttentionLayer* layer, float* input, float* output,
+                                  float* key_cache, float* value_cache, int seq_len);
+int cllm_attention_tiled_forward(const float* queries, const float* keys, const float* values,
+                                 float* output, float* lse, int seq_len, int num_heads,
+                                 int head_dim, int stride, bool causal);
+int cllm_attention_tiled_backward(const float* queries, const float* keys, const float* values,
+                                  const float* output, const float* grad_output, const float* lse,
+                                  float* grad_queries, float* grad_keys, float* grad_values,
+                                  int seq_len, int num_heads, int head_dim, int stride, bool causal);
 void cllm_multi_head_attention(CLLMInference* inf, int layer_idx, float* input, float* output, int seq_len);
 void cllm_attention_init(AttentionLayer* layer, uint32_t num_heads, uint32_t head_dim);
 void cllm_attention_free(AttentionLayer* layer);
@@ -110,12 +131,16 @@ void cllm_generate_symmetry_attention_mask(int* symmetry_groups, int seq_len, fl
 
 /* Forward pass and generation */
 void cllm_forward(CLLMInference* inference, uint32_t* tokens, int num_tokens);
+void cllm_inference_reset_cache(CLLMInference* inference);
+int cllm_forward_cached(CLLMInference* inference, uint32_t token, bool compute_logits);
+int cllm_prefill(CLLMInference* inference, uint32_t* tokens, int num_tokens);
 void cllm_compute_logits(CLLMInference* inf, float* hidden_state);
 int cllm_sample_token(CLLMInference* inf, float* logits);
 void cllm_apply_temperature(float* logits, int vocab_size, float temperature);
 void cllm_softmax(float* logits, int vocab_size);
 uint32_t cllm_sample_top_k(float* probs, int vocab_size, int k);
 uint32_t cllm_sample_top_p(float* probs, int vocab_size, float p);
+uint32_t cllm_sample_logits(CLLMInference* inference, const float* logits);
 int cllm_generate(CLLMInference* inference, const char* prompt, char* output, int max_output_length);
 
 /* Configuration */
@@ -123,6 +148,7 @@ void cllm_set_temperature(CLLMInference* inference, float temperature);
 void cllm_set_top_p(CLLMInference* inference, float top_p);
 void cllm_set_top_k(CLLMInference* inference, int top_k);
 void cllm_set_max_tokens(CLLMInference* inference, int max_tokens);
+void cllm_set_seed(CLLMInference* inference, uint64_t seed);
 void cllm_inference_cleanup(CLLMInference* inference);
 
 #endif /* CLLM_INFERENCE_H */
\ No newline at end of file
@@ -70,7 +70,7 @@ void vector_scale(float* result, const float* a, float scalar, int n);
 
 /**
  * SIMD matrix-vector multiplication: result = A * x
- * Uses AVX2 for vectorization
+ * Delegates to cllm_gemv (instruction set chosen at runtime)
  * 
  * @param result Result vector [m]
  * @param A Matrix [m x n] in row-major order
@@ -82,7 +82,7 @@ void simd_matrix_vector_multiply(float* result, const float* A, const float* x,
 
 /**
  * SIMD matrix-matrix multiplication: C = A * B
- * Uses AVX2 for vectorization with cache-friendly blocking
+ * Delegates to cllm_gemm (packed, register-blocked, multithreaded)
  * 
  * @param C Result matrix [m x p] in row-major order
  * @param A First matrix [m x n] in row-major order
@@ -95,7 +95,7 @@ void simd_matrix_multiply(float* C, const float* A, const float* B, int m, int n
 
 /**
  * SIMD transposed matrix-matrix multiplication: C = A^T * B
- * More cache-friendly for certain operations
+ * Delegates to cllm_gemm; A is transposed while packing
  * 
  * @param C Result matrix [m x p] in row-major order
  * @param A First matrix [n x m] in row-major order (will be transposed)
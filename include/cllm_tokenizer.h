@@ -6,12 +6,26 @@
 
 /**
  * Tokenizer Structure
+ * 
+ * Token strings live in one contiguous arena (vocab[i] points into it)
+ * and are indexed by an open-addressing hash table, so lookups are O(1)
+ * instead of a linear scan over the vocabulary.
  */
 typedef struct {
     char** vocab;
     uint32_t* token_counts;
     uint32_t vocab_size;
     uint32_t max_vocab_size;
+    
+    // String arena backing vocab[]
+    char* string_arena;
+    size_t arena_used;
+    size_t arena_capacity;
+    
+    // Hash index: slot holds token_id + 1 (0 = empty)
+    uint32_t* hash_index;
+    uint32_t* token_hashes;     // Cached hash per token ID
+    uint32_t hash_capacity;     // Power of two, >= 2 * max_vocab_size
 } CLLMTokenizer;
 
 /**
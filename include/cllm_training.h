@@ -17,6 +17,15 @@
 
 /* Type definitions */
 
+/*
+ * Attention kernel for the training forward pass
+ */
+typedef enum {
+    CLLM_ATTENTION_TILED = 0,    // Tiled streaming softmax; backward recomputes the weights
+    CLLM_ATTENTION_HYBRID        // cllm_attention_forward_hybrid (NTT / angular / dot product),
+                                 // no attention cache, simplified attention gradients
+} CLLMAttentionKernel;
+
 /*
  * CLLM Training Configuration
  */
@@ -51,6 +60,9 @@ typedef struct {
     float loss_scale_backoff;         // Backoff factor for dynamic loss scaling (default: 0.5)
     int loss_scale_window;            // Steps before increasing loss scale (default: 2000)
     
+    // Attention
+    CLLMAttentionKernel attention_kernel;  // Forward kernel (default: CLLM_ATTENTION_TILED)
+    
 } CLLMTrainingConfig;
 
 /*
@@ -129,15 +141,15 @@ typedef struct {
     float** layer_outputs;           // Per-layer final outputs
     float** ff_hidden;               // Per-layer FF hidden states
     float* final_hidden;             // Final hidden state
-    float* logits;                   // Output logits [batch * seq * vocab]
     
-    // Attention backward pass storage (for full gradient computation)
+    // Attention backward pass storage (for full gradient computation);
+    // attention weights are recomputed tile by tile in backward
     struct {
-        float* attention_weights;    // [num_heads * seq_len * seq_len]
-        float* queries;              // [seq_len * embedding_dim]
-        float* keys;                 // [seq_len * embedding_dim]
-        float* values;               // [seq_len * embedding_dim]
-        float* scores;               // [num_heads * seq_len * seq_len]
+        float* queries;              // [batch * seq_len * embedding_dim]
+        float* keys;                 // [batch * seq_len * embedding_dim]
+        float* values;               // [batch * seq_len * embedding_dim]
+        float* outputs;              // [batch * seq_len * embedding_dim]
+        float* lse;                  // Softmax log-sum-exp [batch * num_heads * seq_len]
     }* attention_cache;              // Array of num_layers
     
     int cached_seq_len;              // Cached sequence length
@@ -151,6 +163,20 @@ typedef struct {
 float cllm_compute_accuracy(float* logits, uint32_t* targets, int batch_size, int vocab_size);
 float cllm_compute_top_k_accuracy(float* logits, uint32_t* targets, int batch_size, int vocab_size, int k);
 
+/**
+ * Fused vocabulary projection + log-softmax + cross-entropy + gradient
+ * 
+ * Processes the vocabulary in chunks and never stores the full
+ * [num_rows x vocab_size] logits. grad_hidden is overwritten,
+ * grad_embeddings is accumulated; either can be NULL.
+ * 
+ * @return Average loss over positions whose target is < vocab_size
+ */
+float cllm_fused_cross_entropy(const float* hidden, const float* embeddings,
+                               const uint32_t* targets, int num_rows, int embed_dim,
+                               int vocab_size, float grad_scale,
+                               float* grad_hidden, float* grad_embeddings);
+
 /* Optimizer functions */
 void cllm_apply_gradient_clipping(float* gradients, size_t size, float max_norm);
 void cllm_clip_gradients_by_value(float* gradients, size_t size, float clip_value);
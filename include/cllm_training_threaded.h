@@ -29,19 +29,11 @@ typedef struct {
     float** layer_outputs;           // [num_layers][batch * seq * embed]
     float** ff_hidden;               // [num_layers][batch * seq * ff_hidden]
     float* final_hidden;             // [batch * seq * embed]
-    float* logits;                   // [batch * seq * vocab]
     
-    // Attention cache (thread-local)
-    struct {
-        float* attention_weights;    // [num_heads * seq * seq]
-        float* queries;              // [seq * embed]
-        float* keys;                 // [seq * embed]
-        float* values;               // [seq * embed]
-        float* scores;               // [num_heads * seq * seq]
-    }* attention_cache;              // [num_layers]
+    // No attention cache: the threaded forward pass passes attention
+    // through unchanged and the backward pass stops at the hidden state
     
     // Backward pass temporary buffers (thread-local)
-    float* grad_logits;              // [batch * seq * vocab]
     float* grad_hidden;              // [batch * seq * embed]
     float* grad_layer;               // [batch * seq * embed]
     
@@ -124,6 +116,20 @@ ThreadedTrainingSystem* threaded_training_create(CLLMTraining* training,
                                                   CLLMBatchIterator* batch_iterator,
                                                   int num_threads);
 
+/**
+ * Replace the batch iterator between epochs
+ * 
+ * Lets a long-running system train on new data without recreating its
+ * threads and buffers. Must not be called while an epoch is running; the
+ * caller keeps ownership of both iterators. Set NULL before freeing the
+ * iterator; epochs are skipped until a new one is set.
+ * 
+ * @param system Threaded training system
+ * @param batch_iterator Iterator used by the next epoch (can be NULL)
+ */
+void threaded_training_set_batch_iterator(ThreadedTrainingSystem* system,
+                                          CLLMBatchIterator* batch_iterator);
+
 /**
  * Free threaded training system
  */
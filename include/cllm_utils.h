@@ -32,6 +32,13 @@ void cllm_print_config(const CLLMConfig* config);
 // Create a model from configuration
 CLLMModel* cllm_create_model(const CLLMConfig* config);
 
+// Allocate a model without initializing its weights (for loaders that
+// overwrite every weight; layer structure, tokens and lattice are set up)
+CLLMModel* cllm_allocate_model(const CLLMConfig* config);
+
+// Point a model's tensors into a weight block with the layout of model->weights
+void cllm_model_bind_weights(CLLMModel* model, float* weights);
+
 // Free model and all associated memory
 void cllm_free_model(CLLMModel* model);
 
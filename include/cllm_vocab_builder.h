@@ -2,6 +2,7 @@
 #define CLLM_VOCAB_BUILDER_H
 
 #include "cllm.h"
+#include "cllm_tokenizer.h"
 
 /**
  * Build vocabulary from training file and store in model
@@ -21,4 +22,50 @@ int cllm_tokenize_with_vocab(CLLMModel* model, const char* text, uint32_t* token
 void cllm_detokenize_with_vocab(CLLMModel* model, uint32_t* tokens, int num_tokens, 
                                  char* output, int max_length);
 
+/**
+ * Parallel Vocabulary Builder
+ * 
+ * Map-reduce word counting over many threads. Counts accumulate across
+ * add_texts/add_files calls; finish merges them into a tokenizer, adding
+ * new tokens by descending frequency (ties broken by byte order) until
+ * max_vocab_size is reached. Token IDs are therefore reproducible and
+ * independent of the thread count. Tokens already in the tokenizer keep
+ * their IDs and have their counts increased.
+ */
+typedef struct CLLMVocabBuilder CLLMVocabBuilder;
+
+/**
+ * Create builder (num_threads <= 0 uses all online CPUs)
+ */
+CLLMVocabBuilder* cllm_vocab_builder_create(int num_threads);
+
+/**
+ * Free builder
+ */
+void cllm_vocab_builder_free(CLLMVocabBuilder* builder);
+
+/**
+ * Count words in NUL-terminated texts (NULL entries are skipped)
+ * Returns 0 on success, -1 on error
+ */
+int cllm_vocab_builder_add_texts(CLLMVocabBuilder* builder, const char* const* texts, size_t num_texts);
+
+/**
+ * Count words in files (memory-mapped, split across threads)
+ * Returns number of files counted, or -1 on error
+ */
+int cllm_vocab_builder_add_files(CLLMVocabBuilder* builder, const char* const* paths, size_t num_paths);
+
+/**
+ * Merge, sort and prune counts into tokenizer, then reset the counts
+ * Returns resulting vocabulary size
+ */
+uint32_t cllm_vocab_builder_finish(CLLMVocabBuilder* builder, CLLMTokenizer* tokenizer);
+
+/**
+ * Build vocabulary from texts in parallel (one-shot wrapper)
+ */
+void cllm_build_vocab_parallel(CLLMTokenizer* tokenizer, const char* const* texts,
+                               size_t num_texts, int num_threads);
+
 #endif // CLLM_VOCAB_BUILDER_H
\ No newline at end of file
@@ -3,6 +3,7 @@
 
 #include <pthread.h>
 #include <stdbool.h>
+#include <stdint.h>
 #include "../src/crawler/content_filter.h"
 
 // Forward declarations for internal component states
@@ -10,6 +11,7 @@ typedef struct CrawlerStateInternal CrawlerStateInternal;
 typedef struct PreprocessorState PreprocessorState;
 typedef struct TokenizerState TokenizerState;
 typedef struct ContinuousTrainingState ContinuousTrainingState;
+typedef struct StageQueue StageQueue;
 
 // High-level API state (opaque to users)
 typedef struct CrawlerState CrawlerState;
@@ -177,18 +179,24 @@ void crawler_state_cleanup(CrawlerState* state);
 CrawlerStateInternal* crawler_internal_init(const char* data_dir, const char* start_url, int max_pages);
 void crawler_internal_set_url_manager(CrawlerStateInternal* state, void* url_manager);
 void crawler_internal_cleanup(CrawlerStateInternal* state);
+void crawler_internal_set_output(CrawlerStateInternal* state, StageQueue* output);
 void* crawler_thread_func(void* arg);
 
 PreprocessorState* preprocessor_init(const char* data_dir);
 void preprocessor_cleanup(PreprocessorState* state);
+void preprocessor_set_queues(PreprocessorState* state, StageQueue* input, StageQueue* output);
 void* preprocessor_thread_func(void* arg);
 
 TokenizerState* tokenizer_init(const char* data_dir);
 void tokenizer_cleanup(TokenizerState* state);
+void tokenizer_set_queues(TokenizerState* state, StageQueue* input, StageQueue* output);
 void* tokenizer_thread_func(void* arg);
+uint32_t tokenizer_vocab_match(TokenizerState* state, uint32_t fingerprint);
 
 ContinuousTrainingState* continuous_training_init(const char* data_dir, const char* model_path, 
                                                    void* model, int num_threads);
+void continuous_training_set_queue(ContinuousTrainingState* state, StageQueue* input);
+void continuous_training_set_vocab(ContinuousTrainingState* state, TokenizerState* tokenizer);
 int continuous_training_start(ContinuousTrainingState* state, pthread_t* threads);
 void continuous_training_stop(ContinuousTrainingState* state, pthread_t* threads);
 void continuous_training_cleanup(ContinuousTrainingState* state);
@@ -5,6 +5,10 @@
  * HYBRID ATTENTION SYSTEM:
  * - When token IDs available: Use angular attention (OBJECTIVE 15)
  * - When token IDs unavailable: Use standard dot product attention
+ * 
+ * TILED ATTENTION: cllm_attention_tiled_forward/backward stream key tiles
+ * through an online softmax and recompute the weights in backward, so
+ * nothing seq_len x seq_len is stored (used by training).
  */
 
 #include <stdio.h>
@@ -15,6 +19,7 @@
 #include "../include/cllm_inference.h"
 #include "../include/prime_float_math.h"
 #include "../include/cllm_simd_utils.h"
+#include "../include/cllm_gemm.h"
 #include "../include/cllm_cache.h"
 #include "../include/ai/cllm_angular_attention.h"
 #include "../include/ai/cllm_ntt_attention.h"
@@ -64,21 +69,18 @@ static void softmax(float* x, int size) {
  * @param keys Key matrix [seq_len x head_dim]
  * @param values Value matrix [seq_len x head_dim]
  * @param output Output vector [head_dim]
+ * @param scores Scratch for the attention scores [seq_len]
  * @param head_dim Dimension per head
  * @param seq_len Sequence length
  */
 static void scaled_dot_product_attention(float* query, float* keys, float* values,
-                                        float* output, int head_dim, int seq_len) {
-    if (!query || !keys || !values || !output || head_dim <= 0 || seq_len <= 0) {
+                                        float* output, float* scores, int head_dim, int seq_len) {
+    if (!query || !keys || !values || !output || !scores || head_dim <= 0 || seq_len <= 0) {
         return;
     }
     
     float scale = 1.0f / prime_sqrt((float)head_dim);
     
-    // Allocate attention scores
-    float* scores = (float*)malloc(seq_len * sizeof(float));
-    if (!scores) return;
-    
     // Compute attention scores using SIMD dot product: scores[i] = query · keys[i] / sqrt(head_dim)
     for (int i = 0; i < seq_len; i++) {
         // Prefetch next key for better cache utilization
@@ -118,8 +120,37 @@ static void scaled_dot_product_attention(float* query, float* keys, float* value
             output[j] += score * values[i * head_dim + j];
         }
     }
+}
+
+/**
+ * Project input to Q, K, V
+ * 
+ * Each head is its own [head_dim x head_dim] block, so
+ * Q_h [seq_len x head_dim] = X_h * W_h^T over all positions.
+ * 
+ * @param layer Attention layer parameters
+ * @param input Input sequence [seq_len x embedding_dim]
+ * @param queries Output queries [seq_len x embedding_dim]
+ * @param keys Output keys [seq_len x embedding_dim]
+ * @param values Output values [seq_len x embedding_dim]
+ * @param seq_len Sequence length
+ */
+void cllm_attention_project_qkv(AttentionLayer* layer, const float* input, float* queries,
+                                float* keys, float* values, int seq_len) {
+    uint32_t num_heads = layer->num_heads;
+    uint32_t head_dim = layer->head_dim;
+    uint32_t embedding_dim = num_heads * head_dim;
     
-    free(scores);
+    for (uint32_t h = 0; h < num_heads; h++) {
+        size_t w = (size_t)h * head_dim * head_dim;
+        const float* x = &input[h * head_dim];
+        cllm_gemm(false, true, seq_len, head_dim, head_dim, 1.0f, x, embedding_dim,
+                  &layer->query_lattice[w], head_dim, 0.0f, &queries[h * head_dim], embedding_dim);
+        cllm_gemm(false, true, seq_len, head_dim, head_dim, 1.0f, x, embedding_dim,
+                  &layer->key_lattice[w], head_dim, 0.0f, &keys[h * head_dim], embedding_dim);
+        cllm_gemm(false, true, seq_len, head_dim, head_dim, 1.0f, x, embedding_dim,
+                  &layer->value_lattice[w], head_dim, 0.0f, &values[h * head_dim], embedding_dim);
+    }
 }
 
 /**
@@ -140,63 +171,22 @@ void cllm_attention_forward(AttentionLayer* layer, float* input, float* output,
     uint32_t head_dim = layer->head_dim;
     uint32_t embedding_dim = num_heads * head_dim;
     
-    // Allocate buffers for Q, K, V projections
+    // Allocate buffers for Q, K, V projections and one row of scores,
+    // reused by every query
     float* queries = (float*)malloc(seq_len * embedding_dim * sizeof(float));
     float* keys = (float*)malloc(seq_len * embedding_dim * sizeof(float));
     float* values = (float*)malloc(seq_len * embedding_dim * sizeof(float));
+    float* scores = (float*)malloc(seq_len * sizeof(float));
     
-    if (!queries || !keys || !values) {
-        if (queries) free(queries);
-        if (keys) free(keys);
-        if (values) free(values);
+    if (!queries || !keys || !values || !scores) {
+        free(queries);
+        free(keys);
+        free(values);
+        free(scores);
         return;
     }
     
-    // Project input to Q, K, V
-    // For simplicity, using the lattice weights directly
-    // In a full implementation, these would be separate projection matrices
-    (void)num_heads;  // Used for structure, suppress warning
-    (void)head_dim;   // Used for structure, suppress warning
-    
-    for (int pos = 0; pos < seq_len; pos++) {
-        float* input_vec = &input[pos * embedding_dim];
-        
-        // Query projection
-        for (uint32_t h = 0; h < num_heads; h++) {
-            for (uint32_t d = 0; d < head_dim; d++) {
-                float sum = 0.0f;
-                for (uint32_t i = 0; i < head_dim; i++) {
-                    size_t weight_idx = h * head_dim * head_dim + d * head_dim + i;
-                    sum += layer->query_lattice[weight_idx] * input_vec[h * head_dim + i];
-                }
-                queries[pos * embedding_dim + h * head_dim + d] = sum;
-            }
-        }
-        
-        // Key projection
-        for (uint32_t h = 0; h < num_heads; h++) {
-            for (uint32_t d = 0; d < head_dim; d++) {
-                float sum = 0.0f;
-                for (uint32_t i = 0; i < head_dim; i++) {
-                    size_t weight_idx = h * head_dim * head_dim + d * head_dim + i;
-                    sum += layer->key_lattice[weight_idx] * input_vec[h * head_dim + i];
-                }
-                keys[pos * embedding_dim + h * head_dim + d] = sum;
-            }
-        }
-        
-        // Value projection
-        for (uint32_t h = 0; h < num_heads; h++) {
-            for (uint32_t d = 0; d < head_dim; d++) {
-                float sum = 0.0f;
-                for (uint32_t i = 0; i < head_dim; i++) {
-                    size_t weight_idx = h * head_dim * head_dim + d * head_dim + i;
-                    sum += layer->value_lattice[weight_idx] * input_vec[h * head_dim + i];
-                }
-                values[pos * embedding_dim + h * head_dim + d] = sum;
-            }
-        }
-    }
+    cllm_attention_project_qkv(layer, input, queries, keys, values, seq_len);
     
     // Use cached keys/values if available
     if (key_cache) {
@@ -218,7 +208,7 @@ void cllm_attention_forward(AttentionLayer* layer, float* input, float* output,
             
             // Compute attention for this head
             scaled_dot_product_attention(query, head_keys, head_values,
-                                        head_output, head_dim, seq_len);
+                                        head_output, scores, head_dim, seq_len);
         }
     }
     
@@ -230,6 +220,329 @@ void cllm_attention_forward(AttentionLayer* layer, float* input, float* output,
         memcpy(value_cache, values, seq_len * embedding_dim * sizeof(float));
     }
     
+    free(queries);
+    free(keys);
+    free(values);
+    free(scores);
+}
+
+// ============================================================================
+// TILED ATTENTION (STREAMING SOFTMAX)
+// ============================================================================
+
+// Query and key rows per tile
+#define ATTN_TILE_Q 64
+#define ATTN_TILE_K 64
+
+/**
+ * exp(x) for the x <= 0 a max-shifted score takes
+ * 
+ * x = k * ln2 + r with |r| <= ln2 / 2, a degree-6 polynomial for exp(r),
+ * and 2^k put straight into the exponent bits; relative error ~1e-7.
+ * The Taylor series in prime_expf costs an iteration per term and this
+ * runs once per score.
+ */
+static inline float tile_expf(float x) {
+    if (x < -87.0f) return 0.0f;
+    
+    float k = (float)(int)(x * 1.44269504f - 0.5f);
+    float r = x - k * 0.693147181f;
+    float p = 1.0f + r * (1.0f + r * (0.5f + r * (1.0f / 6.0f + r * (1.0f / 24.0f +
+              r * (1.0f / 120.0f + r * (1.0f / 720.0f))))));
+    
+    union { uint32_t i; float f; } scale = { .i = (uint32_t)((int)k + 127) << 23 };
+    return p * scale.f;
+}
+
+/**
+ * Keys of a tile that row `row` may attend to (all of them unless causal)
+ */
+static int tile_key_limit(int row, int key_start, int tile_keys, bool causal) {
+    if (!causal) return tile_keys;
+    int limit = row - key_start + 1;
+    if (limit < 0) return 0;
+    return limit < tile_keys ? limit : tile_keys;
+}
+
+/**
+ * Tiled attention forward pass with online softmax
+ * 
+ * For each head, query tiles are run against key tiles: the score tile
+ * Q_i * K_j^T / sqrt(head_dim) is computed with cllm_gemm, each row's
+ * running max and sum of exponentials are updated (rescaling the partial
+ * output when the max grows), and P * V_j is accumulated into the tile's
+ * output. Only one ATTN_TILE_Q x ATTN_TILE_K score tile exists at a time,
+ * so memory is O(seq_len) per head instead of O(seq_len^2).
+ * 
+ * @param queries Queries [seq_len x stride], head h at column h * head_dim
+ * @param keys Keys [seq_len x stride]
+ * @param values Values [seq_len x stride]
+ * @param output Output [seq_len x stride]
+ * @param lse Output: log-sum-exp of each row's scores [num_heads x seq_len],
+ *            needed by cllm_attention_tiled_backward (can be NULL)
+ * @param seq_len Sequence length
+ * @param num_heads Number of heads
+ * @param head_dim Dimension per head
+ * @param stride Row stride of all matrices (usually num_heads * head_dim)
+ * @param causal Position i attends only to positions <= i
+ * @return 0 on success, -1 on failure
+ */
+int cllm_attention_tiled_forward(const float* queries, const float* keys, const float* values,
+                                 float* output, float* lse, int seq_len, int num_heads,
+                                 int head_dim, int stride, bool causal) {
+    if (!queries || !keys || !values || !output || seq_len <= 0 || num_heads <= 0 || head_dim <= 0) {
+        return -1;
+    }
+    
+    float* scores = (float*)malloc(ATTN_TILE_Q * ATTN_TILE_K * sizeof(float));
+    float* acc = (float*)malloc((size_t)ATTN_TILE_Q * head_dim * sizeof(float));
+    float* row_max = (float*)malloc(ATTN_TILE_Q * sizeof(float));
+    float* row_sum = (float*)malloc(ATTN_TILE_Q * sizeof(float));
+    if (!scores || !acc || !row_max || !row_sum) {
+        free(scores);
+        free(acc);
+        free(row_max);
+        free(row_sum);
+        return -1;
+    }
+    
+    float scale = 1.0f / prime_sqrtf((float)head_dim);
+    
+    for (int h = 0; h < num_heads; h++) {
+        int col = h * head_dim;
+        
+        for (int q0 = 0; q0 < seq_len; q0 += ATTN_TILE_Q) {
+            int tile_q = seq_len - q0 < ATTN_TILE_Q ? seq_len - q0 : ATTN_TILE_Q;
+            int key_end = causal ? q0 + tile_q : seq_len;
+            
+            for (int r = 0; r < tile_q; r++) {
+                row_max[r] = -1e30f;
+                row_sum[r] = 0.0f;
+            }
+            memset(acc, 0, (size_t)tile_q * head_dim * sizeof(float));
+            
+            for (int k0 = 0; k0 < key_end; k0 += ATTN_TILE_K) {
+                int tile_k = key_end - k0 < ATTN_TILE_K ? key_end - k0 : ATTN_TILE_K;
+                
+                // S = Q_i * K_j^T * scale
+                cllm_gemm(false, true, tile_q, tile_k, head_dim, scale,
+                          &queries[(size_t)q0 * stride + col], stride,
+                          &keys[(size_t)k0 * stride + col], stride, 0.0f, scores, ATTN_TILE_K);
+                
+                // Online softmax: S becomes exp(S - new max)
+                for (int r = 0; r < tile_q; r++) {
+                    float* row = &scores[r * ATTN_TILE_K];
+                    int limit = tile_key_limit(q0 + r, k0, tile_k, causal);
+                    
+                    float max_score = row_max[r];
+                    for (int c = 0; c < limit; c++) {
+                        if (row[c] > max_score) max_score = row[c];
+                    }
+                    
+                    float sum = 0.0f;
+                    for (int c = 0; c < limit; c++) {
+                        row[c] = tile_expf(row[c] - max_score);
+                        sum += row[c];
+                    }
+                    for (int c = limit; c < tile_k; c++) row[c] = 0.0f;
+                    
+                    if (row_sum[r] > 0.0f && max_score > row_max[r]) {
+                        float correction = tile_expf(row_max[r] - max_score);
+                        row_sum[r] *= correction;
+                        float* out = &acc[(size_t)r * head_dim];
+                        for (int d = 0; d < head_dim; d++) out[d] *= correction;
+                    }
+                    row_max[r] = max_score;
+                    row_sum[r] += sum;
+                }
+                
+                // acc += P * V_j
+                cllm_gemm(false, false, tile_q, head_dim, tile_k, 1.0f, scores, ATTN_TILE_K,
+                          &values[(size_t)k0 * stride + col], stride, 1.0f, acc, head_dim);
+            }
+            
+            for (int r = 0; r < tile_q; r++) {
+                float* out = &output[(size_t)(q0 + r) * stride + col];
+                float inv = row_sum[r] > 0.0f ? 1.0f / row_sum[r] : 0.0f;
+                for (int d = 0; d < head_dim; d++) out[d] = acc[(size_t)r * head_dim + d] * inv;
+                if (lse) lse[(size_t)h * seq_len + q0 + r] = row_max[r] + prime_logf(row_sum[r]);
+            }
+        }
+    }
+    
+    free(scores);
+    free(acc);
+    free(row_max);
+    free(row_sum);
+    return 0;
+}
+
+/**
+ * Tiled attention backward pass (recomputes the attention weights)
+ * 
+ * Each score tile is recomputed from Q and K and turned back into
+ * probabilities with the log-sum-exp saved by the forward pass, so no
+ * seq_len x seq_len matrix is kept between forward and backward.
+ * 
+ * @param queries Queries [seq_len x stride]
+ * @param keys Keys [seq_len x stride]
+ * @param values Values [seq_len x stride]
+ * @param output Forward output [seq_len x stride]
+ * @param grad_output Gradient w.r.t. the output [seq_len x stride]
+ * @param lse Log-sum-exp from cllm_attention_tiled_forward [num_heads x seq_len]
+ * @param grad_queries Output: gradient w.r.t. queries [seq_len x stride]
+ * @param grad_keys Output: gradient w.r.t. keys [seq_len x stride]
+ * @param grad_values Output: gradient w.r.t. values [seq_len x stride]
+ * @param seq_len Sequence length
+ * @param num_heads Number of heads
+ * @param head_dim Dimension per head
+ * @param stride Row stride of all matrices
+ * @param causal Must match the forward pass
+ * @return 0 on success, -1 on failure
+ */
+int cllm_attention_tiled_backward(const float* queries, const float* keys, const float* values,
+                                  const float* output, const float* grad_output, const float* lse,
+                                  float* grad_queries, float* grad_keys, float* grad_values,
+                                  int seq_len, int num_heads, int head_dim, int stride, bool causal) {
+    if (!queries || !keys || !values || !output || !grad_output || !lse ||
+        !grad_queries || !grad_keys || !grad_values ||
+        seq_len <= 0 || num_heads <= 0 || head_dim <= 0) {
+        return -1;
+    }
+    
+    float* probs = (float*)malloc(ATTN_TILE_Q * ATTN_TILE_K * sizeof(float));
+    float* grad_scores = (float*)malloc(ATTN_TILE_Q * ATTN_TILE_K * sizeof(float));
+    float* delta = (float*)malloc(seq_len * sizeof(float));
+    if (!probs || !grad_scores || !delta) {
+        free(probs);
+        free(grad_scores);
+        free(delta);
+        return -1;
+    }
+    
+    float scale = 1.0f / prime_sqrtf((float)head_dim);
+    
+    for (int h = 0; h < num_heads; h++) {
+        int col = h * head_dim;
+        const float* head_lse = &lse[(size_t)h * seq_len];
+        
+        // delta_i = dO_i . O_i (the softmax backward row term), and clear
+        // this head's gradients
+        for (int i = 0; i < seq_len; i++) {
+            size_t at = (size_t)i * stride + col;
+            delta[i] = dot_product(&grad_output[at], &output[at], head_dim);
+            memset(&grad_queries[at], 0, head_dim * sizeof(float));
+            memset(&grad_keys[at], 0, head_dim * sizeof(float));
+            memset(&grad_values[at], 0, head_dim * sizeof(float));
+        }
+        
+        for (int k0 = 0; k0 < seq_len; k0 += ATTN_TILE_K) {
+            int tile_k = seq_len - k0 < ATTN_TILE_K ? seq_len - k0 : ATTN_TILE_K;
+            const float* key_tile = &keys[(size_t)k0 * stride + col];
+            const float* value_tile = &values[(size_t)k0 * stride + col];
+            
+            // Query tiles that see any key of this tile
+            int q_start = causal ? (k0 / ATTN_TILE_Q) * ATTN_TILE_Q : 0;
+            for (int q0 = q_start; q0 < seq_len; q0 += ATTN_TILE_Q) {
+                int tile_q = seq_len - q0 < ATTN_TILE_Q ? seq_len - q0 : ATTN_TILE_Q;
+                const float* query_tile = &queries[(size_t)q0 * stride + col];
+                const float* grad_out_tile = &grad_output[(size_t)q0 * stride + col];
+                
+                // P = exp(Q_i * K_j^T * scale - lse_i)
+                cllm_gemm(false, true, tile_q, tile_k, head_dim, scale, query_tile, stride,
+                          key_tile, stride, 0.0f, probs, ATTN_TILE_K);
+                for (int r = 0; r < tile_q; r++) {
+                    float* row = &probs[r * ATTN_TILE_K];
+                    int limit = tile_key_limit(q0 + r, k0, tile_k, causal);
+                    for (int c = 0; c < limit; c++) row[c] = tile_expf(row[c] - head_lse[q0 + r]);
+                    for (int c = limit; c < tile_k; c++) row[c] = 0.0f;
+                }
+                
+                // dV_j += P^T * dO_i
+                cllm_gemm(true, false, tile_k, head_dim, tile_q, 1.0f, probs, ATTN_TILE_K,
+                          grad_out_tile, stride, 1.0f, &grad_values[(size_t)k0 * stride + col], stride);
+                
+                // dS = P * (dO_i * V_j^T - delta_i)
+                cllm_gemm(false, true, tile_q, tile_k, head_dim, 1.0f, grad_out_tile, stride,
+                          value_tile, stride, 0.0f, grad_scores, ATTN_TILE_K);
+                for (int r = 0; r < tile_q; r++) {
+                    float* grad_row = &grad_scores[r * ATTN_TILE_K];
+                    const float* prob_row = &probs[r * ATTN_TILE_K];
+                    for (int c = 0; c < tile_k; c++) {
+                        grad_row[c] = prob_row[c] * (grad_row[c] - delta[q0 + r]);
+                    }
+                }
+                
+                // dQ_i += dS * K_j * scale, dK_j += dS^T * Q_i * scale
+                cllm_gemm(false, false, tile_q, head_dim, tile_k, scale, grad_scores, ATTN_TILE_K,
+                          key_tile, stride, 1.0f, &grad_queries[(size_t)q0 * stride + col], stride);
+                cllm_gemm(true, false, tile_k, head_dim, tile_q, scale, grad_scores, ATTN_TILE_K,
+                          query_tile, stride, 1.0f, &grad_keys[(size_t)k0 * stride + col], stride);
+            }
+        }
+    }
+    
+    free(probs);
+    free(grad_scores);
+    free(delta);
+    return 0;
+}
+
+/**
+ * Multi-head attention forward pass using the tiled kernel
+ * 
+ * Same projections, caches and (non-causal) attention as
+ * cllm_attention_forward, but without a scores buffer per query.
+ * 
+ * @param layer Attention layer parameters
+ * @param input Input sequence [seq_len x embedding_dim]
+ * @param output Output sequence [seq_len x embedding_dim]
+ * @param key_cache Cached keys [seq_len x embedding_dim] (can be NULL)
+ * @param value_cache Cached values [seq_len x embedding_dim] (can be NULL)
+ * @param seq_len Sequence length
+ */
+void cllm_attention_forward_tiled(AttentionLayer* layer, float* input, float* output,
+                                  float* key_cache, float* value_cache, int seq_len) {
+    if (!layer || !input || !output || seq_len <= 0) return;
+    
+    uint32_t num_heads = layer->num_heads;
+    uint32_t head_dim = layer->head_dim;
+    uint32_t embedding_dim = num_heads * head_dim;
+    
+    float* queries = (float*)malloc(seq_len * embedding_dim * sizeof(float));
+    float* keys = (float*)malloc(seq_len * embedding_dim * sizeof(float));
+    float* values = (float*)malloc(seq_len * embedding_dim * sizeof(float));
+    
+    if (!queries || !keys || !values) {
+        free(queries);
+        free(keys);
+        free(values);
+        return;
+    }
+    
+    cllm_attention_project_qkv(layer, input, queries, keys, values, seq_len);
+    
+    // Use cached keys/values if available
+    if (key_cache) {
+        memcpy(keys, key_cache, seq_len * embedding_dim * sizeof(float));
+    }
+    if (value_cache) {
+        memcpy(values, value_cache, seq_len * embedding_dim * sizeof(float));
+    }
+    
+    if (cllm_attention_tiled_forward(queries, keys, values, output, NULL, seq_len,
+                                     num_heads, head_dim, embedding_dim, false) != 0) {
+        memset(output, 0, seq_len * embedding_dim * sizeof(float));
+    }
+    
+    // Update caches if provided
+    if (key_cache) {
+        memcpy(key_cache, keys, seq_len * embedding_dim * sizeof(float));
+    }
+    if (value_cache) {
+        memcpy(value_cache, values, seq_len * embedding_dim * sizeof(float));
+    }
+    
     free(queries);
     free(keys);
     free(values);
@@ -404,20 +717,11 @@ void cllm_attention_forward_hybrid(
             return;
         }
         
-        // Project input to values
-        for (int pos = 0; pos < seq_len; pos++) {
-            float* input_vec = &input[pos * embedding_dim];
-            
-            for (uint32_t h = 0; h < num_heads; h++) {
-                for (uint32_t d = 0; d < head_dim; d++) {
-                    float sum = 0.0f;
-                    for (uint32_t i = 0; i < head_dim; i++) {
-                        size_t weight_idx = h * head_dim * head_dim + d * head_dim + i;
-                        sum += layer->value_lattice[weight_idx] * input_vec[h * head_dim + i];
-                    }
-                    values[pos * embedding_dim + h * head_dim + d] = sum;
-                }
-            }
+        // Project input to values (per head, all positions at once)
+        for (uint32_t h = 0; h < num_heads; h++) {
+            cllm_gemm(false, true, seq_len, head_dim, head_dim, 1.0f, &input[h * head_dim], embedding_dim,
+                      &layer->value_lattice[(size_t)h * head_dim * head_dim], head_dim,
+                      0.0f, &values[h * head_dim], embedding_dim);
         }
         
         // Use cached values if available
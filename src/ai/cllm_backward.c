@@ -8,6 +8,7 @@
 #include <string.h>
 #include <stdlib.h>
 #include "../include/prime_float_math.h"
+#include "../include/cllm_gemm.h"
 #include <stdio.h>
 
 /**
@@ -168,25 +169,17 @@ static void backward_feed_forward(float* grad_out, float* grad_in, float* x,
         return;
     }
     
-    // Forward pass to get hidden activations
+    // Forward pass to get hidden activations (W1 is [input_dim x hidden_dim])
+    cllm_gemv(true, input_dim, hidden_dim, 1.0f, ff->w1_lattice, hidden_dim, x, 0.0f, hidden);
     for (int h = 0; h < hidden_dim; h++) {
-        float sum = ff->bias1[h];
-        for (int i = 0; i < input_dim; i++) {
-            sum += x[i] * ff->w1_lattice[i * hidden_dim + h];
-        }
-        hidden[h] = prime_tanhf(sum);  // ReLU or tanh activation
+        hidden[h] = prime_tanhf(hidden[h] + ff->bias1[h]);  // ReLU or tanh activation
     }
     
-    // Backward through second layer
-    for (int o = 0; o < output_dim; o++) {
-        for (int h = 0; h < hidden_dim; h++) {
-            // Gradient w.r.t. w2
-            if (grad_w2) grad_w2[h * output_dim + o] += hidden[h] * grad_out[o];
-            // Gradient w.r.t. hidden
-            grad_hidden[h] += ff->w2_lattice[h * output_dim + o] * grad_out[o];
-        }
-        // Gradient w.r.t. bias2
-        if (grad_b2) grad_b2[o] += grad_out[o];
+    // Backward through second layer (W2 is [hidden_dim x output_dim])
+    if (grad_w2) cllm_ger(hidden_dim, output_dim, 1.0f, hidden, grad_out, grad_w2, output_dim);
+    cllm_gemv(false, hidden_dim, output_dim, 1.0f, ff->w2_lattice, output_dim, grad_out, 0.0f, grad_hidden);
+    if (grad_b2) {
+        for (int o = 0; o < output_dim; o++) grad_b2[o] += grad_out[o];
     }
     
     // Backward through activation
@@ -196,16 +189,10 @@ static void backward_feed_forward(float* grad_out, float* grad_in, float* x,
     }
     
     // Backward through first layer
-    memset(grad_in, 0, input_dim * sizeof(float));
-    for (int h = 0; h < hidden_dim; h++) {
-        for (int i = 0; i < input_dim; i++) {
-            // Gradient w.r.t. w1
-            if (grad_w1) grad_w1[i * hidden_dim + h] += x[i] * grad_hidden[h];
-            // Gradient w.r.t. input
-            grad_in[i] += ff->w1_lattice[i * hidden_dim + h] * grad_hidden[h];
-        }
-        // Gradient w.r.t. bias1
-        if (grad_b1) grad_b1[h] += grad_hidden[h];
+    if (grad_w1) cllm_ger(input_dim, hidden_dim, 1.0f, x, grad_hidden, grad_w1, hidden_dim);
+    cllm_gemv(false, input_dim, hidden_dim, 1.0f, ff->w1_lattice, hidden_dim, grad_hidden, 0.0f, grad_in);
+    if (grad_b1) {
+        for (int h = 0; h < hidden_dim; h++) grad_b1[h] += grad_hidden[h];
     }
     
     free(hidden);
@@ -237,13 +224,9 @@ static void backward_attention(float* grad_out, float* grad_in, float* x,
     memcpy(grad_in, grad_out, dim * sizeof(float));
     
     // Accumulate gradients for projection matrices
-    for (uint32_t i = 0; i < dim; i++) {
-        for (uint32_t j = 0; j < dim; j++) {
-            if (grad_query) grad_query[i * dim + j] += x[i] * grad_out[j] * 0.1f;
-            if (grad_key) grad_key[i * dim + j] += x[i] * grad_out[j] * 0.1f;
-            if (grad_value) grad_value[i * dim + j] += x[i] * grad_out[j] * 0.1f;
-        }
-    }
+    if (grad_query) cllm_ger(dim, dim, 0.1f, x, grad_out, grad_query, dim);
+    if (grad_key) cllm_ger(dim, dim, 0.1f, x, grad_out, grad_key, dim);
+    if (grad_value) cllm_ger(dim, dim, 0.1f, x, grad_out, grad_value, dim);
 }
 
 /**
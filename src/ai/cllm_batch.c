@@ -6,6 +6,7 @@
 
 #include "cllm_training.h"
 #include "cllm_tokenizer.h"
+#include "cllm_data_loader.h"
 #include <stdlib.h>
 #include <string.h>
 #include <stdio.h>
@@ -34,6 +35,7 @@ void cllm_batch_free(CLLMBatch* batch);
  */
 typedef struct {
     uint32_t* tokens;           // Source tokens
+    const uint16_t* tokens16;   // Source tokens with 16-bit storage (if tokens is NULL)
     size_t num_tokens;          // Total number of tokens
     size_t current_pos;         // Current position in tokens
     uint32_t batch_size;
@@ -100,6 +102,38 @@ CLLMBatchIterator* cllm_batch_iterator_create(uint32_t* tokens, size_t num_token
     return iter;
 }
 
+/**
+ * Create Batch Iterator over a Token Dataset
+ * 
+ * Reads tokens straight from the dataset's storage, including the
+ * read-only mapping of cllm_token_dataset_mmap(), without copying.
+ */
+CLLMBatchIterator* cllm_batch_iterator_create_from_dataset(const TokenDataset* dataset,
+                                                            uint32_t batch_size, uint32_t seq_len,
+                                                            int shuffle, int drop_last) {
+    if (!dataset || dataset->num_tokens == 0) return NULL;
+    if (!dataset->tokens && !dataset->tokens16) return NULL;
+    
+    CLLMBatchIterator* iter = (CLLMBatchIterator*)calloc(1, sizeof(CLLMBatchIterator));
+    if (!iter) return NULL;
+    
+    iter->tokens = dataset->tokens;
+    iter->tokens16 = dataset->tokens ? NULL : dataset->tokens16;
+    iter->num_tokens = dataset->num_tokens;
+    iter->current_pos = 0;
+    iter->batch_size = batch_size;
+    iter->seq_len = seq_len;
+    iter->shuffle = shuffle;
+    iter->drop_last = drop_last;
+    
+    return iter;
+}
+
+// Token at pos, whichever width the source uses
+static inline uint32_t iterator_token(const CLLMBatchIterator* iter, size_t pos) {
+    return iter->tokens ? iter->tokens[pos] : iter->tokens16[pos];
+}
+
 /**
  * Free Batch Iterator
  */
@@ -160,8 +194,8 @@ CLLMBatch* cllm_batch_iterator_next(CLLMBatchIterator* iter) {
             
             if (token_pos < iter->num_tokens - 1) {
                 // Valid token
-                batch->input_ids[idx] = iter->tokens[token_pos];
-                batch->target_ids[idx] = iter->tokens[token_pos + 1];
+                batch->input_ids[idx] = iterator_token(iter, token_pos);
+                batch->target_ids[idx] = iterator_token(iter, token_pos + 1);
                 batch->attention_mask[idx] = 1.0f;
                 batch->num_valid_tokens++;
             } else {
@@ -0,0 +1,513 @@
+/**
+ * cllm_batch_inference.c - Batched Inference Engine with Continuous Batching
+ * 
+ * Activations for all rows of a step live in one [rows x embed_dim]
+ * matrix, and every projection (per-head QKV, feed-forward, vocabulary)
+ * is one cllm_gemm call over all rows, with the weights used in their
+ * stored layout through the transpose flags.
+ */
+
+#include "cllm_batch_inference.h"
+#include "cllm_inference.h"
+#include "cllm_simd_utils.h"
+#include "cllm_gemm.h"
+#include "../include/prime_float_math.h"
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+// Defined in cllm_inference.c
+void cllm_layer_norm_old(float* x, CLLMLayerNorm* ln, uint32_t dim);
+
+// One generation request
+typedef struct {
+    CLLMRequestState state;
+    uint32_t* tokens;           // Prompt followed by generated tokens [max_seq_len]
+    int prompt_len;
+    int num_tokens;             // Tokens known (prompt + generated)
+    int processed;              // Tokens whose keys/values are cached
+    int max_new_tokens;
+    int generated;
+    int slot;                   // Sequence slot while running, -1 otherwise
+    uint64_t rng_state;         // Sampling RNG (see cllm_set_seed)
+    uint64_t order;             // Submission order
+} BatchRequest;
+
+struct CLLMBatchEngine {
+    CLLMModel* model;
+    CLLMInference* sampler;     // Sampling settings and scratch
+    int max_sequences;
+    int max_seq_len;
+    int max_requests;
+    int max_step_tokens;
+    int stop_token;
+    
+    BatchRequest* requests;     // [max_requests]
+    int* slot_request;          // Request index per sequence slot, -1 if free
+    uint64_t next_order;
+    
+    // KV caches: [max_sequences][num_layers][max_seq_len][embed_dim]
+    float* key_cache;
+    float* value_cache;
+    
+    // Per-step buffers (rows = max_step_tokens)
+    int* row_request;           // Request index of each row
+    int* row_position;          // Token position of each row
+    int* sample_rows;           // Rows whose logits are needed [max_sequences]
+    float* x;                   // Activations [rows x embed_dim]
+    float* q;                   // Queries [rows x embed_dim]
+    float* k;                   // Keys [rows x embed_dim]
+    float* v;                   // Values [rows x embed_dim]
+    float* ff_hidden;           // Feed-forward activations [rows x max_hidden]
+    float* scores;              // Attention weights [max_seq_len]
+    float* logits;              // Logits [max_sequences x vocab_size]
+    
+    CLLMBatchEngineStats stats;
+};
+
+// ============================================================================
+// CREATION AND CONFIGURATION
+// ============================================================================
+
+CLLMBatchEngine* cllm_batch_engine_create(CLLMModel* model, int max_sequences, int max_seq_len,
+                                          int max_requests, int max_step_tokens) {
+    if (!model || !model->embeddings.embeddings || max_sequences <= 0 ||
+        max_seq_len < 2 || max_requests <= 0) {
+        fprintf(stderr, "Error: Invalid batch engine parameters\n");
+        return NULL;
+    }
+    
+    uint32_t embed_dim = model->embeddings.embedding_dim;
+    uint32_t max_hidden = 1;
+    for (uint32_t i = 0; model->ff_layers && i < model->num_layers; i++) {
+        FeedForwardLayer* ff = &model->ff_layers[i];
+        if (ff->input_dim != embed_dim || ff->output_dim != embed_dim) {
+            fprintf(stderr, "Error: feed-forward layer %u is %ux%u, expected %ux%u\n",
+                    i, ff->input_dim, ff->output_dim, embed_dim, embed_dim);
+            return NULL;
+        }
+        if (ff->hidden_dim > max_hidden) max_hidden = ff->hidden_dim;
+    }
+    
+    if (max_step_tokens <= 0) max_step_tokens = CLLM_BATCH_DEFAULT_STEP_TOKENS;
+    // Every decoding sequence needs a row in each step
+    if (max_step_tokens < max_sequences) max_step_tokens = max_sequences;
+    
+    CLLMBatchEngine* engine = (CLLMBatchEngine*)calloc(1, sizeof(CLLMBatchEngine));
+    if (!engine) return NULL;
+    
+    engine->model = model;
+    engine->max_sequences = max_sequences;
+    engine->max_seq_len = max_seq_len;
+    engine->max_requests = max_requests;
+    engine->max_step_tokens = max_step_tokens;
+    engine->stop_token = -1;
+    engine->sampler = cllm_inference_init(model);
+    
+    size_t num_layers = model->num_layers > 0 ? model->num_layers : 1;
+    size_t cache_floats = (size_t)max_sequences * num_layers * max_seq_len * embed_dim;
+    size_t rows = (size_t)max_step_tokens;
+    
+    engine->requests = (BatchRequest*)calloc(max_requests, sizeof(BatchRequest));
+    engine->slot_request = (int*)malloc(max_sequences * sizeof(int));
+    engine->key_cache = (float*)malloc(cache_floats * sizeof(float));
+    engine->value_cache = (float*)malloc(cache_floats * sizeof(float));
+    engine->row_request = (int*)malloc(rows * sizeof(int));
+    engine->row_position = (int*)malloc(rows * sizeof(int));
+    engine->sample_rows = (int*)malloc(max_sequences * sizeof(int));
+    engine->x = (float*)calloc(rows * embed_dim, sizeof(float));
+    engine->q = (float*)calloc(rows * embed_dim, sizeof(float));
+    engine->k = (float*)calloc(rows * embed_dim, sizeof(float));
+    engine->v = (float*)calloc(rows * embed_dim, sizeof(float));
+    engine->ff_hidden = (float*)calloc(rows * max_hidden, sizeof(float));
+    engine->scores = (float*)calloc(max_seq_len, sizeof(float));
+    engine->logits = (float*)calloc((size_t)model->vocab_size * max_sequences, sizeof(float));
+    
+    if (!engine->sampler || !engine->requests || !engine->slot_request ||
+        !engine->key_cache || !engine->value_cache || !engine->row_request ||
+        !engine->row_position || !engine->sample_rows || !engine->x ||
+        !engine->q || !engine->k || !engine->v || !engine->ff_hidden ||
+        !engine->scores || !engine->logits) {
+        fprintf(stderr, "Error: Failed to allocate batch engine buffers\n");
+        cllm_batch_engine_free(engine);
+        return NULL;
+    }
+    
+    for (int i = 0; i < max_requests; i++) {
+        engine->requests[i].slot = -1;
+    }
+    for (int s = 0; s < max_sequences; s++) {
+        engine->slot_request[s] = -1;
+    }
+    
+    return engine;
+}
+
+void cllm_batch_engine_free(CLLMBatchEngine* engine) {
+    if (!engine) return;
+    
+    if (engine->requests) {
+        for (int i = 0; i < engine->max_requests; i++) {
+            free(engine->requests[i].tokens);
+        }
+    }
+    if (engine->sampler) cllm_inference_cleanup(engine->sampler);
+    free(engine->requests);
+    free(engine->slot_request);
+    free(engine->key_cache);
+    free(engine->value_cache);
+    free(engine->row_request);
+    free(engine->row_position);
+    free(engine->sample_rows);
+    free(engine->x);
+    free(engine->q);
+    free(engine->k);
+    free(engine->v);
+    free(engine->ff_hidden);
+    free(engine->scores);
+    free(engine->logits);
+    free(engine);
+}
+
+void cllm_batch_engine_set_sampling(CLLMBatchEngine* engine, float temperature, int top_k, float top_p) {
+    if (!engine) return;
+    cllm_set_temperature(engine->sampler, temperature);
+    cllm_set_top_k(engine->sampler, top_k);
+    cllm_set_top_p(engine->sampler, top_p);
+}
+
+void cllm_batch_engine_set_stop_token(CLLMBatchEngine* engine, int token) {
+    if (engine) engine->stop_token = token;
+}
+
+// ============================================================================
+// REQUESTS
+// ============================================================================
+
+int cllm_batch_engine_submit(CLLMBatchEngine* engine, const uint32_t* prompt, int prompt_len,
+                             int max_new_tokens, uint64_t seed) {
+    if (!engine || !prompt || prompt_len <= 0 || max_new_tokens <= 0) return -1;
+    
+    for (int i = 0; i < prompt_len; i++) {
+        if (prompt[i] >= engine->model->vocab_size) {
+            fprintf(stderr, "Error: prompt token %u out of range\n", prompt[i]);
+            return -1;
+        }
+    }
+    
+    int id = -1;
+    for (int i = 0; i < engine->max_requests; i++) {
+        if (engine->requests[i].state == CLLM_REQUEST_FREE) {
+            id = i;
+            break;
+        }
+    }
+    if (id < 0) return -1;
+    
+    BatchRequest* req = &engine->requests[id];
+    if (!req->tokens) {
+        req->tokens = (uint32_t*)malloc(engine->max_seq_len * sizeof(uint32_t));
+        if (!req->tokens) return -1;
+    }
+    
+    // Keep the most recent tokens, leaving room for at least one more
+    int start = prompt_len > engine->max_seq_len - 1 ? prompt_len - (engine->max_seq_len - 1) : 0;
+    req->prompt_len = prompt_len - start;
+    memcpy(req->tokens, prompt + start, req->prompt_len * sizeof(uint32_t));
+    req->num_tokens = req->prompt_len;
+    req->processed = 0;
+    req->max_new_tokens = max_new_tokens;
+    req->generated = 0;
+    req->slot = -1;
+    req->rng_state = seed;
+    req->order = engine->next_order++;
+    req->state = CLLM_REQUEST_QUEUED;
+    
+    return id;
+}
+
+CLLMRequestState cllm_batch_engine_state(CLLMBatchEngine* engine, int request_id) {
+    if (!engine || request_id < 0 || request_id >= engine->max_requests) return CLLM_REQUEST_FREE;
+    return engine->requests[request_id].state;
+}
+
+int cllm_batch_engine_collect(CLLMBatchEngine* engine, int request_id, uint32_t* tokens, int max_tokens) {
+    if (cllm_batch_engine_state(engine, request_id) != CLLM_REQUEST_FINISHED) return -1;
+    
+    BatchRequest* req = &engine->requests[request_id];
+    int count = req->generated < max_tokens ? req->generated : max_tokens;
+    if (tokens && count > 0) {
+        memcpy(tokens, req->tokens + req->prompt_len, count * sizeof(uint32_t));
+    }
+    req->state = CLLM_REQUEST_FREE;
+    return req->generated;
+}
+
+void cllm_batch_engine_get_stats(CLLMBatchEngine* engine, CLLMBatchEngineStats* stats) {
+    if (engine && stats) *stats = engine->stats;
+}
+
+// Move the oldest queued requests into free sequence slots
+static void admit_requests(CLLMBatchEngine* engine) {
+    for (int s = 0; s < engine->max_sequences; s++) {
+        if (engine->slot_request[s] >= 0) continue;
+        
+        int oldest = -1;
+        for (int i = 0; i < engine->max_requests; i++) {
+            BatchRequest* req = &engine->requests[i];
+            if (req->state == CLLM_REQUEST_QUEUED &&
+                (oldest < 0 || req->order < engine->requests[oldest].order)) {
+                oldest = i;
+            }
+        }
+        if (oldest < 0) return;
+        
+        engine->requests[oldest].state = CLLM_REQUEST_RUNNING;
+        engine->requests[oldest].slot = s;
+        engine->slot_request[s] = oldest;
+    }
+}
+
+// Leave the batch; the slot is reused by the next admitted request
+static void finish_request(CLLMBatchEngine* engine, int index) {
+    BatchRequest* req = &engine->requests[index];
+    engine->slot_request[req->slot] = -1;
+    req->slot = -1;
+    req->state = CLLM_REQUEST_FINISHED;
+    engine->stats.completed++;
+}
+
+// ============================================================================
+// BATCHED FORWARD STEP
+// ============================================================================
+
+// Add bias to every row of a [rows x cols] matrix, optionally applying ReLU
+static void add_bias_rows(float* m, const float* bias, int rows, int cols, bool relu) {
+    for (int r = 0; r < rows; r++) {
+        float* row = &m[(size_t)r * cols];
+        vector_add(row, row, bias, cols);
+        if (relu) {
+            for (int c = 0; c < cols; c++) {
+                if (row[c] < 0.0f) row[c] = 0.0f;
+            }
+        }
+    }
+}
+
+// KV cache of one sequence slot and layer
+static size_t cache_offset(CLLMBatchEngine* engine, int slot, uint32_t layer) {
+    size_t num_layers = engine->model->num_layers > 0 ? engine->model->num_layers : 1;
+    return ((size_t)slot * num_layers + layer) * engine->max_seq_len *
+           engine->model->embeddings.embedding_dim;
+}
+
+/**
+ * Attention for every row over its own sequence's cached positions
+ * 
+ * Keys/values of all rows are in the caches already, so rows of a prompt
+ * chunk attend causally to each other. Output replaces the first
+ * num_heads * head_dim activations of the row, as in forward_step.
+ */
+static void batch_attention(CLLMBatchEngine* engine, AttentionLayer* layer, uint32_t l, int rows) {
+    uint32_t embed_dim = engine->model->embeddings.embedding_dim;
+    uint32_t num_heads = layer->num_heads;
+    uint32_t head_dim = layer->head_dim;
+    float scale = 1.0f / prime_sqrtf((float)head_dim);
+    float* scores = engine->scores;
+    
+    for (int r = 0; r < rows; r++) {
+        int slot = engine->requests[engine->row_request[r]].slot;
+        int position = engine->row_position[r];
+        const float* keys = &engine->key_cache[cache_offset(engine, slot, l)];
+        const float* values = &engine->value_cache[cache_offset(engine, slot, l)];
+        float* out = &engine->x[(size_t)r * embed_dim];
+        
+        for (uint32_t h = 0; h < num_heads; h++) {
+            const float* query = &engine->q[(size_t)r * embed_dim + h * head_dim];
+            float* head_out = &out[h * head_dim];
+            
+            float max_score = -1e30f;
+            for (int t = 0; t <= position; t++) {
+                scores[t] = dot_product(query, &keys[(size_t)t * embed_dim + h * head_dim], head_dim) * scale;
+                if (scores[t] > max_score) max_score = scores[t];
+            }
+            
+            float sum = 0.0f;
+            for (int t = 0; t <= position; t++) {
+                scores[t] = prime_expf(scores[t] - max_score);
+                sum += scores[t];
+            }
+            
+            memset(head_out, 0, head_dim * sizeof(float));
+            for (int t = 0; t <= position; t++) {
+                float weight = scores[t] / sum;
+                const float* value = &values[(size_t)t * embed_dim + h * head_dim];
+                for (uint32_t d = 0; d < head_dim; d++) {
+                    head_out[d] += weight * value[d];
+                }
+            }
+        }
+    }
+}
+
+// Run all rows of the step through the transformer stack
+static int batch_forward(CLLMBatchEngine* engine, int rows) {
+    CLLMModel* model = engine->model;
+    uint32_t embed_dim = model->embeddings.embedding_dim;
+    
+    for (int r = 0; r < rows; r++) {
+        BatchRequest* req = &engine->requests[engine->row_request[r]];
+        int position = engine->row_position[r];
+        float* row = &engine->x[(size_t)r * embed_dim];
+        cllm_get_embedding(engine->sampler, req->tokens[position], row);
+        cllm_apply_positional_encoding(engine->sampler, row, position);
+    }
+    
+    if (!model->attention_layers || !model->ff_layers || !model->layer_norms) return 0;
+    
+    for (uint32_t l = 0; l < model->num_layers; l++) {
+        AttentionLayer* attn = &model->attention_layers[l];
+        FeedForwardLayer* ff = &model->ff_layers[l];
+        uint32_t head_dim = attn->head_dim;
+        uint32_t attn_dim = attn->num_heads * head_dim;
+        if (attn_dim > embed_dim) {
+            fprintf(stderr, "Error: attention dim %u exceeds embedding dim %u\n", attn_dim, embed_dim);
+            return -1;
+        }
+        
+        for (int r = 0; r < rows; r++) {
+            cllm_layer_norm_old(&engine->x[(size_t)r * embed_dim], &model->layer_norms[l], embed_dim);
+        }
+        
+        // Per-head projections: Q_h [rows x head_dim] = X_h * W_h^T
+        for (uint32_t h = 0; h < attn->num_heads; h++) {
+            size_t w = (size_t)h * head_dim * head_dim;
+            const float* x_h = engine->x + h * head_dim;
+            cllm_gemm(false, true, rows, head_dim, head_dim, 1.0f, x_h, embed_dim,
+                      attn->query_lattice + w, head_dim, 0.0f, engine->q + h * head_dim, embed_dim);
+            cllm_gemm(false, true, rows, head_dim, head_dim, 1.0f, x_h, embed_dim,
+                      attn->key_lattice + w, head_dim, 0.0f, engine->k + h * head_dim, embed_dim);
+            cllm_gemm(false, true, rows, head_dim, head_dim, 1.0f, x_h, embed_dim,
+                      attn->value_lattice + w, head_dim, 0.0f, engine->v + h * head_dim, embed_dim);
+        }
+        
+        // Append each row's key/value to its sequence's cache
+        for (int r = 0; r < rows; r++) {
+            int slot = engine->requests[engine->row_request[r]].slot;
+            size_t at = cache_offset(engine, slot, l) + (size_t)engine->row_position[r] * embed_dim;
+            memcpy(&engine->key_cache[at], &engine->k[(size_t)r * embed_dim], attn_dim * sizeof(float));
+            memcpy(&engine->value_cache[at], &engine->v[(size_t)r * embed_dim], attn_dim * sizeof(float));
+        }
+        
+        batch_attention(engine, attn, l, rows);
+        
+        // Feed-forward: H = ReLU(X * W1 + b1), X = H * W2 + b2
+        if (ff->w1_lattice && ff->bias1) {
+            cllm_gemm(false, false, rows, ff->hidden_dim, embed_dim, 1.0f, engine->x, embed_dim,
+                      ff->w1_lattice, ff->hidden_dim, 0.0f, engine->ff_hidden, ff->hidden_dim);
+            add_bias_rows(engine->ff_hidden, ff->bias1, rows, ff->hidden_dim, true);
+        }
+        if (ff->w2_lattice && ff->bias2) {
+            cllm_gemm(false, false, rows, embed_dim, ff->hidden_dim, 1.0f, engine->ff_hidden, ff->hidden_dim,
+                      ff->w2_lattice, embed_dim, 0.0f, engine->x, embed_dim);
+            add_bias_rows(engine->x, ff->bias2, rows, embed_dim, false);
+        }
+    }
+    
+    return 0;
+}
+
+// Final layer norm and vocabulary projection for the sampled rows
+static void batch_logits(CLLMBatchEngine* engine, int num_samples) {
+    CLLMModel* model = engine->model;
+    uint32_t embed_dim = model->embeddings.embedding_dim;
+    
+    // Gather the sampled rows; q is free once the layers are done
+    for (int s = 0; s < num_samples; s++) {
+        float* row = &engine->x[(size_t)engine->sample_rows[s] * embed_dim];
+        if (model->attention_layers && model->ff_layers && model->layer_norms) {
+            cllm_layer_norm_old(row, &model->layer_norms[model->num_layers - 1], embed_dim);
+        }
+        memcpy(&engine->q[(size_t)s * embed_dim], row, embed_dim * sizeof(float));
+    }
+    
+    // Logits [samples x vocab] = X [samples x embed] * E^T
+    cllm_gemm(false, true, num_samples, model->vocab_size, embed_dim, 1.0f, engine->q, embed_dim,
+              model->embeddings.embeddings, embed_dim, 0.0f, engine->logits, model->vocab_size);
+}
+
+int cllm_batch_engine_step(CLLMBatchEngine* engine) {
+    if (!engine) return -1;
+    
+    admit_requests(engine);
+    
+    // Decoding sequences first (one row each), then prompt chunks
+    int rows = 0;
+    int num_samples = 0;
+    uint32_t active = 0;
+    for (int pass = 0; pass < 2; pass++) {
+        for (int s = 0; s < engine->max_sequences && rows < engine->max_step_tokens; s++) {
+            int index = engine->slot_request[s];
+            if (index < 0) continue;
+            BatchRequest* req = &engine->requests[index];
+            int pending = req->num_tokens - req->processed;
+            if (pending == 0 || (pass == 0) != (pending == 1)) continue;
+            
+            int take = pending < engine->max_step_tokens - rows ? pending : engine->max_step_tokens - rows;
+            for (int i = 0; i < take; i++) {
+                engine->row_request[rows] = index;
+                engine->row_position[rows] = req->processed + i;
+                rows++;
+            }
+            req->processed += take;
+            active++;
+            if (req->processed == req->num_tokens) {
+                engine->sample_rows[num_samples++] = rows - 1;
+            }
+        }
+    }
+    if (rows == 0) return 0;
+    
+    if (batch_forward(engine, rows) != 0) return -1;
+    
+    engine->stats.steps++;
+    engine->stats.rows += rows;
+    if (active > engine->stats.max_active) engine->stats.max_active = active;
+    
+    if (num_samples == 0) return rows;
+    batch_logits(engine, num_samples);
+    
+    // Sample with each request's own RNG so batching does not change its output
+    CLLMInference* sampler = engine->sampler;
+    uint32_t vocab_size = engine->model->vocab_size;
+    for (int s = 0; s < num_samples; s++) {
+        int index = engine->row_request[engine->sample_rows[s]];
+        BatchRequest* req = &engine->requests[index];
+        
+        memcpy(sampler->logits, &engine->logits[(size_t)s * vocab_size], vocab_size * sizeof(float));
+        sampler->rng_state = req->rng_state;
+        uint32_t token = cllm_sample_logits(sampler, sampler->logits);
+        req->rng_state = sampler->rng_state;
+        
+        req->tokens[req->num_tokens++] = token;
+        req->generated++;
+        engine->stats.generated++;
+        
+        if (req->generated >= req->max_new_tokens || req->num_tokens >= engine->max_seq_len ||
+            (engine->stop_token >= 0 && token == (uint32_t)engine->stop_token)) {
+            finish_request(engine, index);
+        }
+    }
+    
+    return rows;
+}
+
+int cllm_batch_engine_run(CLLMBatchEngine* engine) {
+    if (!engine) return -1;
+    
+    for (;;) {
+        int rows = cllm_batch_engine_step(engine);
+        if (rows < 0) return -1;
+        if (rows == 0) return 0;
+    }
+}
\ No newline at end of file
@@ -1,5 +1,6 @@
 #include "cllm.h"
 #include "cllm_inference.h"
+#include "cllm_batch_inference.h"
 #include "cllm_training.h"
 #include <stdlib.h>
 #include <string.h>
@@ -143,10 +144,11 @@ BenchmarkResults cllm_benchmark_inference_batch(CLLMModel* model, uint32_t* inpu
     printf("  Sequence length: %zu\n", seq_length);
     printf("  Iterations: %d\n", num_iterations);
     
-    // Allocate output buffer
-    float* logits = (float*)malloc(batch_size * model->vocab_size * sizeof(float));
-    if (!logits) {
-        fprintf(stderr, "Failed to allocate logits buffer\n");
+    // Every row of the batch is one request; the engine runs them together
+    CLLMBatchEngine* engine = cllm_batch_engine_create(model, (int)batch_size, (int)seq_length + 1,
+                                                       (int)batch_size, 0);
+    if (!engine) {
+        fprintf(stderr, "Failed to create batch engine\n");
         return results;
     }
     
@@ -155,11 +157,13 @@ BenchmarkResults cllm_benchmark_inference_batch(CLLMModel* model, uint32_t* inpu
     timer_start(&timer);
     
     for (int i = 0; i < num_iterations; i++) {
-        // Simulate batch inference
         for (size_t b = 0; b < batch_size; b++) {
-            for (size_t j = 0; j < model->vocab_size; j++) {
-                logits[b * model->vocab_size + j] = (float)j / model->vocab_size;
-            }
+            int id = cllm_batch_engine_submit(engine, input_ids, (int)seq_length, 1, (uint64_t)b);
+            if (id < 0) break;
+        }
+        cllm_batch_engine_run(engine);
+        for (size_t b = 0; b < batch_size; b++) {
+            cllm_batch_engine_collect(engine, (int)b, NULL, 0);
         }
     }
     
@@ -175,7 +179,7 @@ BenchmarkResults cllm_benchmark_inference_batch(CLLMModel* model, uint32_t* inpu
     results.batch_size = batch_size;
     results.seq_length = seq_length;
     
-    free(logits);
+    cllm_batch_engine_free(engine);
     
     printf("Results:\n");
     printf("  Average time per batch: %.3f ms\n", results.inference_time_ms);
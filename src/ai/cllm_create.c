@@ -5,13 +5,57 @@
 #include "lattice_embeddings.h"
 #include "../include/ai/cllm_kissing_spheres.h"
 #include "../include/cllm_lattice_cache.h"
+#include "../include/cllm_utils.h"
 #include <stdlib.h>
 #include <string.h>
 #include <stdio.h>
+#include <sys/mman.h>
 #include "../include/prime_float_math.h"
 
-// Create a model from configuration
-CLLMModel* cllm_create_model(const CLLMConfig* config) {
+// Point a model's tensors into a weight block laid out by cllm_allocate_model:
+// embeddings, then Q/K/V of every layer, then W1/b1/W2/b2 of every layer,
+// then gamma/beta of every layer norm
+void cllm_model_bind_weights(CLLMModel* model, float* weights) {
+    if (!model) return;
+    
+    model->weights = weights;
+    model->embeddings.embeddings = weights;
+    size_t weight_offset = model->vocab_size * model->embedding_dim;
+    
+    for (uint32_t i = 0; i < model->num_layers; i++) {
+        size_t qkv_size = model->embedding_dim * model->embedding_dim;
+        
+        model->attention_layers[i].query_lattice = weights + weight_offset;
+        weight_offset += qkv_size;
+        model->attention_layers[i].key_lattice = weights + weight_offset;
+        weight_offset += qkv_size;
+        model->attention_layers[i].value_lattice = weights + weight_offset;
+        weight_offset += qkv_size;
+    }
+    
+    for (uint32_t i = 0; i < model->num_layers; i++) {
+        FeedForwardLayer* ff = &model->ff_layers[i];
+        
+        ff->w1_lattice = weights + weight_offset;
+        weight_offset += ff->input_dim * ff->hidden_dim;
+        ff->bias1 = weights + weight_offset;
+        weight_offset += ff->hidden_dim;
+        ff->w2_lattice = weights + weight_offset;
+        weight_offset += ff->hidden_dim * ff->output_dim;
+        ff->bias2 = weights + weight_offset;
+        weight_offset += ff->output_dim;
+    }
+    
+    for (uint32_t i = 0; i < model->num_layers * 2; i++) {
+        model->layer_norms[i].gamma = weights + weight_offset;
+        weight_offset += model->layer_norms[i].dim;
+        model->layer_norms[i].beta = weights + weight_offset;
+        weight_offset += model->layer_norms[i].dim;
+    }
+}
+
+// Allocate a model without initializing its weights
+CLLMModel* cllm_allocate_model(const CLLMConfig* config) {
     if (!config) return NULL;
     
     // Validate configuration
@@ -112,170 +156,68 @@ CLLMModel* cllm_create_model(const CLLMConfig* config) {
     model->num_weights = embedding_weights + config->num_layers * per_layer_weights;
     model->header.total_params = model->num_weights;
     
-    // Allocate weights
-    model->weights = (float*)calloc(model->num_weights, sizeof(float));
+    // Allocate weights (left uninitialized: the caller fills every one)
+    model->weights = (float*)malloc(model->num_weights * sizeof(float));
     if (!model->weights) {
         fprintf(stderr, "Failed to allocate weights\n");
-        free(model->tokens);
-        free(model);
+        cllm_free_model(model);
         return NULL;
     }
     
-    // Initialize embeddings
     model->embeddings.vocab_size = config->vocab_size;
     model->embeddings.embedding_dim = config->embedding_dim;
-    model->embeddings.embeddings = model->weights;
-    
-    // Initialize with small random values
-    for (uint64_t i = 0; i < embedding_weights; i++) {
-        model->embeddings.embeddings[i] = ((float)rand() / RAND_MAX - 0.5f) * 0.1f;
-    }
     
     // Allocate attention layers
     model->attention_layers = (AttentionLayer*)calloc(config->num_layers, sizeof(AttentionLayer));
     if (!model->attention_layers) {
         fprintf(stderr, "Failed to allocate attention layers\n");
-        free(model->weights);
-        free(model->tokens);
-        free(model);
+        cllm_free_model(model);
         return NULL;
     }
     
-    // Initialize attention layers
-    size_t weight_offset = embedding_weights;
     uint32_t head_dim = config->embedding_dim / config->num_heads;
-    
     for (uint32_t i = 0; i < config->num_layers; i++) {
         model->attention_layers[i].layer_id = i;
         model->attention_layers[i].num_heads = config->num_heads;
         model->attention_layers[i].head_dim = head_dim;
-        
-        // Assign weight pointers with bounds checking
-        size_t qkv_size = config->embedding_dim * config->embedding_dim;
-        
-        // Verify we don't exceed allocated weight buffer
-        if (weight_offset + 3 * qkv_size > model->num_weights) {
-            fprintf(stderr, "Error: Weight offset exceeds allocated buffer at layer %u\n", i);
-            free(model->attention_layers);
-            free(model->weights);
-            free(model->tokens);
-            free(model);
-            return NULL;
-        }
-        
-        model->attention_layers[i].query_lattice = model->weights + weight_offset;
-        weight_offset += qkv_size;
-        model->attention_layers[i].key_lattice = model->weights + weight_offset;
-        weight_offset += qkv_size;
-        model->attention_layers[i].value_lattice = model->weights + weight_offset;
-        weight_offset += qkv_size;
-        
-        // Initialize attention weights with Xavier initialization
-        float xavier_std = prime_sqrtf(2.0f / (config->embedding_dim + config->embedding_dim));
-        for (size_t j = 0; j < qkv_size; j++) {
-            model->attention_layers[i].query_lattice[j] = ((float)rand() / RAND_MAX - 0.5f) * 2.0f * xavier_std;
-            model->attention_layers[i].key_lattice[j] = ((float)rand() / RAND_MAX - 0.5f) * 2.0f * xavier_std;
-            model->attention_layers[i].value_lattice[j] = ((float)rand() / RAND_MAX - 0.5f) * 2.0f * xavier_std;
-        }
     }
     
     // Allocate feed-forward layers
     model->ff_layers = (FeedForwardLayer*)calloc(config->num_layers, sizeof(FeedForwardLayer));
     if (!model->ff_layers) {
         fprintf(stderr, "Failed to allocate feed-forward layers\n");
-        free(model->attention_layers);
-        free(model->weights);
-        free(model->tokens);
-        free(model);
+        cllm_free_model(model);
         return NULL;
     }
     
-    // Initialize feed-forward layers
     for (uint32_t i = 0; i < config->num_layers; i++) {
         model->ff_layers[i].layer_id = i;
         model->ff_layers[i].input_dim = config->embedding_dim;
         model->ff_layers[i].hidden_dim = config->ff_dim;
         model->ff_layers[i].output_dim = config->embedding_dim;
-        
-        size_t w1_size = config->embedding_dim * config->ff_dim;
-        size_t w2_size = config->ff_dim * config->embedding_dim;
-        size_t total_ff_size = w1_size + config->ff_dim + w2_size + config->embedding_dim;
-        
-        // Verify we don't exceed allocated weight buffer
-        if (weight_offset + total_ff_size > model->num_weights) {
-            fprintf(stderr, "Error: Weight offset exceeds allocated buffer in FF layer %u\n", i);
-            free(model->ff_layers);
-            free(model->attention_layers);
-            free(model->weights);
-            free(model->tokens);
-            free(model);
-            return NULL;
-        }
-        
-        model->ff_layers[i].w1_lattice = model->weights + weight_offset;
-        weight_offset += w1_size;
-        model->ff_layers[i].bias1 = model->weights + weight_offset;
-        weight_offset += config->ff_dim;
-        model->ff_layers[i].w2_lattice = model->weights + weight_offset;
-        weight_offset += w2_size;
-        model->ff_layers[i].bias2 = model->weights + weight_offset;
-        weight_offset += config->embedding_dim;
-        
-        // Initialize FF weights with He initialization (for ReLU/tanh)
-        float he_std_w1 = prime_sqrtf(2.0f / config->embedding_dim);
-        float he_std_w2 = prime_sqrtf(2.0f / config->ff_dim);
-        
-        
-        for (size_t j = 0; j < w1_size; j++) {
-            model->ff_layers[i].w1_lattice[j] = ((float)rand() / RAND_MAX - 0.5f) * 2.0f * he_std_w1;
-        }
-        for (size_t j = 0; j < config->ff_dim; j++) {
-            model->ff_layers[i].bias1[j] = 0.0f;  // Biases initialized to zero
-        }
-        for (size_t j = 0; j < w2_size; j++) {
-            model->ff_layers[i].w2_lattice[j] = ((float)rand() / RAND_MAX - 0.5f) * 2.0f * he_std_w2;
-        }
-        for (size_t j = 0; j < config->embedding_dim; j++) {
-            model->ff_layers[i].bias2[j] = 0.0f;  // Biases initialized to zero
-        }
     }
     
-    // Allocate layer norms
+    // Allocate layer norms (2 per layer: pre-attention and pre-feedforward)
     model->layer_norms = (CLLMLayerNorm*)calloc(config->num_layers * 2, sizeof(CLLMLayerNorm));
     if (!model->layer_norms) {
         fprintf(stderr, "Failed to allocate layer norms\n");
-        free(model->ff_layers);
-        free(model->attention_layers);
-        free(model->weights);
-        free(model->tokens);
-        free(model);
+        cllm_free_model(model);
         return NULL;
     }
     
-    // Initialize layer norms (2 per layer: pre-attention and pre-feedforward)
     for (uint32_t i = 0; i < config->num_layers * 2; i++) {
         model->layer_norms[i].layer_id = i;
         model->layer_norms[i].dim = config->embedding_dim;
         model->layer_norms[i].epsilon = 1e-5f;
-        
-        model->layer_norms[i].gamma = model->weights + weight_offset;
-        weight_offset += config->embedding_dim;
-        model->layer_norms[i].beta = model->weights + weight_offset;
-        weight_offset += config->embedding_dim;
-        
-        // Initialize gamma to 1.0 and beta to 0.0
-        for (uint32_t j = 0; j < config->embedding_dim; j++) {
-            model->layer_norms[i].gamma[j] = 1.0f;
-            model->layer_norms[i].beta[j] = 0.0f;
-        }
     }
     
+    cllm_model_bind_weights(model, model->weights);
+    
     // Initialize positional encoding
     model->pos_encoding.max_length = config->max_seq_len;
     model->pos_encoding.embedding_dim = config->embedding_dim;
     
     // Allocate positional encoding buffers
-    // size_t pos_size = config->max_seq_len * config->embedding_dim * sizeof(float);  // Unused
     model->pos_encoding.spiral_positions = (float*)calloc(config->max_seq_len * config->embedding_dim, sizeof(float));
     model->pos_encoding.clock_positions = (float*)calloc(config->max_seq_len * config->embedding_dim, sizeof(float));
     model->pos_encoding.prime_positions = (float*)calloc(config->max_seq_len * config->embedding_dim, sizeof(float));
@@ -284,39 +226,10 @@ CLLMModel* cllm_create_model(const CLLMConfig* config) {
     if (!model->pos_encoding.spiral_positions || !model->pos_encoding.clock_positions ||
         !model->pos_encoding.prime_positions || !model->pos_encoding.learned_positions) {
         fprintf(stderr, "Failed to allocate positional encodings\n");
-        if (model->pos_encoding.spiral_positions) free(model->pos_encoding.spiral_positions);
-        if (model->pos_encoding.clock_positions) free(model->pos_encoding.clock_positions);
-        if (model->pos_encoding.prime_positions) free(model->pos_encoding.prime_positions);
-        if (model->pos_encoding.learned_positions) free(model->pos_encoding.learned_positions);
-        free(model->layer_norms);
-        free(model->ff_layers);
-        free(model->attention_layers);
-        free(model->weights);
-        free(model->tokens);
-        free(model);
+        cllm_free_model(model);
         return NULL;
     }
     
-    // PHASE 1: Initialize Crystalline Prime Encodings (ASI Design)
-    if (model->tokens) {
-        printf("\n=== Initializing Crystalline Structure ===\n");
-        printf("Generating prime encodings for %u tokens...\n", config->vocab_size);
-        
-        // OBJECTIVE 14: Use L(n,d,k,λ) lattice formula for embeddings
-        // Use geometric pattern directly - INSTANT initialization
-        // No caching needed - the pattern IS the algorithm
-        // Uses algorithms layer (fundamental algorithm, not CLLM-specific)
-        lattice_embeddings_init_geometric(
-            model->embeddings.embeddings,
-            config->vocab_size,
-            config->embedding_dim
-        );
-        
-        printf("✓ Crystalline prime encodings initialized\n");
-        printf("✓ 12D lattice coordinates computed\n");
-        printf("==========================================\n\n");
-    }
-    
     // OBJECTIVE 16: Initialize lattice points for kissing spheres
     // Allocate lattice points (one per token)
     model->num_lattice_points = config->vocab_size;
@@ -341,6 +254,77 @@ CLLMModel* cllm_create_model(const CLLMConfig* config) {
     return model;
 }
 
+// Create a model from configuration
+CLLMModel* cllm_create_model(const CLLMConfig* config) {
+    CLLMModel* model = cllm_allocate_model(config);
+    if (!model) return NULL;
+    
+    // Initialize with small random values
+    uint64_t embedding_weights = config->vocab_size * config->embedding_dim;
+    for (uint64_t i = 0; i < embedding_weights; i++) {
+        model->embeddings.embeddings[i] = ((float)rand() / RAND_MAX - 0.5f) * 0.1f;
+    }
+    
+    // Initialize attention weights with Xavier initialization
+    size_t qkv_size = config->embedding_dim * config->embedding_dim;
+    float xavier_std = prime_sqrtf(2.0f / (config->embedding_dim + config->embedding_dim));
+    for (uint32_t i = 0; i < config->num_layers; i++) {
+        for (size_t j = 0; j < qkv_size; j++) {
+            model->attention_layers[i].query_lattice[j] = ((float)rand() / RAND_MAX - 0.5f) * 2.0f * xavier_std;
+            model->attention_layers[i].key_lattice[j] = ((float)rand() / RAND_MAX - 0.5f) * 2.0f * xavier_std;
+            model->attention_layers[i].value_lattice[j] = ((float)rand() / RAND_MAX - 0.5f) * 2.0f * xavier_std;
+        }
+    }
+    
+    // Initialize FF weights with He initialization (for ReLU/tanh)
+    size_t w1_size = config->embedding_dim * config->ff_dim;
+    size_t w2_size = config->ff_dim * config->embedding_dim;
+    float he_std_w1 = prime_sqrtf(2.0f / config->embedding_dim);
+    float he_std_w2 = prime_sqrtf(2.0f / config->ff_dim);
+    for (uint32_t i = 0; i < config->num_layers; i++) {
+        for (size_t j = 0; j < w1_size; j++) {
+            model->ff_layers[i].w1_lattice[j] = ((float)rand() / RAND_MAX - 0.5f) * 2.0f * he_std_w1;
+        }
+        for (size_t j = 0; j < config->ff_dim; j++) {
+            model->ff_layers[i].bias1[j] = 0.0f;  // Biases initialized to zero
+        }
+        for (size_t j = 0; j < w2_size; j++) {
+            model->ff_layers[i].w2_lattice[j] = ((float)rand() / RAND_MAX - 0.5f) * 2.0f * he_std_w2;
+        }
+        for (size_t j = 0; j < config->embedding_dim; j++) {
+            model->ff_layers[i].bias2[j] = 0.0f;  // Biases initialized to zero
+        }
+    }
+    
+    // Initialize gamma to 1.0 and beta to 0.0
+    for (uint32_t i = 0; i < config->num_layers * 2; i++) {
+        for (uint32_t j = 0; j < config->embedding_dim; j++) {
+            model->layer_norms[i].gamma[j] = 1.0f;
+            model->layer_norms[i].beta[j] = 0.0f;
+        }
+    }
+    
+    // PHASE 1: Initialize Crystalline Prime Encodings (ASI Design)
+    printf("\n=== Initializing Crystalline Structure ===\n");
+    printf("Generating prime encodings for %u tokens...\n", config->vocab_size);
+    
+    // OBJECTIVE 14: Use L(n,d,k,λ) lattice formula for embeddings
+    // Use geometric pattern directly - INSTANT initialization
+    // No caching needed - the pattern IS the algorithm
+    // Uses algorithms layer (fundamental algorithm, not CLLM-specific)
+    lattice_embeddings_init_geometric(
+        model->embeddings.embeddings,
+        config->vocab_size,
+        config->embedding_dim
+    );
+    
+    printf("✓ Crystalline prime encodings initialized\n");
+    printf("✓ 12D lattice coordinates computed\n");
+    printf("==========================================\n\n");
+    
+    return model;
+}
+
 // Free model and all associated memory
 void cllm_free_model(CLLMModel* model) {
     if (!model) return;
@@ -370,7 +354,9 @@ void cllm_free_model(CLLMModel* model) {
         free(model->attention_layers);
     }
     
-    if (model->weights) {
+    if (model->weights_map) {
+        munmap(model->weights_map, model->weights_map_size);
+    } else if (model->weights) {
         free(model->weights);
     }
     
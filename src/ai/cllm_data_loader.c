@@ -13,38 +13,23 @@
 
 #include "../include/cllm.h"
 #include "../include/cllm_tokenizer.h"
+#include "../include/cllm_data_loader.h"
+#include "../include/cllm_vocab_builder.h"
 #include <stdlib.h>
 #include <string.h>
 #include <stdio.h>
 #include <ctype.h>
 #include <sys/stat.h>
+#include <sys/mman.h>
+#include <fcntl.h>
+#include <unistd.h>
 #include <dirent.h>
+#include <pthread.h>
+#include <errno.h>
 
 #define MAX_LINE_LENGTH 65536
 #define MAX_DOCUMENT_SIZE (100 * 1024 * 1024)  // 100MB max per document
 
-/**
- * Data Loader Structure
- */
-typedef struct {
-    CLLMTokenizer* tokenizer;
-    char** documents;
-    size_t num_documents;
-    size_t capacity;
-    
-    // Statistics
-    size_t total_chars;
-    size_t total_tokens;
-    size_t total_lines;
-    
-    // Configuration
-    int min_token_length;
-    int max_token_length;
-    int lowercase;
-    int remove_punctuation;
-    int remove_numbers;
-} CLLMDataLoader;
-
 /**
  * Create Data Loader
  */
@@ -212,6 +197,20 @@ int cllm_data_loader_load_file(CLLMDataLoader* loader, const char* filename) {
     return result;
 }
 
+/**
+ * Check for common binary file extensions
+ */
+static int has_binary_extension(const char* name) {
+    const char* ext = strrchr(name, '.');
+    if (!ext) return 0;
+    
+    return strcmp(ext, ".o") == 0 || strcmp(ext, ".so") == 0 ||
+           strcmp(ext, ".a") == 0 || strcmp(ext, ".bin") == 0 ||
+           strcmp(ext, ".exe") == 0 || strcmp(ext, ".dll") == 0 ||
+           strcmp(ext, ".png") == 0 || strcmp(ext, ".jpg") == 0 ||
+           strcmp(ext, ".gif") == 0 || strcmp(ext, ".pdf") == 0;
+}
+
 /**
  * Load Directory
  * Recursively loads all .txt files from directory
@@ -249,18 +248,7 @@ int cllm_data_loader_load_directory(CLLMDataLoader* loader, const char* dirname)
                 // Skip binary files and hidden files
                 if (entry->d_name[0] != '.') {
                     // Skip common binary extensions
-                    const char* ext = strrchr(entry->d_name, '.');
-                    int is_binary = 0;
-                    if (ext) {
-                        if (strcmp(ext, ".o") == 0 || strcmp(ext, ".so") == 0 || 
-                            strcmp(ext, ".a") == 0 || strcmp(ext, ".bin") == 0 ||
-                            strcmp(ext, ".exe") == 0 || strcmp(ext, ".dll") == 0 ||
-                            strcmp(ext, ".png") == 0 || strcmp(ext, ".jpg") == 0 ||
-                            strcmp(ext, ".gif") == 0 || strcmp(ext, ".pdf") == 0) {
-                            is_binary = 1;
-                        }
-                    }
-                    if (!is_binary && cllm_data_loader_load_file(loader, path)) {
+                    if (!has_binary_extension(entry->d_name) && cllm_data_loader_load_file(loader, path)) {
                         count++;
                     }
                 }
@@ -280,9 +268,8 @@ void cllm_data_loader_build_vocab(CLLMDataLoader* loader) {
     
     printf("Building vocabulary from %zu documents...\n", loader->num_documents);
     
-    for (size_t i = 0; i < loader->num_documents; i++) {
-        cllm_build_vocab(loader->tokenizer, loader->documents[i]);
-    }
+    cllm_build_vocab_parallel(loader->tokenizer, (const char* const*)loader->documents,
+                              loader->num_documents, 0);
     
     loader->total_tokens = 0;
     for (uint32_t i = 0; i < loader->tokenizer->vocab_size; i++) {
@@ -297,12 +284,6 @@ void cllm_data_loader_build_vocab(CLLMDataLoader* loader) {
  * Create Training Dataset
  * Tokenizes all documents and creates training sequences
  */
-typedef struct {
-    uint32_t* tokens;
-    size_t num_tokens;
-    size_t capacity;
-} TokenDataset;
-
 TokenDataset* cllm_data_loader_create_dataset(CLLMDataLoader* loader) {
     if (!loader || !loader->tokenizer) return NULL;
     
@@ -311,9 +292,16 @@ TokenDataset* cllm_data_loader_create_dataset(CLLMDataLoader* loader) {
     
     // Estimate capacity
     dataset->capacity = loader->total_chars / 4;  // Rough estimate
+    if (dataset->capacity == 0) dataset->capacity = 1024;
     dataset->tokens = (uint32_t*)malloc(dataset->capacity * sizeof(uint32_t));
+    dataset->doc_offsets = (uint64_t*)calloc(loader->num_documents + 1, sizeof(uint64_t));
+    dataset->num_documents = loader->num_documents;
+    dataset->vocab_hash = cllm_token_dataset_vocab_hash(loader->tokenizer);
+    dataset->token_width = sizeof(uint32_t);
     
-    if (!dataset->tokens) {
+    if (!dataset->tokens || !dataset->doc_offsets) {
+        free(dataset->tokens);
+        free(dataset->doc_offsets);
         free(dataset);
         return NULL;
     }
@@ -335,8 +323,7 @@ TokenDataset* cllm_data_loader_create_dataset(CLLMDataLoader* loader) {
                                                           dataset->capacity * sizeof(uint32_t));
                 if (!new_tokens) {
                     free(doc_tokens);
-                    free(dataset->tokens);
-                    free(dataset);
+                    cllm_token_dataset_free(dataset);
                     return NULL;
                 }
                 dataset->tokens = new_tokens;
@@ -349,6 +336,7 @@ TokenDataset* cllm_data_loader_create_dataset(CLLMDataLoader* loader) {
             
             free(doc_tokens);
         }
+        dataset->doc_offsets[i + 1] = dataset->num_tokens;
         
         if ((i + 1) % 100 == 0) {
             printf("  Processed %zu/%zu documents\n", i + 1, loader->num_documents);
@@ -364,31 +352,228 @@ TokenDataset* cllm_data_loader_create_dataset(CLLMDataLoader* loader) {
  */
 void cllm_token_dataset_free(TokenDataset* dataset) {
     if (!dataset) return;
-    free(dataset->tokens);
+    
+    if (dataset->map_base) {
+        munmap(dataset->map_base, dataset->map_size);
+    } else {
+        free(dataset->tokens);
+        free(dataset->doc_offsets);
+    }
     free(dataset);
 }
 
 /**
- * Save Dataset to File
+ * Vocabulary Hash (FNV-1a over token strings, NUL-separated)
  */
-int cllm_token_dataset_save(TokenDataset* dataset, const char* filename) {
+uint32_t cllm_token_dataset_vocab_hash(CLLMTokenizer* tokenizer) {
+    if (!tokenizer) return 0;
+    
+    uint32_t hash = 2166136261u;
+    for (uint32_t i = 0; i < tokenizer->vocab_size; i++) {
+        for (const unsigned char* p = (const unsigned char*)tokenizer->vocab[i]; ; p++) {
+            hash ^= *p;
+            hash *= 16777619u;
+            if (!*p) break;
+        }
+    }
+    
+    return hash ? hash : 1;  // 0 is reserved for "unknown"
+}
+
+// Round offset up to a multiple of align (power of two)
+static uint64_t align_up(uint64_t offset, uint64_t align) {
+    return (offset + align - 1) & ~(align - 1);
+}
+
+// Write zero bytes until the file position reaches target
+static int write_padding(FILE* f, uint64_t current, uint64_t target) {
+    static const char zeros[64] = {0};
+    while (current < target) {
+        size_t chunk = (target - current) < sizeof(zeros) ? (size_t)(target - current) : sizeof(zeros);
+        if (fwrite(zeros, 1, chunk, f) != chunk) return 0;
+        current += chunk;
+    }
+    return 1;
+}
+
+// Swap a header written on a machine of the other byte order
+static void swap_header(TokenDatasetHeader* header) {
+    header->version = __builtin_bswap32(header->version);
+    header->endian_tag = __builtin_bswap32(header->endian_tag);
+    header->token_width = __builtin_bswap32(header->token_width);
+    header->vocab_hash = __builtin_bswap32(header->vocab_hash);
+    header->num_tokens = __builtin_bswap64(header->num_tokens);
+    header->num_documents = __builtin_bswap64(header->num_documents);
+    header->tokens_offset = __builtin_bswap64(header->tokens_offset);
+    header->index_offset = __builtin_bswap64(header->index_offset);
+}
+
+/**
+ * Validate Header Against File Size
+ * 
+ * Byte-swaps the header in place if it was written with the other byte
+ * order and reports that through *swapped.
+ */
+static int validate_header(TokenDatasetHeader* header, size_t file_size, int* swapped) {
+    if (memcmp(header->magic, TOKEN_DATASET_MAGIC, sizeof(TOKEN_DATASET_MAGIC)) != 0) return 0;
+    
+    *swapped = 0;
+    if (header->endian_tag != TOKEN_DATASET_ENDIAN_TAG) {
+        if (header->endian_tag != __builtin_bswap32(TOKEN_DATASET_ENDIAN_TAG)) return 0;
+        swap_header(header);
+        *swapped = 1;
+    }
+    
+    if (header->version != TOKEN_DATASET_VERSION) {
+        fprintf(stderr, "Unsupported dataset version %u\n", header->version);
+        return 0;
+    }
+    if (header->token_width != 2 && header->token_width != 4) return 0;
+    
+    // Token array must lie within the file
+    if (header->tokens_offset < sizeof(TokenDatasetHeader) || header->tokens_offset > file_size) return 0;
+    if (header->num_tokens > (file_size - header->tokens_offset) / header->token_width) return 0;
+    
+    // Doc index (optional) must be aligned and lie within the file
+    if (header->index_offset) {
+        if (header->index_offset % sizeof(uint64_t) != 0 || header->index_offset > file_size) return 0;
+        if (header->num_documents >= (file_size - header->index_offset) / sizeof(uint64_t)) return 0;
+    }
+    
+    return 1;
+}
+
+/**
+ * Validate Doc Index
+ * 
+ * Document starts must not decrease and must not run past the token
+ * array; batching and shard resumption index tokens with them unchecked.
+ */
+static int validate_doc_offsets(const uint64_t* offsets, size_t num_documents, size_t num_tokens) {
+    for (size_t i = 0; i < num_documents; i++) {
+        if (offsets[i] > offsets[i + 1]) return 0;
+    }
+    return offsets[num_documents] <= num_tokens;
+}
+
+/**
+ * Save Dataset with Token Width
+ * 
+ * Writes to a temporary file and renames it into place, so processes that
+ * have the previous file mapped keep a consistent view.
+ */
+int cllm_token_dataset_save_ex(TokenDataset* dataset, const char* filename, uint32_t token_width) {
     if (!dataset || !filename) return 0;
+    if (token_width != 2 && token_width != 4) return 0;
+    if (!dataset->tokens && !dataset->tokens16 && dataset->num_tokens > 0) return 0;
     
-    FILE* f = fopen(filename, "wb");
+    if (token_width == 2) {
+        for (size_t i = 0; i < dataset->num_tokens; i++) {
+            if (cllm_token_dataset_get(dataset, i) > UINT16_MAX) {
+                fprintf(stderr, "Token %u does not fit in 16 bits\n", cllm_token_dataset_get(dataset, i));
+                return 0;
+            }
+        }
+    }
+    
+    TokenDatasetHeader header;
+    memset(&header, 0, sizeof(header));
+    memcpy(header.magic, TOKEN_DATASET_MAGIC, sizeof(TOKEN_DATASET_MAGIC));
+    header.version = TOKEN_DATASET_VERSION;
+    header.endian_tag = TOKEN_DATASET_ENDIAN_TAG;
+    header.token_width = token_width;
+    header.vocab_hash = dataset->vocab_hash;
+    header.num_tokens = dataset->num_tokens;
+    header.num_documents = dataset->doc_offsets ? dataset->num_documents : 0;
+    header.tokens_offset = align_up(sizeof(TokenDatasetHeader), 64);
+    
+    uint64_t tokens_end = header.tokens_offset + (uint64_t)dataset->num_tokens * token_width;
+    header.index_offset = dataset->doc_offsets ? align_up(tokens_end, sizeof(uint64_t)) : 0;
+    
+    char tmp_path[1024];
+    if ((size_t)snprintf(tmp_path, sizeof(tmp_path), "%s.tmp", filename) >= sizeof(tmp_path)) {
+        fprintf(stderr, "Dataset path too long: %s\n", filename);
+        return 0;
+    }
+    
+    FILE* f = fopen(tmp_path, "wb");
     if (!f) return 0;
     
-    // Write header
-    fwrite(&dataset->num_tokens, sizeof(size_t), 1, f);
+    int ok = fwrite(&header, sizeof(header), 1, f) == 1 &&
+             write_padding(f, sizeof(header), header.tokens_offset);
     
-    // Write tokens
-    fwrite(dataset->tokens, sizeof(uint32_t), dataset->num_tokens, f);
+    // Write tokens, converting through a chunk buffer when needed
+    if (ok && token_width == 4 && dataset->tokens) {
+        ok = fwrite(dataset->tokens, sizeof(uint32_t), dataset->num_tokens, f) == dataset->num_tokens;
+    } else if (ok) {
+        uint8_t chunk[65536];
+        size_t per_chunk = sizeof(chunk) / token_width;
+        for (size_t i = 0; ok && i < dataset->num_tokens; i += per_chunk) {
+            size_t n = dataset->num_tokens - i < per_chunk ? dataset->num_tokens - i : per_chunk;
+            for (size_t j = 0; j < n; j++) {
+                uint32_t token = cllm_token_dataset_get(dataset, i + j);
+                if (token_width == 2) {
+                    ((uint16_t*)chunk)[j] = (uint16_t)token;
+                } else {
+                    ((uint32_t*)chunk)[j] = token;
+                }
+            }
+            ok = fwrite(chunk, token_width, n, f) == n;
+        }
+    }
     
-    fclose(f);
+    // Write doc index
+    if (ok && header.index_offset) {
+        size_t entries = dataset->num_documents + 1;
+        ok = write_padding(f, tokens_end, header.index_offset) &&
+             fwrite(dataset->doc_offsets, sizeof(uint64_t), entries, f) == entries;
+    }
     
-    printf("Dataset saved to: %s (%zu tokens)\n", filename, dataset->num_tokens);
+    if (fclose(f) != 0) ok = 0;
+    if (!ok || rename(tmp_path, filename) != 0) {
+        unlink(tmp_path);
+        return 0;
+    }
+    
+    printf("Dataset saved to: %s (%zu tokens, %u-bit)\n", filename, dataset->num_tokens, token_width * 8);
     return 1;
 }
 
+/**
+ * Save Dataset to File
+ */
+int cllm_token_dataset_save(TokenDataset* dataset, const char* filename) {
+    return cllm_token_dataset_save_ex(dataset, filename, sizeof(uint32_t));
+}
+
+/**
+ * Load Legacy Dataset (size_t count followed by uint32 tokens)
+ */
+static TokenDataset* load_legacy(FILE* f, size_t file_size) {
+    TokenDataset* dataset = (TokenDataset*)calloc(1, sizeof(TokenDataset));
+    if (!dataset) return NULL;
+    
+    // Read header
+    if (fread(&dataset->num_tokens, sizeof(size_t), 1, f) != 1 ||
+        dataset->num_tokens > (file_size - sizeof(size_t)) / sizeof(uint32_t)) {
+        free(dataset);
+        return NULL;
+    }
+    
+    // Allocate and read tokens
+    dataset->capacity = dataset->num_tokens;
+    dataset->token_width = sizeof(uint32_t);
+    dataset->tokens = (uint32_t*)malloc((dataset->capacity ? dataset->capacity : 1) * sizeof(uint32_t));
+    
+    if (!dataset->tokens ||
+        fread(dataset->tokens, sizeof(uint32_t), dataset->num_tokens, f) != dataset->num_tokens) {
+        cllm_token_dataset_free(dataset);
+        return NULL;
+    }
+    
+    return dataset;
+}
+
 /**
  * Load Dataset from File
  */
@@ -398,42 +583,683 @@ TokenDataset* cllm_token_dataset_load(const char* filename) {
     FILE* f = fopen(filename, "rb");
     if (!f) return NULL;
     
-    TokenDataset* dataset = (TokenDataset*)calloc(1, sizeof(TokenDataset));
-    if (!dataset) {
+    struct stat st;
+    if (fstat(fileno(f), &st) != 0) {
         fclose(f);
         return NULL;
     }
+    size_t file_size = (size_t)st.st_size;
     
-    // Read header
-    if (fread(&dataset->num_tokens, sizeof(size_t), 1, f) != 1) {
-        free(dataset);
+    TokenDatasetHeader header;
+    int swapped = 0;
+    if (file_size < sizeof(header) || fread(&header, sizeof(header), 1, f) != 1 ||
+        memcmp(header.magic, TOKEN_DATASET_MAGIC, sizeof(TOKEN_DATASET_MAGIC)) != 0) {
+        // Not the versioned format: fall back to the legacy layout
+        rewind(f);
+        TokenDataset* dataset = file_size >= sizeof(size_t) ? load_legacy(f, file_size) : NULL;
         fclose(f);
-        return NULL;
+        if (dataset) {
+            printf("Dataset loaded from: %s (%zu tokens, legacy format)\n", filename, dataset->num_tokens);
+        }
+        return dataset;
     }
     
-    // Allocate and read tokens
-    dataset->capacity = dataset->num_tokens;
-    dataset->tokens = (uint32_t*)malloc(dataset->capacity * sizeof(uint32_t));
-    
-    if (!dataset->tokens) {
-        free(dataset);
+    if (!validate_header(&header, file_size, &swapped)) {
+        fprintf(stderr, "Invalid dataset header: %s\n", filename);
         fclose(f);
         return NULL;
     }
     
-    if (fread(dataset->tokens, sizeof(uint32_t), dataset->num_tokens, f) != dataset->num_tokens) {
-        free(dataset->tokens);
-        free(dataset);
+    TokenDataset* dataset = (TokenDataset*)calloc(1, sizeof(TokenDataset));
+    if (!dataset) {
         fclose(f);
         return NULL;
     }
     
+    dataset->num_tokens = header.num_tokens;
+    dataset->capacity = header.num_tokens;
+    dataset->vocab_hash = header.vocab_hash;
+    dataset->token_width = sizeof(uint32_t);
+    dataset->tokens = (uint32_t*)malloc((dataset->capacity ? dataset->capacity : 1) * sizeof(uint32_t));
+    
+    // Read tokens, widening 16-bit storage in place (back to front)
+    int ok = dataset->tokens != NULL && fseek(f, (long)header.tokens_offset, SEEK_SET) == 0 &&
+             fread(dataset->tokens, header.token_width, header.num_tokens, f) == header.num_tokens;
+    if (ok && header.token_width == 2) {
+        const uint16_t* narrow = (const uint16_t*)dataset->tokens;
+        for (size_t i = header.num_tokens; i-- > 0; ) {
+            uint16_t token = narrow[i];
+            dataset->tokens[i] = swapped ? __builtin_bswap16(token) : token;
+        }
+    } else if (ok && swapped) {
+        for (size_t i = 0; i < header.num_tokens; i++) {
+            dataset->tokens[i] = __builtin_bswap32(dataset->tokens[i]);
+        }
+    }
+    
+    // Read doc index
+    if (ok && header.index_offset) {
+        size_t entries = header.num_documents + 1;
+        dataset->num_documents = header.num_documents;
+        dataset->doc_offsets = (uint64_t*)malloc(entries * sizeof(uint64_t));
+        ok = dataset->doc_offsets != NULL && fseek(f, (long)header.index_offset, SEEK_SET) == 0 &&
+             fread(dataset->doc_offsets, sizeof(uint64_t), entries, f) == entries;
+        for (size_t i = 0; ok && swapped && i < entries; i++) {
+            dataset->doc_offsets[i] = __builtin_bswap64(dataset->doc_offsets[i]);
+        }
+        if (ok && !validate_doc_offsets(dataset->doc_offsets, header.num_documents, header.num_tokens)) {
+            fprintf(stderr, "Invalid dataset doc index: %s\n", filename);
+            ok = 0;
+        }
+    }
+    
     fclose(f);
     
+    if (!ok) {
+        cllm_token_dataset_free(dataset);
+        return NULL;
+    }
+    
     printf("Dataset loaded from: %s (%zu tokens)\n", filename, dataset->num_tokens);
     return dataset;
 }
 
+/**
+ * Memory-Map Dataset
+ */
+TokenDataset* cllm_token_dataset_mmap(const char* filename) {
+    if (!filename) return NULL;
+    
+    int fd = open(filename, O_RDONLY);
+    if (fd < 0) return NULL;
+    
+    struct stat st;
+    if (fstat(fd, &st) != 0 || st.st_size < (off_t)sizeof(size_t)) {
+        close(fd);
+        return NULL;
+    }
+    size_t file_size = (size_t)st.st_size;
+    
+    void* base = mmap(NULL, file_size, PROT_READ, MAP_SHARED, fd, 0);
+    close(fd);  // The mapping keeps the file referenced
+    if (base == MAP_FAILED) {
+        fprintf(stderr, "Failed to map dataset: %s\n", filename);
+        return NULL;
+    }
+    
+    TokenDataset* dataset = (TokenDataset*)calloc(1, sizeof(TokenDataset));
+    if (!dataset) {
+        munmap(base, file_size);
+        return NULL;
+    }
+    dataset->map_base = base;
+    dataset->map_size = file_size;
+    
+    TokenDatasetHeader header;
+    int swapped = 0;
+    if (file_size >= sizeof(header) &&
+        memcmp(base, TOKEN_DATASET_MAGIC, sizeof(TOKEN_DATASET_MAGIC)) == 0) {
+        memcpy(&header, base, sizeof(header));
+        if (!validate_header(&header, file_size, &swapped) || swapped) {
+            fprintf(stderr, "Cannot map dataset %s: %s\n", filename,
+                    swapped ? "foreign byte order (use cllm_token_dataset_load)" : "invalid header");
+            cllm_token_dataset_free(dataset);
+            return NULL;
+        }
+        
+        const uint8_t* bytes = (const uint8_t*)base;
+        dataset->num_tokens = header.num_tokens;
+        dataset->vocab_hash = header.vocab_hash;
+        dataset->token_width = header.token_width;
+        if (header.token_width == 4) {
+            dataset->tokens = (uint32_t*)(bytes + header.tokens_offset);
+        } else {
+            dataset->tokens16 = (const uint16_t*)(bytes + header.tokens_offset);
+        }
+        if (header.index_offset) {
+            dataset->doc_offsets = (uint64_t*)(bytes + header.index_offset);
+            dataset->num_documents = header.num_documents;
+            if (!validate_doc_offsets(dataset->doc_offsets, header.num_documents, header.num_tokens)) {
+                fprintf(stderr, "Cannot map dataset %s: invalid doc index\n", filename);
+                cllm_token_dataset_free(dataset);
+                return NULL;
+            }
+        }
+    } else {
+        // Legacy layout: size_t count, then uint32 tokens at offset 8
+        size_t count;
+        memcpy(&count, base, sizeof(count));
+        if (count > (file_size - sizeof(size_t)) / sizeof(uint32_t)) {
+            fprintf(stderr, "Cannot map dataset %s: invalid header\n", filename);
+            cllm_token_dataset_free(dataset);
+            return NULL;
+        }
+        dataset->num_tokens = count;
+        dataset->token_width = sizeof(uint32_t);
+        dataset->tokens = (uint32_t*)((uint8_t*)base + sizeof(size_t));
+    }
+    
+    // Batches walk the token stream front to back
+    madvise(base, file_size, MADV_SEQUENTIAL);
+    
+    printf("Dataset mapped from: %s (%zu tokens)\n", filename, dataset->num_tokens);
+    return dataset;
+}
+
+/* ============================================================================
+ * Sharded Streaming Pipeline
+ * ============================================================================ */
+
+typedef enum {
+    SHARD_SLOT_EMPTY,
+    SHARD_SLOT_PENDING,         // Path queued, waiting for a worker
+    SHARD_SLOT_TAKEN,           // Worker is cleaning/tokenizing
+    SHARD_SLOT_DONE             // Tokens ready for the writer
+} ShardSlotState;
+
+typedef struct {
+    char* path;
+    uint32_t* tokens;
+    uint32_t num_tokens;
+    size_t bytes;
+    int failed;
+    ShardSlotState state;
+} ShardSlot;
+
+/**
+ * Pipeline state shared by walker, workers and writer
+ * 
+ * Documents are numbered in walk order; slot seq % window holds document
+ * seq. The walker may run at most `window` documents ahead of the writer,
+ * which bounds memory and keeps shard contents deterministic.
+ */
+typedef struct {
+    CLLMDataLoader* loader;
+    const char* dirname;
+    const char* file_list;
+    
+    ShardSlot* slots;
+    size_t window;
+    size_t files_seen;          // Files enumerated so far
+    size_t next_seq;            // Next document the walker issues
+    size_t next_take;           // Next document a worker takes
+    size_t next_write;          // Next document the writer consumes
+    int walk_done;
+    int abort;
+    
+    pthread_mutex_t mutex;
+    pthread_cond_t cond;
+} ShardPipeline;
+
+/**
+ * Shard writer state (owned by the calling thread)
+ */
+typedef struct {
+    const char* output_dir;
+    uint32_t token_width;
+    uint32_t vocab_hash;
+    size_t shard_tokens;
+    
+    uint32_t* buffer;           // Current shard tokens
+    size_t used;
+    uint64_t* doc_offsets;      // Current shard document starts
+    size_t num_docs;
+    size_t doc_capacity;
+    
+    size_t next_shard;
+    size_t resume_seq;          // First document not fully covered by shards
+    size_t resume_offset;       // Tokens of resume_seq already written
+    int complete;
+} ShardWriter;
+
+// Queue one path (walker side); blocks while the window is full
+static int pipeline_submit(ShardPipeline* p, const char* path, size_t skip_files) {
+    pthread_mutex_lock(&p->mutex);
+    
+    // Files covered by a previous run are counted but not processed
+    if (p->files_seen++ < skip_files) {
+        pthread_mutex_unlock(&p->mutex);
+        return 0;
+    }
+    
+    while (p->next_seq - p->next_write >= p->window && !p->abort) {
+        pthread_cond_wait(&p->cond, &p->mutex);
+    }
+    if (p->abort) {
+        pthread_mutex_unlock(&p->mutex);
+        return -1;
+    }
+    
+    ShardSlot* slot = &p->slots[p->next_seq % p->window];
+    slot->path = strdup(path);
+    slot->tokens = NULL;
+    slot->num_tokens = 0;
+    slot->bytes = 0;
+    slot->failed = (slot->path == NULL);
+    slot->state = SHARD_SLOT_PENDING;
+    p->next_seq++;
+    
+    pthread_cond_broadcast(&p->cond);
+    pthread_mutex_unlock(&p->mutex);
+    return 0;
+}
+
+// Recursive directory walk in sorted order (deterministic across runs)
+static int walk_directory(ShardPipeline* p, const char* dirname, size_t skip_files) {
+    struct dirent** entries = NULL;
+    int n = scandir(dirname, &entries, NULL, alphasort);
+    if (n < 0) {
+        fprintf(stderr, "Failed to open directory: %s\n", dirname);
+        return 0;
+    }
+    
+    int rc = 0;
+    for (int i = 0; i < n; i++) {
+        const char* name = entries[i]->d_name;
+        
+        // Skip ., .., hidden entries and binaries
+        if (rc == 0 && name[0] != '.' && !has_binary_extension(name)) {
+            char path[1024];
+            snprintf(path, sizeof(path), "%s/%s", dirname, name);
+            
+            struct stat st;
+            if (stat(path, &st) == 0) {
+                if (S_ISDIR(st.st_mode)) {
+                    rc = walk_directory(p, path, skip_files);
+                } else if (S_ISREG(st.st_mode)) {
+                    rc = pipeline_submit(p, path, skip_files);
+                }
+            }
+        }
+        free(entries[i]);
+    }
+    
+    free(entries);
+    return rc;
+}
+
+// Walker thread: enumerate the corpus into the pipeline
+static void* shard_walker_thread(void* arg) {
+    ShardPipeline* p = (ShardPipeline*)arg;
+    size_t skip_files = p->next_seq;  // Resume point, set before the thread starts
+    
+    if (p->file_list) {
+        FILE* f = fopen(p->file_list, "r");
+        if (!f) {
+            fprintf(stderr, "Failed to open file list: %s\n", p->file_list);
+        } else {
+            char* line = NULL;
+            size_t line_cap = 0;
+            ssize_t len;
+            while ((len = getline(&line, &line_cap, f)) > 0) {
+                while (len > 0 && (line[len - 1] == '\n' || line[len - 1] == '\r')) line[--len] = '\0';
+                if (len == 0) continue;
+                if (pipeline_submit(p, line, skip_files) != 0) break;
+            }
+            free(line);
+            fclose(f);
+        }
+    } else {
+        walk_directory(p, p->dirname, skip_files);
+    }
+    
+    pthread_mutex_lock(&p->mutex);
+    p->walk_done = 1;
+    pthread_cond_broadcast(&p->cond);
+    pthread_mutex_unlock(&p->mutex);
+    return NULL;
+}
+
+// Read, clean and tokenize one document (no shared state touched)
+static void process_shard_document(CLLMDataLoader* loader, ShardSlot* slot) {
+    FILE* f = fopen(slot->path, "rb");
+    if (!f) {
+        slot->failed = 1;
+        return;
+    }
+    
+    fseek(f, 0, SEEK_END);
+    long file_size = ftell(f);
+    fseek(f, 0, SEEK_SET);
+    
+    if (file_size < 0 || file_size > MAX_DOCUMENT_SIZE) {
+        fclose(f);
+        slot->failed = 1;
+        return;
+    }
+    
+    char* content = (char*)malloc(file_size + 1);
+    if (!content) {
+        fclose(f);
+        slot->failed = 1;
+        return;
+    }
+    
+    size_t bytes_read = fread(content, 1, file_size, f);
+    content[bytes_read] = '\0';
+    fclose(f);
+    slot->bytes = bytes_read;
+    
+    char* cleaned = clean_text(content, loader);
+    free(content);
+    if (!cleaned) {
+        slot->failed = 1;
+        return;
+    }
+    
+    slot->tokens = cllm_tokenizer_encode(loader->tokenizer, cleaned, &slot->num_tokens);
+    free(cleaned);
+}
+
+// Worker thread: take queued documents in order and tokenize them
+static void* shard_worker_thread(void* arg) {
+    ShardPipeline* p = (ShardPipeline*)arg;
+    
+    pthread_mutex_lock(&p->mutex);
+    for (;;) {
+        while (p->next_take == p->next_seq && !p->walk_done && !p->abort) {
+            pthread_cond_wait(&p->cond, &p->mutex);
+        }
+        if (p->abort || p->next_take == p->next_seq) break;
+        
+        ShardSlot* slot = &p->slots[p->next_take++ % p->window];
+        slot->state = SHARD_SLOT_TAKEN;
+        pthread_mutex_unlock(&p->mutex);
+        
+        if (!slot->failed) process_shard_document(p->loader, slot);
+        
+        pthread_mutex_lock(&p->mutex);
+        slot->state = SHARD_SLOT_DONE;
+        pthread_cond_broadcast(&p->cond);
+    }
+    pthread_mutex_unlock(&p->mutex);
+    return NULL;
+}
+
+// Parse manifest.txt (if any) to find where a previous run stopped
+static int shard_manifest_load(ShardWriter* w) {
+    char path[1024];
+    snprintf(path, sizeof(path), "%s/%s", w->output_dir, CLLM_SHARD_MANIFEST);
+    
+    FILE* f = fopen(path, "r");
+    if (!f) return 0;  // Fresh run
+    
+    char line[1024];
+    int ok = 1;
+    while (ok && fgets(line, sizeof(line), f)) {
+        unsigned int hash, width;
+        size_t shard_tokens, index, tokens, docs, next_file, next_offset;
+        char name[256];
+        
+        if (sscanf(line, "config vocab_hash=%x token_width=%u shard_tokens=%zu",
+                   &hash, &width, &shard_tokens) == 3) {
+            if (hash != w->vocab_hash || width != w->token_width || shard_tokens != w->shard_tokens) {
+                fprintf(stderr, "Shard manifest %s was written with a different vocabulary or "
+                        "configuration; use a new output directory\n", path);
+                ok = 0;
+            }
+        } else if (sscanf(line, "shard %zu %255s %zu %zu %zu %zu",
+                          &index, name, &tokens, &docs, &next_file, &next_offset) == 6) {
+            w->next_shard = index + 1;
+            w->resume_seq = next_file;
+            w->resume_offset = next_offset;
+        } else if (strncmp(line, "complete", 8) == 0) {
+            w->complete = 1;
+        }
+    }
+    
+    fclose(f);
+    return ok ? 0 : -1;
+}
+
+// Append one line to the manifest and make it durable
+static int shard_manifest_append(ShardWriter* w, const char* line) {
+    char path[1024];
+    snprintf(path, sizeof(path), "%s/%s", w->output_dir, CLLM_SHARD_MANIFEST);
+    
+    FILE* f = fopen(path, "a");
+    if (!f) return -1;
+    
+    int ok = fputs(line, f) >= 0 && fflush(f) == 0 && fsync(fileno(f)) == 0;
+    return (fclose(f) == 0 && ok) ? 0 : -1;
+}
+
+// Record a document (or document continuation) starting at the current offset
+static int shard_begin_document(ShardWriter* w) {
+    if (w->num_docs + 2 > w->doc_capacity) {
+        size_t new_capacity = w->doc_capacity ? w->doc_capacity * 2 : 1024;
+        uint64_t* new_offsets = (uint64_t*)realloc(w->doc_offsets, new_capacity * sizeof(uint64_t));
+        if (!new_offsets) return -1;
+        w->doc_offsets = new_offsets;
+        w->doc_capacity = new_capacity;
+    }
+    w->doc_offsets[w->num_docs++] = w->used;
+    return 0;
+}
+
+// Write the current shard, then record it with the position to resume from
+static int shard_flush(ShardWriter* w, size_t resume_seq, size_t resume_offset, CLLMShardStats* stats) {
+    if (w->used == 0) return 0;
+    
+    char name[64];
+    char path[1024];
+    snprintf(name, sizeof(name), "shard_%06zu.bin", w->next_shard);
+    snprintf(path, sizeof(path), "%s/%s", w->output_dir, name);
+    
+    w->doc_offsets[w->num_docs] = w->used;
+    
+    TokenDataset shard;
+    memset(&shard, 0, sizeof(shard));
+    shard.tokens = w->buffer;
+    shard.num_tokens = w->used;
+    shard.doc_offsets = w->doc_offsets;
+    shard.num_documents = w->num_docs;
+    shard.vocab_hash = w->vocab_hash;
+    
+    if (!cllm_token_dataset_save_ex(&shard, path, w->token_width)) {
+        fprintf(stderr, "Failed to write shard: %s\n", path);
+        return -1;
+    }
+    
+    char line[512];
+    snprintf(line, sizeof(line), "shard %zu %s %zu %zu %zu %zu\n",
+             w->next_shard, name, w->used, w->num_docs, resume_seq, resume_offset);
+    if (shard_manifest_append(w, line) != 0) {
+        fprintf(stderr, "Failed to update shard manifest in %s\n", w->output_dir);
+        return -1;
+    }
+    
+    if (stats) {
+        stats->tokens_written += w->used;
+        stats->shards_written++;
+    }
+    
+    w->next_shard++;
+    w->used = 0;
+    w->num_docs = 0;
+    return 0;
+}
+
+// Append one document's tokens, splitting across shard boundaries
+static int shard_append_document(ShardWriter* w, size_t seq, const uint32_t* tokens,
+                                 size_t num_tokens, CLLMShardStats* stats) {
+    size_t pos = (seq == w->resume_seq) ? w->resume_offset : 0;
+    if (pos >= num_tokens) return 0;
+    
+    if (shard_begin_document(w) != 0) return -1;
+    
+    while (pos < num_tokens) {
+        size_t space = w->shard_tokens - w->used;
+        size_t take = (num_tokens - pos) < space ? (num_tokens - pos) : space;
+        memcpy(w->buffer + w->used, tokens + pos, take * sizeof(uint32_t));
+        w->used += take;
+        pos += take;
+        
+        if (w->used == w->shard_tokens) {
+            int rc = pos < num_tokens ? shard_flush(w, seq, pos, stats) : shard_flush(w, seq + 1, 0, stats);
+            if (rc != 0) return -1;
+            if (pos < num_tokens && shard_begin_document(w) != 0) return -1;
+        }
+    }
+    
+    return 0;
+}
+
+/**
+ * Shard Directory
+ */
+int cllm_data_loader_shard_directory(CLLMDataLoader* loader, const char* dirname,
+                                     const char* output_dir, const CLLMShardOptions* options,
+                                     CLLMShardStats* stats) {
+    if (!loader || !loader->tokenizer || !output_dir) return -1;
+    
+    CLLMShardOptions opts;
+    memset(&opts, 0, sizeof(opts));
+    if (options) opts = *options;
+    if (!dirname && !opts.file_list) return -1;
+    
+    if (opts.shard_tokens == 0) opts.shard_tokens = CLLM_SHARD_DEFAULT_TOKENS;
+    if (opts.num_workers <= 0) {
+        long cpus = sysconf(_SC_NPROCESSORS_ONLN);
+        opts.num_workers = cpus > 0 ? (int)cpus : 1;
+    }
+    if (opts.max_in_flight <= 0) opts.max_in_flight = opts.num_workers * 4;
+    if (opts.token_width == 0) {
+        opts.token_width = loader->tokenizer->vocab_size <= 65536 ? 2 : 4;
+    }
+    
+    CLLMShardStats local_stats;
+    if (!stats) stats = &local_stats;
+    memset(stats, 0, sizeof(*stats));
+    
+    ShardWriter writer;
+    memset(&writer, 0, sizeof(writer));
+    writer.output_dir = output_dir;
+    writer.token_width = opts.token_width;
+    writer.vocab_hash = cllm_token_dataset_vocab_hash(loader->tokenizer);
+    writer.shard_tokens = opts.shard_tokens;
+    
+    if (shard_manifest_load(&writer) != 0) return -1;
+    if (writer.complete) {
+        printf("Shards in %s are already complete\n", output_dir);
+        return 0;
+    }
+    
+    if (writer.next_shard == 0) {
+        char line[256];
+        snprintf(line, sizeof(line), "config vocab_hash=%08x token_width=%u shard_tokens=%zu\n",
+                 writer.vocab_hash, writer.token_width, writer.shard_tokens);
+        if (shard_manifest_append(&writer, line) != 0) {
+            fprintf(stderr, "Failed to create shard manifest in %s\n", output_dir);
+            return -1;
+        }
+    } else {
+        printf("Resuming at shard %zu (file %zu, token %zu)\n",
+               writer.next_shard, writer.resume_seq, writer.resume_offset);
+    }
+    stats->resumed_files = writer.resume_seq;
+    
+    writer.buffer = (uint32_t*)malloc(writer.shard_tokens * sizeof(uint32_t));
+    
+    ShardPipeline pipeline;
+    memset(&pipeline, 0, sizeof(pipeline));
+    pipeline.loader = loader;
+    pipeline.dirname = dirname;
+    pipeline.file_list = opts.file_list;
+    pipeline.window = (size_t)opts.max_in_flight;
+    pipeline.slots = (ShardSlot*)calloc(pipeline.window, sizeof(ShardSlot));
+    pipeline.next_seq = pipeline.next_take = pipeline.next_write = writer.resume_seq;
+    pthread_mutex_init(&pipeline.mutex, NULL);
+    pthread_cond_init(&pipeline.cond, NULL);
+    
+    pthread_t walker;
+    pthread_t* workers = (pthread_t*)calloc(opts.num_workers, sizeof(pthread_t));
+    int num_started = 0;
+    int rc = -1;
+    
+    if (!writer.buffer || !pipeline.slots || !workers ||
+        pthread_create(&walker, NULL, shard_walker_thread, &pipeline) != 0) {
+        goto cleanup_unstarted;
+    }
+    for (; num_started < opts.num_workers; num_started++) {
+        if (pthread_create(&workers[num_started], NULL, shard_worker_thread, &pipeline) != 0) break;
+    }
+    
+    // Writer: consume documents strictly in walk order
+    rc = num_started > 0 ? 0 : -1;
+    while (rc == 0) {
+        pthread_mutex_lock(&pipeline.mutex);
+        ShardSlot* slot = &pipeline.slots[pipeline.next_write % pipeline.window];
+        while (!(pipeline.next_write < pipeline.next_seq && slot->state == SHARD_SLOT_DONE) &&
+               !(pipeline.walk_done && pipeline.next_write == pipeline.next_seq)) {
+            pthread_cond_wait(&pipeline.cond, &pipeline.mutex);
+        }
+        if (pipeline.next_write == pipeline.next_seq) {
+            pthread_mutex_unlock(&pipeline.mutex);
+            break;
+        }
+        size_t seq = pipeline.next_write;
+        pthread_mutex_unlock(&pipeline.mutex);
+        
+        if (slot->failed) {
+            stats->files_skipped++;
+            if (opts.verbose) fprintf(stderr, "Skipped: %s\n", slot->path ? slot->path : "(null)");
+        } else {
+            stats->files_processed++;
+            stats->bytes_read += slot->bytes;
+            rc = shard_append_document(&writer, seq, slot->tokens, slot->num_tokens, stats);
+            if (opts.verbose && stats->files_processed % 1000 == 0) {
+                printf("  Processed %zu files, %zu shards\n", stats->files_processed, stats->shards_written);
+            }
+        }
+        
+        free(slot->path);
+        free(slot->tokens);
+        
+        pthread_mutex_lock(&pipeline.mutex);
+        slot->path = NULL;
+        slot->tokens = NULL;
+        slot->state = SHARD_SLOT_EMPTY;
+        pipeline.next_write++;
+        pthread_cond_broadcast(&pipeline.cond);
+        pthread_mutex_unlock(&pipeline.mutex);
+    }
+    
+    // Final partial shard and completion marker
+    if (rc == 0) rc = shard_flush(&writer, pipeline.next_seq, 0, stats);
+    if (rc == 0) rc = shard_manifest_append(&writer, "complete\n");
+    
+    // Stop the walker and workers (early on error)
+    pthread_mutex_lock(&pipeline.mutex);
+    if (rc != 0) pipeline.abort = 1;
+    pthread_cond_broadcast(&pipeline.cond);
+    pthread_mutex_unlock(&pipeline.mutex);
+    
+    pthread_join(walker, NULL);
+    for (int i = 0; i < num_started; i++) {
+        pthread_join(workers[i], NULL);
+    }
+    
+    for (size_t i = 0; i < pipeline.window; i++) {
+        free(pipeline.slots[i].path);
+        free(pipeline.slots[i].tokens);
+    }
+
+cleanup_unstarted:
+    pthread_mutex_destroy(&pipeline.mutex);
+    pthread_cond_destroy(&pipeline.cond);
+    free(workers);
+    free(pipeline.slots);
+    free(writer.buffer);
+    free(writer.doc_offsets);
+    
+    if (rc == 0) {
+        printf("Sharding complete: %zu files, %zu tokens, %zu shards written to %s\n",
+               stats->files_processed, stats->tokens_written, stats->shards_written, output_dir);
+    }
+    return rc;
+}
+
 /**
  * Print Dataset Statistics
  */
@@ -9,6 +9,7 @@
 #include "../include/cllm.h"
 #include "../include/cllm_inference.h"
 #include "../include/prime_float_math.h"
+#include "../include/cllm_gemm.h"
 
 /**
  * Embed a single token into the embedding space
@@ -151,16 +152,8 @@ void cllm_project_to_vocab(CLLMInference* inf, float* hidden_state, float* logit
     }
     
     // Compute logits as dot product with each embedding
-    for (uint32_t i = 0; i < vocab_size; i++) {
-        float dot = 0.0f;
-        size_t offset = i * embedding_dim;
-        
-        for (uint32_t j = 0; j < embedding_dim; j++) {
-            dot += transformed[j] * embedding_matrix[offset + j];
-        }
-        
-        logits[i] = dot;
-    }
+    cllm_gemv(false, vocab_size, embedding_dim, 1.0f, embedding_matrix, embedding_dim,
+              transformed, 0.0f, logits);
     
     free(transformed);
 }
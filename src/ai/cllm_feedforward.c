@@ -9,6 +9,7 @@
 #include "../include/cllm.h"
 #include "../include/prime_float_math.h"
 #include "../include/cllm_simd_utils.h"
+#include "../include/cllm_gemm.h"
 
 // Forward declaration
 void cllm_feedforward_free(FeedForwardLayer* layer);
@@ -165,11 +166,32 @@ void cllm_feedforward_batch(FeedForwardLayer* layer, float* input,
     if (!layer || !input || !output || batch_size <= 0) return;
     
     uint32_t input_dim = layer->input_dim;
+    uint32_t hidden_dim = layer->hidden_dim;
     uint32_t output_dim = layer->output_dim;
     
+    float* hidden = (float*)malloc((size_t)batch_size * hidden_dim * sizeof(float));
+    if (!hidden) return;
+    
+    // Whole batch at once: hidden = input * W1^T + b1
+    cllm_gemm(false, true, batch_size, hidden_dim, input_dim, 1.0f, input, input_dim,
+              layer->w1_lattice, input_dim, 0.0f, hidden, hidden_dim);
     for (int b = 0; b < batch_size; b++) {
-        cllm_feedforward(layer, &input[b * input_dim], &output[b * output_dim]);
+        float* row = &hidden[(size_t)b * hidden_dim];
+        if (layer->bias1) vector_add(row, row, layer->bias1, hidden_dim);
+        cllm_activation_gelu(row, hidden_dim);
     }
+    
+    // output = hidden * W2^T + b2
+    cllm_gemm(false, true, batch_size, output_dim, hidden_dim, 1.0f, hidden, hidden_dim,
+              layer->w2_lattice, hidden_dim, 0.0f, output, output_dim);
+    if (layer->bias2) {
+        for (int b = 0; b < batch_size; b++) {
+            float* row = &output[(size_t)b * output_dim];
+            vector_add(row, row, layer->bias2, output_dim);
+        }
+    }
+    
+    free(hidden);
 }
 
 /**
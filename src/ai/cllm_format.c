@@ -7,6 +7,10 @@
 #include <stdlib.h>
 #include <string.h>
 #include <time.h>
+#include <fcntl.h>
+#include <unistd.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
 #include "../include/cllm_format.h"
 #include "../include/cllm_utils.h"
 #include "../include/prime_float_math.h"
@@ -176,7 +180,8 @@ bool cllm_validate(const char* filename) {
     }
     
     // Check version
-    if (header.version != 1) {
+    if (header.version != CLLM_FORMAT_VERSION_LEGACY &&
+        header.version != CLLM_FORMAT_VERSION_TENSOR_TABLE) {
         return false;
     }
     
@@ -254,147 +259,313 @@ static bool cllm_validate_header(const CLLMHeader* header) {
 }
 
 /**
- * Read CLLM Model from File
+ * Describe a model's tensors in file order
  * 
- * Loads a complete model from disk including all weights and configuration.
+ * Fills entries (and, if data is non-NULL, each tensor's current pointer)
+ * and returns the number of tensors. Offsets follow the layout of
+ * model->weights set up by cllm_allocate_model.
  */
-CLLMModel* cllm_read_model(const char* filepath) {
-    if (!filepath) return NULL;
+static uint32_t build_tensor_table(const CLLMModel* model, CLLMTensorEntry* entries,
+                                   const float** data) {
+    uint32_t n = 0;
+    uint64_t offset = 0;
+    
+#define ADD_TENSOR(ptr, floats, ...) do { \
+        memset(&entries[n], 0, sizeof(CLLMTensorEntry)); \
+        snprintf(entries[n].name, CLLM_TENSOR_NAME_MAX, __VA_ARGS__); \
+        entries[n].offset = offset; \
+        entries[n].count = (floats); \
+        if (data) data[n] = (ptr); \
+        offset += (floats); \
+        n++; \
+    } while (0)
+    
+    ADD_TENSOR(model->embeddings.embeddings, model->vocab_size * model->embedding_dim, "embeddings");
     
-    FILE* file = fopen(filepath, "rb");
-    if (!file) {
-        fprintf(stderr, "Failed to open model file: %s\n", filepath);
+    for (uint32_t i = 0; i < model->num_layers; i++) {
+        const AttentionLayer* attn = &model->attention_layers[i];
+        uint64_t d_model = (uint64_t)attn->num_heads * attn->head_dim;
+        ADD_TENSOR(attn->query_lattice, d_model * d_model, "layers.%u.attention.query", i);
+        ADD_TENSOR(attn->key_lattice, d_model * d_model, "layers.%u.attention.key", i);
+        ADD_TENSOR(attn->value_lattice, d_model * d_model, "layers.%u.attention.value", i);
+    }
+    
+    for (uint32_t i = 0; i < model->num_layers; i++) {
+        const FeedForwardLayer* ff = &model->ff_layers[i];
+        ADD_TENSOR(ff->w1_lattice, (uint64_t)ff->input_dim * ff->hidden_dim, "layers.%u.ff.w1", i);
+        ADD_TENSOR(ff->bias1, ff->hidden_dim, "layers.%u.ff.bias1", i);
+        ADD_TENSOR(ff->w2_lattice, (uint64_t)ff->hidden_dim * ff->output_dim, "layers.%u.ff.w2", i);
+        ADD_TENSOR(ff->bias2, ff->output_dim, "layers.%u.ff.bias2", i);
+    }
+    
+    for (uint32_t i = 0; i < model->num_layers * 2; i++) {
+        const CLLMLayerNorm* ln = &model->layer_norms[i];
+        ADD_TENSOR(ln->gamma, ln->dim, "layer_norms.%u.gamma", i);
+        ADD_TENSOR(ln->beta, ln->dim, "layer_norms.%u.beta", i);
+    }
+    
+#undef ADD_TENSOR
+    
+    return n;
+}
+
+// Number of tensors in a model's table
+static uint32_t tensor_count(uint64_t num_layers) {
+    return 1 + 3 * num_layers + 4 * num_layers + 4 * num_layers;
+}
+
+// Round offset up to a multiple of align (power of two)
+static uint64_t align_up(uint64_t offset, uint64_t align) {
+    return (offset + align - 1) & ~(align - 1);
+}
+
+// Read exactly size bytes at offset
+static bool read_at(int fd, void* buffer, size_t size, off_t offset) {
+    char* p = (char*)buffer;
+    while (size > 0) {
+        ssize_t n = pread(fd, p, size, offset);
+        if (n <= 0) return false;
+        p += n;
+        size -= (size_t)n;
+        offset += n;
+    }
+    return true;
+}
+
+// Set every layer norm to the identity (gamma 1, beta 0)
+static void reset_layer_norms(CLLMModel* model) {
+    for (uint32_t i = 0; i < model->num_layers * 2; i++) {
+        for (uint32_t j = 0; j < model->layer_norms[i].dim; j++) {
+            model->layer_norms[i].gamma[j] = 1.0f;
+            model->layer_norms[i].beta[j] = 0.0f;
+        }
+    }
+}
+
+/**
+ * Read a version 1 file: raw tensors after the header, no layer norms
+ * 
+ * Version 1 files do not record ff_dim; it is recovered from the file size.
+ */
+static CLLMModel* read_legacy_model(int fd, const CLLMHeader* header, size_t file_size) {
+    uint64_t V = header->vocab_size;
+    uint64_t D = header->embedding_dim;
+    uint64_t L = header->num_layers;
+    
+    // Floats after the header: V*D + L * (3*D*D + 2*D*F + F + D)
+    uint64_t floats = (file_size - sizeof(CLLMHeader)) / sizeof(float);
+    uint64_t per_layer = floats > V * D ? (floats - V * D) / L : 0;
+    uint64_t ff_dim = per_layer > 3 * D * D + D ? (per_layer - 3 * D * D - D) / (2 * D + 1) : 0;
+    if (ff_dim == 0 || V * D + L * (3 * D * D + 2 * D * ff_dim + ff_dim + D) != floats) {
+        fprintf(stderr, "Model file size does not match its header\n");
         return NULL;
     }
     
-    // Read and validate header
-    CLLMHeader header;
-    if (fread(&header, sizeof(CLLMHeader), 1, file) != 1) {
-        fprintf(stderr, "Failed to read model header\n");
-        fclose(file);
+    CLLMConfig config = {
+        .vocab_size = header->vocab_size,
+        .embedding_dim = header->embedding_dim,
+        .num_layers = header->num_layers,
+        .num_heads = header->num_heads,
+        .ff_dim = (uint32_t)ff_dim,
+        .max_seq_len = header->context_length,
+        .dropout = 0.1f
+    };
+    
+    CLLMModel* model = cllm_allocate_model(&config);
+    if (!model) {
+        fprintf(stderr, "Failed to create model structure\n");
         return NULL;
     }
     
-    if (!cllm_validate_header(&header)) {
-        fprintf(stderr, "Invalid model header\n");
-        fclose(file);
+    // The file holds model->weights up to the layer norms, in the same order
+    if (!read_at(fd, model->weights, floats * sizeof(float), sizeof(CLLMHeader))) {
+        fprintf(stderr, "Failed to read model weights\n");
+        cllm_free_model(model);
+        return NULL;
+    }
+    reset_layer_norms(model);
+    
+    printf("  Loaded embeddings: %lu floats\n", (unsigned long)(V * D));
+    return model;
+}
+
+/**
+ * Read a version 2 file, mapping or reading its weights region
+ */
+static CLLMModel* read_tensor_table_model(int fd, const CLLMHeader* header, size_t file_size,
+                                          bool map) {
+    CLLMTensorTable table;
+    if (!read_at(fd, &table, sizeof(table), sizeof(CLLMHeader))) {
+        fprintf(stderr, "Failed to read tensor table\n");
+        return NULL;
+    }
+    
+    if (table.endian_tag != CLLM_ENDIAN_TAG) {
+        fprintf(stderr, "Model file was written with a different byte order\n");
+        return NULL;
+    }
+    if (table.num_tensors != tensor_count(header->num_layers) ||
+        table.data_offset % CLLM_TENSOR_ALIGNMENT != 0 || table.data_offset > file_size ||
+        table.num_weights > (file_size - table.data_offset) / sizeof(float)) {
+        fprintf(stderr, "Invalid tensor table\n");
         return NULL;
     }
     
-    // Create model configuration from header
     CLLMConfig config = {
-        .vocab_size = header.vocab_size,
-        .embedding_dim = header.embedding_dim,
-        .num_layers = header.num_layers,
-        .num_heads = header.num_heads,
-        .ff_dim = header.embedding_dim * 4,  // Standard transformer ratio
-        .max_seq_len = header.context_length,
+        .vocab_size = header->vocab_size,
+        .embedding_dim = header->embedding_dim,
+        .num_layers = header->num_layers,
+        .num_heads = header->num_heads,
+        .ff_dim = table.ff_dim,
+        .max_seq_len = table.max_seq_len,
         .dropout = 0.1f
     };
     
-    // Create model structure
-    CLLMModel* model = cllm_create_model(&config);
+    CLLMModel* model = cllm_allocate_model(&config);
     if (!model) {
         fprintf(stderr, "Failed to create model structure\n");
-        fclose(file);
         return NULL;
     }
     
-    // Read embeddings
-    if (model->embeddings.embeddings) {
-        size_t emb_size = model->vocab_size * model->embedding_dim;
-        if (fread(model->embeddings.embeddings, sizeof(float), emb_size, file) != emb_size) {
-            fprintf(stderr, "Failed to read embeddings\n");
+    // The stored table must describe exactly this model's layout
+    size_t table_bytes = table.num_tensors * sizeof(CLLMTensorEntry);
+    CLLMTensorEntry* stored = (CLLMTensorEntry*)malloc(table_bytes);
+    CLLMTensorEntry* expected = (CLLMTensorEntry*)malloc(table_bytes);
+    bool valid = stored && expected && table.num_weights == model->num_weights &&
+                 read_at(fd, stored, table_bytes, sizeof(CLLMHeader) + sizeof(CLLMTensorTable)) &&
+                 build_tensor_table(model, expected, NULL) == table.num_tensors;
+    for (uint32_t i = 0; valid && i < table.num_tensors; i++) {
+        valid = stored[i].offset == expected[i].offset && stored[i].count == expected[i].count &&
+                strncmp(stored[i].name, expected[i].name, CLLM_TENSOR_NAME_MAX) == 0;
+    }
+    free(stored);
+    free(expected);
+    if (!valid) {
+        fprintf(stderr, "Tensor table does not match the model configuration\n");
+        cllm_free_model(model);
+        return NULL;
+    }
+    
+    size_t weight_bytes = model->num_weights * sizeof(float);
+    if (map) {
+        void* base = mmap(NULL, file_size, PROT_READ, MAP_SHARED, fd, 0);
+        if (base == MAP_FAILED) {
+            fprintf(stderr, "Failed to map model weights\n");
             cllm_free_model(model);
-            fclose(file);
             return NULL;
         }
-        printf("  Loaded embeddings: %zu floats\n", emb_size);
+        
+        // The uninitialized block from cllm_allocate_model was never touched
+        free(model->weights);
+        cllm_model_bind_weights(model, (float*)((char*)base + table.data_offset));
+        model->weights_map = base;
+        model->weights_map_size = file_size;
+    } else if (!read_at(fd, model->weights, weight_bytes, (off_t)table.data_offset)) {
+        fprintf(stderr, "Failed to read model weights\n");
+        cllm_free_model(model);
+        return NULL;
     }
     
-    // Read lattice transforms
-    if (model->embeddings.lattice_transform) {
-        size_t transform_size = model->embedding_dim * model->embedding_dim;
-        size_t read = fread(model->embeddings.lattice_transform, sizeof(float), transform_size, file);
-        if (read != transform_size) {
-            fprintf(stderr, "Warning: Expected %zu floats, read %zu for lattice_transform\n", transform_size, read);
-        }
-    }
-    if (model->embeddings.inverse_transform) {
-        size_t transform_size = model->embedding_dim * model->embedding_dim;
-        size_t read = fread(model->embeddings.inverse_transform, sizeof(float), transform_size, file);
-        if (read != transform_size) {
-            fprintf(stderr, "Warning: Expected %zu floats, read %zu for inverse_transform\n", transform_size, read);
-        }
+    printf("  %s weights: %lu floats\n", map ? "Mapped" : "Loaded", (unsigned long)model->num_weights);
+    return model;
+}
+
+/**
+ * Open a model file and dispatch on its version
+ */
+static CLLMModel* load_model(const char* filepath, bool map) {
+    if (!filepath) return NULL;
+    
+    int fd = open(filepath, O_RDONLY);
+    if (fd < 0) {
+        fprintf(stderr, "Failed to open model file: %s\n", filepath);
+        return NULL;
     }
     
-    // Read attention layers
-    for (uint32_t i = 0; i < model->num_layers; i++) {
-        AttentionLayer* attn = &model->attention_layers[i];
-        uint32_t d_model = attn->num_heads * attn->head_dim;
-        
-        if (attn->query_lattice) {
-            size_t read = fread(attn->query_lattice, sizeof(float), d_model * d_model, file);
-            (void)read; // Suppress warning
-        }
-        if (attn->key_lattice) {
-            size_t read = fread(attn->key_lattice, sizeof(float), d_model * d_model, file);
-            (void)read;
-        }
-        if (attn->value_lattice) {
-            size_t read = fread(attn->value_lattice, sizeof(float), d_model * d_model, file);
-            (void)read;
-        }
+    struct stat st;
+    CLLMHeader header;
+    if (fstat(fd, &st) != 0 || !read_at(fd, &header, sizeof(CLLMHeader), 0)) {
+        fprintf(stderr, "Failed to read model header\n");
+        close(fd);
+        return NULL;
     }
     
-    // Read feedforward layers
-    for (uint32_t i = 0; i < model->num_layers; i++) {
-        FeedForwardLayer* ff = &model->ff_layers[i];
-        
-        if (ff->w1_lattice) {
-            size_t read = fread(ff->w1_lattice, sizeof(float), ff->input_dim * ff->hidden_dim, file);
-            (void)read;
-        }
-        if (ff->bias1) {
-            size_t read = fread(ff->bias1, sizeof(float), ff->hidden_dim, file);
-            (void)read;
-        }
-        if (ff->w2_lattice) {
-            size_t read = fread(ff->w2_lattice, sizeof(float), ff->hidden_dim * ff->output_dim, file);
-            (void)read;
-        }
-        if (ff->bias2) {
-            size_t read = fread(ff->bias2, sizeof(float), ff->output_dim, file);
-            (void)read;
-        }
+    if (!cllm_validate_header(&header)) {
+        fprintf(stderr, "Invalid model header\n");
+        close(fd);
+        return NULL;
     }
     
-    fclose(file);
-    printf("✓ Model loaded: %s\n", filepath);
-    printf("  Vocab: %lu | Embedding: %lu | Layers: %lu\n",
-           (unsigned long)header.vocab_size, (unsigned long)header.embedding_dim, 
-           (unsigned long)header.num_layers);
+    CLLMModel* model;
+    if (header.version == CLLM_FORMAT_VERSION_TENSOR_TABLE) {
+        model = read_tensor_table_model(fd, &header, (size_t)st.st_size, map);
+    } else if (header.version == CLLM_FORMAT_VERSION_LEGACY) {
+        model = read_legacy_model(fd, &header, (size_t)st.st_size);
+    } else {
+        fprintf(stderr, "Unsupported model format version: %u\n", header.version);
+        model = NULL;
+    }
+    close(fd);  // A mapping keeps the file referenced
     
+    if (model) {
+        printf("✓ Model loaded: %s\n", filepath);
+        printf("  Vocab: %lu | Embedding: %lu | Layers: %lu\n",
+               (unsigned long)header.vocab_size, (unsigned long)header.embedding_dim, 
+               (unsigned long)header.num_layers);
+    }
     return model;
 }
 
 /**
- * Write CLLM Model to File
+ * Read CLLM Model from File
+ * 
+ * Loads a complete model from disk including all weights and configuration.
+ * The model is allocated without initializing its weights, which are then
+ * read straight from the file.
  */
-int cllm_write_model(const CLLMModel* model, const char* filepath) {
-    if (!model || !filepath) return -1;
+CLLMModel* cllm_read_model(const char* filepath) {
+    return load_model(filepath, false);
+}
+
+/**
+ * Read CLLM Model with Memory-Mapped Weights
+ * 
+ * Tensor-table files are mapped read-only, so processes loading the same
+ * file share one copy of the weights. Version 1 files are read normally.
+ */
+CLLMModel* cllm_read_model_mapped(const char* filepath) {
+    return load_model(filepath, true);
+}
+
+/**
+ * Copy Mapped Weights into Owned Memory
+ */
+int cllm_model_make_writable(CLLMModel* model) {
+    if (!model) return -1;
+    if (!model->weights_map) return 0;
     
-    FILE* file = fopen(filepath, "wb");
-    if (!file) {
-        fprintf(stderr, "Failed to create model file: %s\n", filepath);
+    float* weights = (float*)malloc(model->num_weights * sizeof(float));
+    if (!weights) {
+        fprintf(stderr, "Failed to allocate weights\n");
         return -1;
     }
+    memcpy(weights, model->weights, model->num_weights * sizeof(float));
     
-    // Create header
+    munmap(model->weights_map, model->weights_map_size);
+    model->weights_map = NULL;
+    model->weights_map_size = 0;
+    cllm_model_bind_weights(model, weights);
+    return 0;
+}
+
+/**
+ * Write a version 1 file (models whose tensors are not in one weight block)
+ */
+static bool write_legacy_model(const CLLMModel* model, FILE* file) {
     CLLMHeader header;
     memset(&header, 0, sizeof(CLLMHeader));
     memcpy(header.magic, "CLLM\x01\x00\x00\x00", 8);  // Correct 8-byte magic number
-    header.version = 1;
+    header.version = CLLM_FORMAT_VERSION_LEGACY;
     header.vocab_size = model->vocab_size;
     header.embedding_dim = model->embedding_dim;
     header.num_layers = model->num_layers;
@@ -409,8 +580,7 @@ int cllm_write_model(const CLLMModel* model, const char* filepath) {
     // Write header
     if (fwrite(&header, sizeof(CLLMHeader), 1, file) != 1) {
         fprintf(stderr, "Failed to write header\n");
-        fclose(file);
-        return -1;
+        return false;
     }
     
     // Write embeddings
@@ -418,22 +588,11 @@ int cllm_write_model(const CLLMModel* model, const char* filepath) {
         size_t emb_size = model->vocab_size * model->embedding_dim;
         if (fwrite(model->embeddings.embeddings, sizeof(float), emb_size, file) != emb_size) {
             fprintf(stderr, "Failed to write embeddings\n");
-            fclose(file);
-            return -1;
+            return false;
         }
         printf("  Saved embeddings: %zu floats\n", emb_size);
     }
     
-    // Write lattice transforms
-    if (model->embeddings.lattice_transform) {
-        size_t transform_size = model->embedding_dim * model->embedding_dim;
-        fwrite(model->embeddings.lattice_transform, sizeof(float), transform_size, file);
-    }
-    if (model->embeddings.inverse_transform) {
-        size_t transform_size = model->embedding_dim * model->embedding_dim;
-        fwrite(model->embeddings.inverse_transform, sizeof(float), transform_size, file);
-    }
-    
     // Write attention layers
     for (uint32_t i = 0; i < model->num_layers; i++) {
         AttentionLayer* attn = &model->attention_layers[i];
@@ -454,7 +613,119 @@ int cllm_write_model(const CLLMModel* model, const char* filepath) {
         if (ff->bias2) fwrite(ff->bias2, sizeof(float), ff->output_dim, file);
     }
     
-    fclose(file);
+    return !ferror(file);
+}
+
+/**
+ * Write a version 2 file: header, tensor table, page-aligned weight block
+ * Returns false without writing if the model's tensors are not laid out in
+ * model->weights
+ */
+static bool write_tensor_table_model(const CLLMModel* model, FILE* file, bool* written) {
+    *written = false;
+    if (!model->weights || !model->attention_layers || !model->ff_layers ||
+        !model->layer_norms || model->num_layers == 0) {
+        return true;
+    }
+    
+    uint32_t num_tensors = tensor_count(model->num_layers);
+    CLLMTensorEntry* entries = (CLLMTensorEntry*)calloc(num_tensors, sizeof(CLLMTensorEntry));
+    const float** data = (const float**)calloc(num_tensors, sizeof(float*));
+    if (!entries || !data) {
+        free(entries);
+        free(data);
+        return false;
+    }
+    
+    build_tensor_table(model, entries, data);
+    bool canonical = entries[num_tensors - 1].offset + entries[num_tensors - 1].count == model->num_weights;
+    for (uint32_t i = 0; canonical && i < num_tensors; i++) {
+        canonical = data[i] == model->weights + entries[i].offset;
+    }
+    free(data);
+    if (!canonical) {
+        free(entries);
+        return true;
+    }
+    
+    CLLMHeader header;
+    memset(&header, 0, sizeof(CLLMHeader));
+    memcpy(header.magic, "CLLM\x01\x00\x00\x00", 8);
+    header.version = CLLM_FORMAT_VERSION_TENSOR_TABLE;
+    header.architecture = 1;
+    header.symmetry_order = SYMMETRY_ORDER;
+    header.golden_ratio = GOLDEN_RATIO;
+    header.timestamp = time(NULL);
+    header.vocab_size = model->vocab_size;
+    header.embedding_dim = model->embedding_dim;
+    header.num_layers = model->num_layers;
+    header.num_heads = model->attention_layers[0].num_heads;
+    header.context_length = model->pos_encoding.max_length ? model->pos_encoding.max_length : 512;
+    header.total_params = model->num_weights;
+    
+    CLLMTensorTable table;
+    memset(&table, 0, sizeof(table));
+    table.num_tensors = num_tensors;
+    table.endian_tag = CLLM_ENDIAN_TAG;
+    table.ff_dim = model->ff_layers[0].hidden_dim;
+    table.max_seq_len = header.context_length;
+    table.num_weights = model->num_weights;
+    
+    uint64_t table_end = sizeof(CLLMHeader) + sizeof(CLLMTensorTable) +
+                         (uint64_t)num_tensors * sizeof(CLLMTensorEntry);
+    table.data_offset = align_up(table_end, CLLM_TENSOR_ALIGNMENT);
+    
+    bool ok = fwrite(&header, sizeof(CLLMHeader), 1, file) == 1 &&
+              fwrite(&table, sizeof(table), 1, file) == 1 &&
+              fwrite(entries, sizeof(CLLMTensorEntry), num_tensors, file) == num_tensors;
+    free(entries);
+    
+    static const char zeros[CLLM_TENSOR_ALIGNMENT] = {0};
+    size_t padding = (size_t)(table.data_offset - table_end);
+    ok = ok && (padding == 0 || fwrite(zeros, 1, padding, file) == padding) &&
+         fwrite(model->weights, sizeof(float), model->num_weights, file) == model->num_weights;
+    
+    if (ok) {
+        printf("  Saved %u tensors: %lu floats\n", num_tensors, (unsigned long)model->num_weights);
+    }
+    *written = ok;
+    return ok;
+}
+
+/**
+ * Write CLLM Model to File
+ * 
+ * Writes the tensor-table layout (version 2) to a temporary file and renames
+ * it into place, so processes that have the previous file mapped keep a
+ * consistent view. Models built outside cllm_allocate_model fall back to
+ * version 1.
+ */
+int cllm_write_model(const CLLMModel* model, const char* filepath) {
+    if (!model || !filepath) return -1;
+    
+    char tmp_path[1024];
+    snprintf(tmp_path, sizeof(tmp_path), "%s.tmp", filepath);
+    
+    FILE* file = fopen(tmp_path, "wb");
+    if (!file) {
+        fprintf(stderr, "Failed to create model file: %s\n", filepath);
+        return -1;
+    }
+    
+    bool written;
+    bool ok = write_tensor_table_model(model, file, &written);
+    if (ok && !written) {
+        rewind(file);
+        ok = write_legacy_model(model, file);
+    }
+    
+    if (fclose(file) != 0) ok = false;
+    if (!ok || rename(tmp_path, filepath) != 0) {
+        fprintf(stderr, "Failed to write model file: %s\n", filepath);
+        unlink(tmp_path);
+        return -1;
+    }
+    
     printf("✓ Model saved: %s\n", filepath);
     printf("  Saved %u layers with embeddings\n", model->num_layers);
     return 0;
@@ -0,0 +1,802 @@
+/**
+ * cllm_gemm.c - Packed, Register-Blocked GEMM with Runtime Dispatch
+ * 
+ * Goto-style loop nest: for each NC-wide column panel and KC-deep slice
+ * of k, B is packed into NR-wide strips; for each MC-tall row block, A
+ * (scaled by alpha) is packed into MR-tall strips; the microkernel then
+ * computes every MR x NR tile of C from the two packed strips with the
+ * tile held in registers. Edge tiles go through a scratch tile.
+ * 
+ * Each instruction set has its own microkernel compiled with a target
+ * attribute, so one binary carries all of them and the best supported
+ * one is picked once with __builtin_cpu_supports.
+ * 
+ * Large products are split across a persistent worker pool. Only one
+ * product uses the pool at a time; calls made while it is busy, from a
+ * pool worker, or from a thread marked serial run on the calling thread.
+ */
+
+#include "../include/cllm_gemm.h"
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <pthread.h>
+#include <unistd.h>
+
+#if defined(__x86_64__) || defined(__i386__)
+#include <immintrin.h>
+#define GEMM_X86 1
+#endif
+
+#define GEMM_KC 256                         // Depth of a packed panel
+#define GEMM_NC 3072                        // Width of a packed B panel
+#define GEMM_MAX_MR 6
+#define GEMM_MAX_NR 32
+#define GEMM_MAX_THREADS 64
+#define GEMM_THREAD_MIN_FLOPS (1 << 23)     // Work per thread before splitting pays off
+
+// Microkernel: C[MR x NR] = A_strip * B_strip + beta * C (C not read when beta is 0)
+typedef void (*GemmKernel)(int kc, const float* a, const float* b, float* c, int ldc, float beta);
+
+// Dot products of up to 4 rows of A with x
+typedef void (*GemvRowsKernel)(int n, const float* const rows[4], const float* x, float out[4]);
+
+// y += alpha * x
+typedef void (*AxpyKernel)(int n, float alpha, const float* x, float* y);
+
+typedef struct {
+    CLLMGemmIsa isa;
+    const char* name;
+    int mr;
+    int nr;
+    int mc;                                 // Rows of A packed at once (multiple of mr)
+    GemmKernel kernel;
+    GemvRowsKernel rows;
+    AxpyKernel axpy;
+} GemmImpl;
+
+// Store one vector of a finished tile (beta 0 means C is not read)
+#define STORE_SCALAR(c, acc, beta) ((c) = (beta) == 0.0f ? (acc) : (acc) + (beta) * (c))
+
+// ============================================================================
+// SCALAR
+// ============================================================================
+
+static void kernel_scalar(int kc, const float* a, const float* b, float* c, int ldc, float beta) {
+    float acc[4][4] = {{0.0f}};
+    
+    for (int p = 0; p < kc; p++) {
+        for (int i = 0; i < 4; i++) {
+            for (int j = 0; j < 4; j++) {
+                acc[i][j] += a[i] * b[j];
+            }
+        }
+        a += 4;
+        b += 4;
+    }
+    
+    for (int i = 0; i < 4; i++) {
+        for (int j = 0; j < 4; j++) {
+            STORE_SCALAR(c[i * ldc + j], acc[i][j], beta);
+        }
+    }
+}
+
+static void rows_scalar(int n, const float* const rows[4], const float* x, float out[4]) {
+    for (int r = 0; r < 4; r++) {
+        float sum = 0.0f;
+        for (int j = 0; j < n; j++) {
+            sum += rows[r][j] * x[j];
+        }
+        out[r] = sum;
+    }
+}
+
+static void axpy_scalar(int n, float alpha, const float* x, float* y) {
+    for (int j = 0; j < n; j++) {
+        y[j] += alpha * x[j];
+    }
+}
+
+#ifdef GEMM_X86
+
+// ============================================================================
+// SSE (4x8 tile)
+// ============================================================================
+
+__attribute__((target("sse2")))
+static inline void store_sse(float* c, __m128 v, float beta) {
+    if (beta != 0.0f) v = _mm_add_ps(v, _mm_mul_ps(_mm_set1_ps(beta), _mm_loadu_ps(c)));
+    _mm_storeu_ps(c, v);
+}
+
+__attribute__((target("sse2")))
+static inline float hsum_sse(__m128 v) {
+    __m128 shuf = _mm_shuffle_ps(v, v, _MM_SHUFFLE(2, 3, 0, 1));
+    __m128 sums = _mm_add_ps(v, shuf);
+    shuf = _mm_movehl_ps(shuf, sums);
+    return _mm_cvtss_f32(_mm_add_ss(sums, shuf));
+}
+
+__attribute__((target("sse2")))
+static void kernel_sse(int kc, const float* a, const float* b, float* c, int ldc, float beta) {
+    __m128 c00 = _mm_setzero_ps(), c01 = _mm_setzero_ps();
+    __m128 c10 = _mm_setzero_ps(), c11 = _mm_setzero_ps();
+    __m128 c20 = _mm_setzero_ps(), c21 = _mm_setzero_ps();
+    __m128 c30 = _mm_setzero_ps(), c31 = _mm_setzero_ps();
+    
+    for (int p = 0; p < kc; p++) {
+        __m128 b0 = _mm_loadu_ps(b);
+        __m128 b1 = _mm_loadu_ps(b + 4);
+        __m128 av;
+        av = _mm_set1_ps(a[0]); c00 = _mm_add_ps(c00, _mm_mul_ps(av, b0)); c01 = _mm_add_ps(c01, _mm_mul_ps(av, b1));
+        av = _mm_set1_ps(a[1]); c10 = _mm_add_ps(c10, _mm_mul_ps(av, b0)); c11 = _mm_add_ps(c11, _mm_mul_ps(av, b1));
+        av = _mm_set1_ps(a[2]); c20 = _mm_add_ps(c20, _mm_mul_ps(av, b0)); c21 = _mm_add_ps(c21, _mm_mul_ps(av, b1));
+        av = _mm_set1_ps(a[3]); c30 = _mm_add_ps(c30, _mm_mul_ps(av, b0)); c31 = _mm_add_ps(c31, _mm_mul_ps(av, b1));
+        a += 4;
+        b += 8;
+    }
+    
+    store_sse(c, c00, beta); store_sse(c + 4, c01, beta); c += ldc;
+    store_sse(c, c10, beta); store_sse(c + 4, c11, beta); c += ldc;
+    store_sse(c, c20, beta); store_sse(c + 4, c21, beta); c += ldc;
+    store_sse(c, c30, beta); store_sse(c + 4, c31, beta);
+}
+
+__attribute__((target("sse2")))
+static void rows_sse(int n, const float* const rows[4], const float* x, float out[4]) {
+    __m128 s0 = _mm_setzero_ps(), s1 = _mm_setzero_ps(), s2 = _mm_setzero_ps(), s3 = _mm_setzero_ps();
+    int j = 0;
+    for (; j + 4 <= n; j += 4) {
+        __m128 xv = _mm_loadu_ps(x + j);
+        s0 = _mm_add_ps(s0, _mm_mul_ps(_mm_loadu_ps(rows[0] + j), xv));
+        s1 = _mm_add_ps(s1, _mm_mul_ps(_mm_loadu_ps(rows[1] + j), xv));
+        s2 = _mm_add_ps(s2, _mm_mul_ps(_mm_loadu_ps(rows[2] + j), xv));
+        s3 = _mm_add_ps(s3, _mm_mul_ps(_mm_loadu_ps(rows[3] + j), xv));
+    }
+    out[0] = hsum_sse(s0);
+    out[1] = hsum_sse(s1);
+    out[2] = hsum_sse(s2);
+    out[3] = hsum_sse(s3);
+    for (; j < n; j++) {
+        for (int r = 0; r < 4; r++) out[r] += rows[r][j] * x[j];
+    }
+}
+
+__attribute__((target("sse2")))
+static void axpy_sse(int n, float alpha, const float* x, float* y) {
+    __m128 va = _mm_set1_ps(alpha);
+    int j = 0;
+    for (; j + 4 <= n; j += 4) {
+        _mm_storeu_ps(y + j, _mm_add_ps(_mm_loadu_ps(y + j), _mm_mul_ps(va, _mm_loadu_ps(x + j))));
+    }
+    for (; j < n; j++) y[j] += alpha * x[j];
+}
+
+// ============================================================================
+// AVX2 + FMA (6x16 tile)
+// ============================================================================
+
+__attribute__((target("avx2,fma")))
+static inline void store_avx2(float* c, __m256 v, float beta) {
+    if (beta != 0.0f) v = _mm256_fmadd_ps(_mm256_set1_ps(beta), _mm256_loadu_ps(c), v);
+    _mm256_storeu_ps(c, v);
+}
+
+__attribute__((target("avx2,fma")))
+static inline float hsum_avx2(__m256 v) {
+    __m128 sum = _mm_add_ps(_mm256_castps256_ps128(v), _mm256_extractf128_ps(v, 1));
+    sum = _mm_add_ps(sum, _mm_movehl_ps(sum, sum));
+    sum = _mm_add_ss(sum, _mm_movehdup_ps(sum));
+    return _mm_cvtss_f32(sum);
+}
+
+__attribute__((target("avx2,fma")))
+static void kernel_avx2(int kc, const float* a, const float* b, float* c, int ldc, float beta) {
+    __m256 c00 = _mm256_setzero_ps(), c01 = _mm256_setzero_ps();
+    __m256 c10 = _mm256_setzero_ps(), c11 = _mm256_setzero_ps();
+    __m256 c20 = _mm256_setzero_ps(), c21 = _mm256_setzero_ps();
+    __m256 c30 = _mm256_setzero_ps(), c31 = _mm256_setzero_ps();
+    __m256 c40 = _mm256_setzero_ps(), c41 = _mm256_setzero_ps();
+    __m256 c50 = _mm256_setzero_ps(), c51 = _mm256_setzero_ps();
+    
+    for (int p = 0; p < kc; p++) {
+        __m256 b0 = _mm256_loadu_ps(b);
+        __m256 b1 = _mm256_loadu_ps(b + 8);
+        __m256 av;
+        av = _mm256_broadcast_ss(a + 0); c00 = _mm256_fmadd_ps(av, b0, c00); c01 = _mm256_fmadd_ps(av, b1, c01);
+        av = _mm256_broadcast_ss(a + 1); c10 = _mm256_fmadd_ps(av, b0, c10); c11 = _mm256_fmadd_ps(av, b1, c11);
+        av = _mm256_broadcast_ss(a + 2); c20 = _mm256_fmadd_ps(av, b0, c20); c21 = _mm256_fmadd_ps(av, b1, c21);
+        av = _mm256_broadcast_ss(a + 3); c30 = _mm256_fmadd_ps(av, b0, c30); c31 = _mm256_fmadd_ps(av, b1, c31);
+        av = _mm256_broadcast_ss(a + 4); c40 = _mm256_fmadd_ps(av, b0, c40); c41 = _mm256_fmadd_ps(av, b1, c41);
+        av = _mm256_broadcast_ss(a + 5); c50 = _mm256_fmadd_ps(av, b0, c50); c51 = _mm256_fmadd_ps(av, b1, c51);
+        a += 6;
+        b += 16;
+    }
+    
+    store_avx2(c, c00, beta); store_avx2(c + 8, c01, beta); c += ldc;
+    store_avx2(c, c10, beta); store_avx2(c + 8, c11, beta); c += ldc;
+    store_avx2(c, c20, beta); store_avx2(c + 8, c21, beta); c += ldc;
+    store_avx2(c, c30, beta); store_avx2(c + 8, c31, beta); c += ldc;
+    store_avx2(c, c40, beta); store_avx2(c + 8, c41, beta); c += ldc;
+    store_avx2(c, c50, beta); store_avx2(c + 8, c51, beta);
+}
+
+__attribute__((target("avx2,fma")))
+static void rows_avx2(int n, const float* const rows[4], const float* x, float out[4]) {
+    __m256 s0 = _mm256_setzero_ps(), s1 = _mm256_setzero_ps();
+    __m256 s2 = _mm256_setzero_ps(), s3 = _mm256_setzero_ps();
+    int j = 0;
+    for (; j + 8 <= n; j += 8) {
+        __m256 xv = _mm256_loadu_ps(x + j);
+        s0 = _mm256_fmadd_ps(_mm256_loadu_ps(rows[0] + j), xv, s0);
+        s1 = _mm256_fmadd_ps(_mm256_loadu_ps(rows[1] + j), xv, s1);
+        s2 = _mm256_fmadd_ps(_mm256_loadu_ps(rows[2] + j), xv, s2);
+        s3 = _mm256_fmadd_ps(_mm256_loadu_ps(rows[3] + j), xv, s3);
+    }
+    out[0] = hsum_avx2(s0);
+    out[1] = hsum_avx2(s1);
+    out[2] = hsum_avx2(s2);
+    out[3] = hsum_avx2(s3);
+    for (; j < n; j++) {
+        for (int r = 0; r < 4; r++) out[r] += rows[r][j] * x[j];
+    }
+}
+
+__attribute__((target("avx2,fma")))
+static void axpy_avx2(int n, float alpha, const float* x, float* y) {
+    __m256 va = _mm256_set1_ps(alpha);
+    int j = 0;
+    for (; j + 8 <= n; j += 8) {
+        _mm256_storeu_ps(y + j, _mm256_fmadd_ps(va, _mm256_loadu_ps(x + j), _mm256_loadu_ps(y + j)));
+    }
+    for (; j < n; j++) y[j] += alpha * x[j];
+}
+
+// ============================================================================
+// AVX-512 (6x32 tile)
+// ============================================================================
+
+__attribute__((target("avx512f")))
+static inline void store_avx512(float* c, __m512 v, float beta) {
+    if (beta != 0.0f) v = _mm512_fmadd_ps(_mm512_set1_ps(beta), _mm512_loadu_ps(c), v);
+    _mm512_storeu_ps(c, v);
+}
+
+__attribute__((target("avx512f")))
+static void kernel_avx512(int kc, const float* a, const float* b, float* c, int ldc, float beta) {
+    __m512 c00 = _mm512_setzero_ps(), c01 = _mm512_setzero_ps();
+    __m512 c10 = _mm512_setzero_ps(), c11 = _mm512_setzero_ps();
+    __m512 c20 = _mm512_setzero_ps(), c21 = _mm512_setzero_ps();
+    __m512 c30 = _mm512_setzero_ps(), c31 = _mm512_setzero_ps();
+    __m512 c40 = _mm512_setzero_ps(), c41 = _mm512_setzero_ps();
+    __m512 c50 = _mm512_setzero_ps(), c51 = _mm512_setzero_ps();
+    
+    for (int p = 0; p < kc; p++) {
+        __m512 b0 = _mm512_loadu_ps(b);
+        __m512 b1 = _mm512_loadu_ps(b + 16);
+        __m512 av;
+        av = _mm512_set1_ps(a[0]); c00 = _mm512_fmadd_ps(av, b0, c00); c01 = _mm512_fmadd_ps(av, b1, c01);
+        av = _mm512_set1_ps(a[1]); c10 = _mm512_fmadd_ps(av, b0, c10); c11 = _mm512_fmadd_ps(av, b1, c11);
+        av = _mm512_set1_ps(a[2]); c20 = _mm512_fmadd_ps(av, b0, c20); c21 = _mm512_fmadd_ps(av, b1, c21);
+        av = _mm512_set1_ps(a[3]); c30 = _mm512_fmadd_ps(av, b0, c30); c31 = _mm512_fmadd_ps(av, b1, c31);
+        av = _mm512_set1_ps(a[4]); c40 = _mm512_fmadd_ps(av, b0, c40); c41 = _mm512_fmadd_ps(av, b1, c41);
+        av = _mm512_set1_ps(a[5]); c50 = _mm512_fmadd_ps(av, b0, c50); c51 = _mm512_fmadd_ps(av, b1, c51);
+        a += 6;
+        b += 32;
+    }
+    
+    store_avx512(c, c00, beta); store_avx512(c + 16, c01, beta); c += ldc;
+    store_avx512(c, c10, beta); store_avx512(c + 16, c11, beta); c += ldc;
+    store_avx512(c, c20, beta); store_avx512(c + 16, c21, beta); c += ldc;
+    store_avx512(c, c30, beta); store_avx512(c + 16, c31, beta); c += ldc;
+    store_avx512(c, c40, beta); store_avx512(c + 16, c41, beta); c += ldc;
+    store_avx512(c, c50, beta); store_avx512(c + 16, c51, beta);
+}
+
+__attribute__((target("avx512f")))
+static void rows_avx512(int n, const float* const rows[4], const float* x, float out[4]) {
+    __m512 s0 = _mm512_setzero_ps(), s1 = _mm512_setzero_ps();
+    __m512 s2 = _mm512_setzero_ps(), s3 = _mm512_setzero_ps();
+    int j = 0;
+    for (; j + 16 <= n; j += 16) {
+        __m512 xv = _mm512_loadu_ps(x + j);
+        s0 = _mm512_fmadd_ps(_mm512_loadu_ps(rows[0] + j), xv, s0);
+        s1 = _mm512_fmadd_ps(_mm512_loadu_ps(rows[1] + j), xv, s1);
+        s2 = _mm512_fmadd_ps(_mm512_loadu_ps(rows[2] + j), xv, s2);
+        s3 = _mm512_fmadd_ps(_mm512_loadu_ps(rows[3] + j), xv, s3);
+    }
+    out[0] = _mm512_reduce_add_ps(s0);
+    out[1] = _mm512_reduce_add_ps(s1);
+    out[2] = _mm512_reduce_add_ps(s2);
+    out[3] = _mm512_reduce_add_ps(s3);
+    for (; j < n; j++) {
+        for (int r = 0; r < 4; r++) out[r] += rows[r][j] * x[j];
+    }
+}
+
+__attribute__((target("avx512f")))
+static void axpy_avx512(int n, float alpha, const float* x, float* y) {
+    __m512 va = _mm512_set1_ps(alpha);
+    int j = 0;
+    for (; j + 16 <= n; j += 16) {
+        _mm512_storeu_ps(y + j, _mm512_fmadd_ps(va, _mm512_loadu_ps(x + j), _mm512_loadu_ps(y + j)));
+    }
+    for (; j < n; j++) y[j] += alpha * x[j];
+}
+
+#endif /* GEMM_X86 */
+
+// ============================================================================
+// DISPATCH
+// ============================================================================
+
+static const GemmImpl g_impls[] = {
+    { CLLM_GEMM_ISA_SCALAR, "scalar", 4, 4, 64, kernel_scalar, rows_scalar, axpy_scalar },
+#ifdef GEMM_X86
+    { CLLM_GEMM_ISA_SSE, "sse", 4, 8, 128, kernel_sse, rows_sse, axpy_sse },
+    { CLLM_GEMM_ISA_AVX2, "avx2", 6, 16, 144, kernel_avx2, rows_avx2, axpy_avx2 },
+    { CLLM_GEMM_ISA_AVX512, "avx512", 6, 32, 144, kernel_avx512, rows_avx512, axpy_avx512 },
+#endif
+};
+
+#define GEMM_MAX_MC 144
+
+static const GemmImpl* g_impl = &g_impls[0];
+static int g_num_threads = 0;               // 0 until first use
+static pthread_once_t g_detect_once = PTHREAD_ONCE_INIT;
+static pthread_once_t g_pack_once = PTHREAD_ONCE_INIT;
+static pthread_key_t g_pack_key;
+static __thread bool t_serial = false;      // Calling thread never splits products
+
+static bool isa_supported(CLLMGemmIsa isa) {
+    switch (isa) {
+        case CLLM_GEMM_ISA_SCALAR:
+            return true;
+#ifdef GEMM_X86
+        case CLLM_GEMM_ISA_SSE:
+            return __builtin_cpu_supports("sse2");
+        case CLLM_GEMM_ISA_AVX2:
+            return __builtin_cpu_supports("avx2") && __builtin_cpu_supports("fma");
+        case CLLM_GEMM_ISA_AVX512:
+            return __builtin_cpu_supports("avx512f");
+#endif
+        default:
+            return false;
+    }
+}
+
+static const GemmImpl* find_impl(CLLMGemmIsa isa) {
+    for (size_t i = 0; i < sizeof(g_impls) / sizeof(g_impls[0]); i++) {
+        if (g_impls[i].isa == isa) return &g_impls[i];
+    }
+    return NULL;
+}
+
+// Pick the widest supported microkernel
+static void detect_isa(void) {
+#ifdef GEMM_X86
+    __builtin_cpu_init();
+#endif
+    for (int isa = CLLM_GEMM_ISA_AVX512; isa >= CLLM_GEMM_ISA_SCALAR; isa--) {
+        const GemmImpl* impl = find_impl((CLLMGemmIsa)isa);
+        if (impl && isa_supported((CLLMGemmIsa)isa)) {
+            g_impl = impl;
+            break;
+        }
+    }
+    
+    long cores = sysconf(_SC_NPROCESSORS_ONLN);
+    if (g_num_threads <= 0) g_num_threads = cores > 0 ? (int)cores : 1;
+}
+
+static const GemmImpl* get_impl(void) {
+    pthread_once(&g_detect_once, detect_isa);
+    return g_impl;
+}
+
+CLLMGemmIsa cllm_gemm_get_isa(void) {
+    return get_impl()->isa;
+}
+
+int cllm_gemm_set_isa(CLLMGemmIsa isa) {
+    get_impl();
+    const GemmImpl* impl = find_impl(isa);
+    if (!impl || !isa_supported(isa)) return -1;
+    g_impl = impl;
+    return 0;
+}
+
+const char* cllm_gemm_isa_name(CLLMGemmIsa isa) {
+    const GemmImpl* impl = find_impl(isa);
+    return impl ? impl->name : "unsupported";
+}
+
+void cllm_gemm_set_threads(int num_threads) {
+    get_impl();
+    if (num_threads <= 0) {
+        long cores = sysconf(_SC_NPROCESSORS_ONLN);
+        num_threads = cores > 0 ? (int)cores : 1;
+    }
+    g_num_threads = num_threads < GEMM_MAX_THREADS ? num_threads : GEMM_MAX_THREADS;
+}
+
+void cllm_gemm_set_thread_serial(bool serial) {
+    t_serial = serial;
+}
+
+// ============================================================================
+// PACKING
+// ============================================================================
+
+// Per-thread packing buffer, freed when the thread exits
+typedef struct {
+    float* data;
+    size_t size;
+} PackBuffer;
+
+static void pack_buffer_free(void* arg) {
+    PackBuffer* buffer = (PackBuffer*)arg;
+    free(buffer->data);
+    free(buffer);
+}
+
+static void pack_key_create(void) {
+    pthread_key_create(&g_pack_key, pack_buffer_free);
+}
+
+static float* pack_buffer(size_t floats) {
+    pthread_once(&g_pack_once, pack_key_create);
+    
+    PackBuffer* buffer = (PackBuffer*)pthread_getspecific(g_pack_key);
+    if (!buffer) {
+        buffer = (PackBuffer*)calloc(1, sizeof(PackBuffer));
+        if (!buffer) return NULL;
+        pthread_setspecific(g_pack_key, buffer);
+    }
+    
+    if (buffer->size < floats) {
+        void* data = NULL;
+        if (posix_memalign(&data, 64, floats * sizeof(float)) != 0) return NULL;
+        free(buffer->data);
+        buffer->data = (float*)data;
+        buffer->size = floats;
+    }
+    return buffer->data;
+}
+
+/**
+ * Pack alpha * op(A)[i0 .. i0+mc, p0 .. p0+kc] into mr-row strips
+ * 
+ * Strip layout: for each p, mr consecutive values (rows past mc are 0).
+ */
+static void pack_a(int mr, bool trans, const float* A, int lda, int i0, int p0,
+                   int mc, int kc, float alpha, float* ap) {
+    for (int ir = 0; ir < mc; ir += mr) {
+        int rows = mc - ir < mr ? mc - ir : mr;
+        
+        if (!trans) {
+            for (int i = 0; i < rows; i++) {
+                const float* src = &A[(size_t)(i0 + ir + i) * lda + p0];
+                for (int p = 0; p < kc; p++) {
+                    ap[p * mr + i] = alpha * src[p];
+                }
+            }
+        } else {
+            for (int p = 0; p < kc; p++) {
+                const float* src = &A[(size_t)(p0 + p) * lda + i0 + ir];
+                for (int i = 0; i < rows; i++) {
+                    ap[p * mr + i] = alpha * src[i];
+                }
+            }
+        }
+        for (int i = rows; i < mr; i++) {
+            for (int p = 0; p < kc; p++) {
+                ap[p * mr + i] = 0.0f;
+            }
+        }
+        ap += (size_t)mr * kc;
+    }
+}
+
+/**
+ * Pack op(B)[p0 .. p0+kc, j0 .. j0+nc] into nr-column strips
+ * 
+ * Strip layout: for each p, nr consecutive values (columns past nc are 0).
+ */
+static void pack_b(int nr, bool trans, const float* B, int ldb, int p0, int j0,
+                   int kc, int nc, float* bp) {
+    for (int jr = 0; jr < nc; jr += nr) {
+        int cols = nc - jr < nr ? nc - jr : nr;
+        
+        if (!trans) {
+            for (int p = 0; p < kc; p++) {
+                const float* src = &B[(size_t)(p0 + p) * ldb + j0 + jr];
+                float* dst = &bp[p * nr];
+                memcpy(dst, src, cols * sizeof(float));
+                for (int j = cols; j < nr; j++) dst[j] = 0.0f;
+            }
+        } else {
+            for (int j = 0; j < cols; j++) {
+                const float* src = &B[(size_t)(j0 + jr + j) * ldb + p0];
+                for (int p = 0; p < kc; p++) {
+                    bp[p * nr + j] = src[p];
+                }
+            }
+            for (int j = cols; j < nr; j++) {
+                for (int p = 0; p < kc; p++) {
+                    bp[p * nr + j] = 0.0f;
+                }
+            }
+        }
+        bp += (size_t)nr * kc;
+    }
+}
+
+// ============================================================================
+// GEMM
+// ============================================================================
+
+typedef struct {
+    const GemmImpl* impl;
+    bool trans_a;
+    bool trans_b;
+    int m, n, k;
+    float alpha;
+    const float* A;
+    int lda;
+    const float* B;
+    int ldb;
+    float beta;
+    float* C;
+    int ldc;
+} GemmTask;
+
+// C = beta * C (k == 0 or alpha == 0)
+static void scale_c(int m, int n, float beta, float* C, int ldc) {
+    for (int i = 0; i < m; i++) {
+        float* row = &C[(size_t)i * ldc];
+        if (beta == 0.0f) {
+            memset(row, 0, n * sizeof(float));
+        } else if (beta != 1.0f) {
+            for (int j = 0; j < n; j++) row[j] *= beta;
+        }
+    }
+}
+
+// Single-threaded blocked GEMM
+static void gemm_serial(const GemmTask* t) {
+    const GemmImpl* impl = t->impl;
+    int mr = impl->mr;
+    int nr = impl->nr;
+    int nc_max = t->n < GEMM_NC ? ((t->n + nr - 1) / nr) * nr : GEMM_NC;
+    int kc_max = t->k < GEMM_KC ? t->k : GEMM_KC;
+    int mc_max = t->m < impl->mc ? ((t->m + mr - 1) / mr) * mr : impl->mc;
+    
+    float* ap = pack_buffer((size_t)mc_max * kc_max + (size_t)kc_max * nc_max + GEMM_MAX_MR * GEMM_MAX_NR);
+    if (!ap) {
+        fprintf(stderr, "Error: Failed to allocate GEMM packing buffer\n");
+        return;
+    }
+    float* bp = ap + (size_t)mc_max * kc_max;
+    float* tile = bp + (size_t)kc_max * nc_max;
+    
+    for (int jc = 0; jc < t->n; jc += GEMM_NC) {
+        int nc = t->n - jc < GEMM_NC ? t->n - jc : GEMM_NC;
+        
+        for (int pc = 0; pc < t->k; pc += GEMM_KC) {
+            int kc = t->k - pc < GEMM_KC ? t->k - pc : GEMM_KC;
+            float beta = pc == 0 ? t->beta : 1.0f;
+            pack_b(nr, t->trans_b, t->B, t->ldb, pc, jc, kc, nc, bp);
+            
+            for (int ic = 0; ic < t->m; ic += impl->mc) {
+                int mc = t->m - ic < impl->mc ? t->m - ic : impl->mc;
+                pack_a(mr, t->trans_a, t->A, t->lda, ic, pc, mc, kc, t->alpha, ap);
+                
+                for (int jr = 0; jr < nc; jr += nr) {
+                    int cols = nc - jr < nr ? nc - jr : nr;
+                    const float* b = &bp[(size_t)jr * kc];
+                    
+                    for (int ir = 0; ir < mc; ir += mr) {
+                        int rows = mc - ir < mr ? mc - ir : mr;
+                        const float* a = &ap[(size_t)ir * kc];
+                        float* c = &t->C[(size_t)(ic + ir) * t->ldc + jc + jr];
+                        
+                        if (rows == mr && cols == nr) {
+                            impl->kernel(kc, a, b, c, t->ldc, beta);
+                            continue;
+                        }
+                        
+                        // Edge tile
+                        impl->kernel(kc, a, b, tile, nr, 0.0f);
+                        for (int i = 0; i < rows; i++) {
+                            for (int j = 0; j < cols; j++) {
+                                STORE_SCALAR(c[(size_t)i * t->ldc + j], tile[i * nr + j], beta);
+                            }
+                        }
+                    }
+                }
+            }
+        }
+    }
+}
+
+// ============================================================================
+// THREAD POOL
+// ============================================================================
+
+// Workers started on first use and kept for the life of the process
+typedef struct {
+    pthread_mutex_t lock;
+    pthread_cond_t work;                    // Tasks available
+    pthread_cond_t done;                    // Last task of a batch finished
+    pthread_mutex_t busy;                   // Held by the caller whose batch is running
+    int num_workers;
+    GemmTask* tasks;
+    int count;
+    int next;                               // Next task to take
+    int pending;                            // Tasks not yet finished
+} GemmPool;
+
+static GemmPool g_pool = {
+    PTHREAD_MUTEX_INITIALIZER, PTHREAD_COND_INITIALIZER, PTHREAD_COND_INITIALIZER,
+    PTHREAD_MUTEX_INITIALIZER, 0, NULL, 0, 0, 0
+};
+
+// Take and run tasks of the current batch (caller holds the pool lock)
+static void pool_run_tasks(GemmPool* pool) {
+    while (pool->next < pool->count) {
+        GemmTask* task = &pool->tasks[pool->next++];
+        pthread_mutex_unlock(&pool->lock);
+        gemm_serial(task);
+        pthread_mutex_lock(&pool->lock);
+        if (--pool->pending == 0) pthread_cond_signal(&pool->done);
+    }
+}
+
+static void* gemm_worker(void* arg) {
+    GemmPool* pool = (GemmPool*)arg;
+    t_serial = true;
+    
+    pthread_mutex_lock(&pool->lock);
+    for (;;) {
+        while (pool->next >= pool->count) {
+            pthread_cond_wait(&pool->work, &pool->lock);
+        }
+        pool_run_tasks(pool);
+    }
+    return NULL;
+}
+
+// Start workers up to `wanted` (caller holds the busy lock); returns how many run
+static int pool_grow(GemmPool* pool, int wanted) {
+    while (pool->num_workers < wanted) {
+        pthread_t thread;
+        if (pthread_create(&thread, NULL, gemm_worker, pool) != 0) break;
+        pthread_detach(thread);
+        pool->num_workers++;
+    }
+    return pool->num_workers;
+}
+
+/**
+ * Run tasks on the pool and the calling thread; false if the pool is
+ * in use by another caller
+ */
+static bool pool_run(GemmTask* tasks, int count) {
+    GemmPool* pool = &g_pool;
+    if (pthread_mutex_trylock(&pool->busy) != 0) return false;
+    
+    // With no workers the caller simply runs every task
+    pool_grow(pool, count - 1);
+    
+    pthread_mutex_lock(&pool->lock);
+    pool->tasks = tasks;
+    pool->count = count;
+    pool->next = 0;
+    pool->pending = count;
+    pthread_cond_broadcast(&pool->work);
+    
+    pool_run_tasks(pool);
+    while (pool->pending > 0) {
+        pthread_cond_wait(&pool->done, &pool->lock);
+    }
+    pool->tasks = NULL;
+    pool->count = 0;
+    pool->next = 0;
+    pthread_mutex_unlock(&pool->lock);
+    
+    pthread_mutex_unlock(&pool->busy);
+    return true;
+}
+
+void cllm_gemm(bool trans_a, bool trans_b, int m, int n, int k,
+               float alpha, const float* A, int lda, const float* B, int ldb,
+               float beta, float* C, int ldc) {
+    if (!C || m <= 0 || n <= 0) return;
+    if (k <= 0 || alpha == 0.0f || !A || !B) {
+        scale_c(m, n, beta, C, ldc);
+        return;
+    }
+    
+    const GemmImpl* impl = get_impl();
+    GemmTask task = { impl, trans_a, trans_b, m, n, k, alpha, A, lda, B, ldb, beta, C, ldc };
+    
+    // Split large products along the longer side of C
+    double flops = 2.0 * m * n * k;
+    int threads = t_serial ? 1 : g_num_threads;
+    if (flops / GEMM_THREAD_MIN_FLOPS < threads) threads = (int)(flops / GEMM_THREAD_MIN_FLOPS);
+    bool split_rows = m >= n;
+    int unit = split_rows ? impl->mr : impl->nr;
+    int units = ((split_rows ? m : n) + unit - 1) / unit;
+    if (threads > units) threads = units;
+    if (threads <= 1) {
+        gemm_serial(&task);
+        return;
+    }
+    
+    GemmTask tasks[GEMM_MAX_THREADS];
+    int per_thread = ((units + threads - 1) / threads) * unit;
+    int count = 0;
+    
+    for (int start = 0; start < (split_rows ? m : n); start += per_thread) {
+        GemmTask* sub = &tasks[count];
+        *sub = task;
+        if (split_rows) {
+            sub->m = m - start < per_thread ? m - start : per_thread;
+            sub->A = trans_a ? A + start : A + (size_t)start * lda;
+            sub->C = C + (size_t)start * ldc;
+        } else {
+            sub->n = n - start < per_thread ? n - start : per_thread;
+            sub->B = trans_b ? B + (size_t)start * ldb : B + start;
+            sub->C = C + start;
+        }
+        count++;
+    }
+    
+    // Another product already has the pool: this one runs here
+    if (!pool_run(tasks, count)) gemm_serial(&task);
+}
+
+// ============================================================================
+// GEMV AND RANK-1 UPDATE
+// ============================================================================
+
+void cllm_gemv(bool trans, int m, int n, float alpha, const float* A, int lda,
+               const float* x, float beta, float* y) {
+    if (!A || !x || !y || m <= 0 || n <= 0) return;
+    
+    const GemmImpl* impl = get_impl();
+    
+    if (!trans) {
+        // Four rows share each load of x
+        for (int i = 0; i < m; i += 4) {
+            int rows = m - i < 4 ? m - i : 4;
+            const float* row_ptrs[4];
+            float out[4];
+            for (int r = 0; r < 4; r++) {
+                row_ptrs[r] = &A[(size_t)(r < rows ? i + r : i) * lda];
+            }
+            impl->rows(n, row_ptrs, x, out);
+            for (int r = 0; r < rows; r++) {
+                STORE_SCALAR(y[i + r], alpha * out[r], beta);
+            }
+        }
+        return;
+    }
+    
+    // y = beta * y + sum_i (alpha * x[i]) * A[i, :]
+    scale_c(1, n, beta, y, n);
+    for (int i = 0; i < m; i++) {
+        if (x[i] != 0.0f) impl->axpy(n, alpha * x[i], &A[(size_t)i * lda], y);
+    }
+}
+
+void cllm_ger(int m, int n, float alpha, const float* x, const float* y, float* A, int lda) {
+    if (!x || !y || !A || m <= 0 || n <= 0 || alpha == 0.0f) return;
+    
+    const GemmImpl* impl = get_impl();
+    for (int i = 0; i < m; i++) {
+        if (x[i] != 0.0f) impl->axpy(n, alpha * x[i], y, &A[(size_t)i * lda]);
+    }
+}
\ No newline at end of file
@@ -4,7 +4,10 @@
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
+#include <time.h>
 #include "../include/prime_float_math.h"
+#include "cllm_simd_utils.h"
+#include "cllm_gemm.h"
 
 // Constants
 #define MAX_SEQUENCE_LENGTH 512
@@ -36,8 +39,34 @@ CLLMInference* cllm_inference_init(CLLMModel* model) {
     
     inference->hidden_states = (float*)calloc(embed_dim, sizeof(float));
     inference->logits = (float*)calloc(vocab_size, sizeof(float));
+    inference->sample_buf = (IndexProb*)malloc(vocab_size * sizeof(IndexProb));
+    inference->rng_state = (uint64_t)time(NULL) ^ (uint64_t)(uintptr_t)inference;
+    
+    // Per-layer key/value cache for incremental decoding
+    size_t num_layers = model->num_layers > 0 ? model->num_layers : 1;
+    inference->kv_cache_size = MAX_SEQUENCE_LENGTH;
+    inference->kv_cache_used = 0;
+    inference->key_cache = (float*)calloc(num_layers * MAX_SEQUENCE_LENGTH * embed_dim, sizeof(float));
+    inference->value_cache = (float*)calloc(num_layers * MAX_SEQUENCE_LENGTH * embed_dim, sizeof(float));
+    
+    // Scratch buffers so the forward pass never allocates
+    uint32_t max_hidden = 1;
+    if (model->ff_layers) {
+        for (uint32_t i = 0; i < model->num_layers; i++) {
+            if (model->ff_layers[i].hidden_dim > max_hidden) {
+                max_hidden = model->ff_layers[i].hidden_dim;
+            }
+        }
+    }
+    inference->query_buf = (float*)calloc(embed_dim, sizeof(float));
+    inference->attn_output = (float*)calloc(embed_dim, sizeof(float));
+    inference->attn_scores = (float*)calloc(MAX_SEQUENCE_LENGTH, sizeof(float));
+    inference->ff_hidden = (float*)calloc(max_hidden, sizeof(float));
     
-    if (!inference->hidden_states || !inference->logits) {
+    if (!inference->hidden_states || !inference->logits || !inference->sample_buf ||
+        !inference->key_cache || !inference->value_cache ||
+        !inference->query_buf || !inference->attn_output ||
+        !inference->attn_scores || !inference->ff_hidden) {
         fprintf(stderr, "Error: Failed to allocate inference buffers\n");
         cllm_inference_cleanup(inference);
         return NULL;
@@ -53,6 +82,13 @@ void cllm_inference_cleanup(CLLMInference* inference) {
     
     if (inference->hidden_states) free(inference->hidden_states);
     if (inference->logits) free(inference->logits);
+    free(inference->key_cache);
+    free(inference->value_cache);
+    free(inference->query_buf);
+    free(inference->attn_output);
+    free(inference->attn_scores);
+    free(inference->ff_hidden);
+    free(inference->sample_buf);
     
     free(inference);
 }
@@ -252,24 +288,16 @@ void cllm_layer_norm_old(float* x, CLLMLayerNorm* ln, uint32_t dim) {
     }
 }
 
-// Feed-forward network
-void cllm_feed_forward(float* x, FeedForwardLayer* ff) {
-    if (!x || !ff) return;
-    
+// Feed-forward network using a caller-provided hidden buffer
+static void feed_forward_scratch(float* x, FeedForwardLayer* ff, float* hidden) {
     uint32_t input_dim = ff->input_dim;
     uint32_t hidden_dim = ff->hidden_dim;
     
-    // Allocate temporary buffer
-    float* hidden = (float*)calloc(hidden_dim, sizeof(float));
-    if (!hidden) return;
-    
     // First layer: input -> hidden
     if (ff->w1_lattice && ff->bias1) {
+        cllm_gemv(true, input_dim, hidden_dim, 1.0f, ff->w1_lattice, hidden_dim, x, 0.0f, hidden);
         for (uint32_t i = 0; i < hidden_dim; i++) {
-            hidden[i] = ff->bias1[i];
-            for (uint32_t j = 0; j < input_dim; j++) {
-                hidden[i] += x[j] * ff->w1_lattice[j * hidden_dim + i];
-            }
+            hidden[i] += ff->bias1[i];
             // ReLU activation
             if (hidden[i] < 0) hidden[i] = 0;
         }
@@ -277,93 +305,226 @@ void cllm_feed_forward(float* x, FeedForwardLayer* ff) {
     
     // Second layer: hidden -> output
     if (ff->w2_lattice && ff->bias2) {
-        for (uint32_t i = 0; i < input_dim; i++) {
-            x[i] = ff->bias2[i];
-            for (uint32_t j = 0; j < hidden_dim; j++) {
-                x[i] += hidden[j] * ff->w2_lattice[j * input_dim + i];
-            }
-        }
+        cllm_gemv(true, hidden_dim, input_dim, 1.0f, ff->w2_lattice, input_dim, hidden, 0.0f, x);
+        vector_add(x, x, ff->bias2, input_dim);
     }
+}
+
+// Feed-forward network
+void cllm_feed_forward(float* x, FeedForwardLayer* ff) {
+    if (!x || !ff) return;
     
+    // Allocate temporary buffer
+    float* hidden = (float*)calloc(ff->hidden_dim, sizeof(float));
+    if (!hidden) return;
+    
+    feed_forward_scratch(x, ff, hidden);
     free(hidden);
 }
 
-// Forward pass
-void cllm_forward(CLLMInference* inference, uint32_t* tokens, int num_tokens) {
-    if (!inference || !tokens || num_tokens <= 0) return;
-    
-    CLLMModel* model = inference->model;
-    if (!model) {
-        fprintf(stderr, "Error: Model is NULL in cllm_forward\n");
-        return;
+// Per-head projection: out[h*hd+d] = sum_i W[h*hd*hd + d*hd + i] * in[h*hd+i]
+static void project_heads(const float* weights, const float* input, float* output,
+                          uint32_t num_heads, uint32_t head_dim) {
+    for (uint32_t h = 0; h < num_heads; h++) {
+        cllm_gemv(false, head_dim, head_dim, 1.0f, &weights[(size_t)h * head_dim * head_dim], head_dim,
+                  &input[h * head_dim], 0.0f, &output[h * head_dim]);
     }
+}
+
+// Attend the current query over cached positions 0..slot of one layer
+static void cached_attention(CLLMInference* inf, AttentionLayer* layer,
+                             const float* keys, const float* values, int slot,
+                             uint32_t embed_dim) {
+    uint32_t num_heads = layer->num_heads;
+    uint32_t head_dim = layer->head_dim;
+    float scale = 1.0f / prime_sqrtf((float)head_dim);
+    float* scores = inf->attn_scores;
+    
+    for (uint32_t h = 0; h < num_heads; h++) {
+        const float* query = &inf->query_buf[h * head_dim];
+        float* out = &inf->attn_output[h * head_dim];
+        
+        float max_score = -1e30f;
+        for (int t = 0; t <= slot; t++) {
+            scores[t] = dot_product(query, &keys[(size_t)t * embed_dim + h * head_dim], head_dim) * scale;
+            if (scores[t] > max_score) max_score = scores[t];
+        }
+        
+        float sum = 0.0f;
+        for (int t = 0; t <= slot; t++) {
+            scores[t] = prime_expf(scores[t] - max_score);
+            sum += scores[t];
+        }
+        
+        memset(out, 0, head_dim * sizeof(float));
+        for (int t = 0; t <= slot; t++) {
+            float weight = scores[t] / sum;
+            const float* value = &values[(size_t)t * embed_dim + h * head_dim];
+            for (uint32_t d = 0; d < head_dim; d++) {
+                out[d] += weight * value[d];
+            }
+        }
+    }
+}
+
+// Project hidden state onto the embedding table
+static void project_logits(CLLMInference* inference) {
+    CLLMModel* model = inference->model;
+    uint32_t embed_dim = model->embeddings.embedding_dim;
     
+    cllm_gemv(false, model->vocab_size, embed_dim, 1.0f, model->embeddings.embeddings, embed_dim,
+              inference->hidden_states, 0.0f, inference->logits);
+}
+
+/**
+ * Run one token through the transformer stack
+ * 
+ * The token's keys/values are written to cache slot `slot` of every layer
+ * and attention runs over slots 0..slot.
+ */
+static int forward_step(CLLMInference* inference, uint32_t token, int position, int slot) {
+    CLLMModel* model = inference->model;
     uint32_t embed_dim = model->embeddings.embedding_dim;
     
-    // Check critical pointers
-    if (!inference->hidden_states) {
-        fprintf(stderr, "Error: hidden_states is NULL\n");
-        return;
-    }
-    if (!inference->logits) {
-        fprintf(stderr, "Error: logits is NULL\n");
-        return;
-    }
     if (!model->embeddings.embeddings) {
         fprintf(stderr, "Error: embeddings is NULL\n");
-        return;
+        return -1;
     }
-    
-    // Get embedding for last token
-    uint32_t last_token = tokens[num_tokens - 1];
-    if (last_token >= model->vocab_size) {
-        fprintf(stderr, "Error: token %u out of range (vocab_size=%lu)\n", last_token, (unsigned long)model->vocab_size);
-        return;
+    if (token >= model->vocab_size) {
+        fprintf(stderr, "Error: token %u out of range (vocab_size=%lu)\n", token, (unsigned long)model->vocab_size);
+        return -1;
     }
     
-    cllm_get_embedding(inference, last_token, inference->hidden_states);
+    cllm_get_embedding(inference, token, inference->hidden_states);
     
     // Apply positional encoding
-    cllm_apply_positional_encoding(inference, inference->hidden_states, num_tokens - 1);
+    cllm_apply_positional_encoding(inference, inference->hidden_states, position);
     
     // Pass through transformer layers
     if (model->attention_layers && model->ff_layers && model->layer_norms) {
-        float* attn_output = (float*)malloc(embed_dim * sizeof(float));
-        if (!attn_output) {
-            fprintf(stderr, "Error: Failed to allocate attention output buffer\n");
-            return;
-        }
-        
         for (uint32_t layer = 0; layer < model->num_layers; layer++) {
+            AttentionLayer* attn_layer = &model->attention_layers[layer];
+            uint32_t attn_dim = attn_layer->num_heads * attn_layer->head_dim;
+            if (attn_dim > embed_dim) {
+                fprintf(stderr, "Error: attention dim %u exceeds embedding dim %u\n", attn_dim, embed_dim);
+                return -1;
+            }
+            
             // Layer norm
             cllm_layer_norm_old(inference->hidden_states, &model->layer_norms[layer], embed_dim);
             
-            // Attention - use proper multi-head attention
-            AttentionLayer* attn_layer = &model->attention_layers[layer];
-            cllm_attention_forward(attn_layer, inference->hidden_states, attn_output, NULL, NULL, 1);
+            // Project Q for this step, append K/V to the layer cache
+            size_t layer_offset = (size_t)layer * inference->kv_cache_size * embed_dim;
+            float* keys = &inference->key_cache[layer_offset];
+            float* values = &inference->value_cache[layer_offset];
+            
+            project_heads(attn_layer->query_lattice, inference->hidden_states, inference->query_buf,
+                          attn_layer->num_heads, attn_layer->head_dim);
+            project_heads(attn_layer->key_lattice, inference->hidden_states, &keys[(size_t)slot * embed_dim],
+                          attn_layer->num_heads, attn_layer->head_dim);
+            project_heads(attn_layer->value_lattice, inference->hidden_states, &values[(size_t)slot * embed_dim],
+                          attn_layer->num_heads, attn_layer->head_dim);
+            
+            // Attention over all cached positions
+            cached_attention(inference, attn_layer, keys, values, slot, embed_dim);
             
             // Copy attention output back to hidden states
-            memcpy(inference->hidden_states, attn_output, embed_dim * sizeof(float));
+            memcpy(inference->hidden_states, inference->attn_output, attn_dim * sizeof(float));
             
             // Feed-forward
-            cllm_feed_forward(inference->hidden_states, &model->ff_layers[layer]);
+            feed_forward_scratch(inference->hidden_states, &model->ff_layers[layer], inference->ff_hidden);
         }
         
-        free(attn_output);
-        
         // Final layer norm
         cllm_layer_norm_old(inference->hidden_states, &model->layer_norms[model->num_layers - 1], embed_dim);
     }
+    
+    return 0;
+}
 
+// Discard all cached keys/values (start a new sequence)
+void cllm_inference_reset_cache(CLLMInference* inference) {
+    if (inference) inference->kv_cache_used = 0;
+}
+
+/**
+ * Incremental forward pass
+ * 
+ * Processes a single new token at position kv_cache_used, attending over
+ * the cached keys/values of all earlier tokens. Cost per step is linear in
+ * the current sequence length instead of re-running the whole prefix.
+ * 
+ * @param inference Inference context
+ * @param token Newest token
+ * @param compute_logits Project to vocabulary (skip while prefilling)
+ * @return 0 on success, -1 on error or when the cache is full
+ */
+int cllm_forward_cached(CLLMInference* inference, uint32_t token, bool compute_logits) {
+    if (!inference || !inference->model) return -1;
+    
+    if (inference->kv_cache_used >= inference->kv_cache_size) {
+        fprintf(stderr, "Error: KV cache full (%d positions)\n", inference->kv_cache_size);
+        return -1;
+    }
     
-    // Project to vocabulary
-    for (uint32_t i = 0; i < model->vocab_size; i++) {
-        inference->logits[i] = 0.0f;
-        float* token_embed = &model->embeddings.embeddings[i * embed_dim];
-        for (uint32_t j = 0; j < embed_dim; j++) {
-            inference->logits[i] += inference->hidden_states[j] * token_embed[j];
+    int slot = inference->kv_cache_used;
+    if (forward_step(inference, token, slot, slot) != 0) return -1;
+    inference->kv_cache_used++;
+    
+    if (compute_logits) project_logits(inference);
+    return 0;
+}
+
+/**
+ * Prefill the KV cache with a prompt
+ * 
+ * Resets the cache, runs every prompt token through the model and leaves
+ * the logits for the last token in inference->logits. Prompts longer than
+ * the cache keep only their most recent tokens.
+ * 
+ * @return 0 on success, -1 on error
+ */
+int cllm_prefill(CLLMInference* inference, uint32_t* tokens, int num_tokens) {
+    if (!inference || !tokens || num_tokens <= 0) return -1;
+    
+    cllm_inference_reset_cache(inference);
+    
+    int start = num_tokens > inference->kv_cache_size ? num_tokens - inference->kv_cache_size : 0;
+    for (int i = start; i < num_tokens; i++) {
+        if (cllm_forward_cached(inference, tokens[i], i == num_tokens - 1) != 0) {
+            return -1;
         }
     }
+    
+    return 0;
+}
+
+// Forward pass (stateless: only the last token, no context)
+void cllm_forward(CLLMInference* inference, uint32_t* tokens, int num_tokens) {
+    if (!inference || !tokens || num_tokens <= 0) return;
+    
+    CLLMModel* model = inference->model;
+    if (!model) {
+        fprintf(stderr, "Error: Model is NULL in cllm_forward\n");
+        return;
+    }
+    
+    // Check critical pointers
+    if (!inference->hidden_states) {
+        fprintf(stderr, "Error: hidden_states is NULL\n");
+        return;
+    }
+    if (!inference->logits) {
+        fprintf(stderr, "Error: logits is NULL\n");
+        return;
+    }
+    
+    // Uses cache slot 0 as scratch, so any incremental session is discarded
+    cllm_inference_reset_cache(inference);
+    if (forward_step(inference, tokens[num_tokens - 1], num_tokens - 1, 0) != 0) return;
+    
+    // Project to vocabulary
+    project_logits(inference);
 }
 
 // Apply temperature scaling
@@ -396,33 +557,277 @@ void cllm_softmax(float* logits, int vocab_size) {
     }
 }
 
-// Sample top-k
+// Per-inference RNG step (splitmix64) - no shared state between sessions
+static uint64_t rng_next(uint64_t* state) {
+    uint64_t z = (*state += 0x9E3779B97F4A7C15ULL);
+    z = (z ^ (z >> 30)) * 0xBF58476D1CE4E5B9ULL;
+    z = (z ^ (z >> 27)) * 0x94D049BB133111EBULL;
+    return z ^ (z >> 31);
+}
+
+// Uniform float in [0, 1) from the per-inference RNG
+static float rng_uniform(uint64_t* state) {
+    return (float)(rng_next(state) >> 40) * (1.0f / 16777216.0f);
+}
+
+// Restore heap order below index i (min-heap or max-heap on prob)
+static void heap_sift_down(IndexProb* heap, int n, int i, bool min_heap) {
+    for (;;) {
+        int best = i;
+        int left = 2 * i + 1;
+        int right = left + 1;
+        if (min_heap) {
+            if (left < n && heap[left].prob < heap[best].prob) best = left;
+            if (right < n && heap[right].prob < heap[best].prob) best = right;
+        } else {
+            if (left < n && heap[left].prob > heap[best].prob) best = left;
+            if (right < n && heap[right].prob > heap[best].prob) best = right;
+        }
+        if (best == i) return;
+        IndexProb tmp = heap[i];
+        heap[i] = heap[best];
+        heap[best] = tmp;
+        i = best;
+    }
+}
+
+/**
+ * Select the k largest values * scale with a bounded min-heap
+ * 
+ * Single pass over the input: O(n log k). heap[] must hold k entries.
+ * Returns the number of selected entries (min(k, n)).
+ */
+static int heap_select_top_k(const float* values, int n, int k, float scale, IndexProb* heap) {
+    if (k > n) k = n;
+    
+    for (int i = 0; i < k; i++) {
+        heap[i].idx = i;
+        heap[i].prob = values[i] * scale;
+    }
+    for (int i = k / 2 - 1; i >= 0; i--) {
+        heap_sift_down(heap, k, i, true);
+    }
+    
+    for (int i = k; i < n; i++) {
+        float v = values[i] * scale;
+        if (v > heap[0].prob) {
+            heap[0].idx = i;
+            heap[0].prob = v;
+            heap_sift_down(heap, k, 0, true);
+        }
+    }
+    
+    return k;
+}
+
+/**
+ * Nucleus selection by partial sort (quickselect on probability mass)
+ * 
+ * Reorders items so that items[0 .. kept) is the smallest set of most
+ * likely entries whose weight reaches target. Partitions around a pivot
+ * and only recurses into the side that contains the cut, so the nucleus
+ * is found in expected O(n) without sorting it.
+ * 
+ * @return Number of entries kept
+ */
+static int nucleus_select(IndexProb* items, int n, float target, float* mass_out) {
+    int lo = 0;
+    int hi = n;
+    float mass = 0.0f;  // Weight of items[0 .. lo), already accepted
+    
+    while (lo < hi) {
+        float pivot = items[lo + (hi - lo) / 2].prob;
+        
+        // Three-way partition of [lo, hi): > pivot | == pivot | < pivot
+        int gt = lo, i = lo, lt = hi;
+        float gt_mass = 0.0f, eq_mass = 0.0f;
+        while (i < lt) {
+            IndexProb item = items[i];
+            if (item.prob > pivot) {
+                items[i] = items[gt];
+                items[gt++] = item;
+                gt_mass += item.prob;
+                i++;
+            } else if (item.prob < pivot) {
+                items[i] = items[--lt];
+                items[lt] = item;
+            } else {
+                eq_mass += item.prob;
+                i++;
+            }
+        }
+        
+        if (gt > lo && mass + gt_mass >= target) {
+            hi = gt;
+            continue;
+        }
+        
+        if (mass + gt_mass + eq_mass >= target) {
+            mass += gt_mass;
+            int end = gt;
+            while (end < lt && mass < target) {
+                mass += items[end++].prob;
+            }
+            *mass_out = mass;
+            return end;
+        }
+        
+        mass += gt_mass + eq_mass;
+        lo = lt;
+    }
+    
+    *mass_out = mass;
+    return lo > 0 ? lo : n;
+}
+
+// Draw from weighted candidates given r in [0, total)
+static uint32_t sample_weighted(const IndexProb* items, int n, float r) {
+    float cumsum = 0.0f;
+    for (int i = 0; i < n; i++) {
+        cumsum += items[i].prob;
+        if (r < cumsum) return (uint32_t)items[i].idx;
+    }
+    return n > 0 ? (uint32_t)items[n - 1].idx : 0;
+}
+
+/**
+ * Fused sampling engine
+ * 
+ * Temperature scaling is folded into the max/exp passes (a single online
+ * softmax pass when neither top-k nor top-p applies). Top-k uses a bounded
+ * heap, the nucleus is built by quickselect on probability mass, and
+ * randomness comes from the per-inference RNG. logits are not modified.
+ */
+static uint32_t sample_engine(CLLMInference* inf, const float* logits, int top_k, float top_p) {
+    int vocab_size = (int)inf->model->vocab_size;
+    IndexProb* buf = inf->sample_buf;
+    if (vocab_size <= 0 || !buf) return 0;
+    
+    float temperature = inf->temperature;
+    if (temperature < TEMPERATURE_MIN) temperature = TEMPERATURE_MIN;
+    if (temperature > TEMPERATURE_MAX) temperature = TEMPERATURE_MAX;
+    float inv_temp = 1.0f / temperature;
+    
+    int count;
+    float max_logit;
+    float sum = 0.0f;
+    bool nucleus = top_p > 0.0f && top_p < 1.0f;
+    
+    if (top_k > 0 && top_k < vocab_size) {
+        // Bounded heap over scaled logits, then exp only the k survivors
+        count = heap_select_top_k(logits, vocab_size, top_k, inv_temp, buf);
+        max_logit = buf[0].prob;
+        for (int i = 1; i < count; i++) {
+            if (buf[i].prob > max_logit) max_logit = buf[i].prob;
+        }
+        for (int i = 0; i < count; i++) {
+            buf[i].prob = prime_expf(buf[i].prob - max_logit);
+            sum += buf[i].prob;
+        }
+    } else if (nucleus) {
+        // Scale and find max in one pass, then exp in place
+        count = vocab_size;
+        max_logit = logits[0] * inv_temp;
+        for (int i = 0; i < count; i++) {
+            buf[i].idx = i;
+            buf[i].prob = logits[i] * inv_temp;
+            if (buf[i].prob > max_logit) max_logit = buf[i].prob;
+        }
+        for (int i = 0; i < count; i++) {
+            buf[i].prob = prime_expf(buf[i].prob - max_logit);
+            sum += buf[i].prob;
+        }
+    } else {
+        // One pass: scale, track max and accumulate a rescaled exp sum
+        max_logit = logits[0] * inv_temp;
+        for (int i = 0; i < vocab_size; i++) {
+            float v = logits[i] * inv_temp;
+            buf[i].prob = v;
+            if (v > max_logit) {
+                sum = sum * prime_expf(max_logit - v) + 1.0f;
+                max_logit = v;
+            } else {
+                sum += prime_expf(v - max_logit);
+            }
+        }
+        
+        // Lazy walk: exp computed only until the draw is reached
+        float r = rng_uniform(&inf->rng_state) * sum;
+        float cumsum = 0.0f;
+        for (int i = 0; i < vocab_size; i++) {
+            cumsum += prime_expf(buf[i].prob - max_logit);
+            if (r < cumsum) return (uint32_t)i;
+        }
+        return (uint32_t)(vocab_size - 1);
+    }
+    
+    // Nucleus: only the partition containing the cut is examined
+    if (nucleus) {
+        count = nucleus_select(buf, count, top_p * sum, &sum);
+    }
+    
+    return sample_weighted(buf, count, rng_uniform(&inf->rng_state) * sum);
+}
+
+/**
+ * Sample the next token from raw logits
+ * 
+ * Applies the inference context's temperature, top_k and top_p in a single
+ * fused pass (see sample_engine) using the per-inference RNG.
+ */
+uint32_t cllm_sample_logits(CLLMInference* inference, const float* logits) {
+    if (!inference || !logits) return 0;
+    return sample_engine(inference, logits, inference->top_k, inference->top_p);
+}
+
+// Seed the per-inference RNG for reproducible sampling
+void cllm_set_seed(CLLMInference* inference, uint64_t seed) {
+    if (inference) inference->rng_state = seed;
+}
+
+// Sample top-k from a probability distribution
 uint32_t cllm_sample_top_k(float* probs, int vocab_size, int k) {
+    if (!probs || vocab_size <= 0) return 0;
     if (k <= 0 || k > vocab_size) k = vocab_size;
     
-    // Simple sampling from top-k
-    float r = (float)rand() / RAND_MAX;
-    float cumsum = 0.0f;
+    IndexProb* heap = (IndexProb*)malloc((size_t)k * sizeof(IndexProb));
+    if (!heap) return 0;
     
-    for (int i = 0; i < k && i < vocab_size; i++) {
-        cumsum += probs[i];
-        if (r < cumsum) return i;
+    int count = heap_select_top_k(probs, vocab_size, k, 1.0f, heap);
+    float total = 0.0f;
+    for (int i = 0; i < count; i++) {
+        total += heap[i].prob;
     }
     
-    return 0;
+    float r = (float)rand() / ((float)RAND_MAX + 1.0f) * total;
+    uint32_t token = sample_weighted(heap, count, r);
+    
+    free(heap);
+    return token;
 }
 
-// Sample top-p (nucleus sampling)
+// Sample top-p (nucleus sampling) from a probability distribution
 uint32_t cllm_sample_top_p(float* probs, int vocab_size, float p) {
-    float r = (float)rand() / RAND_MAX;
-    float cumsum = 0.0f;
+    if (!probs || vocab_size <= 0) return 0;
     
+    IndexProb* items = (IndexProb*)malloc((size_t)vocab_size * sizeof(IndexProb));
+    if (!items) return 0;
+    
+    float total = 0.0f;
     for (int i = 0; i < vocab_size; i++) {
-        cumsum += probs[i];
-        if (cumsum >= p || r < cumsum) return i;
+        items[i].idx = i;
+        items[i].prob = probs[i];
+        total += probs[i];
     }
+    if (p <= 0.0f || p > 1.0f) p = 1.0f;
     
-    return 0;
+    float mass;
+    int kept = nucleus_select(items, vocab_size, p * total, &mass);
+    float r = (float)rand() / ((float)RAND_MAX + 1.0f) * mass;
+    uint32_t token = sample_weighted(items, kept, r);
+    
+    free(items);
+    return token;
 }
 
 // Generate text - MAIN FUNCTION
@@ -431,44 +836,60 @@ int cllm_generate(CLLMInference* inference, const char* prompt, char* output, in
     
     // Silent generation - no terminal spam
     
+    // Room for the prompt plus every generated token
+    int max_tokens = inference->max_tokens > 0 ? inference->max_tokens : 0;
+    uint32_t* tokens = (uint32_t*)malloc((size_t)(MAX_SEQUENCE_LENGTH + max_tokens) * sizeof(uint32_t));
+    if (!tokens) {
+        strcpy(output, "Error: Out of memory");
+        return -1;
+    }
+    
     // Tokenize prompt
-    uint32_t tokens[MAX_SEQUENCE_LENGTH];
     int num_tokens = cllm_tokenize(inference, prompt, tokens, MAX_SEQUENCE_LENGTH);
     
     if (num_tokens <= 0) {
         strcpy(output, "Error: Could not tokenize prompt");
+        free(tokens);
         return -1;
     }
     
-    // Generate tokens
+    // Prefill the KV cache with the prompt (logits for the last prompt token)
+    if (cllm_prefill(inference, tokens, num_tokens) != 0) {
+        strcpy(output, "Error: Forward pass failed");
+        free(tokens);
+        return -1;
+    }
+    
+    // Generate tokens: each step only processes the newest token
     int tokens_generated = 0;
-    while (tokens_generated < inference->max_tokens && num_tokens < MAX_SEQUENCE_LENGTH) {
-        // Forward pass
-        cllm_forward(inference, tokens, num_tokens);
-        
-        // Apply temperature
-        cllm_apply_temperature(inference->logits, inference->model->vocab_size, inference->temperature);
-        
-        // Softmax
-        cllm_softmax(inference->logits, inference->model->vocab_size);
-        
-        // Sample next token
-        uint32_t next_token;
-        if (inference->top_k > 0) {
-            next_token = cllm_sample_top_k(inference->logits, inference->model->vocab_size, inference->top_k);
-        } else {
-            next_token = cllm_sample_top_p(inference->logits, inference->model->vocab_size, inference->top_p);
-        }
+    while (tokens_generated < max_tokens) {
+        // Sample next token (temperature, top-k and top-p in one fused pass)
+        uint32_t next_token = cllm_sample_logits(inference, inference->logits);
         
         // Add to sequence
         tokens[num_tokens++] = next_token;
         tokens_generated++;
+        if (tokens_generated == max_tokens) break;
         
-        // Silent generation - no terminal spam
+        // Incremental forward pass for the next step. A full cache slides
+        // its window: the most recent half of the sequence is re-prefilled
+        // and decoding continues from there.
+        int rc;
+        if (inference->kv_cache_used < inference->kv_cache_size) {
+            rc = cllm_forward_cached(inference, next_token, true);
+        } else {
+            int keep = inference->kv_cache_size > 1 ? inference->kv_cache_size / 2 : 1;
+            rc = cllm_prefill(inference, &tokens[num_tokens - keep], keep);
+        }
+        if (rc != 0) {
+            fprintf(stderr, "Error: Generation stopped after %d of %d tokens\n", tokens_generated, max_tokens);
+            break;
+        }
     }
     
     // Detokenize
     cllm_detokenize(inference, tokens, num_tokens, output, max_output_length);
+    free(tokens);
     
     // Silent generation - no terminal spam
     return tokens_generated;
@@ -503,45 +924,8 @@ void cllm_set_max_tokens(CLLMInference* inference, int max_tokens) {
     }
 }
 
-// Sample token from logits distribution
+// Sample token from the full logits distribution (no top-k/top-p)
 int cllm_sample_token(CLLMInference* inf, float* logits) {
     if (!inf || !logits) return 0;
-    
-    uint32_t vocab_size = inf->model->vocab_size;
-    
-    // Apply temperature
-    if (inf->temperature != 1.0f) {
-        for (uint32_t i = 0; i < vocab_size; i++) {
-            logits[i] /= inf->temperature;
-        }
-    }
-    
-    // Convert logits to probabilities using softmax
-    float max_logit = logits[0];
-    for (uint32_t i = 1; i < vocab_size; i++) {
-        if (logits[i] > max_logit) max_logit = logits[i];
-    }
-    
-    float sum = 0.0f;
-    for (uint32_t i = 0; i < vocab_size; i++) {
-        logits[i] = prime_expf(logits[i] - max_logit);
-        sum += logits[i];
-    }
-    
-    for (uint32_t i = 0; i < vocab_size; i++) {
-        logits[i] /= sum;
-    }
-    
-    // Sample from distribution
-    float r = (float)rand() / RAND_MAX;
-    float cumsum = 0.0f;
-    
-    for (uint32_t i = 0; i < vocab_size; i++) {
-        cumsum += logits[i];
-        if (r < cumsum) {
-            return i;
-        }
-    }
-    
-    return 0;
-}
\ No newline at end of file
+    return (int)sample_engine(inf, logits, 0, 1.0f);
+}
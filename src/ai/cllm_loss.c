@@ -9,6 +9,7 @@
 #include "../include/cllm.h"
 #include "../include/cllm_training.h"
 #include "../include/prime_float_math.h"
+#include "../include/cllm_gemm.h"
 
 /**
  * Compute softmax in-place
@@ -124,6 +125,153 @@ float cllm_compute_batch_loss(float* logits, uint32_t* targets,
     return total_loss / (float)batch_size;
 }
 
+// Logit tile size for the fused kernel (rows x vocabulary chunk)
+#define FUSED_TILE_FLOATS (128 * 1024)
+#define FUSED_MIN_CHUNK 64
+
+/**
+ * Vocabulary chunk so that a [num_rows x chunk] logit tile stays near
+ * FUSED_TILE_FLOATS
+ */
+static int fused_chunk_size(int num_rows, int vocab_size) {
+    int chunk = FUSED_TILE_FLOATS / num_rows;
+    chunk -= chunk % 16;
+    if (chunk < FUSED_MIN_CHUNK) chunk = FUSED_MIN_CHUNK;
+    if (chunk > vocab_size) chunk = vocab_size;
+    return chunk;
+}
+
+/**
+ * Fused vocabulary projection and cross-entropy
+ * 
+ * Logits for one vocabulary chunk at a time are computed with cllm_gemm
+ * into a small tile. The first pass keeps a running max and sum of
+ * exponentials per row (online log-sum-exp) and picks up the target
+ * logit; the second pass recomputes each chunk, turns it into
+ * (softmax - one_hot) * grad_scale and multiplies it straight into the
+ * hidden-state and embedding gradients. The [rows x vocab_size] logits
+ * and their gradient are never stored.
+ * 
+ * @param hidden Final hidden states [num_rows x embed_dim]
+ * @param embeddings Output embedding matrix [vocab_size x embed_dim]
+ * @param targets Target token IDs [num_rows] (IDs >= vocab_size are skipped)
+ * @param num_rows Number of positions
+ * @param embed_dim Embedding dimension
+ * @param vocab_size Vocabulary size
+ * @param grad_scale Scale applied to the logit gradient
+ * @param grad_hidden Output: hidden-state gradients [num_rows x embed_dim] (can be NULL)
+ * @param grad_embeddings Embedding gradients, accumulated [vocab_size x embed_dim] (can be NULL)
+ * @return Average loss over positions with a valid target
+ */
+float cllm_fused_cross_entropy(const float* hidden, const float* embeddings,
+                               const uint32_t* targets, int num_rows, int embed_dim,
+                               int vocab_size, float grad_scale,
+                               float* grad_hidden, float* grad_embeddings) {
+    if (!hidden || !embeddings || !targets || num_rows <= 0 || embed_dim <= 0 || vocab_size <= 0) {
+        return 0.0f;
+    }
+    
+    int chunk = fused_chunk_size(num_rows, vocab_size);
+    float* tile = (float*)malloc((size_t)num_rows * chunk * sizeof(float));
+    float* row_max = (float*)malloc(num_rows * sizeof(float));
+    float* row_sum = (float*)malloc(num_rows * sizeof(float));
+    float* target_logit = (float*)calloc(num_rows, sizeof(float));
+    if (!tile || !row_max || !row_sum || !target_logit) {
+        free(tile);
+        free(row_max);
+        free(row_sum);
+        free(target_logit);
+        return 0.0f;
+    }
+    
+    for (int r = 0; r < num_rows; r++) {
+        row_max[r] = -1e30f;
+        row_sum[r] = 0.0f;
+    }
+    
+    // Pass 1: running max and sum of exponentials per row
+    for (int v0 = 0; v0 < vocab_size; v0 += chunk) {
+        int n = vocab_size - v0 < chunk ? vocab_size - v0 : chunk;
+        cllm_gemm(false, true, num_rows, n, embed_dim, 1.0f, hidden, embed_dim,
+                  &embeddings[(size_t)v0 * embed_dim], embed_dim, 0.0f, tile, n);
+        
+        for (int r = 0; r < num_rows; r++) {
+            const float* logits = &tile[(size_t)r * n];
+            float max_logit = row_max[r];
+            for (int v = 0; v < n; v++) {
+                if (logits[v] > max_logit) max_logit = logits[v];
+            }
+            
+            // Rescale the sum so far to the new max
+            float sum = row_sum[r] > 0.0f ? row_sum[r] * prime_expf(row_max[r] - max_logit) : 0.0f;
+            for (int v = 0; v < n; v++) {
+                sum += prime_expf(logits[v] - max_logit);
+            }
+            row_max[r] = max_logit;
+            row_sum[r] = sum;
+            
+            uint32_t target = targets[r];
+            if (target >= (uint32_t)v0 && target < (uint32_t)(v0 + n)) {
+                target_logit[r] = logits[target - v0];
+            }
+        }
+    }
+    
+    // Loss = log(sum exp) - target logit; row_max becomes log(sum exp)
+    float total_loss = 0.0f;
+    int counted = 0;
+    for (int r = 0; r < num_rows; r++) {
+        row_max[r] += prime_logf(row_sum[r]);
+        if (targets[r] < (uint32_t)vocab_size) {
+            total_loss += row_max[r] - target_logit[r];
+            counted++;
+        }
+    }
+    
+    // Pass 2: recompute each chunk and apply its gradient
+    if (grad_hidden || grad_embeddings) {
+        for (int v0 = 0; v0 < vocab_size; v0 += chunk) {
+            int n = vocab_size - v0 < chunk ? vocab_size - v0 : chunk;
+            const float* embed_chunk = &embeddings[(size_t)v0 * embed_dim];
+            cllm_gemm(false, true, num_rows, n, embed_dim, 1.0f, hidden, embed_dim,
+                      embed_chunk, embed_dim, 0.0f, tile, n);
+            
+            for (int r = 0; r < num_rows; r++) {
+                float* grad = &tile[(size_t)r * n];
+                uint32_t target = targets[r];
+                if (target >= (uint32_t)vocab_size) {
+                    memset(grad, 0, n * sizeof(float));
+                    continue;
+                }
+                
+                // grad = (softmax - one_hot) * grad_scale
+                for (int v = 0; v < n; v++) {
+                    grad[v] = prime_expf(grad[v] - row_max[r]) * grad_scale;
+                }
+                if (target >= (uint32_t)v0 && target < (uint32_t)(v0 + n)) {
+                    grad[target - v0] -= grad_scale;
+                }
+            }
+            
+            if (grad_hidden) {
+                cllm_gemm(false, false, num_rows, embed_dim, n, 1.0f, tile, n, embed_chunk, embed_dim,
+                          v0 == 0 ? 0.0f : 1.0f, grad_hidden, embed_dim);
+            }
+            if (grad_embeddings) {
+                cllm_gemm(true, false, n, embed_dim, num_rows, 1.0f, tile, n, hidden, embed_dim,
+                          1.0f, &grad_embeddings[(size_t)v0 * embed_dim], embed_dim);
+            }
+        }
+    }
+    
+    free(tile);
+    free(row_max);
+    free(row_sum);
+    free(target_logit);
+    
+    return counted > 0 ? total_loss / (float)counted : 0.0f;
+}
+
 /**
  * Compute perplexity from loss
  * 
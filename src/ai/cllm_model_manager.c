@@ -574,6 +574,13 @@ CLLMModel* model_manager_acquire_write(const char* name) {
     // Acquire write lock
     pthread_rwlock_wrlock(&managed->lock);
     
+    // Mapped weights are read-only; writers get a private copy
+    if (cllm_model_make_writable(managed->model) != 0) {
+        fprintf(stderr, "Failed to make model '%s' writable\n", name);
+        pthread_rwlock_unlock(&managed->lock);
+        return NULL;
+    }
+    
     // Set training flag
     pthread_mutex_lock(&g_model_manager.manager_lock);
     managed->is_training = true;
@@ -734,8 +741,9 @@ static CLLMModel* cllm_load_model_internal(const char* path) {
         return NULL;
     }
     
-    // Use proper cllm_read_model function
-    CLLMModel* model = cllm_read_model(path);
+    // Weights are mapped read-only and shared with other processes serving
+    // the same file; model_manager_acquire_write() copies them on demand
+    CLLMModel* model = cllm_read_model_mapped(path);
     if (!model) {
         fprintf(stderr, "Failed to load model from: %s\n", path);
         return NULL;
@@ -18,6 +18,7 @@
 #include <string.h>
 #include <ctype.h>
 #include <stdio.h>
+#include <stdint.h>
 
 // Special token IDs
 #define TOKEN_PAD 0
@@ -31,34 +32,160 @@
  */
 // CLLMTokenizer definition moved to header to resolve forward declaration issues
 
+#define TOKENIZER_EMPTY_SLOT 0
+#define TOKENIZER_NOT_FOUND UINT32_MAX
+
+/**
+ * Whitespace delimiters (same set the tokenizer has always split on)
+ */
+static inline int is_token_delim(char c) {
+    return c == ' ' || c == '\t' || c == '\n' || c == '\r';
+}
+
+/**
+ * FNV-1a hash of a token string
+ */
+static inline uint32_t token_hash(const char* str, size_t len) {
+    uint32_t hash = 2166136261u;
+    for (size_t i = 0; i < len; i++) {
+        hash ^= (unsigned char)str[i];
+        hash *= 16777619u;
+    }
+    return hash;
+}
+
+/**
+ * Look up token in hash index
+ * 
+ * Returns token ID, or TOKENIZER_NOT_FOUND
+ */
+static uint32_t tokenizer_lookup(CLLMTokenizer* tokenizer, const char* str, 
+                                 size_t len, uint32_t hash) {
+    uint32_t mask = tokenizer->hash_capacity - 1;
+    uint32_t slot = hash & mask;
+    
+    while (tokenizer->hash_index[slot] != TOKENIZER_EMPTY_SLOT) {
+        uint32_t id = tokenizer->hash_index[slot] - 1;
+        if (tokenizer->token_hashes[id] == hash &&
+            memcmp(tokenizer->vocab[id], str, len) == 0 &&
+            tokenizer->vocab[id][len] == '\0') {
+            return id;
+        }
+        slot = (slot + 1) & mask;
+    }
+    
+    return TOKENIZER_NOT_FOUND;
+}
+
+/**
+ * Append new token to arena and hash index
+ * 
+ * Caller must have checked that the token is not already present.
+ * Returns new token ID, or TOKEN_UNK if the vocabulary is full.
+ */
+static uint32_t tokenizer_insert(CLLMTokenizer* tokenizer, const char* str, 
+                                 size_t len, uint32_t hash) {
+    if (tokenizer->vocab_size >= tokenizer->max_vocab_size) {
+        return TOKEN_UNK;
+    }
+    
+    // Grow arena, rebasing existing vocab pointers if it moves
+    if (tokenizer->arena_used + len + 1 > tokenizer->arena_capacity) {
+        size_t new_capacity = tokenizer->arena_capacity * 2;
+        while (tokenizer->arena_used + len + 1 > new_capacity) {
+            new_capacity *= 2;
+        }
+        
+        char* new_arena = (char*)realloc(tokenizer->string_arena, new_capacity);
+        if (!new_arena) return TOKEN_UNK;
+        
+        // Tokens are stored back to back, so walk the arena to rebase
+        char* cursor = new_arena;
+        for (uint32_t i = 0; i < tokenizer->vocab_size; i++) {
+            tokenizer->vocab[i] = cursor;
+            cursor += strlen(cursor) + 1;
+        }
+        tokenizer->string_arena = new_arena;
+        tokenizer->arena_capacity = new_capacity;
+    }
+    
+    char* dst = tokenizer->string_arena + tokenizer->arena_used;
+    memcpy(dst, str, len);
+    dst[len] = '\0';
+    tokenizer->arena_used += len + 1;
+    
+    uint32_t id = tokenizer->vocab_size++;
+    tokenizer->vocab[id] = dst;
+    tokenizer->token_hashes[id] = hash;
+    tokenizer->token_counts[id] = 1;
+    
+    // Load factor stays <= 0.5 because hash_capacity >= 2 * max_vocab_size
+    uint32_t mask = tokenizer->hash_capacity - 1;
+    uint32_t slot = hash & mask;
+    while (tokenizer->hash_index[slot] != TOKENIZER_EMPTY_SLOT) {
+        slot = (slot + 1) & mask;
+    }
+    tokenizer->hash_index[slot] = id + 1;
+    
+    return id;
+}
+
+/**
+ * Find or add token, incrementing its count
+ */
+static uint32_t tokenizer_add(CLLMTokenizer* tokenizer, const char* str, size_t len) {
+    uint32_t hash = token_hash(str, len);
+    uint32_t existing = tokenizer_lookup(tokenizer, str, len, hash);
+    if (existing != TOKENIZER_NOT_FOUND) {
+        tokenizer->token_counts[existing]++;
+        return existing;
+    }
+    return tokenizer_insert(tokenizer, str, len, hash);
+}
+
 /**
  * Create Tokenizer
  * 
  * Initializes a new tokenizer with special tokens
  */
 CLLMTokenizer* cllm_create_tokenizer(uint32_t max_vocab_size) {
-    CLLMTokenizer* tokenizer = (CLLMTokenizer*)malloc(sizeof(CLLMTokenizer));
+    CLLMTokenizer* tokenizer = (CLLMTokenizer*)calloc(1, sizeof(CLLMTokenizer));
     if (!tokenizer) return NULL;
     
+    if (max_vocab_size < 5) max_vocab_size = 5;  // Room for special tokens
     tokenizer->max_vocab_size = max_vocab_size;
     tokenizer->vocab_size = 0;
     
     // Allocate vocabulary
     tokenizer->vocab = (char**)calloc(max_vocab_size, sizeof(char*));
     tokenizer->token_counts = (uint32_t*)calloc(max_vocab_size, sizeof(uint32_t));
+    tokenizer->token_hashes = (uint32_t*)calloc(max_vocab_size, sizeof(uint32_t));
+    
+    // Hash index sized for a load factor of at most 0.5
+    tokenizer->hash_capacity = 16;
+    while (tokenizer->hash_capacity < 2 * (uint64_t)max_vocab_size) {
+        tokenizer->hash_capacity *= 2;
+    }
+    tokenizer->hash_index = (uint32_t*)calloc(tokenizer->hash_capacity, sizeof(uint32_t));
     
-    if (!tokenizer->vocab || !tokenizer->token_counts) {
+    // Average token is short; the arena doubles as needed
+    tokenizer->arena_capacity = (size_t)max_vocab_size * 8;
+    if (tokenizer->arena_capacity < 4096) tokenizer->arena_capacity = 4096;
+    tokenizer->string_arena = (char*)malloc(tokenizer->arena_capacity);
+    
+    if (!tokenizer->vocab || !tokenizer->token_counts || !tokenizer->token_hashes ||
+        !tokenizer->hash_index || !tokenizer->string_arena) {
         cllm_free_tokenizer(tokenizer);
         return NULL;
     }
     
-    // Add special tokens
-    tokenizer->vocab[TOKEN_PAD] = strdup("<PAD>");
-    tokenizer->vocab[TOKEN_UNK] = strdup("<UNK>");
-    tokenizer->vocab[TOKEN_BOS] = strdup("<BOS>");
-    tokenizer->vocab[TOKEN_EOS] = strdup("<EOS>");
-    tokenizer->vocab[TOKEN_MASK] = strdup("<MASK>");
-    tokenizer->vocab_size = 5;
+    // Add special tokens (IDs TOKEN_PAD..TOKEN_MASK)
+    const char* special[] = {"<PAD>", "<UNK>", "<BOS>", "<EOS>", "<MASK>"};
+    for (int i = 0; i < 5; i++) {
+        tokenizer_insert(tokenizer, special[i], strlen(special[i]), 
+                         token_hash(special[i], strlen(special[i])));
+        tokenizer->token_counts[i] = 0;
+    }
     
     return tokenizer;
 }
@@ -69,18 +196,12 @@ CLLMTokenizer* cllm_create_tokenizer(uint32_t max_vocab_size) {
 void cllm_free_tokenizer(CLLMTokenizer* tokenizer) {
     if (!tokenizer) return;
     
-    if (tokenizer->vocab) {
-        for (uint32_t i = 0; i < tokenizer->vocab_size; i++) {
-            if (tokenizer->vocab[i]) {
-                free(tokenizer->vocab[i]);
-            }
-        }
-        free(tokenizer->vocab);
-    }
-    
-    if (tokenizer->token_counts) {
-        free(tokenizer->token_counts);
-    }
+    // Token strings are owned by the arena
+    free(tokenizer->vocab);
+    free(tokenizer->string_arena);
+    free(tokenizer->token_counts);
+    free(tokenizer->token_hashes);
+    free(tokenizer->hash_index);
     
     free(tokenizer);
 }
@@ -93,13 +214,10 @@ void cllm_free_tokenizer(CLLMTokenizer* tokenizer) {
 uint32_t cllm_find_token(CLLMTokenizer* tokenizer, const char* token) {
     if (!tokenizer || !token) return TOKEN_UNK;
     
-    for (uint32_t i = 0; i < tokenizer->vocab_size; i++) {
-        if (tokenizer->vocab[i] && strcmp(tokenizer->vocab[i], token) == 0) {
-            return i;
-        }
-    }
+    size_t len = strlen(token);
+    uint32_t id = tokenizer_lookup(tokenizer, token, len, token_hash(token, len));
     
-    return TOKEN_UNK;
+    return id != TOKENIZER_NOT_FOUND ? id : TOKEN_UNK;
 }
 
 /**
@@ -110,23 +228,7 @@ uint32_t cllm_find_token(CLLMTokenizer* tokenizer, const char* token) {
 uint32_t cllm_add_token(CLLMTokenizer* tokenizer, const char* token) {
     if (!tokenizer || !token) return TOKEN_UNK;
     
-    // Check if token already exists
-    uint32_t existing = cllm_find_token(tokenizer, token);
-    if (existing != TOKEN_UNK) {
-        tokenizer->token_counts[existing]++;
-        return existing;
-    }
-    
-    // Check if vocabulary is full
-    if (tokenizer->vocab_size >= tokenizer->max_vocab_size) {
-        return TOKEN_UNK;
-    }
-    
-    // Add new token
-    tokenizer->vocab[tokenizer->vocab_size] = strdup(token);
-    tokenizer->token_counts[tokenizer->vocab_size] = 1;
-    
-    return tokenizer->vocab_size++;
+    return tokenizer_add(tokenizer, token, strlen(token));
 }
 
 /**
@@ -153,31 +255,42 @@ uint32_t* cllm_tokenizer_encode(CLLMTokenizer* tokenizer, const char* text, uint
         return NULL;
     }
     
-    // Tokenize
-    char* text_copy = strdup(text);
-    if (!text_copy) {
+    // Lowercase into a word buffer and look up each word in place
+    size_t word_capacity = 256;
+    char* word = (char*)malloc(word_capacity);
+    if (!word) {
         free(tokens);
         *num_tokens = 0;
         return NULL;
     }
     
     uint32_t count = 0;
-    char* token = strtok(text_copy, " \t\n\r");
+    const char* p = text;
     
-    while (token && count < max_tokens) {
-        // Convert to lowercase
-        for (char* p = token; *p; p++) {
-            *p = tolower(*p);
+    while (*p && count < max_tokens) {
+        while (*p && is_token_delim(*p)) p++;
+        if (!*p) break;
+        
+        const char* start = p;
+        while (*p && !is_token_delim(*p)) p++;
+        size_t len = (size_t)(p - start);
+        
+        if (len + 1 > word_capacity) {
+            while (len + 1 > word_capacity) word_capacity *= 2;
+            char* new_word = (char*)realloc(word, word_capacity);
+            if (!new_word) break;
+            word = new_word;
         }
         
-        // Find or add token
-        uint32_t token_id = cllm_find_token(tokenizer, token);
-        tokens[count++] = token_id;
+        for (size_t i = 0; i < len; i++) {
+            word[i] = tolower((unsigned char)start[i]);
+        }
         
-        token = strtok(NULL, " \t\n\r");
+        uint32_t token_id = tokenizer_lookup(tokenizer, word, len, token_hash(word, len));
+        tokens[count++] = token_id != TOKENIZER_NOT_FOUND ? token_id : TOKEN_UNK;
     }
     
-    free(text_copy);
+    free(word);
     *num_tokens = count;
     
     return tokens;
@@ -253,18 +366,21 @@ void cllm_build_vocab(CLLMTokenizer* tokenizer, const char* text) {
     char* text_copy = strdup(text);
     if (!text_copy) return;
     
-    char* token = strtok(text_copy, " \t\n\r");
+    char* p = text_copy;
     
-    while (token) {
-        // Convert to lowercase
-        for (char* p = token; *p; p++) {
-            *p = tolower(*p);
+    while (*p) {
+        while (*p && is_token_delim(*p)) p++;
+        if (!*p) break;
+        
+        // Convert to lowercase while finding the end of the word
+        char* start = p;
+        while (*p && !is_token_delim(*p)) {
+            *p = tolower((unsigned char)*p);
+            p++;
         }
         
         // Add to vocabulary
-        cllm_add_token(tokenizer, token);
-        
-        token = strtok(NULL, " \t\n\r");
+        tokenizer_add(tokenizer, start, (size_t)(p - start));
     }
     
     free(text_copy);
@@ -23,6 +23,7 @@
 #include "../include/cllm_inference.h"
 #include "../include/prime_float_math.h"
 #include "../include/cllm_simd_utils.h"
+#include "../include/cllm_gemm.h"
 #include "../include/ai/cllm_cymatic_training.h"
 // #include "../include/cllm_crystalline_training.h"  // CONSOLIDATED: Functions moved here
 
@@ -205,6 +206,13 @@ void crystalline_sort_by_locality(uint32_t* tokens, int num_tokens) {
 CLLMTraining* cllm_training_init(CLLMModel* model, CLLMTrainingConfig* config) {
     if (!model || !config) return NULL;
     
+    // Models loaded through the model manager map their weights read-only;
+    // the optimizer needs a private copy to write to
+    if (cllm_model_make_writable(model) != 0) {
+        fprintf(stderr, "Failed to make model weights writable for training\n");
+        return NULL;
+    }
+    
     CLLMTraining* training = (CLLMTraining*)calloc(1, sizeof(CLLMTraining));
     if (!training) return NULL;
     
@@ -328,11 +336,9 @@ CLLMTraining* cllm_training_init(CLLMModel* model, CLLMTrainingConfig* config) {
     
     // Allocate forward pass activation storage
     size_t seq_size = config->batch_size * config->sequence_length * model->embedding_dim;
-    size_t logits_size = config->batch_size * config->sequence_length * model->vocab_size;
     
     training->input_embeddings = (float*)calloc(seq_size, sizeof(float));
     training->final_hidden = (float*)calloc(seq_size, sizeof(float));
-    training->logits = (float*)calloc(logits_size, sizeof(float));
     
     training->layer_inputs = (float**)calloc(num_layers, sizeof(float*));
     training->attention_outputs = (float**)calloc(num_layers, sizeof(float*));
@@ -357,38 +363,45 @@ CLLMTraining* cllm_training_init(CLLMModel* model, CLLMTrainingConfig* config) {
         return NULL;
     }
     
-    // Allocate attention cache for full backward pass (OPTIMIZATION)
-    training->attention_cache = (typeof(training->attention_cache))calloc(num_layers, sizeof(*training->attention_cache));
+    // Allocate attention cache for full backward pass (tiled kernel only;
+    // O(seq_len) per head, the weights are recomputed in backward)
+    bool tiled = config->attention_kernel == CLLM_ATTENTION_TILED;
+    training->attention_cache = tiled ?
+        (typeof(training->attention_cache))calloc(num_layers, sizeof(*training->attention_cache)) : NULL;
     training->cached_seq_len = config->sequence_length;
-    training->store_attention_weights = 0;  // Disable expensive attention caching during training (PERFORMANCE FIX)
+    training->store_attention_weights = tiled;
+    
+    if (tiled && !training->attention_cache) {
+        fprintf(stderr, "Failed to allocate attention cache\n");
+        cllm_training_cleanup(training);
+        return NULL;
+    }
     
     if (training->attention_cache && model->attention_layers) {
-        int max_seq_len = config->sequence_length;
+        size_t rows = (size_t)config->batch_size * config->sequence_length;
         uint32_t embed_dim = model->embedding_dim;
         size_t total_attention_cache_size = 0;
         
         for (uint32_t i = 0; i < num_layers; i++) {
             uint32_t layer_num_heads = model->attention_layers[i].num_heads;
             
-            training->attention_cache[i].queries = (float*)calloc(max_seq_len * embed_dim, sizeof(float));
-            training->attention_cache[i].keys = (float*)calloc(max_seq_len * embed_dim, sizeof(float));
-            training->attention_cache[i].values = (float*)calloc(max_seq_len * embed_dim, sizeof(float));
-            training->attention_cache[i].attention_weights = 
-                (float*)calloc(layer_num_heads * max_seq_len * max_seq_len, sizeof(float));
-            training->attention_cache[i].scores = 
-                (float*)calloc(layer_num_heads * max_seq_len * max_seq_len, sizeof(float));
+            training->attention_cache[i].queries = (float*)calloc(rows * embed_dim, sizeof(float));
+            training->attention_cache[i].keys = (float*)calloc(rows * embed_dim, sizeof(float));
+            training->attention_cache[i].values = (float*)calloc(rows * embed_dim, sizeof(float));
+            training->attention_cache[i].outputs = (float*)calloc(rows * embed_dim, sizeof(float));
+            training->attention_cache[i].lse = (float*)calloc(rows * layer_num_heads, sizeof(float));
             
             if (!training->attention_cache[i].queries || !training->attention_cache[i].keys ||
-                !training->attention_cache[i].values || !training->attention_cache[i].attention_weights ||
-                !training->attention_cache[i].scores) {
+                !training->attention_cache[i].values || !training->attention_cache[i].outputs ||
+                !training->attention_cache[i].lse) {
                 fprintf(stderr, "Failed to allocate attention cache for layer %u\n", i);
                 cllm_training_cleanup(training);
                 return NULL;
             }
             
             total_attention_cache_size += (
-                3 * max_seq_len * embed_dim * sizeof(float) +  // Q, K, V
-                2 * layer_num_heads * max_seq_len * max_seq_len * sizeof(float)  // weights, scores
+                4 * rows * embed_dim * sizeof(float) +  // Q, K, V, output
+                rows * layer_num_heads * sizeof(float)  // log-sum-exp
             );
         }
         
@@ -675,7 +688,11 @@ void cllm_optimizer_step(CLLMTraining* training) {
 
 /**
  * Training-specific attention forward with cache storage
- * Wraps cllm_attention_forward and stores Q, K, V, attention weights for backward pass
+ * 
+ * With the tiled kernel, Q, K, V, the attention output and each row's
+ * softmax log-sum-exp go to the cache for the backward pass (O(seq_len)
+ * per head; the weights are recomputed there), and the cached output is
+ * the layer output. The hybrid kernel caches nothing.
  */
 static void cllm_attention_forward_training(
     CLLMTraining* training,
@@ -684,169 +701,57 @@ static void cllm_attention_forward_training(
     float* input,
     float* output,
     uint32_t* token_ids,
+    int batch_index,
     int seq_len
 ) {
     if (!training || !attn_layer || !input || !output || layer < 0 || seq_len <= 0) return;
     if (layer >= (int)training->model->num_layers) return;
     
-    // Use hybrid attention (angular when token IDs available, dot product otherwise)
-    cllm_attention_forward_hybrid(training->model, attn_layer, input, output, 
-                                  token_ids, NULL, NULL, seq_len);
-    
-    // If attention cache is enabled, store Q, K, V, and attention weights
-    if (training->store_attention_weights && training->attention_cache) {
-        uint32_t num_heads = attn_layer->num_heads;
-        uint32_t head_dim = attn_layer->head_dim;
-        uint32_t embed_dim = num_heads * head_dim;
-        
-        // Allocate temporary buffers for Q, K, V
-        float* queries = (float*)malloc(seq_len * embed_dim * sizeof(float));
-        float* keys = (float*)malloc(seq_len * embed_dim * sizeof(float));
-        float* values = (float*)malloc(seq_len * embed_dim * sizeof(float));
-        
-        if (!queries || !keys || !values) {
-            free(queries);
-            free(keys);
-            free(values);
-            return;
-        }
-        
-        // Compute Q, K, V projections (same as in cllm_attention_forward)
-        for (int pos = 0; pos < seq_len; pos++) {
-            float* input_vec = &input[pos * embed_dim];
-            
-            // Query projection
-            for (uint32_t h = 0; h < num_heads; h++) {
-                for (uint32_t d = 0; d < head_dim; d++) {
-                    float sum = 0.0f;
-                    for (uint32_t i = 0; i < head_dim; i++) {
-                        size_t weight_idx = h * head_dim * head_dim + d * head_dim + i;
-                        sum += attn_layer->query_lattice[weight_idx] * input_vec[h * head_dim + i];
-                    }
-                    queries[pos * embed_dim + h * head_dim + d] = sum;
-                }
-            }
-            
-            // Key projection
-            for (uint32_t h = 0; h < num_heads; h++) {
-                for (uint32_t d = 0; d < head_dim; d++) {
-                    float sum = 0.0f;
-                    for (uint32_t i = 0; i < head_dim; i++) {
-                        size_t weight_idx = h * head_dim * head_dim + d * head_dim + i;
-                        sum += attn_layer->key_lattice[weight_idx] * input_vec[h * head_dim + i];
-                    }
-                    keys[pos * embed_dim + h * head_dim + d] = sum;
-                }
-            }
-            
-            // Value projection
-            for (uint32_t h = 0; h < num_heads; h++) {
-                for (uint32_t d = 0; d < head_dim; d++) {
-                    float sum = 0.0f;
-                    for (uint32_t i = 0; i < head_dim; i++) {
-                        size_t weight_idx = h * head_dim * head_dim + d * head_dim + i;
-                        sum += attn_layer->value_lattice[weight_idx] * input_vec[h * head_dim + i];
-                    }
-                    values[pos * embed_dim + h * head_dim + d] = sum;
-                }
-            }
-        }
-        
-        // Compute and store attention weights
-        float scale = 1.0f / prime_sqrtf((float)head_dim);
-        
-        for (uint32_t h = 0; h < num_heads; h++) {
-            for (int i = 0; i < seq_len; i++) {
-                float* query = &queries[i * embed_dim + h * head_dim];
-                
-                // Compute attention scores
-                for (int j = 0; j < seq_len; j++) {
-                    float* key = &keys[j * embed_dim + h * head_dim];
-                    float score = 0.0f;
-                    for (uint32_t d = 0; d < head_dim; d++) {
-                        score += query[d] * key[d];
-                    }
-                    score *= scale;
-                    training->attention_cache[layer].scores[h * seq_len * seq_len + i * seq_len + j] = score;
-                }
-                
-                // Apply softmax to get attention weights
-                float* scores_row = &training->attention_cache[layer].scores[h * seq_len * seq_len + i * seq_len];
-                float* weights_row = &training->attention_cache[layer].attention_weights[h * seq_len * seq_len + i * seq_len];
-                
-                // Find max for numerical stability
-                float max_score = scores_row[0];
-                for (int j = 1; j < seq_len; j++) {
-                    if (scores_row[j] > max_score) max_score = scores_row[j];
-                }
-                
-                // Compute exp and sum
-                float sum = 0.0f;
-                for (int j = 0; j < seq_len; j++) {
-                    weights_row[j] = prime_expf(scores_row[j] - max_score);
-                    sum += weights_row[j];
-                }
-                
-                // Normalize
-                for (int j = 0; j < seq_len; j++) {
-                    weights_row[j] /= sum;
-                }
-            }
-        }
-        
-        // Store Q, K, V in cache
-        memcpy(training->attention_cache[layer].queries, queries, seq_len * embed_dim * sizeof(float));
-        memcpy(training->attention_cache[layer].keys, keys, seq_len * embed_dim * sizeof(float));
-        memcpy(training->attention_cache[layer].values, values, seq_len * embed_dim * sizeof(float));
-        
-        free(queries);
-        free(keys);
-        free(values);
-    }
-}
-
-/**
- * Softmax backward pass
- * Computes gradient w.r.t. softmax input given gradient w.r.t. softmax output
- * 
- * For y = softmax(x):
- * grad_x[i] = y[i] * (grad_y[i] - sum_j(y[j] * grad_y[j]))
- */
-static void softmax_backward(
-    float* grad_input,           // Output: gradient w.r.t. softmax input [size]
-    const float* grad_output,    // Input: gradient w.r.t. softmax output [size]
-    const float* softmax_output, // Input: softmax output from forward pass [size]
-    int size
-) {
-    if (!grad_input || !grad_output || !softmax_output || size <= 0) return;
-    
-    // Compute sum of (softmax_output * grad_output)
-    float sum = 0.0f;
-    for (int i = 0; i < size; i++) {
-        sum += softmax_output[i] * grad_output[i];
+    if (training->config.attention_kernel != CLLM_ATTENTION_TILED || !training->attention_cache) {
+        // Hybrid attention (NTT for long sequences, angular when token IDs
+        // are available, dot product otherwise)
+        cllm_attention_forward_hybrid(training->model, attn_layer, input, output, 
+                                      token_ids, NULL, NULL, seq_len);
+        return;
     }
     
-    // Compute gradient: grad_input[i] = softmax_output[i] * (grad_output[i] - sum)
-    for (int i = 0; i < size; i++) {
-        grad_input[i] = softmax_output[i] * (grad_output[i] - sum);
+    uint32_t num_heads = attn_layer->num_heads;
+    uint32_t head_dim = attn_layer->head_dim;
+    uint32_t embed_dim = num_heads * head_dim;
+    size_t offset = (size_t)batch_index * seq_len * embed_dim;
+    
+    float* queries = &training->attention_cache[layer].queries[offset];
+    float* keys = &training->attention_cache[layer].keys[offset];
+    float* values = &training->attention_cache[layer].values[offset];
+    float* outputs = &training->attention_cache[layer].outputs[offset];
+    
+    cllm_attention_project_qkv(attn_layer, input, queries, keys, values, seq_len);
+    if (cllm_attention_tiled_forward(queries, keys, values, outputs,
+                                     &training->attention_cache[layer].lse[(size_t)batch_index * num_heads * seq_len],
+                                     seq_len, num_heads, head_dim, embed_dim, false) != 0) {
+        memset(outputs, 0, (size_t)seq_len * embed_dim * sizeof(float));
     }
+    memcpy(output, outputs, (size_t)seq_len * embed_dim * sizeof(float));
 }
 
 /**
  * Full attention backward pass with proper gradient computation
- * Computes gradients through the complete attention mechanism including softmax
+ * Computes gradients through the complete attention mechanism including
+ * softmax for one sequence of the batch
  * 
- * This replaces the simplified outer product approximation with the full
- * gradient computation through scaled dot-product attention.
+ * The attention weights are recomputed tile by tile from the cached
+ * Q, K and log-sum-exp (cllm_attention_tiled_backward) instead of being
+ * stored as [num_heads x seq_len x seq_len] during the forward pass.
  */
 static void attention_backward_full(
     CLLMTraining* training,
     int layer,
+    int batch_index,
     float* grad_output,      // Gradient w.r.t. attention output [seq_len * embed_dim]
-    float* grad_input,       // Output: gradient w.r.t. attention input [seq_len * embed_dim]
+    float* grad_input,       // Output: gradient w.r.t. attention input [seq_len * embed_dim] (can be NULL)
     int seq_len
 ) {
-    if (!training || !grad_output || !grad_input || layer < 0 || seq_len <= 0) return;
+    if (!training || !grad_output || layer < 0 || seq_len <= 0) return;
     if (layer >= (int)training->model->num_layers) return;
     if (!training->attention_cache) return;
     
@@ -854,144 +759,67 @@ static void attention_backward_full(
     uint32_t num_heads = attn->num_heads;
     uint32_t head_dim = attn->head_dim;
     uint32_t embed_dim = num_heads * head_dim;
+    size_t offset = (size_t)batch_index * seq_len * embed_dim;
     
     // Get cached values from forward pass
-    float* queries = training->attention_cache[layer].queries;
-    float* keys = training->attention_cache[layer].keys;
-    float* values = training->attention_cache[layer].values;
-    float* attention_weights = training->attention_cache[layer].attention_weights;
-    
-    if (!queries || !keys || !values || !attention_weights) {
-        // Fall back to simplified version if cache not available
-        return;
-    }
+    float* queries = &training->attention_cache[layer].queries[offset];
+    float* keys = &training->attention_cache[layer].keys[offset];
+    float* values = &training->attention_cache[layer].values[offset];
+    float* outputs = &training->attention_cache[layer].outputs[offset];
+    float* lse = &training->attention_cache[layer].lse[(size_t)batch_index * num_heads * seq_len];
     
     // Allocate temporary buffers
-    float* grad_V = (float*)calloc(seq_len * embed_dim, sizeof(float));
-    float* grad_weights = (float*)calloc(num_heads * seq_len * seq_len, sizeof(float));
-    float* grad_scores = (float*)calloc(num_heads * seq_len * seq_len, sizeof(float));
-    float* grad_Q = (float*)calloc(seq_len * embed_dim, sizeof(float));
-    float* grad_K = (float*)calloc(seq_len * embed_dim, sizeof(float));
-    
-    if (!grad_V || !grad_weights || !grad_scores || !grad_Q || !grad_K) {
-        free(grad_V);
-        free(grad_weights);
-        free(grad_scores);
+    float* grad_Q = (float*)malloc(seq_len * embed_dim * sizeof(float));
+    float* grad_K = (float*)malloc(seq_len * embed_dim * sizeof(float));
+    float* grad_V = (float*)malloc(seq_len * embed_dim * sizeof(float));
+    
+    if (!grad_Q || !grad_K || !grad_V ||
+        cllm_attention_tiled_backward(queries, keys, values, outputs, grad_output, lse,
+                                      grad_Q, grad_K, grad_V, seq_len, num_heads,
+                                      head_dim, embed_dim, false) != 0) {
         free(grad_Q);
         free(grad_K);
+        free(grad_V);
         return;
     }
     
-    float scale = 1.0f / prime_sqrtf((float)head_dim);
-    
-    // For each head
+    // Gradients w.r.t. the per-head projection blocks (Q_h = X_h * W_h^T):
+    // dW_h += dQ_h^T * X_h, and dX_h = dQ_h * Wq_h + dK_h * Wk_h + dV_h * Wv_h
+    float* layer_input = &training->layer_inputs[layer][offset];
     for (uint32_t h = 0; h < num_heads; h++) {
-        // 1. Gradient w.r.t. V: grad_V = attention_weights^T × grad_output
-        for (int pos = 0; pos < seq_len; pos++) {
-            for (int d = 0; d < (int)head_dim; d++) {
-                float sum = 0.0f;
-                for (int i = 0; i < seq_len; i++) {
-                    int weight_idx = h * seq_len * seq_len + i * seq_len + pos;
-                    sum += attention_weights[weight_idx] * 
-                           grad_output[i * embed_dim + h * head_dim + d];
-                }
-                grad_V[pos * embed_dim + h * head_dim + d] = sum;
-            }
-        }
+        size_t w = (size_t)h * head_dim * head_dim;
+        size_t col = h * head_dim;
         
-        // 2. Gradient w.r.t. attention_weights: grad_weights = grad_output × V^T
-        for (int i = 0; i < seq_len; i++) {
-            for (int j = 0; j < seq_len; j++) {
-                float sum = 0.0f;
-                for (int d = 0; d < (int)head_dim; d++) {
-                    sum += grad_output[i * embed_dim + h * head_dim + d] *
-                           values[j * embed_dim + h * head_dim + d];
-                }
-                grad_weights[h * seq_len * seq_len + i * seq_len + j] = sum;
-            }
+        if (training->attention_grads[layer].query_lattice) {
+            cllm_gemm(true, false, head_dim, head_dim, seq_len, 1.0f, &grad_Q[col], embed_dim,
+                      &layer_input[col], embed_dim, 1.0f,
+                      &training->attention_grads[layer].query_lattice[w], head_dim);
         }
-        
-        // 3. Gradient through softmax
-        for (int i = 0; i < seq_len; i++) {
-            softmax_backward(
-                &grad_scores[h * seq_len * seq_len + i * seq_len],
-                &grad_weights[h * seq_len * seq_len + i * seq_len],
-                &attention_weights[h * seq_len * seq_len + i * seq_len],
-                seq_len
-            );
+        if (training->attention_grads[layer].key_lattice) {
+            cllm_gemm(true, false, head_dim, head_dim, seq_len, 1.0f, &grad_K[col], embed_dim,
+                      &layer_input[col], embed_dim, 1.0f,
+                      &training->attention_grads[layer].key_lattice[w], head_dim);
         }
-        
-        // 4. Gradient w.r.t. Q: grad_Q = (grad_scores × K) / sqrt(d_k)
-        for (int i = 0; i < seq_len; i++) {
-            for (int d = 0; d < (int)head_dim; d++) {
-                float sum = 0.0f;
-                for (int j = 0; j < seq_len; j++) {
-                    sum += grad_scores[h * seq_len * seq_len + i * seq_len + j] *
-                           keys[j * embed_dim + h * head_dim + d];
-                }
-                grad_Q[i * embed_dim + h * head_dim + d] = sum * scale;
-            }
+        if (training->attention_grads[layer].value_lattice) {
+            cllm_gemm(true, false, head_dim, head_dim, seq_len, 1.0f, &grad_V[col], embed_dim,
+                      &layer_input[col], embed_dim, 1.0f,
+                      &training->attention_grads[layer].value_lattice[w], head_dim);
         }
         
-        // 5. Gradient w.r.t. K: grad_K = (grad_scores^T × Q) / sqrt(d_k)
-        for (int j = 0; j < seq_len; j++) {
-            for (int d = 0; d < (int)head_dim; d++) {
-                float sum = 0.0f;
-                for (int i = 0; i < seq_len; i++) {
-                    sum += grad_scores[h * seq_len * seq_len + i * seq_len + j] *
-                           queries[i * embed_dim + h * head_dim + d];
-                }
-                grad_K[j * embed_dim + h * head_dim + d] = sum * scale;
-            }
-        }
-    }
-    
-    // 6. Compute gradients w.r.t. weight matrices
-    float* layer_input = training->layer_inputs[layer];
-    
-    for (int pos = 0; pos < seq_len; pos++) {
-        for (uint32_t d1 = 0; d1 < embed_dim; d1++) {
-            for (uint32_t d2 = 0; d2 < embed_dim; d2++) {
-                // Query weight gradients
-                if (training->attention_grads[layer].query_lattice) {
-                    training->attention_grads[layer].query_lattice[d1 * embed_dim + d2] +=
-                        layer_input[pos * embed_dim + d1] * grad_Q[pos * embed_dim + d2];
-                }
-                
-                // Key weight gradients
-                if (training->attention_grads[layer].key_lattice) {
-                    training->attention_grads[layer].key_lattice[d1 * embed_dim + d2] +=
-                        layer_input[pos * embed_dim + d1] * grad_K[pos * embed_dim + d2];
-                }
-                
-                // Value weight gradients
-                if (training->attention_grads[layer].value_lattice) {
-                    training->attention_grads[layer].value_lattice[d1 * embed_dim + d2] +=
-                        layer_input[pos * embed_dim + d1] * grad_V[pos * embed_dim + d2];
-                }
-            }
-        }
-    }
-    
-    // 7. Compute gradient w.r.t. input
-    memset(grad_input, 0, seq_len * embed_dim * sizeof(float));
-    for (int pos = 0; pos < seq_len; pos++) {
-        for (uint32_t d1 = 0; d1 < embed_dim; d1++) {
-            for (uint32_t d2 = 0; d2 < embed_dim; d2++) {
-                grad_input[pos * embed_dim + d1] +=
-                    grad_Q[pos * embed_dim + d2] * attn->query_lattice[d1 * embed_dim + d2] +
-                    grad_K[pos * embed_dim + d2] * attn->key_lattice[d1 * embed_dim + d2] +
-                    grad_V[pos * embed_dim + d2] * attn->value_lattice[d1 * embed_dim + d2];
-            }
+        if (grad_input) {
+            cllm_gemm(false, false, seq_len, head_dim, head_dim, 1.0f, &grad_Q[col], embed_dim,
+                      &attn->query_lattice[w], head_dim, 0.0f, &grad_input[col], embed_dim);
+            cllm_gemm(false, false, seq_len, head_dim, head_dim, 1.0f, &grad_K[col], embed_dim,
+                      &attn->key_lattice[w], head_dim, 1.0f, &grad_input[col], embed_dim);
+            cllm_gemm(false, false, seq_len, head_dim, head_dim, 1.0f, &grad_V[col], embed_dim,
+                      &attn->value_lattice[w], head_dim, 1.0f, &grad_input[col], embed_dim);
         }
     }
     
     // Cleanup
-    free(grad_V);
-    free(grad_weights);
-    free(grad_scores);
     free(grad_Q);
     free(grad_K);
+    free(grad_V);
 }
 
 // Train for one epoch
@@ -1165,9 +993,9 @@ float cllm_forward_training(CLLMTraining* training, uint32_t* input_tokens) {
             float* batch_output = &training->attention_outputs[layer][start_idx * embed_dim];
             uint32_t* batch_tokens = &input_tokens[start_idx];
             
-            // Use hybrid attention (angular when token IDs available, dot product otherwise)
+            // Attention with the configured kernel (tiled by default)
             cllm_attention_forward_training(training, layer, attn_layer, 
-                                           batch_input, batch_output, batch_tokens, seq_len);
+                                           batch_input, batch_output, batch_tokens, b, seq_len);
         }
         
         // Process feedforward for each position
@@ -1219,34 +1047,13 @@ float cllm_forward_training(CLLMTraining* training, uint32_t* input_tokens) {
         layer_input = training->layer_outputs[layer];
     }
     
-    // Copy final hidden
+    // Copy final hidden (the vocabulary projection is fused into the loss
+    // in cllm_backward_training)
     memcpy(training->final_hidden, layer_input, batch_size * seq_len * embed_dim * sizeof(float));
     
-    // Project to vocabulary
-    for (int b = 0; b < batch_size; b++) {
-        for (int s = 0; s < seq_len; s++) {
-            int idx = b * seq_len + s;
-            float* hidden = &training->final_hidden[idx * embed_dim];
-            float* logits = &training->logits[idx * vocab_size];
-            
-            for (uint32_t v = 0; v < vocab_size; v++) {
-                float* vocab_embed = &model->embeddings.embeddings[v * embed_dim];
-                float score = 0.0f;
-                for (uint32_t d = 0; d < embed_dim; d++) {
-                    score += hidden[d] * vocab_embed[d];
-                }
-                logits[v] = score;
-            }
-        }
-    }
-    
     return 0.0f;
 }
 
-/**
- * Compute cross-entropy loss from stored logits
- */
-
 /**
  * Backward pass with cross-entropy gradients
  */
@@ -1265,68 +1072,25 @@ void cllm_backward_training(CLLMTraining* training, uint32_t* target_tokens, flo
     
     cllm_zero_all_gradients(training);
     
-    float* grad_logits = (float*)calloc(batch_size * seq_len * vocab_size, sizeof(float));
     float* grad_hidden = (float*)calloc(batch_size * seq_len * embed_dim, sizeof(float));
     float* grad_layer = (float*)calloc(batch_size * seq_len * embed_dim, sizeof(float));
     
-    if (!grad_logits || !grad_hidden || !grad_layer) {
-        free(grad_logits); free(grad_hidden); free(grad_layer);
+    if (!grad_hidden || !grad_layer) {
+        free(grad_hidden); free(grad_layer);
         return;
     }
     
-    // Gradient of cross-entropy w.r.t. logits
-    for (int b = 0; b < batch_size; b++) {
-        for (int s = 0; s < seq_len; s++) {
-            int idx = b * seq_len + s;
-            uint32_t target = target_tokens[idx];
-            if (target >= vocab_size) continue;
-            
-            float* logits = &training->logits[idx * vocab_size];
-            float* grad = &grad_logits[idx * vocab_size];
-            
-            float max_logit = logits[0];
-            for (uint32_t v = 1; v < vocab_size; v++) {
-                if (logits[v] > max_logit) max_logit = logits[v];
-            }
-            
-            float sum_exp = 0.0f;
-            for (uint32_t v = 0; v < vocab_size; v++) {
-                sum_exp += prime_expf(logits[v] - max_logit);
-            }
-            
-            for (uint32_t v = 0; v < vocab_size; v++) {
-                float softmax_v = prime_expf(logits[v] - max_logit) / sum_exp;
-                grad[v] = softmax_v;
-                if (v == target) grad[v] -= 1.0f;
-                grad[v] /= (batch_size * seq_len);
-            }
-        }
+    // Gradients w.r.t. attention outputs, for the full attention backward
+    float* grad_attention = NULL;
+    if (training->store_attention_weights && training->attention_cache) {
+        grad_attention = (float*)calloc(batch_size * seq_len * embed_dim, sizeof(float));
     }
     
-    // Backward through output projection
-    for (int b = 0; b < batch_size; b++) {
-        for (int s = 0; s < seq_len; s++) {
-            int idx = b * seq_len + s;
-            float* grad_log = &grad_logits[idx * vocab_size];
-            float* grad_hid = &grad_hidden[idx * embed_dim];
-            float* hidden = &training->final_hidden[idx * embed_dim];
-            
-            for (uint32_t d = 0; d < embed_dim; d++) {
-                float sum = 0.0f;
-                for (uint32_t v = 0; v < vocab_size; v++) {
-                    sum += grad_log[v] * model->embeddings.embeddings[v * embed_dim + d];
-                }
-                grad_hid[d] = sum;
-            }
-            
-            for (uint32_t v = 0; v < vocab_size; v++) {
-                float* grad_embed = &gradients[v * embed_dim];
-                for (uint32_t d = 0; d < embed_dim; d++) {
-                    grad_embed[d] += grad_log[v] * hidden[d];
-                }
-            }
-        }
-    }
+    // Cross-entropy through the output projection, one vocabulary chunk at
+    // a time (embedding gradients are at the start of the buffer)
+    cllm_fused_cross_entropy(training->final_hidden, model->embeddings.embeddings, target_tokens,
+                             batch_size * seq_len, embed_dim, vocab_size,
+                             1.0f / (batch_size * seq_len), grad_hidden, gradients);
     
     // Backward through layers
     memcpy(grad_layer, grad_hidden, batch_size * seq_len * embed_dim * sizeof(float));
@@ -1383,18 +1147,9 @@ void cllm_backward_training(CLLMTraining* training, uint32_t* target_tokens, flo
                 float* layer_input = training->layer_inputs[layer];
                 float* attn_input = &layer_input[idx * embed_dim];
                 
-                // Use full attention backward if cache is available, otherwise use simplified version
-                if (training->store_attention_weights && training->attention_cache) {
-                    // Full attention backward with proper gradient computation
-                    float* grad_input_temp = (float*)calloc(embed_dim, sizeof(float));
-                    if (grad_input_temp) {
-                        // Note: This processes one position at a time
-                        // For full sequence processing, we'd need to batch this
-                        // For now, accumulate gradients position by position
-                        attention_backward_full(training, layer, grad, grad_input_temp, 1);
-                        free(grad_input_temp);
-                    }
-                } else {
+                // Use full attention backward if cache is available (after the
+                // feedforward backward below), otherwise use simplified version
+                if (!grad_attention) {
                     // Simplified attention backward: approximate with outer product
                     // This is the fallback when attention cache is not available
                     (void)attn_input;  // Used below for gradient computation
@@ -1452,14 +1207,28 @@ void cllm_backward_training(CLLMTraining* training, uint32_t* target_tokens, flo
                     }
                 }
                 
+                // grad is now w.r.t. the attention output through both the
+                // residual and the feedforward path; the full attention
+                // backward runs once per sequence below
+                if (grad_attention) {
+                    memcpy(&grad_attention[idx * embed_dim], grad, embed_dim * sizeof(float));
+                }
+                
                 free(grad_hidden);
             }
         }
+        
+        if (grad_attention) {
+            for (int b = 0; b < batch_size; b++) {
+                attention_backward_full(training, layer, b, &grad_attention[b * seq_len * embed_dim],
+                                        NULL, seq_len);
+            }
+        }
     }
     
-    free(grad_logits);
     free(grad_hidden);
     free(grad_layer);
+    free(grad_attention);
 }
 
 // Train the model
@@ -1638,7 +1407,6 @@ void cllm_training_cleanup(CLLMTraining* training) {
     // Free forward pass activation storage
     free(training->input_embeddings);
     free(training->final_hidden);
-    free(training->logits);
     
     if (training->layer_inputs) {
         for (uint32_t i = 0; i < training->model->num_layers; i++) {
@@ -1681,8 +1449,8 @@ void cllm_training_cleanup(CLLMTraining* training) {
             if (training->attention_cache[i].queries) free(training->attention_cache[i].queries);
             if (training->attention_cache[i].keys) free(training->attention_cache[i].keys);
             if (training->attention_cache[i].values) free(training->attention_cache[i].values);
-            if (training->attention_cache[i].attention_weights) free(training->attention_cache[i].attention_weights);
-            if (training->attention_cache[i].scores) free(training->attention_cache[i].scores);
+            if (training->attention_cache[i].outputs) free(training->attention_cache[i].outputs);
+            if (training->attention_cache[i].lse) free(training->attention_cache[i].lse);
         }
         free(training->attention_cache);
     }
@@ -33,6 +33,7 @@
 #include "ai/cllm_sphere_message.h"      // PHASE 7: Sphere messaging
 #include "cllm_metrics.h"                // UI Integration: Real-time metrics
 #include "prime_float_math.h"
+#include "cllm_gemm.h"
 #include <stdlib.h>
 #include <stdio.h>
 #include <string.h>
@@ -122,6 +123,7 @@ typedef struct {
     _Atomic int epoch_done;                       // 1 when epoch complete
     _Atomic size_t total_pushed;                  // Total batches pushed
     _Atomic size_t total_popped;                  // Total batches popped
+    _Atomic size_t total_completed;               // Total batches fully processed
 } WorkQueue;
 
 struct ThreadedTrainingSystem {
@@ -141,6 +143,11 @@ struct ThreadedTrainingSystem {
     volatile int control_running;
     int has_control_thread;      // 1 if using separate control thread
     
+    // Idle workers and Node Zero sleep here between epochs
+    pthread_mutex_t round_lock;
+    pthread_cond_t round_cond;   // Broadcast when an epoch starts or on shutdown
+    unsigned long round;         // Epochs started so far
+    
     // Batch iterator
     CLLMBatchIterator* batch_iterator;
     
@@ -216,13 +223,11 @@ ThreadLocalTrainingContext* thread_local_training_create(
     ctx->num_heads = num_heads;
     
     size_t seq_size = batch_size * seq_len * embed_dim;
-    size_t logits_size = batch_size * seq_len * vocab_size;
     size_t ff_size = batch_size * seq_len * ff_hidden_dim;
     
     // Allocate forward pass buffers
     ctx->input_embeddings = (float*)calloc(seq_size, sizeof(float));
     ctx->final_hidden = (float*)calloc(seq_size, sizeof(float));
-    ctx->logits = (float*)calloc(logits_size, sizeof(float));
     
     // Allocate per-layer buffers
     ctx->layer_inputs = (float**)calloc(num_layers, sizeof(float*));
@@ -242,20 +247,7 @@ ThreadLocalTrainingContext* thread_local_training_create(
         }
     }
     
-    // Allocate attention cache
-    ctx->attention_cache = (typeof(ctx->attention_cache))calloc(num_layers, sizeof(*ctx->attention_cache));
-    if (ctx->attention_cache) {
-        for (int i = 0; i < num_layers; i++) {
-            ctx->attention_cache[i].queries = (float*)calloc(seq_len * embed_dim, sizeof(float));
-            ctx->attention_cache[i].keys = (float*)calloc(seq_len * embed_dim, sizeof(float));
-            ctx->attention_cache[i].values = (float*)calloc(seq_len * embed_dim, sizeof(float));
-            ctx->attention_cache[i].attention_weights = (float*)calloc(num_heads * seq_len * seq_len, sizeof(float));
-            ctx->attention_cache[i].scores = (float*)calloc(num_heads * seq_len * seq_len, sizeof(float));
-        }
-    }
-    
     // Allocate backward pass temporary buffers
-    ctx->grad_logits = (float*)calloc(logits_size, sizeof(float));
     ctx->grad_hidden = (float*)calloc(seq_size, sizeof(float));
     ctx->grad_layer = (float*)calloc(seq_size, sizeof(float));
     
@@ -268,7 +260,6 @@ void thread_local_training_free(ThreadLocalTrainingContext* ctx) {
     // Free forward pass buffers
     free(ctx->input_embeddings);
     free(ctx->final_hidden);
-    free(ctx->logits);
     
     // Free per-layer buffers
     if (ctx->layer_inputs) {
@@ -306,20 +297,7 @@ void thread_local_training_free(ThreadLocalTrainingContext* ctx) {
         free(ctx->ff_hidden);
     }
     
-    // Free attention cache
-    if (ctx->attention_cache) {
-        for (int i = 0; i < ctx->num_layers; i++) {
-            free(ctx->attention_cache[i].queries);
-            free(ctx->attention_cache[i].keys);
-            free(ctx->attention_cache[i].values);
-            free(ctx->attention_cache[i].attention_weights);
-            free(ctx->attention_cache[i].scores);
-        }
-        free(ctx->attention_cache);
-    }
-    
     // Free backward pass buffers
-    free(ctx->grad_logits);
     free(ctx->grad_hidden);
     free(ctx->grad_layer);
     
@@ -375,7 +353,22 @@ float cllm_forward_training_threaded(
         memcpy(local_ctx->attention_outputs[layer], layer_input, 
                batch_size * seq_len * embed_dim * sizeof(float));
         
-        // Process feedforward
+        // Process feedforward for all rows at once
+        FeedForwardLayer* ff = &model->ff_layers[layer];
+        int rows = batch_size * seq_len;
+        cllm_gemm(false, false, rows, ff->hidden_dim, embed_dim, 1.0f,
+                  local_ctx->attention_outputs[layer], embed_dim, ff->w1_lattice, ff->hidden_dim,
+                  0.0f, local_ctx->ff_hidden[layer], ff->hidden_dim);
+        for (int r = 0; r < rows; r++) {
+            float* ff_hidden = &local_ctx->ff_hidden[layer][r * ff->hidden_dim];
+            for (uint32_t h = 0; h < ff->hidden_dim; h++) {
+                ff_hidden[h] = prime_tanhf(ff_hidden[h] + ff->bias1[h]);
+            }
+        }
+        cllm_gemm(false, false, rows, embed_dim, ff->hidden_dim, 1.0f,
+                  local_ctx->ff_hidden[layer], ff->hidden_dim, ff->w2_lattice, embed_dim,
+                  0.0f, local_ctx->ff_outputs[layer], embed_dim);
+        
         for (int b = 0; b < batch_size; b++) {
             for (int s = 0; s < seq_len; s++) {
                 int idx = b * seq_len + s;
@@ -383,25 +376,7 @@ float cllm_forward_training_threaded(
                 float* ff_out = &local_ctx->ff_outputs[layer][idx * embed_dim];
                 float* layer_out = &local_ctx->layer_outputs[layer][idx * embed_dim];
                 
-                // FeedForward
-                FeedForwardLayer* ff = &model->ff_layers[layer];
-                float* ff_hidden = &local_ctx->ff_hidden[layer][idx * ff->hidden_dim];
-                
-                for (uint32_t h = 0; h < ff->hidden_dim; h++) {
-                    float sum = ff->bias1[h];
-                    for (uint32_t i = 0; i < embed_dim; i++) {
-                        sum += attn_out[i] * ff->w1_lattice[i * ff->hidden_dim + h];
-                    }
-                    ff_hidden[h] = prime_tanhf(sum);
-                }
-                
-                for (uint32_t o = 0; o < embed_dim; o++) {
-                    float sum = ff->bias2[o];
-                    for (uint32_t h = 0; h < ff->hidden_dim; h++) {
-                        sum += ff_hidden[h] * ff->w2_lattice[h * embed_dim + o];
-                    }
-                    ff_out[o] = sum;
-                }
+                for (uint32_t o = 0; o < embed_dim; o++) ff_out[o] += ff->bias2[o];
                 
                 // Residual + LayerNorm
                 for (uint32_t d = 0; d < embed_dim; d++) layer_out[d] = attn_out[d] + ff_out[d];
@@ -424,29 +399,12 @@ float cllm_forward_training_threaded(
         layer_input = local_ctx->layer_outputs[layer];
     }
     
-    printf("    [DEBUG] All layers processed, computing logits\n");
+    printf("    [DEBUG] All layers processed\n");
     fflush(stdout);
-    // Copy final hidden (to thread-local buffer)
+    // Copy final hidden (to thread-local buffer); the vocabulary projection
+    // is fused into the loss in cllm_backward_training_threaded
     memcpy(local_ctx->final_hidden, layer_input, batch_size * seq_len * embed_dim * sizeof(float));
     
-    // Project to vocabulary (write to thread-local logits)
-    for (int b = 0; b < batch_size; b++) {
-        for (int s = 0; s < seq_len; s++) {
-            int idx = b * seq_len + s;
-            float* hidden = &local_ctx->final_hidden[idx * embed_dim];
-            float* logits = &local_ctx->logits[idx * vocab_size];
-            
-            for (uint32_t v = 0; v < vocab_size; v++) {
-                float* vocab_embed = &model->embeddings.embeddings[v * embed_dim];
-                float score = 0.0f;
-                for (uint32_t d = 0; d < embed_dim; d++) {
-                    score += hidden[d] * vocab_embed[d];
-                }
-                logits[v] = score;
-            }
-        }
-    }
-    
     return 0.0f;
 }
 
@@ -472,62 +430,16 @@ void cllm_backward_training_threaded(
     uint32_t vocab_size = model->vocab_size;
     
     // Use thread-local temporary buffers
-    float* grad_logits = local_ctx->grad_logits;
     float* grad_hidden = local_ctx->grad_hidden;
     float* grad_layer = local_ctx->grad_layer;
-    
-    // Zero the buffers
-    memset(grad_logits, 0, batch_size * seq_len * vocab_size * sizeof(float));
-    memset(grad_hidden, 0, batch_size * seq_len * embed_dim * sizeof(float));
     memset(grad_layer, 0, batch_size * seq_len * embed_dim * sizeof(float));
     
-    // Gradient of cross-entropy w.r.t. logits (using thread-local logits)
-    for (int b = 0; b < batch_size; b++) {
-        for (int s = 0; s < seq_len; s++) {
-            int idx = b * seq_len + s;
-            uint32_t target = target_tokens[idx];
-            if (target >= vocab_size) continue;
-            
-            float* logits = &local_ctx->logits[idx * vocab_size];
-            float* grad = &grad_logits[idx * vocab_size];
-            
-            float max_logit = logits[0];
-            for (uint32_t v = 1; v < vocab_size; v++) {
-                if (logits[v] > max_logit) max_logit = logits[v];
-            }
-            
-            float sum_exp = 0.0f;
-            for (uint32_t v = 0; v < vocab_size; v++) {
-                sum_exp += prime_expf(logits[v] - max_logit);
-            }
-            
-            for (uint32_t v = 0; v < vocab_size; v++) {
-                float prob = prime_expf(logits[v] - max_logit) / sum_exp;
-                grad[v] = prob - (v == target ? 1.0f : 0.0f);
-            }
-        }
-    }
-    
-    // Backprop through vocabulary projection (write to gradient_buffer)
-    for (int b = 0; b < batch_size; b++) {
-        for (int s = 0; s < seq_len; s++) {
-            int idx = b * seq_len + s;
-            float* grad_logit = &grad_logits[idx * vocab_size];
-            float* hidden = &local_ctx->final_hidden[idx * embed_dim];
-            float* grad_h = &grad_hidden[idx * embed_dim];
-            
-            for (uint32_t v = 0; v < vocab_size; v++) {
-                float* vocab_embed = &model->embeddings.embeddings[v * embed_dim];
-                float grad_v = grad_logit[v];
-                
-                // Accumulate to gradient_buffer (lock-free segment)
-                for (uint32_t d = 0; d < embed_dim; d++) {
-                    gradient_buffer[v * embed_dim + d] += grad_v * hidden[d];
-                    grad_h[d] += grad_v * vocab_embed[d];
-                }
-            }
-        }
-    }
+    // Cross-entropy through the vocabulary projection, one vocabulary chunk
+    // at a time: accumulates to gradient_buffer (lock-free segment) and
+    // writes the hidden-state gradients
+    cllm_fused_cross_entropy(local_ctx->final_hidden, model->embeddings.embeddings, target_tokens,
+                             batch_size * seq_len, embed_dim, vocab_size, 1.0f,
+                             grad_hidden, gradient_buffer);
     
     // Note: Full backward pass through layers would go here
     // For now, we're just doing the vocabulary projection gradients
@@ -671,7 +583,7 @@ static void sphere_process_batch(SphereTrainingContext* ctx, CLLMTraining* train
         // PHASE 8: Use thread-local context (NO LOCKING NEEDED!)
         // Each thread has its own activation buffers, so no race conditions
         
-        // Forward pass using thread-local buffers (computes logits)
+        // Forward pass using thread-local buffers (stores activations)
         cllm_forward_training_threaded(
             training, 
             ctx->thread_local_training,
@@ -743,7 +655,7 @@ static WorkQueue* work_queue_create(void) {
     
     atomic_init(&queue->head, 0);
     atomic_init(&queue->tail, 0);
-    atomic_init(&queue->epoch_done, 0);
+    atomic_init(&queue->epoch_done, 1);  // No epoch yet: workers sleep until the first
     atomic_init(&queue->total_pushed, 0);
     atomic_init(&queue->total_popped, 0);
     
@@ -851,6 +763,7 @@ static void work_queue_reset(WorkQueue* queue) {
     atomic_store(&queue->epoch_done, 0);
     atomic_store(&queue->total_pushed, 0);
     atomic_store(&queue->total_popped, 0);
+    atomic_store(&queue->total_completed, 0);
     
     // Clear all batch pointers
     for (int i = 0; i < MAX_WORK_ITEMS; i++) {
@@ -865,10 +778,11 @@ static int work_queue_is_complete(WorkQueue* queue) {
     if (!queue) return 1;
     
     size_t pushed = atomic_load(&queue->total_pushed);
-    size_t popped = atomic_load(&queue->total_popped);
+    size_t completed = atomic_load(&queue->total_completed);
     int done = atomic_load(&queue->epoch_done);
     
-    return (done && pushed == popped);
+    // Popped batches may still be in flight; wait until they are processed
+    return (done && pushed == completed);
 }
 
 /**
@@ -885,6 +799,39 @@ static void work_queue_stats(WorkQueue* queue, size_t* pending, size_t* pushed,
     *popped = atomic_load(&queue->total_popped);
 }
 
+/**
+ * Wake idle workers for a new epoch (call after work_queue_reset)
+ */
+static void training_round_start(ThreadedTrainingSystem* system) {
+    pthread_mutex_lock(&system->round_lock);
+    system->round++;
+    pthread_cond_broadcast(&system->round_cond);
+    pthread_mutex_unlock(&system->round_lock);
+}
+
+/**
+ * Stop the control thread and workers; wakes any that are idle
+ */
+static void training_round_shutdown(ThreadedTrainingSystem* system) {
+    pthread_mutex_lock(&system->round_lock);
+    atomic_store(&system->running, 0);
+    system->control_running = 0;
+    pthread_cond_broadcast(&system->round_cond);
+    pthread_mutex_unlock(&system->round_lock);
+}
+
+/**
+ * Block until an epoch after `*seen_round` starts or the system stops
+ */
+static void training_round_wait(ThreadedTrainingSystem* system, unsigned long* seen_round) {
+    pthread_mutex_lock(&system->round_lock);
+    while (system->round == *seen_round && atomic_load(&system->running)) {
+        pthread_cond_wait(&system->round_cond, &system->round_lock);
+    }
+    *seen_round = system->round;
+    pthread_mutex_unlock(&system->round_lock);
+}
+
 /**
  * PHASE 2A: Batch Queue Functions
  */
@@ -1126,6 +1073,8 @@ ThreadedTrainingSystem* threaded_training_create(CLLMTraining* training,
     system->training = training;
     system->batch_iterator = batch_iterator;
     atomic_init(&system->running, 1);  // MUST use atomic_init for atomic_int!
+    pthread_mutex_init(&system->round_lock, NULL);
+    pthread_cond_init(&system->round_cond, NULL);
     atomic_init(&system->sphere_id_counter, num_threads);  // Start after initial threads
     
     // MASTER PLAN: 12-fold symmetry structure
@@ -1358,9 +1307,8 @@ ThreadedTrainingSystem* threaded_training_create(CLLMTraining* training,
         pthread_attr_destroy(&worker_attr);
         if (rc != 0) {
             fprintf(stderr, "ERROR: Failed to create worker thread %d (error %d)\n", i, rc);
-            // Stop control thread
-            atomic_store(&system->running, 0);
-            system->control_running = 0;
+            // Stop control thread and the workers already started
+            training_round_shutdown(system);
             pthread_join(system->control_thread, NULL);
             // Stop already created workers
             for (int j = 0; j < i; j++) {
@@ -1403,6 +1351,15 @@ ThreadedTrainingSystem* threaded_training_create(CLLMTraining* training,
     return system;
 }
 
+/**
+ * Replace the batch iterator between epochs
+ */
+void threaded_training_set_batch_iterator(ThreadedTrainingSystem* system,
+                                          CLLMBatchIterator* batch_iterator) {
+    if (!system) return;
+    system->batch_iterator = batch_iterator;
+}
+
 /**
  * Free threaded training system
  */
@@ -1410,12 +1367,11 @@ void threaded_training_free(ThreadedTrainingSystem* system) {
     if (!system) return;
     
     printf("\nStopping threads...\n");
-    atomic_store(&system->running, 0);
+    training_round_shutdown(system);
     
     // Stop control thread first (Node Zero)
     if (system->has_control_thread) {
         printf("  Stopping Node Zero (control thread)...\n");
-        system->control_running = 0;
         pthread_join(system->control_thread, NULL);
         printf("  ✓ Node Zero stopped\n");
     }
@@ -1472,6 +1428,8 @@ void threaded_training_free(ThreadedTrainingSystem* system) {
     
     pthread_barrier_destroy(&system->epoch_barrier);
     pthread_barrier_destroy(&system->batch_barrier);
+    pthread_mutex_destroy(&system->round_lock);
+    pthread_cond_destroy(&system->round_cond);
     
     // PHASE 5: Cleanup infrastructure
     if (system->control_process) {
@@ -1520,31 +1478,16 @@ static void* control_thread_func(void* arg) {
     ThreadedTrainingSystem* system = (ThreadedTrainingSystem*)arg;
     
     printf("[Node Zero] Control thread started - NEVER processes batches\n");
-    printf("[Node Zero] Using barrier synchronization + lock-free gradient accumulation\n");
     
-    while (1) {
-        // POINT A: Wait for batch distribution
-        pthread_barrier_wait(&system->batch_barrier);
-        
-        // Check if we should stop
-       // Check if we should stop (AFTER barrier to avoid deadlock)
-       if (!atomic_load(&system->running)) {
-           // Must still participate in Point B barrier before exiting
-           pthread_barrier_wait(&system->batch_barrier);
-           break;
-       }
-        
-        // Workers are now processing batches...
-        // Control thread waits at next barrier
-        
-        // POINT B: Wait for batch completion
-        pthread_barrier_wait(&system->batch_barrier);
-        
-        // PHASE 4: After Point B, workers are waiting at barrier
-        // Safe to read their gradient segments and accumulate
-        // This is lock-free because workers are blocked at barrier
-        accumulate_gradients_lockfree(system);
+    // PHASE 2B: Lock-free workers never reach the batch barrier and the
+    // epoch function accumulates gradients itself, so Node Zero waits for
+    // shutdown here. Waiting at the barrier would block
+    // threaded_training_free() forever.
+    pthread_mutex_lock(&system->round_lock);
+    while (system->control_running && atomic_load(&system->running)) {
+        pthread_cond_wait(&system->round_cond, &system->round_lock);
     }
+    pthread_mutex_unlock(&system->round_lock);
     
     printf("[Node Zero] Control thread stopping\n");
     return NULL;
@@ -1568,21 +1511,30 @@ static void* sphere_worker_thread_lockfree(void* arg) {
     printf("[Worker %d] Thread started (symmetry group %d) - LOCK-FREE MODE\n", 
            ctx->sphere_id, ctx->symmetry_group);
     
+    // Workers already cover the cores; their products stay on this thread
+    cllm_gemm_set_thread_serial(true);
+    
     // UI Integration: Update thread state to WORKING
     if (system->metrics) {
         cllm_metrics_update_thread_state(system->metrics, ctx->sphere_id, THREAD_STATE_WORKING);
     }
     
     int batches_processed = 0;
+    unsigned long seen_round = 0;
     
     while (atomic_load(&system->running)) {
         // Pop work from queue (non-blocking)
         CLLMBatch* batch = work_queue_pop(system->work_queue);
         
         if (!batch) {
-            // No work available - check if epoch done
+            // No work available - once the epoch is done, sleep until the
+            // next one starts (the system is reused across epochs and data)
             if (atomic_load(&system->work_queue->epoch_done)) {
-                break;  // Epoch complete
+                if (system->metrics) {
+                    cllm_metrics_update_thread_state(system->metrics, ctx->sphere_id, THREAD_STATE_IDLE);
+                }
+                training_round_wait(system, &seen_round);
+                continue;
             }
             
             // UI Integration: Update thread state to IDLE
@@ -1617,6 +1569,7 @@ static void* sphere_worker_thread_lockfree(void* arg) {
         // Free batch
         cllm_batch_free(batch);
         ctx->current_batch = NULL;
+        atomic_fetch_add(&system->work_queue->total_completed, 1);
     }
     
     // UI Integration: Update thread state to TERMINATED
@@ -1643,6 +1596,8 @@ static void* sphere_worker_thread(void* arg) {
     printf("[Worker %d] Thread started (symmetry group %d)\n", 
            ctx->sphere_id, ctx->symmetry_group);
     
+    cllm_gemm_set_thread_serial(true);
+    
     int batches_processed = 0;
     
     while (1) {
@@ -1921,7 +1876,7 @@ static void accumulate_gradients(ThreadedTrainingSystem* system) {
  * Main thread pushes batches and waits for completion
  */
 float threaded_train_epoch_lockfree(ThreadedTrainingSystem* system, int current_epoch) {
-    if (!system) return 0.0f;
+    if (!system || !system->batch_iterator) return 0.0f;
     
     printf("\n=== PHASE 2B: LOCK-FREE TRAINING EPOCH ===\n");
     printf("Epoch %d - Using %d worker threads (lock-free work queue)\n", current_epoch + 1, system->num_worker_spheres);
@@ -1931,8 +1886,9 @@ float threaded_train_epoch_lockfree(ThreadedTrainingSystem* system, int current_
         cllm_metrics_update_framework_status(system->metrics, 1, 1, 1, 1);  // All active
     }
     
-    // Reset work queue for new epoch
+    // Reset work queue for new epoch and wake idle workers
     work_queue_reset(system->work_queue);
+    training_round_start(system);
     
     // PHASE 2A: Reset batch iterator and start pre-fetching
     cllm_batch_iterator_reset(system->batch_iterator);
@@ -1,15 +1,38 @@
 /**
  * CLLM Vocabulary Builder
  * 
- * Builds vocabulary from training data and integrates with model
+ * Builds vocabulary from training data and integrates with model.
+ * 
+ * The parallel builder is a map-reduce over the corpus: text is split into
+ * byte ranges at whitespace and each thread counts words into one hash
+ * table of its own, allocated on first use and sized by the input. Only the
+ * merge partitions by hash: every thread groups its entries by partition,
+ * then partition p of every thread is merged by thread p. The merged counts
+ * are sorted by (frequency, bytes), so token IDs do not depend on the
+ * thread count or scheduling.
  */
 
 #include "../include/cllm.h"
 #include "../include/cllm_tokenizer.h"
+#include "../include/cllm_vocab_builder.h"
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
 #include <ctype.h>
+#include <pthread.h>
+#include <stdatomic.h>
+#include <fcntl.h>
+#include <unistd.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+
+#define VOCAB_UNK_ID 1                  // cllm_find_token's "not found" result
+#define VOCAB_MIN_CHUNK (64 * 1024)     // Smallest byte range handed to a thread
+#define VOCAB_CHUNKS_PER_THREAD 16      // Oversplit for load balancing
+#define VOCAB_FILE_BATCH 256            // Files mapped at once by add_files
+#define VOCAB_MIN_TABLE 1024            // Smallest counting table (slots)
+#define VOCAB_MAX_INITIAL_TABLE (1 << 20) // Larger tables are reached by growing
+#define VOCAB_BYTES_PER_SLOT 64         // Input bytes per initial table slot
 
 /**
  * Build vocabulary from training file and store in model
@@ -50,7 +73,8 @@ int cllm_build_vocabulary_from_file(CLLMModel* model, const char* filename) {
     }
     
     // Build vocabulary
-    cllm_build_vocab(tokenizer, content);
+    const char* texts[1] = { content };
+    cllm_build_vocab_parallel(tokenizer, texts, 1, 0);
     free(content);
     
     // Get actual vocabulary size
@@ -200,4 +224,676 @@ void cllm_detokenize_with_vocab(CLLMModel* model, uint32_t* tokens, int num_toke
     }
     
     output[pos] = '\0';
-}
\ No newline at end of file
+}
+
+/* ============================================================================
+ * Parallel Vocabulary Builder
+ * ============================================================================ */
+
+typedef struct {
+    uint64_t count;             // 0 = empty slot
+    uint32_t hash;
+    uint32_t len;
+    size_t offset;              // Token string in the owning counter's arena
+} VocabEntry;
+
+typedef struct {
+    VocabEntry* entries;        // Open addressing, power-of-two capacity
+    size_t capacity;
+    size_t used;
+} VocabTable;
+
+typedef struct {
+    VocabTable table;           // Allocated on the first word
+    size_t initial_capacity;    // Size of that allocation, from the input size
+    char* arena;                // Lowercased token strings, NUL-terminated
+    size_t arena_used;
+    size_t arena_capacity;
+    uint64_t total_tokens;
+    size_t* order;              // Merge only: occupied slots grouped by partition
+    size_t* part_start;         // Merge only: partition p is order[part_start[p]..part_start[p+1])
+    int failed;
+} VocabCounter;
+
+struct CLLMVocabBuilder {
+    int num_threads;
+    VocabCounter* counters;     // One per thread
+    uint64_t total_tokens;
+};
+
+typedef struct {
+    const char* data;
+    size_t len;
+} VocabRange;
+
+// Merged token (string points into a counter arena)
+typedef struct {
+    const char* str;
+    uint32_t len;
+    uint32_t hash;
+    uint64_t count;
+} VocabCandidate;
+
+typedef struct {
+    CLLMVocabBuilder* builder;
+    const VocabRange* ranges;
+    size_t num_ranges;
+    atomic_size_t next_range;
+} VocabCountJob;
+
+typedef struct {
+    VocabCounter* counter;
+    int num_parts;
+} VocabSplitJob;
+
+typedef struct {
+    CLLMVocabBuilder* builder;
+    CLLMTokenizer* tokenizer;
+    int partition;
+    VocabCandidate* candidates; // Tokens not yet in the tokenizer, sorted
+    size_t num_candidates;
+    int failed;
+} VocabMergeJob;
+
+// Same delimiters and hash as cllm_tokenizer.c
+static inline int vocab_is_delim(char c) {
+    return c == ' ' || c == '\t' || c == '\n' || c == '\r';
+}
+
+static inline uint32_t vocab_hash(const char* str, size_t len) {
+    uint32_t hash = 2166136261u;
+    for (size_t i = 0; i < len; i++) {
+        hash ^= (unsigned char)str[i];
+        hash *= 16777619u;
+    }
+    return hash;
+}
+
+static inline int vocab_partition(uint32_t hash, int num_parts) {
+    return (int)(((uint64_t)hash * (uint64_t)num_parts) >> 32);
+}
+
+static int vocab_table_init(VocabTable* table, size_t capacity) {
+    table->entries = (VocabEntry*)calloc(capacity, sizeof(VocabEntry));
+    table->capacity = capacity;
+    table->used = 0;
+    return table->entries ? 0 : -1;
+}
+
+static int vocab_table_grow(VocabTable* table) {
+    VocabTable bigger;
+    if (vocab_table_init(&bigger, table->capacity * 2) != 0) return -1;
+    
+    size_t mask = bigger.capacity - 1;
+    for (size_t i = 0; i < table->capacity; i++) {
+        VocabEntry* e = &table->entries[i];
+        if (e->count == 0) continue;
+        size_t slot = e->hash & mask;
+        while (bigger.entries[slot].count != 0) slot = (slot + 1) & mask;
+        bigger.entries[slot] = *e;
+    }
+    
+    bigger.used = table->used;
+    free(table->entries);
+    *table = bigger;
+    return 0;
+}
+
+// Count one lowercased word (word[len] need not be NUL)
+static void vocab_counter_add(VocabCounter* counter, const char* word, size_t len) {
+    uint32_t hash = vocab_hash(word, len);
+    VocabTable* table = &counter->table;
+    
+    if (!table->entries && vocab_table_init(table, counter->initial_capacity) != 0) {
+        counter->failed = 1;
+        return;
+    }
+    
+    size_t mask = table->capacity - 1;
+    size_t slot = hash & mask;
+    while (table->entries[slot].count != 0) {
+        VocabEntry* e = &table->entries[slot];
+        if (e->hash == hash && e->len == len && memcmp(counter->arena + e->offset, word, len) == 0) {
+            e->count++;
+            return;
+        }
+        slot = (slot + 1) & mask;
+    }
+    
+    // New word: keep load factor <= 0.5
+    if ((table->used + 1) * 2 > table->capacity) {
+        if (vocab_table_grow(table) != 0) {
+            counter->failed = 1;
+            return;
+        }
+        mask = table->capacity - 1;
+        slot = hash & mask;
+        while (table->entries[slot].count != 0) slot = (slot + 1) & mask;
+    }
+    
+    if (counter->arena_used + len + 1 > counter->arena_capacity) {
+        size_t new_capacity = counter->arena_capacity ? counter->arena_capacity * 2 : 65536;
+        while (counter->arena_used + len + 1 > new_capacity) new_capacity *= 2;
+        char* new_arena = (char*)realloc(counter->arena, new_capacity);
+        if (!new_arena) {
+            counter->failed = 1;
+            return;
+        }
+        counter->arena = new_arena;
+        counter->arena_capacity = new_capacity;
+    }
+    
+    memcpy(counter->arena + counter->arena_used, word, len);
+    counter->arena[counter->arena_used + len] = '\0';
+    
+    VocabEntry* e = &table->entries[slot];
+    e->count = 1;
+    e->hash = hash;
+    e->len = (uint32_t)len;
+    e->offset = counter->arena_used;
+    counter->arena_used += len + 1;
+    table->used++;
+}
+
+// Count all words in one byte range
+static void vocab_count_range(VocabCounter* counter, const VocabRange* range,
+                              char** word, size_t* word_capacity) {
+    const char* p = range->data;
+    const char* end = range->data + range->len;
+    
+    while (p < end) {
+        while (p < end && vocab_is_delim(*p)) p++;
+        if (p >= end) break;
+        
+        const char* start = p;
+        while (p < end && !vocab_is_delim(*p)) p++;
+        size_t len = (size_t)(p - start);
+        
+        if (len + 1 > *word_capacity) {
+            size_t new_capacity = *word_capacity;
+            while (len + 1 > new_capacity) new_capacity *= 2;
+            char* new_word = (char*)realloc(*word, new_capacity);
+            if (!new_word) {
+                counter->failed = 1;
+                return;
+            }
+            *word = new_word;
+            *word_capacity = new_capacity;
+        }
+        
+        for (size_t i = 0; i < len; i++) {
+            (*word)[i] = tolower((unsigned char)start[i]);
+        }
+        vocab_counter_add(counter, *word, len);
+        counter->total_tokens++;
+    }
+}
+
+typedef struct {
+    VocabCountJob* job;
+    int thread_id;
+} VocabCountArg;
+
+static void* vocab_count_thread(void* arg) {
+    VocabCountArg* a = (VocabCountArg*)arg;
+    VocabCountJob* job = a->job;
+    VocabCounter* counter = &job->builder->counters[a->thread_id];
+    
+    size_t word_capacity = 256;
+    char* word = (char*)malloc(word_capacity);
+    if (!word) {
+        counter->failed = 1;
+        return NULL;
+    }
+    
+    for (;;) {
+        size_t i = atomic_fetch_add(&job->next_range, 1);
+        if (i >= job->num_ranges) break;
+        vocab_count_range(counter, &job->ranges[i], &word, &word_capacity);
+    }
+    
+    free(word);
+    return NULL;
+}
+
+// Split texts into whitespace-aligned ranges and count them on all threads
+static int vocab_count_ranges(CLLMVocabBuilder* builder, const VocabRange* texts, size_t num_texts) {
+    size_t total_bytes = 0;
+    for (size_t i = 0; i < num_texts; i++) total_bytes += texts[i].len;
+    if (total_bytes == 0) return 0;
+    
+    size_t chunk = total_bytes / ((size_t)builder->num_threads * VOCAB_CHUNKS_PER_THREAD);
+    if (chunk < VOCAB_MIN_CHUNK) chunk = VOCAB_MIN_CHUNK;
+    
+    // Upper bound: every text contributes at least one range
+    size_t max_ranges = num_texts + total_bytes / chunk + 1;
+    VocabRange* ranges = (VocabRange*)malloc(max_ranges * sizeof(VocabRange));
+    if (!ranges) return -1;
+    
+    size_t num_ranges = 0;
+    for (size_t i = 0; i < num_texts; i++) {
+        const char* p = texts[i].data;
+        const char* end = p + texts[i].len;
+        
+        while (p < end) {
+            const char* cut = (size_t)(end - p) > chunk ? p + chunk : end;
+            while (cut < end && !vocab_is_delim(*cut)) cut++;
+            ranges[num_ranges].data = p;
+            ranges[num_ranges].len = (size_t)(cut - p);
+            num_ranges++;
+            p = cut;
+        }
+    }
+    
+    VocabCountJob job;
+    job.builder = builder;
+    job.ranges = ranges;
+    job.num_ranges = num_ranges;
+    atomic_init(&job.next_range, 0);
+    
+    int num_threads = builder->num_threads;
+    if ((size_t)num_threads > num_ranges) num_threads = (int)num_ranges;
+    
+    // Tables not yet allocated start at a size matching each thread's share
+    size_t capacity = VOCAB_MIN_TABLE;
+    size_t share = total_bytes / num_threads / VOCAB_BYTES_PER_SLOT;
+    while (capacity < share && capacity < VOCAB_MAX_INITIAL_TABLE) capacity *= 2;
+    for (int t = 0; t < num_threads; t++) {
+        if (!builder->counters[t].table.entries) builder->counters[t].initial_capacity = capacity;
+    }
+    
+    VocabCountArg args[num_threads];
+    pthread_t threads[num_threads];
+    int started = 0;
+    for (int t = 1; t < num_threads; t++) {
+        args[t].job = &job;
+        args[t].thread_id = t;
+        if (pthread_create(&threads[t], NULL, vocab_count_thread, &args[t]) != 0) break;
+        started = t;
+    }
+    
+    // Calling thread is worker 0
+    args[0].job = &job;
+    args[0].thread_id = 0;
+    vocab_count_thread(&args[0]);
+    
+    for (int t = 1; t <= started; t++) {
+        pthread_join(threads[t], NULL);
+    }
+    
+    free(ranges);
+    
+    int failed = 0;
+    for (int t = 0; t < builder->num_threads; t++) {
+        failed |= builder->counters[t].failed;
+    }
+    return failed ? -1 : 0;
+}
+
+CLLMVocabBuilder* cllm_vocab_builder_create(int num_threads) {
+    if (num_threads <= 0) {
+        long cpus = sysconf(_SC_NPROCESSORS_ONLN);
+        num_threads = cpus > 0 ? (int)cpus : 1;
+    }
+    
+    CLLMVocabBuilder* builder = (CLLMVocabBuilder*)calloc(1, sizeof(CLLMVocabBuilder));
+    if (!builder) return NULL;
+    
+    builder->num_threads = num_threads;
+    builder->counters = (VocabCounter*)calloc(num_threads, sizeof(VocabCounter));
+    if (!builder->counters) {
+        free(builder);
+        return NULL;
+    }
+    
+    for (int t = 0; t < num_threads; t++) {
+        builder->counters[t].initial_capacity = VOCAB_MIN_TABLE;
+    }
+    
+    return builder;
+}
+
+void cllm_vocab_builder_free(CLLMVocabBuilder* builder) {
+    if (!builder) return;
+    
+    for (int t = 0; builder->counters && t < builder->num_threads; t++) {
+        VocabCounter* counter = &builder->counters[t];
+        free(counter->table.entries);
+        free(counter->order);
+        free(counter->part_start);
+        free(counter->arena);
+    }
+    
+    free(builder->counters);
+    free(builder);
+}
+
+int cllm_vocab_builder_add_texts(CLLMVocabBuilder* builder, const char* const* texts, size_t num_texts) {
+    if (!builder || (!texts && num_texts > 0)) return -1;
+    
+    VocabRange* ranges = (VocabRange*)malloc((num_texts ? num_texts : 1) * sizeof(VocabRange));
+    if (!ranges) return -1;
+    
+    size_t n = 0;
+    for (size_t i = 0; i < num_texts; i++) {
+        if (!texts[i]) continue;
+        ranges[n].data = texts[i];
+        ranges[n].len = strlen(texts[i]);
+        n++;
+    }
+    
+    int rc = vocab_count_ranges(builder, ranges, n);
+    free(ranges);
+    return rc;
+}
+
+int cllm_vocab_builder_add_files(CLLMVocabBuilder* builder, const char* const* paths, size_t num_paths) {
+    if (!builder || (!paths && num_paths > 0)) return -1;
+    
+    VocabRange ranges[VOCAB_FILE_BATCH];
+    void* maps[VOCAB_FILE_BATCH];
+    size_t map_sizes[VOCAB_FILE_BATCH];
+    int files_counted = 0;
+    
+    // Map a batch of files at a time to stay under the mapping limit
+    for (size_t base = 0; base < num_paths; base += VOCAB_FILE_BATCH) {
+        size_t batch = num_paths - base < VOCAB_FILE_BATCH ? num_paths - base : VOCAB_FILE_BATCH;
+        size_t n = 0;
+        
+        for (size_t i = 0; i < batch; i++) {
+            int fd = open(paths[base + i], O_RDONLY);
+            if (fd < 0) {
+                fprintf(stderr, "Warning: Failed to open %s\n", paths[base + i]);
+                continue;
+            }
+            
+            struct stat st;
+            if (fstat(fd, &st) == 0 && S_ISREG(st.st_mode)) {
+                files_counted++;
+                if (st.st_size > 0) {
+                    void* map = mmap(NULL, st.st_size, PROT_READ, MAP_PRIVATE, fd, 0);
+                    if (map != MAP_FAILED) {
+                        madvise(map, st.st_size, MADV_SEQUENTIAL);
+                        
+                        // Text ends at the first NUL, as when read into a C string
+                        const char* nul = memchr(map, '\0', st.st_size);
+                        maps[n] = map;
+                        map_sizes[n] = st.st_size;
+                        ranges[n].data = (const char*)map;
+                        ranges[n].len = nul ? (size_t)(nul - (const char*)map) : (size_t)st.st_size;
+                        n++;
+                    } else {
+                        files_counted--;
+                    }
+                }
+            }
+            close(fd);
+        }
+        
+        int rc = vocab_count_ranges(builder, ranges, n);
+        for (size_t i = 0; i < n; i++) {
+            munmap(maps[i], map_sizes[i]);
+        }
+        if (rc != 0) return -1;
+    }
+    
+    return files_counted;
+}
+
+// Highest count first; ties broken by bytes so the order is total
+static int vocab_candidate_compare(const void* a, const void* b) {
+    const VocabCandidate* x = (const VocabCandidate*)a;
+    const VocabCandidate* y = (const VocabCandidate*)b;
+    
+    if (x->count != y->count) return x->count > y->count ? -1 : 1;
+    
+    uint32_t len = x->len < y->len ? x->len : y->len;
+    int cmp = memcmp(x->str, y->str, len);
+    if (cmp != 0) return cmp;
+    return (x->len > y->len) - (x->len < y->len);
+}
+
+static inline uint32_t vocab_saturate(uint64_t count) {
+    return count > UINT32_MAX ? UINT32_MAX : (uint32_t)count;
+}
+
+// Run jobs[0..n) on n threads; job 0, and any job whose thread fails to start, run here
+static void vocab_run_jobs(void* jobs, size_t job_size, int n, void* (*fn)(void*)) {
+    pthread_t threads[n];
+    int started[n];
+    
+    for (int i = 0; i < n; i++) {
+        started[i] = i > 0 && pthread_create(&threads[i], NULL, fn, (char*)jobs + i * job_size) == 0;
+    }
+    for (int i = 0; i < n; i++) {
+        if (!started[i]) fn((char*)jobs + i * job_size);
+    }
+    for (int i = 1; i < n; i++) {
+        if (started[i]) pthread_join(threads[i], NULL);
+    }
+}
+
+// Group one counter's occupied slots by merge partition (counting sort)
+static void* vocab_split_thread(void* arg) {
+    VocabSplitJob* job = (VocabSplitJob*)arg;
+    VocabCounter* counter = job->counter;
+    VocabTable* table = &counter->table;
+    
+    counter->part_start = (size_t*)calloc(job->num_parts + 1, sizeof(size_t));
+    counter->order = (size_t*)malloc((table->used ? table->used : 1) * sizeof(size_t));
+    if (!counter->part_start || !counter->order) {
+        counter->failed = 1;
+        return NULL;
+    }
+    
+    for (size_t i = 0; i < table->capacity; i++) {
+        if (table->entries[i].count == 0) continue;
+        counter->part_start[vocab_partition(table->entries[i].hash, job->num_parts) + 1]++;
+    }
+    for (int p = 0; p < job->num_parts; p++) {
+        counter->part_start[p + 1] += counter->part_start[p];
+    }
+    
+    size_t next[job->num_parts];
+    memcpy(next, counter->part_start, job->num_parts * sizeof(size_t));
+    for (size_t i = 0; i < table->capacity; i++) {
+        if (table->entries[i].count == 0) continue;
+        counter->order[next[vocab_partition(table->entries[i].hash, job->num_parts)]++] = i;
+    }
+    
+    return NULL;
+}
+
+// Reduce: merge partition p of every counter, credit known tokens, sort the rest
+static void* vocab_merge_thread(void* arg) {
+    VocabMergeJob* job = (VocabMergeJob*)arg;
+    CLLMVocabBuilder* builder = job->builder;
+    int p = job->partition;
+    
+    size_t total = 0;
+    for (int t = 0; t < builder->num_threads; t++) {
+        VocabCounter* counter = &builder->counters[t];
+        if (counter->failed) {
+            job->failed = 1;
+            return NULL;
+        }
+        if (counter->part_start) total += counter->part_start[p + 1] - counter->part_start[p];
+    }
+    
+    size_t capacity = VOCAB_MIN_TABLE;
+    while (capacity < total * 2) capacity *= 2;
+    
+    VocabTable merged;
+    if (vocab_table_init(&merged, capacity) != 0) {
+        job->failed = 1;
+        return NULL;
+    }
+    
+    // Merged entries reuse `offset` as (counter index) so strings stay in place
+    const char** strs = NULL;
+    size_t num_unique = 0;
+    
+    for (int t = 0; t < builder->num_threads && !job->failed; t++) {
+        VocabCounter* counter = &builder->counters[t];
+        if (!counter->part_start) continue;
+        
+        for (size_t k = counter->part_start[p]; k < counter->part_start[p + 1]; k++) {
+            VocabEntry* e = &counter->table.entries[counter->order[k]];
+            const char* str = counter->arena + e->offset;
+            
+            size_t mask = merged.capacity - 1;
+            size_t slot = e->hash & mask;
+            while (merged.entries[slot].count != 0) {
+                VocabEntry* m = &merged.entries[slot];
+                if (m->hash == e->hash && m->len == e->len && memcmp(strs[m->offset], str, e->len) == 0) break;
+                slot = (slot + 1) & mask;
+            }
+            
+            VocabEntry* m = &merged.entries[slot];
+            if (m->count != 0) {
+                m->count += e->count;
+                continue;
+            }
+            
+            if ((num_unique & (num_unique - 1)) == 0) {
+                const char** new_strs = (const char**)realloc(strs, (num_unique ? num_unique * 2 : 1) * sizeof(char*));
+                if (!new_strs) {
+                    job->failed = 1;
+                    break;
+                }
+                strs = new_strs;
+            }
+            strs[num_unique] = str;
+            *m = *e;
+            m->offset = num_unique++;
+        }
+    }
+    
+    if (job->failed) {
+        free(merged.entries);
+        free(strs);
+        return NULL;
+    }
+    
+    job->candidates = (VocabCandidate*)malloc((num_unique ? num_unique : 1) * sizeof(VocabCandidate));
+    if (!job->candidates) {
+        job->failed = 1;
+        free(merged.entries);
+        free(strs);
+        return NULL;
+    }
+    
+    // Tokens already in the vocabulary only gain counts. Each string lives in
+    // exactly one partition, so these updates never touch the same ID twice.
+    for (size_t i = 0; i < merged.capacity; i++) {
+        VocabEntry* m = &merged.entries[i];
+        if (m->count == 0) continue;
+        
+        const char* str = strs[m->offset];
+        uint32_t id = cllm_find_token(job->tokenizer, str);
+        if (id != VOCAB_UNK_ID) {
+            uint64_t total = (uint64_t)job->tokenizer->token_counts[id] + m->count;
+            job->tokenizer->token_counts[id] = vocab_saturate(total);
+            continue;
+        }
+        
+        VocabCandidate* c = &job->candidates[job->num_candidates++];
+        c->str = str;
+        c->len = m->len;
+        c->hash = m->hash;
+        c->count = m->count;
+    }
+    
+    qsort(job->candidates, job->num_candidates, sizeof(VocabCandidate), vocab_candidate_compare);
+    
+    free(merged.entries);
+    free(strs);
+    return NULL;
+}
+
+uint32_t cllm_vocab_builder_finish(CLLMVocabBuilder* builder, CLLMTokenizer* tokenizer) {
+    if (!builder || !tokenizer) return 0;
+    
+    int num_parts = builder->num_threads;
+    
+    // Group every counter that saw words by partition, then merge each partition
+    VocabSplitJob splits[num_parts];
+    int num_splits = 0;
+    for (int t = 0; t < builder->num_threads; t++) {
+        if (!builder->counters[t].table.entries) continue;
+        splits[num_splits].counter = &builder->counters[t];
+        splits[num_splits].num_parts = num_parts;
+        num_splits++;
+    }
+    if (num_splits > 0) vocab_run_jobs(splits, sizeof(VocabSplitJob), num_splits, vocab_split_thread);
+    
+    VocabMergeJob jobs[num_parts];
+    for (int p = 0; p < num_parts; p++) {
+        memset(&jobs[p], 0, sizeof(VocabMergeJob));
+        jobs[p].builder = builder;
+        jobs[p].tokenizer = tokenizer;
+        jobs[p].partition = p;
+    }
+    vocab_run_jobs(jobs, sizeof(VocabMergeJob), num_parts, vocab_merge_thread);
+    
+    // Prune: k-way merge of the sorted partitions until the vocabulary is full
+    size_t heads[num_parts];
+    memset(heads, 0, sizeof(heads));
+    
+    while (tokenizer->vocab_size < tokenizer->max_vocab_size) {
+        int best = -1;
+        for (int p = 0; p < num_parts; p++) {
+            if (jobs[p].failed || heads[p] >= jobs[p].num_candidates) continue;
+            if (best < 0 || vocab_candidate_compare(&jobs[p].candidates[heads[p]],
+                                                    &jobs[best].candidates[heads[best]]) < 0) {
+                best = p;
+            }
+        }
+        if (best < 0) break;
+        
+        VocabCandidate* c = &jobs[best].candidates[heads[best]++];
+        uint32_t id = cllm_add_token(tokenizer, c->str);
+        if (id == VOCAB_UNK_ID) break;
+        tokenizer->token_counts[id] = vocab_saturate(c->count);
+    }
+    
+    for (int p = 0; p < num_parts; p++) {
+        if (jobs[p].failed) {
+            fprintf(stderr, "Warning: Vocabulary merge ran out of memory (partition %d)\n", p);
+        }
+        free(jobs[p].candidates);
+    }
+    
+    // Counts are consumed; the builder can be reused for a new corpus, which
+    // allocates fresh tables sized by its own input
+    for (int t = 0; t < builder->num_threads; t++) {
+        VocabCounter* counter = &builder->counters[t];
+        builder->total_tokens += counter->total_tokens;
+        counter->total_tokens = 0;
+        counter->arena_used = 0;
+        counter->failed = 0;
+        free(counter->table.entries);
+        free(counter->order);
+        free(counter->part_start);
+        memset(&counter->table, 0, sizeof(VocabTable));
+        counter->order = NULL;
+        counter->part_start = NULL;
+        counter->initial_capacity = VOCAB_MIN_TABLE;
+    }
+    
+    return tokenizer->vocab_size;
+}
+
+void cllm_build_vocab_parallel(CLLMTokenizer* tokenizer, const char* const* texts,
+                               size_t num_texts, int num_threads) {
+    if (!tokenizer || !texts) return;
+    
+    CLLMVocabBuilder* builder = cllm_vocab_builder_create(num_threads);
+    if (!builder) return;
+    
+    if (cllm_vocab_builder_add_texts(builder, texts, num_texts) == 0) {
+        cllm_vocab_builder_finish(builder, tokenizer);
+    }
+    
+    cllm_vocab_builder_free(builder);
+}
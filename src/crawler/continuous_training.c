@@ -1,16 +1,20 @@
 /**
  * Continuous Training System
  * 
- * Monitors training queue and trains on new files as they arrive
+ * Trains on token files as the tokenizer hands them over. Worker threads
+ * map incoming files and add their tokens to the next round; a single
+ * trainer thread keeps one ThreadedTrainingSystem alive and trains each
+ * round on the new tokens mixed with tokens replayed from earlier files.
+ * Files that arrive while a round runs are trained together in the next.
  */
 
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
-#include <dirent.h>
 #include <unistd.h>
 #include <pthread.h>
 #include <sys/stat.h>
+#include <stdbool.h>
 #include <time.h>
 #include "cllm_training.h"
 #include "cllm.h"
@@ -18,9 +22,17 @@
 #include "cllm_utils.h"
 #include "cllm_training_threaded.h"
 #include "cllm_batch.h"
+#include "cllm_data_loader.h"
 #include "cllm_model_manager.h"
+#include "stage_queue.h"
 
-#define MAX_TOKENS_PER_FILE 100000
+#define CONTINUOUS_EPOCHS 5                     // Passes over each round
+#define CONTINUOUS_ROUND_TOKENS (256 * 1024)    // New tokens per round before ingestion waits
+#define CONTINUOUS_REPLAY_TOKENS (1024 * 1024)  // Most recent tokens kept for replay
+#define CONTINUOUS_REPLAY_RATIO 1               // Replayed tokens per new token
+
+typedef struct TokenizerState TokenizerState;
+uint32_t tokenizer_vocab_match(TokenizerState* state, uint32_t fingerprint);
 
 /**
  * Get current timestamp string
@@ -39,156 +51,253 @@ typedef struct {
     int running;
     int files_trained;
     int num_threads;
+    StageQueue* input;      // Token files from the tokenizer
+    TokenizerState* vocab_source;   // Tokenizer whose vocabulary the files use (NULL = unknown)
+    time_t started;         // Older token files are recovered from disk
+    bool recovered;         // Startup recovery claimed by a thread
+    
+    // Next round, filled by the worker threads (under lock)
+    uint32_t* fresh;                // Tokens not trained yet
+    size_t fresh_count;
+    size_t fresh_capacity;
+    char** pending;                 // Their token files, moved to trained/ after the round
+    size_t num_pending;
+    size_t pending_capacity;
+    pthread_cond_t fresh_ready;     // Fresh tokens arrived, or stopping
+    pthread_cond_t fresh_room;      // The trainer took the fresh tokens, or stopping
+    
+    // Trainer thread state
+    ThreadedTrainingSystem* system; // Created for the first round, kept until cleanup
+    pthread_t trainer;
+    bool trainer_started;
+    uint32_t* replay;               // Ring of the most recent trained tokens
+    size_t replay_count;
+    size_t replay_head;             // Next write position
+    unsigned int replay_seed;
+    
     pthread_mutex_t lock;
 } ContinuousTrainingState;
 
 /**
- * Check if file is locked by another thread
+ * Map a token file written by the tokenizer
+ * 
+ * IDs are checked against the vocabulary: a file whose fingerprint the
+ * tokenizer recognizes needs no further checks, otherwise every ID must
+ * be within the model's vocabulary. Text token files from older versions
+ * are removed; the tokenizer recreates them from preprocessed/ at startup.
+ * 
+ * @return Mapped dataset (free with cllm_token_dataset_free), NULL on error
  */
-static int is_file_locked(const char* filepath) {
-    char lockpath[2048];
-    snprintf(lockpath, sizeof(lockpath), "%s.lock", filepath);
-    return access(lockpath, F_OK) == 0;
+static TokenDataset* load_token_file(ContinuousTrainingState* state, const char* filepath) {
+    char timestamp[32];
+    TokenDataset* dataset = cllm_token_dataset_mmap(filepath);
+    
+    if (!dataset) {
+        FILE* f = fopen(filepath, "r");
+        int first = f ? fgetc(f) : EOF;
+        if (f) fclose(f);
+        
+        get_timestamp(timestamp, sizeof(timestamp));
+        if (first == '#') {
+            fprintf(stderr, "%s Discarding text token file from an older version: %s\n", timestamp, filepath);
+            unlink(filepath);
+        } else {
+            fprintf(stderr, "%s Cannot map token file: %s\n", timestamp, filepath);
+        }
+        return NULL;
+    }
+    
+    if (dataset->num_tokens == 0) {
+        get_timestamp(timestamp, sizeof(timestamp));
+        fprintf(stderr, "%s No tokens in: %s\n", timestamp, filepath);
+        cllm_token_dataset_free(dataset);
+        return NULL;
+    }
+    
+    uint32_t id_limit = 0;
+    if (state->vocab_source) {
+        id_limit = tokenizer_vocab_match(state->vocab_source, dataset->vocab_hash);
+        if (id_limit == 0) {
+            get_timestamp(timestamp, sizeof(timestamp));
+            fprintf(stderr, "%s Token file from a different vocabulary: %s\n", timestamp, filepath);
+            cllm_token_dataset_free(dataset);
+            return NULL;
+        }
+    }
+    
+    uint32_t vocab_size = state->model->vocab_size;
+    if (id_limit == 0 || id_limit > vocab_size) {
+        for (size_t i = 0; i < dataset->num_tokens; i++) {
+            if (cllm_token_dataset_get(dataset, i) >= vocab_size) {
+                get_timestamp(timestamp, sizeof(timestamp));
+                fprintf(stderr, "%s Token ID %u exceeds the model vocabulary (%u): %s\n",
+                        timestamp, cllm_token_dataset_get(dataset, i), vocab_size, filepath);
+                cllm_token_dataset_free(dataset);
+                return NULL;
+            }
+        }
+    }
+    
+    return dataset;
 }
 
+
 /**
- * Create lock file
+ * Move file to trained directory
  */
-static int create_lock(const char* filepath) {
-    char lockpath[2048];
-    snprintf(lockpath, sizeof(lockpath), "%s.lock", filepath);
+static int move_to_trained(const char* data_dir, const char* filename) {
+    char src[2048];
+    char dst[2048];
+    
+    snprintf(src, sizeof(src), "%s/training_queue/%s", data_dir, filename);
+    snprintf(dst, sizeof(dst), "%s/trained/%s", data_dir, filename);
     
-    FILE* f = fopen(lockpath, "w");
-    if (!f) return -1;
+    if (rename(src, dst) != 0) {
+        fprintf(stderr, "Failed to move file: %s\n", filename);
+        return -1;
+    }
     
-    fprintf(f, "%d\n", getpid());
-    fclose(f);
+    printf("✓ Moved to trained: %s\n", filename);
     return 0;
 }
 
 /**
- * Remove lock file
+ * Recovery filter: clear the lock file older versions left next to
+ * token files (the queue now hands each file to exactly one thread)
  */
-static void remove_lock(const char* filepath) {
+static bool training_needs_file(const char* path, void* user_data) {
+    (void)user_data;
     char lockpath[2048];
-    snprintf(lockpath, sizeof(lockpath), "%s.lock", filepath);
+    snprintf(lockpath, sizeof(lockpath), "%s.lock", path);
     unlink(lockpath);
+    return true;
 }
 
 /**
- * Load tokens from file
+ * Add the tokens of one token file to the next round
+ * 
+ * Waits while the next round is full, so a busy trainer holds back the
+ * queue instead of buffering without bound.
+ * 
+ * @return 0 on success, -1 if the file is unusable or training stopped
  */
-static int load_tokens_from_file(const char* filepath, uint32_t** tokens, size_t* num_tokens) {
-    FILE* f = fopen(filepath, "r");
-    if (!f) {
-        char timestamp[32];
-        get_timestamp(timestamp, sizeof(timestamp));
-        fprintf(stderr, "%s Cannot open: %s\n", timestamp, filepath);
-        return -1;
-    }
-    
-    // Skip header lines and read token line
-    char line[4096];
-    int found = 0;
-    while (fgets(line, sizeof(line), f)) {
-        if (line[0] != '#') {
-            found = 1;
-            break;
-        }
-    }
-    fclose(f);
+static int ingest_token_file(ContinuousTrainingState* state, const char* filepath) {
+    TokenDataset* dataset = load_token_file(state, filepath);
+    if (!dataset) return -1;
     
-    if (!found) {
-        char timestamp[32];
-        get_timestamp(timestamp, sizeof(timestamp));
-        fprintf(stderr, "%s No tokens in: %s\n", timestamp, filepath);
-        return -1;
-    }
+    const char* filename = strrchr(filepath, '/');
+    char* name = strdup(filename ? filename + 1 : filepath);
+    int result = -1;
     
-    // Count tokens
-    int count = 0;
-    char* p = line;
-    while (*p) {
-        while (*p && (*p == ' ' || *p == '\t' || *p == '\n')) p++;
-        if (*p) {
-            count++;
-            while (*p && *p != ' ' && *p != '\t' && *p != '\n') p++;
-        }
-    }
+    pthread_mutex_lock(&state->lock);
     
-    if (count == 0) {
-        return -1;
+    while (state->running && state->fresh_count > 0 &&
+           state->fresh_count + dataset->num_tokens > CONTINUOUS_ROUND_TOKENS) {
+        pthread_cond_wait(&state->fresh_room, &state->lock);
     }
     
-    // Allocate
-    *tokens = (uint32_t*)malloc(count * sizeof(uint32_t));
-    if (!*tokens) return -1;
-    
-    // Parse tokens
-    int i = 0;
-    p = line;
-    char token[256];
-    while (*p && i < count) {
-        while (*p && (*p == ' ' || *p == '\t' || *p == '\n')) p++;
-        if (!*p) break;
-        
-        int j = 0;
-        while (*p && *p != ' ' && *p != '\t' && *p != '\n' && j < 255) {
-            token[j++] = *p++;
+    if (state->running && name) {
+        size_t needed = state->fresh_count + dataset->num_tokens;
+        if (needed > state->fresh_capacity) {
+            size_t capacity = state->fresh_capacity ? state->fresh_capacity : 4096;
+            while (capacity < needed) capacity *= 2;
+            uint32_t* fresh = (uint32_t*)realloc(state->fresh, capacity * sizeof(uint32_t));
+            if (fresh) {
+                state->fresh = fresh;
+                state->fresh_capacity = capacity;
+            }
+        }
+        if (state->num_pending == state->pending_capacity) {
+            size_t capacity = state->pending_capacity ? state->pending_capacity * 2 : 16;
+            char** pending = (char**)realloc(state->pending, capacity * sizeof(char*));
+            if (pending) {
+                state->pending = pending;
+                state->pending_capacity = capacity;
+            }
         }
-        token[j] = '\0';
         
-        // Hash to ID
-        unsigned long hash = 5381;
-        for (char* tp = token; *tp; tp++) {
-            hash = ((hash << 5) + hash) + *tp;
+        if (needed <= state->fresh_capacity && state->num_pending < state->pending_capacity) {
+            for (size_t i = 0; i < dataset->num_tokens; i++) {
+                state->fresh[state->fresh_count++] = cllm_token_dataset_get(dataset, i);
+            }
+            state->pending[state->num_pending++] = name;
+            pthread_cond_signal(&state->fresh_ready);
+            result = 0;
         }
-        (*tokens)[i++] = (uint32_t)(hash % 10000);
     }
     
-    *num_tokens = i;
-    return 0;
+    pthread_mutex_unlock(&state->lock);
+    
+    if (result != 0) free(name);
+    cllm_token_dataset_free(dataset);
+    return result;
 }
 
-
 /**
- * Train on one file
+ * Build the token stream of one round: the new tokens followed by chunks
+ * sampled from the replay ring. The new tokens then join the ring.
+ * 
+ * Chunks are one batch long so sampled sequences stay contiguous.
+ * 
+ * @return Round tokens (caller frees), NULL on error
  */
-static int train_on_file(ContinuousTrainingState* state, const char* filepath) {
-    printf("\n=== Training on file ===\n");
-    printf("File: %s\n", filepath);
+static uint32_t* build_round(ContinuousTrainingState* state, const uint32_t* fresh,
+                             size_t fresh_count, size_t* round_count, size_t* replayed) {
+    if (!state->replay) {
+        state->replay = (uint32_t*)malloc(CONTINUOUS_REPLAY_TOKENS * sizeof(uint32_t));
+        if (!state->replay) return NULL;
+    }
     
-    // Load tokens
-    uint32_t* tokens = NULL;
-    size_t num_tokens = 0;
+    size_t chunk = (size_t)state->training->config.batch_size * state->training->config.sequence_length;
+    if (chunk == 0) chunk = 1;
+    size_t replay_tokens = fresh_count * CONTINUOUS_REPLAY_RATIO;
+    if (replay_tokens > state->replay_count) replay_tokens = state->replay_count;
+    replay_tokens -= replay_tokens % chunk;
     
-    if (load_tokens_from_file(filepath, &tokens, &num_tokens) != 0) {
-        fprintf(stderr, "Failed to load tokens from: %s\n", filepath);
-        return -1;
-    }
+    uint32_t* round = (uint32_t*)malloc((fresh_count + replay_tokens) * sizeof(uint32_t));
+    if (!round) return NULL;
     
-    printf("Loaded %zu tokens\n", num_tokens);
+    memcpy(round, fresh, fresh_count * sizeof(uint32_t));
     
-    // Update training data
-    if (state->training->tokens) {
-        free(state->training->tokens);
+    size_t oldest = (state->replay_head + CONTINUOUS_REPLAY_TOKENS - state->replay_count) % CONTINUOUS_REPLAY_TOKENS;
+    for (size_t filled = 0; filled < replay_tokens; filled += chunk) {
+        size_t start = (size_t)rand_r(&state->replay_seed) % (state->replay_count - chunk + 1);
+        for (size_t j = 0; j < chunk; j++) {
+            round[fresh_count + filled + j] = state->replay[(oldest + start + j) % CONTINUOUS_REPLAY_TOKENS];
+        }
     }
-    state->training->tokens = tokens;
-    state->training->num_tokens = num_tokens;
     
-    // Train for N epochs using parallel system
-    int epochs = 5;
-    float total_loss = 0.0f;
+    for (size_t i = 0; i < fresh_count; i++) {
+        state->replay[state->replay_head] = fresh[i];
+        state->replay_head = (state->replay_head + 1) % CONTINUOUS_REPLAY_TOKENS;
+    }
+    state->replay_count += fresh_count;
+    if (state->replay_count > CONTINUOUS_REPLAY_TOKENS) state->replay_count = CONTINUOUS_REPLAY_TOKENS;
     
-    // Create parallel training system (use all available cores)
-    int num_threads = sysconf(_SC_NPROCESSORS_ONLN);
-    if (num_threads > 1) num_threads--;  // Reserve 1 for main thread
-    if (num_threads < 1) num_threads = 1;
+    *round_count = fresh_count + replay_tokens;
+    *replayed = replay_tokens;
+    return round;
+}
+
+/**
+ * Train one round and move its token files to trained/
+ */
+static int train_round(ContinuousTrainingState* state, const uint32_t* fresh, size_t fresh_count,
+                       char** pending, size_t num_pending) {
+    size_t round_count = 0;
+    size_t replayed = 0;
+    uint32_t* round = build_round(state, fresh, fresh_count, &round_count, &replayed);
+    if (!round) {
+        fprintf(stderr, "Failed to build training round\n");
+        return -1;
+    }
+    
+    printf("\n=== Training round ===\n");
+    printf("Files: %zu, new tokens: %zu, replayed tokens: %zu\n", num_pending, fresh_count, replayed);
     
-    // Create batch iterator
     CLLMBatchIterator* batch_iterator = cllm_batch_iterator_create(
-        state->training->tokens,
-        state->training->num_tokens,
+        round,
+        round_count,
         state->training->config.batch_size,
         state->training->config.sequence_length,
         0,  // shuffle = false
@@ -197,36 +306,41 @@ static int train_on_file(ContinuousTrainingState* state, const char* filepath) {
     
     if (!batch_iterator) {
         fprintf(stderr, "Failed to create batch iterator\n");
+        free(round);
         return -1;
     }
     
-    // Create parallel training system
-    ThreadedTrainingSystem* threaded_system = threaded_training_create(
-        state->training,
-        batch_iterator,
-        num_threads
-    );
-    
-    if (!threaded_system) {
-        fprintf(stderr, "Failed to create parallel training system\n");
-        cllm_batch_iterator_free(batch_iterator);
-        return -1;
+    if (!state->system) {
+        // Create parallel training system once (use all available cores)
+        int num_threads = sysconf(_SC_NPROCESSORS_ONLN);
+        if (num_threads > 1) num_threads--;  // Reserve 1 for main thread
+        if (num_threads < 1) num_threads = 1;
+        
+        state->system = threaded_training_create(state->training, batch_iterator, num_threads);
+        if (!state->system) {
+            fprintf(stderr, "Failed to create parallel training system\n");
+            cllm_batch_iterator_free(batch_iterator);
+            free(round);
+            return -1;
+        }
+        printf("Using %d parallel workers for training\n", num_threads);
+    } else {
+        threaded_training_set_batch_iterator(state->system, batch_iterator);
     }
     
-    printf("Using %d parallel workers for training\n", num_threads);
-    
-    for (int epoch = 0; epoch < epochs; epoch++) {
+    float total_loss = 0.0f;
+    for (int epoch = 0; epoch < CONTINUOUS_EPOCHS; epoch++) {
         // Use parallel training (crystalline loss, multi-threaded)
-        float loss = threaded_train_epoch_lockfree(threaded_system, epoch);
+        float loss = threaded_train_epoch_lockfree(state->system, epoch);
         total_loss += loss;
-        printf("  Epoch %d/%d: loss = %.4f\n", epoch + 1, epochs, loss);
+        printf("  Epoch %d/%d: loss = %.4f\n", epoch + 1, CONTINUOUS_EPOCHS, loss);
     }
     
-    // Cleanup parallel system
-    threaded_training_free(threaded_system);
+    threaded_training_set_batch_iterator(state->system, NULL);
     cllm_batch_iterator_free(batch_iterator);
+    free(round);
     
-    float avg_loss = total_loss / epochs;
+    float avg_loss = total_loss / CONTINUOUS_EPOCHS;
     printf("✓ Training complete: avg loss = %.4f\n", avg_loss);
     
     // Save model
@@ -235,86 +349,121 @@ static int train_on_file(ContinuousTrainingState* state, const char* filepath) {
         printf("✓ Model saved: %s\n", state->model_path);
     }
     
+    for (size_t i = 0; i < num_pending; i++) {
+        move_to_trained(state->data_dir, pending[i]);
+    }
+    
+    pthread_mutex_lock(&state->lock);
+    state->files_trained += (int)num_pending;
+    pthread_mutex_unlock(&state->lock);
+    
     return 0;
 }
 
 /**
- * Move file to trained directory
+ * Trainer thread: trains a round whenever new tokens are waiting
+ * 
+ * Tokens not trained when training stops stay in training_queue/ and are
+ * recovered on the next start.
  */
-static int move_to_trained(const char* data_dir, const char* filename) {
-    char src[2048];
-    char dst[2048];
+static void* training_service_thread(void* arg) {
+    ContinuousTrainingState* state = (ContinuousTrainingState*)arg;
     
-    snprintf(src, sizeof(src), "%s/training_queue/%s", data_dir, filename);
-    snprintf(dst, sizeof(dst), "%s/trained/%s", data_dir, filename);
+    for (;;) {
+        pthread_mutex_lock(&state->lock);
+        while (state->running && state->fresh_count == 0) {
+            pthread_cond_wait(&state->fresh_ready, &state->lock);
+        }
+        if (!state->running) {
+            pthread_mutex_unlock(&state->lock);
+            break;
+        }
+        
+        // Take the round, workers start filling the next one
+        uint32_t* fresh = state->fresh;
+        size_t fresh_count = state->fresh_count;
+        char** pending = state->pending;
+        size_t num_pending = state->num_pending;
+        state->fresh = NULL;
+        state->fresh_count = state->fresh_capacity = 0;
+        state->pending = NULL;
+        state->num_pending = state->pending_capacity = 0;
+        pthread_cond_broadcast(&state->fresh_room);
+        pthread_mutex_unlock(&state->lock);
+        
+        train_round(state, fresh, fresh_count, pending, num_pending);
+        
+        for (size_t i = 0; i < num_pending; i++) {
+            free(pending[i]);
+        }
+        free(pending);
+        free(fresh);
+    }
     
-    if (rename(src, dst) != 0) {
-        fprintf(stderr, "Failed to move file: %s\n", filename);
-        return -1;
+    return NULL;
+}
+
+/**
+ * Add one token file to the next training round
+ */
+static void training_handle_file(StageDoc* doc, void* user_data) {
+    ContinuousTrainingState* state = (ContinuousTrainingState*)user_data;
+    
+    if (ingest_token_file(state, doc->path) != 0) {
+        fprintf(stderr, "Failed to load tokens from: %s\n", doc->path);
     }
     
-    printf("✓ Moved to trained: %s\n", filename);
-    return 0;
+    stage_doc_free(doc);
+}
+
+/**
+ * Set the queue of token files (before starting threads)
+ */
+void continuous_training_set_queue(ContinuousTrainingState* state, StageQueue* input) {
+    if (!state) return;
+    state->input = input;
+    state->started = time(NULL);
+}
+
+/**
+ * Set the tokenizer whose vocabulary token files refer to (before starting
+ * threads), so their fingerprints can be checked
+ */
+void continuous_training_set_vocab(ContinuousTrainingState* state, TokenizerState* tokenizer) {
+    if (!state) return;
+    state->vocab_source = tokenizer;
 }
 
 /**
- * Training worker thread
+ * Worker thread: maps token files from the queue into the next round
  */
 static void* training_worker_thread(void* arg) {
     ContinuousTrainingState* state = (ContinuousTrainingState*)arg;
     
-    char queue_dir[2048];
-    snprintf(queue_dir, sizeof(queue_dir), "%s/training_queue", state->data_dir);
+    pthread_mutex_lock(&state->lock);
+    bool recover = !state->recovered;
+    state->recovered = true;
+    pthread_mutex_unlock(&state->lock);
+    
+    if (recover) {
+        char queue_dir[2048];
+        snprintf(queue_dir, sizeof(queue_dir), "%s/training_queue", state->data_dir);
+        int recovered = stage_queue_recover(state->input, queue_dir, ".tok", state->started,
+                                            training_needs_file, training_handle_file, state);
+        if (recovered > 0) {
+            char timestamp[32];
+            get_timestamp(timestamp, sizeof(timestamp));
+            printf("%s Recovered %d untrained file(s)\n", timestamp, recovered);
+        }
+    }
     
     while (state->running) {
-        DIR* dir = opendir(queue_dir);
-        if (!dir) {
-            sleep(5);
+        StageDoc* doc = stage_queue_pop(state->input, 1000);
+        if (!doc) {
+            if (stage_queue_is_closed(state->input)) break;
             continue;
         }
-        
-        struct dirent* entry;
-        int found_file = 0;
-        
-        while ((entry = readdir(dir)) != NULL) {
-            if (entry->d_name[0] == '.') continue;
-            if (strstr(entry->d_name, ".tok") == NULL) continue;
-            
-            char filepath[2048];
-            snprintf(filepath, sizeof(filepath), "%s/%s", queue_dir, entry->d_name);
-            
-            // Check if locked
-            if (is_file_locked(filepath)) {
-                continue;
-            }
-            
-            // Try to lock
-            if (create_lock(filepath) != 0) {
-                continue;
-            }
-            
-            // Train on file
-            if (train_on_file(state, filepath) == 0) {
-                // Move to trained
-                move_to_trained(state->data_dir, entry->d_name);
-                
-                pthread_mutex_lock(&state->lock);
-                state->files_trained++;
-                pthread_mutex_unlock(&state->lock);
-            }
-            
-            // Remove lock
-            remove_lock(filepath);
-            
-            found_file = 1;
-            break;  // Process one file at a time per thread
-        }
-        
-        closedir(dir);
-        
-        if (!found_file) {
-            sleep(5);  // Wait for new files
-        }
+        training_handle_file(doc, state);
     }
     
     return NULL;
@@ -340,7 +489,10 @@ ContinuousTrainingState* continuous_training_init(const char* data_dir, const ch
     state->running = 1;
     state->files_trained = 0;
     state->num_threads = num_threads;
+    state->replay_seed = (unsigned int)time(NULL);
     pthread_mutex_init(&state->lock, NULL);
+    pthread_cond_init(&state->fresh_ready, NULL);
+    pthread_cond_init(&state->fresh_room, NULL);
     
     // NEW: Load or create model if not provided
     if (model) {
@@ -479,10 +631,21 @@ int continuous_training_start(ContinuousTrainingState* state, pthread_t* threads
     char timestamp[32];
     get_timestamp(timestamp, sizeof(timestamp));
     
+    if (!state->input) {
+        fprintf(stderr, "%s Training started without an input queue\n", timestamp);
+        return -1;
+    }
+    
     printf("%s === CONTINUOUS TRAINING STARTED ===\n", timestamp);
     printf("%s Threads: %d\n", timestamp, state->num_threads);
     printf("%s Model: %s\n", timestamp, state->model_path);
     
+    if (pthread_create(&state->trainer, NULL, training_service_thread, state) != 0) {
+        fprintf(stderr, "%s Failed to create trainer thread\n", timestamp);
+        return -1;
+    }
+    state->trainer_started = true;
+    
     for (int i = 0; i < state->num_threads; i++) {
         if (pthread_create(&threads[i], NULL, training_worker_thread, state) != 0) {
             fprintf(stderr, "%s Failed to create training thread %d\n", timestamp, i);
@@ -497,12 +660,22 @@ int continuous_training_start(ContinuousTrainingState* state, pthread_t* threads
  * Stop training threads
  */
 void continuous_training_stop(ContinuousTrainingState* state, pthread_t* threads) {
+    pthread_mutex_lock(&state->lock);
     state->running = 0;
+    pthread_cond_broadcast(&state->fresh_ready);
+    pthread_cond_broadcast(&state->fresh_room);
+    pthread_mutex_unlock(&state->lock);
     
     for (int i = 0; i < state->num_threads; i++) {
         pthread_join(threads[i], NULL);
     }
     
+    // Finishes the round in progress
+    if (state->trainer_started) {
+        pthread_join(state->trainer, NULL);
+        state->trainer_started = false;
+    }
+    
     char timestamp[32];
     get_timestamp(timestamp, sizeof(timestamp));
     printf("%s === CONTINUOUS TRAINING STOPPED ===\n", timestamp);
@@ -515,6 +688,10 @@ void continuous_training_stop(ContinuousTrainingState* state, pthread_t* threads
 void continuous_training_cleanup(ContinuousTrainingState* state) {
     if (!state) return;
     
+    if (state->system) {
+        threaded_training_free(state->system);
+    }
+    
     if (state->training) {
         cllm_training_free(state->training);
     }
@@ -538,6 +715,15 @@ void continuous_training_cleanup(ContinuousTrainingState* state) {
         model_manager_release_write(model_name);
     }
     
+    for (size_t i = 0; i < state->num_pending; i++) {
+        free(state->pending[i]);
+    }
+    free(state->pending);
+    free(state->fresh);
+    free(state->replay);
+    
+    pthread_cond_destroy(&state->fresh_ready);
+    pthread_cond_destroy(&state->fresh_room);
     pthread_mutex_destroy(&state->lock);
     free(state);
 }
\ No newline at end of file
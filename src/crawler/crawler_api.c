@@ -10,6 +10,7 @@
 #include "content_filter.h"
 #include "preprocessor.h"
 #include "crawler_url_manager.h"
+#include "stage_queue.h"
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
@@ -54,6 +55,11 @@ struct CrawlerState {
     void* training_internal;  // NEW: Training state
     void* url_manager;        // CrawlerURLManager* for database integration
     
+    // Hand-off queues between stages (files on disk remain the durable copy)
+    StageQueue* raw_queue;    // crawler -> preprocessor
+    StageQueue* text_queue;   // preprocessor -> tokenizer
+    StageQueue* token_queue;  // tokenizer -> training
+    
     // Status tracking
     int running;
     int pages_crawled;
@@ -273,7 +279,30 @@ int crawler_start(CrawlerState* state) {
         state->training_internal = continuous_training_init(state->data_dir, model_path, NULL, state->num_threads);
     }
     
-    // Start crawler thread (single thread for sequential downloading)
+    // Connect the stages
+    state->raw_queue = stage_queue_create(STAGE_QUEUE_DEFAULT_CAPACITY);
+    state->text_queue = stage_queue_create(STAGE_QUEUE_DEFAULT_CAPACITY);
+    state->token_queue = stage_queue_create(STAGE_QUEUE_DEFAULT_CAPACITY);
+    if (!state->raw_queue || !state->text_queue || !state->token_queue) {
+        fprintf(stderr, "Failed to create pipeline queues\n");
+        stage_queue_destroy(state->raw_queue);
+        stage_queue_destroy(state->text_queue);
+        stage_queue_destroy(state->token_queue);
+        state->raw_queue = state->text_queue = state->token_queue = NULL;
+        state->running = 0;
+        crawler_internal_cleanup(state->crawler_internal);
+        return -1;
+    }
+    crawler_internal_set_output((CrawlerStateInternal*)state->crawler_internal, state->raw_queue);
+    preprocessor_set_queues((PreprocessorState*)state->preprocessor_internal, state->raw_queue, state->text_queue);
+    tokenizer_set_queues((TokenizerState*)state->tokenizer_internal, state->text_queue, state->token_queue);
+    if (state->training_internal) {
+        continuous_training_set_queue((ContinuousTrainingState*)state->training_internal, state->token_queue);
+        continuous_training_set_vocab((ContinuousTrainingState*)state->training_internal,
+                                      (TokenizerState*)state->tokenizer_internal);
+    }
+    
+    // Start crawler thread (drives concurrent downloads via the fetch engine)
     if (pthread_create(&state->crawler_thread, NULL, crawler_thread_func, state->crawler_internal) != 0) {
         state->running = 0;
         crawler_internal_cleanup(state->crawler_internal);
@@ -342,6 +371,12 @@ void crawler_stop(CrawlerState* state) {
     
     printf("Stopping crawler threads...\n");
     
+    // Closing the queues wakes every stage and tells it to exit; documents
+    // still queued are on disk and get recovered on the next start
+    stage_queue_close(state->raw_queue);
+    stage_queue_close(state->text_queue);
+    stage_queue_close(state->token_queue);
+    
     // Stop training threads first
     if (state->training_internal && state->training_threads) {
         continuous_training_stop(state->training_internal, state->training_threads);
@@ -373,6 +408,11 @@ void crawler_stop(CrawlerState* state) {
     // Wait for monitor thread
     if (state->monitor_thread) pthread_join(state->monitor_thread, NULL);
     
+    stage_queue_destroy(state->raw_queue);
+    stage_queue_destroy(state->text_queue);
+    stage_queue_destroy(state->token_queue);
+    state->raw_queue = state->text_queue = state->token_queue = NULL;
+    
     trigger_callback(state, CRAWLER_EVENT_STOPPED, "Crawler stopped");
 }
 
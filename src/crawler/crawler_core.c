@@ -2,7 +2,8 @@
  * Web Crawler Core
  * 
  * Implements slow, methodical web crawling with:
- * - Rate limiting
+ * - Rate limiting (politeness delay enforced per host)
+ * - Concurrent downloads over reused connections (fetch_engine)
  * - Link extraction
  * - robots.txt respect
  * - Domain filtering
@@ -20,11 +21,15 @@
 #include <pthread.h>
 #include "crawler_url_manager.h"
 #include "url_database.h"
+#include "fetch_engine.h"
+#include "stage_queue.h"
 #include <stdbool.h>
 #include "../../include/crawler.h"
 
 #define MAX_URL_LENGTH 2048
 #define MAX_PAGE_SIZE (10 * 1024 * 1024)  // 10MB max page size
+#define CRAWLER_IN_FLIGHT 16       // Concurrent downloads across all hosts
+#define CRAWLER_PER_HOST 2         // Concurrent downloads per host
 
 // Global rate limiting configuration (can be changed at runtime)
 // HUMAN-LIKE CRAWL SPEED: Slow and methodical
@@ -44,11 +49,6 @@ static void get_timestamp(char* buffer, size_t size) {
     strftime(buffer, size, "[%H:%M:%S]", tm_info);
 }
 
-   typedef struct {
-    char* data;
-    size_t size;
-    size_t capacity;
-} MemoryBuffer;
    struct CrawlerStateInternal {
     char data_dir[1024];
     char start_url[MAX_URL_LENGTH];
@@ -60,6 +60,7 @@ static void get_timestamp(char* buffer, size_t size) {
     FILE* links_to_crawl;  // DEPRECATED: Will be removed
     FILE* links_crawled;   // DEPRECATED: Will be removed
     void* url_manager;     // CrawlerURLManager* (void* to avoid circular dependency)
+    StageQueue* output;    // Saved pages for the preprocessor (NULL = disk only)
    };
 
 /**
@@ -139,108 +140,12 @@ void crawler_internal_set_url_manager(CrawlerStateInternal* state, void* url_man
 }
 
 /**
- * Callback for curl to write data
+ * Set the queue that receives saved pages
  */
-static size_t write_callback(void* contents, size_t size, size_t nmemb, void* userp) {
-    size_t realsize = size * nmemb;
-    MemoryBuffer* mem = (MemoryBuffer*)userp;
-    
-    // Check if we need to expand buffer
-    if (mem->size + realsize + 1 > mem->capacity) {
-        size_t new_capacity = mem->capacity * 2;
-        if (new_capacity < mem->size + realsize + 1) {
-            new_capacity = mem->size + realsize + 1;
-        }
-        
-        char* new_data = (char*)realloc(mem->data, new_capacity);
-        if (!new_data) return 0;  // Out of memory
-        
-        mem->data = new_data;
-        mem->capacity = new_capacity;
-    }
-    
-    memcpy(&(mem->data[mem->size]), contents, realsize);
-    mem->size += realsize;
-    mem->data[mem->size] = 0;
-    
-    return realsize;
-}
-
-/**
- * Download a web page
- */
-int crawler_download_page(const char* url, MemoryBuffer* buffer) {
-    CURL* curl = curl_easy_init();
-    if (!curl) return -1;
-    
-    // Set options
-    curl_easy_setopt(curl, CURLOPT_URL, url);
-    curl_easy_setopt(curl, CURLOPT_WRITEFUNCTION, write_callback);
-    curl_easy_setopt(curl, CURLOPT_WRITEDATA, (void*)buffer);
-    curl_easy_setopt(curl, CURLOPT_USERAGENT, 
-                    "Mozilla/5.0 (X11; Linux x86_64; rv:109.0) Gecko/20100101 Firefox/115.0");
-    curl_easy_setopt(curl, CURLOPT_FOLLOWLOCATION, 1L);
-    curl_easy_setopt(curl, CURLOPT_MAXREDIRS, 5L);
-    curl_easy_setopt(curl, CURLOPT_TIMEOUT, 30L);
-    curl_easy_setopt(curl, CURLOPT_NOSIGNAL, 1L);
-    
-    // Perform request
-    CURLcode res = curl_easy_perform(curl);
-    
-    long response_code = 0;
-    curl_easy_getinfo(curl, CURLINFO_RESPONSE_CODE, &response_code);
-    
-    curl_easy_cleanup(curl);
-    
-    if (res != CURLE_OK) {
-        fprintf(stderr, "curl_easy_perform() failed: %s\n", curl_easy_strerror(res));
-        return -1;
-    }
-    
-    if (response_code != 200) {
-        fprintf(stderr, "HTTP error: %ld\n", response_code);
-        return -1;
-    }
-    
-    return 0;
-}
-
-/**
- * Save page to disk
- */
-int crawler_save_page(CrawlerStateInternal* state, const char* url, const char* content, size_t size) {
-    // Generate filename from URL hash
-    unsigned long hash = 5381;
-    for (const char* p = url; *p; p++) {
-        hash = ((hash << 5) + hash) + *p;
-    }
-    
-    time_t now = time(NULL);
-    char filename[2048];
-    snprintf(filename, sizeof(filename), "%s/raw_pages/page_%lu_%ld.html", 
-             state->data_dir, hash, now);
-    
-    FILE* f = fopen(filename, "w");
-    if (!f) {
-        char timestamp[32];
-        get_timestamp(timestamp, sizeof(timestamp));
-        fprintf(stderr, "%s Failed to open file: %s\n", timestamp, filename);
-        return -1;
+void crawler_internal_set_output(CrawlerStateInternal* state, StageQueue* output) {
+    if (state) {
+        state->output = output;
     }
-    
-    // Write metadata header
-    fprintf(f, "<!-- URL: %s -->\n", url);
-    fprintf(f, "<!-- Timestamp: %ld -->\n", now);
-    fprintf(f, "<!-- Size: %zu -->\n", size);
-    
-    // Write content
-    fwrite(content, 1, size, f);
-    fclose(f);
-    
-    char timestamp[32];
-    get_timestamp(timestamp, sizeof(timestamp));
-    printf("%s ✓ Saved: %s\n", timestamp, filename);
-    return 0;
 }
 
 /**
@@ -357,17 +262,10 @@ void crawler_mark_crawled(CrawlerStateInternal* state, const char* url) {
         CrawlerURLManager* manager = (CrawlerURLManager*)state->url_manager;
         URLDatabase* db = crawler_url_manager_get_database(manager);
         if (db) {
-            // Find URL by URL string and mark as crawled
-            int count = 0;
-            URLEntry** entries = url_db_query(db, NULL, &count);
-            if (entries) {
-                for (int i = 0; i < count; i++) {
-                    if (strcmp(entries[i]->url, url) == 0) {
-                        url_db_mark_crawled(db, entries[i]->id);
-                        break;
-                    }
-                }
-                url_db_free_entries(entries, count);
+            // Find URL by URL string (indexed) and mark as crawled
+            uint64_t id = url_db_find_id(db, url);
+            if (id != 0) {
+                url_db_mark_crawled(db, id);
             }
         }
     }
@@ -382,8 +280,113 @@ void crawler_mark_crawled(CrawlerStateInternal* state, const char* url) {
     pthread_mutex_unlock(&state->lock);
 }
 
+/**
+ * Mark URL as failed so it is not left 'crawling'
+ */
+static void crawler_mark_failed(CrawlerStateInternal* state, const char* url) {
+    if (!state->url_manager) return;
+    
+    pthread_mutex_lock(&state->lock);
+    CrawlerURLManager* manager = (CrawlerURLManager*)state->url_manager;
+    uint64_t id = url_db_find_id(crawler_url_manager_get_database(manager), url);
+    if (id != 0) {
+        crawler_url_manager_mark_failed(manager, id);
+    }
+    pthread_mutex_unlock(&state->lock);
+}
+
+/**
+ * Output path for a page: raw_pages/page_<url hash>_<time>.html
+ */
+static void crawler_page_path(CrawlerStateInternal* state, const char* url, char* path, size_t size) {
+    // Generate filename from URL hash
+    unsigned long hash = 5381;
+    for (const char* p = url; *p; p++) {
+        hash = ((hash << 5) + hash) + *p;
+    }
+    
+    snprintf(path, size, "%s/raw_pages/page_%lu_%ld.html", 
+             state->data_dir, hash, (long)time(NULL));
+}
+
+/**
+ * Called by the fetch engine when a download finishes
+ * 
+ * The body has already been streamed to raw_pages/ behind the metadata
+ * header; mark the URL and hand the page to the preprocessor.
+ */
+static void crawler_page_fetched(const FetchResult* result, void* user_data) {
+    CrawlerStateInternal* state = (CrawlerStateInternal*)user_data;
+    char timestamp[32];
+    get_timestamp(timestamp, sizeof(timestamp));
+    
+    if (result->error == 0) {
+        printf("%s Downloaded %zu bytes in %.0f ms: %s\n", timestamp, result->bytes,
+               result->elapsed_ms, result->url);
+        printf("%s ✓ Saved: %s\n", timestamp, result->path);
+        crawler_mark_crawled(state, result->url);
+        
+        // Blocks only if the preprocessor is behind; the main loop stops
+        // feeding the engine before that happens
+        StageDoc* doc = stage_doc_create(result->path);
+        if (doc && (!state->output || stage_queue_push(state->output, doc, -1) != 0)) {
+            stage_doc_free(doc);  // Page stays on disk for startup recovery
+        }
+    } else {
+        printf("%s ✗ Failed to download %s: %s\n", timestamp, result->url,
+               result->error_message ? result->error_message : "unknown error");
+        crawler_mark_failed(state, result->url);
+    }
+}
+
+/**
+ * Per-host politeness delay from the global rate configuration
+ */
+static void crawler_host_delay_ms(int* min_ms, int* max_ms) {
+    pthread_mutex_lock(&g_rate_config_mutex);
+    
+    if (g_requests_per_minute > 0.0f) {
+        // Use requests per minute
+        *min_ms = *max_ms = (int)(60000.0f / g_requests_per_minute);
+    } else if (g_delay_minutes > 0) {
+        // Use minutes
+        *min_ms = *max_ms = g_delay_minutes * 60000;
+    } else if (g_use_random_delay) {
+        // Random delay between min and max
+        *min_ms = g_min_delay_seconds * 1000;
+        *max_ms = g_max_delay_seconds * 1000;
+    } else {
+        // Fixed delay
+        *min_ms = *max_ms = g_min_delay_seconds * 1000;
+    }
+    
+    pthread_mutex_unlock(&g_rate_config_mutex);
+}
+
+/**
+ * Match the per-domain URL budget to the per-host delay
+ * 
+ * The engine serves a host no faster than the delay allows, so handing it
+ * more URLs for that host only keeps other hosts waiting in the queue.
+ */
+static void crawler_set_domain_budget(CrawlerStateInternal* state, int min_ms, int max_ms) {
+    if (!state->url_manager) return;
+    
+    double mean_ms = (min_ms + (max_ms > min_ms ? max_ms : min_ms)) / 2.0;
+    double rate = mean_ms > 0 ? 1000.0 / mean_ms : 0.0;
+    
+    pthread_mutex_lock(&state->lock);
+    URLPriority* priority = crawler_url_manager_get_priority((CrawlerURLManager*)state->url_manager);
+    url_priority_set_domain_budget(priority, rate, CRAWLER_PER_HOST);
+    pthread_mutex_unlock(&state->lock);
+}
+
 /**
  * Main crawler loop
+ * 
+ * Keeps the fetch engine fed with URLs; the engine downloads up to
+ * CRAWLER_IN_FLIGHT pages at once while spacing requests to each host
+ * by the configured rate limit.
  */
 void* crawler_thread_func(void* arg) {
     CrawlerStateInternal* state = (CrawlerStateInternal*)arg;
@@ -398,91 +401,105 @@ void* crawler_thread_func(void* arg) {
         printf("%s Max pages: %d\n", timestamp, state->max_pages);
     }
     
-    while (state->running && (state->max_pages == 0 || state->pages_crawled < state->max_pages)) {
-        char url[MAX_URL_LENGTH];
-        
-        // Get next URL
-        if (crawler_get_next_url(state, url, sizeof(url)) != 0) {
-            get_timestamp(timestamp, sizeof(timestamp));
-            printf("%s No more URLs in queue, waiting...\n", timestamp);
-            sleep(5);  // Wait for more URLs
-            continue;
+    // Downloads a previous run left in flight are still 'crawling'
+    if (state->url_manager) {
+        pthread_mutex_lock(&state->lock);
+        int released = crawler_url_manager_release_leases((CrawlerURLManager*)state->url_manager);
+        pthread_mutex_unlock(&state->lock);
+        if (released > 0) {
+            printf("%s Returned %d unfinished URLs to the queue\n", timestamp, released);
         }
-        
-        // Print progress
-        get_timestamp(timestamp, sizeof(timestamp));
-        if (state->max_pages == 0) {
-            printf("\n%s === Crawling [%d/unlimited] ===\n", timestamp, state->pages_crawled + 1);
-        } else {
-            printf("\n%s === Crawling [%d/%d] ===\n", timestamp, state->pages_crawled + 1, state->max_pages);
+    }
+    
+    FetchEngineConfig config = {
+        .max_in_flight = CRAWLER_IN_FLIGHT,
+        .max_per_host = CRAWLER_PER_HOST,
+        .timeout_seconds = 30,
+        .max_body_size = MAX_PAGE_SIZE
+    };
+    FetchEngine* engine = fetch_engine_create(&config, crawler_page_fetched, state);
+    if (!engine) {
+        fprintf(stderr, "%s Failed to create fetch engine\n", timestamp);
+        return NULL;
+    }
+    
+    int last_min_ms = -1, last_max_ms = -1;
+    
+    while (state->running) {
+        // Pipeline shut down; downloads still queued in the engine stay
+        // 'crawling' until the next run releases them
+        if (state->output && stage_queue_is_closed(state->output)) {
+            break;
         }
-        printf("%s URL: %s\n", timestamp, url);
-        
-        // Download page
-        MemoryBuffer buffer = {0};
-        buffer.capacity = 4096;
-        buffer.data = (char*)malloc(buffer.capacity);
         
-        if (crawler_download_page(url, &buffer) == 0) {
-            get_timestamp(timestamp, sizeof(timestamp));
-            printf("%s Downloaded %zu bytes\n", timestamp, buffer.size);
-            
-            // Save page
-            crawler_save_page(state, url, buffer.data, buffer.size);
-            
-            // Extract links
-            // Links will be extracted by preprocessor
-            
-            // Mark as crawled
-            crawler_mark_crawled(state, url);
-        } else {
+        // Rate limit may change at runtime
+        int min_ms, max_ms;
+        crawler_host_delay_ms(&min_ms, &max_ms);
+        if (min_ms != last_min_ms || max_ms != last_max_ms) {
+            fetch_engine_set_host_delay(engine, min_ms, max_ms);
+            crawler_set_domain_budget(state, min_ms, max_ms);
             get_timestamp(timestamp, sizeof(timestamp));
-            printf("%s ✗ Failed to download\n", timestamp);
+            printf("%s Per-host delay: %d-%d seconds\n", timestamp, min_ms / 1000, max_ms / 1000);
+            last_min_ms = min_ms;
+            last_max_ms = max_ms;
         }
         
-        free(buffer.data);
-        
-        // Rate limiting: configurable delay
-        pthread_mutex_lock(&g_rate_config_mutex);
-        int delay;
-        
-        if (g_requests_per_minute > 0.0f) {
-            // Use requests per minute
-            delay = (int)(60.0f / g_requests_per_minute);
-        } else if (g_delay_minutes > 0) {
-            // Use minutes
-            delay = g_delay_minutes * 60;
-        } else if (g_use_random_delay) {
-            // Random delay between min and max
-            delay = g_min_delay_seconds + (rand() % (g_max_delay_seconds - g_min_delay_seconds + 1));
-        } else {
-            // Fixed delay
-            delay = g_min_delay_seconds;
+        // Keep enough URLs queued to fill every in-flight slot, but never
+        // more than the preprocessor queue can take (backpressure)
+        int queue_empty = 0;
+        while (!state->paused &&
+               fetch_engine_pending(engine) < 2 * CRAWLER_IN_FLIGHT &&
+               (!state->output ||
+                (size_t)fetch_engine_pending(engine) < stage_queue_space(state->output)) &&
+               (state->max_pages == 0 ||
+                state->pages_crawled + fetch_engine_pending(engine) < state->max_pages)) {
+            char url[MAX_URL_LENGTH];
+            if (crawler_get_next_url(state, url, sizeof(url)) != 0) {
+                queue_empty = 1;
+                break;
+            }
+            
+            char path[2048];
+            char header[MAX_URL_LENGTH + 128];
+            crawler_page_path(state, url, path, sizeof(path));
+            snprintf(header, sizeof(header), "<!-- URL: %s -->\n<!-- Timestamp: %ld -->\n",
+                     url, (long)time(NULL));
+            
+            if (fetch_engine_submit(engine, url, path, header, NULL) == 0) {
+                get_timestamp(timestamp, sizeof(timestamp));
+                printf("%s Queued: %s\n", timestamp, url);
+            }
         }
-        pthread_mutex_unlock(&g_rate_config_mutex);
         
-        get_timestamp(timestamp, sizeof(timestamp));
-        if (delay >= 60) {
-            printf("%s Waiting %d minutes %d seconds...\n", timestamp, delay / 60, delay % 60);
-        } else {
-            printf("%s Waiting %d seconds...\n", timestamp, delay);
+        if (fetch_engine_pending(engine) > 0) {
+            fetch_engine_run(engine, 1000);
+            continue;
         }
         
-        // Check for pause during delay
-        for (int i = 0; i < delay && state->running && !state->paused; i++) {
-            sleep(1);
+        if (state->max_pages > 0 && state->pages_crawled >= state->max_pages) {
+            break;
         }
         
         // Handle pause
-        while (state->paused && state->running) {
+        get_timestamp(timestamp, sizeof(timestamp));
+        if (state->paused) {
             printf("%s Crawler paused. Waiting...\n", timestamp);
-            sleep(5);
+        } else if (queue_empty) {
+            printf("%s No more URLs in queue, waiting...\n", timestamp);
         }
+        sleep(5);  // Wait for more URLs
     }
     
+    FetchEngineStats stats;
+    fetch_engine_get_stats(engine, &stats);
+    fetch_engine_destroy(engine);
+    
     get_timestamp(timestamp, sizeof(timestamp));
     printf("\n%s === CRAWLER STOPPED ===\n", timestamp);
     printf("%s Total pages crawled: %d\n", timestamp, state->pages_crawled);
+    printf("%s Downloads: %llu ok, %llu failed, %llu bytes over %llu connections (%d hosts)\n",
+           timestamp, (unsigned long long)stats.completed, (unsigned long long)stats.failed,
+           (unsigned long long)stats.bytes, (unsigned long long)stats.connections, stats.hosts);
     
     return NULL;
 }
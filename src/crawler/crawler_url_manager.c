@@ -10,6 +10,7 @@
 #include <string.h>
 #include <sys/stat.h>
 #include <sys/types.h>
+#include <pthread.h>
 
 // Manager structure
 struct CrawlerURLManager {
@@ -18,6 +19,11 @@ struct CrawlerURLManager {
     URLPriority* priority;
     URLBlocker* blocker;
     char data_dir[1024];
+    
+    // Leased ('crawling') URLs not handed out yet
+    URLEntry* frontier[CRAWLER_URL_FRONTIER_MAX];
+    int frontier_count;
+    pthread_mutex_t frontier_lock;
 };
 
 /**
@@ -91,6 +97,8 @@ CrawlerURLManager* crawler_url_manager_create(const char* data_dir) {
         return NULL;
     }
     
+    pthread_mutex_init(&manager->frontier_lock, NULL);
+    
     printf("✓ Crawler URL Manager initialized\n");
     printf("  Database: %s\n", db_path);
     printf("  Filter config: %s\n", filter_path);
@@ -99,12 +107,43 @@ CrawlerURLManager* crawler_url_manager_create(const char* data_dir) {
     return manager;
 }
 
+/**
+ * Drop the local frontier (caller holds frontier_lock)
+ * 
+ * With release set, the leased URLs go back to pending in the database.
+ */
+static void frontier_clear(CrawlerURLManager* manager, bool release) {
+    if (manager->frontier_count == 0) return;
+    
+    if (release) {
+        uint64_t ids[CRAWLER_URL_FRONTIER_MAX];
+        for (int i = 0; i < manager->frontier_count; i++) {
+            ids[i] = manager->frontier[i]->id;
+        }
+        if (url_db_mark_batch(manager->database, ids, manager->frontier_count, "pending") < 0) {
+            fprintf(stderr, "Failed to return %d leased URLs to pending\n", manager->frontier_count);
+        }
+    }
+    
+    for (int i = 0; i < manager->frontier_count; i++) {
+        url_db_free_entry(manager->frontier[i]);
+        manager->frontier[i] = NULL;
+    }
+    manager->frontier_count = 0;
+}
+
 /**
  * Destroy crawler URL manager
  */
 void crawler_url_manager_destroy(CrawlerURLManager* manager) {
     if (!manager) return;
     
+    // Leased but never handed out: back to pending for the next run
+    pthread_mutex_lock(&manager->frontier_lock);
+    frontier_clear(manager, true);
+    pthread_mutex_unlock(&manager->frontier_lock);
+    pthread_mutex_destroy(&manager->frontier_lock);
+    
     if (manager->blocker) {
         url_blocker_destroy(manager->blocker);
     }
@@ -189,59 +228,140 @@ int crawler_url_manager_add(CrawlerURLManager* manager, const char* url, const c
 /**
  * Add multiple URLs in batch
  */
-int crawler_url_manager_add_batch(CrawlerURLManager* manager, char** urls, int count, const char* source_url) {
+int crawler_url_manager_add_batch(CrawlerURLManager* manager, char** urls, int count, const char* source_url,
+                                  bool* inserted) {
+    if (inserted && count > 0) memset(inserted, 0, count * sizeof(bool));
     if (!manager || !urls || count <= 0) return 0;
     
-    int added = 0;
+    // Filter first, then insert the survivors in one transaction
+    const char** accepted = (const char**)malloc(count * sizeof(char*));
+    int* origin = (int*)malloc(count * sizeof(int));
+    bool* accepted_inserted = inserted ? (bool*)malloc(count * sizeof(bool)) : NULL;
+    if (!accepted || !origin || (inserted && !accepted_inserted)) {
+        free(accepted);
+        free(origin);
+        free(accepted_inserted);
+        return -1;
+    }
+    
+    int num_accepted = 0;
     for (int i = 0; i < count; i++) {
-        if (crawler_url_manager_add(manager, urls[i], source_url) == 0) {
-            added++;
+        if (urls[i] && crawler_url_manager_should_crawl(manager, urls[i])) {
+            origin[num_accepted] = i;
+            accepted[num_accepted++] = urls[i];
+        }
+    }
+    
+    int added = url_db_add_batch(manager->database, accepted, num_accepted, source_url, accepted_inserted);
+    if (added > 0 && inserted) {
+        for (int i = 0; i < num_accepted; i++) {
+            inserted[origin[i]] = accepted_inserted[i];
         }
     }
+    free(accepted);
+    free(origin);
+    free(accepted_inserted);
     
     return added;
 }
 
 /**
- * Get next URL to crawl
+ * Index of the best frontier URL whose domain has budget, or -1
  */
-URLEntry* crawler_url_manager_get_next(CrawlerURLManager* manager) {
-    if (!manager) return NULL;
-    
-    // Get all pending URLs
-    int count = 0;
-    URLEntry** entries = url_db_query(manager->database, "status = 'pending' AND blocked = 0", &count);
-    
-    if (!entries || count == 0) {
-        if (entries) free(entries);
-        return NULL;
-    }
-    
-    // Calculate priorities for all
+static int frontier_pick(CrawlerURLManager* manager) {
+    // Domain scores are cached, so this is one hash lookup per URL
     int total_domains = url_priority_get_domain_count(manager->priority);
-    int best_idx = 0;
-    int best_priority = url_priority_calculate(manager->priority, entries[0], total_domains);
+    int best_idx = -1;
+    int best_priority = 0;
     
-    for (int i = 1; i < count; i++) {
-        int priority = url_priority_calculate(manager->priority, entries[i], total_domains);
-        if (priority > best_priority) {
+    for (int i = 0; i < manager->frontier_count; i++) {
+        URLEntry* entry = manager->frontier[i];
+        if (!url_priority_has_budget(manager->priority, entry->domain)) continue;
+        
+        int priority = url_priority_calculate(manager->priority, entry, total_domains);
+        if (best_idx < 0 || priority > best_priority) {
             best_priority = priority;
             best_idx = i;
         }
     }
     
-    // Get the best entry
-    URLEntry* result = (URLEntry*)malloc(sizeof(URLEntry));
-    if (result) {
-        memcpy(result, entries[best_idx], sizeof(URLEntry));
-        
-        // CRITICAL FIX: Mark URL as 'crawling' immediately to prevent re-selection
-        url_db_mark_crawling(manager->database, result->id);
+    return best_idx;
+}
+
+static int compare_domains(const void* a, const void* b) {
+    return strcmp(*(const char* const*)a, *(const char* const*)b);
+}
+
+/**
+ * Lease more URLs, skipping every domain already in the frontier
+ * 
+ * Only called when no frontier URL is eligible, i.e. every domain in it
+ * is over budget, so leasing more of those would just fill the buffer.
+ * 
+ * @return Number of URLs added (0 if the frontier is full or the
+ *         database has nothing else pending)
+ */
+static int frontier_refill(CrawlerURLManager* manager) {
+    int room = CRAWLER_URL_FRONTIER_MAX - manager->frontier_count;
+    if (room <= 0) return 0;
+    if (room > CRAWLER_URL_LEASE_BATCH) room = CRAWLER_URL_LEASE_BATCH;
+    
+    const char* excluded[CRAWLER_URL_FRONTIER_MAX];
+    int num_excluded = 0;
+    for (int i = 0; i < manager->frontier_count; i++) {
+        excluded[num_excluded++] = manager->frontier[i]->domain;
+    }
+    if (num_excluded > 1) {
+        qsort(excluded, num_excluded, sizeof(excluded[0]), compare_domains);
+        int unique = 1;
+        for (int i = 1; i < num_excluded; i++) {
+            if (strcmp(excluded[i], excluded[unique - 1]) != 0) excluded[unique++] = excluded[i];
+        }
+        num_excluded = unique;
     }
     
-    // Free the query results
-    url_db_free_entries(entries, count);
+    int count = 0;
+    URLEntry** entries = url_db_lease_next_excluding(manager->database, room, excluded,
+                                                     num_excluded, &count);
+    if (!entries) return 0;
     
+    for (int i = 0; i < count; i++) {
+        manager->frontier[manager->frontier_count++] = entries[i];
+    }
+    free(entries);
+    
+    return count;
+}
+
+/**
+ * Get next URL to crawl
+ *
+ * URLs are leased from the database in batches into a local frontier and
+ * handed out from there, so a pick normally touches neither the database
+ * nor other workers' URLs. When every buffered domain is over its crawl
+ * budget, further pages of the frontier are leased with those domains
+ * excluded, so one dominant domain cannot hide the rest.
+ */
+URLEntry* crawler_url_manager_get_next(CrawlerURLManager* manager) {
+    if (!manager) return NULL;
+    
+    pthread_mutex_lock(&manager->frontier_lock);
+    
+    int best_idx = frontier_pick(manager);
+    while (best_idx < 0 && frontier_refill(manager) > 0) {
+        best_idx = frontier_pick(manager);
+    }
+    
+    // Every reachable domain is over budget: try again later
+    URLEntry* result = NULL;
+    if (best_idx >= 0) {
+        result = manager->frontier[best_idx];
+        manager->frontier[best_idx] = manager->frontier[--manager->frontier_count];
+        manager->frontier[manager->frontier_count] = NULL;
+        url_priority_consume_budget(manager->priority, result->domain);
+    }
+    
+    pthread_mutex_unlock(&manager->frontier_lock);
     return result;
 }
 
@@ -364,11 +484,32 @@ int crawler_url_manager_import(CrawlerURLManager* manager, const char* file_path
     return url_db_import(manager->database, file_path);
 }
 
+/**
+ * Return URLs left 'crawling' by an earlier run to pending
+ */
+int crawler_url_manager_release_leases(CrawlerURLManager* manager) {
+    if (!manager || !manager->database) return -1;
+    
+    // Buffered leases are released along with the stale ones
+    pthread_mutex_lock(&manager->frontier_lock);
+    frontier_clear(manager, false);
+    int result = url_db_release_leases(manager->database);
+    pthread_mutex_unlock(&manager->frontier_lock);
+    
+    return result;
+}
+
 /**
  * Reset all URLs to pending status (for recrawling)
  */
 int crawler_url_manager_reset_all(CrawlerURLManager* manager) {
     if (!manager || !manager->database) return -1;
     
-    return url_db_reset_all_to_pending(manager->database);
+    // The buffered leases are reset along with everything else
+    pthread_mutex_lock(&manager->frontier_lock);
+    frontier_clear(manager, false);
+    int result = url_db_reset_all_to_pending(manager->database);
+    pthread_mutex_unlock(&manager->frontier_lock);
+    
+    return result;
 }
\ No newline at end of file
@@ -17,6 +17,9 @@
  * - URL Blocker (4 blocking strategies)
  */
 
+#define CRAWLER_URL_LEASE_BATCH 64     // Pending URLs claimed per database lease
+#define CRAWLER_URL_FRONTIER_MAX 512   // Leased URLs held locally by the manager
+
 // Crawler URL manager handle
 typedef struct CrawlerURLManager CrawlerURLManager;
 
@@ -54,17 +57,26 @@ int crawler_url_manager_add(CrawlerURLManager* manager, const char* url, const c
  * @param urls Array of URLs
  * @param count Number of URLs
  * @param source_url Source URL for all (can be NULL)
- * @return Number of URLs added
+ * @param inserted Set per URL to whether it was added; false for URLs the
+ *                 filters rejected or the database already had (can be NULL)
+ * @return Number of URLs added, or -1 on a database error (nothing added)
  */
-int crawler_url_manager_add_batch(CrawlerURLManager* manager, char** urls, int count, const char* source_url);
+int crawler_url_manager_add_batch(CrawlerURLManager* manager, char** urls, int count, const char* source_url,
+                                  bool* inserted);
 
 /**
  * Get next URL to crawl
  * 
- * Uses priority system to select best URL
+ * Uses the priority system to select the best URL among domains that
+ * still have crawl budget (see url_priority_set_domain_budget). URLs are
+ * leased from the database CRAWLER_URL_LEASE_BATCH at a time and kept in
+ * a local frontier (at most CRAWLER_URL_FRONTIER_MAX) until picked; if
+ * none of them is eligible, more are leased with their domains excluded.
+ * The returned URL is left 'crawling'; unpicked leases go back to pending
+ * when the manager is destroyed.
  * 
  * @param manager Manager handle
- * @return URL entry or NULL if no URLs available (must be freed by caller)
+ * @return URL entry or NULL if no URLs available now (must be freed by caller)
  */
 URLEntry* crawler_url_manager_get_next(CrawlerURLManager* manager);
 
@@ -118,6 +130,18 @@ void crawler_url_manager_get_stats(CrawlerURLManager* manager, int* total, int*
  */
 URLDatabase* crawler_url_manager_get_database(CrawlerURLManager* manager);
 
+/**
+ * Return URLs left 'crawling' by an earlier run to pending
+ * 
+ * Downloads still in flight when a crawler stops are never marked, so
+ * call this when the crawler starts, before the first get_next. It also
+ * drops this manager's buffered leases.
+ * 
+ * @param manager Manager handle
+ * @return Number of URLs released, -1 on error
+ */
+int crawler_url_manager_release_leases(CrawlerURLManager* manager);
+
 /**
  * Reset all URLs to pending status (for recrawling)
  * 
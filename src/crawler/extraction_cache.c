@@ -0,0 +1,710 @@
+/**
+ * Content-Addressed Extraction Cache Implementation
+ *
+ * Entries are individual files named by key; the in-memory index (hash
+ * table plus LRU list) only holds keys and sizes. Lookups read and
+ * decompress outside the lock, so slow disks do not serialize the
+ * preprocessor threads.
+ */
+
+#define _GNU_SOURCE
+#include "extraction_cache.h"
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <errno.h>
+#include <dirent.h>
+#include <unistd.h>
+#include <pthread.h>
+#include <sys/stat.h>
+#include <sys/time.h>
+#include <zlib.h>
+
+#define EXTRACTION_CACHE_MAGIC "XTRCACHE"
+#define HASH_CHUNK_SIZE (64 * 1024)
+#define INITIAL_BUCKETS 1024
+
+/**
+ * Entry file header, followed by compressed_length bytes of zlib data
+ */
+typedef struct {
+    char magic[8];
+    uint32_t version;
+    uint32_t reserved;
+    uint64_t key_hi;
+    uint64_t key_lo;
+    uint64_t text_length;
+    uint64_t compressed_length;
+    char extractor[EXTRACTION_CACHE_MAX_EXTRACTOR];
+    unsigned char source_digest[32];        // SHA-256 of the document
+    uint64_t source_size;
+} ExtractionCacheHeader;
+
+// Index node (free nodes are chained through next)
+typedef struct {
+    ExtractionCacheKey key;
+    uint64_t bytes;             // Entry file size
+    int prev;                   // LRU neighbours (head = most recently used)
+    int next;
+    int chain;                  // Next node in the same hash bucket
+    int live;
+} CacheNode;
+
+struct ExtractionCache {
+    char dir[1024];
+    uint64_t max_bytes;
+    uint64_t bytes;
+    uint64_t entries;
+    CacheNode* nodes;
+    int capacity;
+    int free_list;
+    int* buckets;
+    size_t bucket_mask;
+    int head;
+    int tail;
+    uint64_t hits;
+    uint64_t misses;
+    uint64_t stores;
+    uint64_t evictions;
+    unsigned int tmp_counter;
+    pthread_mutex_t lock;
+};
+
+static ExtractionCache* g_default_cache = NULL;
+
+// ============================================================================
+// HASHING
+// ============================================================================
+
+/*
+ * SHA-256 (FIPS 180-4). Keys address text extracted from documents
+ * downloaded from the web, so they must not be collidable on purpose:
+ * a crafted file sharing another document's key would be served that
+ * document's text.
+ */
+typedef struct {
+    uint32_t state[8];
+    uint64_t length;            // Bytes hashed so far
+    unsigned char block[64];
+    size_t used;
+} Sha256;
+
+static const uint32_t SHA256_K[64] = {
+    0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+    0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+    0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+    0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+    0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+    0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+    0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+    0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2
+};
+
+static inline uint32_t rotr32(uint32_t x, int r) {
+    return (x >> r) | (x << (32 - r));
+}
+
+static void sha256_init(Sha256* ctx) {
+    static const uint32_t initial[8] = {
+        0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a, 0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19
+    };
+    memcpy(ctx->state, initial, sizeof(initial));
+    ctx->length = 0;
+    ctx->used = 0;
+}
+
+static void sha256_block(Sha256* ctx, const unsigned char* p) {
+    uint32_t w[64];
+    for (int i = 0; i < 16; i++) {
+        w[i] = (uint32_t)p[i * 4] << 24 | (uint32_t)p[i * 4 + 1] << 16 |
+               (uint32_t)p[i * 4 + 2] << 8 | (uint32_t)p[i * 4 + 3];
+    }
+    for (int i = 16; i < 64; i++) {
+        uint32_t s0 = rotr32(w[i - 15], 7) ^ rotr32(w[i - 15], 18) ^ (w[i - 15] >> 3);
+        uint32_t s1 = rotr32(w[i - 2], 17) ^ rotr32(w[i - 2], 19) ^ (w[i - 2] >> 10);
+        w[i] = w[i - 16] + s0 + w[i - 7] + s1;
+    }
+    
+    uint32_t a = ctx->state[0], b = ctx->state[1], c = ctx->state[2], d = ctx->state[3];
+    uint32_t e = ctx->state[4], f = ctx->state[5], g = ctx->state[6], h = ctx->state[7];
+    for (int i = 0; i < 64; i++) {
+        uint32_t t1 = h + (rotr32(e, 6) ^ rotr32(e, 11) ^ rotr32(e, 25)) + ((e & f) ^ (~e & g)) +
+                      SHA256_K[i] + w[i];
+        uint32_t t2 = (rotr32(a, 2) ^ rotr32(a, 13) ^ rotr32(a, 22)) + ((a & b) ^ (a & c) ^ (b & c));
+        h = g;
+        g = f;
+        f = e;
+        e = d + t1;
+        d = c;
+        c = b;
+        b = a;
+        a = t1 + t2;
+    }
+    ctx->state[0] += a; ctx->state[1] += b; ctx->state[2] += c; ctx->state[3] += d;
+    ctx->state[4] += e; ctx->state[5] += f; ctx->state[6] += g; ctx->state[7] += h;
+}
+
+static void sha256_update(Sha256* ctx, const void* data, size_t size) {
+    const unsigned char* p = (const unsigned char*)data;
+    ctx->length += size;
+    
+    if (ctx->used > 0) {
+        size_t take = 64 - ctx->used < size ? 64 - ctx->used : size;
+        memcpy(ctx->block + ctx->used, p, take);
+        ctx->used += take;
+        p += take;
+        size -= take;
+        if (ctx->used < 64) return;
+        sha256_block(ctx, ctx->block);
+        ctx->used = 0;
+    }
+    for (; size >= 64; p += 64, size -= 64) {
+        sha256_block(ctx, p);
+    }
+    memcpy(ctx->block, p, size);
+    ctx->used = size;
+}
+
+static void sha256_final(Sha256* ctx, unsigned char digest[32]) {
+    uint64_t bits = ctx->length * 8;
+    unsigned char pad[72] = { 0x80 };
+    size_t pad_size = (ctx->used < 56 ? 56 : 120) - ctx->used;
+    for (int i = 0; i < 8; i++) pad[pad_size + i] = (unsigned char)(bits >> (56 - i * 8));
+    sha256_update(ctx, pad, pad_size + 8);
+    
+    for (int i = 0; i < 8; i++) {
+        digest[i * 4] = (unsigned char)(ctx->state[i] >> 24);
+        digest[i * 4 + 1] = (unsigned char)(ctx->state[i] >> 16);
+        digest[i * 4 + 2] = (unsigned char)(ctx->state[i] >> 8);
+        digest[i * 4 + 3] = (unsigned char)ctx->state[i];
+    }
+}
+
+static uint64_t load_be64(const unsigned char* p) {
+    uint64_t x = 0;
+    for (int i = 0; i < 8; i++) x = x << 8 | p[i];
+    return x;
+}
+
+/**
+ * Hash a document's bytes together with the extractor name
+ */
+int extraction_cache_key_file(const char* filepath, const char* extractor, ExtractionCacheKey* key) {
+    if (!filepath || !key) return -1;
+    
+    FILE* f = fopen(filepath, "rb");
+    if (!f) return -1;
+    
+    unsigned char* buffer = (unsigned char*)malloc(HASH_CHUNK_SIZE);
+    if (!buffer) {
+        fclose(f);
+        return -1;
+    }
+    
+    Sha256 ctx;
+    sha256_init(&ctx);
+    size_t n;
+    while ((n = fread(buffer, 1, HASH_CHUNK_SIZE, f)) > 0) {
+        sha256_update(&ctx, buffer, n);
+    }
+    int failed = ferror(f);
+    fclose(f);
+    free(buffer);
+    if (failed) return -1;
+    
+    key->source_size = ctx.length;
+    sha256_final(&ctx, key->digest);
+    
+    // The same bytes through a different extractor get a different address
+    const char* name = extractor ? extractor : "";
+    unsigned char address[32];
+    sha256_init(&ctx);
+    sha256_update(&ctx, name, strlen(name) + 1);
+    sha256_update(&ctx, key->digest, sizeof(key->digest));
+    sha256_final(&ctx, address);
+    
+    key->hi = load_be64(address);
+    key->lo = load_be64(address + 8);
+    return 0;
+}
+
+// ============================================================================
+// INDEX
+// ============================================================================
+
+static inline size_t bucket_of(const ExtractionCache* cache, const ExtractionCacheKey* key) {
+    return (size_t)(key->lo ^ (key->hi >> 7)) & cache->bucket_mask;
+}
+
+static int index_find(const ExtractionCache* cache, const ExtractionCacheKey* key) {
+    for (int i = cache->buckets[bucket_of(cache, key)]; i >= 0; i = cache->nodes[i].chain) {
+        if (cache->nodes[i].key.hi == key->hi && cache->nodes[i].key.lo == key->lo) {
+            return i;
+        }
+    }
+    return -1;
+}
+
+static void lru_unlink(ExtractionCache* cache, int i) {
+    CacheNode* node = &cache->nodes[i];
+    if (node->prev >= 0) cache->nodes[node->prev].next = node->next;
+    else cache->head = node->next;
+    if (node->next >= 0) cache->nodes[node->next].prev = node->prev;
+    else cache->tail = node->prev;
+}
+
+static void lru_push_front(ExtractionCache* cache, int i) {
+    CacheNode* node = &cache->nodes[i];
+    node->prev = -1;
+    node->next = cache->head;
+    if (cache->head >= 0) cache->nodes[cache->head].prev = i;
+    cache->head = i;
+    if (cache->tail < 0) cache->tail = i;
+}
+
+/**
+ * Double the bucket array once there are more entries than buckets
+ */
+static int index_grow_buckets(ExtractionCache* cache) {
+    size_t count = (cache->bucket_mask + 1) * 2;
+    int* buckets = (int*)malloc(count * sizeof(int));
+    if (!buckets) return -1;
+    
+    free(cache->buckets);
+    cache->buckets = buckets;
+    cache->bucket_mask = count - 1;
+    for (size_t i = 0; i < count; i++) buckets[i] = -1;
+    
+    for (int i = 0; i < cache->capacity; i++) {
+        if (!cache->nodes[i].live) continue;
+        size_t b = bucket_of(cache, &cache->nodes[i].key);
+        cache->nodes[i].chain = buckets[b];
+        buckets[b] = i;
+    }
+    return 0;
+}
+
+/**
+ * Add a key as the most recently used entry; returns its node or -1
+ */
+static int index_insert(ExtractionCache* cache, const ExtractionCacheKey* key, uint64_t bytes) {
+    if (cache->free_list < 0) {
+        int capacity = cache->capacity ? cache->capacity * 2 : INITIAL_BUCKETS;
+        CacheNode* nodes = (CacheNode*)realloc(cache->nodes, capacity * sizeof(CacheNode));
+        if (!nodes) return -1;
+        cache->nodes = nodes;
+        for (int i = capacity - 1; i >= cache->capacity; i--) {
+            nodes[i].live = 0;
+            nodes[i].next = cache->free_list;
+            cache->free_list = i;
+        }
+        cache->capacity = capacity;
+    }
+    if (cache->entries >= cache->bucket_mask + 1) {
+        index_grow_buckets(cache);  // Chains just get longer if this fails
+    }
+    
+    int i = cache->free_list;
+    CacheNode* node = &cache->nodes[i];
+    cache->free_list = node->next;
+    
+    node->key = *key;
+    node->bytes = bytes;
+    node->live = 1;
+    size_t b = bucket_of(cache, key);
+    node->chain = cache->buckets[b];
+    cache->buckets[b] = i;
+    lru_push_front(cache, i);
+    
+    cache->entries++;
+    cache->bytes += bytes;
+    return i;
+}
+
+static void index_remove(ExtractionCache* cache, int i) {
+    CacheNode* node = &cache->nodes[i];
+    
+    int* link = &cache->buckets[bucket_of(cache, &node->key)];
+    while (*link != i) link = &cache->nodes[*link].chain;
+    *link = node->chain;
+    
+    lru_unlink(cache, i);
+    cache->entries--;
+    cache->bytes -= node->bytes;
+    node->live = 0;
+    node->next = cache->free_list;
+    cache->free_list = i;
+}
+
+// ============================================================================
+// ENTRY FILES
+// ============================================================================
+
+static void entry_path(const ExtractionCache* cache, const ExtractionCacheKey* key,
+                       char* path, size_t size) {
+    snprintf(path, size, "%s/%02x/%016llx%016llx.xc", cache->dir,
+             (unsigned int)(key->hi >> 56),
+             (unsigned long long)key->hi, (unsigned long long)key->lo);
+}
+
+/**
+ * Remove least recently used entries until the cache fits (caller holds lock)
+ */
+static void evict_to_limit(ExtractionCache* cache, int keep) {
+    while (cache->bytes > cache->max_bytes && cache->tail >= 0 && cache->tail != keep) {
+        int victim = cache->tail;
+        char path[1200];
+        entry_path(cache, &cache->nodes[victim].key, path, sizeof(path));
+        unlink(path);
+        index_remove(cache, victim);
+        cache->evictions++;
+    }
+}
+
+typedef struct {
+    ExtractionCacheKey key;
+    uint64_t bytes;
+    struct timespec mtime;
+} ScannedEntry;
+
+static int compare_mtime(const void* a, const void* b) {
+    const struct timespec* x = &((const ScannedEntry*)a)->mtime;
+    const struct timespec* y = &((const ScannedEntry*)b)->mtime;
+    if (x->tv_sec != y->tv_sec) return x->tv_sec < y->tv_sec ? -1 : 1;
+    if (x->tv_nsec != y->tv_nsec) return x->tv_nsec < y->tv_nsec ? -1 : 1;
+    return 0;
+}
+
+/**
+ * Rebuild the index from the entry files on disk
+ *
+ * Modification times order the LRU list (hits touch their entry), and
+ * temporary files left by an interrupted store are removed.
+ */
+static int scan_directory(ExtractionCache* cache) {
+    DIR* top = opendir(cache->dir);
+    if (!top) return -1;
+    
+    ScannedEntry* found = NULL;
+    size_t count = 0, capacity = 0;
+    struct dirent* sub;
+    while ((sub = readdir(top)) != NULL) {
+        if (strlen(sub->d_name) != 2 || sub->d_name[0] == '.') continue;
+        
+        char sub_path[1100];
+        snprintf(sub_path, sizeof(sub_path), "%s/%s", cache->dir, sub->d_name);
+        DIR* d = opendir(sub_path);
+        if (!d) continue;
+        
+        struct dirent* ent;
+        while ((ent = readdir(d)) != NULL) {
+            char path[1400];
+            snprintf(path, sizeof(path), "%s/%s", sub_path, ent->d_name);
+            if (strstr(ent->d_name, ".tmp")) {
+                unlink(path);
+                continue;
+            }
+            
+            unsigned long long hi, lo;
+            char tail[8];
+            if (strlen(ent->d_name) != 35 ||
+                sscanf(ent->d_name, "%16llx%16llx%7s", &hi, &lo, tail) != 3 ||
+                strcmp(tail, ".xc") != 0) {
+                continue;
+            }
+            
+            struct stat st;
+            if (stat(path, &st) != 0) continue;
+            
+            if (count == capacity) {
+                capacity = capacity ? capacity * 2 : 1024;
+                ScannedEntry* grown = (ScannedEntry*)realloc(found, capacity * sizeof(ScannedEntry));
+                if (!grown) break;
+                found = grown;
+            }
+            found[count].key.hi = hi;
+            found[count].key.lo = lo;
+            found[count].bytes = (uint64_t)st.st_size;
+            found[count].mtime = st.st_mtim;
+            count++;
+        }
+        closedir(d);
+    }
+    closedir(top);
+    
+    // Oldest first, so the most recently used ends up at the head
+    if (count > 0) qsort(found, count, sizeof(ScannedEntry), compare_mtime);
+    for (size_t i = 0; i < count; i++) {
+        if (index_find(cache, &found[i].key) < 0) {
+            index_insert(cache, &found[i].key, found[i].bytes);
+        }
+    }
+    free(found);
+    
+    evict_to_limit(cache, -1);
+    return 0;
+}
+
+// ============================================================================
+// PUBLIC API
+// ============================================================================
+
+/**
+ * Open (or create) a cache directory
+ */
+ExtractionCache* extraction_cache_open(const char* dir, uint64_t max_bytes) {
+    if (!dir) return NULL;
+    
+    if (mkdir(dir, 0755) != 0 && errno != EEXIST) {
+        fprintf(stderr, "Cannot create extraction cache %s: %s\n", dir, strerror(errno));
+        return NULL;
+    }
+    
+    ExtractionCache* cache = (ExtractionCache*)calloc(1, sizeof(ExtractionCache));
+    if (!cache) return NULL;
+    
+    strncpy(cache->dir, dir, sizeof(cache->dir) - 1);
+    cache->max_bytes = max_bytes ? max_bytes : EXTRACTION_CACHE_DEFAULT_BYTES;
+    cache->free_list = -1;
+    cache->head = -1;
+    cache->tail = -1;
+    cache->bucket_mask = INITIAL_BUCKETS - 1;
+    cache->buckets = (int*)malloc(INITIAL_BUCKETS * sizeof(int));
+    if (!cache->buckets) {
+        free(cache);
+        return NULL;
+    }
+    for (int i = 0; i < INITIAL_BUCKETS; i++) cache->buckets[i] = -1;
+    pthread_mutex_init(&cache->lock, NULL);
+    
+    scan_directory(cache);
+    return cache;
+}
+
+/**
+ * Close the cache
+ */
+void extraction_cache_close(ExtractionCache* cache) {
+    if (!cache) return;
+    
+    if (g_default_cache == cache) {
+        g_default_cache = NULL;
+    }
+    
+    pthread_mutex_destroy(&cache->lock);
+    free(cache->nodes);
+    free(cache->buckets);
+    free(cache);
+}
+
+/**
+ * Drop an entry that could not be used (caller does not hold lock)
+ */
+static void discard_entry(ExtractionCache* cache, const ExtractionCacheKey* key, const char* path) {
+    unlink(path);
+    pthread_mutex_lock(&cache->lock);
+    int i = index_find(cache, key);
+    if (i >= 0) index_remove(cache, i);
+    cache->misses++;
+    pthread_mutex_unlock(&cache->lock);
+}
+
+/**
+ * Look up extracted text
+ */
+char* extraction_cache_get(ExtractionCache* cache, const ExtractionCacheKey* key,
+                           const char* extractor, size_t* length) {
+    if (!cache || !key) return NULL;
+    if (length) *length = 0;
+    
+    pthread_mutex_lock(&cache->lock);
+    int present = index_find(cache, key) >= 0;
+    if (!present) cache->misses++;
+    pthread_mutex_unlock(&cache->lock);
+    if (!present) return NULL;
+    
+    char path[1200];
+    entry_path(cache, key, path, sizeof(path));
+    
+    FILE* f = fopen(path, "rb");
+    if (!f) {
+        discard_entry(cache, key, path);
+        return NULL;
+    }
+    
+    ExtractionCacheHeader header;
+    if (fread(&header, sizeof(header), 1, f) != 1 ||
+        memcmp(header.magic, EXTRACTION_CACHE_MAGIC, 8) != 0 ||
+        header.version != EXTRACTION_CACHE_VERSION ||
+        header.key_hi != key->hi || header.key_lo != key->lo ||
+        strncmp(header.extractor, extractor ? extractor : "", sizeof(header.extractor)) != 0 ||
+        header.compressed_length > (uint64_t)compressBound(header.text_length)) {
+        fclose(f);
+        discard_entry(cache, key, path);
+        return NULL;
+    }
+    
+    // Same address, different document: a miss, but the entry stays for its own
+    if (memcmp(header.source_digest, key->digest, sizeof(key->digest)) != 0 ||
+        header.source_size != key->source_size) {
+        fclose(f);
+        pthread_mutex_lock(&cache->lock);
+        cache->misses++;
+        pthread_mutex_unlock(&cache->lock);
+        return NULL;
+    }
+    
+    unsigned char* compressed = (unsigned char*)malloc(header.compressed_length ? header.compressed_length : 1);
+    char* text = (char*)malloc(header.text_length + 1);
+    uLongf text_length = (uLongf)header.text_length;
+    int ok = compressed && text &&
+             fread(compressed, 1, header.compressed_length, f) == header.compressed_length &&
+             uncompress((Bytef*)text, &text_length, compressed, (uLong)header.compressed_length) == Z_OK &&
+             text_length == header.text_length;
+    fclose(f);
+    free(compressed);
+    if (!ok) {
+        free(text);
+        discard_entry(cache, key, path);
+        return NULL;
+    }
+    text[text_length] = '\0';
+    
+    // Most recently used, in memory and (for the next open) on disk
+    utimes(path, NULL);
+    pthread_mutex_lock(&cache->lock);
+    int i = index_find(cache, key);
+    if (i >= 0) {
+        lru_unlink(cache, i);
+        lru_push_front(cache, i);
+    }
+    cache->hits++;
+    pthread_mutex_unlock(&cache->lock);
+    
+    if (length) *length = (size_t)text_length;
+    return text;
+}
+
+/**
+ * Store extracted text
+ */
+int extraction_cache_put(ExtractionCache* cache, const ExtractionCacheKey* key,
+                         const char* extractor, const char* text, size_t length) {
+    if (!cache || !key || !text) return -1;
+    
+    uLongf compressed_length = compressBound((uLong)length);
+    unsigned char* compressed = (unsigned char*)malloc(compressed_length);
+    if (!compressed) return -1;
+    if (compress2(compressed, &compressed_length, (const Bytef*)text, (uLong)length,
+                  Z_DEFAULT_COMPRESSION) != Z_OK) {
+        free(compressed);
+        return -1;
+    }
+    
+    ExtractionCacheHeader header;
+    memset(&header, 0, sizeof(header));
+    memcpy(header.magic, EXTRACTION_CACHE_MAGIC, 8);
+    header.version = EXTRACTION_CACHE_VERSION;
+    header.key_hi = key->hi;
+    header.key_lo = key->lo;
+    header.text_length = length;
+    header.compressed_length = compressed_length;
+    strncpy(header.extractor, extractor ? extractor : "", sizeof(header.extractor) - 1);
+    memcpy(header.source_digest, key->digest, sizeof(key->digest));
+    header.source_size = key->source_size;
+    
+    char path[1200];
+    char sub_path[1100];
+    char tmp_path[1300];
+    entry_path(cache, key, path, sizeof(path));
+    snprintf(sub_path, sizeof(sub_path), "%s/%02x", cache->dir, (unsigned int)(key->hi >> 56));
+    mkdir(sub_path, 0755);
+    
+    pthread_mutex_lock(&cache->lock);
+    unsigned int serial = cache->tmp_counter++;
+    pthread_mutex_unlock(&cache->lock);
+    snprintf(tmp_path, sizeof(tmp_path), "%s.tmp.%d.%u", path, (int)getpid(), serial);
+    
+    // Write aside and rename, so readers never see a partial entry
+    FILE* f = fopen(tmp_path, "wb");
+    int ok = f != NULL;
+    if (f) {
+        ok = fwrite(&header, sizeof(header), 1, f) == 1 &&
+             fwrite(compressed, 1, compressed_length, f) == compressed_length;
+        ok = (fclose(f) == 0) && ok;
+    }
+    free(compressed);
+    if (!ok || rename(tmp_path, path) != 0) {
+        unlink(tmp_path);
+        return -1;
+    }
+    
+    uint64_t bytes = sizeof(header) + compressed_length;
+    pthread_mutex_lock(&cache->lock);
+    int i = index_find(cache, key);
+    if (i >= 0) {
+        cache->bytes = cache->bytes - cache->nodes[i].bytes + bytes;
+        cache->nodes[i].bytes = bytes;
+        lru_unlink(cache, i);
+        lru_push_front(cache, i);
+    } else {
+        i = index_insert(cache, key, bytes);
+    }
+    cache->stores++;
+    evict_to_limit(cache, i);
+    pthread_mutex_unlock(&cache->lock);
+    
+    return i >= 0 ? 0 : -1;
+}
+
+/**
+ * Get statistics snapshot
+ */
+void extraction_cache_get_stats(ExtractionCache* cache, ExtractionCacheStats* stats) {
+    if (!stats) return;
+    memset(stats, 0, sizeof(ExtractionCacheStats));
+    if (!cache) return;
+    
+    pthread_mutex_lock(&cache->lock);
+    stats->hits = cache->hits;
+    stats->misses = cache->misses;
+    stats->stores = cache->stores;
+    stats->evictions = cache->evictions;
+    stats->entries = cache->entries;
+    stats->bytes = cache->bytes;
+    stats->max_bytes = cache->max_bytes;
+    pthread_mutex_unlock(&cache->lock);
+}
+
+/**
+ * Print statistics
+ */
+void extraction_cache_print_stats(ExtractionCache* cache) {
+    if (!cache) return;
+    
+    ExtractionCacheStats stats;
+    extraction_cache_get_stats(cache, &stats);
+    
+    uint64_t lookups = stats.hits + stats.misses;
+    printf("\n=== Extraction Cache Statistics ===\n");
+    printf("Lookups: %lu (%lu hits, %.1f%%), stores: %lu, evictions: %lu\n",
+           (unsigned long)lookups, (unsigned long)stats.hits,
+           lookups ? 100.0 * stats.hits / lookups : 0.0,
+           (unsigned long)stats.stores, (unsigned long)stats.evictions);
+    printf("Entries: %lu, size: %.1f MB of %.1f MB\n",
+           (unsigned long)stats.entries, stats.bytes / 1e6, stats.max_bytes / 1e6);
+}
+
+/**
+ * Set process-wide default cache
+ */
+void extraction_cache_set_default(ExtractionCache* cache) {
+    g_default_cache = cache;
+}
+
+/**
+ * Get process-wide default cache
+ */
+ExtractionCache* extraction_cache_get_default(void) {
+    return g_default_cache;
+}
@@ -0,0 +1,135 @@
+#ifndef EXTRACTION_CACHE_H
+#define EXTRACTION_CACHE_H
+
+#include <stddef.h>
+#include <stdint.h>
+
+/**
+ * Content-Addressed Extraction Cache
+ *
+ * Stores the text extracted from a document under a hash of the
+ * document's bytes, so a file that is downloaded again (re-crawled,
+ * fetched from a mirror, re-queued) is not run through pdftotext,
+ * tesseract or the Python extractors a second time.
+ *
+ * Features:
+ * - Keyed by the SHA-256 of the file contents; the entry is addressed by
+ *   128 bits of a SHA-256 over that digest and the extractor name, and a
+ *   hit requires the stored digest and document size to match
+ * - One zlib-compressed file per entry, with the extractor name and
+ *   EXTRACTION_CACHE_VERSION in its header; entries written by another
+ *   version are treated as misses
+ * - Total size bounded by LRU eviction; the index is rebuilt from the
+ *   directory (ordered by modification time) when the cache is opened
+ * - Thread-safe: any number of preprocessor threads may share one cache
+ *
+ * On-disk layout: <dir>/<first two hex digits>/<32 hex digits>.xc
+ */
+
+#define EXTRACTION_CACHE_VERSION 2                         // Bump when extractor output changes
+#define EXTRACTION_CACHE_DEFAULT_BYTES (1024ULL * 1024 * 1024)
+#define EXTRACTION_CACHE_MAX_EXTRACTOR 32
+
+// Cache key: digest of the document bytes and an address that includes the extractor name
+typedef struct {
+    uint64_t hi;                // Entry address (file name and index)
+    uint64_t lo;
+    unsigned char digest[32];   // SHA-256 of the document
+    uint64_t source_size;       // Document size in bytes
+} ExtractionCacheKey;
+
+// Statistics snapshot
+typedef struct {
+    uint64_t hits;              // Lookups that returned text
+    uint64_t misses;            // Lookups that found nothing usable
+    uint64_t stores;            // Entries written
+    uint64_t evictions;         // Entries removed to stay under the size limit
+    uint64_t entries;           // Entries currently in the cache
+    uint64_t bytes;             // Current size on disk
+    uint64_t max_bytes;         // Size limit
+} ExtractionCacheStats;
+
+// Cache handle
+typedef struct ExtractionCache ExtractionCache;
+
+/**
+ * Open (or create) a cache directory
+ *
+ * @param dir Cache directory
+ * @param max_bytes Size limit on disk (0 for EXTRACTION_CACHE_DEFAULT_BYTES)
+ * @return Cache or NULL on error
+ */
+ExtractionCache* extraction_cache_open(const char* dir, uint64_t max_bytes);
+
+/**
+ * Close the cache (entries stay on disk)
+ *
+ * @param cache Cache
+ */
+void extraction_cache_close(ExtractionCache* cache);
+
+/**
+ * Compute the key for a document
+ *
+ * @param filepath Document to hash
+ * @param extractor Name of the extractor that will produce the text
+ * @param key Output key
+ * @return 0 on success, -1 if the file cannot be read
+ */
+int extraction_cache_key_file(const char* filepath, const char* extractor, ExtractionCacheKey* key);
+
+/**
+ * Look up extracted text
+ *
+ * @param cache Cache
+ * @param key Document key
+ * @param extractor Extractor name (must match the stored entry)
+ * @param length Output: text length in bytes (can be NULL)
+ * @return NUL-terminated text (caller frees), or NULL on a miss
+ */
+char* extraction_cache_get(ExtractionCache* cache, const ExtractionCacheKey* key,
+                           const char* extractor, size_t* length);
+
+/**
+ * Store extracted text, evicting least recently used entries if needed
+ *
+ * @param cache Cache
+ * @param key Document key
+ * @param extractor Extractor name
+ * @param text Extracted text
+ * @param length Text length in bytes
+ * @return 0 on success, -1 on error
+ */
+int extraction_cache_put(ExtractionCache* cache, const ExtractionCacheKey* key,
+                         const char* extractor, const char* text, size_t length);
+
+/**
+ * Get statistics snapshot
+ *
+ * @param cache Cache
+ * @param stats Output statistics
+ */
+void extraction_cache_get_stats(ExtractionCache* cache, ExtractionCacheStats* stats);
+
+/**
+ * Print statistics (hit rate and size)
+ *
+ * @param cache Cache
+ */
+void extraction_cache_print_stats(ExtractionCache* cache);
+
+/**
+ * Set process-wide default cache used by file_processor.c
+ *
+ * @param cache Cache (NULL to clear)
+ */
+void extraction_cache_set_default(ExtractionCache* cache);
+
+/**
+ * Get process-wide default cache
+ *
+ * @return Default cache or NULL if none is open
+ */
+ExtractionCache* extraction_cache_get_default(void);
+
+#endif // EXTRACTION_CACHE_H
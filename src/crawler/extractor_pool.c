@@ -0,0 +1,443 @@
+/**
+ * Persistent Extraction Worker Pool Implementation
+ *
+ * Each worker is a long-lived `universal_extractor.py --serve` process
+ * connected through a Unix socketpair. Workers import their Python
+ * dependencies once at startup, so per-document cost is only the
+ * extraction itself. No worker is started until a document needs one,
+ * and another is added only when every running worker is busy.
+ */
+
+#define _GNU_SOURCE
+#include "extractor_pool.h"
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <ctype.h>
+#include <errno.h>
+#include <time.h>
+#include <poll.h>
+#include <signal.h>
+#include <unistd.h>
+#include <pthread.h>
+#include <arpa/inet.h>
+#include <sys/socket.h>
+#include <sys/types.h>
+#include <sys/wait.h>
+
+// One worker process
+typedef struct {
+    pid_t pid;                  // Worker process ID (-1 if not running)
+    int fd;                     // Our end of the socketpair
+    int busy;                   // 1 while owned by a caller
+} ExtractorWorker;
+
+// Worker pool structure
+struct ExtractorPool {
+    char script_path[1024];
+    int num_workers;            // Upper bound on started workers
+    int num_started;            // Slots in use (workers[0..num_started))
+    ExtractorWorker workers[EXTRACTOR_MAX_WORKERS];
+    int idle_count;             // Started workers not owned by a caller
+    int queue_depth;
+    int max_queue_depth;
+    uint64_t respawns;
+    int shutting_down;
+    ExtractorFormatStats formats[EXTRACTOR_MAX_FORMATS];
+    int num_formats;
+    pthread_mutex_t lock;
+    pthread_cond_t available;
+};
+
+static ExtractorPool* g_default_pool = NULL;
+
+/**
+ * Milliseconds from a monotonic clock
+ */
+static double now_ms(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return ts.tv_sec * 1000.0 + ts.tv_nsec / 1000000.0;
+}
+
+/**
+ * Spawn worker process
+ */
+static int spawn_worker(ExtractorPool* pool, ExtractorWorker* worker) {
+    int sv[2];
+    if (socketpair(AF_UNIX, SOCK_STREAM | SOCK_CLOEXEC, 0, sv) != 0) {
+        fprintf(stderr, "Extractor pool: socketpair failed: %s\n", strerror(errno));
+        return -1;
+    }
+    
+    pid_t pid = fork();
+    if (pid < 0) {
+        fprintf(stderr, "Extractor pool: fork failed: %s\n", strerror(errno));
+        close(sv[0]);
+        close(sv[1]);
+        return -1;
+    }
+    
+    if (pid == 0) {
+        // Child: socket becomes stdin/stdout (dup2 clears CLOEXEC)
+        dup2(sv[1], STDIN_FILENO);
+        dup2(sv[1], STDOUT_FILENO);
+        execlp("python3", "python3", pool->script_path, "--serve", (char*)NULL);
+        _exit(127);
+    }
+    
+    close(sv[1]);
+    worker->pid = pid;
+    worker->fd = sv[0];
+    return 0;
+}
+
+/**
+ * Stop worker process
+ */
+static void stop_worker(ExtractorWorker* worker, int force) {
+    if (worker->fd >= 0) {
+        close(worker->fd);
+        worker->fd = -1;
+    }
+    if (worker->pid > 0) {
+        // Closing the socket makes an idle worker exit on EOF
+        kill(worker->pid, force ? SIGKILL : SIGTERM);
+        waitpid(worker->pid, NULL, 0);
+        worker->pid = -1;
+    }
+}
+
+/**
+ * Write exactly n bytes
+ */
+static int write_all(int fd, const void* buf, size_t n) {
+    const char* p = (const char*)buf;
+    while (n > 0) {
+        ssize_t w = send(fd, p, n, MSG_NOSIGNAL);
+        if (w < 0) {
+            if (errno == EINTR) continue;
+            return -1;
+        }
+        p += w;
+        n -= (size_t)w;
+    }
+    return 0;
+}
+
+/**
+ * Read exactly n bytes before the deadline (buf may be NULL to discard)
+ */
+static int read_all(int fd, void* buf, size_t n, double deadline) {
+    char scratch[8192];
+    char* p = (char*)buf;
+    
+    while (n > 0) {
+        int remaining = (int)(deadline - now_ms());
+        if (remaining <= 0) return -1;
+        
+        struct pollfd pfd = { .fd = fd, .events = POLLIN };
+        int ready = poll(&pfd, 1, remaining);
+        if (ready < 0) {
+            if (errno == EINTR) continue;
+            return -1;
+        }
+        if (ready == 0) return -1;  // Timeout
+        
+        size_t want = n;
+        char* dst = p;
+        if (!p) {
+            dst = scratch;
+            if (want > sizeof(scratch)) want = sizeof(scratch);
+        }
+        
+        ssize_t r = recv(fd, dst, want, 0);
+        if (r < 0) {
+            if (errno == EINTR) continue;
+            return -1;
+        }
+        if (r == 0) return -1;  // Worker exited
+        
+        if (p) p += r;
+        n -= (size_t)r;
+    }
+    return 0;
+}
+
+/**
+ * Derive format name from hint or file extension
+ */
+static void resolve_format_name(const char* filepath, const char* format, char* name, size_t size) {
+    const char* src = format;
+    if (!src || !*src) {
+        const char* slash = strrchr(filepath, '/');
+        const char* dot = strrchr(filepath, '.');
+        src = (dot && (!slash || dot > slash)) ? dot + 1 : "unknown";
+    }
+    
+    size_t i = 0;
+    for (; src[i] && i < size - 1; i++) {
+        name[i] = (char)tolower((unsigned char)src[i]);
+    }
+    name[i] = '\0';
+}
+
+/**
+ * Record one request in the per-format statistics (lock held)
+ */
+static void record_stats(ExtractorPool* pool, const char* format, double ms, int failed) {
+    ExtractorFormatStats* stats = NULL;
+    for (int i = 0; i < pool->num_formats; i++) {
+        if (strcmp(pool->formats[i].format, format) == 0) {
+            stats = &pool->formats[i];
+            break;
+        }
+    }
+    
+    if (!stats) {
+        if (pool->num_formats >= EXTRACTOR_MAX_FORMATS) return;
+        stats = &pool->formats[pool->num_formats++];
+        snprintf(stats->format, sizeof(stats->format), "%s", format);
+    }
+    
+    stats->requests++;
+    if (failed) stats->failures++;
+    stats->total_ms += ms;
+    if (ms > stats->max_ms) stats->max_ms = ms;
+}
+
+/**
+ * Create pool (workers are started on demand)
+ */
+ExtractorPool* extractor_pool_create(const char* script_path, int num_workers) {
+    ExtractorPool* pool = (ExtractorPool*)calloc(1, sizeof(ExtractorPool));
+    if (!pool) return NULL;
+    
+    strncpy(pool->script_path, script_path ? script_path : EXTRACTOR_SCRIPT_PATH,
+            sizeof(pool->script_path) - 1);
+    
+    if (num_workers <= 0) {
+        const char* env = getenv(EXTRACTOR_WORKERS_ENV);
+        num_workers = env ? atoi(env) : 0;
+        if (num_workers <= 0) num_workers = EXTRACTOR_DEFAULT_WORKERS;
+    }
+    if (num_workers > EXTRACTOR_MAX_WORKERS) num_workers = EXTRACTOR_MAX_WORKERS;
+    pool->num_workers = num_workers;
+    
+    for (int i = 0; i < EXTRACTOR_MAX_WORKERS; i++) {
+        pool->workers[i].pid = -1;
+        pool->workers[i].fd = -1;
+    }
+    
+    pthread_mutex_init(&pool->lock, NULL);
+    pthread_cond_init(&pool->available, NULL);
+    
+    printf("✓ Extractor pool ready: up to %d workers, started on demand (%s)\n",
+           num_workers, pool->script_path);
+    return pool;
+}
+
+/**
+ * Stop all workers and free the pool
+ */
+void extractor_pool_destroy(ExtractorPool* pool) {
+    if (!pool) return;
+    
+    pthread_mutex_lock(&pool->lock);
+    pool->shutting_down = 1;
+    pthread_cond_broadcast(&pool->available);
+    
+    // Wait for in-flight requests to finish
+    while (pool->idle_count < pool->num_started) {
+        pthread_cond_wait(&pool->available, &pool->lock);
+    }
+    pthread_mutex_unlock(&pool->lock);
+    
+    for (int i = 0; i < pool->num_started; i++) {
+        stop_worker(&pool->workers[i], 0);
+    }
+    
+    if (g_default_pool == pool) {
+        g_default_pool = NULL;
+    }
+    
+    pthread_mutex_destroy(&pool->lock);
+    pthread_cond_destroy(&pool->available);
+    free(pool);
+}
+
+/**
+ * Run one request on an owned worker
+ */
+static int run_request(ExtractorWorker* worker, const char* filepath, const char* format,
+                       char* output_text, size_t output_size) {
+    uint32_t format_len = format ? (uint32_t)strlen(format) : 0;
+    uint32_t path_len = (uint32_t)strlen(filepath);
+    uint32_t header[2] = { htonl(format_len), htonl(path_len) };
+    
+    if (write_all(worker->fd, header, sizeof(header)) != 0 ||
+        (format_len && write_all(worker->fd, format, format_len) != 0) ||
+        write_all(worker->fd, filepath, path_len) != 0) {
+        return -2;
+    }
+    
+    double deadline = now_ms() + EXTRACTOR_TIMEOUT_MS;
+    uint32_t response[2];
+    if (read_all(worker->fd, response, sizeof(response), deadline) != 0) {
+        return -2;
+    }
+    
+    int32_t status = (int32_t)ntohl(response[0]);
+    size_t text_len = ntohl(response[1]);
+    size_t keep = text_len < output_size - 1 ? text_len : output_size - 1;
+    
+    if (read_all(worker->fd, output_text, keep, deadline) != 0 ||
+        read_all(worker->fd, NULL, text_len - keep, deadline) != 0) {
+        return -2;
+    }
+    output_text[keep] = '\0';
+    
+    if (status != 0 || keep == 0) {
+        return -1;
+    }
+    return (int)keep;
+}
+
+/**
+ * Extract text using a pooled worker
+ */
+int extractor_pool_extract(ExtractorPool* pool, const char* filepath, const char* format,
+                           char* output_text, size_t output_size) {
+    if (!pool || !filepath || !output_text || output_size == 0) return -1;
+    
+    char format_name[16];
+    resolve_format_name(filepath, format, format_name, sizeof(format_name));
+    
+    // Acquire an idle worker, or claim a new slot while below the limit
+    pthread_mutex_lock(&pool->lock);
+    pool->queue_depth++;
+    if (pool->queue_depth > pool->max_queue_depth) {
+        pool->max_queue_depth = pool->queue_depth;
+    }
+    while (pool->idle_count == 0 && pool->num_started >= pool->num_workers &&
+           !pool->shutting_down) {
+        pthread_cond_wait(&pool->available, &pool->lock);
+    }
+    pool->queue_depth--;
+    
+    if (pool->shutting_down) {
+        pthread_mutex_unlock(&pool->lock);
+        return -1;
+    }
+    
+    ExtractorWorker* worker = NULL;
+    int fresh = 0;
+    if (pool->idle_count > 0) {
+        for (int i = 0; i < pool->num_started; i++) {
+            if (!pool->workers[i].busy) {
+                worker = &pool->workers[i];
+                break;
+            }
+        }
+        pool->idle_count--;
+    } else {
+        worker = &pool->workers[pool->num_started++];
+        fresh = 1;
+    }
+    worker->busy = 1;
+    pthread_mutex_unlock(&pool->lock);
+    
+    double start = now_ms();
+    int result = -1;
+    int respawned = 0;
+    
+    // First use of the slot, or a worker that failed to restart earlier
+    if (worker->pid <= 0) {
+        respawned = !fresh;
+        if (spawn_worker(pool, worker) != 0) {
+            worker->pid = -1;
+        }
+    }
+    
+    if (worker->pid > 0) {
+        result = run_request(worker, filepath, format, output_text, output_size);
+        if (result == -2) {
+            // Crashed, hung or protocol desync: replace the worker
+            fprintf(stderr, "Extractor pool: worker %d failed on %s, restarting\n",
+                    (int)worker->pid, filepath);
+            stop_worker(worker, 1);
+            if (spawn_worker(pool, worker) == 0) respawned = 1;
+            result = -1;
+        }
+    }
+    
+    double elapsed = now_ms() - start;
+    
+    // Release worker
+    pthread_mutex_lock(&pool->lock);
+    record_stats(pool, format_name, elapsed, result < 0);
+    if (respawned) pool->respawns++;
+    worker->busy = 0;
+    pool->idle_count++;
+    pthread_cond_broadcast(&pool->available);
+    pthread_mutex_unlock(&pool->lock);
+    
+    return result;
+}
+
+/**
+ * Get statistics snapshot
+ */
+void extractor_pool_get_stats(ExtractorPool* pool, ExtractorPoolStats* stats) {
+    if (!stats) return;
+    memset(stats, 0, sizeof(ExtractorPoolStats));
+    if (!pool) return;
+    
+    pthread_mutex_lock(&pool->lock);
+    stats->num_workers = pool->num_workers;
+    stats->started_workers = pool->num_started;
+    stats->idle_workers = pool->idle_count;
+    stats->queue_depth = pool->queue_depth;
+    stats->max_queue_depth = pool->max_queue_depth;
+    stats->respawns = pool->respawns;
+    stats->num_formats = pool->num_formats;
+    memcpy(stats->formats, pool->formats, sizeof(ExtractorFormatStats) * pool->num_formats);
+    pthread_mutex_unlock(&pool->lock);
+}
+
+/**
+ * Print statistics
+ */
+void extractor_pool_print_stats(ExtractorPool* pool) {
+    if (!pool) return;
+    
+    ExtractorPoolStats stats;
+    extractor_pool_get_stats(pool, &stats);
+    
+    printf("\n=== Extractor Pool Statistics ===\n");
+    printf("Workers: %d of %d started (%d idle), queue depth: %d (max %d), respawns: %lu\n",
+           stats.started_workers, stats.num_workers, stats.idle_workers, stats.queue_depth,
+           stats.max_queue_depth, (unsigned long)stats.respawns);
+    
+    for (int i = 0; i < stats.num_formats; i++) {
+        ExtractorFormatStats* f = &stats.formats[i];
+        double avg = f->requests ? f->total_ms / f->requests : 0.0;
+        printf("  %-8s %8lu requests, %6lu failed, avg %8.2f ms, max %8.2f ms\n",
+               f->format, (unsigned long)f->requests, (unsigned long)f->failures,
+               avg, f->max_ms);
+    }
+}
+
+/**
+ * Set process-wide default pool
+ */
+void extractor_pool_set_default(ExtractorPool* pool) {
+    g_default_pool = pool;
+}
+
+/**
+ * Get process-wide default pool
+ */
+ExtractorPool* extractor_pool_get_default(void) {
+    return g_default_pool;
+}
@@ -0,0 +1,122 @@
+#ifndef EXTRACTOR_POOL_H
+#define EXTRACTOR_POOL_H
+
+#include <stddef.h>
+#include <stdint.h>
+
+/**
+ * Persistent Extraction Worker Pool
+ *
+ * Keeps a set of pre-warmed `universal_extractor.py --serve` processes
+ * alive so DOCX/XLSX/PPTX/EPUB/YAML documents no longer pay interpreter
+ * startup and module imports for every file.
+ *
+ * Features:
+ * - Framed request/response protocol over a Unix socketpair per worker
+ * - Workers are spawned lazily: the first when a document needs one,
+ *   another only while every running worker is busy, up to the limit
+ * - Workers are respawned if they die or hang
+ * - Thread-safe: any number of preprocessor threads may share one pool
+ * - Per-format latency statistics and queue depth reporting
+ *
+ * Wire protocol (all integers big-endian):
+ *   request:  uint32 format_len, uint32 path_len, format bytes, path bytes
+ *   response: int32 status (0 = ok), uint32 text_len, text bytes
+ */
+
+#define EXTRACTOR_SCRIPT_PATH "src/crawler/universal_extractor.py"
+#define EXTRACTOR_MAX_WORKERS 64
+#define EXTRACTOR_DEFAULT_WORKERS 2                    // Limit when none is given
+#define EXTRACTOR_WORKERS_ENV "CLLM_EXTRACTOR_WORKERS" // Overrides the default limit
+#define EXTRACTOR_MAX_FORMATS 32
+#define EXTRACTOR_TIMEOUT_MS 120000
+
+// Latency statistics for one document format
+typedef struct {
+    char format[16];            // Format name (docx, xlsx, ...)
+    uint64_t requests;          // Completed requests
+    uint64_t failures;          // Requests that returned no text
+    double total_ms;            // Sum of request latencies
+    double max_ms;              // Slowest request
+} ExtractorFormatStats;
+
+// Pool-wide statistics snapshot
+typedef struct {
+    int num_workers;            // Configured worker limit
+    int started_workers;        // Workers started so far
+    int idle_workers;           // Workers currently waiting for work
+    int queue_depth;            // Callers currently waiting for a worker
+    int max_queue_depth;        // High-water mark of queue_depth
+    uint64_t respawns;          // Workers restarted after crash/timeout
+    int num_formats;            // Valid entries in formats[]
+    ExtractorFormatStats formats[EXTRACTOR_MAX_FORMATS];
+} ExtractorPoolStats;
+
+// Worker pool handle
+typedef struct ExtractorPool ExtractorPool;
+
+/**
+ * Create pool
+ *
+ * No process is started here; see extractor_pool_extract.
+ *
+ * @param script_path Path to universal_extractor.py (NULL for default)
+ * @param num_workers Maximum worker processes (0 = $CLLM_EXTRACTOR_WORKERS,
+ *                    else EXTRACTOR_DEFAULT_WORKERS)
+ * @return Pool or NULL on error
+ */
+ExtractorPool* extractor_pool_create(const char* script_path, int num_workers);
+
+/**
+ * Stop all workers and free the pool
+ *
+ * @param pool Worker pool
+ */
+void extractor_pool_destroy(ExtractorPool* pool);
+
+/**
+ * Extract text from a document using a pooled worker
+ *
+ * Starts a worker if none is idle and the pool is below its limit,
+ * otherwise blocks until a worker is available.
+ *
+ * @param pool Worker pool
+ * @param filepath Document to extract
+ * @param format Format hint (e.g. "docx"), or NULL to use the file extension
+ * @param output_text Output buffer
+ * @param output_size Output buffer size
+ * @return Number of bytes extracted, or -1 on error
+ */
+int extractor_pool_extract(ExtractorPool* pool, const char* filepath, const char* format,
+                           char* output_text, size_t output_size);
+
+/**
+ * Get statistics snapshot
+ *
+ * @param pool Worker pool
+ * @param stats Output statistics
+ */
+void extractor_pool_get_stats(ExtractorPool* pool, ExtractorPoolStats* stats);
+
+/**
+ * Print statistics (per-format latency and queue depth)
+ *
+ * @param pool Worker pool
+ */
+void extractor_pool_print_stats(ExtractorPool* pool);
+
+/**
+ * Set process-wide default pool used by file_processor.c
+ *
+ * @param pool Worker pool (NULL to clear)
+ */
+void extractor_pool_set_default(ExtractorPool* pool);
+
+/**
+ * Get process-wide default pool
+ *
+ * @return Default pool or NULL if none is running
+ */
+ExtractorPool* extractor_pool_get_default(void);
+
+#endif // EXTRACTOR_POOL_H
@@ -0,0 +1,590 @@
+/**
+ * Concurrent Fetch Engine Implementation
+ *
+ * One curl multi handle drives all transfers. Easy handles are recycled
+ * so their connections and TLS sessions stay warm, and a share handle
+ * pools DNS and TLS session caches. Requests wait in a FIFO until their
+ * host has a free slot and its politeness gap has elapsed.
+ */
+
+#include "fetch_engine.h"
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <ctype.h>
+#include <time.h>
+#include <unistd.h>
+#include <curl/curl.h>
+
+#define FETCH_MAX_HOST 256
+#define FETCH_INITIAL_HOSTS 64
+
+/**
+ * One queued or in-flight request
+ */
+typedef struct FetchRequest {
+    char* url;
+    char* path;
+    char* part_path;               // Hidden temp file, renamed on success
+    char* prefix;
+    void* user_data;
+    int host;                      // Index into engine->hosts
+    int slot;                      // Index into engine->active
+    CURL* easy;
+    FILE* file;
+    size_t bytes;
+    size_t max_bytes;              // 0 = unlimited
+    double start_ms;
+    char error[CURL_ERROR_SIZE];
+    struct FetchRequest* next;     // Pending list link
+} FetchRequest;
+
+/**
+ * Per-host politeness state
+ */
+typedef struct {
+    char name[FETCH_MAX_HOST];
+    int in_flight;
+    double next_start_ms;          // Earliest start of the next request
+} FetchHost;
+
+struct FetchEngine {
+    FetchEngineConfig config;
+    FetchCallback callback;
+    void* callback_data;
+    
+    CURLM* multi;
+    CURLSH* share;
+    
+    CURL** idle_handles;           // Recycled easy handles
+    int num_idle;
+    
+    FetchRequest* pending_head;    // FIFO of requests not yet started
+    FetchRequest* pending_tail;
+    int num_pending;
+    
+    FetchRequest** active;         // In-flight requests
+    int num_active;
+    
+    FetchHost* hosts;
+    int num_hosts;
+    int hosts_capacity;
+    int* host_index;               // Open addressing: host hash -> hosts[] + 1
+    int host_index_mask;
+    
+    unsigned int rng_state;
+    FetchEngineStats stats;
+};
+
+/**
+ * Monotonic clock in milliseconds
+ */
+static double now_ms(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return ts.tv_sec * 1000.0 + ts.tv_nsec / 1e6;
+}
+
+// ============================================================================
+// HOST TABLE
+// ============================================================================
+
+/**
+ * Extract the lowercase host[:port] of a URL
+ */
+static void url_host(const char* url, char* host, size_t size) {
+    const char* start = strstr(url, "://");
+    start = start ? start + 3 : url;
+    
+    size_t len = strcspn(start, "/?#");
+    const char* at = memchr(start, '@', len);
+    if (at) {
+        len -= (at + 1) - start;
+        start = at + 1;
+    }
+    if (len >= size) len = size - 1;
+    
+    for (size_t i = 0; i < len; i++) {
+        host[i] = (char)tolower((unsigned char)start[i]);
+    }
+    host[len] = '\0';
+}
+
+static unsigned int hash_host(const char* name) {
+    unsigned int h = 2166136261u;
+    for (const char* p = name; *p; p++) {
+        h = (h ^ (unsigned char)*p) * 16777619u;
+    }
+    return h;
+}
+
+/**
+ * Find or create the host entry for a URL
+ */
+static int lookup_host(FetchEngine* engine, const char* url) {
+    char name[FETCH_MAX_HOST];
+    url_host(url, name, sizeof(name));
+    
+    unsigned int i = hash_host(name) & engine->host_index_mask;
+    while (engine->host_index[i]) {
+        int h = engine->host_index[i] - 1;
+        if (strcmp(engine->hosts[h].name, name) == 0) return h;
+        i = (i + 1) & engine->host_index_mask;
+    }
+    
+    // Grow storage and rehash at 50% load
+    if (engine->num_hosts >= engine->hosts_capacity) {
+        int capacity = engine->hosts_capacity * 2;
+        FetchHost* hosts = (FetchHost*)realloc(engine->hosts, capacity * sizeof(FetchHost));
+        int* index = (int*)calloc(capacity * 2, sizeof(int));
+        if (!hosts || !index) {
+            if (hosts) engine->hosts = hosts;
+            free(index);
+            return -1;
+        }
+        engine->hosts = hosts;
+        engine->hosts_capacity = capacity;
+        free(engine->host_index);
+        engine->host_index = index;
+        engine->host_index_mask = capacity * 2 - 1;
+        for (int h = 0; h < engine->num_hosts; h++) {
+            unsigned int j = hash_host(hosts[h].name) & engine->host_index_mask;
+            while (index[j]) j = (j + 1) & engine->host_index_mask;
+            index[j] = h + 1;
+        }
+        i = hash_host(name) & engine->host_index_mask;
+        while (engine->host_index[i]) i = (i + 1) & engine->host_index_mask;
+    }
+    
+    int h = engine->num_hosts++;
+    FetchHost* host = &engine->hosts[h];
+    memset(host, 0, sizeof(FetchHost));
+    strcpy(host->name, name);
+    engine->host_index[i] = h + 1;
+    engine->stats.hosts = engine->num_hosts;
+    return h;
+}
+
+/**
+ * Politeness gap for the next request on a host
+ */
+static double host_delay(FetchEngine* engine) {
+    int min_ms = engine->config.host_delay_min_ms;
+    int max_ms = engine->config.host_delay_max_ms;
+    if (max_ms <= min_ms) return min_ms;
+    return min_ms + rand_r(&engine->rng_state) % (max_ms - min_ms + 1);
+}
+
+// ============================================================================
+// ENGINE LIFECYCLE
+// ============================================================================
+
+/**
+ * Create a fetch engine
+ */
+FetchEngine* fetch_engine_create(const FetchEngineConfig* config, FetchCallback callback, void* callback_data) {
+    FetchEngine* engine = (FetchEngine*)calloc(1, sizeof(FetchEngine));
+    if (!engine) return NULL;
+    
+    if (config) engine->config = *config;
+    if (engine->config.max_in_flight <= 0) engine->config.max_in_flight = FETCH_DEFAULT_IN_FLIGHT;
+    if (engine->config.max_per_host <= 0) engine->config.max_per_host = FETCH_DEFAULT_PER_HOST;
+    if (engine->config.timeout_seconds <= 0) engine->config.timeout_seconds = FETCH_DEFAULT_TIMEOUT;
+    if (!engine->config.user_agent) engine->config.user_agent = FETCH_DEFAULT_USER_AGENT;
+    engine->callback = callback;
+    engine->callback_data = callback_data;
+    engine->rng_state = (unsigned int)time(NULL);
+    
+    curl_global_init(CURL_GLOBAL_DEFAULT);
+    
+    int max = engine->config.max_in_flight;
+    engine->multi = curl_multi_init();
+    engine->share = curl_share_init();
+    engine->idle_handles = (CURL**)calloc(max, sizeof(CURL*));
+    engine->active = (FetchRequest**)calloc(max, sizeof(FetchRequest*));
+    engine->hosts_capacity = FETCH_INITIAL_HOSTS;
+    engine->hosts = (FetchHost*)calloc(engine->hosts_capacity, sizeof(FetchHost));
+    engine->host_index = (int*)calloc(engine->hosts_capacity * 2, sizeof(int));
+    engine->host_index_mask = engine->hosts_capacity * 2 - 1;
+    
+    if (!engine->multi || !engine->share || !engine->idle_handles || !engine->active ||
+        !engine->hosts || !engine->host_index) {
+        fetch_engine_destroy(engine);
+        return NULL;
+    }
+    
+    // DNS and TLS sessions are shared by all transfers
+    curl_share_setopt(engine->share, CURLSHOPT_SHARE, CURL_LOCK_DATA_DNS);
+    curl_share_setopt(engine->share, CURLSHOPT_SHARE, CURL_LOCK_DATA_SSL_SESSION);
+    
+    // Connection pool: per-host and total limits, idle connections kept warm
+    curl_multi_setopt(engine->multi, CURLMOPT_MAX_HOST_CONNECTIONS, (long)engine->config.max_per_host);
+    curl_multi_setopt(engine->multi, CURLMOPT_MAX_TOTAL_CONNECTIONS, (long)max);
+    curl_multi_setopt(engine->multi, CURLMOPT_MAXCONNECTS, (long)max * 2);
+    curl_multi_setopt(engine->multi, CURLMOPT_PIPELINING, CURLPIPE_MULTIPLEX);
+    
+    return engine;
+}
+
+static void free_request(FetchRequest* req) {
+    free(req->url);
+    free(req->path);
+    free(req->part_path);
+    free(req->prefix);
+    free(req);
+}
+
+/**
+ * Destroy the engine, aborting unfinished requests
+ */
+void fetch_engine_destroy(FetchEngine* engine) {
+    if (!engine) return;
+    
+    for (int i = 0; i < engine->num_active; i++) {
+        FetchRequest* req = engine->active[i];
+        curl_multi_remove_handle(engine->multi, req->easy);
+        curl_easy_cleanup(req->easy);
+        if (req->file) fclose(req->file);
+        unlink(req->part_path);
+        free_request(req);
+    }
+    
+    while (engine->pending_head) {
+        FetchRequest* req = engine->pending_head;
+        engine->pending_head = req->next;
+        free_request(req);
+    }
+    
+    for (int i = 0; i < engine->num_idle; i++) {
+        curl_easy_cleanup(engine->idle_handles[i]);
+    }
+    
+    if (engine->multi) curl_multi_cleanup(engine->multi);
+    if (engine->share) curl_share_cleanup(engine->share);
+    curl_global_cleanup();
+    
+    free(engine->idle_handles);
+    free(engine->active);
+    free(engine->hosts);
+    free(engine->host_index);
+    free(engine);
+}
+
+// ============================================================================
+// SUBMISSION AND TRANSFERS
+// ============================================================================
+
+/**
+ * Hidden temp name next to the destination: dir/.name.part
+ */
+static char* make_part_path(const char* path) {
+    const char* slash = strrchr(path, '/');
+    size_t dir_len = slash ? (size_t)(slash - path) + 1 : 0;
+    size_t size = strlen(path) + 7;
+    
+    char* part = (char*)malloc(size);
+    if (!part) return NULL;
+    snprintf(part, size, "%.*s.%s.part", (int)dir_len, path, path + dir_len);
+    return part;
+}
+
+/**
+ * Queue a URL for download
+ */
+int fetch_engine_submit(FetchEngine* engine, const char* url, const char* path,
+                        const char* prefix, void* user_data) {
+    if (!engine || !url || !path) return -1;
+    
+    FetchRequest* req = (FetchRequest*)calloc(1, sizeof(FetchRequest));
+    if (!req) return -1;
+    
+    req->url = strdup(url);
+    req->path = strdup(path);
+    req->part_path = make_part_path(path);
+    req->prefix = prefix ? strdup(prefix) : NULL;
+    req->user_data = user_data;
+    req->host = lookup_host(engine, url);
+    req->slot = -1;
+    
+    if (!req->url || !req->path || !req->part_path || (prefix && !req->prefix) || req->host < 0) {
+        free_request(req);
+        return -1;
+    }
+    
+    if (engine->pending_tail) {
+        engine->pending_tail->next = req;
+    } else {
+        engine->pending_head = req;
+    }
+    engine->pending_tail = req;
+    engine->num_pending++;
+    engine->stats.submitted++;
+    
+    return 0;
+}
+
+/**
+ * Stream body bytes to the request's file
+ */
+static size_t write_to_file(void* contents, size_t size, size_t nmemb, void* userp) {
+    FetchRequest* req = (FetchRequest*)userp;
+    size_t realsize = size * nmemb;
+    
+    // Bodies without Content-Length are only caught here
+    if (req->max_bytes && req->bytes + realsize > req->max_bytes) {
+        return 0;
+    }
+    if (fwrite(contents, 1, realsize, req->file) != realsize) {
+        return 0;  // Disk error aborts the transfer
+    }
+    req->bytes += realsize;
+    return realsize;
+}
+
+/**
+ * Open the temp file and hand the request to the multi handle
+ */
+static int start_request(FetchEngine* engine, FetchRequest* req, double now) {
+    req->file = fopen(req->part_path, "wb");
+    if (!req->file) {
+        snprintf(req->error, sizeof(req->error), "Failed to open file: %s", req->part_path);
+        return -1;
+    }
+    if (req->prefix) {
+        fputs(req->prefix, req->file);
+    }
+    
+    // Recycle a handle: curl_easy_reset keeps its live connections and caches
+    CURL* easy = engine->num_idle > 0 ? engine->idle_handles[--engine->num_idle] : curl_easy_init();
+    if (!easy) {
+        snprintf(req->error, sizeof(req->error), "curl_easy_init() failed");
+        return -1;
+    }
+    curl_easy_reset(easy);
+    req->easy = easy;
+    
+    req->max_bytes = engine->config.max_body_size;
+    
+    curl_easy_setopt(easy, CURLOPT_URL, req->url);
+    curl_easy_setopt(easy, CURLOPT_WRITEFUNCTION, write_to_file);
+    curl_easy_setopt(easy, CURLOPT_WRITEDATA, (void*)req);
+    curl_easy_setopt(easy, CURLOPT_PRIVATE, (void*)req);
+    curl_easy_setopt(easy, CURLOPT_ERRORBUFFER, req->error);
+    curl_easy_setopt(easy, CURLOPT_USERAGENT, engine->config.user_agent);
+    curl_easy_setopt(easy, CURLOPT_FOLLOWLOCATION, 1L);
+    curl_easy_setopt(easy, CURLOPT_MAXREDIRS, 5L);
+    curl_easy_setopt(easy, CURLOPT_TIMEOUT, engine->config.timeout_seconds);
+    curl_easy_setopt(easy, CURLOPT_NOSIGNAL, 1L);
+    curl_easy_setopt(easy, CURLOPT_ACCEPT_ENCODING, "");
+    curl_easy_setopt(easy, CURLOPT_TCP_KEEPALIVE, 1L);
+    curl_easy_setopt(easy, CURLOPT_SHARE, engine->share);
+    if (engine->config.max_body_size > 0) {
+        curl_easy_setopt(easy, CURLOPT_MAXFILESIZE_LARGE, (curl_off_t)engine->config.max_body_size);
+    }
+    
+    if (curl_multi_add_handle(engine->multi, easy) != CURLM_OK) {
+        snprintf(req->error, sizeof(req->error), "curl_multi_add_handle() failed");
+        return -1;
+    }
+    
+    FetchHost* host = &engine->hosts[req->host];
+    host->in_flight++;
+    host->next_start_ms = now + host_delay(engine);
+    
+    req->start_ms = now;
+    req->slot = engine->num_active;
+    engine->active[engine->num_active++] = req;
+    return 0;
+}
+
+/**
+ * Close, publish or discard the output and report the result
+ */
+static void finish_request(FetchEngine* engine, FetchRequest* req, CURLcode code) {
+    long http_code = 0;
+    
+    if (req->slot >= 0) {
+        curl_easy_getinfo(req->easy, CURLINFO_RESPONSE_CODE, &http_code);
+        long connects = 0;
+        curl_easy_getinfo(req->easy, CURLINFO_NUM_CONNECTS, &connects);
+        engine->stats.connections += (uint64_t)connects;
+        
+        curl_multi_remove_handle(engine->multi, req->easy);
+        engine->idle_handles[engine->num_idle++] = req->easy;
+        
+        // Swap-remove from the active array
+        FetchRequest* last = engine->active[--engine->num_active];
+        engine->active[req->slot] = last;
+        last->slot = req->slot;
+        engine->hosts[req->host].in_flight--;
+    } else if (req->easy) {
+        engine->idle_handles[engine->num_idle++] = req->easy;
+    }
+    
+    int ok = req->slot >= 0 && code == CURLE_OK && http_code == 200;
+    if (req->slot >= 0 && code != CURLE_OK && req->error[0] == '\0') {
+        snprintf(req->error, sizeof(req->error), "%s", curl_easy_strerror(code));
+    } else if (req->slot >= 0 && code == CURLE_OK && http_code != 200) {
+        snprintf(req->error, sizeof(req->error), "HTTP error: %ld", http_code);
+    }
+    
+    if (req->file) {
+        if (fclose(req->file) != 0 && ok) {
+            snprintf(req->error, sizeof(req->error), "Failed to write file: %s", req->part_path);
+            ok = 0;
+        }
+        req->file = NULL;
+    }
+    if (ok && rename(req->part_path, req->path) != 0) {
+        snprintf(req->error, sizeof(req->error), "Failed to rename to %s", req->path);
+        ok = 0;
+    }
+    if (!ok) {
+        unlink(req->part_path);
+    }
+    
+    if (ok) {
+        engine->stats.completed++;
+        engine->stats.bytes += req->bytes;
+    } else {
+        engine->stats.failed++;
+    }
+    
+    if (engine->callback) {
+        FetchResult result = {
+            .url = req->url,
+            .path = ok ? req->path : NULL,
+            .http_code = http_code,
+            .bytes = req->bytes,
+            .elapsed_ms = req->slot >= 0 ? now_ms() - req->start_ms : 0.0,
+            .error = ok ? 0 : -1,
+            .error_message = ok ? NULL : req->error,
+            .user_data = req->user_data
+        };
+        engine->callback(&result, engine->callback_data);
+    }
+    
+    free_request(req);
+}
+
+/**
+ * Move pending requests whose host is ready into the multi handle
+ */
+static void start_eligible(FetchEngine* engine, double now) {
+    FetchRequest* prev = NULL;
+    FetchRequest* req = engine->pending_head;
+    
+    while (req && engine->num_active < engine->config.max_in_flight) {
+        FetchRequest* next = req->next;
+        FetchHost* host = &engine->hosts[req->host];
+        
+        if (host->in_flight >= engine->config.max_per_host || now < host->next_start_ms) {
+            prev = req;
+            req = next;
+            continue;
+        }
+        
+        // Unlink from the pending list
+        if (prev) {
+            prev->next = next;
+        } else {
+            engine->pending_head = next;
+        }
+        if (engine->pending_tail == req) {
+            engine->pending_tail = prev;
+        }
+        engine->num_pending--;
+        req->next = NULL;
+        
+        if (start_request(engine, req, now) != 0) {
+            finish_request(engine, req, CURLE_FAILED_INIT);
+        }
+        req = next;
+    }
+}
+
+/**
+ * Time until the next waiting request's host becomes eligible
+ */
+static double next_start_delay(const FetchEngine* engine, double now) {
+    double wait = -1.0;
+    
+    for (const FetchRequest* req = engine->pending_head; req; req = req->next) {
+        const FetchHost* host = &engine->hosts[req->host];
+        if (host->in_flight >= engine->config.max_per_host) continue;
+        
+        double delay = host->next_start_ms - now;
+        if (delay < 0.0) delay = 0.0;
+        if (wait < 0.0 || delay < wait) wait = delay;
+    }
+    
+    return wait;
+}
+
+/**
+ * Complete every finished transfer
+ */
+static void collect_finished(FetchEngine* engine) {
+    CURLMsg* msg;
+    int remaining;
+    
+    while ((msg = curl_multi_info_read(engine->multi, &remaining)) != NULL) {
+        if (msg->msg != CURLMSG_DONE) continue;
+        
+        FetchRequest* req = NULL;
+        curl_easy_getinfo(msg->easy_handle, CURLINFO_PRIVATE, (char**)&req);
+        if (req) {
+            finish_request(engine, req, msg->data.result);
+        }
+    }
+}
+
+/**
+ * Drive transfers for up to timeout_ms
+ */
+int fetch_engine_run(FetchEngine* engine, int timeout_ms) {
+    if (!engine) return -1;
+    
+    int running = 0;
+    start_eligible(engine, now_ms());
+    if (curl_multi_perform(engine->multi, &running) != CURLM_OK) return -1;
+    collect_finished(engine);
+    
+    // Sleep until network activity or until a waiting host becomes eligible
+    int wait_ms = timeout_ms;
+    if (engine->num_active < engine->config.max_in_flight) {
+        double delay = next_start_delay(engine, now_ms());
+        if (delay >= 0.0 && delay < wait_ms) wait_ms = (int)delay + 1;
+    }
+    if (curl_multi_poll(engine->multi, NULL, 0, wait_ms, NULL) != CURLM_OK) return -1;
+    
+    if (curl_multi_perform(engine->multi, &running) != CURLM_OK) return -1;
+    collect_finished(engine);
+    start_eligible(engine, now_ms());
+    
+    return fetch_engine_pending(engine);
+}
+
+/**
+ * Number of requests queued or in flight
+ */
+int fetch_engine_pending(const FetchEngine* engine) {
+    return engine ? engine->num_pending + engine->num_active : 0;
+}
+
+/**
+ * Change the per-host politeness gap
+ */
+void fetch_engine_set_host_delay(FetchEngine* engine, int min_ms, int max_ms) {
+    if (!engine) return;
+    engine->config.host_delay_min_ms = min_ms;
+    engine->config.host_delay_max_ms = max_ms;
+}
+
+/**
+ * Get engine statistics
+ */
+void fetch_engine_get_stats(const FetchEngine* engine, FetchEngineStats* stats) {
+    if (!engine || !stats) return;
+    *stats = engine->stats;
+}
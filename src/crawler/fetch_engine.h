@@ -0,0 +1,126 @@
+#ifndef FETCH_ENGINE_H
+#define FETCH_ENGINE_H
+
+#include <stddef.h>
+#include <stdint.h>
+
+/**
+ * Concurrent Fetch Engine
+ *
+ * Downloads many URLs at once over one shared curl multi handle, so
+ * connections are kept alive and reused per host, TLS sessions and DNS
+ * results are shared, and slow servers no longer stall the whole crawl.
+ *
+ * Features:
+ * - Configurable number of in-flight transfers, total and per host
+ * - Per-host politeness: minimum (optionally randomized) gap between
+ *   request starts on the same host; other hosts proceed meanwhile
+ * - Response bodies stream straight to disk (never buffered in memory);
+ *   each file is written under a hidden ".name.part" and renamed into
+ *   place only when the transfer succeeds
+ * - Completion callback per request, run on the thread calling
+ *   fetch_engine_run()
+ *
+ * The engine is single-threaded: one thread submits and runs it.
+ */
+
+#define FETCH_DEFAULT_IN_FLIGHT 16
+#define FETCH_DEFAULT_PER_HOST 2
+#define FETCH_DEFAULT_TIMEOUT 30
+#define FETCH_DEFAULT_USER_AGENT "Mozilla/5.0 (X11; Linux x86_64; rv:109.0) Gecko/20100101 Firefox/115.0"
+
+// Engine configuration (zero fields take defaults)
+typedef struct {
+    int max_in_flight;          // Concurrent transfers (default 16)
+    int max_per_host;           // Concurrent transfers per host (default 2)
+    int host_delay_min_ms;      // Minimum gap between starts on one host
+    int host_delay_max_ms;      // Randomize up to this gap (<= min = fixed)
+    long timeout_seconds;       // Per-transfer timeout (default 30)
+    size_t max_body_size;       // Abort larger responses (0 = unlimited)
+    const char* user_agent;     // NULL for default
+} FetchEngineConfig;
+
+// Outcome of one request, passed to the completion callback
+typedef struct {
+    const char* url;            // Requested URL
+    const char* path;           // Output file (only valid when error == 0)
+    long http_code;             // HTTP status (0 if no response)
+    size_t bytes;               // Body bytes written
+    double elapsed_ms;          // Transfer time
+    int error;                  // 0 on success, -1 on failure
+    const char* error_message;  // Reason for failure (NULL on success)
+    void* user_data;            // Value passed to fetch_engine_submit
+} FetchResult;
+
+// Engine statistics
+typedef struct {
+    uint64_t submitted;         // Requests accepted
+    uint64_t completed;         // Successful downloads
+    uint64_t failed;            // Failed downloads
+    uint64_t bytes;             // Body bytes written
+    uint64_t connections;       // New connections opened (rest were reused)
+    int hosts;                  // Distinct hosts seen
+} FetchEngineStats;
+
+// Called once per request when it finishes
+typedef void (*FetchCallback)(const FetchResult* result, void* callback_data);
+
+// Engine handle
+typedef struct FetchEngine FetchEngine;
+
+/**
+ * Create a fetch engine
+ *
+ * @param config Configuration (NULL for defaults)
+ * @param callback Completion callback (may be NULL)
+ * @param callback_data Passed to every callback invocation
+ * @return Engine or NULL on error
+ */
+FetchEngine* fetch_engine_create(const FetchEngineConfig* config, FetchCallback callback, void* callback_data);
+
+/**
+ * Queue a URL for download
+ *
+ * @param engine Fetch engine
+ * @param url URL to fetch
+ * @param path Destination file
+ * @param prefix Text written before the body (NULL for none)
+ * @param user_data Returned in the FetchResult
+ * @return 0 on success, -1 on error
+ */
+int fetch_engine_submit(FetchEngine* engine, const char* url, const char* path,
+                        const char* prefix, void* user_data);
+
+/**
+ * Start eligible requests, wait for network activity and complete
+ * finished transfers (invoking the callback)
+ *
+ * @param engine Fetch engine
+ * @param timeout_ms Maximum time to wait for activity
+ * @return Number of requests still queued or in flight, -1 on error
+ */
+int fetch_engine_run(FetchEngine* engine, int timeout_ms);
+
+/**
+ * Number of requests queued or in flight
+ */
+int fetch_engine_pending(const FetchEngine* engine);
+
+/**
+ * Change the per-host politeness gap (applies to future requests)
+ */
+void fetch_engine_set_host_delay(FetchEngine* engine, int min_ms, int max_ms);
+
+/**
+ * Get engine statistics
+ */
+void fetch_engine_get_stats(const FetchEngine* engine, FetchEngineStats* stats);
+
+/**
+ * Destroy the engine, aborting unfinished requests
+ *
+ * Aborted requests do not invoke the callback; partial files are removed.
+ */
+void fetch_engine_destroy(FetchEngine* engine);
+
+#endif // FETCH_ENGINE_H
@@ -9,11 +9,18 @@
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
-#include <sys/stat.h>
 #include <unistd.h>
 #include <ctype.h>
+#include <stdbool.h>
+#include <zlib.h>
+#include "extractor_pool.h"
+#include "extraction_cache.h"
+#include "../docproc/utils/subprocess_pool.h"
+#include "../docproc/utils/zip_utils.h"
+#include "../docproc/utils/xml_utils.h"
 
 #define MAX_TEXT_SIZE (50 * 1024 * 1024)  // 50MB max extracted text
+#define TAR_BLOCK_SIZE 512
 
 typedef enum {
     FILE_TYPE_HTML,
@@ -167,146 +174,238 @@ const char* get_file_type_name(FileType type) {
     }
 }
 
+/**
+ * Run an extraction tool and capture its output
+ * Returns bytes captured, or -1 if the tool is missing or fails
+ */
+static int run_extractor(const char* tool, const char* const args[],
+                         char* output_text, size_t output_size) {
+    int exit_status;
+    int bytes = subprocess_run(tool, args, output_text, output_size, 0, &exit_status);
+    if (bytes < 0 || exit_status != 0) {
+        return -1;
+    }
+    return bytes;
+}
+
 /**
  * Extract text from PDF using pdftotext
  */
 int extract_text_from_pdf(const char* filepath, char* output_text, size_t output_size) {
-    char cmd[2048];
-    snprintf(cmd, sizeof(cmd), "pdftotext -layout -nopgbrk '%s' -", filepath);
-    
-    FILE* fp = popen(cmd, "r");
-    if (!fp) {
-        fprintf(stderr, "Failed to run pdftotext\n");
+    if (!subprocess_tool_available("pdftotext")) {
+        fprintf(stderr, "pdftotext not found. Install poppler-utils.\n");
         return -1;
     }
     
-    size_t bytes_read = fread(output_text, 1, output_size - 1, fp);
-    output_text[bytes_read] = '\0';
-    
-    int status = pclose(fp);
-    if (status != 0) {
-        fprintf(stderr, "pdftotext failed with status %d\n", status);
-        return -1;
+    const char* args[] = { "-layout", "-nopgbrk", filepath, "-", NULL };
+    int bytes = run_extractor("pdftotext", args, output_text, output_size);
+    if (bytes < 0) {
+        fprintf(stderr, "pdftotext failed for: %s\n", filepath);
     }
-    
-    return bytes_read;
+    return bytes;
 }
 
 /**
  * Extract text from DOC using antiword
  */
 int extract_text_from_doc(const char* filepath, char* output_text, size_t output_size) {
-    char cmd[2048];
-    snprintf(cmd, sizeof(cmd), "antiword '%s'", filepath);
-    
-    FILE* fp = popen(cmd, "r");
-    if (!fp) return -1;
-    
-    size_t bytes_read = fread(output_text, 1, output_size - 1, fp);
-    output_text[bytes_read] = '\0';
-    pclose(fp);
-    
-    return bytes_read;
+    const char* args[] = { filepath, NULL };
+    return run_extractor("antiword", args, output_text, output_size);
 }
 
 /**
  * Extract text from RTF using unrtf
  */
 int extract_text_from_rtf(const char* filepath, char* output_text, size_t output_size) {
-    char cmd[2048];
-    snprintf(cmd, sizeof(cmd), "unrtf --text '%s'", filepath);
-    
-    FILE* fp = popen(cmd, "r");
-    if (!fp) return -1;
-    
-    size_t bytes_read = fread(output_text, 1, output_size - 1, fp);
-    output_text[bytes_read] = '\0';
-    pclose(fp);
-    
-    return bytes_read;
+    const char* args[] = { "--text", filepath, NULL };
+    return run_extractor("unrtf", args, output_text, output_size);
 }
 
 /**
  * Extract text using Python universal extractor
+ * Uses the persistent worker pool when one is running
  */
 int extract_text_with_python(const char* filepath, char* output_text, size_t output_size) {
-    char cmd[2048];
-    snprintf(cmd, sizeof(cmd), "python3 src/crawler/universal_extractor.py '%s'", filepath);
-    
-    FILE* fp = popen(cmd, "r");
-    if (!fp) return -1;
-    
-    size_t bytes_read = fread(output_text, 1, output_size - 1, fp);
-    output_text[bytes_read] = '\0';
-    
-    int status = pclose(fp);
-    if (status != 0) {
-        return -1;
+    ExtractorPool* pool = extractor_pool_get_default();
+    if (pool) {
+        return extractor_pool_extract(pool, filepath, NULL, output_text, output_size);
     }
     
-    return bytes_read;
+    const char* args[] = { "src/crawler/universal_extractor.py", filepath, NULL };
+    return run_extractor("python3", args, output_text, output_size);
 }
 
 /**
  * Extract text from image using OCR
  */
 int extract_text_from_image_ocr(const char* filepath, char* output_text, size_t output_size) {
-    char cmd[2048];
-    snprintf(cmd, sizeof(cmd), "tesseract '%s' stdout 2>/dev/null", filepath);
+    const char* args[] = { filepath, "stdout", NULL };
+    return run_extractor("tesseract", args, output_text, output_size);
+}
+
+/**
+ * Extract text from DOCX in-process
+ * word/document.xml is read through zip_utils, one paragraph per element
+ */
+int extract_text_from_docx(const char* filepath, char* output_text, size_t output_size) {
+    ZipArchive* archive = zip_archive_open(filepath);
+    char* xml = archive ? zip_archive_read(archive, "word/document.xml", NULL) : NULL;
+    zip_archive_close(archive);
+    if (!xml) {
+        fprintf(stderr, "Failed to read DOCX: %s\n", filepath);
+        return -1;
+    }
     
-    FILE* fp = popen(cmd, "r");
-    if (!fp) return -1;
+    int result = xml_extract_elements(xml, "w:p", output_text, output_size);
+    free(xml);
     
-    size_t bytes_read = fread(output_text, 1, output_size - 1, fp);
-    output_text[bytes_read] = '\0';
-    pclose(fp);
+    return result == 0 ? (int)strlen(output_text) : -1;
+}
+
+/**
+ * Archive members worth extracting (source and plain text)
+ */
+static bool is_text_member(const char* name) {
+    static const char* extensions[] = { ".txt", ".md", ".c", ".h", ".py" };
+    size_t len = strlen(name);
     
-    return bytes_read;
+    for (size_t i = 0; i < sizeof(extensions) / sizeof(extensions[0]); i++) {
+        size_t ext_len = strlen(extensions[i]);
+        if (len > ext_len && strcmp(name + len - ext_len, extensions[i]) == 0) return true;
+    }
+    return false;
 }
 
 /**
- * Process archive (extract and process contents)
+ * Read the text members of a ZIP archive in-process
  */
-int process_archive(const char* filepath, char* output_text, size_t output_size) {
-    // Create temp directory
-    char temp_dir[1024];
-    snprintf(temp_dir, sizeof(temp_dir), "/tmp/crawler_extract_%d", getpid());
-    mkdir(temp_dir, 0755);
+static int process_zip_archive(const char* filepath, char* output_text, size_t output_size) {
+    ZipArchive* archive = zip_archive_open(filepath);
+    if (!archive) return -1;
     
-    // Extract based on type
-    char cmd[2048];
-    if (strstr(filepath, ".zip")) {
-        snprintf(cmd, sizeof(cmd), "unzip -q '%s' -d '%s' 2>/dev/null", filepath, temp_dir);
-    } else if (strstr(filepath, ".tar.gz") || strstr(filepath, ".tgz")) {
-        snprintf(cmd, sizeof(cmd), "tar -xzf '%s' -C '%s' 2>/dev/null", filepath, temp_dir);
-    } else if (strstr(filepath, ".tar")) {
-        snprintf(cmd, sizeof(cmd), "tar -xf '%s' -C '%s' 2>/dev/null", filepath, temp_dir);
-    } else {
-        return -1;  // Unsupported archive type
+    size_t used = 0;
+    int count = zip_archive_count(archive);
+    for (int i = 0; i < count && used < output_size - 1; i++) {
+        const char* name = zip_archive_name(archive, i);
+        if (!name || !is_text_member(name)) continue;
+        
+        size_t size;
+        char* data = zip_archive_read_index(archive, i, &size);
+        if (!data) continue;
+        
+        if (size > output_size - 1 - used) size = output_size - 1 - used;
+        memcpy(output_text + used, data, size);
+        used += size;
+        free(data);
     }
     
-    int status = system(cmd);
-    if (status != 0) {
-        snprintf(cmd, sizeof(cmd), "rm -rf '%s'", temp_dir);
-        system(cmd);
-        return -1;
+    zip_archive_close(archive);
+    output_text[used] = '\0';
+    return (int)used;
+}
+
+/**
+ * Parse an octal tar header field
+ */
+static size_t tar_octal(const unsigned char* field, size_t len) {
+    size_t value = 0;
+    for (size_t i = 0; i < len && field[i] >= '0' && field[i] <= '7'; i++) {
+        value = value * 8 + (field[i] - '0');
+    }
+    return value;
+}
+
+/**
+ * Read the text members of a plain or gzip-compressed tar in-process
+ * Returns bytes read, -1 on error, or -2 if zlib cannot read the
+ * compression (bzip2, xz)
+ */
+static int process_tar_archive(const char* filepath, char* output_text, size_t output_size) {
+    gzFile gz = gzopen(filepath, "rb");
+    if (!gz) return -1;
+    
+    unsigned char header[TAR_BLOCK_SIZE];
+    char long_name[1024] = "";
+    size_t used = 0;
+    bool recognized = false;  // Saw a tar header or the end-of-archive block
+    int result = 0;
+    
+    while (gzread(gz, header, TAR_BLOCK_SIZE) == TAR_BLOCK_SIZE) {
+        if (header[0] == '\0') {
+            recognized = true;  // End-of-archive block
+            break;
+        }
+        if (memcmp(header + 257, "ustar", 5) != 0) break;
+        recognized = true;
+        
+        size_t size = tar_octal(header + 124, 12);
+        size_t padded = (size + TAR_BLOCK_SIZE - 1) / TAR_BLOCK_SIZE * TAR_BLOCK_SIZE;
+        char type = (char)header[156];
+        
+        // GNU long name: the data is the next entry's name
+        if (type == 'L') {
+            size_t len = size < sizeof(long_name) - 1 ? size : sizeof(long_name) - 1;
+            if (gzread(gz, long_name, (unsigned)len) != (int)len) break;
+            long_name[len] = '\0';
+            gzseek(gz, (z_off_t)(padded - len), SEEK_CUR);
+            continue;
+        }
+        
+        char name[sizeof(long_name)];
+        if (long_name[0]) {
+            snprintf(name, sizeof(name), "%s", long_name);
+        } else if (header[345]) {
+            snprintf(name, sizeof(name), "%.155s/%.100s", (const char*)header + 345, (const char*)header);
+        } else {
+            snprintf(name, sizeof(name), "%.100s", (const char*)header);
+        }
+        long_name[0] = '\0';
+        
+        size_t consumed = 0;
+        if ((type == '0' || type == '\0') && is_text_member(name) && used < output_size - 1) {
+            consumed = size < output_size - 1 - used ? size : output_size - 1 - used;
+            if (gzread(gz, output_text + used, (unsigned)consumed) != (int)consumed) {
+                result = -1;
+                break;
+            }
+            used += consumed;
+        }
+        if (gzseek(gz, (z_off_t)(padded - consumed), SEEK_CUR) < 0) break;
     }
     
-    // Process all text files in extracted directory
-    snprintf(cmd, sizeof(cmd), "find '%s' -type f \\( -name '*.txt' -o -name '*.md' -o -name '*.c' -o -name '*.h' -o -name '*.py' \\) -exec cat {} \\;", temp_dir);
+    gzclose(gz);
+    output_text[used] = '\0';
+    if (!recognized) return -2;
+    return result < 0 ? result : (int)used;
+}
+
+/**
+ * Process archive (extract and process contents)
+ * ZIP and plain or gzip tar members are read in-process; only bzip2/xz
+ * tarballs still go through tar, streaming the members to stdout
+ */
+int process_archive(const char* filepath, char* output_text, size_t output_size) {
+    output_text[0] = '\0';
     
-    FILE* fp = popen(cmd, "r");
-    if (fp) {
-        size_t bytes_read = fread(output_text, 1, output_size - 1, fp);
-        output_text[bytes_read] = '\0';
-        pclose(fp);
+    if (strstr(filepath, ".zip")) {
+        return process_zip_archive(filepath, output_text, output_size);
     }
     
-    // Cleanup
-    snprintf(cmd, sizeof(cmd), "rm -rf '%s'", temp_dir);
-    system(cmd);
+    if (strstr(filepath, ".tar") || strstr(filepath, ".tgz")) {
+        int bytes = process_tar_archive(filepath, output_text, output_size);
+        if (bytes != -2) return bytes;
+        
+        // tar detects the compression itself
+        int exit_status;
+        const char* args[] = { "-xOf", filepath, "--wildcards", "--no-anchored",
+                               "*.txt", "*.md", "*.c", "*.h", "*.py", NULL };
+        bytes = subprocess_run("tar", args, output_text, output_size, 0, &exit_status);
+        // 2: no matching members
+        if (bytes < 0 || (exit_status != 0 && exit_status != 2)) return -1;
+        return bytes;
+    }
     
-    return strlen(output_text);
+    return -1;  // Unsupported archive type
 }
 
 /**
@@ -314,25 +413,14 @@ int process_archive(const char* filepath, char* output_text, size_t output_size)
  */
 int process_json(const char* filepath, char* output_text, size_t output_size) {
     // Use jq to extract all string values
-    char cmd[2048];
-    snprintf(cmd, sizeof(cmd), "jq -r '.. | strings' '%s' 2>/dev/null", filepath);
-    
-    FILE* fp = popen(cmd, "r");
-    if (!fp) return -1;
-    
-    size_t bytes_read = fread(output_text, 1, output_size - 1, fp);
-    output_text[bytes_read] = '\0';
-    pclose(fp);
-    
-    return bytes_read;
+    const char* args[] = { "-r", ".. | strings", filepath, NULL };
+    return run_extractor("jq", args, output_text, output_size);
 }
 
 /**
- * Main file processor - dispatches to appropriate handler
+ * Dispatch to the extractor for a file type
  */
-int process_file_by_type(const char* filepath, FileType type, char* output_text, size_t output_size) {
-    printf("Processing file type: %s\n", get_file_type_name(type));
-    
+static int extract_by_type(const char* filepath, FileType type, char* output_text, size_t output_size) {
     switch (type) {
         case FILE_TYPE_PDF:
             return extract_text_from_pdf(filepath, output_text, output_size);
@@ -349,11 +437,13 @@ int process_file_by_type(const char* filepath, FileType type, char* output_text,
         case FILE_TYPE_ARCHIVE:
             return process_archive(filepath, output_text, output_size);
             
+        case FILE_TYPE_DOCX:
+            return extract_text_from_docx(filepath, output_text, output_size);
+            
         case FILE_TYPE_JSON:
             return process_json(filepath, output_text, output_size);
             
         // Use Python extractor for Office and other formats
-        case FILE_TYPE_DOCX:
         case FILE_TYPE_XLSX:
         case FILE_TYPE_PPTX:
         case FILE_TYPE_ODT:
@@ -382,4 +472,40 @@ int process_file_by_type(const char* filepath, FileType type, char* output_text,
             fclose(fp);
             return bytes;
     }
-}
\ No newline at end of file
+}
+
+/**
+ * Main file processor - dispatches to appropriate handler
+ * 
+ * Types that run an external or Python extractor are looked up in the
+ * default extraction cache first, keyed by the file's contents.
+ */
+int process_file_by_type(const char* filepath, FileType type, char* output_text, size_t output_size) {
+    printf("Processing file type: %s\n", get_file_type_name(type));
+    
+    ExtractionCache* cache = extraction_cache_get_default();
+    bool cacheable = type != FILE_TYPE_TXT && type != FILE_TYPE_CODE && type != FILE_TYPE_XML &&
+                     type != FILE_TYPE_CSV && type != FILE_TYPE_HTML && type != FILE_TYPE_UNKNOWN;
+    const char* extractor = get_file_type_name(type);
+    ExtractionCacheKey key;
+    if (!cache || !cacheable || output_size == 0 ||
+        extraction_cache_key_file(filepath, extractor, &key) != 0) {
+        return extract_by_type(filepath, type, output_text, output_size);
+    }
+    
+    size_t length;
+    char* text = extraction_cache_get(cache, &key, extractor, &length);
+    if (text) {
+        if (length > output_size - 1) length = output_size - 1;
+        memcpy(output_text, text, length);
+        output_text[length] = '\0';
+        free(text);
+        return (int)length;
+    }
+    
+    int bytes = extract_by_type(filepath, type, output_text, output_size);
+    if (bytes > 0) {
+        extraction_cache_put(cache, &key, extractor, output_text, (size_t)bytes);
+    }
+    return bytes;
+}
@@ -7,64 +7,50 @@
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
+#include <fcntl.h>
 #include <unistd.h>
+#include <sys/stat.h>
+#include "../docproc/utils/subprocess_pool.h"
 
 /**
  * Extract text from image file using OCR
  * 
- * Uses tesseract command
+ * Runs tesseract through the subprocess pool with its output ("stdout"
+ * output base) written straight to output_path
  * Returns 0 on success, -1 on failure
  */
 int process_image_file(const char* input_path, const char* output_path) {
-    // Check if tesseract is available
-    if (system("which tesseract > /dev/null 2>&1") != 0) {
+    // Availability is looked up once per process
+    if (!subprocess_tool_available("tesseract")) {
         fprintf(stderr, "tesseract not found. Install tesseract-ocr.\n");
         return -1;
     }
     
-    // Create temporary file for tesseract output (without extension)
-    char temp_base[2048];
-    snprintf(temp_base, sizeof(temp_base), "%s.tmp", output_path);
-    
-    // Build tesseract command
-    // tesseract adds .txt automatically
-    char command[4096];
-    snprintf(command, sizeof(command), 
-             "tesseract '%s' '%s' 2>/dev/null",
-             input_path, temp_base);
-    
-    // Execute tesseract
-    int result = system(command);
-    if (result != 0) {
-        fprintf(stderr, "tesseract failed for: %s\n", input_path);
+    int fd = open(output_path, O_WRONLY | O_CREAT | O_TRUNC | O_CLOEXEC, 0644);
+    if (fd < 0) {
+        fprintf(stderr, "Cannot create output file: %s\n", output_path);
         return -1;
     }
     
-    // Tesseract adds .txt extension
-    char temp_txt[2048];
-    snprintf(temp_txt, sizeof(temp_txt), "%s.txt", temp_base);
+    const char* args[] = { input_path, "stdout", NULL };
+    int result = subprocess_run_fd("tesseract", args, fd, 0);
+    
+    struct stat st;
+    long size = fstat(fd, &st) == 0 ? (long)st.st_size : 0;
+    close(fd);
     
-    // Check if output file was created
-    FILE* f = fopen(temp_txt, "r");
-    if (!f) {
-        fprintf(stderr, "No output from tesseract: %s\n", input_path);
+    if (result != 0) {
+        fprintf(stderr, "tesseract failed for: %s\n", input_path);
+        unlink(output_path);
         return -1;
     }
     
-    // Check file size
-    fseek(f, 0, SEEK_END);
-    long size = ftell(f);
-    fclose(f);
-    
     if (size < 5) {
         fprintf(stderr, "OCR produced too little text: %ld bytes\n", size);
-        unlink(temp_txt);
+        unlink(output_path);
         return -1;
     }
     
-    // Move temp file to final location
-    rename(temp_txt, output_path);
-    
     printf("  ✓ Extracted %ld bytes via OCR\n", size);
     return 0;
 }
\ No newline at end of file
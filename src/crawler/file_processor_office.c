@@ -2,64 +2,103 @@
  * Office Document Processor
  * 
  * Extracts text from Office documents (DOCX, XLSX, PPTX, DOC, XLS, PPT)
- * Uses external tools: antiword (DOC), catdoc (XLS), unzip + grep (DOCX/XLSX/PPTX)
+ * DOCX is read in-process: word/document.xml comes out of the archive
+ * through zip_utils and is parsed here. DOC goes through antiword, run by
+ * the subprocess pool (no shell, no temp directory).
  */
 
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
+#include <fcntl.h>
 #include <unistd.h>
+#include <sys/stat.h>
+#include "../docproc/utils/subprocess_pool.h"
+#include "../docproc/utils/zip_utils.h"
+
+/**
+ * Write text with the five predefined XML entities decoded
+ */
+static void write_xml_text(FILE* out, const char* p, const char* end) {
+    static const struct { const char* entity; char c; } entities[] = {
+        { "&amp;", '&' }, { "&lt;", '<' }, { "&gt;", '>' }, { "&quot;", '"' }, { "&apos;", '\'' }
+    };
+    
+    while (p < end) {
+        if (*p == '&') {
+            size_t i;
+            for (i = 0; i < sizeof(entities) / sizeof(entities[0]); i++) {
+                size_t len = strlen(entities[i].entity);
+                if ((size_t)(end - p) >= len && strncmp(p, entities[i].entity, len) == 0) {
+                    fputc(entities[i].c, out);
+                    p += len;
+                    break;
+                }
+            }
+            if (i < sizeof(entities) / sizeof(entities[0])) continue;
+        }
+        fputc(*p++, out);
+    }
+}
+
+/**
+ * Write the text runs (<w:t>) of document.xml, one paragraph (<w:p>) per line
+ * Returns the number of bytes written
+ */
+static long write_docx_text(const char* xml, FILE* out) {
+    long start = ftell(out);
+    const char* p = xml;
+    
+    while ((p = strchr(p, '<')) != NULL) {
+        if (strncmp(p, "</w:p>", 6) == 0) {
+            fputc('\n', out);
+            p += 6;
+            continue;
+        }
+        
+        // <w:t> or <w:t xml:space="preserve">, but not <w:tab/>, <w:tbl> etc.
+        if (strncmp(p, "<w:t", 4) == 0 && (p[4] == '>' || p[4] == ' ')) {
+            const char* open_end = strchr(p, '>');
+            if (!open_end) break;
+            if (open_end[-1] == '/') {
+                p = open_end + 1;
+                continue;
+            }
+            
+            const char* close = strstr(open_end + 1, "</w:t>");
+            if (!close) break;
+            write_xml_text(out, open_end + 1, close);
+            p = close + 6;
+            continue;
+        }
+        p++;
+    }
+    
+    return ftell(out) - start;
+}
 
 /**
  * Process DOCX file (ZIP + XML)
  */
 static int process_docx(const char* input_path, const char* output_path) {
     // DOCX is a ZIP file containing XML
-    // Main content is in word/document.xml
-    
-    char temp_dir[2048];
-    snprintf(temp_dir, sizeof(temp_dir), "/tmp/docx_%d", getpid());
-    
-    // Extract ZIP
-    char unzip_cmd[4096];
-    snprintf(unzip_cmd, sizeof(unzip_cmd),
-             "unzip -q -o '%s' -d '%s' 2>/dev/null",
-             input_path, temp_dir);
-    
-    if (system(unzip_cmd) != 0) {
+    // Main content is in word/document.xml, inflated straight into memory
+    ZipArchive* archive = zip_archive_open(input_path);
+    char* xml = archive ? zip_archive_read(archive, "word/document.xml", NULL) : NULL;
+    zip_archive_close(archive);
+    if (!xml) {
         fprintf(stderr, "Failed to extract DOCX: %s\n", input_path);
         return -1;
     }
     
-    // Extract text from document.xml
-    char xml_path[2048];
-    snprintf(xml_path, sizeof(xml_path), "%s/word/document.xml", temp_dir);
-    
-    // Use grep to extract text between <w:t> tags
-    char extract_cmd[4096];
-    snprintf(extract_cmd, sizeof(extract_cmd),
-             "grep -oP '(?<=<w:t>)[^<]+' '%s' > '%s' 2>/dev/null",
-             xml_path, output_path);
-    
-    int result = system(extract_cmd);
-    
-    // Cleanup temp directory
-    char cleanup_cmd[2048];
-    snprintf(cleanup_cmd, sizeof(cleanup_cmd), "rm -rf '%s'", temp_dir);
-    system(cleanup_cmd);
-    
-    if (result != 0) {
-        fprintf(stderr, "Failed to extract text from DOCX\n");
+    FILE* f = fopen(output_path, "w");
+    if (!f) {
+        free(xml);
         return -1;
     }
-    
-    // Check output size
-    FILE* f = fopen(output_path, "r");
-    if (!f) return -1;
-    
-    fseek(f, 0, SEEK_END);
-    long size = ftell(f);
+    long size = write_docx_text(xml, f);
     fclose(f);
+    free(xml);
     
     if (size < 10) {
         fprintf(stderr, "DOCX extraction produced too little text\n");
@@ -75,31 +114,28 @@ static int process_docx(const char* input_path, const char* output_path) {
  * Process DOC file (legacy Word)
  */
 static int process_doc(const char* input_path, const char* output_path) {
-    // Check if antiword is available
-    if (system("which antiword > /dev/null 2>&1") != 0) {
+    // Availability is looked up once per process
+    if (!subprocess_tool_available("antiword")) {
         fprintf(stderr, "antiword not found. Install antiword package.\n");
         return -1;
     }
     
-    // Use antiword to extract text
-    char command[4096];
-    snprintf(command, sizeof(command),
-             "antiword '%s' > '%s' 2>/dev/null",
-             input_path, output_path);
+    int fd = open(output_path, O_WRONLY | O_CREAT | O_TRUNC | O_CLOEXEC, 0644);
+    if (fd < 0) return -1;
+    
+    const char* args[] = { input_path, NULL };
+    int result = subprocess_run_fd("antiword", args, fd, 0);
     
-    if (system(command) != 0) {
+    struct stat st;
+    long size = fstat(fd, &st) == 0 ? (long)st.st_size : 0;
+    close(fd);
+    
+    if (result != 0) {
         fprintf(stderr, "antiword failed for: %s\n", input_path);
+        unlink(output_path);
         return -1;
     }
     
-    // Check output size
-    FILE* f = fopen(output_path, "r");
-    if (!f) return -1;
-    
-    fseek(f, 0, SEEK_END);
-    long size = ftell(f);
-    fclose(f);
-    
     if (size < 10) {
         fprintf(stderr, "DOC extraction produced too little text\n");
         unlink(output_path);
@@ -7,64 +7,53 @@
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
+#include <fcntl.h>
 #include <unistd.h>
-#include <sys/wait.h>
+#include <sys/stat.h>
+#include "../docproc/utils/subprocess_pool.h"
 
 /**
  * Extract text from PDF file
  * 
- * Uses pdftotext command from poppler-utils
+ * Runs pdftotext through the subprocess pool with its output written
+ * straight to output_path
  * Returns 0 on success, -1 on failure
  */
 int process_pdf_file(const char* input_path, const char* output_path) {
-    // Check if pdftotext is available
-    if (system("which pdftotext > /dev/null 2>&1") != 0) {
+    // Availability is looked up once per process
+    if (!subprocess_tool_available("pdftotext")) {
         fprintf(stderr, "pdftotext not found. Install poppler-utils.\n");
         return -1;
     }
     
-    // Create temporary file for pdftotext output
-    char temp_path[2048];
-    snprintf(temp_path, sizeof(temp_path), "%s.tmp", output_path);
+    int fd = open(output_path, O_WRONLY | O_CREAT | O_TRUNC | O_CLOEXEC, 0644);
+    if (fd < 0) {
+        fprintf(stderr, "Cannot create output file: %s\n", output_path);
+        return -1;
+    }
     
-    // Build pdftotext command
     // -layout: Preserve layout
     // -nopgbrk: No page breaks
     // -enc UTF-8: UTF-8 encoding
-    char command[4096];
-    snprintf(command, sizeof(command), 
-             "pdftotext -layout -nopgbrk -enc UTF-8 '%s' '%s' 2>/dev/null",
-             input_path, temp_path);
+    const char* args[] = { "-layout", "-nopgbrk", "-enc", "UTF-8", input_path, "-", NULL };
+    int result = subprocess_run_fd("pdftotext", args, fd, 0);
+    
+    struct stat st;
+    long size = fstat(fd, &st) == 0 ? (long)st.st_size : 0;
+    close(fd);
     
-    // Execute pdftotext
-    int result = system(command);
     if (result != 0) {
         fprintf(stderr, "pdftotext failed for: %s\n", input_path);
-        unlink(temp_path);
-        return -1;
-    }
-    
-    // Check if output file was created and has content
-    FILE* f = fopen(temp_path, "r");
-    if (!f) {
-        fprintf(stderr, "No output from pdftotext: %s\n", input_path);
+        unlink(output_path);
         return -1;
     }
     
-    // Check file size
-    fseek(f, 0, SEEK_END);
-    long size = ftell(f);
-    fclose(f);
-    
     if (size < 10) {
         fprintf(stderr, "PDF extraction produced too little text: %ld bytes\n", size);
-        unlink(temp_path);
+        unlink(output_path);
         return -1;
     }
     
-    // Move temp file to final location
-    rename(temp_path, output_path);
-    
     printf("  ✓ Extracted %ld bytes from PDF\n", size);
     return 0;
 }
\ No newline at end of file
@@ -0,0 +1,733 @@
+/**
+ * Streaming HTML Scanner Implementation
+ *
+ * A byte-at-a-time state machine whose state survives between chunks.
+ * Tags are collected into a fixed buffer and interpreted at their closing
+ * '>'; text goes straight to the output, with whitespace collapsed and
+ * entities decoded as it is written.
+ */
+
+#define _GNU_SOURCE
+#include "html_scanner.h"
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <strings.h>
+#include <ctype.h>
+
+#define SCANNER_MAX_TAG 8192            // Longer tags are cut (later attributes ignored)
+#define SCANNER_MAX_COMMENT 4096        // Comment bytes kept for the base URL
+#define SCANNER_MAX_ENTITY 32
+#define SCANNER_MAX_DEPTH 256           // Deeper elements are counted, not named
+#define SCANNER_TAG_NAME 16
+#define SCANNER_MAX_ATTR 1024           // class, id, onclick values
+#define SCANNER_INITIAL_TEXT (64 * 1024)
+
+// Scanner states
+typedef enum {
+    SCAN_TEXT,                  // Character data
+    SCAN_ENTITY,                // After '&' in character data
+    SCAN_TAG_OPEN,              // After '<'
+    SCAN_TAG,                   // Inside a tag, up to '>'
+    SCAN_COMMENT,               // Inside <!-- ... -->
+    SCAN_RAWTEXT                // Inside script or style, up to its end tag
+} ScanState;
+
+struct HtmlScanner {
+    ExtractionMode mode;
+    ScanState state;
+    
+    // Output text
+    char* text;
+    size_t text_len;
+    size_t text_capacity;
+    size_t max_text;
+    bool pending_space;
+    
+    // Current tag, without '<' and '>'
+    char tag[SCANNER_MAX_TAG];
+    size_t tag_len;
+    char quote;                 // Quote of the attribute value being read
+    char last_significant;      // Last non-space tag byte outside quotes
+    
+    // Current comment
+    char comment[SCANNER_MAX_COMMENT];
+    size_t comment_len;
+    int dashes;
+    
+    // Current entity, after '&'
+    char entity[SCANNER_MAX_ENTITY];
+    size_t entity_len;
+    
+    // End tag of the script or style element being skipped
+    const char* raw_end;
+    size_t raw_match;
+    
+    // Open elements
+    char names[SCANNER_MAX_DEPTH][SCANNER_TAG_NAME];
+    int depth;
+    int overflow;
+    int skip_depth;             // Text is dropped while the element at this depth is open
+    
+    char base_url[HTML_SCANNER_MAX_URL];
+    
+    HtmlLinkCallback on_link;
+    void* link_data;
+    bool failed;
+};
+
+// Elements that never have content or an end tag
+static const char* const VOID_ELEMENTS[] = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr", NULL
+};
+
+// Elements rendered inline: their tags do not separate words
+static const char* const INLINE_ELEMENTS[] = {
+    "a", "abbr", "b", "bdi", "bdo", "cite", "code", "data", "dfn", "em",
+    "font", "i", "kbd", "mark", "q", "s", "samp", "small", "span",
+    "strong", "sub", "sup", "time", "u", "var", NULL
+};
+
+// Helper: Whether name is in a NULL-terminated list
+static bool name_in_list(const char* name, const char* const* list) {
+    for (int i = 0; list[i]; i++) {
+        if (list[i][0] == name[0] && strcmp(list[i], name) == 0) return true;
+    }
+    return false;
+}
+
+// Named entities beyond the XML five
+static const struct {
+    const char* name;
+    const char* utf8;
+} NAMED_ENTITIES[] = {
+    {"amp", "&"}, {"lt", "<"}, {"gt", ">"}, {"quot", "\""}, {"apos", "'"},
+    {"nbsp", " "}, {"ndash", "\xe2\x80\x93"}, {"mdash", "\xe2\x80\x94"},
+    {"lsquo", "\xe2\x80\x98"}, {"rsquo", "\xe2\x80\x99"},
+    {"ldquo", "\xe2\x80\x9c"}, {"rdquo", "\xe2\x80\x9d"},
+    {"hellip", "\xe2\x80\xa6"}, {"laquo", "\xc2\xab"}, {"raquo", "\xc2\xbb"},
+    {"copy", "\xc2\xa9"}, {"reg", "\xc2\xae"}, {"middot", "\xc2\xb7"},
+    {NULL, NULL}
+};
+
+/**
+ * Decode an entity name (without '&' and ';')
+ *
+ * @param out Output, at least 4 bytes
+ * @return Bytes written, 0 if the entity is unknown
+ */
+static size_t decode_entity(const char* name, size_t len, char* out) {
+    if (len >= 2 && name[0] == '#') {
+        unsigned long cp;
+        char* end;
+        char digits[SCANNER_MAX_ENTITY];
+        memcpy(digits, name + 1, len - 1);
+        digits[len - 1] = '\0';
+        if (digits[0] == 'x' || digits[0] == 'X') {
+            cp = strtoul(digits + 1, &end, 16);
+            if (end == digits + 1) return 0;
+        } else {
+            cp = strtoul(digits, &end, 10);
+        }
+        if (*end != '\0' || cp == 0 || cp > 0x10FFFF || (cp >= 0xD800 && cp <= 0xDFFF)) return 0;
+        
+        // UTF-8 encode
+        if (cp < 0x80) {
+            out[0] = (char)cp;
+            return 1;
+        } else if (cp < 0x800) {
+            out[0] = (char)(0xC0 | (cp >> 6));
+            out[1] = (char)(0x80 | (cp & 0x3F));
+            return 2;
+        } else if (cp < 0x10000) {
+            out[0] = (char)(0xE0 | (cp >> 12));
+            out[1] = (char)(0x80 | ((cp >> 6) & 0x3F));
+            out[2] = (char)(0x80 | (cp & 0x3F));
+            return 3;
+        }
+        out[0] = (char)(0xF0 | (cp >> 18));
+        out[1] = (char)(0x80 | ((cp >> 12) & 0x3F));
+        out[2] = (char)(0x80 | ((cp >> 6) & 0x3F));
+        out[3] = (char)(0x80 | (cp & 0x3F));
+        return 4;
+    }
+    
+    for (int i = 0; NAMED_ENTITIES[i].name; i++) {
+        if (strlen(NAMED_ENTITIES[i].name) == len && strncmp(NAMED_ENTITIES[i].name, name, len) == 0) {
+            size_t n = strlen(NAMED_ENTITIES[i].utf8);
+            memcpy(out, NAMED_ENTITIES[i].utf8, n);
+            return n;
+        }
+    }
+    return 0;
+}
+
+// Helper: Append bytes to the text (dropped once max_text is reached)
+static void text_append(HtmlScanner* scanner, const char* bytes, size_t n) {
+    if (scanner->text_len + n + 1 > scanner->max_text) return;
+    
+    if (scanner->text_len + n + 1 > scanner->text_capacity) {
+        size_t capacity = scanner->text_capacity;
+        while (scanner->text_len + n + 1 > capacity) capacity *= 2;
+        if (capacity > scanner->max_text) capacity = scanner->max_text;
+        
+        char* text = (char*)realloc(scanner->text, capacity);
+        if (!text) {
+            scanner->failed = true;
+            return;
+        }
+        scanner->text = text;
+        scanner->text_capacity = capacity;
+    }
+    
+    memcpy(scanner->text + scanner->text_len, bytes, n);
+    scanner->text_len += n;
+    scanner->text[scanner->text_len] = '\0';
+}
+
+// Helper: Emit visible non-space text, preceded by one pending space
+static void emit_text(HtmlScanner* scanner, const char* bytes, size_t n) {
+    if (scanner->skip_depth > 0) return;
+    
+    if (scanner->pending_space && scanner->text_len > 0) {
+        text_append(scanner, " ", 1);
+    }
+    scanner->pending_space = false;
+    text_append(scanner, bytes, n);
+}
+
+// Helper: Emit whitespace (collapsed; leading and trailing space is dropped)
+static void emit_space(HtmlScanner* scanner) {
+    scanner->pending_space = true;
+}
+
+// Helper: Emit '&' + entity (+ ';') literally
+static void emit_literal_entity(HtmlScanner* scanner, bool terminated) {
+    char literal[SCANNER_MAX_ENTITY + 2];
+    literal[0] = '&';
+    memcpy(literal + 1, scanner->entity, scanner->entity_len);
+    size_t n = scanner->entity_len + 1;
+    if (terminated) literal[n++] = ';';
+    emit_text(scanner, literal, n);
+}
+
+/**
+ * Copy an attribute value, decoding entities and trimming whitespace
+ *
+ * @return false if the value does not fit
+ */
+static bool copy_attr_value(const char* value, size_t len, char* out, size_t out_size) {
+    while (len > 0 && isspace((unsigned char)*value)) {
+        value++;
+        len--;
+    }
+    while (len > 0 && isspace((unsigned char)value[len - 1])) len--;
+    
+    size_t o = 0;
+    for (size_t i = 0; i < len; i++) {
+        char decoded[4];
+        size_t n = 0;
+        if (value[i] == '&') {
+            const char* semi = memchr(value + i + 1, ';', len - i - 1);
+            if (semi && semi - (value + i + 1) < SCANNER_MAX_ENTITY) {
+                n = decode_entity(value + i + 1, (size_t)(semi - (value + i + 1)), decoded);
+                if (n > 0) i = (size_t)(semi - value);
+            }
+        }
+        if (n == 0) {
+            decoded[0] = value[i];
+            n = 1;
+        }
+        if (o + n >= out_size) {
+            out[0] = '\0';
+            return false;
+        }
+        memcpy(out + o, decoded, n);
+        o += n;
+    }
+    out[o] = '\0';
+    return true;
+}
+
+// Helper: Report a link if it is non-empty
+static void report_link(HtmlScanner* scanner, const char* url, HtmlLinkKind kind) {
+    if (scanner->on_link && url[0]) {
+        scanner->on_link(url, kind, scanner->link_data);
+    }
+}
+
+// Helper: Link target of an onclick handler (location = '...')
+static void report_onclick(HtmlScanner* scanner, const char* handler) {
+    const char* loc = strstr(handler, "location");
+    if (!loc) return;
+    
+    const char* start = strpbrk(loc, "'\"");
+    if (!start) return;
+    const char* end = strchr(start + 1, *start);
+    if (!end || end == start + 1) return;
+    
+    char url[HTML_SCANNER_MAX_URL];
+    if (copy_attr_value(start + 1, (size_t)(end - start - 1), url, sizeof(url))) {
+        report_link(scanner, url, HTML_LINK_ONCLICK);
+    }
+}
+
+// Helper: Link target of a meta refresh ("5; url=...")
+static void report_meta_refresh(HtmlScanner* scanner, const char* content) {
+    const char* marker = strcasestr(content, "url=");
+    if (!marker) return;
+    
+    const char* start = marker + 4;
+    while (isspace((unsigned char)*start)) start++;
+    const char* end = start + strlen(start);
+    if (*start == '\'' || *start == '"') {
+        const char* close = strchr(start + 1, *start);
+        if (close) end = close;
+        start++;
+    }
+    
+    char url[HTML_SCANNER_MAX_URL];
+    if (copy_attr_value(start, (size_t)(end - start), url, sizeof(url))) {
+        report_link(scanner, url, HTML_LINK_META_REFRESH);
+    }
+}
+
+// Helper: Whether the mode drops text of this content type
+static bool mode_skips(ExtractionMode mode, ContentType type) {
+    switch (mode) {
+        case EXTRACT_ALL:
+            return false;
+        case EXTRACT_HUMAN_TEXT:
+            return type == CONTENT_NAVIGATION || type == CONTENT_BOILERPLATE || type == CONTENT_SIDEBAR;
+        case EXTRACT_METADATA:
+            return type != CONTENT_METADATA && type != CONTENT_UNKNOWN;
+        case EXTRACT_MIXED:
+            return type == CONTENT_NAVIGATION || type == CONTENT_BOILERPLATE;
+    }
+    return false;
+}
+
+// Helper: Close the innermost open element with this name (stray end tags are ignored)
+static void close_element(HtmlScanner* scanner, const char* name) {
+    if (scanner->overflow > 0) {
+        scanner->overflow--;
+        return;
+    }
+    
+    for (int i = scanner->depth - 1; i >= 0; i--) {
+        if (strcmp(scanner->names[i], name) == 0) {
+            scanner->depth = i;
+            if (scanner->skip_depth > scanner->depth) scanner->skip_depth = 0;
+            return;
+        }
+    }
+}
+
+// Helper: Open an element
+static void open_element(HtmlScanner* scanner, const char* name, bool skip) {
+    if (scanner->depth >= SCANNER_MAX_DEPTH) {
+        scanner->overflow++;
+        return;
+    }
+    
+    strcpy(scanner->names[scanner->depth++], name);
+    if (skip && scanner->skip_depth == 0) {
+        scanner->skip_depth = scanner->depth;
+    }
+}
+
+/**
+ * Interpret a complete tag
+ *
+ * Reports its links, classifies it and updates the open element stack.
+ */
+static void process_tag(HtmlScanner* scanner) {
+    const char* p = scanner->tag;
+    
+    // Doctype and processing instructions
+    if (*p == '!' || *p == '?') return;
+    
+    bool closing = false;
+    if (*p == '/') {
+        closing = true;
+        p++;
+    }
+    
+    char name[SCANNER_TAG_NAME];
+    size_t name_len = 0;
+    while (*p && !isspace((unsigned char)*p) && *p != '/') {
+        if (name_len < sizeof(name) - 1) name[name_len++] = (char)tolower((unsigned char)*p);
+        p++;
+    }
+    name[name_len] = '\0';
+    if (name_len == 0) return;
+    
+    // Tags other than inline ones separate words
+    if (!name_in_list(name, INLINE_ELEMENTS)) emit_space(scanner);
+    
+    if (closing) {
+        close_element(scanner, name);
+        return;
+    }
+    
+    // Attributes
+    char class_attr[SCANNER_MAX_ATTR] = "";
+    char id_attr[SCANNER_MAX_ATTR] = "";
+    char onclick[SCANNER_MAX_ATTR] = "";
+    char http_equiv[32] = "";
+    char content[HTML_SCANNER_MAX_URL] = "";
+    char url[HTML_SCANNER_MAX_URL];
+    bool self_closing = false;
+    
+    while (*p) {
+        while (isspace((unsigned char)*p)) p++;
+        if (*p == '/') {
+            p++;
+            self_closing = (*p == '\0');
+            continue;
+        }
+        if (!*p) break;
+        
+        char attr[32];
+        size_t attr_len = 0;
+        while (*p && !isspace((unsigned char)*p) && *p != '=' && *p != '/') {
+            if (attr_len < sizeof(attr) - 1) attr[attr_len++] = (char)tolower((unsigned char)*p);
+            p++;
+        }
+        attr[attr_len] = '\0';
+        
+        while (isspace((unsigned char)*p)) p++;
+        const char* value = "";
+        size_t value_len = 0;
+        if (*p == '=') {
+            p++;
+            while (isspace((unsigned char)*p)) p++;
+            if (*p == '"' || *p == '\'') {
+                char quote = *p++;
+                value = p;
+                while (*p && *p != quote) p++;
+                value_len = (size_t)(p - value);
+                if (*p) p++;
+            } else {
+                value = p;
+                while (*p && !isspace((unsigned char)*p)) p++;
+                value_len = (size_t)(p - value);
+            }
+        }
+        if (attr_len == 0) {
+            if (*p) p++;
+            continue;
+        }
+        
+        if (strcmp(attr, "href") == 0) {
+            if (copy_attr_value(value, value_len, url, sizeof(url))) {
+                report_link(scanner, url, HTML_LINK_HREF);
+            }
+        } else if (strcmp(attr, "data-href") == 0 || strcmp(attr, "data-url") == 0 ||
+                   strcmp(attr, "data-link") == 0) {
+            if (copy_attr_value(value, value_len, url, sizeof(url))) {
+                report_link(scanner, url, HTML_LINK_DATA_ATTR);
+            }
+        } else if (strcmp(attr, "onclick") == 0) {
+            copy_attr_value(value, value_len, onclick, sizeof(onclick));
+        } else if (strcmp(attr, "http-equiv") == 0) {
+            copy_attr_value(value, value_len, http_equiv, sizeof(http_equiv));
+        } else if (strcmp(attr, "content") == 0) {
+            copy_attr_value(value, value_len, content, sizeof(content));
+        } else if (scanner->mode == EXTRACT_ALL) {
+            // class and id are only needed for classification
+        } else if (strcmp(attr, "class") == 0) {
+            copy_attr_value(value, value_len, class_attr, sizeof(class_attr));
+        } else if (strcmp(attr, "id") == 0) {
+            copy_attr_value(value, value_len, id_attr, sizeof(id_attr));
+        }
+    }
+    
+    if (onclick[0]) report_onclick(scanner, onclick);
+    if (strcmp(name, "meta") == 0 && strcasecmp(http_equiv, "refresh") == 0) {
+        report_meta_refresh(scanner, content);
+    }
+    
+    // Script and style content is never text
+    if (!self_closing && (strcmp(name, "script") == 0 || strcmp(name, "style") == 0)) {
+        scanner->raw_end = name[1] == 'c' ? "</script" : "</style";
+        scanner->raw_match = 0;
+        scanner->state = SCAN_RAWTEXT;
+        return;
+    }
+    
+    if (self_closing || name_in_list(name, VOID_ELEMENTS)) return;
+    
+    // Classification only matters when some content is dropped
+    bool skip = false;
+    if (scanner->mode != EXTRACT_ALL) {
+        // Names are matched lowercase, like parse_tag in content_filter.c
+        for (char* c = class_attr; *c; c++) *c = (char)tolower((unsigned char)*c);
+        for (char* c = id_attr; *c; c++) *c = (char)tolower((unsigned char)*c);
+        
+        ContentType type = classify_html_element(name, class_attr, id_attr);
+        skip = mode_skips(scanner->mode, type);
+    }
+    open_element(scanner, name, skip);
+}
+
+/**
+ * Take the base URL from a "<!-- URL: ... -->" comment (first one wins)
+ */
+static void process_comment(HtmlScanner* scanner) {
+    if (scanner->base_url[0]) return;
+    
+    const char* p = scanner->comment;
+    while (*p == ' ') p++;
+    if (strncmp(p, "URL:", 4) != 0) return;
+    p += 4;
+    while (*p == ' ') p++;
+    
+    size_t len = strlen(p);
+    while (len > 0 && isspace((unsigned char)p[len - 1])) len--;
+    if (len == 0 || len >= sizeof(scanner->base_url)) return;
+    
+    memcpy(scanner->base_url, p, len);
+    scanner->base_url[len] = '\0';
+}
+
+// Helper: Append a byte to the current tag
+static void tag_append(HtmlScanner* scanner, char c) {
+    if (scanner->tag_len < SCANNER_MAX_TAG - 1) {
+        scanner->tag[scanner->tag_len++] = c;
+    }
+}
+
+HtmlScanner* html_scanner_create(ExtractionMode mode, size_t max_text) {
+    if (max_text < 2) return NULL;
+    
+    HtmlScanner* scanner = (HtmlScanner*)calloc(1, sizeof(HtmlScanner));
+    if (!scanner) return NULL;
+    
+    scanner->mode = mode;
+    scanner->max_text = max_text;
+    scanner->text_capacity = max_text < SCANNER_INITIAL_TEXT ? max_text : SCANNER_INITIAL_TEXT;
+    scanner->text = (char*)malloc(scanner->text_capacity);
+    if (!scanner->text) {
+        free(scanner);
+        return NULL;
+    }
+    
+    html_scanner_reset(scanner);
+    return scanner;
+}
+
+void html_scanner_destroy(HtmlScanner* scanner) {
+    if (!scanner) return;
+    free(scanner->text);
+    free(scanner);
+}
+
+void html_scanner_set_link_callback(HtmlScanner* scanner, HtmlLinkCallback callback, void* user_data) {
+    if (!scanner) return;
+    scanner->on_link = callback;
+    scanner->link_data = user_data;
+}
+
+void html_scanner_reset(HtmlScanner* scanner) {
+    if (!scanner) return;
+    
+    scanner->state = SCAN_TEXT;
+    scanner->text_len = 0;
+    scanner->text[0] = '\0';
+    scanner->pending_space = false;
+    scanner->tag_len = 0;
+    scanner->comment_len = 0;
+    scanner->entity_len = 0;
+    scanner->depth = 0;
+    scanner->overflow = 0;
+    scanner->skip_depth = 0;
+    scanner->base_url[0] = '\0';
+    scanner->failed = false;
+}
+
+int html_scanner_feed(HtmlScanner* scanner, const char* data, size_t length) {
+    if (!scanner || (!data && length > 0)) return -1;
+    
+    size_t i = 0;
+    while (i < length) {
+        char c = data[i];
+        
+        switch (scanner->state) {
+            case SCAN_TEXT: {
+                // Copy a run of ordinary bytes at once
+                size_t run = i;
+                while (run < length && data[run] != '<' && data[run] != '&' &&
+                       (unsigned char)data[run] > ' ') {
+                    run++;
+                }
+                if (run > i) {
+                    emit_text(scanner, data + i, run - i);
+                    i = run;
+                    continue;
+                }
+                
+                if (c == '<') {
+                    scanner->state = SCAN_TAG_OPEN;
+                } else if (c == '&') {
+                    scanner->entity_len = 0;
+                    scanner->state = SCAN_ENTITY;
+                } else {
+                    emit_space(scanner);
+                }
+                i++;
+                break;
+            }
+            
+            case SCAN_ENTITY:
+                if (c == ';') {
+                    char decoded[4];
+                    size_t n = decode_entity(scanner->entity, scanner->entity_len, decoded);
+                    if (n == 1 && decoded[0] == ' ') {
+                        emit_space(scanner);
+                    } else if (n > 0) {
+                        emit_text(scanner, decoded, n);
+                    } else {
+                        emit_literal_entity(scanner, true);
+                    }
+                    scanner->state = SCAN_TEXT;
+                    i++;
+                } else if ((isalnum((unsigned char)c) || c == '#') &&
+                           scanner->entity_len < SCANNER_MAX_ENTITY - 1) {
+                    scanner->entity[scanner->entity_len++] = c;
+                    i++;
+                } else {
+                    // Not an entity: keep the text and rescan this byte
+                    emit_literal_entity(scanner, false);
+                    scanner->state = SCAN_TEXT;
+                }
+                break;
+            
+            case SCAN_TAG_OPEN:
+                if (isalpha((unsigned char)c) || c == '/' || c == '!' || c == '?') {
+                    scanner->tag_len = 0;
+                    scanner->quote = 0;
+                    scanner->last_significant = 0;
+                    scanner->state = SCAN_TAG;
+                } else {
+                    // A lone '<' is text
+                    emit_text(scanner, "<", 1);
+                    scanner->state = SCAN_TEXT;
+                }
+                break;
+            
+            case SCAN_TAG: {
+                // Copy a run of bytes that cannot end the tag or a value at once
+                size_t run = i;
+                if (scanner->quote) {
+                    const char* close = memchr(data + i, scanner->quote, length - i);
+                    run = close ? (size_t)(close - data) : length;
+                } else if (scanner->tag_len >= 3) {
+                    while (run < length && data[run] != '>' && data[run] != '"' && data[run] != '\'') {
+                        if (!isspace((unsigned char)data[run])) scanner->last_significant = data[run];
+                        run++;
+                    }
+                }
+                if (run > i) {
+                    size_t n = run - i;
+                    if (n > SCANNER_MAX_TAG - 1 - scanner->tag_len) n = SCANNER_MAX_TAG - 1 - scanner->tag_len;
+                    memcpy(scanner->tag + scanner->tag_len, data + i, n);
+                    scanner->tag_len += n;
+                    i = run;
+                    continue;
+                }
+                
+                i++;
+                if (scanner->quote) {
+                    scanner->quote = 0;
+                    tag_append(scanner, c);
+                    break;
+                }
+                if (c == '>') {
+                    scanner->tag[scanner->tag_len] = '\0';
+                    scanner->state = SCAN_TEXT;
+                    process_tag(scanner);
+                    break;
+                }
+                if ((c == '"' || c == '\'') && scanner->last_significant == '=') {
+                    scanner->quote = c;
+                }
+                tag_append(scanner, c);
+                if (!isspace((unsigned char)c)) scanner->last_significant = c;
+                
+                if (scanner->tag_len == 3 && memcmp(scanner->tag, "!--", 3) == 0) {
+                    scanner->comment_len = 0;
+                    scanner->dashes = 0;
+                    scanner->state = SCAN_COMMENT;
+                }
+                break;
+            }
+            
+            case SCAN_COMMENT:
+                i++;
+                if (c == '>' && scanner->dashes >= 2) {
+                    // Drop the "--" of the terminator
+                    size_t len = scanner->comment_len;
+                    scanner->comment[len >= 2 ? len - 2 : 0] = '\0';
+                    process_comment(scanner);
+                    scanner->state = SCAN_TEXT;
+                    break;
+                }
+                scanner->dashes = c == '-' ? scanner->dashes + 1 : 0;
+                if (scanner->comment_len < SCANNER_MAX_COMMENT - 1) {
+                    scanner->comment[scanner->comment_len++] = c;
+                }
+                break;
+            
+            case SCAN_RAWTEXT:
+                if (scanner->raw_match == 0 && c != '<') {
+                    // Jump to the next '<'
+                    const char* lt = memchr(data + i, '<', length - i);
+                    i = lt ? (size_t)(lt - data) : length;
+                    continue;
+                }
+                i++;
+                if (tolower((unsigned char)c) == scanner->raw_end[scanner->raw_match]) {
+                    scanner->raw_match++;
+                    if (scanner->raw_end[scanner->raw_match] == '\0') {
+                        // Finish the end tag as an ordinary tag
+                        scanner->tag_len = 0;
+                        for (const char* e = scanner->raw_end + 1; *e; e++) tag_append(scanner, *e);
+                        scanner->quote = 0;
+                        scanner->last_significant = 0;
+                        scanner->state = SCAN_TAG;
+                    }
+                } else {
+                    scanner->raw_match = c == '<' ? 1 : 0;
+                }
+                break;
+        }
+    }
+    
+    return scanner->failed ? -1 : 0;
+}
+
+void html_scanner_finish(HtmlScanner* scanner) {
+    if (!scanner) return;
+    
+    if (scanner->state == SCAN_ENTITY) {
+        emit_literal_entity(scanner, false);
+    } else if (scanner->state == SCAN_TAG_OPEN) {
+        emit_text(scanner, "<", 1);
+    }
+    scanner->state = SCAN_TEXT;
+}
+
+const char* html_scanner_text(const HtmlScanner* scanner, size_t* length) {
+    if (!scanner) {
+        if (length) *length = 0;
+        return "";
+    }
+    if (length) *length = scanner->text_len;
+    return scanner->text;
+}
+
+const char* html_scanner_base_url(const HtmlScanner* scanner) {
+    return scanner ? scanner->base_url : "";
+}
@@ -0,0 +1,106 @@
+#ifndef HTML_SCANNER_H
+#define HTML_SCANNER_H
+
+#include <stddef.h>
+#include <stdbool.h>
+#include "content_filter.h"
+
+/**
+ * Streaming HTML Scanner
+ *
+ * One pass over an HTML document produces everything the preprocessor
+ * needs:
+ * - Clean text: tags, comments, scripts and styles removed, entities
+ *   decoded, whitespace collapsed and trimmed
+ * - Links: href, data-href/-url/-link, onclick location and meta refresh
+ *   targets, reported through a callback as they are found
+ * - Base URL: the crawler's "<!-- URL: ... -->" header comment
+ * - Boilerplate classification: elements are classified with
+ *   classify_html_element() and their text dropped according to the
+ *   ExtractionMode
+ *
+ * Input is pushed in chunks of any size (a tag, comment or entity may
+ * span chunks), so a page never has to be held in memory in full. Memory
+ * is bounded by the text produced plus a fixed amount per scanner.
+ */
+
+#define HTML_SCANNER_CHUNK_SIZE (64 * 1024)    // Suggested read size
+#define HTML_SCANNER_MAX_URL 2048              // Longer link values are dropped
+
+// Where a link was found
+typedef enum {
+    HTML_LINK_HREF,             // href attribute
+    HTML_LINK_DATA_ATTR,        // data-href, data-url, data-link
+    HTML_LINK_ONCLICK,          // location target in an onclick handler
+    HTML_LINK_META_REFRESH      // <meta http-equiv="refresh" content="...; url=...">
+} HtmlLinkKind;
+
+/**
+ * Called for each link, as written in the page (entities decoded,
+ * not resolved against the base URL)
+ *
+ * @param url Link value
+ * @param kind Where the link was found
+ * @param user_data Passed through from html_scanner_set_link_callback
+ */
+typedef void (*HtmlLinkCallback)(const char* url, HtmlLinkKind kind, void* user_data);
+
+// Scanner handle
+typedef struct HtmlScanner HtmlScanner;
+
+/**
+ * Create a scanner
+ *
+ * @param mode Which content to keep in the text
+ * @param max_text Maximum text size in bytes, including the terminator
+ * @return Scanner or NULL on error
+ */
+HtmlScanner* html_scanner_create(ExtractionMode mode, size_t max_text);
+
+/**
+ * Destroy a scanner
+ */
+void html_scanner_destroy(HtmlScanner* scanner);
+
+/**
+ * Set the link callback (NULL to ignore links)
+ */
+void html_scanner_set_link_callback(HtmlScanner* scanner, HtmlLinkCallback callback, void* user_data);
+
+/**
+ * Scan the next chunk of the document
+ *
+ * @param scanner Scanner
+ * @param data Chunk (need not be NUL-terminated)
+ * @param length Chunk size in bytes
+ * @return 0 on success, -1 on error (out of memory)
+ */
+int html_scanner_feed(HtmlScanner* scanner, const char* data, size_t length);
+
+/**
+ * Finish the document (flushes a trailing entity)
+ */
+void html_scanner_finish(HtmlScanner* scanner);
+
+/**
+ * Get the extracted text
+ *
+ * @param scanner Scanner
+ * @param length Output: text length (can be NULL)
+ * @return NUL-terminated text, owned by the scanner
+ */
+const char* html_scanner_text(const HtmlScanner* scanner, size_t* length);
+
+/**
+ * Get the base URL from the crawler's header comment
+ *
+ * @return URL, or "" if the document has none (yet)
+ */
+const char* html_scanner_base_url(const HtmlScanner* scanner);
+
+/**
+ * Clear all state to scan another document with the same scanner
+ */
+void html_scanner_reset(HtmlScanner* scanner);
+
+#endif // HTML_SCANNER_H
@@ -2,14 +2,18 @@
  * Dynamic Link Management Implementation
  * 
  * In-memory link queue with priority support and duplicate detection.
+ * Duplicates are found through a normalized-URL hash set (O(1) per link)
+ * and, optionally, a persisted Bloom filter of every URL ever queued.
  */
 
 #include "link_management.h"
+#include "url_set.h"
 #include <stdlib.h>
 #include <string.h>
 #include <stdio.h>
 
 #define MAX_LINKS 100000  // Maximum links in memory
+#define LINK_HISTORY_FP_RATE 1e-4  // False-positive rate of the history filter
 
 /**
  * Link queue structure
@@ -19,6 +23,8 @@ struct LinkQueue {
     int capacity;
     int count;
     char queue_file[1024];
+    URLSet* seen;              // Normalized URL -> index in links
+    URLBloom* history;         // Optional "ever seen" set across restarts
 };
 
 /**
@@ -37,6 +43,13 @@ LinkQueue* link_queue_create(const char* queue_file) {
     
     queue->count = 0;
     
+    queue->seen = url_set_create(1024);
+    if (!queue->seen) {
+        free(queue->links);
+        free(queue);
+        return NULL;
+    }
+    
     if (queue_file) {
         strncpy(queue->queue_file, queue_file, sizeof(queue->queue_file) - 1);
         link_queue_load(queue);
@@ -46,29 +59,24 @@ LinkQueue* link_queue_create(const char* queue_file) {
 }
 
 /**
- * Check if URL is already in queue
+ * Check if URL is already in queue (or was ever queued, with history)
  */
 bool link_queue_is_duplicate(LinkQueue* queue, const char* url) {
     if (!queue || !url) return false;
     
-    for (int i = 0; i < queue->count; i++) {
-        if (strcmp(queue->links[i].url, url) == 0) {
-            return true;
-        }
+    if (url_set_contains(queue->seen, url)) {
+        return true;
     }
     
-    return false;
+    return queue->history && url_bloom_maybe_contains(queue->history, url);
 }
 
 /**
- * Add a link to the queue
+ * Append a link; returns 1 if added, 0 if duplicate, -1 on error
  */
-int link_queue_add(LinkQueue* queue, const char* url, int priority, const char* source_url) {
-    if (!queue || !url) return -1;
-    
-    // Check for duplicates
+static int queue_insert(LinkQueue* queue, const char* url, int priority, const char* source_url) {
     if (link_queue_is_duplicate(queue, url)) {
-        return 0;  // Already in queue, not an error
+        return 0;
     }
     
     // Check capacity
@@ -76,6 +84,13 @@ int link_queue_add(LinkQueue* queue, const char* url, int priority, const char*
         return -1;  // Queue full
     }
     
+    if (url_set_insert(queue->seen, url, queue->count) < 0) {
+        return -1;  // Empty or oversized URL
+    }
+    if (queue->history) {
+        url_bloom_add(queue->history, url);
+    }
+    
     // Add link
     CrawlerLink* link = &queue->links[queue->count];
     strncpy(link->url, url, sizeof(link->url) - 1);
@@ -91,7 +106,17 @@ int link_queue_add(LinkQueue* queue, const char* url, int priority, const char*
     
     queue->count++;
     
-    return 0;
+    return 1;
+}
+
+/**
+ * Add a link to the queue
+ */
+int link_queue_add(LinkQueue* queue, const char* url, int priority, const char* source_url) {
+    if (!queue || !url) return -1;
+    
+    // Duplicates are not an error
+    return queue_insert(queue, url, priority, source_url) < 0 ? -1 : 0;
 }
 
 /**
@@ -102,7 +127,8 @@ int link_queue_add_batch(LinkQueue* queue, CrawlerLink* links, int count) {
     
     int added = 0;
     for (int i = 0; i < count; i++) {
-        if (link_queue_add(queue, links[i].url, links[i].priority, links[i].source_url) == 0) {
+        const char* source = links[i].source_url[0] ? links[i].source_url : NULL;
+        if (queue_insert(queue, links[i].url, links[i].priority, source) == 1) {
             added++;
         }
     }
@@ -110,6 +136,23 @@ int link_queue_add_batch(LinkQueue* queue, CrawlerLink* links, int count) {
     return added;
 }
 
+/**
+ * Enable the persistent "ever seen" history
+ */
+int link_queue_enable_history(LinkQueue* queue, const char* bloom_path, size_t expected_items) {
+    if (!queue || queue->history) return -1;
+    
+    queue->history = url_bloom_open(bloom_path, expected_items, LINK_HISTORY_FP_RATE);
+    if (!queue->history) return -1;
+    
+    // Links loaded before history was enabled count as seen
+    for (int i = 0; i < queue->count; i++) {
+        url_bloom_add(queue->history, queue->links[i].url);
+    }
+    
+    return 0;
+}
+
 /**
  * Get next link to crawl (highest priority, uncrawled)
  */
@@ -143,14 +186,13 @@ int link_queue_get_next(LinkQueue* queue, char* url, size_t url_size) {
 int link_queue_mark_crawled(LinkQueue* queue, const char* url) {
     if (!queue || !url) return -1;
     
-    for (int i = 0; i < queue->count; i++) {
-        if (strcmp(queue->links[i].url, url) == 0) {
-            queue->links[i].crawled = true;
-            return 0;
-        }
+    int index = url_set_find(queue->seen, url);
+    if (index < 0) {
+        return -1;  // URL not found
     }
     
-    return -1;  // URL not found
+    queue->links[index].crawled = true;
+    return 0;
 }
 
 /**
@@ -185,6 +227,7 @@ int link_queue_clear(LinkQueue* queue) {
     
     queue->count = 0;
     memset(queue->links, 0, queue->capacity * sizeof(CrawlerLink));
+    url_set_clear(queue->seen);  // History, if enabled, is kept
     
     return 0;
 }
@@ -232,7 +275,8 @@ int link_queue_load(LinkQueue* queue) {
         char* source = strtok(NULL, "|");
         char* crawled_str = strtok(NULL, "|\n");
         
-        if (url && priority_str && time_str) {
+        if (url && priority_str && time_str &&
+            url_set_insert(queue->seen, url, queue->count) == 1) {
             strncpy(link->url, url, sizeof(link->url) - 1);
             link->priority = atoi(priority_str);
             link->added_time = (time_t)atol(time_str);
@@ -266,5 +310,7 @@ void link_queue_destroy(LinkQueue* queue) {
         free(queue->links);
     }
     
+    url_set_destroy(queue->seen);
+    url_bloom_close(queue->history);  // Persists the history filter
     free(queue);
 }
\ No newline at end of file
@@ -10,6 +10,10 @@
  * 
  * Manages a queue of links to crawl with priority support,
  * duplicate detection, and dynamic addition during crawling.
+ *
+ * Duplicate detection compares normalized URLs (lowercase scheme/host,
+ * no fragment or default port) through a hash set, so adding a link is
+ * O(1) regardless of queue size.
  */
 
 /**
@@ -53,10 +57,24 @@ int link_queue_add(LinkQueue* queue, const char* url, int priority, const char*
  * @param queue Link queue
  * @param links Array of links
  * @param count Number of links
- * @return Number of links added
+ * @return Number of new links added (duplicates are skipped)
  */
 int link_queue_add_batch(LinkQueue* queue, CrawlerLink* links, int count);
 
+/**
+ * Remember every queued URL across restarts in a persisted Bloom filter
+ *
+ * Once enabled, URLs found in the filter are treated as duplicates even
+ * after they leave the queue (rare false positives are possible).
+ * The filter is saved by link_queue_destroy().
+ *
+ * @param queue Link queue
+ * @param bloom_path File holding the filter (created if missing)
+ * @param expected_items Expected number of distinct URLs
+ * @return 0 on success, -1 on error
+ */
+int link_queue_enable_history(LinkQueue* queue, const char* bloom_path, size_t expected_items);
+
 /**
  * Get next link to crawl (highest priority)
  * 
@@ -81,7 +99,7 @@ int link_queue_mark_crawled(LinkQueue* queue, const char* url);
  * 
  * @param queue Link queue
  * @param url URL to check
- * @return true if duplicate, false otherwise
+ * @return true if duplicate (or seen before, with history), false otherwise
  */
 bool link_queue_is_duplicate(LinkQueue* queue, const char* url);
 
@@ -4,20 +4,29 @@
  * Converts HTML pages to clean text suitable for training
  */
 
+#define _GNU_SOURCE
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
 #include <ctype.h>
-#include <dirent.h>
 #include <unistd.h>
 #include <pthread.h>
 #include <time.h>
 #include "content_filter.h"
 #include "site_handlers.h"
 #include "crawler_url_manager.h"
+#include "extractor_pool.h"
+#include "extraction_cache.h"
+#include "url_set.h"
+#include "stage_queue.h"
+#include "html_scanner.h"
 
 #define MAX_TEXT_SIZE (5 * 1024 * 1024)  // 5MB max text
 #define MIN_TEXT_LENGTH 100
+#define SEEN_LINKS_FILE "seen_links.bloom"
+#define SEEN_LINKS_EXPECTED 4000000    // Distinct links sized for in the filter
+#define SEEN_LINKS_FP_RATE 1e-4
+#define EXTRACTION_CACHE_DIR "extraction_cache"
 
 // Forward declarations for file processors
 extern int process_pdf_file(const char* input_path, const char* output_path);
@@ -27,6 +36,10 @@ extern int process_office_file(const char* input_path, const char* output_path);
 // Global URL manager for link extraction
 CrawlerURLManager* g_crawler_url_manager = NULL;
 
+// Links already sent to the crawl queue (persisted, shared by all threads)
+static URLBloom* g_seen_links = NULL;
+static pthread_mutex_t g_seen_links_lock = PTHREAD_MUTEX_INITIALIZER;
+
 /**
  * File type enumeration
  */
@@ -117,6 +130,112 @@ static FileType detect_file_type(const char* data, size_t size) {
     return FILE_TYPE_BINARY;
 }
 
+/**
+ * Identify ZIP-based document format from its entry names
+ * Returns a universal_extractor.py format hint, or NULL if unknown
+ */
+static const char* detect_zip_document_format(const char* data, size_t size) {
+    // ODF and EPUB store their MIME type uncompressed in the first entry
+    if (memmem(data, size, "application/epub+zip", 20)) return "epub";
+    if (memmem(data, size, "application/vnd.oasis.opendocument.text", 39)) return "odt";
+    if (memmem(data, size, "application/vnd.oasis.opendocument.spreadsheet", 46)) return "ods";
+    if (memmem(data, size, "application/vnd.oasis.opendocument.presentation", 47)) return "odp";
+    
+    // OOXML part names appear in the local file headers
+    if (memmem(data, size, "word/document.xml", 17)) return "docx";
+    if (memmem(data, size, "xl/workbook.xml", 15)) return "xlsx";
+    if (memmem(data, size, "ppt/presentation.xml", 20)) return "pptx";
+    
+    return NULL;
+}
+
+/**
+ * Extract ZIP-based document through the persistent extractor pool
+ */
+static int extract_with_pool(ExtractorPool* pool, const char* input_path,
+                             const char* output_path, const char* format) {
+    char* text = (char*)malloc(MAX_TEXT_SIZE);
+    if (!text) return -1;
+    
+    int bytes = extractor_pool_extract(pool, input_path, format, text, MAX_TEXT_SIZE);
+    if (bytes < 10) {
+        free(text);
+        return -1;
+    }
+    
+    FILE* out = fopen(output_path, "w");
+    if (!out) {
+        free(text);
+        return -1;
+    }
+    fwrite(text, 1, (size_t)bytes, out);
+    fputc('\n', out);
+    fclose(out);
+    free(text);
+    
+    printf("  ✓ Extracted %d bytes from %s (extractor pool)\n", bytes, format);
+    return 0;
+}
+
+// Cache lookup for one document (cache is NULL when not cached)
+typedef struct {
+    ExtractionCache* cache;
+    ExtractionCacheKey key;
+    const char* extractor;
+} CachedExtraction;
+
+/**
+ * Write cached text for a document to output_path
+ * Returns 0 on a hit; otherwise prepares cached->key for cache_output
+ */
+static int cache_restore(CachedExtraction* cached, const char* input_path,
+                         const char* extractor, const char* output_path) {
+    cached->cache = extraction_cache_get_default();
+    cached->extractor = extractor;
+    if (!cached->cache) return -1;
+    if (extraction_cache_key_file(input_path, extractor, &cached->key) != 0) {
+        cached->cache = NULL;
+        return -1;
+    }
+    
+    size_t length;
+    char* text = extraction_cache_get(cached->cache, &cached->key, extractor, &length);
+    if (!text) return -1;
+    
+    FILE* out = fopen(output_path, "w");
+    if (!out) {
+        free(text);
+        return -1;
+    }
+    fwrite(text, 1, length, out);
+    fclose(out);
+    free(text);
+    
+    printf("  ✓ Reused %zu bytes from extraction cache (%s)\n", length, extractor);
+    return 0;
+}
+
+/**
+ * Store a successful extraction's output file; passes result through
+ */
+static int cache_output(const CachedExtraction* cached, int result, const char* output_path) {
+    if (result != 0 || !cached->cache) return result;
+    
+    FILE* f = fopen(output_path, "rb");
+    if (!f) return result;
+    fseek(f, 0, SEEK_END);
+    long size = ftell(f);
+    fseek(f, 0, SEEK_SET);
+    
+    char* text = size > 0 ? (char*)malloc((size_t)size) : NULL;
+    if (text && fread(text, 1, (size_t)size, f) == (size_t)size) {
+        extraction_cache_put(cached->cache, &cached->key, cached->extractor, text, (size_t)size);
+    }
+    free(text);
+    fclose(f);
+    return result;
+}
+
 static void get_timestamp(char* buffer, size_t size) {
     time_t now = time(NULL);
     struct tm* tm_info = localtime(&now);
@@ -130,293 +249,203 @@ typedef struct {
     int files_processed;
     ExtractionMode extraction_mode;
     bool handlers_initialized;  // Track if handlers are registered  // NEW: Content filtering mode
+    ExtractorPool* extractor_pool;  // Persistent Python extractor workers
+    ExtractionCache* extraction_cache;  // Extracted text by document hash
+    URLBloom* seen_links;           // Owned seen-links filter (first state only)
+    StageQueue* input;              // Raw pages from the crawler
+    StageQueue* output;             // Text files for the tokenizer
+    time_t started;                 // Older raw pages are recovered from disk
+    bool recovered;                 // Startup recovery claimed by a thread
     pthread_mutex_t lock;
 } PreprocessorState;
 
 /**
- * Remove HTML tags from text
+ * Links collected from one page, deduplicated by normalized URL
  */
-static void remove_html_tags(const char* html, char* text, size_t text_size) {
-    const char* p = html;
-    char* out = text;
-    char* out_end = text + text_size - 1;
-    int in_tag = 0;
-    int in_script = 0;
-    int in_style = 0;
-    
-    while (*p && out < out_end) {
-        // Check for script/style tags
-        if (strncasecmp(p, "<script", 7) == 0) {
-            in_script = 1;
-            in_tag = 1;
-        } else if (strncasecmp(p, "</script>", 9) == 0) {
-            in_script = 0;
-            p += 9;
-            continue;
-        } else if (strncasecmp(p, "<style", 6) == 0) {
-            in_style = 1;
-            in_tag = 1;
-        } else if (strncasecmp(p, "</style>", 8) == 0) {
-            in_style = 0;
-            p += 8;
-            continue;
-        }
-        
-        // Skip script/style content
-        if (in_script || in_style) {
-            p++;
-            continue;
-        }
-        
-        // Handle tags
-        if (*p == '<') {
-            in_tag = 1;
-            p++;
-            continue;
-        } else if (*p == '>') {
-            in_tag = 0;
-            p++;
-            // Add space after tag
-            if (out > text && *(out-1) != ' ' && *(out-1) != '\n') {
-                *out++ = ' ';
-            }
-            continue;
-        }
-        
-        // Skip tag content
-        if (in_tag) {
-            p++;
-            continue;
-        }
-        
-        // Copy text content
-        *out++ = *p++;
+typedef struct {
+    URLSet* unique;
+    char** urls;
+    int count;
+    int capacity;
+    const HtmlScanner* scanner;     // Source of the base URL
+} PageLinks;
+
+static void page_links_add(PageLinks* page, const char* url) {
+    char normalized[URL_SET_MAX_URL];
+    if (url_normalize(url, normalized, sizeof(normalized)) <= 0) return;
+    if (url_set_insert(page->unique, normalized, page->count) != 1) return;
+    
+    if (page->count >= page->capacity) {
+        int capacity = page->capacity ? page->capacity * 2 : 64;
+        char** urls = (char**)realloc(page->urls, capacity * sizeof(char*));
+        if (!urls) return;
+        page->urls = urls;
+        page->capacity = capacity;
     }
     
-    *out = '\0';
+    char* copy = strdup(normalized);
+    if (copy) page->urls[page->count++] = copy;
 }
 
 /**
- * Clean and normalize text
+ * Collect one href from the scanner
+ * 
+ * Absolute http(s) links and host-relative links are kept; host-relative
+ * ones are resolved against the page URL from the crawler header, which
+ * precedes the markup (pages without it contribute no links).
  */
-static void clean_text(char* text) {
-    char* src = text;
-    char* dst = text;
-    int last_was_space = 1;
-    
-    while (*src) {
-        // Convert HTML entities (simple version)
-        if (strncmp(src, "&nbsp;", 6) == 0) {
-            *dst++ = ' ';
-            src += 6;
-            last_was_space = 0;
-            continue;
-        } else if (strncmp(src, "&lt;", 4) == 0) {
-            *dst++ = '<';
-            src += 4;
-            last_was_space = 0;
-            continue;
-        } else if (strncmp(src, "&gt;", 4) == 0) {
-            *dst++ = '>';
-            src += 4;
-            last_was_space = 0;
-            continue;
-        } else if (strncmp(src, "&amp;", 5) == 0) {
-            *dst++ = '&';
-            src += 5;
-            last_was_space = 0;
-            continue;
-        } else if (strncmp(src, "&quot;", 6) == 0) {
-            *dst++ = '"';
-            src += 6;
-            last_was_space = 0;
-            continue;
-        }
-        
-        // Normalize whitespace
-        if (isspace(*src)) {
-            if (!last_was_space) {
-                *dst++ = ' ';
-                last_was_space = 1;
-            }
-            src++;
-        } else {
-            *dst++ = *src++;
-            last_was_space = 0;
-        }
+static void page_links_collect(const char* url, HtmlLinkKind kind, void* user_data) {
+    PageLinks* page = (PageLinks*)user_data;
+    if (kind != HTML_LINK_HREF) return;
+    
+    const char* base_url = html_scanner_base_url(page->scanner);
+    if (!base_url[0]) return;
+    
+    // Skip invalid URLs
+    if (url[0] == '#' || 
+        strncmp(url, "javascript:", 11) == 0 ||
+        strncmp(url, "mailto:", 7) == 0 ||
+        strncmp(url, "tel:", 4) == 0 ||
+        strncmp(url, "data:", 5) == 0) {
+        return;
     }
     
-    *dst = '\0';
-    
-    // Trim leading whitespace (move content to start of buffer)
-    char* start = text;
-    while (*start && isspace(*start)) start++;
-    
-    if (start != text) {
-        // Move trimmed content to beginning
-        char* write = text;
-        while (*start) {
-            *write++ = *start++;
+    // Handle relative URLs
+    if (url[0] == '/') {
+        // Extract domain from base_url
+        const char* domain_start = strstr(base_url, "://");
+        if (domain_start) {
+            domain_start += 3;
+            const char* domain_end = strchr(domain_start, '/');
+            if (!domain_end) domain_end = domain_start + strlen(domain_start);
+            
+            size_t domain_len = domain_end - domain_start;
+            char full_url[2048];
+            
+            // Determine protocol
+            const char* protocol = "https://";
+            if (strncmp(base_url, "http://", 7) == 0) {
+                protocol = "http://";
+            }
+            
+            int url_len = snprintf(full_url, sizeof(full_url), "%s%.*s%s", 
+                    protocol, (int)domain_len, domain_start, url);
+            if (url_len < (int)sizeof(full_url)) {
+                page_links_add(page, full_url);
+            }
         }
-        *write = '\0';
-    }
-    
-    // Trim trailing whitespace
-    size_t len = strlen(text);
-    while (len > 0 && isspace(text[len-1])) {
-        text[len-1] = '\0';
-        len--;
+    } else if (strncmp(url, "http://", 7) == 0 || strncmp(url, "https://", 8) == 0) {
+        // Absolute URL
+        page_links_add(page, url);
     }
 }
 
-
 /**
- * Extract links from HTML and add to crawl queue
+ * Add a page's links to the crawl queue
+ * 
+ * Links the seen-links filter says were queued before are dropped.
+ * Survivors go to the URL database in one batch, or to the queue file
+ * without a manager. Only links that were actually queued are added to
+ * the filter, so a failed insert or a link the URL filters rejected is
+ * not hidden from later pages. The filter is rotated once it holds the
+ * number of links it was sized for.
+ * 
+ * @return Number of new links queued, or -1 on error
  */
-static int extract_links(const char* html, const char* base_url, const char* queue_file) {
+static int queue_page_links(PageLinks* page, const char* base_url, const char* queue_file) {
     // Try to use URL manager if available (passed via global)
     extern CrawlerURLManager* g_crawler_url_manager;
     
-    FILE* queue = NULL;
-    if (!g_crawler_url_manager) {
-        // Fallback to file-based system
-        queue = fopen(queue_file, "a");
-        if (!queue) {
-            fprintf(stderr, "Failed to open queue file: %s\n", queue_file);
-            return -1;
+    // Drop links queued by earlier pages (one lock per page)
+    int fresh = 0;
+    pthread_mutex_lock(&g_seen_links_lock);
+    for (int i = 0; i < page->count; i++) {
+        if (g_seen_links && url_bloom_maybe_contains(g_seen_links, page->urls[i])) {
+            free(page->urls[i]);
+            continue;
         }
+        page->urls[fresh++] = page->urls[i];
     }
-    
-    int links_found = 0;
-    const char* p = html;
-    
-    // Look for href attributes
-    while ((p = strstr(p, "href=")) != NULL) {
-        p += 5; // Skip "href="
-        
-        // Skip whitespace
-        while (*p && isspace(*p)) p++;
-        
-        // Determine quote type
-        char quote = 0;
-        if (*p == '"' || *p == '\'') {
-            quote = *p;
-            p++;
+    pthread_mutex_unlock(&g_seen_links_lock);
+    page->count = fresh;
+    
+    if (fresh == 0) return 0;
+    
+    int result = fresh;
+    bool* inserted = NULL;
+    if (g_crawler_url_manager) {
+        inserted = (bool*)malloc(fresh * sizeof(bool));
+        result = inserted ? crawler_url_manager_add_batch(g_crawler_url_manager, page->urls, fresh,
+                                                          base_url, inserted) : -1;
+        if (result < 0) {
+            fprintf(stderr, "Failed to queue %d links from %s\n", fresh, base_url ? base_url : "page");
         }
-        
-        // Find end of URL
-        const char* url_start = p;
-        const char* url_end = NULL;
-        
-        if (quote) {
-            url_end = strchr(p, quote);
+    } else {
+        // Fallback to file-based system
+        FILE* queue = fopen(queue_file, "a");
+        if (queue) {
+            for (int i = 0; i < fresh; i++) {
+                fprintf(queue, "%s\n", page->urls[i]);
+            }
+            if (fclose(queue) != 0) result = -1;
         } else {
-            // No quotes - find whitespace or >
-            while (*p && !isspace(*p) && *p != '>') p++;
-            url_end = p;
-        }
-        
-        if (!url_end || url_end == url_start) {
-            if (quote) p = url_end + 1;
-            continue;
-        }
-        
-        // Extract URL
-        size_t url_len = url_end - url_start;
-        if (url_len >= 2048) {
-            p = url_end + 1;
-            continue;
-        }
-        
-        char url[2048];
-        strncpy(url, url_start, url_len);
-        url[url_len] = '\0';
-        
-        // Skip invalid URLs
-        if (url[0] == '#' || 
-            strncmp(url, "javascript:", 11) == 0 ||
-            strncmp(url, "mailto:", 7) == 0 ||
-            strncmp(url, "tel:", 4) == 0 ||
-            strncmp(url, "data:", 5) == 0) {
-            p = url_end + 1;
-            continue;
+            fprintf(stderr, "Failed to open queue file: %s\n", queue_file);
+            result = -1;
         }
-        
-        // Handle relative URLs
-        if (url[0] == '/') {
-            // Extract domain from base_url
-            const char* domain_start = strstr(base_url, "://");
-            if (domain_start) {
-                domain_start += 3;
-                const char* domain_end = strchr(domain_start, '/');
-                if (!domain_end) domain_end = domain_start + strlen(domain_start);
-                
-                size_t domain_len = domain_end - domain_start;
-                char full_url[2048];
-                
-                // Determine protocol
-                const char* protocol = "https://";
-                if (strncmp(base_url, "http://", 7) == 0) {
-                    protocol = "http://";
-                }
-                
-                int url_len = snprintf(full_url, sizeof(full_url), "%s%.*s%s", 
-                        protocol, (int)domain_len, domain_start, url);
-                if (url_len >= (int)sizeof(full_url)) {
-                    // URL too long, skip it
-                    continue;
-                }
-                
-                // Add to database or file
-                if (g_crawler_url_manager) {
-                    crawler_url_manager_add(g_crawler_url_manager, full_url, base_url);
-                } else if (queue) {
-                    fprintf(queue, "%s\n", full_url);
+    }
+    
+    if (result > 0 && g_seen_links) {
+        pthread_mutex_lock(&g_seen_links_lock);
+        for (int i = 0; i < fresh && g_seen_links; i++) {
+            if (inserted && !inserted[i]) continue;
+            if (url_bloom_is_full(g_seen_links)) {
+                if (url_bloom_rotate(g_seen_links) != 0) {
+                    fprintf(stderr, "Failed to rotate the seen-links filter\n");
+                } else {
+                    printf("Seen-links filter reached %llu links, rotated (%llu rotations)\n",
+                           (unsigned long long)url_bloom_capacity(g_seen_links),
+                           (unsigned long long)url_bloom_rotations(g_seen_links));
                 }
-                links_found++;
             }
-        } else if (strncmp(url, "http://", 7) == 0 || strncmp(url, "https://", 8) == 0) {
-            // Absolute URL
-            if (g_crawler_url_manager) {
-                crawler_url_manager_add(g_crawler_url_manager, url, base_url);
-            } else if (queue) {
-                fprintf(queue, "%s\n", url);
-            }
-            links_found++;
+            url_bloom_add(g_seen_links, page->urls[i]);
         }
-        
-        p = url_end + 1;
+        pthread_mutex_unlock(&g_seen_links_lock);
     }
     
-    if (queue) {
-        fclose(queue);
-    }
-    return links_found;
+    free(inserted);
+    return result;
+}
+
+static void page_links_free(PageLinks* page) {
+    for (int i = 0; i < page->count; i++) free(page->urls[i]);
+    free(page->urls);
+    url_set_destroy(page->unique);
 }
 
 /**
- * Extract base URL from HTML metadata comment
+ * Scan an HTML/text file in chunks: text, links and base URL in one pass
+ * 
+ * @param f File positioned after the first chunk
+ * @param buffer Holds the first chunk (first_size bytes); reused for the
+ *               rest of the file, HTML_SCANNER_CHUNK_SIZE bytes at a time
+ * @return 0 on success, -1 on error
  */
-static int extract_base_url(const char* html, char* base_url, size_t size) {
-    // Look for <!-- URL: ... --> comment
-    const char* marker = "<!-- URL: ";
-    const char* p = strstr(html, marker);
-    if (!p) return -1;
+static int scan_html_file(HtmlScanner* scanner, FILE* f, char* buffer, size_t first_size) {
+    size_t n = first_size;
+    do {
+        if (html_scanner_feed(scanner, buffer, n) != 0) return -1;
+    } while ((n = fread(buffer, 1, HTML_SCANNER_CHUNK_SIZE, f)) > 0);
     
-    p += strlen(marker);
-    const char* end = strstr(p, " -->");
-    if (!end) return -1;
-    
-    size_t len = end - p;
-    if (len >= size) return -1;
-    
-    strncpy(base_url, p, len);
-    base_url[len] = '\0';
+    html_scanner_finish(scanner);
     return 0;
 }
 
 /**
  * Process one HTML file
+ * 
+ * Only the first chunk is read up front (to detect the file type); HTML is
+ * then streamed through the scanner, so the page is never held in memory
+ * in full.
  */
 static int preprocess_file(const char* input_path, const char* output_path, const char* queue_file) {
     // Read input file in binary mode for magic byte detection
@@ -430,50 +459,73 @@ static int preprocess_file(const char* input_path, const char* output_path, cons
     long size = ftell(f);
     fseek(f, 0, SEEK_SET);
     
-    char* html = (char*)malloc(size + 1);
-    if (!html) {
+    char* head = (char*)malloc(HTML_SCANNER_CHUNK_SIZE + 1);
+    if (!head) {
         fclose(f);
         return -1;
     }
     
-    size_t bytes_read = fread(html, 1, size, f);
-    if (bytes_read != (size_t)size) {
-        fprintf(stderr, "Warning: Expected to read %ld bytes, got %zu bytes from %s\n", 
-                size, bytes_read, input_path);
-    }
-    html[bytes_read] = '\0';
-    fclose(f);
+    size_t bytes_read = fread(head, 1, HTML_SCANNER_CHUNK_SIZE, f);
+    head[bytes_read] = '\0';
     
     // Detect file type
-    FileType file_type = detect_file_type(html, size);
+    FileType file_type = detect_file_type(head, bytes_read);
     
     // Debug: Show file type and size
     const char* type_names[] = {"HTML", "PDF", "IMAGE", "BINARY", "TEXT", "UNKNOWN"};
     printf("  File type: %s, Size: %ld bytes\n", type_names[file_type], size);
     
-    // Route to appropriate processor based on file type
-    char* text = NULL;
+    // Documents that go through an extractor are looked up by content
+    // first: re-crawled and mirrored copies reuse the earlier text
+    CachedExtraction cached = {0};
+    const char* extractor = file_type == FILE_TYPE_PDF ? "pdftotext" :
+                            file_type == FILE_TYPE_IMAGE ? "tesseract" :
+                            file_type == FILE_TYPE_BINARY ? "office" : NULL;
+    if (extractor && cache_restore(&cached, input_path, extractor, output_path) == 0) {
+        free(head);
+        fclose(f);
+        return 0;
+    }
     
+    // Route to appropriate processor based on file type
     switch (file_type) {
         case FILE_TYPE_PDF:
             printf("  Processing PDF file...\n");
-            free(html);
+            free(head);
+            fclose(f);
             // Call PDF processor
-            return process_pdf_file(input_path, output_path);
-            
+            return cache_output(&cached, process_pdf_file(input_path, output_path), output_path);
+        
         case FILE_TYPE_IMAGE:
             printf("  Processing image with OCR...\n");
-            free(html);
+            free(head);
+            fclose(f);
             // Call image OCR processor
-            return process_image_file(input_path, output_path);
-            
-        case FILE_TYPE_BINARY:
+            return cache_output(&cached, process_image_file(input_path, output_path), output_path);
+        
+        case FILE_TYPE_BINARY: {
             printf("  Processing binary file (Office document)...\n");
-            free(html);
+            // Prefer the persistent extractor pool for ZIP-based documents.
+            // Entry names are near the start; the central directory at the
+            // end lists them all.
+            const char* zip_format = detect_zip_document_format(head, bytes_read);
+            if (!zip_format && size > (long)bytes_read) {
+                long tail = size - HTML_SCANNER_CHUNK_SIZE;
+                fseek(f, tail > (long)bytes_read ? tail : (long)bytes_read, SEEK_SET);
+                size_t tail_read = fread(head, 1, HTML_SCANNER_CHUNK_SIZE, f);
+                zip_format = detect_zip_document_format(head, tail_read);
+            }
+            free(head);
+            fclose(f);
+            ExtractorPool* pool = extractor_pool_get_default();
+            if (zip_format && pool &&
+                extract_with_pool(pool, input_path, output_path, zip_format) == 0) {
+                return cache_output(&cached, 0, output_path);
+            }
             // Try Office document processor
             int office_result = process_office_file(input_path, output_path);
             if (office_result == 0) {
-                return 0;  // Successfully processed
+                return cache_output(&cached, 0, output_path);  // Successfully processed
             }
             // If Office processing failed, create marker
             FILE* bin_marker = fopen(output_path, "w");
@@ -482,80 +534,72 @@ static int preprocess_file(const char* input_path, const char* output_path, cons
                 fclose(bin_marker);
             }
             return -1;
-            
+        }
+        
         case FILE_TYPE_HTML:
         case FILE_TYPE_TEXT:
         case FILE_TYPE_UNKNOWN:
-            // Process as HTML/text (existing code path)
-            text = (char*)malloc(MAX_TEXT_SIZE);
-            if (!text) {
-                free(html);
-                return -1;
-            }
+            // Process as HTML/text
             break;
     }
     
-    // If we got here, we're processing HTML/text
-    if (!text) {
-        free(html);
+    // Use smart extraction if mode is set, otherwise use legacy method
+    // For now, default to EXTRACT_ALL to maintain backward compatibility
+    ExtractionMode mode = EXTRACT_ALL;  // TODO: Get from state parameter
+    
+    HtmlScanner* scanner = html_scanner_create(mode, MAX_TEXT_SIZE);
+    PageLinks page = {0};
+    page.unique = url_set_create(256);
+    page.scanner = scanner;
+    if (!scanner || !page.unique) {
+        html_scanner_destroy(scanner);
+        page_links_free(&page);
+        free(head);
+        fclose(f);
         return -1;
     }
+    html_scanner_set_link_callback(scanner, page_links_collect, &page);
     
-
-    // Extract base URL from metadata
-    char base_url[2048] = {0};
-    extract_base_url(html, base_url, sizeof(base_url));
+    // Text, links and base URL in one pass
+    int scanned = scan_html_file(scanner, f, head, bytes_read);
+    free(head);
+    fclose(f);
+    if (scanned != 0) {
+        html_scanner_destroy(scanner);
+        page_links_free(&page);
+        return -1;
+    }
     
-    // Extract links and add to queue
-    int links_found = 0;
+    // Add links to queue
+    const char* base_url = html_scanner_base_url(scanner);
     if (base_url[0]) {
-        links_found = extract_links(html, base_url, queue_file);
+        int links_found = queue_page_links(&page, base_url, queue_file);
         if (links_found > 0) {
             char timestamp[32];
             get_timestamp(timestamp, sizeof(timestamp));
             printf("%s   Extracted %d links\n", timestamp, links_found);
         }
     }
+    page_links_free(&page);
     
-    // Debug: Show raw HTML size
+    // Debug: Show raw HTML size and extracted text
+    size_t text_length;
+    const char* text = html_scanner_text(scanner, &text_length);
     printf("  Raw HTML: %ld bytes\n", size);
-    
-    // Use smart extraction if mode is set, otherwise use legacy method
-    // For now, default to EXTRACT_ALL to maintain backward compatibility
-    ExtractionMode mode = EXTRACT_ALL;  // TODO: Get from state parameter
-    
-    if (mode == EXTRACT_ALL) {
-        // Legacy extraction - remove all tags
-        remove_html_tags(html, text, MAX_TEXT_SIZE);
-    } else {
-        // Smart extraction - filter based on content type
-        extract_content_smart(html, text, MAX_TEXT_SIZE, mode);
-    }
-    free(html);
-    
-    // Debug: Show text after tag removal
-    size_t text_after_tags = strlen(text);
-    printf("  After tag removal: %zu chars\n", text_after_tags);
-    
-    // Clean text
-    clean_text(text);
-    
-    // Debug: Show text after cleaning
-    size_t text_after_clean = strlen(text);
-    printf("  After cleaning: %zu chars\n", text_after_clean);
+    printf("  After cleaning: %zu chars\n", text_length);
     
     // Check minimum length
-    if (text_after_clean < MIN_TEXT_LENGTH) {
-        printf("  Skipped (too short): %zu chars (min: %d)\n", text_after_clean, MIN_TEXT_LENGTH);
+    if (text_length < MIN_TEXT_LENGTH) {
+        printf("  Skipped (too short): %zu chars (min: %d)\n", text_length, MIN_TEXT_LENGTH);
         
         // CRITICAL FIX: Create empty marker file to prevent infinite loop
         FILE* marker = fopen(output_path, "w");
         if (marker) {
-            fprintf(marker, "<!-- SKIPPED: Too short (%zu chars) -->\n", text_after_clean);
+            fprintf(marker, "<!-- SKIPPED: Too short (%zu chars) -->\n", text_length);
             fclose(marker);
         }
         
-        free(text);
+        html_scanner_destroy(scanner);
         return -1;
     }
     
@@ -563,105 +607,140 @@ static int preprocess_file(const char* input_path, const char* output_path, cons
     FILE* out = fopen(output_path, "w");
     if (!out) {
         fprintf(stderr, "Failed to write: %s\n", output_path);
-        free(text);
+        html_scanner_destroy(scanner);
         return -1;
     }
     
-    fprintf(out, "%s\n", text);
+    fwrite(text, 1, text_length, out);
+    fputc('\n', out);
     fclose(out);
-    free(text);
+    html_scanner_destroy(scanner);
     
     return 0;
 }
 
 /**
- * Preprocessor thread
+ * Output path for a raw page: preprocessed/<name without extension>.txt
  */
+static int preprocessed_path_for(const PreprocessorState* state, const char* input_path,
+                                 char* path, size_t size) {
+    const char* name = strrchr(input_path, '/');
+    name = name ? name + 1 : input_path;
+    const char* dot = strrchr(name, '.');
+    int base_len = dot ? (int)(dot - name) : (int)strlen(name);
+    
+    int len = snprintf(path, size, "%s/preprocessed/%.*s.txt", state->data_dir, base_len, name);
+    return (len < 0 || len >= (int)size) ? -1 : 0;
+}
+
 /**
- * Get current timestamp string
+ * Recovery filter: raw page without preprocessed output
  */
+static bool preprocessor_needs_page(const char* path, void* user_data) {
+    char preprocessed_path[2048];
+    if (preprocessed_path_for((PreprocessorState*)user_data, path, preprocessed_path,
+                              sizeof(preprocessed_path)) != 0) {
+        return false;
+    }
+    return access(preprocessed_path, F_OK) != 0;
+}
+
+/**
+ * Preprocess one raw page and pass the text file to the tokenizer
+ */
+static void preprocessor_handle_page(StageDoc* doc, void* user_data) {
+    PreprocessorState* state = (PreprocessorState*)user_data;
+    char timestamp[32];
+    char preprocessed_path[2048];
+    char queue_file[2048];
+    
+    if (preprocessed_path_for(state, doc->path, preprocessed_path, sizeof(preprocessed_path)) != 0) {
+        fprintf(stderr, "Preprocessed path too long, skipping: %s\n", doc->path);
+        stage_doc_free(doc);
+        return;
+    }
+    
+    // Already done (e.g. the same page was recovered and re-downloaded)
+    if (access(preprocessed_path, F_OK) == 0) {
+        stage_doc_free(doc);
+        return;
+    }
+    
+    snprintf(queue_file, sizeof(queue_file), "%s/links_to_crawl.txt", state->data_dir);
+    
+    const char* name = strrchr(doc->path, '/');
+    get_timestamp(timestamp, sizeof(timestamp));
+    printf("%s Preprocessing: %s\n", timestamp, name ? name + 1 : doc->path);
+    
+    if (preprocess_file(doc->path, preprocessed_path, queue_file) != 0) {
+        stage_doc_free(doc);
+        return;
+    }
+    
+    get_timestamp(timestamp, sizeof(timestamp));
+    printf("%s ✓ Preprocessed: %s\n", timestamp, preprocessed_path);
+    pthread_mutex_lock(&state->lock);
+    state->files_processed++;
+    pthread_mutex_unlock(&state->lock);
+    
+    // Reuse the handle for the text file
+    strcpy(doc->path, preprocessed_path);
+    if (!state->output || stage_queue_push(state->output, doc, -1) != 0) {
+        stage_doc_free(doc);  // Text stays on disk for startup recovery
+    }
+}
 
+/**
+ * Set the pipeline queues (before starting threads)
+ */
+void preprocessor_set_queues(PreprocessorState* state, StageQueue* input, StageQueue* output) {
+    if (!state) return;
+    state->input = input;
+    state->output = output;
+    state->started = time(NULL);
+}
 
+/**
+ * Preprocessor thread
+ * 
+ * Takes raw pages from the crawler queue as they are saved. The first
+ * thread to start also requeues pages a previous run left unprocessed.
+ */
 void* preprocessor_thread_func(void* arg) {
     PreprocessorState* state = (PreprocessorState*)arg;
     char timestamp[32];
     
+    if (!state->input) {
+        fprintf(stderr, "Preprocessor started without an input queue\n");
+        return NULL;
+    }
+    
     get_timestamp(timestamp, sizeof(timestamp));
     printf("%s === PREPROCESSOR STARTED ===\n", timestamp);
     
-    char raw_dir[2048];
-    char preprocessed_dir[2048];
-    char queue_file[2048];
-    snprintf(raw_dir, sizeof(raw_dir), "%s/raw_pages", state->data_dir);
-    snprintf(preprocessed_dir, sizeof(preprocessed_dir), "%s/preprocessed", state->data_dir);
-    snprintf(queue_file, sizeof(queue_file), "%s/links_to_crawl.txt", state->data_dir);
+    pthread_mutex_lock(&state->lock);
+    bool recover = !state->recovered;
+    state->recovered = true;
+    pthread_mutex_unlock(&state->lock);
     
-    while (state->running) {
-        DIR* dir = opendir(raw_dir);
-        if (!dir) {
-            sleep(5);
-            continue;
-        }
-        
-        struct dirent* entry;
-        int found_file = 0;
-        
-        while ((entry = readdir(dir)) != NULL) {
-            if (entry->d_name[0] == '.') continue;
-            if (strstr(entry->d_name, ".html") == NULL) continue;
-            
-            // Check if already processed
-            char preprocessed_path[2048];
-            char* base = strdup(entry->d_name);
-            char* dot = strrchr(base, '.');
-            if (dot) *dot = '\0';
-            
-            int path_len = snprintf(preprocessed_path, sizeof(preprocessed_path), 
-                    "%s/%s.txt", preprocessed_dir, base);
-            if (path_len >= (int)sizeof(preprocessed_path)) {
-                fprintf(stderr, "Preprocessed path too long, skipping: %s\n", base);
-                free(base);
-                continue;
-            }
-            
-            // Check if output exists
-            if (access(preprocessed_path, F_OK) == 0) {
-                free(base);
-                continue;
-            }
-            
-            // Process file
-            char input_path[2048];
-            int input_len = snprintf(input_path, sizeof(input_path), "%s/%s", raw_dir, entry->d_name);
-            if (input_len >= (int)sizeof(input_path)) {
-                fprintf(stderr, "Input path too long, skipping: %s\n", entry->d_name);
-                free(base);
-                continue;
-            }
-            
+    if (recover) {
+        char raw_dir[2048];
+        snprintf(raw_dir, sizeof(raw_dir), "%s/raw_pages", state->data_dir);
+        int recovered = stage_queue_recover(state->input, raw_dir, ".html", state->started,
+                                            preprocessor_needs_page, preprocessor_handle_page, state);
+        if (recovered > 0) {
             get_timestamp(timestamp, sizeof(timestamp));
-            printf("%s Preprocessing: %s\n", timestamp, entry->d_name);
-            
-            if (preprocess_file(input_path, preprocessed_path, queue_file) == 0) {
-                get_timestamp(timestamp, sizeof(timestamp));
-                printf("%s ✓ Preprocessed: %s\n", timestamp, base);
-                pthread_mutex_lock(&state->lock);
-                state->files_processed++;
-                pthread_mutex_unlock(&state->lock);
-            }
-            
-            free(base);
-            found_file = 1;
-            break;  // Process one file at a time
+            printf("%s Recovered %d unprocessed page(s)\n", timestamp, recovered);
         }
-        
-        closedir(dir);
-        
-        if (!found_file) {
-            sleep(5);  // Wait for new files
-        } else {
-            sleep(1);  // Small delay between files
+    }
+    
+    while (state->running) {
+        StageDoc* doc = stage_queue_pop(state->input, 1000);
+        if (!doc) {
+            if (stage_queue_is_closed(state->input)) break;
+            continue;
         }
+        preprocessor_handle_page(doc, state);
     }
     
     get_timestamp(timestamp, sizeof(timestamp));
@@ -688,6 +767,31 @@ PreprocessorState* preprocessor_init(const char* data_dir) {
         state->handlers_initialized = true;
     }
     
+    // Extractor workers shared by all preprocessor threads (started on
+    // the first document that needs one)
+    if (!extractor_pool_get_default()) {
+        state->extractor_pool = extractor_pool_create(NULL, 0);
+        extractor_pool_set_default(state->extractor_pool);
+    }
+    
+    // Extracted text cache shared by all preprocessor threads
+    if (!extraction_cache_get_default()) {
+        char cache_dir[2048];
+        snprintf(cache_dir, sizeof(cache_dir), "%s/%s", state->data_dir, EXTRACTION_CACHE_DIR);
+        state->extraction_cache = extraction_cache_open(cache_dir, 0);
+        extraction_cache_set_default(state->extraction_cache);
+    }
+    
+    // Load the persisted seen-links filter shared by all preprocessor threads
+    pthread_mutex_lock(&g_seen_links_lock);
+    if (!g_seen_links) {
+        char bloom_path[2048];
+        snprintf(bloom_path, sizeof(bloom_path), "%s/%s", state->data_dir, SEEN_LINKS_FILE);
+        state->seen_links = url_bloom_open(bloom_path, SEEN_LINKS_EXPECTED, SEEN_LINKS_FP_RATE);
+        g_seen_links = state->seen_links;
+    }
+    pthread_mutex_unlock(&g_seen_links_lock);
+    
     pthread_mutex_init(&state->lock, NULL);
     
     return state;
@@ -698,6 +802,20 @@ PreprocessorState* preprocessor_init(const char* data_dir) {
  */
 void preprocessor_cleanup(PreprocessorState* state) {
     if (!state) return;
+    if (state->extractor_pool) {
+        extractor_pool_print_stats(state->extractor_pool);
+        extractor_pool_destroy(state->extractor_pool);
+    }
+    if (state->extraction_cache) {
+        extraction_cache_print_stats(state->extraction_cache);
+        extraction_cache_close(state->extraction_cache);
+    }
+    if (state->seen_links) {
+        pthread_mutex_lock(&g_seen_links_lock);
+        g_seen_links = NULL;
+        pthread_mutex_unlock(&g_seen_links_lock);
+        url_bloom_close(state->seen_links);  // Saves to data_dir
+    }
     pthread_mutex_destroy(&state->lock);
     free(state);
 }
@@ -0,0 +1,290 @@
+/**
+ * Crawler Pipeline Stage Queues Implementation
+ *
+ * Bounded ring buffer of document handles guarded by one mutex. Every
+ * stage moves whole files, so a push or pop is rare next to the work
+ * around it and the lock is never contended for long; waits use
+ * condition variables.
+ */
+
+#include "stage_queue.h"
+#include <stdlib.h>
+#include <string.h>
+#include <stdio.h>
+#include <errno.h>
+#include <dirent.h>
+#include <pthread.h>
+#include <stdatomic.h>
+#include <sys/stat.h>
+
+// Longest single condition wait; waiters re-check state at least this often
+#define STAGE_QUEUE_WAIT_SLICE_MS 1000
+
+struct StageQueue {
+    StageDoc** items;               // Ring buffer of capacity slots
+    size_t capacity;
+    size_t head;                    // Next slot to pop
+    size_t depth;                   // Documents in the ring
+    atomic_bool closed;
+    
+    pthread_mutex_t lock;           // Guards items, head, depth and statistics
+    pthread_cond_t not_empty;
+    pthread_cond_t not_full;
+    
+    // Statistics
+    uint64_t pushed;
+    uint64_t popped;
+    size_t max_depth;
+    double total_wait_ms;
+};
+
+// Helper: Monotonic clock in milliseconds
+static double stage_now_ms(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return ts.tv_sec * 1000.0 + ts.tv_nsec / 1e6;
+}
+
+// Helper: Absolute deadline for pthread_cond_timedwait (CLOCK_MONOTONIC)
+static void stage_deadline(struct timespec* ts, int timeout_ms) {
+    clock_gettime(CLOCK_MONOTONIC, ts);
+    ts->tv_sec += timeout_ms / 1000;
+    ts->tv_nsec += (long)(timeout_ms % 1000) * 1000000L;
+    if (ts->tv_nsec >= 1000000000L) {
+        ts->tv_sec++;
+        ts->tv_nsec -= 1000000000L;
+    }
+}
+
+/**
+ * Wait on cond (caller holds the lock)
+ *
+ * Waits at most one slice; callers loop and re-check their condition.
+ * Returns false once the overall deadline has passed (timeout_ms >= 0).
+ */
+static bool stage_wait(StageQueue* queue, pthread_cond_t* cond, int timeout_ms, double deadline) {
+    int slice = STAGE_QUEUE_WAIT_SLICE_MS;
+    if (timeout_ms == 0) return false;
+    if (timeout_ms > 0) {
+        int remaining = (int)(deadline - stage_now_ms());
+        if (remaining <= 0) return false;
+        if (remaining < slice) slice = remaining;
+    }
+    
+    struct timespec ts;
+    stage_deadline(&ts, slice);
+    pthread_cond_timedwait(cond, &queue->lock, &ts);
+    return true;
+}
+
+StageDoc* stage_doc_create(const char* path) {
+    if (!path || strlen(path) >= STAGE_DOC_MAX_PATH) return NULL;
+    
+    StageDoc* doc = (StageDoc*)malloc(sizeof(StageDoc));
+    if (!doc) return NULL;
+    
+    strcpy(doc->path, path);
+    doc->queued_ms = 0.0;
+    return doc;
+}
+
+void stage_doc_free(StageDoc* doc) {
+    free(doc);
+}
+
+StageQueue* stage_queue_create(size_t capacity) {
+    if (capacity == 0) capacity = STAGE_QUEUE_DEFAULT_CAPACITY;
+    
+    StageQueue* queue = (StageQueue*)calloc(1, sizeof(StageQueue));
+    if (!queue) return NULL;
+    
+    queue->items = (StageDoc**)calloc(capacity, sizeof(StageDoc*));
+    if (!queue->items) {
+        free(queue);
+        return NULL;
+    }
+    queue->capacity = capacity;
+    atomic_init(&queue->closed, false);
+    
+    pthread_condattr_t attr;
+    pthread_condattr_init(&attr);
+    pthread_condattr_setclock(&attr, CLOCK_MONOTONIC);
+    pthread_mutex_init(&queue->lock, NULL);
+    pthread_cond_init(&queue->not_empty, &attr);
+    pthread_cond_init(&queue->not_full, &attr);
+    pthread_condattr_destroy(&attr);
+    
+    return queue;
+}
+
+int stage_queue_push(StageQueue* queue, StageDoc* doc, int timeout_ms) {
+    if (!queue || !doc) return -1;
+    
+    double deadline = timeout_ms > 0 ? stage_now_ms() + timeout_ms : 0.0;
+    int rc = -1;
+    
+    pthread_mutex_lock(&queue->lock);
+    for (;;) {
+        if (atomic_load(&queue->closed)) break;
+        
+        if (queue->depth < queue->capacity) {
+            doc->queued_ms = stage_now_ms();
+            queue->items[(queue->head + queue->depth) % queue->capacity] = doc;
+            queue->depth++;
+            queue->pushed++;
+            if (queue->depth > queue->max_depth) queue->max_depth = queue->depth;
+            
+            pthread_cond_signal(&queue->not_empty);
+            rc = 0;
+            break;
+        }
+        
+        // Full: backpressure
+        if (!stage_wait(queue, &queue->not_full, timeout_ms, deadline)) break;
+    }
+    pthread_mutex_unlock(&queue->lock);
+    
+    return rc;
+}
+
+StageDoc* stage_queue_pop(StageQueue* queue, int timeout_ms) {
+    if (!queue) return NULL;
+    
+    double deadline = timeout_ms > 0 ? stage_now_ms() + timeout_ms : 0.0;
+    StageDoc* doc = NULL;
+    
+    pthread_mutex_lock(&queue->lock);
+    for (;;) {
+        // Closed queues are not drained: the files on disk are recovered on restart
+        if (atomic_load(&queue->closed)) break;
+        
+        if (queue->depth > 0) {
+            doc = queue->items[queue->head];
+            queue->items[queue->head] = NULL;
+            queue->head = (queue->head + 1) % queue->capacity;
+            queue->depth--;
+            queue->popped++;
+            queue->total_wait_ms += stage_now_ms() - doc->queued_ms;
+            
+            pthread_cond_signal(&queue->not_full);
+            break;
+        }
+        
+        if (!stage_wait(queue, &queue->not_empty, timeout_ms, deadline)) break;
+    }
+    pthread_mutex_unlock(&queue->lock);
+    
+    return doc;
+}
+
+void stage_queue_close(StageQueue* queue) {
+    if (!queue) return;
+    
+    pthread_mutex_lock(&queue->lock);
+    atomic_store(&queue->closed, true);
+    pthread_cond_broadcast(&queue->not_empty);
+    pthread_cond_broadcast(&queue->not_full);
+    pthread_mutex_unlock(&queue->lock);
+}
+
+bool stage_queue_is_closed(const StageQueue* queue) {
+    return !queue || atomic_load(&queue->closed);
+}
+
+size_t stage_queue_depth(const StageQueue* queue) {
+    if (!queue) return 0;
+    
+    pthread_mutex_lock((pthread_mutex_t*)&queue->lock);
+    size_t depth = queue->depth;
+    pthread_mutex_unlock((pthread_mutex_t*)&queue->lock);
+    
+    return depth;
+}
+
+size_t stage_queue_space(const StageQueue* queue) {
+    if (!queue) return 0;
+    size_t depth = stage_queue_depth(queue);
+    return depth >= queue->capacity ? 0 : queue->capacity - depth;
+}
+
+// Helper: File ends with ext
+static bool stage_has_extension(const char* name, const char* ext) {
+    size_t name_len = strlen(name);
+    size_t ext_len = strlen(ext);
+    return name_len > ext_len && strcmp(name + name_len - ext_len, ext) == 0;
+}
+
+int stage_queue_recover(StageQueue* queue, const char* dir, const char* ext, time_t before,
+                        StageRecoverFilter filter, StageDocHandler handler, void* user_data) {
+    if (!queue || !dir || !ext) return -1;
+    
+    DIR* d = opendir(dir);
+    if (!d) return errno == ENOENT ? 0 : -1;
+    
+    int recovered = 0;
+    struct dirent* entry;
+    while ((entry = readdir(d)) != NULL && !atomic_load(&queue->closed)) {
+        if (entry->d_name[0] == '.') continue;
+        if (!stage_has_extension(entry->d_name, ext)) continue;
+        
+        char path[STAGE_DOC_MAX_PATH];
+        if ((size_t)snprintf(path, sizeof(path), "%s/%s", dir, entry->d_name) >= sizeof(path)) continue;
+        
+        struct stat st;
+        if (stat(path, &st) != 0 || !S_ISREG(st.st_mode)) continue;
+        if (st.st_mtime >= before) continue;
+        if (filter && !filter(path, user_data)) continue;
+        
+        StageDoc* doc = stage_doc_create(path);
+        if (!doc) continue;
+        
+        while (stage_queue_push(queue, doc, 0) != 0) {
+            if (atomic_load(&queue->closed)) {
+                stage_doc_free(doc);
+                doc = NULL;
+                break;
+            }
+            
+            // Full: do some of the work here rather than wait for it
+            StageDoc* next = stage_queue_pop(queue, 0);
+            if (next && handler) {
+                handler(next, user_data);
+            } else if (next) {
+                stage_doc_free(next);
+            }
+        }
+        if (doc) recovered++;
+    }
+    
+    closedir(d);
+    return recovered;
+}
+
+void stage_queue_get_stats(const StageQueue* queue, StageQueueStats* stats) {
+    if (!stats) return;
+    memset(stats, 0, sizeof(*stats));
+    if (!queue) return;
+    
+    pthread_mutex_lock((pthread_mutex_t*)&queue->lock);
+    stats->pushed = queue->pushed;
+    stats->popped = queue->popped;
+    stats->depth = queue->depth;
+    stats->max_depth = queue->max_depth;
+    if (stats->popped > 0) {
+        stats->avg_wait_ms = queue->total_wait_ms / (double)stats->popped;
+    }
+    pthread_mutex_unlock((pthread_mutex_t*)&queue->lock);
+}
+
+void stage_queue_destroy(StageQueue* queue) {
+    if (!queue) return;
+    
+    for (size_t i = 0; i < queue->depth; i++) {
+        stage_doc_free(queue->items[(queue->head + i) % queue->capacity]);
+    }
+    free(queue->items);
+    pthread_cond_destroy(&queue->not_empty);
+    pthread_cond_destroy(&queue->not_full);
+    pthread_mutex_destroy(&queue->lock);
+    free(queue);
+}
@@ -0,0 +1,150 @@
+#ifndef STAGE_QUEUE_H
+#define STAGE_QUEUE_H
+
+#include <stddef.h>
+#include <stdint.h>
+#include <stdbool.h>
+#include <time.h>
+
+/**
+ * Crawler Pipeline Stage Queues
+ *
+ * Bounded in-process queues that hand documents from one pipeline stage
+ * to the next (crawler -> preprocessor -> tokenizer -> training), so a
+ * stage wakes up as soon as work arrives instead of re-scanning its input
+ * directory and sleeping.
+ *
+ * - Items travel through a mutex-guarded ring buffer; any number of
+ *   producer and consumer threads may share a queue
+ * - Producers block while the queue is full (backpressure); consumers
+ *   block while it is empty.
+ * - Each document is still written to disk before it is queued. The files
+ *   are the durable spill: after a restart, stage_queue_recover() requeues
+ *   whatever a stage had not finished.
+ * - stage_queue_close() wakes every waiter; pushes and pops then fail,
+ *   which is how the pipeline shuts down.
+ */
+
+#define STAGE_QUEUE_DEFAULT_CAPACITY 256
+#define STAGE_DOC_MAX_PATH 2048
+
+// Document handle passed between stages
+typedef struct {
+    char path[STAGE_DOC_MAX_PATH];  // File holding the document
+    double queued_ms;               // Set by stage_queue_push (monotonic)
+} StageDoc;
+
+// Queue statistics
+typedef struct {
+    uint64_t pushed;                // Documents queued
+    uint64_t popped;                // Documents taken
+    size_t depth;                   // Documents waiting now
+    size_t max_depth;               // High-water mark of depth
+    double avg_wait_ms;             // Mean time spent queued
+} StageQueueStats;
+
+// Queue handle
+typedef struct StageQueue StageQueue;
+
+/**
+ * Decide whether a recovered file still needs this stage
+ *
+ * @param path File found in the stage's input directory
+ * @param user_data Passed through from stage_queue_recover
+ * @return true to requeue it, false to skip it
+ */
+typedef bool (*StageRecoverFilter)(const char* path, void* user_data);
+
+/**
+ * Process a document inline and free it (used by recovery when the
+ * queue is full)
+ */
+typedef void (*StageDocHandler)(StageDoc* doc, void* user_data);
+
+/**
+ * Create a document handle
+ *
+ * @param path File holding the document
+ * @return Handle or NULL on error
+ */
+StageDoc* stage_doc_create(const char* path);
+
+/**
+ * Free a document handle (the file is left alone)
+ */
+void stage_doc_free(StageDoc* doc);
+
+/**
+ * Create a bounded queue
+ *
+ * @param capacity Maximum queued documents (0 for default)
+ * @return Queue or NULL on error
+ */
+StageQueue* stage_queue_create(size_t capacity);
+
+/**
+ * Queue a document, waiting while the queue is full
+ *
+ * @param queue Stage queue
+ * @param doc Document (ownership passes to the queue on success)
+ * @param timeout_ms 0 = don't wait, < 0 = wait until space or close
+ * @return 0 on success, -1 if full after timeout or closed
+ */
+int stage_queue_push(StageQueue* queue, StageDoc* doc, int timeout_ms);
+
+/**
+ * Take a document, waiting while the queue is empty
+ *
+ * @param queue Stage queue
+ * @param timeout_ms 0 = don't wait, < 0 = wait until an item or close
+ * @return Document (caller frees) or NULL on timeout or close
+ */
+StageDoc* stage_queue_pop(StageQueue* queue, int timeout_ms);
+
+/**
+ * Close the queue and wake all waiting threads
+ */
+void stage_queue_close(StageQueue* queue);
+
+/**
+ * Check whether the queue was closed
+ */
+bool stage_queue_is_closed(const StageQueue* queue);
+
+/**
+ * Documents currently queued
+ */
+size_t stage_queue_depth(const StageQueue* queue);
+
+/**
+ * Free slots before producers block
+ */
+size_t stage_queue_space(const StageQueue* queue);
+
+/**
+ * Requeue unfinished work found on disk after a restart
+ *
+ * Scans dir once for files ending in ext that were modified before
+ * `before` (newer files belong to the running pipeline) and accepted by
+ * filter. When the queue is full, the calling thread processes documents
+ * itself through handler instead of waiting, so recovery cannot deadlock
+ * a stage whose only consumer is the recovering thread.
+ *
+ * @return Number of documents requeued or processed, -1 on error
+ */
+int stage_queue_recover(StageQueue* queue, const char* dir, const char* ext, time_t before,
+                        StageRecoverFilter filter, StageDocHandler handler, void* user_data);
+
+/**
+ * Get queue statistics
+ */
+void stage_queue_get_stats(const StageQueue* queue, StageQueueStats* stats);
+
+/**
+ * Destroy the queue and free any documents still queued
+ *
+ * Not thread-safe: all producers and consumers must have stopped.
+ */
+void stage_queue_destroy(StageQueue* queue);
+
+#endif // STAGE_QUEUE_H
@@ -1,68 +1,318 @@
 /**
  * Tokenizer
  * 
- * Converts preprocessed text to tokenized format for training
+ * Converts preprocessed text to token files for training. Words are mapped
+ * to IDs in the crawler model's vocabulary (data_dir/vocab.txt, grown as
+ * new words appear) and written in the binary token dataset format, so
+ * training maps the file instead of parsing it.
+ * 
+ * Known words are looked up in a lock-free index, so tokenizer threads only
+ * take the state lock to add new words and append them to vocab.txt.
  */
 
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
 #include <ctype.h>
-#include <dirent.h>
 #include <unistd.h>
 #include <pthread.h>
 #include <time.h>
+#include <stdbool.h>
+#include <stdatomic.h>
+#include "cllm_tokenizer.h"
+#include "cllm_data_loader.h"
+#include "stage_queue.h"
 
 #define MAX_TOKEN_LENGTH 64
-#define MAX_TOKENS 100000
+#define TOKENIZER_VOCAB_FILE "vocab.txt"
+#define TOKENIZER_VOCAB_SIZE 50000      // Vocabulary size of the crawler model
+#define VOCAB_NOT_FOUND UINT32_MAX
+#define VOCAB_UNK_ID 1                  // <UNK>, added by cllm_create_tokenizer
+
+// Word the lock-free lookup missed, added under the lock
+typedef struct {
+    size_t pos;                 // Index in the token ID array
+    char word[MAX_TOKEN_LENGTH];
+} VocabMiss;
 
 typedef struct {
     char data_dir[1024];
     int running;
     int files_processed;
+    StageQueue* input;      // Text files from the preprocessor
+    StageQueue* output;     // Token files for training
+    time_t started;         // Older text files are recovered from disk
+    bool recovered;         // Startup recovery claimed by a thread
+    
+    // Vocabulary (append-only: an ID never changes once assigned)
+    CLLMTokenizer* vocab;
+    uint32_t vocab_saved;           // Entries already written to vocab.txt
+    uint32_t vocab_hashed;          // Entries covered by vocab_prefix_hash
+    uint32_t* vocab_prefix_hash;    // [n] = vocabulary hash state after n entries
+    
+    // Lock-free word index: written under the lock, read without it. Words
+    // are copied because the vocabulary's string arena moves as it grows.
+    char (*index_words)[MAX_TOKEN_LENGTH];
+    uint32_t* index_hashes;
+    _Atomic uint32_t* index_slots;  // Token ID + 1, 0 = empty
+    uint32_t index_mask;
+    _Atomic uint32_t vocab_indexed; // Entries published in the index
+    _Atomic bool vocab_full;        // New words map to <UNK> without the lock
+    
     pthread_mutex_t lock;
 } TokenizerState;
 
 /**
- * Simple word tokenization
+ * Extend the vocabulary hash state over the entries added since the last
+ * call (caller holds the lock)
+ * 
+ * The state after n entries matches cllm_token_dataset_vocab_hash() of the
+ * first n entries, so every vocabulary size a token file was written
+ * against can be recognized later.
+ */
+static void vocab_update_hashes(TokenizerState* state) {
+    CLLMTokenizer* vocab = state->vocab;
+    
+    while (state->vocab_hashed < vocab->vocab_size) {
+        uint32_t hash = state->vocab_prefix_hash[state->vocab_hashed];
+        for (const unsigned char* p = (const unsigned char*)vocab->vocab[state->vocab_hashed]; ; p++) {
+            hash ^= *p;
+            hash *= 16777619u;
+            if (!*p) break;
+        }
+        state->vocab_prefix_hash[++state->vocab_hashed] = hash;
+    }
+}
+
+/**
+ * Fingerprint of the first n vocabulary entries (all n already hashed)
+ */
+static uint32_t vocab_fingerprint(const TokenizerState* state, uint32_t n) {
+    uint32_t hash = state->vocab_prefix_hash[n];
+    return hash ? hash : 1;  // 0 means "unknown" in token files
+}
+
+/**
+ * Append new vocabulary entries to vocab.txt (caller holds the lock)
+ */
+static int vocab_save(TokenizerState* state) {
+    CLLMTokenizer* vocab = state->vocab;
+    if (state->vocab_saved == vocab->vocab_size) return 0;
+    
+    char path[2048];
+    snprintf(path, sizeof(path), "%s/%s", state->data_dir, TOKENIZER_VOCAB_FILE);
+    FILE* f = fopen(path, state->vocab_saved > 0 ? "a" : "w");
+    if (!f) {
+        fprintf(stderr, "Failed to write vocabulary: %s\n", path);
+        return -1;
+    }
+    
+    for (uint32_t i = state->vocab_saved; i < vocab->vocab_size; i++) {
+        fprintf(f, "%s\t%u\n", vocab->vocab[i],
+                atomic_load_explicit((_Atomic uint32_t*)&vocab->token_counts[i],
+                                     memory_order_relaxed));
+    }
+    
+    if (fclose(f) != 0) {
+        fprintf(stderr, "Failed to write vocabulary: %s\n", path);
+        return -1;
+    }
+    
+    state->vocab_saved = vocab->vocab_size;
+    return 0;
+}
+
+/**
+ * FNV-1a hash of a word (same as the vocabulary's)
+ */
+static uint32_t word_hash(const char* word, size_t len) {
+    uint32_t hash = 2166136261u;
+    for (size_t i = 0; i < len; i++) {
+        hash ^= (unsigned char)word[i];
+        hash *= 16777619u;
+    }
+    return hash;
+}
+
+/**
+ * Publish vocabulary entries added since the last call in the word index
+ * (caller holds the lock, after vocab_update_hashes)
+ * 
+ * An entry's word and hash are written before the release store of its
+ * slot, so a reader that finds the slot sees both.
+ */
+static void vocab_index_update(TokenizerState* state) {
+    CLLMTokenizer* vocab = state->vocab;
+    uint32_t indexed = atomic_load_explicit(&state->vocab_indexed, memory_order_relaxed);
+    
+    for (uint32_t id = indexed; id < vocab->vocab_size; id++) {
+        size_t len = strlen(vocab->vocab[id]);
+        if (len >= MAX_TOKEN_LENGTH) continue;  // Longer than any word we split
+        
+        memcpy(state->index_words[id], vocab->vocab[id], len + 1);
+        uint32_t hash = word_hash(vocab->vocab[id], len);
+        state->index_hashes[id] = hash;
+        
+        uint32_t slot = hash & state->index_mask;
+        while (atomic_load_explicit(&state->index_slots[slot], memory_order_relaxed) != 0) {
+            slot = (slot + 1) & state->index_mask;
+        }
+        atomic_store_explicit(&state->index_slots[slot], id + 1, memory_order_release);
+    }
+    
+    atomic_store_explicit(&state->vocab_indexed, vocab->vocab_size, memory_order_release);
+    if (vocab->vocab_size >= vocab->max_vocab_size) {
+        atomic_store_explicit(&state->vocab_full, true, memory_order_release);
+    }
+}
+
+/**
+ * Count an occurrence of an indexed word
+ * 
+ * Counts of published entries are only updated through here, with relaxed
+ * atomics, so threads count known words without the lock. The counts
+ * array is allocated at the maximum vocabulary size and never moves.
+ */
+static void vocab_count(TokenizerState* state, uint32_t id) {
+    atomic_fetch_add_explicit((_Atomic uint32_t*)&state->vocab->token_counts[id], 1,
+                              memory_order_relaxed);
+}
+
+/**
+ * Look up a known word without the lock
+ * 
+ * @return Token ID, or VOCAB_NOT_FOUND
+ */
+static uint32_t vocab_index_find(const TokenizerState* state, const char* word, size_t len) {
+    uint32_t hash = word_hash(word, len);
+    uint32_t slot = hash & state->index_mask;
+    
+    for (;;) {
+        uint32_t entry = atomic_load_explicit(&state->index_slots[slot], memory_order_acquire);
+        if (entry == 0) return VOCAB_NOT_FOUND;
+        
+        uint32_t id = entry - 1;
+        if (state->index_hashes[id] == hash && memcmp(state->index_words[id], word, len) == 0 &&
+            state->index_words[id][len] == '\0') {
+            return id;
+        }
+        slot = (slot + 1) & state->index_mask;
+    }
+}
+
+/**
+ * Map the words of a text to vocabulary IDs
+ * 
+ * Words are runs of letters, digits, apostrophes and hyphens, lowercased
+ * and cut at MAX_TOKEN_LENGTH - 1 characters. Known words are looked up
+ * and counted without the lock; the lock is taken only when the text has
+ * new words, which are added and saved while the vocabulary has room.
+ * Once it is full, new words map to <UNK> without the lock (and, as
+ * before, are not counted). The fingerprint covering every returned ID is
+ * stored in *fingerprint.
+ * 
+ * @return Token IDs (caller frees), NULL if the text has no words
  */
-static int tokenize_text(const char* text, char** tokens, int max_tokens) {
-    int count = 0;
-    const char* p = text;
+static uint32_t* tokenize_text(TokenizerState* state, const char* text, size_t length,
+                               size_t* num_tokens, uint32_t* fingerprint) {
+    *num_tokens = 0;
+    
+    // Words are separated by at least one byte
+    uint32_t* ids = (uint32_t*)malloc((length / 2 + 1) * sizeof(uint32_t));
+    if (!ids) return NULL;
+    
+    VocabMiss* misses = NULL;
+    size_t num_misses = 0;
+    size_t miss_capacity = 0;
+    
+    size_t count = 0;
+    uint32_t max_id = 0;
     char token[MAX_TOKEN_LENGTH];
     int token_len = 0;
     
-    while (*p && count < max_tokens) {
-        if (isalnum(*p) || *p == '\'' || *p == '-') {
+    for (size_t i = 0; i <= length; i++) {
+        unsigned char c = i < length ? (unsigned char)text[i] : 0;
+        if (isalnum(c) || c == '\'' || c == '-') {
             if (token_len < MAX_TOKEN_LENGTH - 1) {
-                token[token_len++] = tolower(*p);
+                token[token_len++] = tolower(c);
             }
-            p++;
+            continue;
+        }
+        if (token_len == 0) continue;
+        
+        token[token_len] = '\0';
+        uint32_t id = vocab_index_find(state, token, token_len);
+        if (id != VOCAB_NOT_FOUND) {
+            vocab_count(state, id);
+            if (id > max_id) max_id = id;
+        } else if (atomic_load_explicit(&state->vocab_full, memory_order_acquire)) {
+            id = VOCAB_UNK_ID;
+            if (id > max_id) max_id = id;
         } else {
-            if (token_len > 0) {
-                token[token_len] = '\0';
-                tokens[count] = strdup(token);
-                count++;
-                token_len = 0;
+            if (num_misses == miss_capacity) {
+                miss_capacity = miss_capacity ? miss_capacity * 2 : 64;
+                VocabMiss* grown = (VocabMiss*)realloc(misses, miss_capacity * sizeof(VocabMiss));
+                if (!grown) {
+                    free(misses);
+                    free(ids);
+                    return NULL;
+                }
+                misses = grown;
             }
-            p++;
+            misses[num_misses].pos = count;
+            memcpy(misses[num_misses].word, token, token_len + 1);
+            num_misses++;
         }
+        ids[count++] = id;
+        token_len = 0;
     }
     
-    // Last token
-    if (token_len > 0 && count < max_tokens) {
-        token[token_len] = '\0';
-        tokens[count] = strdup(token);
-        count++;
+    if (count == 0) {
+        free(ids);
+        return NULL;
+    }
+    
+    int rc = 0;
+    uint32_t entries;
+    if (num_misses > 0) {
+        pthread_mutex_lock(&state->lock);
+        for (size_t i = 0; i < num_misses; i++) {
+            // Another thread may have published the word since the lookup
+            const char* word = misses[i].word;
+            uint32_t id = vocab_index_find(state, word, strlen(word));
+            if (id != VOCAB_NOT_FOUND) {
+                vocab_count(state, id);
+            } else {
+                id = cllm_add_token(state->vocab, word);
+            }
+            ids[misses[i].pos] = id;
+        }
+        rc = vocab_save(state);
+        vocab_update_hashes(state);
+        vocab_index_update(state);
+        entries = state->vocab->vocab_size;
+        pthread_mutex_unlock(&state->lock);
+    } else {
+        // Prefix hashes are written before the index entries that cover them
+        entries = atomic_load_explicit(&state->vocab_indexed, memory_order_acquire);
+        if (entries <= max_id) entries = max_id + 1;
     }
+    free(misses);
     
-    return count;
+    if (rc != 0) {
+        free(ids);
+        return NULL;
+    }
+    
+    *fingerprint = vocab_fingerprint(state, entries);
+    *num_tokens = count;
+    return ids;
 }
 
 /**
  * Process one text file
  */
-static int tokenize_file(const char* input_path, const char* output_path) {
+static int tokenize_file(TokenizerState* state, const char* input_path, const char* output_path) {
     // Read input
     FILE* f = fopen(input_path, "r");
     if (!f) {
@@ -80,49 +330,40 @@ static int tokenize_file(const char* input_path, const char* output_path) {
         return -1;
     }
     
-    fread(text, 1, size, f);
-    text[size] = '\0';
+    size_t length = fread(text, 1, size, f);
+    text[length] = '\0';
     fclose(f);
     
     // Tokenize
-    char** tokens = (char**)malloc(MAX_TOKENS * sizeof(char*));
-    if (!tokens) {
-        free(text);
-        return -1;
-    }
-    
-    int token_count = tokenize_text(text, tokens, MAX_TOKENS);
+    size_t token_count = 0;
+    uint32_t fingerprint = 0;
+    uint32_t* ids = tokenize_text(state, text, length, &token_count, &fingerprint);
     free(text);
     
-    if (token_count == 0) {
-        free(tokens);
+    if (!ids) {
         return -1;
     }
     
-    // Write output
-    FILE* out = fopen(output_path, "w");
-    if (!out) {
-        fprintf(stderr, "Failed to write: %s\n", output_path);
-        for (int i = 0; i < token_count; i++) {
-            free(tokens[i]);
-        }
-        free(tokens);
-        return -1;
-    }
+    // Write output: one document, 16-bit IDs when the vocabulary allows
+    uint64_t doc_offsets[2] = { 0, token_count };
+    TokenDataset dataset;
+    memset(&dataset, 0, sizeof(dataset));
+    dataset.tokens = ids;
+    dataset.num_tokens = token_count;
+    dataset.doc_offsets = doc_offsets;
+    dataset.num_documents = 1;
+    dataset.vocab_hash = fingerprint;
     
-    fprintf(out, "# Source: %s\n", input_path);
-    fprintf(out, "# Token count: %d\n", token_count);
+    uint32_t width = state->vocab->max_vocab_size <= 65536 ? sizeof(uint16_t) : sizeof(uint32_t);
+    int saved = cllm_token_dataset_save_ex(&dataset, output_path, width);
+    free(ids);
     
-    for (int i = 0; i < token_count; i++) {
-        fprintf(out, "%s ", tokens[i]);
-        free(tokens[i]);
+    if (!saved) {
+        fprintf(stderr, "Failed to write: %s\n", output_path);
+        return -1;
     }
-    fprintf(out, "\n");
     
-    fclose(out);
-    free(tokens);
-    
-    return token_count;
+    return (int)token_count;
 }
 
 /**
@@ -134,78 +375,132 @@ static void get_timestamp(char* buffer, size_t size) {
     strftime(buffer, size, "[%H:%M:%S]", tm_info);
 }
 
+/**
+ * Output path for a text file: <dir>/<name without extension>.tok
+ */
+static int token_path_for(const char* dir, const char* input_path, char* path, size_t size) {
+    const char* name = strrchr(input_path, '/');
+    name = name ? name + 1 : input_path;
+    const char* dot = strrchr(name, '.');
+    int base_len = dot ? (int)(dot - name) : (int)strlen(name);
+    
+    int len = snprintf(path, size, "%s/%.*s.tok", dir, base_len, name);
+    return (len < 0 || len >= (int)size) ? -1 : 0;
+}
+
+/**
+ * Recovery filter: text file neither queued for nor done with training
+ */
+static bool tokenizer_needs_file(const char* path, void* user_data) {
+    TokenizerState* state = (TokenizerState*)user_data;
+    char dir[2048];
+    char output_path[2048];
+    
+    snprintf(dir, sizeof(dir), "%s/training_queue", state->data_dir);
+    if (token_path_for(dir, path, output_path, sizeof(output_path)) != 0) return false;
+    if (access(output_path, F_OK) == 0) return false;
+    
+    snprintf(dir, sizeof(dir), "%s/trained", state->data_dir);
+    if (token_path_for(dir, path, output_path, sizeof(output_path)) != 0) return false;
+    return access(output_path, F_OK) != 0;
+}
+
+/**
+ * Tokenize one text file and pass the token file to training
+ */
+static void tokenizer_handle_file(StageDoc* doc, void* user_data) {
+    TokenizerState* state = (TokenizerState*)user_data;
+    char timestamp[32];
+    char queue_dir[2048];
+    char output_path[2048];
+    
+    snprintf(queue_dir, sizeof(queue_dir), "%s/training_queue", state->data_dir);
+    if (token_path_for(queue_dir, doc->path, output_path, sizeof(output_path)) != 0) {
+        fprintf(stderr, "Token path too long, skipping: %s\n", doc->path);
+        stage_doc_free(doc);
+        return;
+    }
+    
+    // Already queued for training
+    if (access(output_path, F_OK) == 0) {
+        stage_doc_free(doc);
+        return;
+    }
+    
+    const char* name = strrchr(doc->path, '/');
+    get_timestamp(timestamp, sizeof(timestamp));
+    printf("%s Tokenizing: %s\n", timestamp, name ? name + 1 : doc->path);
+    
+    int token_count = tokenize_file(state, doc->path, output_path);
+    if (token_count <= 0) {
+        stage_doc_free(doc);
+        return;
+    }
+    
+    get_timestamp(timestamp, sizeof(timestamp));
+    printf("%s ✓ Tokenized: %s (%d tokens)\n", timestamp, output_path, token_count);
+    pthread_mutex_lock(&state->lock);
+    state->files_processed++;
+    pthread_mutex_unlock(&state->lock);
+    
+    // Reuse the handle for the token file
+    strcpy(doc->path, output_path);
+    if (!state->output || stage_queue_push(state->output, doc, -1) != 0) {
+        stage_doc_free(doc);  // Tokens stay on disk for startup recovery
+    }
+}
+
+/**
+ * Set the pipeline queues (before starting threads)
+ */
+void tokenizer_set_queues(TokenizerState* state, StageQueue* input, StageQueue* output) {
+    if (!state) return;
+    state->input = input;
+    state->output = output;
+    state->started = time(NULL);
+}
+
 /**
  * Tokenizer thread
+ * 
+ * Takes text files from the preprocessor queue. The first thread to start
+ * also requeues text a previous run left untokenized.
  */
 void* tokenizer_thread_func(void* arg) {
     TokenizerState* state = (TokenizerState*)arg;
     char timestamp[32];
     
+    if (!state->input) {
+        fprintf(stderr, "Tokenizer started without an input queue\n");
+        return NULL;
+    }
+    
     get_timestamp(timestamp, sizeof(timestamp));
     printf("%s === TOKENIZER STARTED ===\n", timestamp);
     
-    char preprocessed_dir[2048];
-    char queue_dir[2048];
-    snprintf(preprocessed_dir, sizeof(preprocessed_dir), "%s/preprocessed", state->data_dir);
-    snprintf(queue_dir, sizeof(queue_dir), "%s/training_queue", state->data_dir);
+    pthread_mutex_lock(&state->lock);
+    bool recover = !state->recovered;
+    state->recovered = true;
+    pthread_mutex_unlock(&state->lock);
     
-    while (state->running) {
-        DIR* dir = opendir(preprocessed_dir);
-        if (!dir) {
-            sleep(5);
-            continue;
-        }
-        
-        struct dirent* entry;
-        int found_file = 0;
-        
-        while ((entry = readdir(dir)) != NULL) {
-            if (entry->d_name[0] == '.') continue;
-            if (strstr(entry->d_name, ".txt") == NULL) continue;
-            
-            // Check if already tokenized
-            char output_path[2048];
-            char* base = strdup(entry->d_name);
-            char* dot = strrchr(base, '.');
-            if (dot) *dot = '\0';
-            
-            snprintf(output_path, sizeof(output_path), 
-                    "%s/%s.tok", queue_dir, base);
-            
-            // Check if output exists
-            if (access(output_path, F_OK) == 0) {
-                free(base);
-                continue;
-            }
-            
-            // Tokenize file
-            char input_path[2048];
-            snprintf(input_path, sizeof(input_path), "%s/%s", preprocessed_dir, entry->d_name);
-            
+    if (recover) {
+        char preprocessed_dir[2048];
+        snprintf(preprocessed_dir, sizeof(preprocessed_dir), "%s/preprocessed", state->data_dir);
+        int recovered = stage_queue_recover(state->input, preprocessed_dir, ".txt", state->started,
+                                            tokenizer_needs_file, tokenizer_handle_file, state);
+        if (recovered > 0) {
             get_timestamp(timestamp, sizeof(timestamp));
-            printf("%s Tokenizing: %s\n", timestamp, entry->d_name);
-            
-            int token_count = tokenize_file(input_path, output_path);
-            if (token_count > 0) {
-                get_timestamp(timestamp, sizeof(timestamp));
-                printf("%s ✓ Tokenized: %s (%d tokens)\n", timestamp, base, token_count);
-                pthread_mutex_lock(&state->lock);
-                state->files_processed++;
-                pthread_mutex_unlock(&state->lock);
-            }
-            
-            free(base);
-            found_file = 1;
-            break;  // Process one file at a time
+            printf("%s Recovered %d untokenized file(s)\n", timestamp, recovered);
         }
-        
-        closedir(dir);
-        
-        if (!found_file) {
-            sleep(5);  // Wait for new files
-        } else {
-            sleep(1);  // Small delay between files
+    }
+    
+    while (state->running) {
+        StageDoc* doc = stage_queue_pop(state->input, 1000);
+        if (!doc) {
+            if (stage_queue_is_closed(state->input)) break;
+            continue;
         }
+        tokenizer_handle_file(doc, state);
     }
     
     get_timestamp(timestamp, sizeof(timestamp));
@@ -223,16 +518,79 @@ TokenizerState* tokenizer_init(const char* data_dir) {
     strncpy(state->data_dir, data_dir, sizeof(state->data_dir) - 1);
     state->running = 1;
     state->files_processed = 0;
+    
+    state->vocab = cllm_create_tokenizer(TOKENIZER_VOCAB_SIZE);
+    state->vocab_prefix_hash = (uint32_t*)malloc((TOKENIZER_VOCAB_SIZE + 1) * sizeof(uint32_t));
+    
+    // Index load factor stays <= 0.5
+    uint32_t index_capacity = 16;
+    while (index_capacity < 2 * TOKENIZER_VOCAB_SIZE) index_capacity *= 2;
+    state->index_mask = index_capacity - 1;
+    state->index_slots = (_Atomic uint32_t*)calloc(index_capacity, sizeof(uint32_t));
+    state->index_words = malloc(TOKENIZER_VOCAB_SIZE * sizeof(*state->index_words));
+    state->index_hashes = (uint32_t*)malloc(TOKENIZER_VOCAB_SIZE * sizeof(uint32_t));
+    
+    if (!state->vocab || !state->vocab_prefix_hash || !state->index_slots ||
+        !state->index_words || !state->index_hashes) {
+        cllm_free_tokenizer(state->vocab);
+        free(state->vocab_prefix_hash);
+        free((void*)state->index_slots);
+        free(state->index_words);
+        free(state->index_hashes);
+        free(state);
+        return NULL;
+    }
+    
+    // Continue the vocabulary of earlier runs so existing token files stay valid
+    char vocab_path[2048];
+    snprintf(vocab_path, sizeof(vocab_path), "%s/%s", state->data_dir, TOKENIZER_VOCAB_FILE);
+    if (access(vocab_path, F_OK) == 0 && cllm_load_vocab(state->vocab, vocab_path)) {
+        state->vocab_saved = state->vocab->vocab_size;
+    }
+    state->vocab_prefix_hash[0] = 2166136261u;
+    vocab_update_hashes(state);
+    vocab_index_update(state);
+    
     pthread_mutex_init(&state->lock, NULL);
     
     return state;
 }
 
+/**
+ * Vocabulary size a token file was written against
+ * 
+ * @param state Tokenizer
+ * @param fingerprint vocab_hash from the token file
+ * @return Number of vocabulary entries the file's IDs refer to (all IDs
+ *         are below it), or 0 if the fingerprint is not from this vocabulary
+ */
+uint32_t tokenizer_vocab_match(TokenizerState* state, uint32_t fingerprint) {
+    if (!state || fingerprint == 0) return 0;
+    
+    uint32_t match = 0;
+    pthread_mutex_lock(&state->lock);
+    vocab_update_hashes(state);
+    for (uint32_t n = state->vocab_hashed; n > 0; n--) {
+        if (vocab_fingerprint(state, n) == fingerprint) {
+            match = n;
+            break;
+        }
+    }
+    pthread_mutex_unlock(&state->lock);
+    
+    return match;
+}
+
 /**
  * Cleanup tokenizer
  */
 void tokenizer_cleanup(TokenizerState* state) {
     if (!state) return;
     pthread_mutex_destroy(&state->lock);
+    cllm_free_tokenizer(state->vocab);
+    free(state->vocab_prefix_hash);
+    free((void*)state->index_slots);
+    free(state->index_words);
+    free(state->index_hashes);
     free(state);
 }
\ No newline at end of file
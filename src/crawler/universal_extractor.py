@@ -2,54 +2,48 @@
 """
 Universal Text Extractor for Crawler
 Supports: DOCX, XLSX, PPTX, ODT, ODS, ODP, EPUB, MD, YAML, TOML, SQL, and more
+
+Modes:
+  <filepath>                 Print one document to stdout
+  --serve                    Framed request/response worker (extractor_pool.c)
+  --batch <manifest|dir|->   Extract many files in a process pool, writing
+                             JSONL (or --framed records) with per-file
+                             status and timing
 """
 
 import sys
 import os
 import json
+import time
+import struct
 import zipfile
 import xml.etree.ElementTree as ET
 from pathlib import Path
 
-# Office formats
-try:
-    from docx import Document
-    DOCX_AVAILABLE = True
-except ImportError:
-    DOCX_AVAILABLE = False
+# Optional dependencies (python-docx, openpyxl, python-pptx, ebooklib,
+# bs4, PyYAML) are imported by the extractor that needs them, so a run
+# only pays for the formats it actually sees. Long-lived --serve workers
+# import them all up front instead (preload_optional_modules)
+OPTIONAL_MODULES = ('docx', 'openpyxl', 'pptx', 'ebooklib', 'ebooklib.epub', 'bs4', 'yaml')
 
-try:
-    from openpyxl import load_workbook
-    XLSX_AVAILABLE = True
-except ImportError:
-    XLSX_AVAILABLE = False
-
-try:
-    from pptx import Presentation
-    PPTX_AVAILABLE = True
-except ImportError:
-    PPTX_AVAILABLE = False
-
-# eBook formats
-try:
-    import ebooklib
-    from ebooklib import epub
-    from bs4 import BeautifulSoup
-    EPUB_AVAILABLE = True
-except ImportError:
-    EPUB_AVAILABLE = False
-
-# Structured data
-try:
-    import yaml
-    YAML_AVAILABLE = True
-except ImportError:
-    YAML_AVAILABLE = False
+# Per-document caps for the streaming spreadsheet/presentation
+# extractors. Output stops at whichever is reached first, so a huge
+# workbook costs bounded memory and time instead of exhausting the worker
+MAX_DOCUMENT_ROWS = 1000000
+MAX_DOCUMENT_BYTES = 16 * 1024 * 1024
+
+# OpenDocument namespaces
+ODF_TABLE = '{urn:oasis:names:tc:opendocument:xmlns:table:1.0}'
+ODF_TEXT = '{urn:oasis:names:tc:opendocument:xmlns:text:1.0}'
+ODF_DRAW = '{urn:oasis:names:tc:opendocument:xmlns:drawing:1.0}'
+ODF_OFFICE = '{urn:oasis:names:tc:opendocument:xmlns:office:1.0}'
 
 
 def extract_docx(filepath):
     """Extract text from DOCX file"""
-    if not DOCX_AVAILABLE:
+    try:
+        from docx import Document
+    except ImportError:
         return None
     
     try:
@@ -74,26 +68,43 @@ def extract_docx(filepath):
         return None
 
 
-def extract_xlsx(filepath):
-    """Extract text from XLSX file"""
-    if not XLSX_AVAILABLE:
-        return None
+def iter_xlsx(filepath, max_rows=MAX_DOCUMENT_ROWS):
+    """Stream lines of text from an XLSX file, one per non-empty row"""
+    from openpyxl import load_workbook
     
+    # read_only parses each sheet's XML as rows are requested
+    wb = load_workbook(filepath, read_only=True, data_only=True)
     try:
-        wb = load_workbook(filepath, read_only=True, data_only=True)
-        text_parts = []
-        
+        rows = 0
         for sheet_name in wb.sheetnames:
-            sheet = wb[sheet_name]
-            text_parts.append(f"\n=== Sheet: {sheet_name} ===\n")
+            yield f"\n=== Sheet: {sheet_name} ===\n"
             
-            for row in sheet.iter_rows(values_only=True):
-                row_text = ' | '.join(str(cell) if cell is not None else '' for cell in row)
+            for row in wb[sheet_name].iter_rows(values_only=True):
+                cells = [str(cell) if cell is not None else '' for cell in row]
+                while cells and not cells[-1]:
+                    cells.pop()
+                if not cells:
+                    continue
+                row_text = ' | '.join(cells)
                 if row_text.strip():
-                    text_parts.append(row_text)
-        
+                    yield row_text
+                    rows += 1
+                    if rows >= max_rows:
+                        print(f"Row limit reached in {filepath}", file=sys.stderr)
+                        return
+    finally:
         wb.close()
-        return '\n'.join(text_parts)
+
+
+def extract_xlsx(filepath):
+    """Extract text from XLSX file"""
+    try:
+        import openpyxl
+    except ImportError:
+        return None
+    
+    try:
+        return collect_lines(iter_xlsx(filepath), filepath)
     except Exception as e:
         print(f"Error extracting XLSX: {e}", file=sys.stderr)
         return None
@@ -101,7 +112,9 @@ def extract_xlsx(filepath):
 
 def extract_pptx(filepath):
     """Extract text from PPTX file"""
-    if not PPTX_AVAILABLE:
+    try:
+        from pptx import Presentation
+    except ImportError:
         return None
     
     try:
@@ -142,21 +155,128 @@ def extract_odt(filepath):
         return None
 
 
+def iter_odf_events(filepath):
+    """
+    Stream (event, element) pairs from an OpenDocument content.xml
+    
+    The file is parsed incrementally from the zip member. Each element is
+    detached from its parent after its "end" event has been handled, so
+    only the currently open elements are held in memory - handlers must
+    take what they need from an element at its "end" event. Paragraphs
+    (text:p, text:h) keep their children until they end themselves.
+    """
+    paragraph_tags = (ODF_TEXT + 'p', ODF_TEXT + 'h')
+    with zipfile.ZipFile(filepath, 'r') as zip_ref:
+        with zip_ref.open('content.xml') as content:
+            stack = []
+            paragraphs = 0
+            for event, elem in ET.iterparse(content, events=('start', 'end')):
+                if event == 'start':
+                    stack.append(elem)
+                    if elem.tag in paragraph_tags:
+                        paragraphs += 1
+                    yield event, elem
+                else:
+                    yield event, elem
+                    stack.pop()
+                    if elem.tag in paragraph_tags:
+                        paragraphs -= 1
+                    if stack and not paragraphs:
+                        stack[-1].remove(elem)
+
+
+def odf_paragraph_text(elem):
+    """Text of a text:p or text:h element, with text:s/tab/line-break expanded"""
+    parts = []
+    if elem.text:
+        parts.append(elem.text)
+    for child in elem:
+        if child.tag == ODF_TEXT + 's':
+            parts.append(' ' * int(child.get(ODF_TEXT + 'c', '1')))
+        elif child.tag in (ODF_TEXT + 'tab', ODF_TEXT + 'line-break'):
+            parts.append(' ')
+        else:
+            parts.append(''.join(child.itertext()))
+        if child.tail:
+            parts.append(child.tail)
+    return ''.join(parts).strip()
+
+
+def iter_ods(filepath, max_rows=MAX_DOCUMENT_ROWS):
+    """Stream lines of text from an ODS file, one per non-empty row"""
+    rows = 0
+    cells = []
+    paragraphs = []
+    annotation = 0
+    
+    for event, elem in iter_odf_events(filepath):
+        tag = elem.tag
+        if event == 'start':
+            if tag == ODF_TABLE + 'table':
+                yield f"\n=== Sheet: {elem.get(ODF_TABLE + 'name', '')} ===\n"
+            elif tag == ODF_TABLE + 'table-row':
+                cells = []
+            elif tag in (ODF_TABLE + 'table-cell', ODF_TABLE + 'covered-table-cell'):
+                paragraphs = []
+            elif tag == ODF_OFFICE + 'annotation':
+                annotation += 1
+            continue
+        
+        if tag == ODF_OFFICE + 'annotation':
+            annotation -= 1
+        elif tag in (ODF_TEXT + 'p', ODF_TEXT + 'h'):
+            if not annotation:
+                text = odf_paragraph_text(elem)
+                if text:
+                    paragraphs.append(text)
+        elif tag in (ODF_TABLE + 'table-cell', ODF_TABLE + 'covered-table-cell'):
+            # Empty cells are often repeated thousands of times to pad a
+            # row out to the sheet width: cap the run, trailing ones are
+            # trimmed with the row
+            repeat = int(elem.get(ODF_TABLE + 'number-columns-repeated', '1'))
+            cells.extend([' '.join(paragraphs)] * min(repeat, 1024))
+            paragraphs = []
+        elif tag == ODF_TABLE + 'table-row':
+            while cells and not cells[-1]:
+                cells.pop()
+            if not cells:
+                continue
+            row_text = ' | '.join(cells)
+            repeat = int(elem.get(ODF_TABLE + 'number-rows-repeated', '1'))
+            for _ in range(repeat):
+                yield row_text
+                rows += 1
+                if rows >= max_rows:
+                    print(f"Row limit reached in {filepath}", file=sys.stderr)
+                    return
+
+
+def iter_odp(filepath, max_rows=MAX_DOCUMENT_ROWS):
+    """Stream lines of text from an ODP file, one per paragraph"""
+    slide = 0
+    rows = 0
+    
+    for event, elem in iter_odf_events(filepath):
+        if event == 'start':
+            if elem.tag == ODF_DRAW + 'page':
+                slide += 1
+                yield f"\n=== Slide {slide} ===\n"
+            continue
+        
+        if elem.tag in (ODF_TEXT + 'p', ODF_TEXT + 'h'):
+            text = odf_paragraph_text(elem)
+            if text:
+                yield text
+                rows += 1
+                if rows >= max_rows:
+                    print(f"Row limit reached in {filepath}", file=sys.stderr)
+                    return
+
+
 def extract_ods(filepath):
     """Extract text from ODS file"""
     try:
-        # ODS is a zip file with XML content
-        with zipfile.ZipFile(filepath, 'r') as zip_ref:
-            content_xml = zip_ref.read('content.xml')
-            root = ET.fromstring(content_xml)
-            
-            # Extract all text nodes
-            text_parts = []
-            for text_elem in root.iter():
-                if text_elem.text and text_elem.text.strip():
-                    text_parts.append(text_elem.text.strip())
-            
-            return '\n'.join(text_parts)
+        return collect_lines(iter_ods(filepath), filepath)
     except Exception as e:
         print(f"Error extracting ODS: {e}", file=sys.stderr)
         return None
@@ -165,18 +285,7 @@ def extract_ods(filepath):
 def extract_odp(filepath):
     """Extract text from ODP file"""
     try:
-        # ODP is a zip file with XML content
-        with zipfile.ZipFile(filepath, 'r') as zip_ref:
-            content_xml = zip_ref.read('content.xml')
-            root = ET.fromstring(content_xml)
-            
-            # Extract all text nodes
-            text_parts = []
-            for text_elem in root.iter():
-                if text_elem.text and text_elem.text.strip():
-                    text_parts.append(text_elem.text.strip())
-            
-            return '\n'.join(text_parts)
+        return collect_lines(iter_odp(filepath), filepath)
     except Exception as e:
         print(f"Error extracting ODP: {e}", file=sys.stderr)
         return None
@@ -184,7 +293,11 @@ def extract_odp(filepath):
 
 def extract_epub(filepath):
     """Extract text from EPUB file"""
-    if not EPUB_AVAILABLE:
+    try:
+        import ebooklib
+        from ebooklib import epub
+        from bs4 import BeautifulSoup
+    except ImportError:
         return None
     
     try:
@@ -225,7 +338,9 @@ def extract_markdown(filepath):
 
 def extract_yaml(filepath):
     """Extract text from YAML file"""
-    if not YAML_AVAILABLE:
+    try:
+        import yaml
+    except ImportError:
         return None
     
     try:
@@ -335,39 +450,414 @@ def extract_eml(filepath):
         return None
 
 
-def detect_and_extract(filepath):
+EXTRACTORS = {
+    '.docx': extract_docx,
+    '.xlsx': extract_xlsx,
+    '.pptx': extract_pptx,
+    '.odt': extract_odt,
+    '.ods': extract_ods,
+    '.odp': extract_odp,
+    '.epub': extract_epub,
+    '.md': extract_markdown,
+    '.markdown': extract_markdown,
+    '.yaml': extract_yaml,
+    '.yml': extract_yaml,
+    '.toml': extract_toml,
+    '.sql': extract_sql,
+    '.tex': extract_latex,
+    '.eml': extract_eml,
+}
+
+
+# Formats with a line generator, for writing output as it is produced
+STREAMING_EXTRACTORS = {
+    '.xlsx': iter_xlsx,
+    '.ods': iter_ods,
+    '.odp': iter_odp,
+}
+
+
+def limit_bytes(lines, filepath, max_bytes=MAX_DOCUMENT_BYTES):
+    """
+    Encode lines to UTF-8, stopping at max_bytes of output
+    
+    Yields newline-terminated byte strings. The generator is closed once
+    the cap is hit, so the extractor stops reading the document.
+    """
+    total = 0
+    try:
+        for line in lines:
+            data = line.encode('utf-8', errors='replace') + b'\n'
+            if total + len(data) > max_bytes:
+                print(f"Size limit reached in {filepath}", file=sys.stderr)
+                return
+            total += len(data)
+            yield data
+    finally:
+        lines.close()
+
+
+def collect_lines(lines, filepath, max_bytes=MAX_DOCUMENT_BYTES):
+    """Join streamed lines into one string, within the byte cap"""
+    data = b''.join(limit_bytes(lines, filepath, max_bytes))
+    return data.decode('utf-8').rstrip('\n')
+
+
+def stream_extract(filepath, out):
+    """
+    Write a document's text to a binary stream as it is extracted
+    
+    Returns True if any text was written, None if the format has no
+    streaming extractor (use detect_and_extract instead).
+    """
+    generator = STREAMING_EXTRACTORS.get(Path(filepath).suffix.lower())
+    if generator is None:
+        return None
+    
+    written = False
+    try:
+        for data in limit_bytes(generator(filepath), filepath):
+            out.write(data)
+            written = True
+    except ImportError:
+        return False
+    except Exception as e:
+        print(f"Error extracting {filepath}: {e}", file=sys.stderr)
+        return False
+    out.flush()
+    return written
+
+
+def detect_and_extract(filepath, format_hint=None):
     """Detect file type and extract text"""
-    ext = Path(filepath).suffix.lower()
-    
-    extractors = {
-        '.docx': extract_docx,
-        '.xlsx': extract_xlsx,
-        '.pptx': extract_pptx,
-        '.odt': extract_odt,
-        '.ods': extract_ods,
-        '.odp': extract_odp,
-        '.epub': extract_epub,
-        '.md': extract_markdown,
-        '.markdown': extract_markdown,
-        '.yaml': extract_yaml,
-        '.yml': extract_yaml,
-        '.toml': extract_toml,
-        '.sql': extract_sql,
-        '.tex': extract_latex,
-        '.eml': extract_eml,
-    }
+    if format_hint:
+        ext = '.' + format_hint.lower().lstrip('.')
+    else:
+        ext = Path(filepath).suffix.lower()
     
-    extractor = extractors.get(ext)
+    extractor = EXTRACTORS.get(ext)
     if extractor:
         return extractor(filepath)
     
     return None
 
 
+def read_exact(stream, n):
+    """Read exactly n bytes, or return None on EOF"""
+    data = b''
+    while len(data) < n:
+        chunk = stream.read(n - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+def preload_optional_modules():
+    """Import the optional extractor dependencies that are installed"""
+    import importlib
+    for name in OPTIONAL_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+
+
+def serve():
+    """
+    Persistent worker mode used by src/crawler/extractor_pool.c
+    
+    Reads framed requests from stdin and writes framed responses to stdout
+    until EOF. All integers are big-endian:
+      request:  uint32 format_len, uint32 path_len, format, path
+      response: int32 status (0 = ok), uint32 text_len, text
+    """
+    # Keep the protocol stream clean: anything printed by extractors or
+    # their subprocesses goes to stderr instead
+    out = os.fdopen(os.dup(sys.stdout.fileno()), 'wb')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+    stream = sys.stdin.buffer
+    
+    # Pay the import cost once per worker, not on its first document of
+    # each format
+    preload_optional_modules()
+    
+    while True:
+        header = read_exact(stream, 8)
+        if header is None:
+            break
+        format_len, path_len = struct.unpack('>II', header)
+        payload = read_exact(stream, format_len + path_len)
+        if payload is None:
+            break
+        
+        format_hint = payload[:format_len].decode('utf-8', errors='replace') or None
+        filepath = payload[format_len:].decode('utf-8', errors='surrogateescape')
+        
+        text = None
+        try:
+            if os.path.exists(filepath):
+                text = detect_and_extract(filepath, format_hint)
+        except Exception as e:
+            print(f"Error extracting {filepath}: {e}", file=sys.stderr)
+        
+        if text:
+            data = text.encode('utf-8', errors='replace')
+            out.write(struct.pack('>iI', 0, len(data)))
+            out.write(data)
+        else:
+            out.write(struct.pack('>iI', 1, 0))
+        out.flush()
+
+
+def extract_record(filepath):
+    """
+    Extract one file for batch mode
+    
+    Returns a dict with path, status ("ok", "missing", "unsupported" or
+    "failed"), chars, seconds and text. Runs in a pool worker, so it
+    never raises.
+    """
+    start = time.perf_counter()
+    text = None
+    if not os.path.isfile(filepath):
+        status = 'missing'
+    elif Path(filepath).suffix.lower() not in EXTRACTORS:
+        status = 'unsupported'
+    else:
+        try:
+            text = detect_and_extract(filepath)
+        except Exception as e:
+            print(f"Error extracting {filepath}: {e}", file=sys.stderr)
+        status = 'ok' if text else 'failed'
+    
+    return {
+        'path': filepath,
+        'status': status,
+        'chars': len(text) if text else 0,
+        'seconds': round(time.perf_counter() - start, 6),
+        'text': text or '',
+    }
+
+
+def batch_paths(source):
+    """
+    List the files for batch mode
+    
+    source is a directory (walked recursively, keeping supported
+    extensions), a manifest file with one path per line, or "-" to read
+    the manifest from stdin. Blank lines and lines starting with "#" in a
+    manifest are skipped.
+    """
+    if source != '-' and os.path.isdir(source):
+        paths = []
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if Path(name).suffix.lower() in EXTRACTORS:
+                    paths.append(os.path.join(root, name))
+        return paths
+    
+    if source == '-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(source, 'r', encoding='utf-8', errors='surrogateescape') as f:
+            lines = f.read().splitlines()
+    
+    return [line.strip() for line in lines
+            if line.strip() and not line.lstrip().startswith('#')]
+
+
+def failed_record(filepath, seconds=0.0):
+    """Batch result for a file whose worker process died"""
+    return {
+        'path': filepath,
+        'status': 'failed',
+        'chars': 0,
+        'seconds': round(seconds, 6),
+        'text': '',
+    }
+
+
+def isolate_records(paths):
+    """
+    Re-run files one at a time in a single-worker pool
+    
+    Used for the files that were in flight when a pool worker died: only
+    the file that kills its own worker is recorded as failed, and the
+    worker is replaced before the next file.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+    
+    executor = ProcessPoolExecutor(max_workers=1)
+    try:
+        for filepath in paths:
+            start = time.perf_counter()
+            try:
+                record = executor.submit(extract_record, filepath).result()
+            except BrokenProcessPool:
+                print(f"Extractor worker died on {filepath}", file=sys.stderr)
+                record = failed_record(filepath, time.perf_counter() - start)
+                executor.shutdown()
+                executor = ProcessPoolExecutor(max_workers=1)
+            yield record
+    finally:
+        executor.shutdown()
+
+
+def pool_records(paths, workers):
+    """
+    Extract files in a process pool, yielding records in input order
+    
+    Files are submitted one by one, at most a few per worker ahead of the
+    one being written, so one slow file does not hold back a long run of
+    others. If a worker dies (BrokenProcessPool) the pool is recreated:
+    results that finished are kept and the files still in flight are
+    re-run through isolate_records, so the batch continues.
+    """
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+    
+    def finished(future):
+        return future is not None and future.done() and not future.cancelled() \
+            and future.exception() is None
+    
+    window = workers * 4
+    remaining = iter(paths)
+    pending = deque()
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        while True:
+            while len(pending) < window:
+                filepath = next(remaining, None)
+                if filepath is None:
+                    break
+                try:
+                    future = executor.submit(extract_record, filepath)
+                except BrokenProcessPool:
+                    future = None
+                pending.append((filepath, future))
+            if not pending:
+                break
+            
+            filepath, future = pending[0]
+            try:
+                record = future.result() if future is not None else None
+            except BrokenProcessPool:
+                record = None
+            if record is not None:
+                pending.popleft()
+                yield record
+                continue
+            
+            # The pool is broken: every unfinished future in it is lost
+            in_flight = list(pending)
+            pending.clear()
+            executor.shutdown()
+            executor = ProcessPoolExecutor(max_workers=workers)
+            
+            isolated = isolate_records([p for p, f in in_flight if not finished(f)])
+            for filepath, future in in_flight:
+                yield future.result() if finished(future) else next(isolated)
+    finally:
+        executor.shutdown()
+
+
+def write_record(out, record, framed):
+    """
+    Write one batch result
+    
+    JSONL: one JSON object per line. Framed (big-endian, like --serve):
+      int32 status (0 = ok), uint32 path_len, uint32 text_len,
+      float64 seconds, path, text
+    """
+    if framed:
+        path = record['path'].encode('utf-8', errors='surrogateescape')
+        text = record['text'].encode('utf-8', errors='replace')
+        status = 0 if record['status'] == 'ok' else 1
+        out.write(struct.pack('>iIId', status, len(path), len(text), record['seconds']))
+        out.write(path)
+        out.write(text)
+    else:
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        out.write(line.encode('utf-8', errors='surrogateescape'))
+
+
+def run_batch(source, framed=False, workers=None):
+    """
+    Extract every file from a manifest or directory in a process pool
+    
+    Results are written in input order as each one completes, so a
+    consumer can stream them. A file whose worker process dies is
+    recorded as failed and the rest of the batch continues. Returns the
+    number of files that failed.
+    """
+    paths = batch_paths(source)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(paths)))
+    
+    out = sys.stdout.buffer
+    failed = 0
+    
+    if workers == 1:
+        results = map(extract_record, paths)
+    else:
+        results = pool_records(paths, workers)
+    
+    try:
+        for record in results:
+            if record['status'] != 'ok':
+                failed += 1
+            write_record(out, record, framed)
+            out.flush()
+    finally:
+        if hasattr(results, 'close'):
+            results.close()
+    
+    return failed
+
+
+def usage():
+    print("Usage: universal_extractor.py <filepath>", file=sys.stderr)
+    print("       universal_extractor.py --serve", file=sys.stderr)
+    print("       universal_extractor.py --batch [--framed] [--workers N] <manifest|directory|->",
+          file=sys.stderr)
+    sys.exit(1)
+
+
 def main():
+    if len(sys.argv) == 2 and sys.argv[1] == '--serve':
+        serve()
+        sys.exit(0)
+    
+    if len(sys.argv) >= 2 and sys.argv[1] == '--batch':
+        args = sys.argv[2:]
+        framed = False
+        workers = None
+        while len(args) > 1:
+            if args[0] == '--framed':
+                framed = True
+                args = args[1:]
+            elif args[0] == '--workers' and len(args) > 2 and args[1].isdigit():
+                workers = int(args[1])
+                args = args[2:]
+            else:
+                usage()
+        if len(args) != 1:
+            usage()
+        if args[0] != '-' and not os.path.exists(args[0]):
+            print(f"File not found: {args[0]}", file=sys.stderr)
+            sys.exit(1)
+        
+        failed = run_batch(args[0], framed, workers)
+        sys.exit(0 if failed == 0 else 2)
+    
     if len(sys.argv) != 2:
-        print("Usage: universal_extractor.py <filepath>", file=sys.stderr)
-        sys.exit(1)
+        usage()
     
     filepath = sys.argv[1]
     
@@ -375,6 +865,13 @@ def main():
         print(f"File not found: {filepath}", file=sys.stderr)
         sys.exit(1)
     
+    streamed = stream_extract(filepath, sys.stdout.buffer)
+    if streamed is not None:
+        if streamed:
+            sys.exit(0)
+        print(f"Could not extract text from: {filepath}", file=sys.stderr)
+        sys.exit(1)
+    
     text = detect_and_extract(filepath)
     
     if text:
@@ -386,4 +883,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -1,86 +1,66 @@
 /**
  * URL Blocker System Implementation
  * 
- * Supports multiple blocking strategies with regex patterns
+ * Supports multiple blocking strategies with regex patterns. Enabled
+ * patterns are compiled into one URLMatcher, so a check costs about the
+ * same with thousands of patterns as with a handful.
  */
 
 #include "url_blocker.h"
+#include "url_matcher.h"
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
-#include <regex.h>
 
-#define MAX_PATTERNS 1000
+#define MAX_PATTERNS 100000
 
 // Blocker structure
 struct URLBlocker {
     BlockPattern* patterns;
-    regex_t* compiled_regex;  // Compiled regex patterns
+    URLMatcher* matcher;      // Enabled patterns, compiled
     int pattern_count;
     int pattern_capacity;
     int next_id;
+    bool loading;             // Defer saving and compiling until load ends
     char patterns_file[1024];
 };
 
 /**
- * Extract domain from URL
+ * Rule type used by the matcher for a pattern type
  */
-static void extract_domain(const char* url, char* domain, size_t domain_size) {
-    if (!url || !domain) return;
-    
-    domain[0] = '\0';
-    
-    // Find protocol end
-    const char* proto_end = strstr(url, "://");
-    if (!proto_end) return;
-    
-    const char* start = proto_end + 3;
-    
-    // Find path start
-    const char* path_start = strchr(start, '/');
-    
-    size_t len;
-    if (path_start) {
-        len = path_start - start;
-    } else {
-        len = strlen(start);
+static URLRuleType rule_type(BlockPatternType type) {
+    switch (type) {
+        case BLOCK_EXACT_URL: return URL_RULE_EXACT;
+        case BLOCK_DOMAIN: return URL_RULE_DOMAIN;
+        case BLOCK_PATH_PREFIX: return URL_RULE_PATH_PREFIX;
+        default: return URL_RULE_REGEX;
     }
-    
-    if (len >= domain_size) len = domain_size - 1;
-    
-    strncpy(domain, start, len);
-    domain[len] = '\0';
 }
 
 /**
- * Extract path from URL
+ * Recompile the matcher from the enabled patterns
+ * 
+ * Needed after removing or disabling a pattern; additions are applied
+ * incrementally.
  */
-static void extract_path(const char* url, char* path, size_t path_size) {
-    if (!url || !path) return;
-    
-    path[0] = '\0';
-    
-    // Find protocol end
-    const char* proto_end = strstr(url, "://");
-    if (!proto_end) return;
-    
-    // Find path start
-    const char* path_start = strchr(proto_end + 3, '/');
-    if (!path_start) return;
-    
-    // Copy path (before query string)
-    const char* query = strchr(path_start, '?');
-    size_t len;
-    if (query) {
-        len = query - path_start;
-    } else {
-        len = strlen(path_start);
+static void rebuild_matcher(URLBlocker* blocker) {
+    url_matcher_clear(blocker->matcher);
+    for (int i = 0; i < blocker->pattern_count; i++) {
+        BlockPattern* p = &blocker->patterns[i];
+        if (p->enabled) {
+            url_matcher_add(blocker->matcher, rule_type(p->type), p->pattern, p->id);
+        }
+    }
+    url_matcher_compile(blocker->matcher);
+}
+
+/**
+ * Save unless a load is in progress
+ */
+static void auto_save(URLBlocker* blocker) {
+    if (blocker->patterns_file[0] != '\0' && !blocker->loading) {
+        url_blocker_save(blocker);
     }
-    
-    if (len >= path_size) len = path_size - 1;
-    
-    strncpy(path, path_start, len);
-    path[len] = '\0';
 }
 
 /**
@@ -92,11 +72,11 @@ URLBlocker* url_blocker_create(const char* patterns_file) {
     
     blocker->pattern_capacity = 100;
     blocker->patterns = (BlockPattern*)calloc(blocker->pattern_capacity, sizeof(BlockPattern));
-    blocker->compiled_regex = (regex_t*)calloc(blocker->pattern_capacity, sizeof(regex_t));
+    blocker->matcher = url_matcher_create();
     
-    if (!blocker->patterns || !blocker->compiled_regex) {
+    if (!blocker->patterns || !blocker->matcher) {
         if (blocker->patterns) free(blocker->patterns);
-        if (blocker->compiled_regex) free(blocker->compiled_regex);
+        url_matcher_destroy(blocker->matcher);
         free(blocker);
         return NULL;
     }
@@ -118,15 +98,7 @@ URLBlocker* url_blocker_create(const char* patterns_file) {
 void url_blocker_destroy(URLBlocker* blocker) {
     if (!blocker) return;
     
-    // Free compiled regex patterns
-    if (blocker->compiled_regex) {
-        for (int i = 0; i < blocker->pattern_count; i++) {
-            if (blocker->patterns[i].type == BLOCK_REGEX_PATTERN) {
-                regfree(&blocker->compiled_regex[i]);
-            }
-        }
-        free(blocker->compiled_regex);
-    }
+    url_matcher_destroy(blocker->matcher);
     
     if (blocker->patterns) {
         free(blocker->patterns);
@@ -153,17 +125,11 @@ int url_blocker_add_pattern(URLBlocker* blocker, BlockPatternType type,
         
         BlockPattern* new_patterns = (BlockPattern*)realloc(blocker->patterns, 
                                                             new_capacity * sizeof(BlockPattern));
-        regex_t* new_regex = (regex_t*)realloc(blocker->compiled_regex, 
-                                               new_capacity * sizeof(regex_t));
-        
-        if (!new_patterns || !new_regex) {
-            if (new_patterns) free(new_patterns);
-            if (new_regex) free(new_regex);
+        if (!new_patterns) {
             return -1;
         }
         
         blocker->patterns = new_patterns;
-        blocker->compiled_regex = new_regex;
         blocker->pattern_capacity = new_capacity;
     }
     
@@ -184,22 +150,20 @@ int url_blocker_add_pattern(URLBlocker* blocker, BlockPatternType type,
     p->added_time = time(NULL);
     p->enabled = true;
     
-    // Compile regex if needed
-    if (type == BLOCK_REGEX_PATTERN) {
-        int ret = regcomp(&blocker->compiled_regex[blocker->pattern_count], 
-                         pattern, REG_EXTENDED | REG_NOSUB);
-        if (ret != 0) {
-            fprintf(stderr, "Warning: Failed to compile regex pattern: %s\n", pattern);
-            return -1;
-        }
+    // Add to the compiled set (fails for an invalid regex)
+    if (url_matcher_add(blocker->matcher, rule_type(type), pattern, p->id) != 0) {
+        fprintf(stderr, "Warning: Failed to compile %s pattern: %s\n",
+                url_blocker_get_type_name(type), pattern);
+        blocker->next_id--;
+        return -1;
     }
     
     blocker->pattern_count++;
     
-    // Auto-save if file is set
-    if (blocker->patterns_file[0] != '\0') {
-        url_blocker_save(blocker);
+    if (!blocker->loading) {
+        url_matcher_compile(blocker->matcher);
     }
+    auto_save(blocker);
     
     return p->id;
 }
@@ -212,25 +176,14 @@ int url_blocker_remove_pattern(URLBlocker* blocker, int pattern_id) {
     
     for (int i = 0; i < blocker->pattern_count; i++) {
         if (blocker->patterns[i].id == pattern_id) {
-            // Free regex if needed
-            if (blocker->patterns[i].type == BLOCK_REGEX_PATTERN) {
-                regfree(&blocker->compiled_regex[i]);
-            }
-            
             // Shift remaining patterns
             for (int j = i; j < blocker->pattern_count - 1; j++) {
                 blocker->patterns[j] = blocker->patterns[j + 1];
-                if (blocker->patterns[j].type == BLOCK_REGEX_PATTERN) {
-                    blocker->compiled_regex[j] = blocker->compiled_regex[j + 1];
-                }
             }
             
             blocker->pattern_count--;
-            
-            // Auto-save
-            if (blocker->patterns_file[0] != '\0') {
-                url_blocker_save(blocker);
-            }
+            rebuild_matcher(blocker);
+            auto_save(blocker);
             
             return 0;
         }
@@ -247,12 +200,11 @@ int url_blocker_set_pattern_enabled(URLBlocker* blocker, int pattern_id, bool en
     
     for (int i = 0; i < blocker->pattern_count; i++) {
         if (blocker->patterns[i].id == pattern_id) {
-            blocker->patterns[i].enabled = enabled;
-            
-            // Auto-save
-            if (blocker->patterns_file[0] != '\0') {
-                url_blocker_save(blocker);
+            if (blocker->patterns[i].enabled != enabled) {
+                blocker->patterns[i].enabled = enabled;
+                rebuild_matcher(blocker);
             }
+            auto_save(blocker);
             
             return 0;
         }
@@ -261,53 +213,13 @@ int url_blocker_set_pattern_enabled(URLBlocker* blocker, int pattern_id, bool en
     return -1;  // Not found
 }
 
-/**
- * Check if URL matches pattern
- */
-static bool matches_pattern(URLBlocker* blocker, int pattern_idx, const char* url) {
-    BlockPattern* p = &blocker->patterns[pattern_idx];
-    
-    if (!p->enabled) return false;
-    
-    switch (p->type) {
-        case BLOCK_EXACT_URL:
-            return strcmp(url, p->pattern) == 0;
-            
-        case BLOCK_DOMAIN: {
-            char domain[256];
-            extract_domain(url, domain, sizeof(domain));
-            return strcmp(domain, p->pattern) == 0;
-        }
-        
-        case BLOCK_PATH_PREFIX: {
-            char path[2048];
-            extract_path(url, path, sizeof(path));
-            return strncmp(path, p->pattern, strlen(p->pattern)) == 0;
-        }
-        
-        case BLOCK_REGEX_PATTERN: {
-            int ret = regexec(&blocker->compiled_regex[pattern_idx], url, 0, NULL, 0);
-            return (ret == 0);
-        }
-        
-        default:
-            return false;
-    }
-}
-
 /**
  * Check if URL is blocked
  */
 bool url_blocker_is_blocked(URLBlocker* blocker, const char* url) {
     if (!blocker || !url) return false;
     
-    for (int i = 0; i < blocker->pattern_count; i++) {
-        if (matches_pattern(blocker, i, url)) {
-            return true;
-        }
-    }
-    
-    return false;
+    return url_matcher_match(blocker->matcher, url) >= 0;
 }
 
 /**
@@ -352,57 +264,16 @@ bool url_blocker_test_pattern(URLBlocker* blocker, const char* pattern,
                               BlockPatternType type, const char* test_url) {
     if (!blocker || !pattern || !test_url) return false;
     
-    // Create temporary pattern
-    BlockPattern temp;
-    temp.type = type;
-    strncpy(temp.pattern, pattern, sizeof(temp.pattern) - 1);
-    temp.enabled = true;
-    
-    regex_t temp_regex;
-    bool regex_compiled = false;
+    // Same matching rules as the live pattern set
+    URLMatcher* temp = url_matcher_create();
+    if (!temp) return false;
     
-    if (type == BLOCK_REGEX_PATTERN) {
-        int ret = regcomp(&temp_regex, pattern, REG_EXTENDED | REG_NOSUB);
-        if (ret != 0) {
-            return false;  // Invalid regex
-        }
-        regex_compiled = true;
-    }
-    
-    // Test match
     bool result = false;
-    
-    switch (type) {
-        case BLOCK_EXACT_URL:
-            result = (strcmp(test_url, pattern) == 0);
-            break;
-            
-        case BLOCK_DOMAIN: {
-            char domain[256];
-            extract_domain(test_url, domain, sizeof(domain));
-            result = (strcmp(domain, pattern) == 0);
-            break;
-        }
-        
-        case BLOCK_PATH_PREFIX: {
-            char path[2048];
-            extract_path(test_url, path, sizeof(path));
-            result = (strncmp(path, pattern, strlen(pattern)) == 0);
-            break;
-        }
-        
-        case BLOCK_REGEX_PATTERN:
-            if (regex_compiled) {
-                int ret = regexec(&temp_regex, test_url, 0, NULL, 0);
-                result = (ret == 0);
-            }
-            break;
-    }
-    
-    if (regex_compiled) {
-        regfree(&temp_regex);
+    if (url_matcher_add(temp, rule_type(type), pattern, 0) == 0) {
+        result = url_matcher_match(temp, test_url) >= 0;
     }
     
+    url_matcher_destroy(temp);
     return result;
 }
 
@@ -468,6 +339,7 @@ int url_blocker_load(URLBlocker* blocker) {
     
     char line[4096];
     int loaded = 0;
+    blocker->loading = true;
     
     while (fgets(line, sizeof(line), fp)) {
         // Parse line: id|type|pattern|description|time|enabled
@@ -497,6 +369,10 @@ int url_blocker_load(URLBlocker* blocker) {
     }
     
     fclose(fp);
+    
+    // Compile once for the whole file (also drops disabled patterns)
+    blocker->loading = false;
+    rebuild_matcher(blocker);
     return loaded;
 }
 
@@ -506,20 +382,12 @@ int url_blocker_load(URLBlocker* blocker) {
 int url_blocker_clear(URLBlocker* blocker) {
     if (!blocker) return -1;
     
-    // Free regex patterns
-    for (int i = 0; i < blocker->pattern_count; i++) {
-        if (blocker->patterns[i].type == BLOCK_REGEX_PATTERN) {
-            regfree(&blocker->compiled_regex[i]);
-        }
-    }
+    url_matcher_clear(blocker->matcher);
     
     blocker->pattern_count = 0;
     blocker->next_id = 1;
     
-    // Auto-save
-    if (blocker->patterns_file[0] != '\0') {
-        url_blocker_save(blocker);
-    }
+    auto_save(blocker);
     
     return 0;
 }
@@ -9,7 +9,7 @@
  * 
  * Features:
  * - Block exact URLs
- * - Block entire domains
+ * - Block entire domains (including subdomains)
  * - Block path prefixes
  * - Block using regex patterns
  * - Pattern testing
@@ -19,7 +19,7 @@
 // Block pattern types
 typedef enum {
     BLOCK_EXACT_URL,        // Block exact URL match
-    BLOCK_DOMAIN,           // Block entire domain
+    BLOCK_DOMAIN,           // Block entire domain and its subdomains
     BLOCK_PATH_PREFIX,      // Block URLs starting with path
     BLOCK_REGEX_PATTERN     // Block using regex pattern
 } BlockPatternType;
@@ -6,18 +6,69 @@
  * - Timestamp tracking
  * - Priority calculation
  * - Status management
+ * 
+ * The database runs in WAL mode and keeps its hot statements prepared for
+ * the lifetime of the handle. Batch operations run inside one transaction,
+ * so adding or updating N URLs costs one commit instead of N.
  */
 
 #include "url_database.h"
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
+#include <strings.h>
+#include <pthread.h>
 #include <sqlite3.h>
 
+// Cached prepared statements
+typedef enum {
+    STMT_ADD,
+    STMT_REMOVE,
+    STMT_BLOCK,
+    STMT_UNBLOCK,
+    STMT_MARK_CRAWLED,
+    STMT_MARK_STATUS,
+    STMT_GET_NEXT,
+    STMT_LEASE_SELECT,
+    STMT_GET_BY_ID,
+    STMT_FIND_ID,
+    STMT_EXISTS,
+    STMT_COUNT_TOTAL,
+    STMT_COUNT_PENDING,
+    STMT_COUNT_CRAWLED,
+    STMT_COUNT_BLOCKED,
+    STMT_COUNT
+} URLStatement;
+
+static const char* STATEMENT_SQL[STMT_COUNT] = {
+    [STMT_ADD] = "INSERT OR IGNORE INTO urls "
+                 "(url, domain, path, query_string, file_type, first_seen, source_url) "
+                 "VALUES (?, ?, ?, ?, ?, ?, ?);",
+    [STMT_REMOVE] = "DELETE FROM urls WHERE id = ?;",
+    [STMT_BLOCK] = "UPDATE urls SET blocked = 1, status = 'blocked' WHERE id = ?;",
+    [STMT_UNBLOCK] = "UPDATE urls SET blocked = 0, status = 'pending' WHERE id = ?;",
+    [STMT_MARK_CRAWLED] = "UPDATE urls SET status = 'crawled', last_crawled = ?, "
+                          "crawl_count = crawl_count + 1 WHERE id = ?;",
+    [STMT_MARK_STATUS] = "UPDATE urls SET status = ? WHERE id = ?;",
+    [STMT_GET_NEXT] = "SELECT * FROM urls WHERE status = 'pending' AND blocked = 0 "
+                      "ORDER BY priority DESC, first_seen ASC LIMIT 1;",
+    [STMT_LEASE_SELECT] = "SELECT * FROM urls WHERE status = 'pending' AND blocked = 0 "
+                          "ORDER BY priority DESC, first_seen ASC LIMIT ?;",
+    [STMT_GET_BY_ID] = "SELECT * FROM urls WHERE id = ?;",
+    [STMT_FIND_ID] = "SELECT id FROM urls WHERE url = ?;",
+    [STMT_EXISTS] = "SELECT 1 FROM urls WHERE url = ? LIMIT 1;",
+    [STMT_COUNT_TOTAL] = "SELECT COUNT(*) FROM urls;",
+    [STMT_COUNT_PENDING] = "SELECT COUNT(*) FROM urls WHERE status = 'pending' AND blocked = 0;",
+    [STMT_COUNT_CRAWLED] = "SELECT COUNT(*) FROM urls WHERE status = 'crawled';",
+    [STMT_COUNT_BLOCKED] = "SELECT COUNT(*) FROM urls WHERE blocked = 1;"
+};
+
 // Database structure
 struct URLDatabase {
     sqlite3* db;
     char db_path[1024];
+    sqlite3_stmt* stmts[STMT_COUNT];    // Prepared on first use
+    pthread_mutex_t lock;               // Serializes use of cached statements
 };
 
 // SQL schema
@@ -38,13 +89,23 @@ static const char* CREATE_TABLE_SQL =
     "  blocked INTEGER DEFAULT 0"
     ");";
 
+// The UNIQUE constraint already indexes url; idx_url only slowed inserts.
+// idx_frontier serves get_next/lease_next without a sort.
 static const char* CREATE_INDEXES_SQL[] = {
-    "CREATE INDEX IF NOT EXISTS idx_url ON urls(url);",
+    "DROP INDEX IF EXISTS idx_url;",
     "CREATE INDEX IF NOT EXISTS idx_domain ON urls(domain);",
     "CREATE INDEX IF NOT EXISTS idx_status ON urls(status);",
     "CREATE INDEX IF NOT EXISTS idx_priority ON urls(priority DESC);",
     "CREATE INDEX IF NOT EXISTS idx_last_crawled ON urls(last_crawled);",
     "CREATE INDEX IF NOT EXISTS idx_blocked ON urls(blocked);",
+    "CREATE INDEX IF NOT EXISTS idx_frontier ON urls(status, blocked, priority DESC, first_seen ASC);",
+    NULL
+};
+
+static const char* PRAGMA_SQL[] = {
+    "PRAGMA journal_mode = WAL;",
+    "PRAGMA synchronous = NORMAL;",
+    "PRAGMA temp_store = MEMORY;",
     NULL
 };
 
@@ -125,6 +186,190 @@ static void parse_url(const char* url, char* domain, char* path, char* query_str
     }
 }
 
+/**
+ * Get cached statement, preparing it on first use
+ * 
+ * Caller must hold db->lock. The statement is reset and unbound.
+ */
+static sqlite3_stmt* get_stmt(URLDatabase* db, URLStatement which) {
+    sqlite3_stmt* stmt = db->stmts[which];
+    
+    if (!stmt) {
+        int rc = sqlite3_prepare_v3(db->db, STATEMENT_SQL[which], -1,
+                                    SQLITE_PREPARE_PERSISTENT, &stmt, NULL);
+        if (rc != SQLITE_OK) {
+            fprintf(stderr, "Failed to prepare statement: %s\n", sqlite3_errmsg(db->db));
+            return NULL;
+        }
+        db->stmts[which] = stmt;
+    }
+    
+    sqlite3_reset(stmt);
+    sqlite3_clear_bindings(stmt);
+    return stmt;
+}
+
+/**
+ * Run a statement that returns no rows, then reset it
+ */
+static int step_done(sqlite3_stmt* stmt) {
+    int rc = sqlite3_step(stmt);
+    sqlite3_reset(stmt);
+    return (rc == SQLITE_DONE) ? 0 : -1;
+}
+
+/**
+ * Run a single-value COUNT statement
+ */
+static int count_query(URLDatabase* db, URLStatement which) {
+    if (!db) return 0;
+    
+    pthread_mutex_lock(&db->lock);
+    
+    int count = 0;
+    sqlite3_stmt* stmt = get_stmt(db, which);
+    if (stmt && sqlite3_step(stmt) == SQLITE_ROW) {
+        count = sqlite3_column_int(stmt, 0);
+    }
+    if (stmt) sqlite3_reset(stmt);
+    
+    pthread_mutex_unlock(&db->lock);
+    return count;
+}
+
+/**
+ * Run a transaction control statement (BEGIN/COMMIT/ROLLBACK)
+ */
+static int exec_sql(URLDatabase* db, const char* sql) {
+    char* err_msg = NULL;
+    int rc = sqlite3_exec(db->db, sql, NULL, NULL, &err_msg);
+    if (rc != SQLITE_OK) {
+        fprintf(stderr, "SQL error: %s\n", err_msg ? err_msg : sqlite3_errmsg(db->db));
+        sqlite3_free(err_msg);
+        return -1;
+    }
+    return 0;
+}
+
+/**
+ * Copy a text column (NULL columns become empty strings)
+ */
+static void copy_column(sqlite3_stmt* stmt, int col, char* dst, size_t size) {
+    const char* text = (const char*)sqlite3_column_text(stmt, col);
+    if (text) {
+        strncpy(dst, text, size - 1);
+        dst[size - 1] = '\0';
+    } else {
+        dst[0] = '\0';
+    }
+}
+
+/**
+ * Build URL entry from the current row of a SELECT * statement
+ */
+static URLEntry* entry_from_row(sqlite3_stmt* stmt) {
+    URLEntry* entry = (URLEntry*)calloc(1, sizeof(URLEntry));
+    if (!entry) return NULL;
+    
+    entry->id = sqlite3_column_int64(stmt, 0);
+    copy_column(stmt, 1, entry->url, sizeof(entry->url));
+    copy_column(stmt, 2, entry->domain, sizeof(entry->domain));
+    copy_column(stmt, 3, entry->path, sizeof(entry->path));
+    copy_column(stmt, 4, entry->query_string, sizeof(entry->query_string));
+    copy_column(stmt, 5, entry->file_type, sizeof(entry->file_type));
+    entry->first_seen = sqlite3_column_int64(stmt, 6);
+    entry->last_crawled = sqlite3_column_int64(stmt, 7);
+    entry->crawl_count = sqlite3_column_int(stmt, 8);
+    entry->priority = sqlite3_column_int(stmt, 9);
+    copy_column(stmt, 10, entry->status, sizeof(entry->status));
+    copy_column(stmt, 11, entry->source_url, sizeof(entry->source_url));
+    entry->blocked = sqlite3_column_int(stmt, 12) != 0;
+    
+    return entry;
+}
+
+/**
+ * Bind and run one insert (caller holds lock)
+ */
+static int insert_url(URLDatabase* db, const char* url, const char* source_url, int64_t now) {
+    char domain[256];
+    char path[2048];
+    char query_string[1024];
+    char file_type[32];
+    
+    parse_url(url, domain, path, query_string, file_type);
+    
+    sqlite3_stmt* stmt = get_stmt(db, STMT_ADD);
+    if (!stmt) return -1;
+    
+    sqlite3_bind_text(stmt, 1, url, -1, SQLITE_STATIC);
+    sqlite3_bind_text(stmt, 2, domain, -1, SQLITE_STATIC);
+    sqlite3_bind_text(stmt, 3, path, -1, SQLITE_STATIC);
+    sqlite3_bind_text(stmt, 4, query_string, -1, SQLITE_STATIC);
+    sqlite3_bind_text(stmt, 5, file_type, -1, SQLITE_STATIC);
+    sqlite3_bind_int64(stmt, 6, now);
+    sqlite3_bind_text(stmt, 7, source_url ? source_url : "", -1, SQLITE_STATIC);
+    
+    if (step_done(stmt) != 0) {
+        fprintf(stderr, "Execution failed: %s\n", sqlite3_errmsg(db->db));
+        return -1;
+    }
+    return 0;
+}
+
+/**
+ * Bind and run one status update (caller holds lock)
+ */
+static int update_status(URLDatabase* db, uint64_t id, const char* status, int64_t now) {
+    sqlite3_stmt* stmt;
+    
+    if (strcmp(status, "crawled") == 0) {
+        stmt = get_stmt(db, STMT_MARK_CRAWLED);
+        if (!stmt) return -1;
+        sqlite3_bind_int64(stmt, 1, now);
+        sqlite3_bind_int64(stmt, 2, id);
+    } else {
+        stmt = get_stmt(db, STMT_MARK_STATUS);
+        if (!stmt) return -1;
+        sqlite3_bind_text(stmt, 1, status, -1, SQLITE_STATIC);
+        sqlite3_bind_int64(stmt, 2, id);
+    }
+    
+    return step_done(stmt);
+}
+
+/**
+ * Run an id-only statement under the lock
+ */
+static int exec_by_id(URLDatabase* db, URLStatement which, uint64_t id) {
+    if (!db) return -1;
+    
+    pthread_mutex_lock(&db->lock);
+    
+    int rc = -1;
+    sqlite3_stmt* stmt = get_stmt(db, which);
+    if (stmt) {
+        sqlite3_bind_int64(stmt, 1, id);
+        rc = step_done(stmt);
+    }
+    
+    pthread_mutex_unlock(&db->lock);
+    return rc;
+}
+
+/**
+ * Set status under the lock
+ */
+static int mark_status(URLDatabase* db, uint64_t id, const char* status) {
+    if (!db) return -1;
+    
+    pthread_mutex_lock(&db->lock);
+    int rc = update_status(db, id, status, (int64_t)time(NULL));
+    pthread_mutex_unlock(&db->lock);
+    
+    return rc;
+}
+
 /**
  * Create/open database
  */
@@ -144,6 +389,12 @@ URLDatabase* url_db_open(const char* db_path) {
         return NULL;
     }
     
+    // WAL lets readers proceed during writes; NORMAL sync is safe under WAL
+    sqlite3_busy_timeout(db->db, 5000);
+    for (int i = 0; PRAGMA_SQL[i] != NULL; i++) {
+        sqlite3_exec(db->db, PRAGMA_SQL[i], NULL, NULL, NULL);
+    }
+    
     // Create table
     char* err_msg = NULL;
     rc = sqlite3_exec(db->db, CREATE_TABLE_SQL, NULL, NULL, &err_msg);
@@ -164,6 +415,7 @@ URLDatabase* url_db_open(const char* db_path) {
         }
     }
     
+    pthread_mutex_init(&db->lock, NULL);
     return db;
 }
 
@@ -173,10 +425,15 @@ URLDatabase* url_db_open(const char* db_path) {
 void url_db_close(URLDatabase* db) {
     if (!db) return;
     
+    for (int i = 0; i < STMT_COUNT; i++) {
+        if (db->stmts[i]) sqlite3_finalize(db->stmts[i]);
+    }
+    
     if (db->db) {
         sqlite3_close(db->db);
     }
     
+    pthread_mutex_destroy(&db->lock);
     free(db);
 }
 
@@ -186,166 +443,134 @@ void url_db_close(URLDatabase* db) {
 int url_db_add(URLDatabase* db, const char* url, const char* source_url) {
     if (!db || !url) return -1;
     
-    // Parse URL
-    char domain[256];
-    char path[2048];
-    char query_string[1024];
-    char file_type[32];
+    pthread_mutex_lock(&db->lock);
+    int rc = insert_url(db, url, source_url, (int64_t)time(NULL));
+    pthread_mutex_unlock(&db->lock);
     
-    parse_url(url, domain, path, query_string, file_type);
+    return rc;
+}
+
+/**
+ * Add URLs in one transaction
+ */
+int url_db_add_batch(URLDatabase* db, const char* const* urls, int count, const char* source_url,
+                     bool* inserted) {
+    if (!db || !urls || count < 0) return -1;
+    if (inserted) memset(inserted, 0, count * sizeof(bool));
+    if (count == 0) return 0;
     
-    // Prepare SQL
-    const char* sql = "INSERT OR IGNORE INTO urls "
-                     "(url, domain, path, query_string, file_type, first_seen, source_url) "
-                     "VALUES (?, ?, ?, ?, ?, ?, ?);";
+    pthread_mutex_lock(&db->lock);
     
-    sqlite3_stmt* stmt;
-    int rc = sqlite3_prepare_v2(db->db, sql, -1, &stmt, NULL);
-    if (rc != SQLITE_OK) {
-        fprintf(stderr, "Failed to prepare statement: %s\n", sqlite3_errmsg(db->db));
+    if (exec_sql(db, "BEGIN IMMEDIATE;") != 0) {
+        pthread_mutex_unlock(&db->lock);
         return -1;
     }
     
-    // Bind parameters
-    sqlite3_bind_text(stmt, 1, url, -1, SQLITE_STATIC);
-    sqlite3_bind_text(stmt, 2, domain, -1, SQLITE_STATIC);
-    sqlite3_bind_text(stmt, 3, path, -1, SQLITE_STATIC);
-    sqlite3_bind_text(stmt, 4, query_string, -1, SQLITE_STATIC);
-    sqlite3_bind_text(stmt, 5, file_type, -1, SQLITE_STATIC);
-    sqlite3_bind_int64(stmt, 6, (int64_t)time(NULL));
-    sqlite3_bind_text(stmt, 7, source_url ? source_url : "", -1, SQLITE_STATIC);
-    
-    // Execute
-    rc = sqlite3_step(stmt);
-    sqlite3_finalize(stmt);
+    int64_t now = (int64_t)time(NULL);
+    int added = 0;
+    int failed = 0;
+    
+    for (int i = 0; i < count && !failed; i++) {
+        if (!urls[i] || urls[i][0] == '\0') continue;
+        if (insert_url(db, urls[i], source_url, now) != 0) {
+            failed = 1;
+        } else if (sqlite3_changes(db->db) > 0) {
+            added++;
+            if (inserted) inserted[i] = true;
+        }
+    }
     
-    if (rc != SQLITE_DONE) {
-        fprintf(stderr, "Execution failed: %s\n", sqlite3_errmsg(db->db));
-        return -1;
+    if (failed) {
+        exec_sql(db, "ROLLBACK;");
+        added = -1;
+    } else if (exec_sql(db, "COMMIT;") != 0) {
+        exec_sql(db, "ROLLBACK;");
+        added = -1;
     }
+    if (added < 0 && inserted) memset(inserted, 0, count * sizeof(bool));
     
-    return 0;
+    pthread_mutex_unlock(&db->lock);
+    return added;
 }
 
 /**
  * Remove URL from database
  */
 int url_db_remove(URLDatabase* db, uint64_t id) {
-    if (!db) return -1;
-    
-    const char* sql = "DELETE FROM urls WHERE id = ?;";
-    
-    sqlite3_stmt* stmt;
-    int rc = sqlite3_prepare_v2(db->db, sql, -1, &stmt, NULL);
-    if (rc != SQLITE_OK) return -1;
-    
-    sqlite3_bind_int64(stmt, 1, id);
-    
-    rc = sqlite3_step(stmt);
-    sqlite3_finalize(stmt);
-    
-    return (rc == SQLITE_DONE) ? 0 : -1;
+    return exec_by_id(db, STMT_REMOVE, id);
 }
 
 /**
  * Block URL
  */
 int url_db_block(URLDatabase* db, uint64_t id) {
-    if (!db) return -1;
-    
-    const char* sql = "UPDATE urls SET blocked = 1, status = 'blocked' WHERE id = ?;";
-    
-    sqlite3_stmt* stmt;
-    int rc = sqlite3_prepare_v2(db->db, sql, -1, &stmt, NULL);
-    if (rc != SQLITE_OK) return -1;
-    
-    sqlite3_bind_int64(stmt, 1, id);
-    
-    rc = sqlite3_step(stmt);
-    sqlite3_finalize(stmt);
-    
-    return (rc == SQLITE_DONE) ? 0 : -1;
+    return exec_by_id(db, STMT_BLOCK, id);
 }
 
 /**
  * Unblock URL
  */
 int url_db_unblock(URLDatabase* db, uint64_t id) {
-    if (!db) return -1;
-    
-    const char* sql = "UPDATE urls SET blocked = 0, status = 'pending' WHERE id = ?;";
-    
-    sqlite3_stmt* stmt;
-    int rc = sqlite3_prepare_v2(db->db, sql, -1, &stmt, NULL);
-    if (rc != SQLITE_OK) return -1;
-    
-    sqlite3_bind_int64(stmt, 1, id);
-    
-    rc = sqlite3_step(stmt);
-    sqlite3_finalize(stmt);
-    
-    return (rc == SQLITE_DONE) ? 0 : -1;
+    return exec_by_id(db, STMT_UNBLOCK, id);
 }
 
 /**
  * Mark URL as crawled
  */
 int url_db_mark_crawled(URLDatabase* db, uint64_t id) {
-    if (!db) return -1;
-    
-    const char* sql = "UPDATE urls SET status = 'crawled', last_crawled = ?, crawl_count = crawl_count + 1 WHERE id = ?;";
-    
-    sqlite3_stmt* stmt;
-    int rc = sqlite3_prepare_v2(db->db, sql, -1, &stmt, NULL);
-    if (rc != SQLITE_OK) return -1;
-    
-    sqlite3_bind_int64(stmt, 1, (int64_t)time(NULL));
-    sqlite3_bind_int64(stmt, 2, id);
-    
-    rc = sqlite3_step(stmt);
-    sqlite3_finalize(stmt);
-    
-    return (rc == SQLITE_DONE) ? 0 : -1;
+    return mark_status(db, id, "crawled");
 }
 
 /**
  * Mark URL as failed
  */
 int url_db_mark_failed(URLDatabase* db, uint64_t id) {
-    if (!db) return -1;
-    
-    const char* sql = "UPDATE urls SET status = 'failed' WHERE id = ?;";
-    
-    sqlite3_stmt* stmt;
-    int rc = sqlite3_prepare_v2(db->db, sql, -1, &stmt, NULL);
-    if (rc != SQLITE_OK) return -1;
-    
-    sqlite3_bind_int64(stmt, 1, id);
-    
-    rc = sqlite3_step(stmt);
-    sqlite3_finalize(stmt);
-    
-    return (rc == SQLITE_DONE) ? 0 : -1;
+    return mark_status(db, id, "failed");
 }
 
 /**
  * Mark URL as currently being crawled
  */
 int url_db_mark_crawling(URLDatabase* db, uint64_t id) {
-    if (!db) return -1;
+    return mark_status(db, id, "crawling");
+}
+
+/**
+ * Set status for many URLs in one transaction
+ */
+int url_db_mark_batch(URLDatabase* db, const uint64_t* ids, int count, const char* status) {
+    if (!db || !ids || !status || count < 0) return -1;
+    if (count == 0) return 0;
     
-    const char* sql = "UPDATE urls SET status = 'crawling' WHERE id = ?;";
+    pthread_mutex_lock(&db->lock);
     
-    sqlite3_stmt* stmt;
-    int rc = sqlite3_prepare_v2(db->db, sql, -1, &stmt, NULL);
-    if (rc != SQLITE_OK) return -1;
+    if (exec_sql(db, "BEGIN IMMEDIATE;") != 0) {
+        pthread_mutex_unlock(&db->lock);
+        return -1;
+    }
     
-    sqlite3_bind_int64(stmt, 1, id);
+    int64_t now = (int64_t)time(NULL);
+    int updated = 0;
+    int failed = 0;
     
-    rc = sqlite3_step(stmt);
-    sqlite3_finalize(stmt);
+    for (int i = 0; i < count && !failed; i++) {
+        if (update_status(db, ids[i], status, now) != 0) {
+            failed = 1;
+        } else {
+            updated += sqlite3_changes(db->db);
+        }
+    }
     
-    return (rc == SQLITE_DONE) ? 0 : -1;
+    if (failed) {
+        exec_sql(db, "ROLLBACK;");
+        updated = -1;
+    } else if (exec_sql(db, "COMMIT;") != 0) {
+        exec_sql(db, "ROLLBACK;");
+        updated = -1;
+    }
+    
+    pthread_mutex_unlock(&db->lock);
+    return updated;
 }
 
 /**
@@ -354,42 +579,129 @@ int url_db_mark_crawling(URLDatabase* db, uint64_t id) {
 URLEntry* url_db_get_next(URLDatabase* db) {
     if (!db) return NULL;
     
-    // Get highest priority uncrawled URL
-    const char* sql = "SELECT * FROM urls WHERE status = 'pending' AND blocked = 0 ORDER BY priority DESC, first_seen ASC LIMIT 1;";
+    pthread_mutex_lock(&db->lock);
     
-    sqlite3_stmt* stmt;
-    int rc = sqlite3_prepare_v2(db->db, sql, -1, &stmt, NULL);
-    if (rc != SQLITE_OK) return NULL;
+    // Get highest priority uncrawled URL (served by idx_frontier)
+    URLEntry* entry = NULL;
+    sqlite3_stmt* stmt = get_stmt(db, STMT_GET_NEXT);
+    if (stmt && sqlite3_step(stmt) == SQLITE_ROW) {
+        entry = entry_from_row(stmt);
+    }
+    if (stmt) sqlite3_reset(stmt);
     
-    rc = sqlite3_step(stmt);
-    if (rc != SQLITE_ROW) {
-        sqlite3_finalize(stmt);
+    pthread_mutex_unlock(&db->lock);
+    return entry;
+}
+
+/**
+ * Build the lease SELECT, skipping the excluded domains
+ * 
+ * Returns the cached statement when nothing is excluded; otherwise a
+ * freshly prepared one the caller must finalize (*owned is set).
+ */
+static sqlite3_stmt* prepare_lease_select(URLDatabase* db, int num_excluded, int* owned) {
+    *owned = 0;
+    if (num_excluded <= 0) return get_stmt(db, STMT_LEASE_SELECT);
+    
+    size_t size = 256 + (size_t)num_excluded * 2;
+    char* sql = (char*)malloc(size);
+    if (!sql) return NULL;
+    
+    size_t len = (size_t)snprintf(sql, size, "SELECT * FROM urls WHERE status = 'pending' "
+                                  "AND blocked = 0 AND domain NOT IN (");
+    for (int i = 0; i < num_excluded; i++) {
+        if (i) sql[len++] = ',';
+        sql[len++] = '?';
+    }
+    snprintf(sql + len, size - len, ") ORDER BY priority DESC, first_seen ASC LIMIT ?;");
+    
+    sqlite3_stmt* stmt = NULL;
+    if (sqlite3_prepare_v2(db->db, sql, -1, &stmt, NULL) != SQLITE_OK) {
+        fprintf(stderr, "Failed to prepare statement: %s\n", sqlite3_errmsg(db->db));
+        stmt = NULL;
+    } else {
+        *owned = 1;
+    }
+    
+    free(sql);
+    return stmt;
+}
+
+/**
+ * Lease next pending URLs
+ */
+URLEntry** url_db_lease_next(URLDatabase* db, int n, int* count) {
+    return url_db_lease_next_excluding(db, n, NULL, 0, count);
+}
+
+/**
+ * Lease next pending URLs outside the given domains
+ */
+URLEntry** url_db_lease_next_excluding(URLDatabase* db, int n, const char* const* exclude_domains,
+                                       int num_excluded, int* count) {
+    if (count) *count = 0;
+    if (!db || !count || n <= 0) return NULL;
+    if (!exclude_domains) num_excluded = 0;
+    
+    URLEntry** entries = (URLEntry**)calloc(n, sizeof(URLEntry*));
+    if (!entries) return NULL;
+    
+    pthread_mutex_lock(&db->lock);
+    
+    // IMMEDIATE takes the write lock up front, so no other connection can
+    // claim the same rows between the SELECT and the UPDATE
+    if (exec_sql(db, "BEGIN IMMEDIATE;") != 0) {
+        pthread_mutex_unlock(&db->lock);
+        free(entries);
         return NULL;
     }
     
-    // Create entry
-    URLEntry* entry = (URLEntry*)calloc(1, sizeof(URLEntry));
-    if (!entry) {
-        sqlite3_finalize(stmt);
+    int found = 0;
+    int owned = 0;
+    sqlite3_stmt* stmt = prepare_lease_select(db, num_excluded, &owned);
+    if (stmt) {
+        for (int i = 0; i < num_excluded; i++) {
+            sqlite3_bind_text(stmt, i + 1, exclude_domains[i], -1, SQLITE_STATIC);
+        }
+        sqlite3_bind_int(stmt, num_excluded + 1, n);
+        while (found < n && sqlite3_step(stmt) == SQLITE_ROW) {
+            URLEntry* entry = entry_from_row(stmt);
+            if (!entry) break;
+            entries[found++] = entry;
+        }
+        if (owned) {
+            sqlite3_finalize(stmt);
+        } else {
+            sqlite3_reset(stmt);
+        }
+    }
+    
+    int failed = (stmt == NULL);
+    int64_t now = (int64_t)time(NULL);
+    for (int i = 0; i < found && !failed; i++) {
+        if (update_status(db, entries[i]->id, "crawling", now) != 0) {
+            failed = 1;
+        } else {
+            strcpy(entries[i]->status, "crawling");
+        }
+    }
+    
+    if (failed || exec_sql(db, "COMMIT;") != 0) {
+        exec_sql(db, "ROLLBACK;");
+        pthread_mutex_unlock(&db->lock);
+        url_db_free_entries(entries, found);
         return NULL;
     }
     
-    entry->id = sqlite3_column_int64(stmt, 0);
-    strncpy(entry->url, (const char*)sqlite3_column_text(stmt, 1), sizeof(entry->url) - 1);
-    strncpy(entry->domain, (const char*)sqlite3_column_text(stmt, 2), sizeof(entry->domain) - 1);
-    strncpy(entry->path, (const char*)sqlite3_column_text(stmt, 3), sizeof(entry->path) - 1);
-    strncpy(entry->query_string, (const char*)sqlite3_column_text(stmt, 4), sizeof(entry->query_string) - 1);
-    strncpy(entry->file_type, (const char*)sqlite3_column_text(stmt, 5), sizeof(entry->file_type) - 1);
-    entry->first_seen = sqlite3_column_int64(stmt, 6);
-    entry->last_crawled = sqlite3_column_int64(stmt, 7);
-    entry->crawl_count = sqlite3_column_int(stmt, 8);
-    entry->priority = sqlite3_column_int(stmt, 9);
-    strncpy(entry->status, (const char*)sqlite3_column_text(stmt, 10), sizeof(entry->status) - 1);
-    strncpy(entry->source_url, (const char*)sqlite3_column_text(stmt, 11), sizeof(entry->source_url) - 1);
-    entry->blocked = sqlite3_column_int(stmt, 12) != 0;
+    pthread_mutex_unlock(&db->lock);
     
-    sqlite3_finalize(stmt);
-    return entry;
+    if (found == 0) {
+        free(entries);
+        return NULL;
+    }
+    
+    *count = found;
+    return entries;
 }
 
 /**
@@ -408,15 +720,21 @@ URLEntry** url_db_query(URLDatabase* db, const char* filter, int* count) {
         snprintf(sql, sizeof(sql), "SELECT * FROM urls ORDER BY priority DESC, first_seen ASC;");
     }
     
+    pthread_mutex_lock(&db->lock);
+    
+    // Ad-hoc filters are not cached
     sqlite3_stmt* stmt;
     int rc = sqlite3_prepare_v2(db->db, sql, -1, &stmt, NULL);
-    if (rc != SQLITE_OK) return NULL;
+    if (rc != SQLITE_OK) {
+        pthread_mutex_unlock(&db->lock);
+        return NULL;
+    }
     
-    // Count results first
     int capacity = 100;
     URLEntry** entries = (URLEntry**)calloc(capacity, sizeof(URLEntry*));
     if (!entries) {
         sqlite3_finalize(stmt);
+        pthread_mutex_unlock(&db->lock);
         return NULL;
     }
     
@@ -427,40 +745,24 @@ URLEntry** url_db_query(URLDatabase* db, const char* filter, int* count) {
             capacity *= 2;
             URLEntry** new_entries = (URLEntry**)realloc(entries, capacity * sizeof(URLEntry*));
             if (!new_entries) {
-                // Free existing entries
-                for (int i = 0; i < *count; i++) {
-                    free(entries[i]);
-                }
-                free(entries);
+                url_db_free_entries(entries, *count);
+                *count = 0;
                 sqlite3_finalize(stmt);
+                pthread_mutex_unlock(&db->lock);
                 return NULL;
             }
             entries = new_entries;
         }
         
-        // Create entry
-        URLEntry* entry = (URLEntry*)calloc(1, sizeof(URLEntry));
+        URLEntry* entry = entry_from_row(stmt);
         if (!entry) continue;
         
-        entry->id = sqlite3_column_int64(stmt, 0);
-        strncpy(entry->url, (const char*)sqlite3_column_text(stmt, 1), sizeof(entry->url) - 1);
-        strncpy(entry->domain, (const char*)sqlite3_column_text(stmt, 2), sizeof(entry->domain) - 1);
-        strncpy(entry->path, (const char*)sqlite3_column_text(stmt, 3), sizeof(entry->path) - 1);
-        strncpy(entry->query_string, (const char*)sqlite3_column_text(stmt, 4), sizeof(entry->query_string) - 1);
-        strncpy(entry->file_type, (const char*)sqlite3_column_text(stmt, 5), sizeof(entry->file_type) - 1);
-        entry->first_seen = sqlite3_column_int64(stmt, 6);
-        entry->last_crawled = sqlite3_column_int64(stmt, 7);
-        entry->crawl_count = sqlite3_column_int(stmt, 8);
-        entry->priority = sqlite3_column_int(stmt, 9);
-        strncpy(entry->status, (const char*)sqlite3_column_text(stmt, 10), sizeof(entry->status) - 1);
-        strncpy(entry->source_url, (const char*)sqlite3_column_text(stmt, 11), sizeof(entry->source_url) - 1);
-        entry->blocked = sqlite3_column_int(stmt, 12) != 0;
-        
         entries[*count] = entry;
         (*count)++;
     }
     
     sqlite3_finalize(stmt);
+    pthread_mutex_unlock(&db->lock);
     return entries;
 }
 
@@ -470,43 +772,42 @@ URLEntry** url_db_query(URLDatabase* db, const char* filter, int* count) {
 URLEntry* url_db_get_by_id(URLDatabase* db, uint64_t id) {
     if (!db) return NULL;
     
-    const char* sql = "SELECT * FROM urls WHERE id = ?;";
+    pthread_mutex_lock(&db->lock);
     
-    sqlite3_stmt* stmt;
-    int rc = sqlite3_prepare_v2(db->db, sql, -1, &stmt, NULL);
-    if (rc != SQLITE_OK) return NULL;
+    URLEntry* entry = NULL;
+    sqlite3_stmt* stmt = get_stmt(db, STMT_GET_BY_ID);
+    if (stmt) {
+        sqlite3_bind_int64(stmt, 1, id);
+        if (sqlite3_step(stmt) == SQLITE_ROW) {
+            entry = entry_from_row(stmt);
+        }
+        sqlite3_reset(stmt);
+    }
     
-    sqlite3_bind_int64(stmt, 1, id);
+    pthread_mutex_unlock(&db->lock);
+    return entry;
+}
+
+/**
+ * Find URL ID
+ */
+uint64_t url_db_find_id(URLDatabase* db, const char* url) {
+    if (!db || !url) return 0;
     
-    rc = sqlite3_step(stmt);
-    if (rc != SQLITE_ROW) {
-        sqlite3_finalize(stmt);
-        return NULL;
-    }
+    pthread_mutex_lock(&db->lock);
     
-    // Create entry
-    URLEntry* entry = (URLEntry*)calloc(1, sizeof(URLEntry));
-    if (!entry) {
-        sqlite3_finalize(stmt);
-        return NULL;
+    uint64_t id = 0;
+    sqlite3_stmt* stmt = get_stmt(db, STMT_FIND_ID);
+    if (stmt) {
+        sqlite3_bind_text(stmt, 1, url, -1, SQLITE_STATIC);
+        if (sqlite3_step(stmt) == SQLITE_ROW) {
+            id = sqlite3_column_int64(stmt, 0);
+        }
+        sqlite3_reset(stmt);
     }
     
-    entry->id = sqlite3_column_int64(stmt, 0);
-    strncpy(entry->url, (const char*)sqlite3_column_text(stmt, 1), sizeof(entry->url) - 1);
-    strncpy(entry->domain, (const char*)sqlite3_column_text(stmt, 2), sizeof(entry->domain) - 1);
-    strncpy(entry->path, (const char*)sqlite3_column_text(stmt, 3), sizeof(entry->path) - 1);
-    strncpy(entry->query_string, (const char*)sqlite3_column_text(stmt, 4), sizeof(entry->query_string) - 1);
-    strncpy(entry->file_type, (const char*)sqlite3_column_text(stmt, 5), sizeof(entry->file_type) - 1);
-    entry->first_seen = sqlite3_column_int64(stmt, 6);
-    entry->last_crawled = sqlite3_column_int64(stmt, 7);
-    entry->crawl_count = sqlite3_column_int(stmt, 8);
-    entry->priority = sqlite3_column_int(stmt, 9);
-    strncpy(entry->status, (const char*)sqlite3_column_text(stmt, 10), sizeof(entry->status) - 1);
-    strncpy(entry->source_url, (const char*)sqlite3_column_text(stmt, 11), sizeof(entry->source_url) - 1);
-    entry->blocked = sqlite3_column_int(stmt, 12) != 0;
-    
-    sqlite3_finalize(stmt);
-    return entry;
+    pthread_mutex_unlock(&db->lock);
+    return id;
 }
 
 /**
@@ -515,110 +816,46 @@ URLEntry* url_db_get_by_id(URLDatabase* db, uint64_t id) {
 bool url_db_exists(URLDatabase* db, const char* url) {
     if (!db || !url) return false;
     
-    const char* sql = "SELECT COUNT(*) FROM urls WHERE url = ?;";
-    
-    sqlite3_stmt* stmt;
-    int rc = sqlite3_prepare_v2(db->db, sql, -1, &stmt, NULL);
-    if (rc != SQLITE_OK) return false;
+    pthread_mutex_lock(&db->lock);
     
-    sqlite3_bind_text(stmt, 1, url, -1, SQLITE_STATIC);
-    
-    rc = sqlite3_step(stmt);
-    int count = 0;
-    if (rc == SQLITE_ROW) {
-        count = sqlite3_column_int(stmt, 0);
+    bool exists = false;
+    sqlite3_stmt* stmt = get_stmt(db, STMT_EXISTS);
+    if (stmt) {
+        sqlite3_bind_text(stmt, 1, url, -1, SQLITE_STATIC);
+        exists = (sqlite3_step(stmt) == SQLITE_ROW);
+        sqlite3_reset(stmt);
     }
     
-    sqlite3_finalize(stmt);
-    return count > 0;
+    pthread_mutex_unlock(&db->lock);
+    return exists;
 }
 
 /**
  * Get total URL count
  */
 int url_db_count_total(URLDatabase* db) {
-    if (!db) return 0;
-    
-    const char* sql = "SELECT COUNT(*) FROM urls;";
-    
-    sqlite3_stmt* stmt;
-    int rc = sqlite3_prepare_v2(db->db, sql, -1, &stmt, NULL);
-    if (rc != SQLITE_OK) return 0;
-    
-    rc = sqlite3_step(stmt);
-    int count = 0;
-    if (rc == SQLITE_ROW) {
-        count = sqlite3_column_int(stmt, 0);
-    }
-    
-    sqlite3_finalize(stmt);
-    return count;
+    return count_query(db, STMT_COUNT_TOTAL);
 }
 
 /**
  * Get pending URL count
  */
 int url_db_count_pending(URLDatabase* db) {
-    if (!db) return 0;
-    
-    const char* sql = "SELECT COUNT(*) FROM urls WHERE status = 'pending' AND blocked = 0;";
-    
-    sqlite3_stmt* stmt;
-    int rc = sqlite3_prepare_v2(db->db, sql, -1, &stmt, NULL);
-    if (rc != SQLITE_OK) return 0;
-    
-    rc = sqlite3_step(stmt);
-    int count = 0;
-    if (rc == SQLITE_ROW) {
-        count = sqlite3_column_int(stmt, 0);
-    }
-    
-    sqlite3_finalize(stmt);
-    return count;
+    return count_query(db, STMT_COUNT_PENDING);
 }
 
 /**
  * Get crawled URL count
  */
 int url_db_count_crawled(URLDatabase* db) {
-    if (!db) return 0;
-    
-    const char* sql = "SELECT COUNT(*) FROM urls WHERE status = 'crawled';";
-    
-    sqlite3_stmt* stmt;
-    int rc = sqlite3_prepare_v2(db->db, sql, -1, &stmt, NULL);
-    if (rc != SQLITE_OK) return 0;
-    
-    rc = sqlite3_step(stmt);
-    int count = 0;
-    if (rc == SQLITE_ROW) {
-        count = sqlite3_column_int(stmt, 0);
-    }
-    
-    sqlite3_finalize(stmt);
-    return count;
+    return count_query(db, STMT_COUNT_CRAWLED);
 }
 
 /**
  * Get blocked URL count
  */
 int url_db_count_blocked(URLDatabase* db) {
-    if (!db) return 0;
-    
-    const char* sql = "SELECT COUNT(*) FROM urls WHERE blocked = 1;";
-    
-    sqlite3_stmt* stmt;
-    int rc = sqlite3_prepare_v2(db->db, sql, -1, &stmt, NULL);
-    if (rc != SQLITE_OK) return 0;
-    
-    rc = sqlite3_step(stmt);
-    int count = 0;
-    if (rc == SQLITE_ROW) {
-        count = sqlite3_column_int(stmt, 0);
-    }
-    
-    sqlite3_finalize(stmt);
-    return count;
+    return count_query(db, STMT_COUNT_BLOCKED);
 }
 
 /**
@@ -650,12 +887,16 @@ int url_db_export(URLDatabase* db, const char* file_path) {
 /**
  * Import URLs from file
  */
+#define IMPORT_BATCH_SIZE 1000
+
 int url_db_import(URLDatabase* db, const char* file_path) {
     if (!db || !file_path) return -1;
     
     FILE* fp = fopen(file_path, "r");
     if (!fp) return -1;
     
+    char* batch[IMPORT_BATCH_SIZE];
+    int batch_count = 0;
     char line[4096];
     int imported = 0;
     
@@ -669,16 +910,52 @@ int url_db_import(URLDatabase* db, const char* file_path) {
         // Skip empty lines
         if (line[0] == '\0') continue;
         
-        // Add URL
-        if (url_db_add(db, line, NULL) == 0) {
-            imported++;
+        batch[batch_count] = strdup(line);
+        if (batch[batch_count]) batch_count++;
+        
+        // Add URLs, one transaction per batch
+        if (batch_count == IMPORT_BATCH_SIZE) {
+            int added = url_db_add_batch(db, (const char* const*)batch, batch_count, NULL, NULL);
+            if (added > 0) imported += added;
+            for (int i = 0; i < batch_count; i++) free(batch[i]);
+            batch_count = 0;
         }
     }
     
+    if (batch_count > 0) {
+        int added = url_db_add_batch(db, (const char* const*)batch, batch_count, NULL, NULL);
+        if (added > 0) imported += added;
+        for (int i = 0; i < batch_count; i++) free(batch[i]);
+    }
+    
     fclose(fp);
     return imported;
 }
 
+/**
+ * Return URLs left 'crawling' to pending
+ */
+int url_db_release_leases(URLDatabase* db) {
+    if (!db || !db->db) return -1;
+    
+    pthread_mutex_lock(&db->lock);
+    
+    char* err_msg = NULL;
+    int rc = sqlite3_exec(db->db, "UPDATE urls SET status = 'pending' WHERE status = 'crawling';",
+                          NULL, NULL, &err_msg);
+    if (rc != SQLITE_OK) {
+        fprintf(stderr, "ERROR: Failed to release leased URLs: %s\n", err_msg);
+        sqlite3_free(err_msg);
+        pthread_mutex_unlock(&db->lock);
+        return -1;
+    }
+    
+    int changes = sqlite3_changes(db->db);
+    pthread_mutex_unlock(&db->lock);
+    
+    return changes;
+}
+
 /**
  * Free URL entry
  */
@@ -711,16 +988,20 @@ int url_db_reset_all_to_pending(URLDatabase* db) {
     
     const char* sql = "UPDATE urls SET status = 'pending', last_crawled = NULL, crawl_count = 0 WHERE status != 'pending';";
     
+    pthread_mutex_lock(&db->lock);
+    
     char* err_msg = NULL;
     int rc = sqlite3_exec(db->db, sql, NULL, NULL, &err_msg);
     
     if (rc != SQLITE_OK) {
         fprintf(stderr, "ERROR: Failed to reset URLs: %s\n", err_msg);
         sqlite3_free(err_msg);
+        pthread_mutex_unlock(&db->lock);
         return -1;
     }
     
     int changes = sqlite3_changes(db->db);
+    pthread_mutex_unlock(&db->lock);
     printf("Reset %d URLs to pending status\n", changes);
     
     return changes;
@@ -15,6 +15,9 @@
  * - Status tracking (pending, crawled, failed, blocked)
  * - Domain and file type categorization
  * - Export/import functionality
+ * - Batched inserts/updates and multi-URL leases for crawler workers
+ * 
+ * A handle may be shared between threads; calls are serialized internally.
  */
 
 // URL entry in database
@@ -62,6 +65,22 @@ void url_db_close(URLDatabase* db);
  */
 int url_db_add(URLDatabase* db, const char* url, const char* source_url);
 
+/**
+ * Add many URLs in a single transaction
+ * 
+ * Duplicates are ignored, as with url_db_add. On error nothing is added.
+ * 
+ * @param db Database handle
+ * @param urls Array of full URLs (NULL or empty entries are skipped)
+ * @param count Number of URLs
+ * @param source_url URL that linked to these (can be NULL)
+ * @param inserted Set per URL to whether it was newly inserted (can be NULL;
+ *                 all false on error)
+ * @return Number of new URLs inserted, -1 on error
+ */
+int url_db_add_batch(URLDatabase* db, const char* const* urls, int count, const char* source_url,
+                     bool* inserted);
+
 /**
  * Remove URL from database
  * 
@@ -116,6 +135,19 @@ int url_db_mark_failed(URLDatabase* db, uint64_t id);
  */
 int url_db_mark_crawling(URLDatabase* db, uint64_t id);
 
+/**
+ * Set status of many URLs in a single transaction
+ * 
+ * "crawled" also updates last_crawled and crawl_count, as url_db_mark_crawled.
+ * 
+ * @param db Database handle
+ * @param ids Array of URL IDs
+ * @param count Number of IDs
+ * @param status New status (pending, crawling, crawled, failed)
+ * @return Number of URLs updated, -1 on error (nothing is updated)
+ */
+int url_db_mark_batch(URLDatabase* db, const uint64_t* ids, int count, const char* status);
+
 /**
  * Get next URL to crawl (highest priority, uncrawled)
  * 
@@ -124,6 +156,37 @@ int url_db_mark_crawling(URLDatabase* db, uint64_t id);
  */
 URLEntry* url_db_get_next(URLDatabase* db);
 
+/**
+ * Atomically claim up to n pending URLs for a worker
+ * 
+ * The highest priority pending URLs are marked 'crawling' in the same
+ * transaction that selects them, so concurrent workers (threads or
+ * processes sharing the database file) never receive the same URL.
+ * 
+ * @param db Database handle
+ * @param n Maximum number of URLs to claim
+ * @param count Output: number of URLs claimed
+ * @return Array of URL entries (free with url_db_free_entries) or NULL if none
+ */
+URLEntry** url_db_lease_next(URLDatabase* db, int n, int* count);
+
+/**
+ * Claim up to n pending URLs whose domain is not in exclude_domains
+ * 
+ * Same as url_db_lease_next, but lets a caller skip domains it cannot
+ * fetch from right now (e.g. over their crawl budget) instead of claiming
+ * and returning them.
+ * 
+ * @param db Database handle
+ * @param n Maximum number of URLs to claim
+ * @param exclude_domains Domains to skip (can be NULL)
+ * @param num_excluded Number of domains in exclude_domains
+ * @param count Output: number of URLs claimed
+ * @return Array of URL entries (free with url_db_free_entries) or NULL if none
+ */
+URLEntry** url_db_lease_next_excluding(URLDatabase* db, int n, const char* const* exclude_domains,
+                                       int num_excluded, int* count);
+
 /**
  * Query URLs with filter
  * 
@@ -152,6 +215,15 @@ URLEntry* url_db_get_by_id(URLDatabase* db, uint64_t id);
  */
 bool url_db_exists(URLDatabase* db, const char* url);
 
+/**
+ * Find URL ID by URL
+ * 
+ * @param db Database handle
+ * @param url Full URL to look up
+ * @return URL ID, or 0 if not found
+ */
+uint64_t url_db_find_id(URLDatabase* db, const char* url);
+
 /**
  * Get total URL count
  * 
@@ -210,6 +282,18 @@ int url_db_import(URLDatabase* db, const char* file_path);
  */
 int url_db_reset_all_to_pending(URLDatabase* db);
 
+/**
+ * Return every URL left 'crawling' to pending
+ * 
+ * Leases are not tied to a process, so URLs claimed by a run that stopped
+ * (or crashed) before marking them stay 'crawling'. Call this when a
+ * crawler starts, before it leases anything.
+ * 
+ * @param db Database handle
+ * @return Number of URLs released, -1 on error
+ */
+int url_db_release_leases(URLDatabase* db);
+
 /**
  * Free URL entry
  * 
@@ -6,20 +6,47 @@
  * - Domain whitelist/blacklist
  * - URL pattern matching (regex)
  * - GET parameter handling
+ * 
+ * Domain lists and patterns are mirrored into compiled URLMatchers, so
+ * a check does not loop over every entry.
  */
 
 #include "url_filter.h"
+#include "url_matcher.h"
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
-#include <regex.h>
 
 // Filter structure
 struct URLFilter {
     URLFilterConfig config;
-    regex_t* compiled_patterns;  // Compiled regex patterns
+    URLMatcher* whitelist;       // Compiled domain whitelist
+    URLMatcher* blacklist;       // Compiled domain blacklist
+    URLMatcher* patterns;        // Compiled regex patterns
 };
 
+/**
+ * Recompile a domain list (after a removal)
+ */
+static void compile_domains(URLMatcher* matcher, char** domains, int count) {
+    url_matcher_clear(matcher);
+    for (int i = 0; i < count; i++) {
+        url_matcher_add(matcher, URL_RULE_DOMAIN, domains[i], i);
+    }
+    url_matcher_compile(matcher);
+}
+
+/**
+ * Recompile the URL patterns (after a removal)
+ */
+static void compile_patterns(URLFilter* filter) {
+    url_matcher_clear(filter->patterns);
+    for (int i = 0; i < filter->config.pattern_count; i++) {
+        url_matcher_add(filter->patterns, URL_RULE_REGEX, filter->config.url_patterns[i], i);
+    }
+    url_matcher_compile(filter->patterns);
+}
+
 /**
  * Initialize default configuration
  */
@@ -58,6 +85,17 @@ URLFilter* url_filter_create(URLFilterConfig* config) {
     URLFilter* filter = (URLFilter*)calloc(1, sizeof(URLFilter));
     if (!filter) return NULL;
     
+    filter->whitelist = url_matcher_create();
+    filter->blacklist = url_matcher_create();
+    filter->patterns = url_matcher_create();
+    if (!filter->whitelist || !filter->blacklist || !filter->patterns) {
+        url_matcher_destroy(filter->whitelist);
+        url_matcher_destroy(filter->blacklist);
+        url_matcher_destroy(filter->patterns);
+        free(filter);
+        return NULL;
+    }
+    
     if (config) {
         // Copy provided config
         memcpy(&filter->config, config, sizeof(URLFilterConfig));
@@ -68,6 +106,7 @@ URLFilter* url_filter_create(URLFilterConfig* config) {
             for (int i = 0; i < config->whitelist_count; i++) {
                 filter->config.domain_whitelist[i] = strdup(config->domain_whitelist[i]);
             }
+            compile_domains(filter->whitelist, filter->config.domain_whitelist, config->whitelist_count);
         }
         
         if (config->domain_blacklist && config->blacklist_count > 0) {
@@ -75,21 +114,21 @@ URLFilter* url_filter_create(URLFilterConfig* config) {
             for (int i = 0; i < config->blacklist_count; i++) {
                 filter->config.domain_blacklist[i] = strdup(config->domain_blacklist[i]);
             }
+            compile_domains(filter->blacklist, filter->config.domain_blacklist, config->blacklist_count);
         }
         
         if (config->url_patterns && config->pattern_count > 0) {
             filter->config.url_patterns = (char**)calloc(config->pattern_count, sizeof(char*));
-            filter->compiled_patterns = (regex_t*)calloc(config->pattern_count, sizeof(regex_t));
             
             for (int i = 0; i < config->pattern_count; i++) {
                 filter->config.url_patterns[i] = strdup(config->url_patterns[i]);
                 
                 // Compile regex
-                int ret = regcomp(&filter->compiled_patterns[i], config->url_patterns[i], REG_EXTENDED | REG_NOSUB);
-                if (ret != 0) {
+                if (url_matcher_add(filter->patterns, URL_RULE_REGEX, config->url_patterns[i], i) != 0) {
                     fprintf(stderr, "Warning: Failed to compile regex pattern: %s\n", config->url_patterns[i]);
                 }
             }
+            url_matcher_compile(filter->patterns);
         }
         
         if (config->tracking_param_names && config->tracking_param_count > 0) {
@@ -132,12 +171,14 @@ void url_filter_destroy(URLFilter* filter) {
     if (filter->config.url_patterns) {
         for (int i = 0; i < filter->config.pattern_count; i++) {
             free(filter->config.url_patterns[i]);
-            regfree(&filter->compiled_patterns[i]);
         }
         free(filter->config.url_patterns);
-        free(filter->compiled_patterns);
     }
     
+    url_matcher_destroy(filter->whitelist);
+    url_matcher_destroy(filter->blacklist);
+    url_matcher_destroy(filter->patterns);
+    
     // Free tracking param names
     if (filter->config.tracking_param_names) {
         for (int i = 0; i < filter->config.tracking_param_count; i++) {
@@ -256,29 +297,22 @@ bool url_filter_is_allowed_type(URLFilter* filter, const char* file_type) {
 
 /**
  * Check if domain is allowed
+ * 
+ * List entries also cover their subdomains.
  */
 bool url_filter_is_allowed_domain(URLFilter* filter, const char* domain) {
     if (!filter || !domain) return false;
     
     // If whitelist exists, domain must be in it
-    if (filter->config.domain_whitelist && filter->config.whitelist_count > 0) {
-        bool found = false;
-        for (int i = 0; i < filter->config.whitelist_count; i++) {
-            if (strcmp(filter->config.domain_whitelist[i], domain) == 0) {
-                found = true;
-                break;
-            }
-        }
-        if (!found) return false;
+    if (filter->config.whitelist_count > 0 &&
+        url_matcher_match_host(filter->whitelist, domain) < 0) {
+        return false;
     }
     
     // Check blacklist
-    if (filter->config.domain_blacklist && filter->config.blacklist_count > 0) {
-        for (int i = 0; i < filter->config.blacklist_count; i++) {
-            if (strcmp(filter->config.domain_blacklist[i], domain) == 0) {
-                return false;
-            }
-        }
+    if (filter->config.blacklist_count > 0 &&
+        url_matcher_match_host(filter->blacklist, domain) >= 0) {
+        return false;
     }
     
     return true;
@@ -290,18 +324,11 @@ bool url_filter_is_allowed_domain(URLFilter* filter, const char* domain) {
 bool url_filter_matches_pattern(URLFilter* filter, const char* url) {
     if (!filter || !url) return false;
     
-    if (!filter->config.url_patterns || filter->config.pattern_count == 0) {
+    if (filter->config.pattern_count == 0) {
         return false;
     }
     
-    for (int i = 0; i < filter->config.pattern_count; i++) {
-        int ret = regexec(&filter->compiled_patterns[i], url, 0, NULL, 0);
-        if (ret == 0) {
-            return true;  // Match found
-        }
-    }
-    
-    return false;
+    return url_matcher_match(filter->patterns, url) >= 0;
 }
 
 /**
@@ -356,6 +383,7 @@ int url_filter_add_domain_whitelist(URLFilter* filter, const char* domain) {
     
     filter->config.domain_whitelist = new_list;
     filter->config.domain_whitelist[filter->config.whitelist_count] = strdup(domain);
+    url_matcher_add(filter->whitelist, URL_RULE_DOMAIN, domain, filter->config.whitelist_count);
     filter->config.whitelist_count++;
     
     return 0;
@@ -381,48 +409,47 @@ int url_filter_add_domain_blacklist(URLFilter* filter, const char* domain) {
     
     filter->config.domain_blacklist = new_list;
     filter->config.domain_blacklist[filter->config.blacklist_count] = strdup(domain);
+    url_matcher_add(filter->blacklist, URL_RULE_DOMAIN, domain, filter->config.blacklist_count);
     filter->config.blacklist_count++;
     
     return 0;
 }
 
 /**
- * Add URL pattern
+ * Add URL pattern, optionally deferring the prefilter rebuild
  */
-int url_filter_add_pattern(URLFilter* filter, const char* pattern) {
+static int add_pattern(URLFilter* filter, const char* pattern, bool compile) {
     if (!filter || !pattern) return -1;
     
-    // Expand arrays
+    // Expand array
     char** new_patterns = (char**)realloc(filter->config.url_patterns, 
                                           (filter->config.pattern_count + 1) * sizeof(char*));
     if (!new_patterns) return -1;
     
-    regex_t* new_compiled = (regex_t*)realloc(filter->compiled_patterns, 
-                                              (filter->config.pattern_count + 1) * sizeof(regex_t));
-    if (!new_compiled) {
-        free(new_patterns);
-        return -1;
-    }
-    
     filter->config.url_patterns = new_patterns;
-    filter->compiled_patterns = new_compiled;
-    
-    // Add pattern
-    filter->config.url_patterns[filter->config.pattern_count] = strdup(pattern);
     
     // Compile regex
-    int ret = regcomp(&filter->compiled_patterns[filter->config.pattern_count], 
-                     pattern, REG_EXTENDED | REG_NOSUB);
-    if (ret != 0) {
+    if (url_matcher_add(filter->patterns, URL_RULE_REGEX, pattern, filter->config.pattern_count) != 0) {
         fprintf(stderr, "Warning: Failed to compile regex pattern: %s\n", pattern);
-        free(filter->config.url_patterns[filter->config.pattern_count]);
         return -1;
     }
+    if (compile) {
+        url_matcher_compile(filter->patterns);
+    }
     
+    // Add pattern
+    filter->config.url_patterns[filter->config.pattern_count] = strdup(pattern);
     filter->config.pattern_count++;
     return 0;
 }
 
+/**
+ * Add URL pattern
+ */
+int url_filter_add_pattern(URLFilter* filter, const char* pattern) {
+    return add_pattern(filter, pattern, true);
+}
+
 /**
  * Remove domain from whitelist
  */
@@ -439,6 +466,7 @@ int url_filter_remove_domain_whitelist(URLFilter* filter, const char* domain) {
             }
             
             filter->config.whitelist_count--;
+            compile_domains(filter->whitelist, filter->config.domain_whitelist, filter->config.whitelist_count);
             return 0;
         }
     }
@@ -462,6 +490,7 @@ int url_filter_remove_domain_blacklist(URLFilter* filter, const char* domain) {
             }
             
             filter->config.blacklist_count--;
+            compile_domains(filter->blacklist, filter->config.domain_blacklist, filter->config.blacklist_count);
             return 0;
         }
     }
@@ -478,15 +507,14 @@ int url_filter_remove_pattern(URLFilter* filter, const char* pattern) {
     for (int i = 0; i < filter->config.pattern_count; i++) {
         if (strcmp(filter->config.url_patterns[i], pattern) == 0) {
             free(filter->config.url_patterns[i]);
-            regfree(&filter->compiled_patterns[i]);
             
             // Shift remaining elements
             for (int j = i; j < filter->config.pattern_count - 1; j++) {
                 filter->config.url_patterns[j] = filter->config.url_patterns[j + 1];
-                filter->compiled_patterns[j] = filter->compiled_patterns[j + 1];
             }
             
             filter->config.pattern_count--;
+            compile_patterns(filter);
             return 0;
         }
     }
@@ -630,7 +658,7 @@ int url_filter_load(URLFilter* filter, const char* file_path) {
         } else if (strcmp(section, "domain_blacklist") == 0) {
             url_filter_add_domain_blacklist(filter, line);
         } else if (strcmp(section, "url_patterns") == 0) {
-            url_filter_add_pattern(filter, line);
+            add_pattern(filter, line, false);
         } else if (strcmp(section, "query_params") == 0) {
             char* eq = strchr(line, '=');
             if (eq) {
@@ -648,5 +676,6 @@ int url_filter_load(URLFilter* filter, const char* file_path) {
     }
     
     fclose(fp);
+    url_matcher_compile(filter->patterns);
     return 0;
 }
\ No newline at end of file
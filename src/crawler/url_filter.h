@@ -8,7 +8,7 @@
  * 
  * Features:
  * - File type filtering (allow/block)
- * - Domain whitelist/blacklist
+ * - Domain whitelist/blacklist (entries cover subdomains)
  * - URL pattern matching (regex)
  * - GET parameter handling
  */
@@ -0,0 +1,674 @@
+/**
+ * Compiled URL Rule Set Implementation
+ *
+ * Hash tables for exact URLs and domains, a byte trie for path prefixes
+ * and an Aho-Corasick literal prefilter in front of the regexes.
+ */
+
+#include "url_matcher.h"
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <stdint.h>
+#include <regex.h>
+
+#define URL_MATCHER_MAX_HOST 256
+#define URL_MATCHER_MIN_LITERAL 3      // Shorter literals filter too little
+#define URL_MATCHER_TRIED_SLOTS 32     // Regexes remembered per match call
+
+// ============================================================================
+// STRING TABLE (exact URLs, domains)
+// ============================================================================
+
+typedef struct {
+    uint64_t hash;
+    char* key;                 // NULL marks an empty slot
+    size_t len;
+    int value;
+} StrSlot;
+
+typedef struct {
+    StrSlot* slots;
+    size_t mask;               // Capacity - 1 (power of two)
+    size_t count;
+} StrTable;
+
+static uint64_t hash_bytes(const char* data, size_t len) {
+    uint64_t h = 1469598103934665603ULL;
+    for (size_t i = 0; i < len; i++) {
+        h ^= (unsigned char)data[i];
+        h *= 1099511628211ULL;
+    }
+    h ^= h >> 33;
+    h *= 0xff51afd7ed558ccdULL;
+    h ^= h >> 33;
+    return h;
+}
+
+static int str_table_get(const StrTable* table, const char* key, size_t len) {
+    if (table->count == 0) return -1;
+    
+    uint64_t hash = hash_bytes(key, len);
+    for (size_t i = hash & table->mask;; i = (i + 1) & table->mask) {
+        const StrSlot* slot = &table->slots[i];
+        if (!slot->key) return -1;
+        if (slot->hash == hash && slot->len == len && memcmp(slot->key, key, len) == 0) {
+            return slot->value;
+        }
+    }
+}
+
+static int str_table_grow(StrTable* table) {
+    size_t capacity = table->slots ? (table->mask + 1) * 2 : 64;
+    StrSlot* slots = (StrSlot*)calloc(capacity, sizeof(StrSlot));
+    if (!slots) return -1;
+    
+    size_t mask = capacity - 1;
+    if (table->slots) {
+        for (size_t i = 0; i <= table->mask; i++) {
+            StrSlot* old = &table->slots[i];
+            if (!old->key) continue;
+            size_t j = old->hash & mask;
+            while (slots[j].key) j = (j + 1) & mask;
+            slots[j] = *old;
+        }
+        free(table->slots);
+    }
+    table->slots = slots;
+    table->mask = mask;
+    return 0;
+}
+
+// Keeps the first value stored for a key
+static int str_table_put(StrTable* table, const char* key, size_t len, int value) {
+    if (!table->slots || (table->count + 1) * 4 > (table->mask + 1) * 3) {
+        if (str_table_grow(table) != 0) return -1;
+    }
+    
+    uint64_t hash = hash_bytes(key, len);
+    size_t i = hash & table->mask;
+    while (table->slots[i].key) {
+        StrSlot* slot = &table->slots[i];
+        if (slot->hash == hash && slot->len == len && memcmp(slot->key, key, len) == 0) {
+            return 0;
+        }
+        i = (i + 1) & table->mask;
+    }
+    
+    char* copy = (char*)malloc(len + 1);
+    if (!copy) return -1;
+    memcpy(copy, key, len);
+    copy[len] = '\0';
+    
+    table->slots[i].hash = hash;
+    table->slots[i].key = copy;
+    table->slots[i].len = len;
+    table->slots[i].value = value;
+    table->count++;
+    return 0;
+}
+
+static void str_table_free(StrTable* table) {
+    if (table->slots) {
+        for (size_t i = 0; i <= table->mask; i++) {
+            free(table->slots[i].key);
+        }
+        free(table->slots);
+    }
+    memset(table, 0, sizeof(*table));
+}
+
+// ============================================================================
+// BYTE TRIE (path prefixes, regex literals)
+// ============================================================================
+
+/**
+ * Trie node; children form a sibling list. For the literal automaton,
+ * fail/dict are the Aho-Corasick failure and output links and value is
+ * the head of the node's output list.
+ */
+typedef struct {
+    int child;
+    int sibling;
+    int fail;
+    int dict;                  // Nearest failure ancestor with outputs
+    int value;                 // Rule ID (prefix trie) or output head (-1 = none)
+    unsigned char c;
+} TrieNode;
+
+typedef struct {
+    TrieNode* nodes;
+    int count;
+    int capacity;
+} Trie;
+
+static int trie_new_node(Trie* trie, unsigned char c) {
+    if (trie->count >= trie->capacity) {
+        int capacity = trie->capacity ? trie->capacity * 2 : 256;
+        TrieNode* nodes = (TrieNode*)realloc(trie->nodes, capacity * sizeof(TrieNode));
+        if (!nodes) return -1;
+        trie->nodes = nodes;
+        trie->capacity = capacity;
+    }
+    
+    TrieNode* node = &trie->nodes[trie->count];
+    node->child = -1;
+    node->sibling = -1;
+    node->fail = 0;
+    node->dict = -1;
+    node->value = -1;
+    node->c = c;
+    return trie->count++;
+}
+
+static int trie_find_child(const Trie* trie, int node, unsigned char c) {
+    for (int n = trie->nodes[node].child; n >= 0; n = trie->nodes[n].sibling) {
+        if (trie->nodes[n].c == c) return n;
+    }
+    return -1;
+}
+
+// Walk/extend the trie along key and return the final node
+static int trie_insert(Trie* trie, const char* key, size_t len) {
+    if (trie->count == 0 && trie_new_node(trie, 0) < 0) return -1;
+    
+    int node = 0;
+    for (size_t i = 0; i < len; i++) {
+        unsigned char c = (unsigned char)key[i];
+        int next = trie_find_child(trie, node, c);
+        if (next < 0) {
+            next = trie_new_node(trie, c);
+            if (next < 0) return -1;
+            trie->nodes[next].sibling = trie->nodes[node].child;
+            trie->nodes[node].child = next;
+        }
+        node = next;
+    }
+    return node;
+}
+
+static void trie_free(Trie* trie) {
+    free(trie->nodes);
+    memset(trie, 0, sizeof(*trie));
+}
+
+// ============================================================================
+// MATCHER
+// ============================================================================
+
+typedef struct {
+    regex_t re;
+    int rule_id;
+    char* literal;             // Required substring (NULL if none found)
+    int next_output;           // Next regex on the same automaton node
+} RegexRule;
+
+struct URLMatcher {
+    StrTable exact;
+    StrTable domains;
+    Trie prefixes;
+    size_t prefix_count;
+    
+    RegexRule* regexes;
+    int regex_count;
+    int regex_capacity;
+    
+    // Literal prefilter over regexes [0, compiled_count)
+    Trie literals;
+    int compiled_count;
+    int* always_run;           // Compiled regexes without a literal
+    int always_run_count;
+};
+
+/**
+ * Longest substring every match of an extended regex must contain
+ *
+ * Conservative: patterns with alternation yield nothing, and only
+ * characters outside groups and bracket expressions count. A quantifier
+ * that allows zero repetitions removes the preceding character.
+ *
+ * @return Length written to out (0 if none)
+ */
+static size_t regex_required_literal(const char* pattern, char* out, size_t out_size) {
+    size_t best = 0;
+    size_t run = 0;
+    char current[1024];
+    int depth = 0;
+    
+    if (strchr(pattern, '|')) return 0;
+
+#define END_RUN() do { \
+        if (run > best && run < out_size) { memcpy(out, current, run); best = run; } \
+        run = 0; \
+    } while (0)
+    
+    for (const char* p = pattern; *p; p++) {
+        char c = *p;
+        
+        if (c == '\\' && p[1]) {
+            p++;
+            if (depth == 0 && strchr(".[]()*+?{}|^$\\/-", *p) && run < sizeof(current)) {
+                current[run++] = *p;
+            } else {
+                END_RUN();
+            }
+            continue;
+        }
+        
+        switch (c) {
+            case '[': {
+                // Skip the bracket expression (']' first is literal)
+                const char* q = p + 1;
+                if (*q == '^') q++;
+                if (*q == ']') q++;
+                while (*q && *q != ']') {
+                    if (q[0] == '[' && (q[1] == ':' || q[1] == '.' || q[1] == '=')) {
+                        const char* close = strchr(q + 2, ']');
+                        q = close ? close : q + strlen(q) - 1;
+                    }
+                    q++;
+                }
+                if (depth == 0) END_RUN();
+                if (!*q) goto done;
+                p = q;
+                break;
+            }
+            case '(':
+                if (depth == 0) END_RUN();
+                depth++;
+                break;
+            case ')':
+                if (depth > 0) depth--;
+                break;
+            case '*':
+            case '?':
+            case '{':
+                // Previous character may be absent
+                if (depth == 0) {
+                    if (run > 0) run--;
+                    END_RUN();
+                }
+                if (c == '{') {
+                    const char* close = strchr(p, '}');
+                    if (!close) goto done;
+                    p = close;
+                }
+                break;
+            case '+':
+                if (depth == 0) END_RUN();
+                break;
+            case '.':
+            case '^':
+            case '$':
+                if (depth == 0) END_RUN();
+                break;
+            default:
+                if (depth == 0) {
+                    if (run < sizeof(current)) {
+                        current[run++] = c;
+                    } else {
+                        END_RUN();
+                    }
+                }
+                break;
+        }
+    }
+
+done:
+    END_RUN();
+#undef END_RUN
+    return best >= URL_MATCHER_MIN_LITERAL ? best : 0;
+}
+
+URLMatcher* url_matcher_create(void) {
+    return (URLMatcher*)calloc(1, sizeof(URLMatcher));
+}
+
+static void url_matcher_free_rules(URLMatcher* matcher) {
+    str_table_free(&matcher->exact);
+    str_table_free(&matcher->domains);
+    trie_free(&matcher->prefixes);
+    trie_free(&matcher->literals);
+    matcher->prefix_count = 0;
+    
+    for (int i = 0; i < matcher->regex_count; i++) {
+        regfree(&matcher->regexes[i].re);
+        free(matcher->regexes[i].literal);
+    }
+    free(matcher->regexes);
+    matcher->regexes = NULL;
+    matcher->regex_count = 0;
+    matcher->regex_capacity = 0;
+    
+    free(matcher->always_run);
+    matcher->always_run = NULL;
+    matcher->always_run_count = 0;
+    matcher->compiled_count = 0;
+}
+
+void url_matcher_destroy(URLMatcher* matcher) {
+    if (!matcher) return;
+    url_matcher_free_rules(matcher);
+    free(matcher);
+}
+
+void url_matcher_clear(URLMatcher* matcher) {
+    if (matcher) url_matcher_free_rules(matcher);
+}
+
+// Helper: Lowercase host without port into out; returns length or -1
+static int normalize_host(const char* host, size_t len, char* out, size_t out_size) {
+    // Drop userinfo
+    for (size_t i = len; i > 0; i--) {
+        if (host[i - 1] == '@') {
+            host += i;
+            len -= i;
+            break;
+        }
+    }
+    
+    // Drop port (IPv6 literals keep their brackets)
+    size_t end = len;
+    if (len > 0 && host[0] == '[') {
+        const char* close = memchr(host, ']', len);
+        if (close) end = (size_t)(close - host) + 1;
+    } else {
+        const char* colon = memchr(host, ':', len);
+        if (colon) end = (size_t)(colon - host);
+    }
+    
+    // Trailing dot of a fully qualified name
+    if (end > 0 && host[end - 1] == '.') end--;
+    if (end >= out_size) return -1;
+    
+    for (size_t i = 0; i < end; i++) {
+        char c = host[i];
+        out[i] = (c >= 'A' && c <= 'Z') ? (char)(c + ('a' - 'A')) : c;
+    }
+    out[end] = '\0';
+    return (int)end;
+}
+
+int url_matcher_add(URLMatcher* matcher, URLRuleType type, const char* pattern, int rule_id) {
+    if (!matcher || !pattern) return -1;
+    
+    switch (type) {
+        case URL_RULE_EXACT:
+            return str_table_put(&matcher->exact, pattern, strlen(pattern), rule_id);
+        
+        case URL_RULE_DOMAIN: {
+            // "*.example.com" and ".example.com" mean the same as "example.com"
+            if (pattern[0] == '*' && pattern[1] == '.') pattern += 2;
+            else if (pattern[0] == '.') pattern++;
+            
+            char host[URL_MATCHER_MAX_HOST];
+            int len = normalize_host(pattern, strlen(pattern), host, sizeof(host));
+            if (len <= 0) return -1;
+            return str_table_put(&matcher->domains, host, (size_t)len, rule_id);
+        }
+        
+        case URL_RULE_PATH_PREFIX: {
+            int node = trie_insert(&matcher->prefixes, pattern, strlen(pattern));
+            if (node < 0) return -1;
+            if (matcher->prefixes.nodes[node].value < 0) {
+                matcher->prefixes.nodes[node].value = rule_id;
+                matcher->prefix_count++;
+            }
+            return 0;
+        }
+        
+        case URL_RULE_REGEX: {
+            if (matcher->regex_count >= matcher->regex_capacity) {
+                int capacity = matcher->regex_capacity ? matcher->regex_capacity * 2 : 16;
+                RegexRule* regexes = (RegexRule*)realloc(matcher->regexes, capacity * sizeof(RegexRule));
+                if (!regexes) return -1;
+                matcher->regexes = regexes;
+                matcher->regex_capacity = capacity;
+            }
+            
+            RegexRule* rule = &matcher->regexes[matcher->regex_count];
+            if (regcomp(&rule->re, pattern, REG_EXTENDED | REG_NOSUB) != 0) {
+                return -1;
+            }
+            rule->rule_id = rule_id;
+            rule->next_output = -1;
+            rule->literal = NULL;
+            
+            char literal[1024];
+            size_t len = regex_required_literal(pattern, literal, sizeof(literal));
+            if (len > 0) {
+                rule->literal = (char*)malloc(len + 1);
+                if (rule->literal) {
+                    memcpy(rule->literal, literal, len);
+                    rule->literal[len] = '\0';
+                }
+            }
+            
+            matcher->regex_count++;
+            return 0;
+        }
+        
+        default:
+            return -1;
+    }
+}
+
+void url_matcher_compile(URLMatcher* matcher) {
+    if (!matcher) return;
+    
+    trie_free(&matcher->literals);
+    free(matcher->always_run);
+    matcher->always_run = NULL;
+    matcher->always_run_count = 0;
+    matcher->compiled_count = 0;
+    
+    if (matcher->regex_count == 0) return;
+    
+    matcher->always_run = (int*)malloc(matcher->regex_count * sizeof(int));
+    if (!matcher->always_run) return;
+    
+    Trie* trie = &matcher->literals;
+    if (trie_new_node(trie, 0) < 0) return;
+    
+    for (int i = 0; i < matcher->regex_count; i++) {
+        RegexRule* rule = &matcher->regexes[i];
+        rule->next_output = -1;
+        
+        int node = rule->literal ? trie_insert(trie, rule->literal, strlen(rule->literal)) : -1;
+        if (node < 0) {
+            matcher->always_run[matcher->always_run_count++] = i;
+            continue;
+        }
+        rule->next_output = trie->nodes[node].value;
+        trie->nodes[node].value = i;
+    }
+    
+    // Breadth-first failure and output links
+    int* queue = (int*)malloc(trie->count * sizeof(int));
+    if (!queue) {
+        trie_free(trie);
+        return;
+    }
+    int head = 0, tail = 0;
+    for (int n = trie->nodes[0].child; n >= 0; n = trie->nodes[n].sibling) {
+        trie->nodes[n].fail = 0;
+        queue[tail++] = n;
+    }
+    while (head < tail) {
+        int node = queue[head++];
+        for (int n = trie->nodes[node].child; n >= 0; n = trie->nodes[n].sibling) {
+            int f = trie->nodes[node].fail;
+            int next;
+            while ((next = trie_find_child(trie, f, trie->nodes[n].c)) < 0 && f != 0) {
+                f = trie->nodes[f].fail;
+            }
+            trie->nodes[n].fail = (next >= 0 && next != n) ? next : 0;
+            
+            int fail = trie->nodes[n].fail;
+            trie->nodes[n].dict = trie->nodes[fail].value >= 0 ? fail : trie->nodes[fail].dict;
+            queue[tail++] = n;
+        }
+    }
+    free(queue);
+    
+    matcher->compiled_count = matcher->regex_count;
+}
+
+/**
+ * URL components located by a single scan
+ */
+typedef struct {
+    char host[URL_MATCHER_MAX_HOST];
+    int host_len;              // -1 if the URL has no usable host
+    const char* path;
+    size_t path_len;
+} ParsedURL;
+
+static void parse_url(const char* url, ParsedURL* parsed) {
+    parsed->host_len = -1;
+    parsed->path = "";
+    parsed->path_len = 0;
+    
+    const char* scheme_end = strstr(url, "://");
+    if (!scheme_end) return;
+    
+    const char* authority = scheme_end + 3;
+    size_t authority_len = strcspn(authority, "/?#");
+    parsed->host_len = normalize_host(authority, authority_len, parsed->host, sizeof(parsed->host));
+    
+    if (authority[authority_len] == '/') {
+        parsed->path = authority + authority_len;
+        parsed->path_len = strcspn(parsed->path, "?#");
+    }
+}
+
+// Helper: Probe the host and each parent domain
+static int match_domain(const URLMatcher* matcher, const char* host, int len) {
+    if (len <= 0 || matcher->domains.count == 0) return -1;
+    
+    const char* p = host;
+    const char* end = host + len;
+    while (p < end) {
+        int id = str_table_get(&matcher->domains, p, (size_t)(end - p));
+        if (id >= 0) return id;
+        
+        const char* dot = memchr(p, '.', (size_t)(end - p));
+        if (!dot) break;
+        p = dot + 1;
+    }
+    return -1;
+}
+
+// Helper: Walk the prefix trie along the path
+static int match_prefix(const URLMatcher* matcher, const char* path, size_t len) {
+    const Trie* trie = &matcher->prefixes;
+    if (trie->count == 0) return -1;
+    
+    int node = 0;
+    if (trie->nodes[0].value >= 0) return trie->nodes[0].value;
+    for (size_t i = 0; i < len; i++) {
+        node = trie_find_child(trie, node, (unsigned char)path[i]);
+        if (node < 0) return -1;
+        if (trie->nodes[node].value >= 0) return trie->nodes[node].value;
+    }
+    return -1;
+}
+
+// Helper: Run one regex unless this call already ran it
+static bool run_regex(const URLMatcher* matcher, int index, const char* url,
+                      int* tried, int* tried_count) {
+    for (int i = 0; i < *tried_count; i++) {
+        if (tried[i] == index) return false;
+    }
+    if (*tried_count < URL_MATCHER_TRIED_SLOTS) {
+        tried[(*tried_count)++] = index;
+    }
+    return regexec(&matcher->regexes[index].re, url, 0, NULL, 0) == 0;
+}
+
+static int match_regex(const URLMatcher* matcher, const char* url) {
+    if (matcher->regex_count == 0) return -1;
+    
+    int tried[URL_MATCHER_TRIED_SLOTS];
+    int tried_count = 0;
+    
+    // Literal prefilter: run only regexes whose literal occurs
+    const Trie* trie = &matcher->literals;
+    if (matcher->compiled_count > 0 && trie->count > 1) {
+        int node = 0;
+        for (const char* p = url; *p; p++) {
+            unsigned char c = (unsigned char)*p;
+            int next;
+            while ((next = trie_find_child(trie, node, c)) < 0 && node != 0) {
+                node = trie->nodes[node].fail;
+            }
+            node = next >= 0 ? next : 0;
+            
+            int out = trie->nodes[node].value >= 0 ? node : trie->nodes[node].dict;
+            while (out > 0) {
+                for (int r = trie->nodes[out].value; r >= 0; r = matcher->regexes[r].next_output) {
+                    if (run_regex(matcher, r, url, tried, &tried_count)) {
+                        return matcher->regexes[r].rule_id;
+                    }
+                }
+                out = trie->nodes[out].dict;
+            }
+        }
+    }
+    
+    for (int i = 0; i < matcher->always_run_count; i++) {
+        int r = matcher->always_run[i];
+        if (regexec(&matcher->regexes[r].re, url, 0, NULL, 0) == 0) {
+            return matcher->regexes[r].rule_id;
+        }
+    }
+    
+    // Added since the last compile
+    for (int r = matcher->compiled_count; r < matcher->regex_count; r++) {
+        if (regexec(&matcher->regexes[r].re, url, 0, NULL, 0) == 0) {
+            return matcher->regexes[r].rule_id;
+        }
+    }
+    
+    return -1;
+}
+
+int url_matcher_match(const URLMatcher* matcher, const char* url) {
+    if (!matcher || !url) return -1;
+    
+    int id = matcher->exact.count > 0 ? str_table_get(&matcher->exact, url, strlen(url)) : -1;
+    if (id >= 0) return id;
+    
+    if (matcher->domains.count > 0 || matcher->prefix_count > 0) {
+        ParsedURL parsed;
+        parse_url(url, &parsed);
+        
+        id = match_domain(matcher, parsed.host, parsed.host_len);
+        if (id >= 0) return id;
+        
+        id = match_prefix(matcher, parsed.path, parsed.path_len);
+        if (id >= 0) return id;
+    }
+    
+    return match_regex(matcher, url);
+}
+
+int url_matcher_match_host(const URLMatcher* matcher, const char* host) {
+    if (!matcher || !host) return -1;
+    
+    char normalized[URL_MATCHER_MAX_HOST];
+    int len = normalize_host(host, strlen(host), normalized, sizeof(normalized));
+    return match_domain(matcher, normalized, len);
+}
+
+void url_matcher_get_stats(const URLMatcher* matcher, URLMatcherStats* stats) {
+    if (!stats) return;
+    memset(stats, 0, sizeof(*stats));
+    if (!matcher) return;
+    
+    stats->exact = matcher->exact.count;
+    stats->domains = matcher->domains.count;
+    stats->prefixes = matcher->prefix_count;
+    stats->regexes = (size_t)matcher->regex_count;
+    stats->regexes_gated = (size_t)(matcher->compiled_count - matcher->always_run_count);
+}
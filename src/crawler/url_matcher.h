@@ -0,0 +1,107 @@
+#ifndef URL_MATCHER_H
+#define URL_MATCHER_H
+
+#include <stddef.h>
+#include <stdbool.h>
+
+/**
+ * Compiled URL Rule Set
+ *
+ * Matches a URL against many rules at once for URLBlocker and URLFilter.
+ * The URL is parsed a single time per check, and the cost grows with the
+ * URL length rather than with the number of rules.
+ *
+ * - Exact URLs: hash set
+ * - Domains: hash set probed with the host and each parent domain, so a
+ *   rule for "example.com" also matches "www.example.com"
+ * - Path prefixes: byte trie walked once along the path
+ * - Regexes (POSIX extended): each regex has a required literal when one
+ *   can be found. An Aho-Corasick automaton over those literals runs once
+ *   over the URL, and only regexes whose literal occurs are executed.
+ *   Regexes without a usable literal always run.
+ *
+ * Adding rules keeps matching correct immediately. Call
+ * url_matcher_compile() after a batch of additions to rebuild the regex
+ * prefilter. Matching is read-only and may run in several threads at once.
+ * Adding, clearing and compiling must not overlap with matching.
+ */
+
+// Rule types
+typedef enum {
+    URL_RULE_EXACT,             // Whole URL equals the pattern
+    URL_RULE_DOMAIN,            // Host equals the pattern or is a subdomain of it
+    URL_RULE_PATH_PREFIX,       // Path (before the query) starts with the pattern
+    URL_RULE_REGEX              // POSIX extended regex searched in the URL
+} URLRuleType;
+
+// Rule counts
+typedef struct {
+    size_t exact;               // Exact URL rules
+    size_t domains;             // Domain rules
+    size_t prefixes;            // Path prefix rules
+    size_t regexes;             // Regex rules
+    size_t regexes_gated;       // Regexes behind the literal prefilter
+} URLMatcherStats;
+
+// Matcher handle
+typedef struct URLMatcher URLMatcher;
+
+/**
+ * Create an empty matcher
+ *
+ * @return Matcher or NULL on error
+ */
+URLMatcher* url_matcher_create(void);
+
+/**
+ * Destroy a matcher
+ */
+void url_matcher_destroy(URLMatcher* matcher);
+
+/**
+ * Add a rule
+ *
+ * @param matcher Matcher
+ * @param type Rule type
+ * @param pattern Rule pattern
+ * @param rule_id Value returned when the rule matches
+ * @return 0 on success, -1 on error (e.g. invalid regex)
+ */
+int url_matcher_add(URLMatcher* matcher, URLRuleType type, const char* pattern, int rule_id);
+
+/**
+ * Rebuild the regex prefilter after adding rules
+ */
+void url_matcher_compile(URLMatcher* matcher);
+
+/**
+ * Remove all rules
+ */
+void url_matcher_clear(URLMatcher* matcher);
+
+/**
+ * Find a rule matching a URL
+ *
+ * @param matcher Matcher
+ * @param url URL to check
+ * @return ID of a matching rule, or -1 if none matches
+ */
+int url_matcher_match(const URLMatcher* matcher, const char* url);
+
+/**
+ * Find a domain rule matching a host
+ *
+ * The host is compared case-insensitively; a port is ignored.
+ *
+ * @param matcher Matcher
+ * @param host Host name
+ * @return ID of a matching domain rule, or -1 if none matches
+ */
+int url_matcher_match_host(const URLMatcher* matcher, const char* host);
+
+/**
+ * Get rule counts
+ */
+void url_matcher_get_stats(const URLMatcher* matcher, URLMatcherStats* stats);
+
+#endif // URL_MATCHER_H
@@ -1,10 +1,12 @@
 /**
  * Advanced URL Pattern Detection Implementation
  * 
- * Extracts URLs from various sources in HTML content.
+ * Extracts URLs from various sources in HTML content. Every pattern
+ * comes from the same single pass of the streaming HTML scanner.
  */
 
 #include "url_patterns.h"
+#include "html_scanner.h"
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
@@ -92,198 +94,42 @@ static void write_url(FILE* fp, const char* url) {
 }
 
 /**
- * Extract standard href URLs
+ * Link kinds to keep from one scan, indexed by HtmlLinkKind
  */
-static int extract_href_urls(const char* html, const char* base_url, FILE* output) {
-    int count = 0;
-    const char* p = html;
-    
-    while ((p = strstr(p, "href=")) != NULL) {
-        p += 5;  // Skip "href="
-        
-        // Skip whitespace
-        while (*p && isspace(*p)) p++;
-        
-        // Determine quote type
-        char quote = 0;
-        if (*p == '"' || *p == '\'') {
-            quote = *p;
-            p++;
-        }
-        
-        // Find end of URL
-        const char* url_start = p;
-        const char* url_end = NULL;
-        
-        if (quote) {
-            url_end = strchr(p, quote);
-        } else {
-            while (*p && !isspace(*p) && *p != '>') p++;
-            url_end = p;
-        }
-        
-        if (!url_end || url_end == url_start) {
-            if (quote) p = url_end + 1;
-            continue;
-        }
-        
-        // Extract URL
-        size_t url_len = url_end - url_start;
-        if (url_len >= 2048) {
-            p = url_end + 1;
-            continue;
-        }
-        
-        char url[2048];
-        strncpy(url, url_start, url_len);
-        url[url_len] = '\0';
-        
-        if (is_valid_url(url)) {
-            write_url(output, url);
-            count++;
-        }
-        
-        p = url_end + 1;
-    }
-    
-    return count;
-}
+typedef struct {
+    bool wanted[HTML_LINK_META_REFRESH + 1];
+    FILE* output;
+    int count;
+} PatternScan;
 
-/**
- * Extract onclick URLs
- */
-static int extract_onclick_urls(const char* html, const char* base_url, FILE* output) {
-    int count = 0;
-    const char* p = html;
-    
-    while ((p = strstr(p, "onclick=")) != NULL) {
-        p += 8;  // Skip "onclick="
-        
-        // Look for URLs in onclick handlers
-        // Common patterns: window.location='url', location.href='url'
-        const char* loc = strstr(p, "location");
-        if (loc && loc < p + 200) {
-            const char* quote_start = strchr(loc, '\'');
-            if (!quote_start) quote_start = strchr(loc, '"');
-            
-            if (quote_start) {
-                char quote = *quote_start;
-                const char* url_start = quote_start + 1;
-                const char* url_end = strchr(url_start, quote);
-                
-                if (url_end && url_end > url_start) {
-                    size_t url_len = url_end - url_start;
-                    if (url_len < 2048) {
-                        char url[2048];
-                        strncpy(url, url_start, url_len);
-                        url[url_len] = '\0';
-                        
-                        if (is_valid_url(url)) {
-                            write_url(output, url);
-                            count++;
-                        }
-                    }
-                }
-            }
-        }
-        
-        p++;
-    }
-    
-    return count;
-}
-
-/**
- * Extract data attribute URLs
- */
-static int extract_data_attr_urls(const char* html, const char* base_url, FILE* output) {
-    int count = 0;
-    const char* patterns[] = {"data-href=", "data-url=", "data-link=", NULL};
-    
-    for (int i = 0; patterns[i] != NULL; i++) {
-        const char* p = html;
-        size_t pattern_len = strlen(patterns[i]);
-        
-        while ((p = strstr(p, patterns[i])) != NULL) {
-            p += pattern_len;
-            
-            // Skip whitespace
-            while (*p && isspace(*p)) p++;
-            
-            // Get quote type
-            char quote = 0;
-            if (*p == '"' || *p == '\'') {
-                quote = *p;
-                p++;
-            }
-            
-            const char* url_start = p;
-            const char* url_end = quote ? strchr(p, quote) : NULL;
-            
-            if (!url_end) {
-                while (*p && !isspace(*p) && *p != '>') p++;
-                url_end = p;
-            }
-            
-            if (url_end > url_start) {
-                size_t url_len = url_end - url_start;
-                if (url_len < 2048) {
-                    char url[2048];
-                    strncpy(url, url_start, url_len);
-                    url[url_len] = '\0';
-                    
-                    if (is_valid_url(url)) {
-                        write_url(output, url);
-                        count++;
-                    }
-                }
-            }
-            
-            p = url_end + 1;
-        }
+static void collect_pattern_url(const char* url, HtmlLinkKind kind, void* user_data) {
+    PatternScan* scan = (PatternScan*)user_data;
+    if (scan->wanted[kind] && is_valid_url(url)) {
+        write_url(scan->output, url);
+        scan->count++;
     }
-    
-    return count;
 }
 
 /**
- * Extract meta refresh URLs
+ * Scan the HTML once, writing URLs of the wanted kinds
  */
-static int extract_meta_refresh_urls(const char* html, const char* base_url, FILE* output) {
-    int count = 0;
-    const char* p = html;
-    
-    while ((p = strstr(p, "<meta")) != NULL) {
-        // Check if it's a refresh meta tag
-        const char* refresh = strstr(p, "http-equiv");
-        if (refresh && refresh < p + 200) {
-            const char* url_marker = strstr(refresh, "url=");
-            if (url_marker && url_marker < refresh + 200) {
-                const char* url_start = url_marker + 4;
-                const char* url_end = strchr(url_start, '"');
-                if (!url_end) url_end = strchr(url_start, '\'');
-                if (!url_end) url_end = strchr(url_start, '>');
-                
-                if (url_end && url_end > url_start) {
-                    size_t url_len = url_end - url_start;
-                    if (url_len < 2048) {
-                        char url[2048];
-                        strncpy(url, url_start, url_len);
-                        url[url_len] = '\0';
-                        
-                        if (is_valid_url(url)) {
-                            write_url(output, url);
-                            count++;
-                        }
-                    }
-                }
-            }
-        }
-        
-        p++;
+static int scan_pattern_urls(const char* html, PatternScan* scan, const char* output_file) {
+    scan->output = fopen(output_file, "a");
+    if (!scan->output) return -1;
+    
+    // Links only: no text is kept
+    HtmlScanner* scanner = html_scanner_create(EXTRACT_ALL, 2);
+    if (!scanner) {
+        fclose(scan->output);
+        return -1;
     }
+    html_scanner_set_link_callback(scanner, collect_pattern_url, scan);
+    html_scanner_feed(scanner, html, strlen(html));
+    html_scanner_finish(scanner);
+    html_scanner_destroy(scanner);
     
-    return count;
+    fclose(scan->output);
+    return scan->count;
 }
 
 /**
@@ -293,31 +139,27 @@ int extract_urls_pattern(const char* html, const char* base_url,
                         URLPatternType pattern,
                         const char* output_file) {
     if (!html || !output_file) return -1;
+    (void)base_url;  // URLs are written as found
     
-    FILE* fp = fopen(output_file, "a");
-    if (!fp) return -1;
-    
-    int count = 0;
-    
+    PatternScan scan = {0};
     switch (pattern) {
         case URL_PATTERN_HREF:
-            count = extract_href_urls(html, base_url, fp);
+            scan.wanted[HTML_LINK_HREF] = true;
             break;
         case URL_PATTERN_ONCLICK:
-            count = extract_onclick_urls(html, base_url, fp);
+            scan.wanted[HTML_LINK_ONCLICK] = true;
             break;
         case URL_PATTERN_DATA_ATTR:
-            count = extract_data_attr_urls(html, base_url, fp);
+            scan.wanted[HTML_LINK_DATA_ATTR] = true;
             break;
         case URL_PATTERN_META_REFRESH:
-            count = extract_meta_refresh_urls(html, base_url, fp);
+            scan.wanted[HTML_LINK_META_REFRESH] = true;
             break;
         default:
             break;
     }
     
-    fclose(fp);
-    return count;
+    return scan_pattern_urls(html, &scan, output_file);
 }
 
 /**
@@ -334,27 +176,13 @@ int extract_urls_advanced(const char* html, const char* base_url,
         config = &default_config;
     }
     
-    int total_count = 0;
-    
-    if (config->enable_href) {
-        int count = extract_urls_pattern(html, base_url, URL_PATTERN_HREF, output_file);
-        if (count > 0) total_count += count;
-    }
-    
-    if (config->enable_onclick) {
-        int count = extract_urls_pattern(html, base_url, URL_PATTERN_ONCLICK, output_file);
-        if (count > 0) total_count += count;
-    }
-    
-    if (config->enable_data_attr) {
-        int count = extract_urls_pattern(html, base_url, URL_PATTERN_DATA_ATTR, output_file);
-        if (count > 0) total_count += count;
-    }
-    
-    if (config->enable_meta_refresh) {
-        int count = extract_urls_pattern(html, base_url, URL_PATTERN_META_REFRESH, output_file);
-        if (count > 0) total_count += count;
-    }
+    // All enabled patterns come from the same pass
+    PatternScan scan = {0};
+    scan.wanted[HTML_LINK_HREF] = config->enable_href;
+    scan.wanted[HTML_LINK_ONCLICK] = config->enable_onclick;
+    scan.wanted[HTML_LINK_DATA_ATTR] = config->enable_data_attr;
+    scan.wanted[HTML_LINK_META_REFRESH] = config->enable_meta_refresh;
     
-    return total_count;
+    (void)base_url;  // URLs are written as found
+    return scan_pattern_urls(html, &scan, output_file);
 }
\ No newline at end of file
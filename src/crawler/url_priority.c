@@ -7,19 +7,49 @@
 
 #include "url_priority.h"
 #include "../../include/prime_math_custom.h"
+#include "../../include/prime_float_math.h"
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
 #include <time.h>
 
-#define MAX_DOMAINS 10000
+#define DOMAIN_CHUNK_SIZE 1024          // Domain entries per storage chunk
+#define DOMAIN_INDEX_INITIAL 256        // Initial hash index slots (power of 2)
+#define DOMAIN_SCORE_REFRESH 60         // Seconds a cached domain score stays valid
+
+// Domain entry: public stats plus scoring and budget state
+typedef struct {
+    DomainStats stats;
+    uint64_t hash;
+    
+    // Cached domain part of the score
+    float score;
+    int score_total_domains;        // total_domains the score was computed for
+    time_t scored_at;
+    bool score_valid;
+    
+    // Token bucket
+    double tokens;
+    double refilled_ms;
+} DomainEntry;
 
 // Priority calculator structure
 struct URLPriority {
     PriorityFactors factors;
-    DomainStats* domain_stats;
+    
+    // Entries are stored in fixed-size chunks so pointers stay valid as
+    // the table grows; the index maps a domain hash to entry number + 1
+    DomainEntry** chunks;
+    int chunk_count;
+    int chunk_capacity;
     int domain_count;
-    int domain_capacity;
+    uint32_t* index;
+    uint32_t index_size;
+    
+    // Per-domain budget (disabled when budget_rate <= 0)
+    double budget_rate;
+    double budget_burst;
+    
     uint64_t random_seed;
 };
 
@@ -47,15 +77,17 @@ URLPriority* url_priority_create(PriorityFactors* factors) {
         init_default_factors(&priority->factors);
     }
     
-    // Allocate domain stats array
-    priority->domain_capacity = 100;
-    priority->domain_stats = (DomainStats*)calloc(priority->domain_capacity, sizeof(DomainStats));
-    if (!priority->domain_stats) {
+    // Allocate domain index
+    priority->index_size = DOMAIN_INDEX_INITIAL;
+    priority->index = (uint32_t*)calloc(priority->index_size, sizeof(uint32_t));
+    if (!priority->index) {
         free(priority);
         return NULL;
     }
     
     priority->domain_count = 0;
+    priority->budget_rate = 0.0;
+    priority->budget_burst = 1.0;
     priority->random_seed = (uint64_t)time(NULL);
     
     return priority;
@@ -67,9 +99,11 @@ URLPriority* url_priority_create(PriorityFactors* factors) {
 void url_priority_destroy(URLPriority* priority) {
     if (!priority) return;
     
-    if (priority->domain_stats) {
-        free(priority->domain_stats);
+    for (int i = 0; i < priority->chunk_count; i++) {
+        free(priority->chunks[i]);
     }
+    free(priority->chunks);
+    free(priority->index);
     
     free(priority);
 }
@@ -100,46 +134,157 @@ int url_priority_calculate_depth(const char* url) {
     return depth > 0 ? depth - 1 : 0;
 }
 
+// Helper: Monotonic clock in milliseconds
+static double priority_now_ms(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return ts.tv_sec * 1000.0 + ts.tv_nsec / 1e6;
+}
+
+// Helper: FNV-1a hash of a domain
+static uint64_t domain_hash(const char* domain) {
+    uint64_t h = 1469598103934665603ULL;
+    for (const unsigned char* p = (const unsigned char*)domain; *p; p++) {
+        h ^= *p;
+        h *= 1099511628211ULL;
+    }
+    return h;
+}
+
+static DomainEntry* domain_entry_at(URLPriority* priority, uint32_t n) {
+    return &priority->chunks[n / DOMAIN_CHUNK_SIZE][n % DOMAIN_CHUNK_SIZE];
+}
+
 /**
- * Get or create domain stats
+ * Find a domain entry
+ * 
+ * The key is the domain as stored (truncated to fit DomainStats.domain).
  */
-static DomainStats* get_or_create_domain_stats(URLPriority* priority, const char* domain) {
-    if (!priority || !domain) return NULL;
-    
-    // Search for existing
-    for (int i = 0; i < priority->domain_count; i++) {
-        if (strcmp(priority->domain_stats[i].domain, domain) == 0) {
-            return &priority->domain_stats[i];
+static DomainEntry* find_domain_entry(URLPriority* priority, const char* domain) {
+    char key[sizeof(((DomainStats*)0)->domain)];
+    strncpy(key, domain, sizeof(key) - 1);
+    key[sizeof(key) - 1] = '\0';
+    
+    uint64_t hash = domain_hash(key);
+    uint32_t mask = priority->index_size - 1;
+    for (uint32_t i = (uint32_t)hash & mask; priority->index[i] != 0; i = (i + 1) & mask) {
+        DomainEntry* entry = domain_entry_at(priority, priority->index[i] - 1);
+        if (entry->hash == hash && strcmp(entry->stats.domain, key) == 0) {
+            return entry;
         }
     }
+    return NULL;
+}
+
+// Helper: Insert entry number n into the index (no duplicate check)
+static void index_insert(uint32_t* index, uint32_t size, uint64_t hash, uint32_t n) {
+    uint32_t mask = size - 1;
+    uint32_t i = (uint32_t)hash & mask;
+    while (index[i] != 0) i = (i + 1) & mask;
+    index[i] = n + 1;
+}
+
+// Helper: Double the index when it is over 70% full
+static int grow_index(URLPriority* priority) {
+    if ((uint64_t)(priority->domain_count + 1) * 10 < (uint64_t)priority->index_size * 7) {
+        return 0;
+    }
     
-    // Create new
-    if (priority->domain_count >= priority->domain_capacity) {
-        // Expand array
-        int new_capacity = priority->domain_capacity * 2;
-        if (new_capacity > MAX_DOMAINS) new_capacity = MAX_DOMAINS;
-        
-        DomainStats* new_stats = (DomainStats*)realloc(priority->domain_stats, 
-                                                       new_capacity * sizeof(DomainStats));
-        if (!new_stats) return NULL;
-        
-        priority->domain_stats = new_stats;
-        priority->domain_capacity = new_capacity;
+    uint32_t new_size = priority->index_size * 2;
+    uint32_t* new_index = (uint32_t*)calloc(new_size, sizeof(uint32_t));
+    if (!new_index) return -1;
+    
+    for (int n = 0; n < priority->domain_count; n++) {
+        index_insert(new_index, new_size, domain_entry_at(priority, n)->hash, n);
     }
+    free(priority->index);
+    priority->index = new_index;
+    priority->index_size = new_size;
+    return 0;
+}
+
+/**
+ * Get or create domain entry
+ */
+static DomainEntry* get_or_create_domain_entry(URLPriority* priority, const char* domain) {
+    if (!priority || !domain) return NULL;
     
-    if (priority->domain_count >= MAX_DOMAINS) {
-        return NULL;  // Too many domains
+    DomainEntry* entry = find_domain_entry(priority, domain);
+    if (entry) return entry;
+    
+    if (grow_index(priority) != 0) return NULL;
+    
+    // Make room for one more entry
+    if (priority->domain_count == priority->chunk_count * DOMAIN_CHUNK_SIZE) {
+        if (priority->chunk_count == priority->chunk_capacity) {
+            int new_capacity = priority->chunk_capacity ? priority->chunk_capacity * 2 : 8;
+            DomainEntry** new_chunks = (DomainEntry**)realloc(priority->chunks,
+                                                              new_capacity * sizeof(DomainEntry*));
+            if (!new_chunks) return NULL;
+            
+            priority->chunks = new_chunks;
+            priority->chunk_capacity = new_capacity;
+        }
+        
+        DomainEntry* chunk = (DomainEntry*)malloc(DOMAIN_CHUNK_SIZE * sizeof(DomainEntry));
+        if (!chunk) return NULL;
+        priority->chunks[priority->chunk_count++] = chunk;
     }
     
     // Initialize new entry
-    DomainStats* stats = &priority->domain_stats[priority->domain_count];
-    strncpy(stats->domain, domain, sizeof(stats->domain) - 1);
-    stats->domain[sizeof(stats->domain) - 1] = '\0';
-    stats->crawl_count = 0;
-    stats->last_crawled = 0;
-    
+    uint32_t n = (uint32_t)priority->domain_count;
+    entry = domain_entry_at(priority, n);
+    memset(entry, 0, sizeof(DomainEntry));
+    strncpy(entry->stats.domain, domain, sizeof(entry->stats.domain) - 1);
+    entry->hash = domain_hash(entry->stats.domain);
+    entry->tokens = priority->budget_burst;
+    entry->refilled_ms = priority_now_ms();
+    
+    index_insert(priority->index, priority->index_size, entry->hash, n);
     priority->domain_count++;
-    return stats;
+    return entry;
+}
+
+// Helper: Recent crawl count decayed from last_crawled to now
+static double decayed_crawls(const URLPriority* priority, const DomainStats* stats, time_t now) {
+    if (stats->last_crawled <= 0 || now <= stats->last_crawled) {
+        return stats->recent_crawls;
+    }
+    double age_days = (double)(now - stats->last_crawled) / (24.0 * 3600.0);
+    return stats->recent_crawls * prime_exp(-priority->factors.time_decay * age_days);
+}
+
+/**
+ * Domain diversity part of the score
+ * 
+ * Cached per domain; recomputed when the domain's stats or the number of
+ * domains change, or when the cached value is older than
+ * DOMAIN_SCORE_REFRESH (the decayed count drifts slowly).
+ */
+static float domain_score(URLPriority* priority, DomainEntry* entry, int total_domains, time_t now) {
+    if (total_domains <= 0) return 0.0f;
+    
+    if (!entry->score_valid || entry->score_total_domains != total_domains ||
+        now - entry->scored_at >= DOMAIN_SCORE_REFRESH) {
+        // Give bonus to underrepresented domains
+        float avg_crawls = (float)(decayed_crawls(priority, &entry->stats, now) / total_domains);
+        entry->score = (1.0f - avg_crawls) * priority->factors.domain_diversity;
+        entry->score_total_domains = total_domains;
+        entry->scored_at = now;
+        entry->score_valid = true;
+    }
+    return entry->score;
+}
+
+// Helper: Refill a domain's token bucket up to now
+static void refill_budget(URLPriority* priority, DomainEntry* entry) {
+    double now = priority_now_ms();
+    double elapsed = now - entry->refilled_ms;
+    if (elapsed > 0) {
+        entry->tokens += elapsed / 1000.0 * priority->budget_rate;
+        if (entry->tokens > priority->budget_burst) entry->tokens = priority->budget_burst;
+    }
+    entry->refilled_ms = now;
 }
 
 /**
@@ -184,17 +329,14 @@ int url_priority_calculate(URLPriority* priority, URLEntry* entry, int total_dom
     }
     
     // 2. Domain diversity bonus
-    DomainStats* stats = get_or_create_domain_stats(priority, entry->domain);
-    if (stats && total_domains > 0) {
-        // Give bonus to underrepresented domains
-        float avg_crawls = (float)stats->crawl_count / total_domains;
-        float diversity_score = (1.0f - avg_crawls) * priority->factors.domain_diversity;
-        score += diversity_score;
+    time_t now = time(NULL);
+    DomainEntry* domain = get_or_create_domain_entry(priority, entry->domain);
+    if (domain) {
+        score += domain_score(priority, domain, total_domains, now);
     }
     
     // 3. Time decay for recently crawled
     if (entry->last_crawled > 0) {
-        time_t now = time(NULL);
         time_t age = now - entry->last_crawled;
         
         // Decay: older = higher priority
@@ -232,10 +374,13 @@ int url_priority_calculate(URLPriority* priority, URLEntry* entry, int total_dom
 void url_priority_update_domain_stats(URLPriority* priority, const char* domain) {
     if (!priority || !domain) return;
     
-    DomainStats* stats = get_or_create_domain_stats(priority, domain);
-    if (stats) {
-        stats->crawl_count++;
-        stats->last_crawled = time(NULL);
+    DomainEntry* entry = get_or_create_domain_entry(priority, domain);
+    if (entry) {
+        time_t now = time(NULL);
+        entry->stats.recent_crawls = decayed_crawls(priority, &entry->stats, now) + 1.0;
+        entry->stats.crawl_count++;
+        entry->stats.last_crawled = now;
+        entry->score_valid = false;
     }
 }
 
@@ -245,13 +390,63 @@ void url_priority_update_domain_stats(URLPriority* priority, const char* domain)
 DomainStats* url_priority_get_domain_stats(URLPriority* priority, const char* domain) {
     if (!priority || !domain) return NULL;
     
-    for (int i = 0; i < priority->domain_count; i++) {
-        if (strcmp(priority->domain_stats[i].domain, domain) == 0) {
-            return &priority->domain_stats[i];
+    DomainEntry* entry = find_domain_entry(priority, domain);
+    return entry ? &entry->stats : NULL;
+}
+
+/**
+ * Set the per-domain crawl budget
+ */
+int url_priority_set_domain_budget(URLPriority* priority, double rate_per_second, double burst) {
+    if (!priority) return -1;
+    
+    bool was_enabled = priority->budget_rate > 0;
+    priority->budget_rate = rate_per_second > 0 ? rate_per_second : 0.0;
+    priority->budget_burst = burst >= 1.0 ? burst : 1.0;
+    
+    // Buckets start full when budgets are switched on; otherwise they
+    // keep their tokens, capped at the new size
+    double now = priority_now_ms();
+    for (int n = 0; n < priority->domain_count; n++) {
+        DomainEntry* entry = domain_entry_at(priority, n);
+        if (!was_enabled || entry->tokens > priority->budget_burst) {
+            entry->tokens = priority->budget_burst;
+            entry->refilled_ms = now;
         }
     }
+    return 0;
+}
+
+/**
+ * Check whether a domain has budget left
+ */
+bool url_priority_has_budget(URLPriority* priority, const char* domain) {
+    if (!priority || !domain) return false;
+    if (priority->budget_rate <= 0) return true;
     
-    return NULL;
+    // Unknown domains start with a full bucket
+    DomainEntry* entry = find_domain_entry(priority, domain);
+    if (!entry) return true;
+    
+    refill_budget(priority, entry);
+    return entry->tokens >= 1.0;
+}
+
+/**
+ * Take one unit of a domain's budget
+ */
+bool url_priority_consume_budget(URLPriority* priority, const char* domain) {
+    if (!priority || !domain) return false;
+    if (priority->budget_rate <= 0) return true;
+    
+    DomainEntry* entry = get_or_create_domain_entry(priority, domain);
+    if (!entry) return true;  // Out of memory: don't stall the crawl
+    
+    refill_budget(priority, entry);
+    if (entry->tokens < 1.0) return false;
+    
+    entry->tokens -= 1.0;
+    return true;
 }
 
 /**
@@ -269,6 +464,11 @@ int url_priority_set_factors(URLPriority* priority, PriorityFactors* factors) {
     if (!priority || !factors) return -1;
     
     memcpy(&priority->factors, factors, sizeof(PriorityFactors));
+    
+    // Cached domain scores used the old factors
+    for (int n = 0; n < priority->domain_count; n++) {
+        domain_entry_at(priority, n)->score_valid = false;
+    }
     return 0;
 }
 
@@ -278,8 +478,9 @@ int url_priority_set_factors(URLPriority* priority, PriorityFactors* factors) {
 void url_priority_reset_stats(URLPriority* priority) {
     if (!priority) return;
     
+    // Keep the allocated chunks for reuse
     priority->domain_count = 0;
-    memset(priority->domain_stats, 0, priority->domain_capacity * sizeof(DomainStats));
+    memset(priority->index, 0, priority->index_size * sizeof(uint32_t));
 }
 
 /**
@@ -3,6 +3,7 @@
 
 #include "url_database.h"
 #include <stdint.h>
+#include <stdbool.h>
 
 /**
  * URL Prioritization System
@@ -13,6 +14,15 @@
  * - Time-based decay for recently crawled
  * - Depth penalty for deep URLs
  * - Prime-based randomization for diversity
+ * - Per-domain crawl budgets (token buckets)
+ * 
+ * Domain statistics live in a hash table, so scoring a URL costs the same
+ * whether ten or a hundred thousand domains are tracked. The domain part
+ * of the score is cached per domain and recomputed only when that
+ * domain's statistics change (or at most once a minute, as its decayed
+ * crawl count fades). Domain crawl counts decay exponentially with the
+ * time_decay factor, so a domain crawled heavily last week is no longer
+ * penalized as if it were crawled today.
  */
 
 // Priority factors configuration
@@ -27,8 +37,9 @@ typedef struct {
 // Domain statistics for diversity calculation
 typedef struct {
     char domain[256];
-    int crawl_count;
+    int crawl_count;            // Total crawls
     time_t last_crawled;
+    double recent_crawls;       // Crawl count decayed by time_decay (as of last_crawled)
 } DomainStats;
 
 // Priority calculator
@@ -76,6 +87,39 @@ void url_priority_update_domain_stats(URLPriority* priority, const char* domain)
  */
 DomainStats* url_priority_get_domain_stats(URLPriority* priority, const char* domain);
 
+/**
+ * Set the per-domain crawl budget
+ * 
+ * Each domain gets a token bucket holding up to `burst` tokens that
+ * refills at `rate_per_second`. The fetcher takes a token for every URL
+ * it hands out, so one busy domain cannot fill the fetch queue while
+ * others wait.
+ * 
+ * @param priority Priority calculator
+ * @param rate_per_second Tokens added per second (<= 0 disables budgets)
+ * @param burst Bucket size (at least 1)
+ * @return 0 on success, -1 on error
+ */
+int url_priority_set_domain_budget(URLPriority* priority, double rate_per_second, double burst);
+
+/**
+ * Check whether a domain has budget left (does not consume it)
+ * 
+ * @param priority Priority calculator
+ * @param domain Domain to check
+ * @return true if a URL from the domain may be fetched now
+ */
+bool url_priority_has_budget(URLPriority* priority, const char* domain);
+
+/**
+ * Take one unit of a domain's budget
+ * 
+ * @param priority Priority calculator
+ * @param domain Domain about to be fetched
+ * @return true if budget was available (and was taken), false otherwise
+ */
+bool url_priority_consume_budget(URLPriority* priority, const char* domain);
+
 /**
  * Get prime-based random value
  * 
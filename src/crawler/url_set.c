@@ -0,0 +1,580 @@
+/**
+ * URL Sets Implementation
+ *
+ * Normalized-URL hash set and persistent Bloom filter used for
+ * duplicate detection in the link queue and the preprocessor.
+ */
+
+#include "url_set.h"
+#include <stdlib.h>
+#include <string.h>
+#include <strings.h>
+#include <stdio.h>
+#include <ctype.h>
+#include <math.h>
+#include <unistd.h>
+
+#define URL_SET_DEFAULT_CAPACITY 1024
+#define URL_BLOOM_MAX_HASHES 16
+
+/**
+ * Hash set slot (len == 0 marks an empty slot)
+ */
+typedef struct {
+    uint64_t hash;
+    size_t offset;             // Offset of normalized URL in arena
+    uint32_t len;
+    int value;
+} URLSetEntry;
+
+struct URLSet {
+    URLSetEntry* entries;
+    size_t mask;               // Capacity - 1 (capacity is a power of two)
+    size_t count;
+    char* arena;
+    size_t arena_used;
+    size_t arena_capacity;
+};
+
+/**
+ * On-disk Bloom filter header, followed by num_bits / 8 bytes for the
+ * current generation and, once rotated, as many for the previous one
+ */
+typedef struct {
+    char magic[8];
+    uint32_t version;
+    uint32_t num_hashes;
+    uint64_t num_bits;
+    uint64_t count;
+    uint64_t capacity;
+    uint64_t rotations;
+} URLBloomHeader;
+
+struct URLBloom {
+    uint64_t* bits;
+    uint64_t* prev_bits;        // Previous generation (NULL until rotated)
+    uint64_t num_bits;
+    uint32_t num_hashes;
+    uint64_t count;             // URLs in the current generation
+    uint64_t capacity;          // URLs the dimensions were chosen for
+    uint64_t rotations;
+    char path[1024];
+};
+
+// ============================================================================
+// NORMALIZATION AND HASHING
+// ============================================================================
+
+/**
+ * Normalize a URL for duplicate detection
+ */
+int url_normalize(const char* url, char* out, size_t out_size) {
+    if (!url || !out || out_size == 0) return -1;
+    
+    size_t pos = 0;
+    const char* p = url;
+    const char* scheme_end = strstr(url, "://");
+    
+    // Only treat "://" as a scheme separator if it precedes any path
+    if (scheme_end && strcspn(url, "/?#") < (size_t)(scheme_end - url)) {
+        scheme_end = NULL;
+    }
+    
+    if (scheme_end) {
+        size_t scheme_len = scheme_end - url;
+        if (scheme_len + 3 >= out_size) return -1;
+        for (size_t i = 0; i < scheme_len; i++) {
+            out[pos++] = (char)tolower((unsigned char)url[i]);
+        }
+        memcpy(out + pos, "://", 3);
+        pos += 3;
+        
+        // Authority: [userinfo@]host[:port]
+        const char* host = scheme_end + 3;
+        size_t authority_len = strcspn(host, "/?#");
+        const char* at = memchr(host, '@', authority_len);
+        const char* host_start = at ? at + 1 : host;
+        const char* host_end = host + authority_len;
+        
+        // Drop the default port for the scheme
+        const char* colon = memchr(host_start, ':', host_end - host_start);
+        if (colon) {
+            size_t port_len = host_end - colon;
+            if ((scheme_len == 4 && port_len == 3 && strncmp(colon, ":80", 3) == 0 &&
+                 strncasecmp(url, "http", 4) == 0) ||
+                (scheme_len == 5 && port_len == 4 && strncmp(colon, ":443", 4) == 0 &&
+                 strncasecmp(url, "https", 5) == 0)) {
+                host_end = colon;
+            }
+        }
+        
+        if (pos + (host_end - host) + 1 >= out_size) return -1;
+        for (const char* c = host; c < host_end; c++) {
+            out[pos++] = c < host_start ? *c : (char)tolower((unsigned char)*c);
+        }
+        
+        p = host + authority_len;
+        if (*p != '/') {
+            out[pos++] = '/';
+        }
+    }
+    
+    // Path and query are case-sensitive; the fragment is dropped
+    size_t rest_len = strcspn(p, "#");
+    if (pos + rest_len >= out_size) return -1;
+    memcpy(out + pos, p, rest_len);
+    pos += rest_len;
+    out[pos] = '\0';
+    
+    return (int)pos;
+}
+
+/**
+ * FNV-1a over bytes followed by a splitmix64 finalizer
+ */
+static uint64_t hash_bytes(const char* data, size_t len) {
+    uint64_t h = 1469598103934665603ULL;
+    for (size_t i = 0; i < len; i++) {
+        h ^= (unsigned char)data[i];
+        h *= 1099511628211ULL;
+    }
+    h ^= h >> 30;
+    h *= 0xbf58476d1ce4e5b9ULL;
+    h ^= h >> 27;
+    h *= 0x94d049bb133111ebULL;
+    h ^= h >> 31;
+    return h;
+}
+
+/**
+ * 64-bit fingerprint of a URL
+ */
+uint64_t url_fingerprint(const char* url) {
+    if (!url) return 0;
+    
+    char normalized[URL_SET_MAX_URL];
+    int len = url_normalize(url, normalized, sizeof(normalized));
+    if (len < 0) {
+        return hash_bytes(url, strlen(url));
+    }
+    return hash_bytes(normalized, (size_t)len);
+}
+
+// ============================================================================
+// EXACT HASH SET
+// ============================================================================
+
+/**
+ * Create an exact URL set
+ */
+URLSet* url_set_create(size_t initial_capacity) {
+    URLSet* set = (URLSet*)calloc(1, sizeof(URLSet));
+    if (!set) return NULL;
+    
+    // Power of two with load factor <= 0.5 at the expected size
+    size_t capacity = URL_SET_DEFAULT_CAPACITY;
+    while (capacity < initial_capacity * 2) capacity <<= 1;
+    
+    set->entries = (URLSetEntry*)calloc(capacity, sizeof(URLSetEntry));
+    set->arena_capacity = capacity * 32;
+    set->arena = (char*)malloc(set->arena_capacity);
+    if (!set->entries || !set->arena) {
+        free(set->entries);
+        free(set->arena);
+        free(set);
+        return NULL;
+    }
+    set->mask = capacity - 1;
+    
+    return set;
+}
+
+/**
+ * Find the slot holding a normalized URL, or the empty slot where it belongs
+ */
+static size_t find_slot(const URLSet* set, const char* key, size_t len, uint64_t hash) {
+    size_t i = hash & set->mask;
+    while (set->entries[i].len != 0) {
+        const URLSetEntry* e = &set->entries[i];
+        if (e->hash == hash && e->len == len && memcmp(set->arena + e->offset, key, len) == 0) {
+            break;
+        }
+        i = (i + 1) & set->mask;
+    }
+    return i;
+}
+
+/**
+ * Double the table and reinsert all entries
+ */
+static int grow_table(URLSet* set) {
+    size_t capacity = (set->mask + 1) * 2;
+    URLSetEntry* entries = (URLSetEntry*)calloc(capacity, sizeof(URLSetEntry));
+    if (!entries) return -1;
+    
+    for (size_t i = 0; i <= set->mask; i++) {
+        if (set->entries[i].len == 0) continue;
+        size_t j = set->entries[i].hash & (capacity - 1);
+        while (entries[j].len != 0) j = (j + 1) & (capacity - 1);
+        entries[j] = set->entries[i];
+    }
+    
+    free(set->entries);
+    set->entries = entries;
+    set->mask = capacity - 1;
+    return 0;
+}
+
+/**
+ * Insert a URL
+ */
+int url_set_insert(URLSet* set, const char* url, int value) {
+    if (!set || !url) return -1;
+    
+    char key[URL_SET_MAX_URL];
+    int len = url_normalize(url, key, sizeof(key));
+    if (len <= 0) return -1;
+    
+    uint64_t hash = hash_bytes(key, (size_t)len);
+    size_t slot = find_slot(set, key, (size_t)len, hash);
+    if (set->entries[slot].len != 0) {
+        return 0;  // Already present
+    }
+    
+    // Keep the load factor under 0.7
+    if ((set->count + 1) * 10 > (set->mask + 1) * 7) {
+        if (grow_table(set) != 0) return -1;
+        slot = find_slot(set, key, (size_t)len, hash);
+    }
+    
+    if (set->arena_used + (size_t)len > set->arena_capacity) {
+        size_t capacity = set->arena_capacity * 2;
+        while (capacity < set->arena_used + (size_t)len) capacity *= 2;
+        char* arena = (char*)realloc(set->arena, capacity);
+        if (!arena) return -1;
+        set->arena = arena;
+        set->arena_capacity = capacity;
+    }
+    
+    memcpy(set->arena + set->arena_used, key, (size_t)len);
+    URLSetEntry* e = &set->entries[slot];
+    e->hash = hash;
+    e->offset = set->arena_used;
+    e->len = (uint32_t)len;
+    e->value = value;
+    
+    set->arena_used += (size_t)len;
+    set->count++;
+    return 1;
+}
+
+/**
+ * Look up the value stored for a URL
+ */
+int url_set_find(const URLSet* set, const char* url) {
+    if (!set || !url) return -1;
+    
+    char key[URL_SET_MAX_URL];
+    int len = url_normalize(url, key, sizeof(key));
+    if (len <= 0) return -1;
+    
+    size_t slot = find_slot(set, key, (size_t)len, hash_bytes(key, (size_t)len));
+    return set->entries[slot].len != 0 ? set->entries[slot].value : -1;
+}
+
+/**
+ * Check whether a URL is in the set
+ */
+bool url_set_contains(const URLSet* set, const char* url) {
+    if (!set || !url) return false;
+    
+    char key[URL_SET_MAX_URL];
+    int len = url_normalize(url, key, sizeof(key));
+    if (len <= 0) return false;
+    
+    size_t slot = find_slot(set, key, (size_t)len, hash_bytes(key, (size_t)len));
+    return set->entries[slot].len != 0;
+}
+
+/**
+ * Number of URLs in the set
+ */
+size_t url_set_size(const URLSet* set) {
+    return set ? set->count : 0;
+}
+
+/**
+ * Remove all URLs
+ */
+void url_set_clear(URLSet* set) {
+    if (!set) return;
+    
+    memset(set->entries, 0, (set->mask + 1) * sizeof(URLSetEntry));
+    set->count = 0;
+    set->arena_used = 0;
+}
+
+/**
+ * Destroy a URL set
+ */
+void url_set_destroy(URLSet* set) {
+    if (!set) return;
+    
+    free(set->entries);
+    free(set->arena);
+    free(set);
+}
+
+// ============================================================================
+// PERSISTENT BLOOM FILTER
+// ============================================================================
+
+/**
+ * Load a filter written by url_bloom_save; returns 0 on success
+ */
+static int bloom_load(URLBloom* bloom) {
+    FILE* fp = fopen(bloom->path, "rb");
+    if (!fp) return -1;
+    
+    URLBloomHeader header;
+    if (fread(&header, sizeof(header), 1, fp) != 1 ||
+        memcmp(header.magic, URL_BLOOM_MAGIC, 8) != 0 ||
+        header.version != URL_BLOOM_VERSION ||
+        header.num_hashes == 0 || header.num_hashes > URL_BLOOM_MAX_HASHES ||
+        header.num_bits == 0 || header.num_bits % 64 != 0 || header.capacity == 0) {
+        fclose(fp);
+        return -1;
+    }
+    
+    size_t bytes = header.num_bits / 8;
+    uint64_t* bits = (uint64_t*)malloc(bytes);
+    uint64_t* prev_bits = header.rotations > 0 ? (uint64_t*)malloc(bytes) : NULL;
+    if (!bits || fread(bits, 1, bytes, fp) != bytes ||
+        (header.rotations > 0 && (!prev_bits || fread(prev_bits, 1, bytes, fp) != bytes))) {
+        free(bits);
+        free(prev_bits);
+        fclose(fp);
+        return -1;
+    }
+    fclose(fp);
+    
+    bloom->bits = bits;
+    bloom->prev_bits = prev_bits;
+    bloom->num_bits = header.num_bits;
+    bloom->num_hashes = header.num_hashes;
+    bloom->count = header.count;
+    bloom->capacity = header.capacity;
+    bloom->rotations = header.rotations;
+    return 0;
+}
+
+/**
+ * Open a Bloom filter
+ */
+URLBloom* url_bloom_open(const char* path, size_t expected_items, double fp_rate) {
+    URLBloom* bloom = (URLBloom*)calloc(1, sizeof(URLBloom));
+    if (!bloom) return NULL;
+    
+    if (path) {
+        strncpy(bloom->path, path, sizeof(bloom->path) - 1);
+        if (bloom_load(bloom) == 0) {
+            return bloom;  // Keep the stored dimensions
+        }
+        if (access(path, F_OK) == 0) {
+            fprintf(stderr, "Invalid Bloom filter %s, starting empty\n", path);
+        }
+    }
+    
+    if (expected_items == 0) expected_items = 1;
+    if (fp_rate <= 0.0 || fp_rate >= 1.0) fp_rate = 1e-4;
+    bloom->capacity = expected_items;
+    
+    // m = -n ln p / (ln 2)^2, k = (m / n) ln 2
+    double ln2 = log(2.0);
+    double m = -(double)expected_items * log(fp_rate) / (ln2 * ln2);
+    bloom->num_bits = ((uint64_t)m + 63) & ~(uint64_t)63;
+    if (bloom->num_bits < 64) bloom->num_bits = 64;
+    
+    int k = (int)lround((double)bloom->num_bits / expected_items * ln2);
+    if (k < 1) k = 1;
+    if (k > URL_BLOOM_MAX_HASHES) k = URL_BLOOM_MAX_HASHES;
+    bloom->num_hashes = (uint32_t)k;
+    
+    bloom->bits = (uint64_t*)calloc(bloom->num_bits / 64, sizeof(uint64_t));
+    if (!bloom->bits) {
+        free(bloom);
+        return NULL;
+    }
+    
+    return bloom;
+}
+
+/**
+ * Bit positions via double hashing: h1 + i * h2
+ */
+static void bloom_positions(const URLBloom* bloom, const char* url, uint64_t* positions) {
+    uint64_t h1 = url_fingerprint(url);
+    uint64_t h2 = hash_bytes((const char*)&h1, sizeof(h1)) | 1;
+    for (uint32_t i = 0; i < bloom->num_hashes; i++) {
+        positions[i] = (h1 + i * h2) % bloom->num_bits;
+    }
+}
+
+/**
+ * Check whether every position is set in one generation's bits
+ */
+static bool bloom_bits_contain(const URLBloom* bloom, const uint64_t* bits, const uint64_t* positions) {
+    for (uint32_t i = 0; i < bloom->num_hashes; i++) {
+        if (!(bits[positions[i] >> 6] & (1ULL << (positions[i] & 63)))) {
+            return false;
+        }
+    }
+    return true;
+}
+
+/**
+ * Add a URL and report whether it was probably seen before
+ * 
+ * URLs only in the previous generation are copied into the current one,
+ * so links that keep turning up survive the next rotation.
+ */
+bool url_bloom_test_and_add(URLBloom* bloom, const char* url) {
+    if (!bloom || !url) return false;
+    
+    uint64_t positions[URL_BLOOM_MAX_HASHES];
+    bloom_positions(bloom, url, positions);
+    
+    bool present = true;
+    for (uint32_t i = 0; i < bloom->num_hashes; i++) {
+        uint64_t mask = 1ULL << (positions[i] & 63);
+        uint64_t* word = &bloom->bits[positions[i] >> 6];
+        if (!(*word & mask)) {
+            present = false;
+            *word |= mask;
+        }
+    }
+    
+    if (present) return true;
+    
+    bloom->count++;
+    return bloom->prev_bits && bloom_bits_contain(bloom, bloom->prev_bits, positions);
+}
+
+/**
+ * Add a URL
+ */
+void url_bloom_add(URLBloom* bloom, const char* url) {
+    url_bloom_test_and_add(bloom, url);
+}
+
+/**
+ * Check whether a URL was probably seen
+ */
+bool url_bloom_maybe_contains(const URLBloom* bloom, const char* url) {
+    if (!bloom || !url) return false;
+    
+    uint64_t positions[URL_BLOOM_MAX_HASHES];
+    bloom_positions(bloom, url, positions);
+    
+    return bloom_bits_contain(bloom, bloom->bits, positions) ||
+           (bloom->prev_bits && bloom_bits_contain(bloom, bloom->prev_bits, positions));
+}
+
+/**
+ * Number of URLs added to the current generation
+ */
+uint64_t url_bloom_count(const URLBloom* bloom) {
+    return bloom ? bloom->count : 0;
+}
+
+/**
+ * Number of URLs the filter was sized for
+ */
+uint64_t url_bloom_capacity(const URLBloom* bloom) {
+    return bloom ? bloom->capacity : 0;
+}
+
+/**
+ * Check whether the current generation holds its design capacity
+ */
+bool url_bloom_is_full(const URLBloom* bloom) {
+    return bloom && bloom->count >= bloom->capacity;
+}
+
+/**
+ * Start a new generation
+ */
+int url_bloom_rotate(URLBloom* bloom) {
+    if (!bloom) return -1;
+    
+    // Reuse the oldest generation's bits once there is one
+    uint64_t* fresh = bloom->prev_bits;
+    if (!fresh) {
+        fresh = (uint64_t*)malloc(bloom->num_bits / 8);
+        if (!fresh) return -1;
+    }
+    memset(fresh, 0, bloom->num_bits / 8);
+    
+    bloom->prev_bits = bloom->bits;
+    bloom->bits = fresh;
+    bloom->count = 0;
+    bloom->rotations++;
+    return 0;
+}
+
+/**
+ * Number of rotations since the filter was created
+ */
+uint64_t url_bloom_rotations(const URLBloom* bloom) {
+    return bloom ? bloom->rotations : 0;
+}
+
+/**
+ * Write the filter to its file
+ */
+int url_bloom_save(URLBloom* bloom) {
+    if (!bloom || bloom->path[0] == '\0') return -1;
+    
+    char tmp_path[1100];
+    snprintf(tmp_path, sizeof(tmp_path), "%s.tmp", bloom->path);
+    
+    FILE* fp = fopen(tmp_path, "wb");
+    if (!fp) return -1;
+    
+    URLBloomHeader header;
+    memset(&header, 0, sizeof(header));
+    memcpy(header.magic, URL_BLOOM_MAGIC, 8);
+    header.version = URL_BLOOM_VERSION;
+    header.num_hashes = bloom->num_hashes;
+    header.num_bits = bloom->num_bits;
+    header.count = bloom->count;
+    header.capacity = bloom->capacity;
+    header.rotations = bloom->rotations;
+    
+    size_t bytes = bloom->num_bits / 8;
+    int ok = fwrite(&header, sizeof(header), 1, fp) == 1 &&
+             fwrite(bloom->bits, 1, bytes, fp) == bytes &&
+             (!bloom->prev_bits || fwrite(bloom->prev_bits, 1, bytes, fp) == bytes) &&
+             fflush(fp) == 0 && fsync(fileno(fp)) == 0;
+    fclose(fp);
+    
+    if (!ok || rename(tmp_path, bloom->path) != 0) {
+        unlink(tmp_path);
+        return -1;
+    }
+    return 0;
+}
+
+/**
+ * Save and free the filter
+ */
+void url_bloom_close(URLBloom* bloom) {
+    if (!bloom) return;
+    
+    if (bloom->path[0]) {
+        url_bloom_save(bloom);
+    }
+    free(bloom->bits);
+    free(bloom->prev_bits);
+    free(bloom);
+}
@@ -0,0 +1,189 @@
+#ifndef URL_SET_H
+#define URL_SET_H
+
+#include <stddef.h>
+#include <stdint.h>
+#include <stdbool.h>
+
+/**
+ * URL Sets for Duplicate Detection
+ *
+ * Two structures keyed by normalized URL:
+ * - URLSet: exact open-addressing hash set with an integer value per URL
+ *   (e.g. an index into a link array). Strings live in one arena.
+ * - URLBloom: fixed-size Bloom filter for the "ever seen" set, persisted
+ *   to disk so it survives crawler restarts. False positives are possible
+ *   (at the configured rate), false negatives are not. Once a filter holds
+ *   its design capacity it can be rotated: the full bit array becomes a
+ *   read-only previous generation and new URLs go to an empty one, so
+ *   memory and the false-positive rate stay bounded while the most recent
+ *   URLs are still remembered.
+ *
+ * Normalization lowercases scheme and host, drops the fragment and the
+ * default port, and turns an empty path into "/". The query is kept.
+ *
+ * Neither structure locks internally; callers that share one across
+ * threads must serialize access.
+ */
+
+#define URL_SET_MAX_URL 2048
+#define URL_BLOOM_MAGIC "URLBLOOM"
+#define URL_BLOOM_VERSION 2
+
+// Exact URL set
+typedef struct URLSet URLSet;
+
+// Persistent Bloom filter
+typedef struct URLBloom URLBloom;
+
+/**
+ * Normalize a URL for duplicate detection
+ *
+ * @param url Input URL
+ * @param out Output buffer
+ * @param out_size Size of output buffer
+ * @return Length of normalized URL, or -1 if it does not fit
+ */
+int url_normalize(const char* url, char* out, size_t out_size);
+
+/**
+ * 64-bit fingerprint of a URL (normalized first)
+ *
+ * @param url Input URL
+ * @return Fingerprint
+ */
+uint64_t url_fingerprint(const char* url);
+
+/**
+ * Create an exact URL set
+ *
+ * @param initial_capacity Expected number of URLs (0 for default)
+ * @return Set or NULL on error
+ */
+URLSet* url_set_create(size_t initial_capacity);
+
+/**
+ * Insert a URL
+ *
+ * @param set URL set
+ * @param url URL to insert
+ * @param value Value stored with the URL (kept if already present)
+ * @return 1 if inserted, 0 if already present, -1 on error
+ */
+int url_set_insert(URLSet* set, const char* url, int value);
+
+/**
+ * Look up the value stored for a URL
+ *
+ * @param set URL set
+ * @param url URL to look up
+ * @return Stored value, or -1 if not present
+ */
+int url_set_find(const URLSet* set, const char* url);
+
+/**
+ * Check whether a URL is in the set
+ *
+ * @param set URL set
+ * @param url URL to check
+ * @return true if present
+ */
+bool url_set_contains(const URLSet* set, const char* url);
+
+/**
+ * Number of URLs in the set
+ */
+size_t url_set_size(const URLSet* set);
+
+/**
+ * Remove all URLs (keeps allocated capacity)
+ */
+void url_set_clear(URLSet* set);
+
+/**
+ * Destroy a URL set
+ */
+void url_set_destroy(URLSet* set);
+
+/**
+ * Open a Bloom filter, loading it from disk if the file exists
+ *
+ * A missing or invalid file starts an empty filter sized for
+ * expected_items at the given false-positive rate.
+ *
+ * @param path File for persistence (NULL for memory only)
+ * @param expected_items Expected number of distinct URLs
+ * @param fp_rate Target false-positive rate (e.g. 1e-4)
+ * @return Filter or NULL on error
+ */
+URLBloom* url_bloom_open(const char* path, size_t expected_items, double fp_rate);
+
+/**
+ * Add a URL and report whether it was (probably) seen before
+ *
+ * @param bloom Bloom filter
+ * @param url URL to add
+ * @return true if the URL was probably already present
+ */
+bool url_bloom_test_and_add(URLBloom* bloom, const char* url);
+
+/**
+ * Add a URL
+ */
+void url_bloom_add(URLBloom* bloom, const char* url);
+
+/**
+ * Check whether a URL was probably seen
+ *
+ * @return false if definitely not seen, true if probably seen
+ */
+bool url_bloom_maybe_contains(const URLBloom* bloom, const char* url);
+
+/**
+ * Number of URLs added to the current generation
+ */
+uint64_t url_bloom_count(const URLBloom* bloom);
+
+/**
+ * Number of URLs the filter was sized for
+ */
+uint64_t url_bloom_capacity(const URLBloom* bloom);
+
+/**
+ * Check whether the current generation holds its design capacity
+ * 
+ * Past that point the false-positive rate climbs above the configured
+ * one; see url_bloom_rotate.
+ */
+bool url_bloom_is_full(const URLBloom* bloom);
+
+/**
+ * Start a new generation
+ * 
+ * The current bits become the previous generation (dropping the one
+ * before it) and the current generation starts empty. Lookups check
+ * both, so URLs added in the last one to two capacities' worth are
+ * still reported as seen; older ones are forgotten.
+ * 
+ * @return 0 on success, -1 on error (filter unchanged)
+ */
+int url_bloom_rotate(URLBloom* bloom);
+
+/**
+ * Number of rotations since the filter was created
+ */
+uint64_t url_bloom_rotations(const URLBloom* bloom);
+
+/**
+ * Write the filter to its file (atomically, via rename)
+ *
+ * @return 0 on success, -1 on error or if the filter has no file
+ */
+int url_bloom_save(URLBloom* bloom);
+
+/**
+ * Save (if backed by a file) and free the filter
+ */
+void url_bloom_close(URLBloom* bloom);
+
+#endif // URL_SET_H
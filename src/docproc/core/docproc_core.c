@@ -5,6 +5,8 @@
  */
 
 #include "../docproc.h"
+#include "../formats/zip_formats.h"
+#include "../utils/subprocess_pool.h"
 #include <stdlib.h>
 #include <string.h>
 #include <stdio.h>
@@ -12,6 +14,11 @@
 // Library initialization state
 static bool g_initialized = false;
 
+// External tools used by the CLI and archive extractors
+static const char* EXTERNAL_TOOLS[] = {
+    "pdftotext", "antiword", "unrtf", "tesseract", "jq", "tar"
+};
+
 /**
  * Initialize document processing library
  */
@@ -20,8 +27,13 @@ DocProcStatus docproc_init(void) {
         return DOCPROC_SUCCESS;
     }
     
-    // Initialize any global state here
-    // For now, just mark as initialized
+    // One subprocess slot per core; resolve tools now so extraction
+    // never probes PATH
+    subprocess_pool_init(0);
+    for (size_t i = 0; i < sizeof(EXTERNAL_TOOLS) / sizeof(EXTERNAL_TOOLS[0]); i++) {
+        subprocess_find_tool(EXTERNAL_TOOLS[i]);
+    }
+    
     g_initialized = true;
     
     return DOCPROC_SUCCESS;
@@ -225,6 +237,101 @@ DocProcStatus docproc_extract_format(const char* filepath,
     return status;
 }
 
+/**
+ * Extract text from a document held in memory
+ */
+DocProcStatus docproc_extract_buffer(const void* data, size_t size,
+                                     DocProcFormat format,
+                                     const DocProcOptions* options,
+                                     DocProcResult* result) {
+    if (!data || !result) {
+        return DOCPROC_ERROR_INVALID_PARAMETER;
+    }
+    
+    // Initialize result
+    memset(result, 0, sizeof(DocProcResult));
+    result->format = format;
+    
+    // Use default options if not provided
+    DocProcOptions default_opts;
+    if (!options) {
+        docproc_default_options(&default_opts);
+        options = &default_opts;
+    }
+    
+    DocProcStatus (*extract)(ZipArchive*, char*, size_t) = NULL;
+    switch (format) {
+        case DOCPROC_FORMAT_DOCX: extract = docproc_extract_docx_archive; break;
+        case DOCPROC_FORMAT_XLSX: extract = docproc_extract_xlsx_archive; break;
+        case DOCPROC_FORMAT_PPTX: extract = docproc_extract_pptx_archive; break;
+        case DOCPROC_FORMAT_ODT:
+        case DOCPROC_FORMAT_ODS:
+        case DOCPROC_FORMAT_ODP: extract = docproc_extract_odf_archive; break;
+        case DOCPROC_FORMAT_EPUB: extract = docproc_extract_epub_archive; break;
+        case DOCPROC_FORMAT_ARCHIVE: extract = docproc_extract_zip_archive; break;
+        case DOCPROC_FORMAT_TXT:
+        case DOCPROC_FORMAT_CODE:
+        case DOCPROC_FORMAT_XML:
+        case DOCPROC_FORMAT_MARKDOWN:
+        case DOCPROC_FORMAT_CSV:
+        case DOCPROC_FORMAT_SQL:
+            break;
+        default:
+            result->status = DOCPROC_ERROR_UNSUPPORTED_FORMAT;
+            snprintf(result->error_message, sizeof(result->error_message),
+                    "In-memory extraction not supported for format: %s", docproc_format_name(format));
+            return DOCPROC_ERROR_UNSUPPORTED_FORMAT;
+    }
+    
+    // Allocate text buffer
+    result->text = (char*)malloc(options->max_text_size);
+    if (!result->text) {
+        result->status = DOCPROC_ERROR_OUT_OF_MEMORY;
+        snprintf(result->error_message, sizeof(result->error_message),
+                "Failed to allocate text buffer");
+        return DOCPROC_ERROR_OUT_OF_MEMORY;
+    }
+    
+    DocProcStatus status;
+    if (extract) {
+        ZipArchive* archive = zip_archive_open_buffer(data, size);
+        if (archive) {
+            status = extract(archive, result->text, options->max_text_size);
+            zip_archive_close(archive);
+        } else {
+            status = DOCPROC_ERROR_EXTRACTION_FAILED;
+            snprintf(result->error_message, sizeof(result->error_message),
+                    "Not a valid ZIP container");
+        }
+    } else {
+        // Plain text formats are the bytes themselves
+        size_t length = size < options->max_text_size - 1 ? size : options->max_text_size - 1;
+        memcpy(result->text, data, length);
+        result->text[length] = '\0';
+        status = DOCPROC_SUCCESS;
+    }
+    
+    // Update result
+    result->status = status;
+    if (status == DOCPROC_SUCCESS) {
+        result->text_length = strlen(result->text);
+        
+        // Check minimum length
+        if (result->text_length < options->min_text_length) {
+            status = DOCPROC_ERROR_EXTRACTION_FAILED;
+            snprintf(result->error_message, sizeof(result->error_message),
+                    "Extracted text too short: %zu bytes (minimum: %zu)",
+                    result->text_length, options->min_text_length);
+            result->status = status;
+        }
+    } else if (result->error_message[0] == '\0') {
+        snprintf(result->error_message, sizeof(result->error_message),
+                "Extraction failed for format: %s", docproc_format_name(format));
+    }
+    
+    return status;
+}
+
 /**
  * Free extraction result
  */
@@ -239,6 +346,13 @@ void docproc_free_result(DocProcResult* result) {
     result->text_length = 0;
 }
 
+/**
+ * Check if an external extraction tool is installed
+ */
+bool docproc_tool_available(const char* tool) {
+    return subprocess_tool_available(tool);
+}
+
 /**
  * Get library version
  */
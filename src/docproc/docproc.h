@@ -173,6 +173,25 @@ DocProcStatus docproc_extract_format(const char* filepath,
                                      const DocProcOptions* options,
                                      DocProcResult* result);
 
+/**
+ * Extract text from a document held in memory
+ * 
+ * Supports the ZIP-based formats (DOCX, XLSX, PPTX, ODT, ODS, ODP, EPUB
+ * and ZIP archives), which are read entirely in-process, and the plain
+ * text formats. Other formats return DOCPROC_ERROR_UNSUPPORTED_FORMAT.
+ * 
+ * @param data Document bytes
+ * @param size Number of bytes
+ * @param format Document format
+ * @param options Extraction options (NULL for defaults)
+ * @param result Output result structure
+ * @return DOCPROC_SUCCESS on success, error code otherwise
+ */
+DocProcStatus docproc_extract_buffer(const void* data, size_t size,
+                                     DocProcFormat format,
+                                     const DocProcOptions* options,
+                                     DocProcResult* result);
+
 /**
  * Free extraction result
  * 
@@ -310,6 +329,17 @@ int docproc_get_supported_extensions(const char** extensions, int max_count);
  */
 bool docproc_is_extension_supported(const char* extension);
 
+/**
+ * Check if an external extraction tool is installed
+ * 
+ * Tools are looked up once (docproc_init resolves the ones the library
+ * uses) and the answer is cached.
+ * 
+ * @param tool Tool name (e.g., "pdftotext", "tesseract")
+ * @return true if the tool is on PATH, false otherwise
+ */
+bool docproc_tool_available(const char* tool);
+
 /**
  * Get library version
  * 
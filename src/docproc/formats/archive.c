@@ -2,58 +2,86 @@
  * Archive Extractor
  * 
  * Extracts and processes contents of archive files.
+ * ZIP archives are read in-process; tar archives are streamed through
+ * tar's standard output, so nothing is unpacked to a temp directory.
  */
 
-#include "../docproc.h"
+#include "zip_formats.h"
+#include "../utils/subprocess_pool.h"
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
-#include <unistd.h>
-#include <sys/stat.h>
+
+// Members whose contents are collected
+static const char* TEXT_SUFFIXES[] = { ".txt", ".md", ".c", ".h", ".py" };
+#define NUM_TEXT_SUFFIXES (sizeof(TEXT_SUFFIXES) / sizeof(TEXT_SUFFIXES[0]))
+
+static bool is_text_member(const char* name) {
+    size_t len = strlen(name);
+    for (size_t i = 0; i < NUM_TEXT_SUFFIXES; i++) {
+        size_t suffix_len = strlen(TEXT_SUFFIXES[i]);
+        if (len > suffix_len && strcmp(name + len - suffix_len, TEXT_SUFFIXES[i]) == 0) {
+            return true;
+        }
+    }
+    return false;
+}
+
+/**
+ * Concatenate the text members of a ZIP archive
+ */
+DocProcStatus docproc_extract_zip_archive(ZipArchive* archive, char* text, size_t text_size) {
+    char* out = text;
+    char* out_end = text + text_size - 1;
+    
+    int count = zip_archive_count(archive);
+    for (int i = 0; i < count && out < out_end; i++) {
+        const char* name = zip_archive_name(archive, i);
+        if (!name || !is_text_member(name)) {
+            continue;
+        }
+        
+        size_t size;
+        char* data = zip_archive_read_index(archive, i, &size);
+        if (!data) {
+            continue;
+        }
+        
+        if (size > (size_t)(out_end - out)) size = out_end - out;
+        memcpy(out, data, size);
+        out += size;
+        free(data);
+    }
+    
+    *out = '\0';
+    return DOCPROC_SUCCESS;
+}
 
 /**
  * Extract text from archive
  */
 DocProcStatus docproc_extract_archive(const char* filepath, char* text, size_t text_size) {
-    // Create temp directory
-    char temp_dir[1024];
-    snprintf(temp_dir, sizeof(temp_dir), "/tmp/docproc_extract_%d", getpid());
-    mkdir(temp_dir, 0755);
-    
-    // Extract based on type
-    char cmd[2048];
     if (strstr(filepath, ".zip")) {
-        snprintf(cmd, sizeof(cmd), "unzip -q '%s' -d '%s' 2>/dev/null", filepath, temp_dir);
-    } else if (strstr(filepath, ".tar.gz") || strstr(filepath, ".tgz")) {
-        snprintf(cmd, sizeof(cmd), "tar -xzf '%s' -C '%s' 2>/dev/null", filepath, temp_dir);
-    } else if (strstr(filepath, ".tar")) {
-        snprintf(cmd, sizeof(cmd), "tar -xf '%s' -C '%s' 2>/dev/null", filepath, temp_dir);
-    } else {
-        return DOCPROC_ERROR_UNSUPPORTED_FORMAT;
+        return zip_format_extract_file(filepath, docproc_extract_zip_archive, text, text_size);
     }
     
-    int status = system(cmd);
-    if (status != 0) {
-        snprintf(cmd, sizeof(cmd), "rm -rf '%s'", temp_dir);
-        system(cmd);
-        return DOCPROC_ERROR_EXTRACTION_FAILED;
+    if (!strstr(filepath, ".tar") && !strstr(filepath, ".tgz")) {
+        return DOCPROC_ERROR_UNSUPPORTED_FORMAT;
+    }
+    if (!subprocess_tool_available("tar")) {
+        return DOCPROC_ERROR_UNSUPPORTED_FORMAT;
     }
     
-    // Process all text files in extracted directory
-    snprintf(cmd, sizeof(cmd), 
-            "find '%s' -type f \\( -name '*.txt' -o -name '*.md' -o -name '*.c' -o -name '*.h' -o -name '*.py' \\) -exec cat {} \\;",
-            temp_dir);
+    // tar detects the compression itself and writes matching members to stdout
+    const char* args[] = { "-xOf", filepath, "--wildcards", "--no-anchored",
+                           "*.txt", "*.md", "*.c", "*.h", "*.py", NULL };
+    int exit_status;
+    int bytes = subprocess_run("tar", args, text, text_size, 0, &exit_status);
     
-    FILE* fp = popen(cmd, "r");
-    if (fp) {
-        size_t bytes_read = fread(text, 1, text_size - 1, fp);
-        text[bytes_read] = '\0';
-        pclose(fp);
+    // tar exits with 2 when no member matches, which is not an error here
+    if (bytes < 0 || (exit_status != 0 && bytes == 0 && exit_status != 2)) {
+        return DOCPROC_ERROR_EXTRACTION_FAILED;
     }
     
-    // Cleanup
-    snprintf(cmd, sizeof(cmd), "rm -rf '%s'", temp_dir);
-    system(cmd);
-    
     return DOCPROC_SUCCESS;
 }
\ No newline at end of file
@@ -2,27 +2,29 @@
  * CLI-Based Extractors
  * 
  * Extractors that use external CLI tools (pdftotext, antiword, unrtf, tesseract, jq).
+ * The tools are run directly through the subprocess pool - no shell, and
+ * their output is read from a pipe rather than a temporary file. A tool
+ * that is not installed makes its format unsupported.
  */
 
 #include "../docproc.h"
+#include "../utils/subprocess_pool.h"
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
 
 /**
- * Execute command and capture output
+ * Run a tool and capture its output
  */
-static DocProcStatus execute_command(const char* cmd, char* output, size_t output_size) {
-    FILE* fp = popen(cmd, "r");
-    if (!fp) {
-        return DOCPROC_ERROR_EXTRACTION_FAILED;
+static DocProcStatus execute_tool(const char* tool, const char* const args[],
+                                  char* output, size_t output_size) {
+    if (!subprocess_tool_available(tool)) {
+        return DOCPROC_ERROR_UNSUPPORTED_FORMAT;
     }
     
-    size_t bytes_read = fread(output, 1, output_size - 1, fp);
-    output[bytes_read] = '\0';
-    
-    int status = pclose(fp);
-    if (status != 0) {
+    int exit_status;
+    int bytes = subprocess_run(tool, args, output, output_size, 0, &exit_status);
+    if (bytes < 0 || exit_status != 0) {
         return DOCPROC_ERROR_EXTRACTION_FAILED;
     }
     
@@ -33,43 +35,38 @@ static DocProcStatus execute_command(const char* cmd, char* output, size_t outpu
  * Extract text from PDF using pdftotext
  */
 DocProcStatus docproc_extract_pdf(const char* filepath, char* text, size_t text_size) {
-    char cmd[2048];
-    snprintf(cmd, sizeof(cmd), "pdftotext -layout -nopgbrk '%s' -", filepath);
-    return execute_command(cmd, text, text_size);
+    const char* args[] = { "-layout", "-nopgbrk", filepath, "-", NULL };
+    return execute_tool("pdftotext", args, text, text_size);
 }
 
 /**
  * Extract text from DOC using antiword
  */
 DocProcStatus docproc_extract_doc(const char* filepath, char* text, size_t text_size) {
-    char cmd[2048];
-    snprintf(cmd, sizeof(cmd), "antiword '%s'", filepath);
-    return execute_command(cmd, text, text_size);
+    const char* args[] = { filepath, NULL };
+    return execute_tool("antiword", args, text, text_size);
 }
 
 /**
  * Extract text from RTF using unrtf
  */
 DocProcStatus docproc_extract_rtf(const char* filepath, char* text, size_t text_size) {
-    char cmd[2048];
-    snprintf(cmd, sizeof(cmd), "unrtf --text '%s'", filepath);
-    return execute_command(cmd, text, text_size);
+    const char* args[] = { "--text", filepath, NULL };
+    return execute_tool("unrtf", args, text, text_size);
 }
 
 /**
  * Extract text from image using tesseract OCR
  */
 DocProcStatus docproc_extract_image_ocr(const char* filepath, char* text, size_t text_size) {
-    char cmd[2048];
-    snprintf(cmd, sizeof(cmd), "tesseract '%s' stdout 2>/dev/null", filepath);
-    return execute_command(cmd, text, text_size);
+    const char* args[] = { filepath, "stdout", NULL };
+    return execute_tool("tesseract", args, text, text_size);
 }
 
 /**
  * Extract text from JSON using jq
  */
 DocProcStatus docproc_extract_json(const char* filepath, char* text, size_t text_size) {
-    char cmd[2048];
-    snprintf(cmd, sizeof(cmd), "jq -r '.. | strings' '%s' 2>/dev/null", filepath);
-    return execute_command(cmd, text, text_size);
+    const char* args[] = { "-r", ".. | strings", filepath, NULL };
+    return execute_tool("jq", args, text, text_size);
 }
\ No newline at end of file
@@ -5,15 +5,12 @@
  * EPUB is a ZIP archive containing XHTML chapters.
  */
 
-#include "../docproc.h"
-#include "../utils/zip_utils.h"
+#include "zip_formats.h"
 #include <stdio.h>
 #include <string.h>
 #include <stdlib.h>
 #include <ctype.h>
 
-#define TEMP_BUFFER_SIZE (10 * 1024 * 1024)  // 10MB temp buffer
-
 /**
  * Simple HTML tag removal (reused from html.c logic)
  */
@@ -49,71 +46,57 @@ static void remove_html_tags_simple(const char* html, char* text, size_t text_si
 }
 
 /**
- * Callback for listing EPUB files
+ * Extract text from an EPUB archive
+ * Chapters are read one at a time from the archive, which stays open
  */
-typedef struct {
-    char* output;
-    char* output_end;
-    char* temp_buffer;
-    const char* zip_path;
-} EpubContext;
-
-static void epub_file_callback(const char* filename, void* user_data) {
-    EpubContext* ctx = (EpubContext*)user_data;
-    
-    // Only process XHTML/HTML files
-    if (!strstr(filename, ".xhtml") && !strstr(filename, ".html")) {
-        return;
-    }
-    
-    // Skip if output buffer is full
-    if (ctx->output >= ctx->output_end - 1000) {
-        return;
-    }
-    
-    // Extract chapter
-    int bytes_read = zip_extract_file(ctx->zip_path, filename,
-                                     ctx->temp_buffer, TEMP_BUFFER_SIZE);
+DocProcStatus docproc_extract_epub_archive(ZipArchive* archive, char* text, size_t text_size) {
+    char* out = text;
+    char* out_end = text + text_size - 1;
+    *out = '\0';
     
-    if (bytes_read > 0) {
+    int count = zip_archive_count(archive);
+    for (int i = 0; i < count; i++) {
+        const char* filename = zip_archive_name(archive, i);
+        
+        // Only process XHTML/HTML files
+        if (!filename || (!strstr(filename, ".xhtml") && !strstr(filename, ".html"))) {
+            continue;
+        }
+        
+        // Stop if output buffer is full
+        if (out >= out_end - 1000) {
+            break;
+        }
+        
+        char* chapter = zip_archive_read_index(archive, i, NULL);
+        if (!chapter) {
+            continue;
+        }
+        
         // Remove HTML tags
-        size_t available = ctx->output_end - ctx->output;
-        remove_html_tags_simple(ctx->temp_buffer, ctx->output, available);
-        ctx->output += strlen(ctx->output);
+        remove_html_tags_simple(chapter, out, out_end - out);
+        out += strlen(out);
+        free(chapter);
         
         // Add chapter separator
-        if (ctx->output < ctx->output_end - 4) {
-            *ctx->output++ = '\n';
-            *ctx->output++ = '\n';
+        if (out < out_end - 4) {
+            *out++ = '\n';
+            *out++ = '\n';
         }
     }
-}
-
-/**
- * Extract text from EPUB
- */
-DocProcStatus docproc_extract_epub(const char* filepath, char* text, size_t text_size) {
-    char* temp_buffer = (char*)malloc(TEMP_BUFFER_SIZE);
-    if (!temp_buffer) {
-        return DOCPROC_ERROR_OUT_OF_MEMORY;
-    }
-    
-    // Set up context for file callback
-    EpubContext ctx;
-    ctx.output = text;
-    ctx.output_end = text + text_size - 1;
-    ctx.temp_buffer = temp_buffer;
-    ctx.zip_path = filepath;
     
-    // List all files in EPUB and process XHTML/HTML files
-    int result = zip_list_files(filepath, epub_file_callback, &ctx);
-    
-    *ctx.output = '\0';
-    free(temp_buffer);
+    *out = '\0';
     
-    if (result < 0 || ctx.output == text) {
+    if (out == text) {
         return DOCPROC_ERROR_EXTRACTION_FAILED;
     }
     
     return DOCPROC_SUCCESS;
+}
+
+/**
+ * Extract text from EPUB
+ */
+DocProcStatus docproc_extract_epub(const char* filepath, char* text, size_t text_size) {
+    return zip_format_extract_file(filepath, docproc_extract_epub_archive, text, text_size);
 }
\ No newline at end of file
@@ -2,42 +2,65 @@
  * Office Open XML Extractors (DOCX, XLSX, PPTX)
  * 
  * Pure C implementation using ZIP extraction and XML parsing.
+ * Each document's archive is opened once and its members are read into
+ * exactly sized buffers.
  */
 
-#include "../docproc.h"
-#include "../utils/zip_utils.h"
+#include "zip_formats.h"
 #include "../utils/xml_utils.h"
 #include <stdio.h>
 #include <string.h>
 #include <stdlib.h>
 
-#define TEMP_BUFFER_SIZE (10 * 1024 * 1024)  // 10MB temp buffer
+#define MAX_PARTS 4096  // Worksheets or slides per document
 
 /**
- * Extract text from DOCX
- * DOCX structure: word/document.xml contains the main text
+ * Append the text of the given elements of a member, followed by a blank line
+ * Returns the new output position
  */
-DocProcStatus docproc_extract_docx(const char* filepath, char* text, size_t text_size) {
-    // Allocate temporary buffer for XML content
-    char* xml_buffer = (char*)malloc(TEMP_BUFFER_SIZE);
-    if (!xml_buffer) {
-        return DOCPROC_ERROR_OUT_OF_MEMORY;
+static char* append_member(ZipArchive* archive, int index, const char* element,
+                           const char* header, char* out, char* out_end) {
+    char* xml = zip_archive_read_index(archive, index, NULL);
+    if (!xml) {
+        return out;
+    }
+    
+    if (header && out < out_end) {
+        int header_len = snprintf(out, out_end - out, "%s", header);
+        if (header_len > 0 && header_len < out_end - out) {
+            out += header_len;
+        }
     }
     
-    // Extract document.xml from DOCX (which is a ZIP file)
-    int bytes_read = zip_extract_file(filepath, "word/document.xml", 
-                                     xml_buffer, TEMP_BUFFER_SIZE);
+    if (out < out_end) {
+        xml_extract_elements(xml, element, out, out_end - out);
+        out += strlen(out);
+        
+        if (out < out_end - 2) {
+            *out++ = '\n';
+            *out++ = '\n';
+        }
+    }
     
-    if (bytes_read < 0) {
-        free(xml_buffer);
+    free(xml);
+    return out;
+}
+
+/**
+ * Extract text from DOCX
+ * DOCX structure: word/document.xml contains the main text
+ */
+DocProcStatus docproc_extract_docx_archive(ZipArchive* archive, char* text, size_t text_size) {
+    char* xml = zip_archive_read(archive, "word/document.xml", NULL);
+    if (!xml) {
         return DOCPROC_ERROR_EXTRACTION_FAILED;
     }
     
     // Extract text from XML
     // DOCX uses <w:t> elements for text content
-    int result = xml_extract_elements(xml_buffer, "w:t", text, text_size);
+    int result = xml_extract_elements(xml, "w:t", text, text_size);
     
-    free(xml_buffer);
+    free(xml);
     
     if (result < 0) {
         return DOCPROC_ERROR_EXTRACTION_FAILED;
@@ -46,74 +69,49 @@ DocProcStatus docproc_extract_docx(const char* filepath, char* text, size_t text
     return DOCPROC_SUCCESS;
 }
 
+DocProcStatus docproc_extract_docx(const char* filepath, char* text, size_t text_size) {
+    return zip_format_extract_file(filepath, docproc_extract_docx_archive, text, text_size);
+}
+
 /**
  * Extract text from XLSX
  * XLSX structure: xl/sharedStrings.xml contains shared strings
  *                 xl/worksheets/sheet*.xml contain worksheet data
  */
-DocProcStatus docproc_extract_xlsx(const char* filepath, char* text, size_t text_size) {
-    char* xml_buffer = (char*)malloc(TEMP_BUFFER_SIZE);
-    if (!xml_buffer) {
-        return DOCPROC_ERROR_OUT_OF_MEMORY;
-    }
-    
+DocProcStatus docproc_extract_xlsx_archive(ZipArchive* archive, char* text, size_t text_size) {
     char* out = text;
     char* out_end = text + text_size - 1;
+    *out = '\0';
     
-    // First, try to extract shared strings
-    int bytes_read = zip_extract_file(filepath, "xl/sharedStrings.xml",
-                                     xml_buffer, TEMP_BUFFER_SIZE);
-    
-    if (bytes_read > 0) {
-        // Extract text from shared strings
-        size_t available = out_end - out;
-        if (available > 0) {
-            xml_extract_elements(xml_buffer, "t", out, available);
-            out += strlen(out);
-            
-            if (out < out_end - 2) {
-                *out++ = '\n';
-                *out++ = '\n';
-            }
+    // Shared strings first
+    char* xml = zip_archive_read(archive, "xl/sharedStrings.xml", NULL);
+    if (xml) {
+        xml_extract_elements(xml, "t", out, out_end - out);
+        out += strlen(out);
+        
+        if (out < out_end - 2) {
+            *out++ = '\n';
+            *out++ = '\n';
         }
+        free(xml);
     }
     
-    // Extract from worksheets (try sheet1.xml, sheet2.xml, etc.)
-    for (int i = 1; i <= 10 && out < out_end; i++) {
-        char sheet_path[256];
-        snprintf(sheet_path, sizeof(sheet_path), "xl/worksheets/sheet%d.xml", i);
-        
-        bytes_read = zip_extract_file(filepath, sheet_path, 
-                                     xml_buffer, TEMP_BUFFER_SIZE);
-        
-        if (bytes_read > 0) {
-            size_t available = out_end - out;
-            if (available > 0) {
-                // Add sheet header
-                int header_len = snprintf(out, available, "=== Sheet %d ===\n", i);
-                if (header_len > 0 && header_len < (int)available) {
-                    out += header_len;
-                }
-                
-                // Extract cell values
-                available = out_end - out;
-                if (available > 0) {
-                    xml_extract_elements(xml_buffer, "v", out, available);
-                    out += strlen(out);
-                    
-                    if (out < out_end - 2) {
-                        *out++ = '\n';
-                        *out++ = '\n';
-                    }
-                }
-            }
-        } else {
-            break;  // No more sheets
-        }
+    // Every worksheet, in sheet order
+    int* sheets = (int*)malloc(MAX_PARTS * sizeof(int));
+    if (!sheets) {
+        return DOCPROC_ERROR_OUT_OF_MEMORY;
+    }
+    int num_sheets = zip_archive_find_numbered(archive, "xl/worksheets/sheet", ".xml",
+                                               sheets, MAX_PARTS);
+    
+    for (int i = 0; i < num_sheets && out < out_end; i++) {
+        char header[64];
+        snprintf(header, sizeof(header), "=== Sheet %d ===\n", i + 1);
+        out = append_member(archive, sheets[i], "v", header, out, out_end);
     }
     
     *out = '\0';
-    free(xml_buffer);
+    free(sheets);
     
     if (out == text) {
         return DOCPROC_ERROR_EXTRACTION_FAILED;
@@ -122,60 +120,43 @@ DocProcStatus docproc_extract_xlsx(const char* filepath, char* text, size_t text
     return DOCPROC_SUCCESS;
 }
 
+DocProcStatus docproc_extract_xlsx(const char* filepath, char* text, size_t text_size) {
+    return zip_format_extract_file(filepath, docproc_extract_xlsx_archive, text, text_size);
+}
+
 /**
  * Extract text from PPTX
  * PPTX structure: ppt/slides/slide*.xml contain slide content
  */
-DocProcStatus docproc_extract_pptx(const char* filepath, char* text, size_t text_size) {
-    char* xml_buffer = (char*)malloc(TEMP_BUFFER_SIZE);
-    if (!xml_buffer) {
-        return DOCPROC_ERROR_OUT_OF_MEMORY;
-    }
-    
+DocProcStatus docproc_extract_pptx_archive(ZipArchive* archive, char* text, size_t text_size) {
     char* out = text;
     char* out_end = text + text_size - 1;
+    *out = '\0';
     
-    // Extract from slides (try slide1.xml, slide2.xml, etc.)
-    for (int i = 1; i <= 100 && out < out_end; i++) {
-        char slide_path[256];
-        snprintf(slide_path, sizeof(slide_path), "ppt/slides/slide%d.xml", i);
-        
-        int bytes_read = zip_extract_file(filepath, slide_path,
-                                         xml_buffer, TEMP_BUFFER_SIZE);
-        
-        if (bytes_read > 0) {
-            size_t available = out_end - out;
-            if (available > 0) {
-                // Add slide header
-                int header_len = snprintf(out, available, "\n=== Slide %d ===\n", i);
-                if (header_len > 0 && header_len < (int)available) {
-                    out += header_len;
-                }
-                
-                // Extract text from slide
-                // PPTX uses <a:t> elements for text content
-                available = out_end - out;
-                if (available > 0) {
-                    xml_extract_elements(xml_buffer, "a:t", out, available);
-                    out += strlen(out);
-                    
-                    if (out < out_end - 2) {
-                        *out++ = '\n';
-                        *out++ = '\n';
-                    }
-                }
-            }
-        } else {
-            break;  // No more slides
-        }
+    int* slides = (int*)malloc(MAX_PARTS * sizeof(int));
+    if (!slides) {
+        return DOCPROC_ERROR_OUT_OF_MEMORY;
+    }
+    int num_slides = zip_archive_find_numbered(archive, "ppt/slides/slide", ".xml",
+                                               slides, MAX_PARTS);
+    
+    // PPTX uses <a:t> elements for text content
+    for (int i = 0; i < num_slides && out < out_end; i++) {
+        char header[64];
+        snprintf(header, sizeof(header), "\n=== Slide %d ===\n", i + 1);
+        out = append_member(archive, slides[i], "a:t", header, out, out_end);
     }
     
     *out = '\0';
-    free(xml_buffer);
+    free(slides);
     
     if (out == text) {
         return DOCPROC_ERROR_EXTRACTION_FAILED;
     }
     
     return DOCPROC_SUCCESS;
+}
+
+DocProcStatus docproc_extract_pptx(const char* filepath, char* text, size_t text_size) {
+    return zip_format_extract_file(filepath, docproc_extract_pptx_archive, text, text_size);
 }
\ No newline at end of file
@@ -0,0 +1,38 @@
+#ifndef ZIP_FORMATS_H
+#define ZIP_FORMATS_H
+
+#include "../docproc.h"
+#include "../utils/zip_utils.h"
+
+/**
+ * ZIP-Based Format Extractors (internal)
+ * 
+ * Extractors for the formats that are ZIP containers, working on an
+ * already opened archive so the same code serves files on disk and
+ * documents held in memory (docproc_extract_buffer).
+ */
+
+DocProcStatus docproc_extract_docx_archive(ZipArchive* archive, char* text, size_t text_size);
+DocProcStatus docproc_extract_xlsx_archive(ZipArchive* archive, char* text, size_t text_size);
+DocProcStatus docproc_extract_pptx_archive(ZipArchive* archive, char* text, size_t text_size);
+DocProcStatus docproc_extract_odf_archive(ZipArchive* archive, char* text, size_t text_size);
+DocProcStatus docproc_extract_epub_archive(ZipArchive* archive, char* text, size_t text_size);
+DocProcStatus docproc_extract_zip_archive(ZipArchive* archive, char* text, size_t text_size);
+
+/**
+ * Run an archive extractor on a ZIP file on disk
+ */
+static inline DocProcStatus zip_format_extract_file(const char* filepath,
+                                                    DocProcStatus (*extract)(ZipArchive*, char*, size_t),
+                                                    char* text, size_t text_size) {
+    ZipArchive* archive = zip_archive_open(filepath);
+    if (!archive) {
+        return DOCPROC_ERROR_EXTRACTION_FAILED;
+    }
+    
+    DocProcStatus status = extract(archive, text, text_size);
+    zip_archive_close(archive);
+    return status;
+}
+
+#endif // ZIP_FORMATS_H
@@ -0,0 +1,288 @@
+/**
+ * Subprocess Pool Implementation
+ *
+ * posix_spawn (vfork-style on glibc) plus a pipe replaces the previous
+ * system()/popen() calls, which went through /bin/sh for every document
+ * and often through a temporary output file as well.
+ */
+
+#define _GNU_SOURCE
+#include "subprocess_pool.h"
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <errno.h>
+#include <fcntl.h>
+#include <poll.h>
+#include <signal.h>
+#include <spawn.h>
+#include <time.h>
+#include <unistd.h>
+#include <pthread.h>
+#include <sys/types.h>
+#include <sys/wait.h>
+
+extern char** environ;
+
+// Cached PATH lookup
+typedef struct {
+    char name[64];
+    char path[1024];
+    bool found;
+} ToolEntry;
+
+static ToolEntry g_tools[SUBPROCESS_MAX_TOOLS];
+static int g_num_tools = 0;
+static int g_slots = 0;         // 0 until first use
+static int g_running = 0;
+static pthread_mutex_t g_lock = PTHREAD_MUTEX_INITIALIZER;
+static pthread_cond_t g_slot_free = PTHREAD_COND_INITIALIZER;
+
+/**
+ * Milliseconds from a monotonic clock
+ */
+static double now_ms(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return ts.tv_sec * 1000.0 + ts.tv_nsec / 1e6;
+}
+
+/**
+ * Set the number of slots
+ */
+void subprocess_pool_init(int max_running) {
+    if (max_running <= 0) {
+        long cores = sysconf(_SC_NPROCESSORS_ONLN);
+        max_running = cores > 0 ? (int)cores : 1;
+    }
+    
+    pthread_mutex_lock(&g_lock);
+    g_slots = max_running;
+    pthread_cond_broadcast(&g_slot_free);
+    pthread_mutex_unlock(&g_lock);
+}
+
+/**
+ * Search PATH for an executable (caller holds the lock)
+ */
+static bool resolve_tool(const char* name, char* path, size_t size) {
+    if (strchr(name, '/')) {
+        snprintf(path, size, "%s", name);
+        return access(path, X_OK) == 0;
+    }
+    
+    const char* search = getenv("PATH");
+    if (!search || !*search) search = "/usr/local/bin:/usr/bin:/bin";
+    
+    while (*search) {
+        size_t len = strcspn(search, ":");
+        if (len > 0 && (size_t)snprintf(path, size, "%.*s/%s", (int)len, search, name) < size &&
+            access(path, X_OK) == 0) {
+            return true;
+        }
+        search += len;
+        if (*search == ':') search++;
+    }
+    
+    path[0] = '\0';
+    return false;
+}
+
+/**
+ * Resolve a tool against PATH (cached)
+ */
+const char* subprocess_find_tool(const char* name) {
+    if (!name || strlen(name) >= sizeof(g_tools[0].name)) return NULL;
+    
+    pthread_mutex_lock(&g_lock);
+    for (int i = 0; i < g_num_tools; i++) {
+        if (strcmp(g_tools[i].name, name) == 0) {
+            const char* path = g_tools[i].found ? g_tools[i].path : NULL;
+            pthread_mutex_unlock(&g_lock);
+            return path;
+        }
+    }
+    
+    const char* path = NULL;
+    if (g_num_tools < SUBPROCESS_MAX_TOOLS) {
+        ToolEntry* tool = &g_tools[g_num_tools];
+        snprintf(tool->name, sizeof(tool->name), "%s", name);
+        tool->found = resolve_tool(name, tool->path, sizeof(tool->path));
+        // Entries are never changed once published
+        g_num_tools++;
+        path = tool->found ? tool->path : NULL;
+    }
+    pthread_mutex_unlock(&g_lock);
+    return path;
+}
+
+/**
+ * Check whether a tool is installed
+ */
+bool subprocess_tool_available(const char* name) {
+    return subprocess_find_tool(name) != NULL;
+}
+
+// ============================================================================
+// SLOTS AND PROCESSES
+// ============================================================================
+
+static void slot_acquire(void) {
+    pthread_mutex_lock(&g_lock);
+    if (g_slots == 0) {
+        long cores = sysconf(_SC_NPROCESSORS_ONLN);
+        g_slots = cores > 0 ? (int)cores : 1;
+    }
+    while (g_running >= g_slots) {
+        pthread_cond_wait(&g_slot_free, &g_lock);
+    }
+    g_running++;
+    pthread_mutex_unlock(&g_lock);
+}
+
+static void slot_release(void) {
+    pthread_mutex_lock(&g_lock);
+    g_running--;
+    pthread_cond_signal(&g_slot_free);
+    pthread_mutex_unlock(&g_lock);
+}
+
+/**
+ * Start a tool with stdout on stdout_fd; returns its pid or -1
+ */
+static pid_t spawn_tool(const char* path, const char* tool, const char* const args[], int stdout_fd) {
+    const char* argv[SUBPROCESS_MAX_ARGS + 2];
+    int argc = 0;
+    argv[argc++] = tool;
+    for (int i = 0; args && args[i] && argc <= SUBPROCESS_MAX_ARGS; i++) {
+        argv[argc++] = args[i];
+    }
+    argv[argc] = NULL;
+    
+    posix_spawn_file_actions_t actions;
+    posix_spawn_file_actions_init(&actions);
+    posix_spawn_file_actions_addopen(&actions, STDIN_FILENO, "/dev/null", O_RDONLY, 0);
+    posix_spawn_file_actions_adddup2(&actions, stdout_fd, STDOUT_FILENO);
+    posix_spawn_file_actions_addopen(&actions, STDERR_FILENO, "/dev/null", O_WRONLY, 0);
+    
+    // Callers may ignore SIGPIPE; tools expect the default
+    posix_spawnattr_t attr;
+    posix_spawnattr_init(&attr);
+    sigset_t signals;
+    sigemptyset(&signals);
+    posix_spawnattr_setsigmask(&attr, &signals);
+    sigaddset(&signals, SIGPIPE);
+    posix_spawnattr_setsigdefault(&attr, &signals);
+    posix_spawnattr_setflags(&attr, POSIX_SPAWN_SETSIGMASK | POSIX_SPAWN_SETSIGDEF);
+    
+    pid_t pid;
+    int err = posix_spawn(&pid, path, &actions, &attr, (char* const*)argv, environ);
+    posix_spawn_file_actions_destroy(&actions);
+    posix_spawnattr_destroy(&attr);
+    
+    return err == 0 ? pid : -1;
+}
+
+/**
+ * Reap a child, killing it at the deadline
+ * Returns its exit status, or -1 if it was killed or timed out
+ */
+static int wait_child(pid_t pid, double deadline) {
+    int status;
+    useconds_t delay = 500;
+    for (;;) {
+        pid_t r = waitpid(pid, &status, WNOHANG);
+        if (r == pid) {
+            return WIFEXITED(status) ? WEXITSTATUS(status) : -1;
+        }
+        if (r < 0 && errno != EINTR) {
+            return -1;
+        }
+        if (now_ms() >= deadline) {
+            kill(pid, SIGKILL);
+            waitpid(pid, &status, 0);
+            return -1;
+        }
+        usleep(delay);
+        if (delay < 20000) delay *= 2;
+    }
+}
+
+/**
+ * Run a tool and capture its standard output
+ */
+int subprocess_run(const char* tool, const char* const args[],
+                   char* output, size_t output_size, int timeout_ms, int* exit_status) {
+    if (exit_status) *exit_status = -1;
+    if (!output || output_size == 0) return -1;
+    output[0] = '\0';
+    
+    const char* path = subprocess_find_tool(tool);
+    if (!path) return -1;
+    
+    int fds[2];
+    if (pipe2(fds, O_CLOEXEC) != 0) return -1;
+    
+    double deadline = now_ms() + (timeout_ms > 0 ? timeout_ms : SUBPROCESS_DEFAULT_TIMEOUT_MS);
+    slot_acquire();
+    pid_t pid = spawn_tool(path, tool, args, fds[1]);
+    close(fds[1]);
+    if (pid < 0) {
+        close(fds[0]);
+        slot_release();
+        return -1;
+    }
+    
+    size_t used = 0;
+    int timed_out = 0;
+    char discard[4096];
+    for (;;) {
+        int wait = (int)(deadline - now_ms());
+        if (wait <= 0) {
+            timed_out = 1;
+            break;
+        }
+        
+        struct pollfd pfd = { .fd = fds[0], .events = POLLIN };
+        int ready = poll(&pfd, 1, wait);
+        if (ready < 0 && errno == EINTR) continue;
+        if (ready <= 0) {
+            timed_out = ready == 0;
+            break;
+        }
+        
+        // Keep draining once the buffer is full so the child can finish
+        ssize_t n = used < output_size - 1
+            ? read(fds[0], output + used, output_size - 1 - used)
+            : read(fds[0], discard, sizeof(discard));
+        if (n < 0 && errno == EINTR) continue;
+        if (n <= 0) break;
+        if (used < output_size - 1) used += (size_t)n;
+    }
+    close(fds[0]);
+    output[used] = '\0';
+    
+    if (timed_out) kill(pid, SIGKILL);
+    int status = wait_child(pid, timed_out ? 0 : deadline);
+    slot_release();
+    
+    if (timed_out || status < 0) return -1;
+    if (exit_status) *exit_status = status;
+    return (int)used;
+}
+
+/**
+ * Run a tool with its standard output written to a file descriptor
+ */
+int subprocess_run_fd(const char* tool, const char* const args[], int output_fd, int timeout_ms) {
+    const char* path = subprocess_find_tool(tool);
+    if (!path || output_fd < 0) return -1;
+    
+    double deadline = now_ms() + (timeout_ms > 0 ? timeout_ms : SUBPROCESS_DEFAULT_TIMEOUT_MS);
+    slot_acquire();
+    pid_t pid = spawn_tool(path, tool, args, output_fd);
+    int status = pid < 0 ? -1 : wait_child(pid, deadline);
+    slot_release();
+    
+    return status;
+}
@@ -0,0 +1,83 @@
+#ifndef SUBPROCESS_POOL_H
+#define SUBPROCESS_POOL_H
+
+#include <stddef.h>
+#include <stdbool.h>
+
+/**
+ * Subprocess Pool for External Extraction Tools
+ *
+ * Runs the command-line extractors that have no in-process replacement
+ * (pdftotext, tesseract, antiword, unrtf, jq, tar, unzip) without a
+ * shell, `which` probes or temporary files:
+ * - Tools are resolved against PATH once and the result is cached
+ * - Children are started with posix_spawn; stdout goes to a pipe that is
+ *   read straight into the caller's buffer (or to a caller's file), stdin
+ *   and stderr to /dev/null
+ * - A fixed number of slots bounds how many children run at once, so
+ *   many extraction threads cannot fork-storm the machine; callers wait
+ *   for a free slot
+ * - Each run has a timeout after which the child is killed
+ *
+ * Used by libdocproc and by the crawler's file processors.
+ */
+
+#define SUBPROCESS_MAX_TOOLS 32
+#define SUBPROCESS_MAX_ARGS 32
+#define SUBPROCESS_DEFAULT_TIMEOUT_MS 120000
+
+/**
+ * Set the number of slots (children that may run at once)
+ *
+ * Optional: the pool starts with one slot per core on first use.
+ *
+ * @param max_running Slot count (0 = number of cores)
+ */
+void subprocess_pool_init(int max_running);
+
+/**
+ * Resolve a tool against PATH (cached after the first lookup)
+ *
+ * @param name Tool name (e.g. "pdftotext")
+ * @return Absolute path, or NULL if the tool is not installed
+ */
+const char* subprocess_find_tool(const char* name);
+
+/**
+ * Check whether a tool is installed (cached)
+ *
+ * @param name Tool name
+ * @return true if found on PATH
+ */
+bool subprocess_tool_available(const char* name);
+
+/**
+ * Run a tool and capture its standard output
+ *
+ * Output beyond output_size - 1 bytes is read and discarded so the child
+ * never blocks. The output is NUL-terminated.
+ *
+ * @param tool Tool name (resolved with subprocess_find_tool)
+ * @param args Arguments after the program name, NULL-terminated
+ * @param output Output buffer
+ * @param output_size Output buffer size
+ * @param timeout_ms Time limit (0 for SUBPROCESS_DEFAULT_TIMEOUT_MS)
+ * @param exit_status Output: the tool's exit status (can be NULL)
+ * @return Bytes captured, or -1 if the tool is missing, could not be
+ *         started, was killed, or timed out
+ */
+int subprocess_run(const char* tool, const char* const args[],
+                   char* output, size_t output_size, int timeout_ms, int* exit_status);
+
+/**
+ * Run a tool with its standard output written to a file descriptor
+ *
+ * @param tool Tool name
+ * @param args Arguments after the program name, NULL-terminated
+ * @param output_fd Descriptor that receives stdout
+ * @param timeout_ms Time limit (0 for SUBPROCESS_DEFAULT_TIMEOUT_MS)
+ * @return The tool's exit status, or -1 if it could not be run to completion
+ */
+int subprocess_run_fd(const char* tool, const char* const args[], int output_fd, int timeout_ms);
+
+#endif // SUBPROCESS_POOL_H
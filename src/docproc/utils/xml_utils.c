@@ -8,6 +8,7 @@
 #include <libxml/parser.h>
 #include <libxml/tree.h>
 #include <libxml/xpath.h>
+#include <libxml/xpathInternals.h>
 #include <string.h>
 #include <stdio.h>
 
@@ -114,10 +115,17 @@ int xml_extract_elements(const char* xml_content, const char* element_name,
                       (xmlChar*)"http://schemas.openxmlformats.org/wordprocessingml/2006/main");
     xmlXPathRegisterNs(context, (xmlChar*)"text",
                       (xmlChar*)"urn:oasis:names:tc:opendocument:xmlns:text:1.0");
+    xmlXPathRegisterNs(context, (xmlChar*)"a",
+                      (xmlChar*)"http://schemas.openxmlformats.org/drawingml/2006/main");
     
-    // Build XPath expression
+    // Build XPath expression; unprefixed names match in any namespace
+    // (XLSX parts put <t> and <v> in a default namespace)
     char xpath[256];
-    snprintf(xpath, sizeof(xpath), "//%s", element_name);
+    if (strchr(element_name, ':')) {
+        snprintf(xpath, sizeof(xpath), "//%s", element_name);
+    } else {
+        snprintf(xpath, sizeof(xpath), "//*[local-name()='%s']", element_name);
+    }
     
     xmlXPathObjectPtr result = xmlXPathEvalExpression((xmlChar*)xpath, context);
     
@@ -1,69 +1,506 @@
 /**
  * ZIP Utilities Implementation
  * 
- * Uses libzip for ZIP file operations.
+ * Uses libzip when built with DOCPROC_HAVE_LIBZIP. Otherwise a built-in
+ * reader is used: it maps the archive, indexes the central directory and
+ * inflates stored or deflated members with zlib, which covers the
+ * containers documents come in (no encryption, no ZIP64).
  */
 
 #include "zip_utils.h"
-#include <zip.h>
+#include <stdlib.h>
 #include <string.h>
 #include <stdio.h>
+#include <ctype.h>
+
+#ifdef DOCPROC_HAVE_LIBZIP
+
+#include <zip.h>
+
+struct ZipArchive {
+    zip_t* zip;
+};
 
 /**
- * Extract a file from ZIP archive to memory
+ * Open a ZIP archive file
  */
-int zip_extract_file(const char* zip_path, const char* file_path, 
-                     char* buffer, size_t buffer_size) {
+ZipArchive* zip_archive_open(const char* zip_path) {
+    if (!zip_path) return NULL;
+    
     int err;
-    zip_t* archive = zip_open(zip_path, ZIP_RDONLY, &err);
+    zip_t* zip = zip_open(zip_path, ZIP_RDONLY, &err);
+    if (!zip) {
+        return NULL;
+    }
+    
+    ZipArchive* archive = (ZipArchive*)malloc(sizeof(ZipArchive));
     if (!archive) {
-        return -1;
+        zip_close(zip);
+        return NULL;
     }
+    archive->zip = zip;
+    return archive;
+}
+
+/**
+ * Open a ZIP archive held in memory
+ */
+ZipArchive* zip_archive_open_buffer(const void* data, size_t size) {
+    if (!data || size == 0) return NULL;
     
-    // Find file in archive
-    zip_int64_t index = zip_name_locate(archive, file_path, 0);
-    if (index < 0) {
-        zip_close(archive);
-        return -1;
+    zip_error_t error;
+    zip_error_init(&error);
+    zip_source_t* source = zip_source_buffer_create(data, size, 0, &error);
+    if (!source) {
+        zip_error_fini(&error);
+        return NULL;
+    }
+    
+    zip_t* zip = zip_open_from_source(source, ZIP_RDONLY, &error);
+    zip_error_fini(&error);
+    if (!zip) {
+        zip_source_free(source);
+        return NULL;
     }
     
-    // Open file
-    zip_file_t* file = zip_fopen_index(archive, index, 0);
+    ZipArchive* archive = (ZipArchive*)malloc(sizeof(ZipArchive));
+    if (!archive) {
+        zip_close(zip);
+        return NULL;
+    }
+    archive->zip = zip;
+    return archive;
+}
+
+/**
+ * Close an archive
+ */
+void zip_archive_close(ZipArchive* archive) {
+    if (!archive) return;
+    
+    zip_close(archive->zip);
+    free(archive);
+}
+
+/**
+ * Number of entries in the archive
+ */
+int zip_archive_count(ZipArchive* archive) {
+    if (!archive) return 0;
+    
+    zip_int64_t count = zip_get_num_entries(archive->zip, 0);
+    return count > 0 ? (int)count : 0;
+}
+
+/**
+ * Name of an entry
+ */
+const char* zip_archive_name(ZipArchive* archive, int index) {
+    if (!archive || index < 0) return NULL;
+    
+    return zip_get_name(archive->zip, (zip_uint64_t)index, 0);
+}
+
+/**
+ * Read an entry into memory by index
+ */
+char* zip_archive_read_index(ZipArchive* archive, int index, size_t* size) {
+    if (size) *size = 0;
+    if (!archive || index < 0) return NULL;
+    
+    zip_stat_t st;
+    zip_stat_init(&st);
+    if (zip_stat_index(archive->zip, (zip_uint64_t)index, 0, &st) != 0 ||
+        !(st.valid & ZIP_STAT_SIZE) || st.size > ZIP_MAX_MEMBER_SIZE) {
+        return NULL;
+    }
+    
+    zip_file_t* file = zip_fopen_index(archive->zip, (zip_uint64_t)index, 0);
     if (!file) {
-        zip_close(archive);
-        return -1;
+        return NULL;
     }
     
-    // Read file
-    zip_int64_t bytes_read = zip_fread(file, buffer, buffer_size - 1);
+    // Exact size from the central directory: no fixed staging buffer
+    char* buffer = (char*)malloc(st.size + 1);
+    zip_int64_t bytes_read = buffer ? zip_fread(file, buffer, st.size) : -1;
+    zip_fclose(file);
+    
     if (bytes_read < 0) {
-        zip_fclose(file);
-        zip_close(archive);
-        return -1;
+        free(buffer);
+        return NULL;
     }
     
     buffer[bytes_read] = '\0';
+    if (size) *size = (size_t)bytes_read;
+    return buffer;
+}
+
+/**
+ * Read an entry into memory
+ */
+char* zip_archive_read(ZipArchive* archive, const char* file_path, size_t* size) {
+    if (size) *size = 0;
+    if (!archive || !file_path) return NULL;
     
-    zip_fclose(file);
-    zip_close(archive);
+    zip_int64_t index = zip_name_locate(archive->zip, file_path, 0);
+    if (index < 0) {
+        return NULL;
+    }
+    
+    return zip_archive_read_index(archive, (int)index, size);
+}
+
+#else // built-in reader
+
+#include <zlib.h>
+#include <stdint.h>
+#include <fcntl.h>
+#include <unistd.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+
+#define ZIP_SIG_LOCAL    0x04034b50u
+#define ZIP_SIG_CENTRAL  0x02014b50u
+#define ZIP_SIG_END      0x06054b50u
+#define ZIP_END_SIZE     22
+#define ZIP_MAX_COMMENT  65535
+#define ZIP_FLAG_ENCRYPTED 0x0001
+
+typedef struct {
+    const char* name;
+    uint16_t flags;
+    uint16_t method;
+    uint32_t crc;
+    uint32_t compressed_size;
+    uint32_t size;
+    uint32_t local_offset;
+} ZipEntry;
+
+struct ZipArchive {
+    const unsigned char* data;
+    size_t size;
+    void* mapping;          // mmap of the file, or NULL for a caller's buffer
+    ZipEntry* entries;
+    int count;
+    char* names;            // NUL-terminated entry names, back to back
+};
+
+static uint16_t read_u16(const unsigned char* p) {
+    return (uint16_t)(p[0] | (p[1] << 8));
+}
+
+static uint32_t read_u32(const unsigned char* p) {
+    return (uint32_t)p[0] | ((uint32_t)p[1] << 8) | ((uint32_t)p[2] << 16) | ((uint32_t)p[3] << 24);
+}
+
+/**
+ * Index the central directory of an archive held in memory
+ */
+static ZipArchive* zip_archive_index(const unsigned char* data, size_t size, void* mapping) {
+    if (size < ZIP_END_SIZE) return NULL;
+    
+    // End of central directory record: last signature within the comment range
+    size_t min_pos = size > ZIP_END_SIZE + ZIP_MAX_COMMENT ? size - ZIP_END_SIZE - ZIP_MAX_COMMENT : 0;
+    size_t end = size - ZIP_END_SIZE;
+    while (read_u32(data + end) != ZIP_SIG_END) {
+        if (end == min_pos) return NULL;
+        end--;
+    }
+    
+    uint16_t count = read_u16(data + end + 10);
+    uint32_t dir_size = read_u32(data + end + 12);
+    uint32_t dir_offset = read_u32(data + end + 16);
+    if (count == 0xFFFF || dir_offset == 0xFFFFFFFFu ||
+        (size_t)dir_offset + dir_size > end) {
+        return NULL;  // ZIP64 or corrupt
+    }
+    
+    ZipArchive* archive = (ZipArchive*)calloc(1, sizeof(ZipArchive));
+    if (!archive) return NULL;
+    archive->entries = (ZipEntry*)calloc(count > 0 ? count : 1, sizeof(ZipEntry));
+    archive->names = (char*)malloc((size_t)dir_size + 1);
+    if (!archive->entries || !archive->names) {
+        free(archive->entries);
+        free(archive->names);
+        free(archive);
+        return NULL;
+    }
     
-    return (int)bytes_read;
+    const unsigned char* p = data + dir_offset;
+    const unsigned char* dir_end = p + dir_size;
+    char* name = archive->names;
+    for (int i = 0; i < count; i++) {
+        if (dir_end - p < 46 || read_u32(p) != ZIP_SIG_CENTRAL) break;
+        
+        uint16_t name_len = read_u16(p + 28);
+        size_t record_len = 46 + (size_t)name_len + read_u16(p + 30) + read_u16(p + 32);
+        if ((size_t)(dir_end - p) < record_len) break;
+        
+        ZipEntry* entry = &archive->entries[archive->count++];
+        entry->flags = read_u16(p + 8);
+        entry->method = read_u16(p + 10);
+        entry->crc = read_u32(p + 16);
+        entry->compressed_size = read_u32(p + 20);
+        entry->size = read_u32(p + 24);
+        entry->local_offset = read_u32(p + 42);
+        
+        // Names fit: each takes name_len + 1 of the record's >= 46 bytes
+        memcpy(name, p + 46, name_len);
+        name[name_len] = '\0';
+        entry->name = name;
+        name += name_len + 1;
+        
+        p += record_len;
+    }
+    
+    archive->data = data;
+    archive->size = size;
+    archive->mapping = mapping;
+    return archive;
+}
+
+/**
+ * Open a ZIP archive file
+ */
+ZipArchive* zip_archive_open(const char* zip_path) {
+    if (!zip_path) return NULL;
+    
+    int fd = open(zip_path, O_RDONLY);
+    if (fd < 0) {
+        return NULL;
+    }
+    
+    struct stat st;
+    if (fstat(fd, &st) != 0 || st.st_size <= 0) {
+        close(fd);
+        return NULL;
+    }
+    
+    size_t size = (size_t)st.st_size;
+    void* mapping = mmap(NULL, size, PROT_READ, MAP_PRIVATE, fd, 0);
+    close(fd);
+    if (mapping == MAP_FAILED) {
+        return NULL;
+    }
+    
+    ZipArchive* archive = zip_archive_index((const unsigned char*)mapping, size, mapping);
+    if (!archive) {
+        munmap(mapping, size);
+    }
+    return archive;
+}
+
+/**
+ * Open a ZIP archive held in memory
+ */
+ZipArchive* zip_archive_open_buffer(const void* data, size_t size) {
+    if (!data || size == 0) return NULL;
+    
+    return zip_archive_index((const unsigned char*)data, size, NULL);
+}
+
+/**
+ * Close an archive
+ */
+void zip_archive_close(ZipArchive* archive) {
+    if (!archive) return;
+    
+    if (archive->mapping) {
+        munmap(archive->mapping, archive->size);
+    }
+    free(archive->entries);
+    free(archive->names);
+    free(archive);
+}
+
+/**
+ * Number of entries in the archive
+ */
+int zip_archive_count(ZipArchive* archive) {
+    return archive ? archive->count : 0;
+}
+
+/**
+ * Name of an entry
+ */
+const char* zip_archive_name(ZipArchive* archive, int index) {
+    if (!archive || index < 0 || index >= archive->count) return NULL;
+    
+    return archive->entries[index].name;
+}
+
+/**
+ * Read an entry into memory by index
+ */
+char* zip_archive_read_index(ZipArchive* archive, int index, size_t* size) {
+    if (size) *size = 0;
+    if (!archive || index < 0 || index >= archive->count) return NULL;
+    
+    const ZipEntry* entry = &archive->entries[index];
+    if ((entry->flags & ZIP_FLAG_ENCRYPTED) || entry->size > ZIP_MAX_MEMBER_SIZE ||
+        (entry->method != Z_NO_COMPRESSION && entry->method != Z_DEFLATED)) {
+        return NULL;
+    }
+    
+    // Member data follows the local header, whose extra field may differ
+    // from the central directory's
+    size_t offset = entry->local_offset;
+    if (offset + 30 > archive->size || read_u32(archive->data + offset) != ZIP_SIG_LOCAL) {
+        return NULL;
+    }
+    offset += 30 + (size_t)read_u16(archive->data + offset + 26) + read_u16(archive->data + offset + 28);
+    if (offset > archive->size || archive->size - offset < entry->compressed_size) {
+        return NULL;
+    }
+    const unsigned char* compressed = archive->data + offset;
+    
+    char* buffer = (char*)malloc((size_t)entry->size + 1);
+    if (!buffer) return NULL;
+    
+    bool ok;
+    if (entry->method == Z_NO_COMPRESSION) {
+        ok = entry->compressed_size == entry->size;
+        if (ok) memcpy(buffer, compressed, entry->size);
+    } else {
+        // Raw deflate stream of exactly the recorded size
+        z_stream stream;
+        memset(&stream, 0, sizeof(stream));
+        ok = inflateInit2(&stream, -MAX_WBITS) == Z_OK;
+        if (ok) {
+            stream.next_in = (Bytef*)compressed;
+            stream.avail_in = entry->compressed_size;
+            stream.next_out = (Bytef*)buffer;
+            stream.avail_out = entry->size;
+            ok = inflate(&stream, Z_FINISH) == Z_STREAM_END && stream.total_out == entry->size;
+            inflateEnd(&stream);
+        }
+    }
+    
+    if (!ok || crc32(0L, (const Bytef*)buffer, entry->size) != entry->crc) {
+        free(buffer);
+        return NULL;
+    }
+    
+    buffer[entry->size] = '\0';
+    if (size) *size = entry->size;
+    return buffer;
+}
+
+/**
+ * Read an entry into memory
+ */
+char* zip_archive_read(ZipArchive* archive, const char* file_path, size_t* size) {
+    if (size) *size = 0;
+    if (!archive || !file_path) return NULL;
+    
+    for (int i = 0; i < archive->count; i++) {
+        if (strcmp(archive->entries[i].name, file_path) == 0) {
+            return zip_archive_read_index(archive, i, size);
+        }
+    }
+    return NULL;
+}
+
+#endif // DOCPROC_HAVE_LIBZIP
+
+typedef struct {
+    int index;
+    long number;
+} NumberedEntry;
+
+static int compare_numbered(const void* a, const void* b) {
+    long x = ((const NumberedEntry*)a)->number;
+    long y = ((const NumberedEntry*)b)->number;
+    return (x > y) - (x < y);
+}
+
+/**
+ * Find entries named <prefix><number><suffix>, ordered by number
+ */
+int zip_archive_find_numbered(ZipArchive* archive, const char* prefix, const char* suffix,
+                              int* indices, int max_count) {
+    if (!archive || !prefix || !suffix || !indices || max_count <= 0) return 0;
+    
+    int count = zip_archive_count(archive);
+    NumberedEntry* found = (NumberedEntry*)malloc((size_t)(count > 0 ? count : 1) * sizeof(NumberedEntry));
+    if (!found) return 0;
+    
+    size_t prefix_len = strlen(prefix);
+    size_t suffix_len = strlen(suffix);
+    int num_found = 0;
+    
+    for (int i = 0; i < count; i++) {
+        const char* name = zip_archive_name(archive, i);
+        if (!name || strncmp(name, prefix, prefix_len) != 0) continue;
+        
+        const char* digits = name + prefix_len;
+        char* end;
+        if (!isdigit((unsigned char)*digits)) continue;
+        long number = strtol(digits, &end, 10);
+        if (strlen(end) != suffix_len || strcmp(end, suffix) != 0) continue;
+        
+        found[num_found].index = i;
+        found[num_found].number = number;
+        num_found++;
+    }
+    
+    qsort(found, (size_t)num_found, sizeof(NumberedEntry), compare_numbered);
+    if (num_found > max_count) num_found = max_count;
+    for (int i = 0; i < num_found; i++) {
+        indices[i] = found[i].index;
+    }
+    
+    free(found);
+    return num_found;
+}
+
+/**
+ * Extract a file from ZIP archive to memory
+ */
+int zip_extract_file(const char* zip_path, const char* file_path, 
+                     char* buffer, size_t buffer_size) {
+    if (!buffer || buffer_size == 0) return -1;
+    
+    ZipArchive* archive = zip_archive_open(zip_path);
+    if (!archive) {
+        return -1;
+    }
+    
+    size_t size;
+    char* data = zip_archive_read(archive, file_path, &size);
+    zip_archive_close(archive);
+    if (!data) {
+        return -1;
+    }
+    
+    if (size > buffer_size - 1) size = buffer_size - 1;
+    memcpy(buffer, data, size);
+    buffer[size] = '\0';
+    free(data);
+    
+    return (int)size;
 }
 
 /**
  * Check if file exists in ZIP archive
  */
 bool zip_file_exists(const char* zip_path, const char* file_path) {
-    int err;
-    zip_t* archive = zip_open(zip_path, ZIP_RDONLY, &err);
+    if (!file_path) return false;
+    
+    ZipArchive* archive = zip_archive_open(zip_path);
     if (!archive) {
         return false;
     }
     
-    zip_int64_t index = zip_name_locate(archive, file_path, 0);
-    zip_close(archive);
+    bool found = false;
+    int count = zip_archive_count(archive);
+    for (int i = 0; i < count && !found; i++) {
+        const char* name = zip_archive_name(archive, i);
+        found = name && strcmp(name, file_path) == 0;
+    }
+    zip_archive_close(archive);
     
-    return index >= 0;
+    return found;
 }
 
 /**
@@ -72,21 +509,20 @@ bool zip_file_exists(const char* zip_path, const char* file_path) {
 int zip_list_files(const char* zip_path, 
                    void (*callback)(const char* filename, void* user_data),
                    void* user_data) {
-    int err;
-    zip_t* archive = zip_open(zip_path, ZIP_RDONLY, &err);
+    ZipArchive* archive = zip_archive_open(zip_path);
     if (!archive) {
         return -1;
     }
     
-    zip_int64_t num_entries = zip_get_num_entries(archive, 0);
+    int num_entries = zip_archive_count(archive);
     
-    for (zip_int64_t i = 0; i < num_entries; i++) {
-        const char* name = zip_get_name(archive, i, 0);
+    for (int i = 0; i < num_entries; i++) {
+        const char* name = zip_archive_name(archive, i);
         if (name && callback) {
             callback(name, user_data);
         }
     }
     
-    zip_close(archive);
+    zip_archive_close(archive);
     return 0;
-}
\ No newline at end of file
+}
@@ -7,8 +7,81 @@
 /**
  * ZIP Utilities for Document Processing
  * 
- * Wrapper around libzip for extracting files from ZIP archives.
+ * Reads files from ZIP archives, through libzip when the library is built
+ * with DOCPROC_HAVE_LIBZIP and through a built-in zlib reader otherwise.
+ * 
+ * ZipArchive keeps one archive open (from a file or a memory buffer) so
+ * a document's members are read without reopening it for each one; the
+ * path-based functions below are one-shot conveniences built on it.
+ */
+
+#define ZIP_MAX_MEMBER_SIZE (256 * 1024 * 1024)  // Larger members are refused
+
+// Open archive handle
+typedef struct ZipArchive ZipArchive;
+
+/**
+ * Open a ZIP archive file
+ * 
+ * @param zip_path Path to ZIP file
+ * @return Archive or NULL on error
+ */
+ZipArchive* zip_archive_open(const char* zip_path);
+
+/**
+ * Open a ZIP archive held in memory
+ * 
+ * @param data Archive bytes (must stay valid until the archive is closed)
+ * @param size Number of bytes
+ * @return Archive or NULL on error
+ */
+ZipArchive* zip_archive_open_buffer(const void* data, size_t size);
+
+/**
+ * Close an archive
+ */
+void zip_archive_close(ZipArchive* archive);
+
+/**
+ * Number of entries in the archive
+ */
+int zip_archive_count(ZipArchive* archive);
+
+/**
+ * Name of an entry
+ * 
+ * @return Entry name (owned by the archive), or NULL if out of range
+ */
+const char* zip_archive_name(ZipArchive* archive, int index);
+
+/**
+ * Read an entry into memory
+ * 
+ * @param archive Archive
+ * @param file_path Path of file inside ZIP
+ * @param size Output: number of bytes (can be NULL)
+ * @return NUL-terminated contents (caller frees), or NULL on error
+ */
+char* zip_archive_read(ZipArchive* archive, const char* file_path, size_t* size);
+
+/**
+ * Read an entry into memory by index
+ */
+char* zip_archive_read_index(ZipArchive* archive, int index, size_t* size);
+
+/**
+ * Find entries named <prefix><number><suffix>, ordered by number
+ * (e.g. "ppt/slides/slide", ".xml" for the slides of a presentation)
+ * 
+ * @param archive Archive
+ * @param prefix Name prefix
+ * @param suffix Name suffix
+ * @param indices Output: entry indices
+ * @param max_count Capacity of indices
+ * @return Number of entries found
  */
+int zip_archive_find_numbered(ZipArchive* archive, const char* prefix, const char* suffix,
+                              int* indices, int max_count);
 
 /**
  * Extract a file from ZIP archive to memory
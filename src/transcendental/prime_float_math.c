@@ -39,6 +39,10 @@ float prime_sqrtf(float x) {
 float prime_expf(float x) {
     if (x == 0.0f) return 1.0f;
     
+    // The series alternates (and cancels catastrophically) for x < 0,
+    // so use exp(x) = 1 / exp(-x)
+    if (x < 0.0f) return 1.0f / prime_expf(-x);
+    
     // For large x, use exp(x) = exp(x/2)²
     if (x > 10.0f || x < -10.0f) {
         float half = prime_expf(x * 0.5f);
@@ -149,8 +149,8 @@ int test_training_init_with_cache() {
             if (training->attention_cache[0].queries &&
                 training->attention_cache[0].keys &&
                 training->attention_cache[0].values &&
-                training->attention_cache[0].attention_weights &&
-                training->attention_cache[0].scores) {
+                training->attention_cache[0].outputs &&
+                training->attention_cache[0].lse) {
                 success = 1;
             }
         }
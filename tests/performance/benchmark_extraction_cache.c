@@ -0,0 +1,220 @@
+/**
+ * Performance Benchmark: Extraction Cache
+ *
+ * Runs a stream of downloaded documents - a third of them re-crawled or
+ * mirrored copies of earlier ones - through process_file_by_type, which
+ * hands these formats to the Python extractor. Compares extracting every
+ * download against consulting the content-addressed extraction cache
+ * first, and checks that cached text is identical, that the size limit
+ * holds through LRU eviction, and that entries survive a reopen. Keys
+ * are checked against SHA-256 test vectors, and a key whose digest or
+ * size differs from the stored document's must miss.
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+#include <unistd.h>
+#include "../../src/crawler/file_processor.h"
+#include "../../src/crawler/extraction_cache.h"
+
+#define BENCH_DISTINCT 24
+#define BENCH_DOWNLOADS 36
+#define BENCH_DOC_LINES 2000
+#define BENCH_TEXT_SIZE (4 * 1024 * 1024)
+
+// Helper: Wall clock in seconds
+static double now_seconds(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return ts.tv_sec + ts.tv_nsec / 1e9;
+}
+
+// Helper: Copy a file (a mirrored download of the same document)
+static void copy_file(const char* from, const char* to) {
+    FILE* src = fopen(from, "rb");
+    FILE* dst = fopen(to, "wb");
+    char buffer[4096];
+    size_t n;
+    while ((n = fread(buffer, 1, sizeof(buffer), src)) > 0) fwrite(buffer, 1, n, dst);
+    fclose(src);
+    fclose(dst);
+}
+
+int main() {
+    printf("\n");
+    printf("╔══════════════════════════════════════════════════════════╗\n");
+    printf("║     Extraction Cache Benchmark                          ║\n");
+    printf("╚══════════════════════════════════════════════════════════╝\n");
+    
+    // The Python extractor path is relative to the repository root
+    if (access("src/crawler/universal_extractor.py", R_OK) != 0 && chdir("..") != 0) return 1;
+    
+    char dir[] = "/tmp/bench_extraction_cache_XXXXXX";
+    if (!mkdtemp(dir)) return 1;
+    
+    // Distinct documents, then a download stream where every third
+    // download repeats an earlier document under a new name
+    static char downloads[BENCH_DOWNLOADS][512];
+    srand(42);
+    int distinct = 0;
+    for (int i = 0; i < BENCH_DOWNLOADS; i++) {
+        snprintf(downloads[i], sizeof(downloads[i]), "%s/download%03d.md", dir, i);
+        if (i % 3 == 2) {
+            copy_file(downloads[rand() % i], downloads[i]);
+            continue;
+        }
+        FILE* f = fopen(downloads[i], "w");
+        fprintf(f, "# Document %d\n\n", distinct++);
+        for (int l = 0; l < BENCH_DOC_LINES; l++) {
+            fprintf(f, "Line %d of section %d with value %d\n", l, l / 100, rand());
+        }
+        fclose(f);
+    }
+    
+    char* text = (char*)malloc(BENCH_TEXT_SIZE);
+    char** expected = (char**)calloc(BENCH_DOWNLOADS, sizeof(char*));
+    
+    printf("\n%d downloads, %d distinct documents\n", BENCH_DOWNLOADS, distinct);
+    printf("─────────────────────────────────────\n");
+    
+    // Before: extract every download
+    int before_ok = 1;
+    double start = now_seconds();
+    for (int i = 0; i < BENCH_DOWNLOADS; i++) {
+        int bytes = process_file_by_type(downloads[i], FILE_TYPE_MARKDOWN, text, BENCH_TEXT_SIZE);
+        if (bytes <= 0) {
+            before_ok = 0;
+            continue;
+        }
+        expected[i] = strdup(text);
+    }
+    double before = now_seconds() - start;
+    
+    // After: consult the cache first
+    char cache_dir[600];
+    snprintf(cache_dir, sizeof(cache_dir), "%s/cache", dir);
+    ExtractionCache* cache = extraction_cache_open(cache_dir, 0);
+    extraction_cache_set_default(cache);
+    int identical = cache != NULL;
+    start = now_seconds();
+    for (int i = 0; i < BENCH_DOWNLOADS; i++) {
+        int bytes = process_file_by_type(downloads[i], FILE_TYPE_MARKDOWN, text, BENCH_TEXT_SIZE);
+        if (bytes <= 0 || !expected[i] || strcmp(text, expected[i]) != 0) identical = 0;
+    }
+    double after = now_seconds() - start;
+    
+    ExtractionCacheStats stats;
+    extraction_cache_get_stats(cache, &stats);
+    
+    printf("  Before (extract every download): %8.1f ms/download\n", before * 1000.0 / BENCH_DOWNLOADS);
+    printf("  After  (extraction cache):       %8.1f ms/download\n", after * 1000.0 / BENCH_DOWNLOADS);
+    printf("  Speedup: %.1fx\n", before / after);
+    
+    printf("%s Extracted every download\n", before_ok ? "✓" : "✗");
+    printf("%s Same text with the cache (%lu hits, %lu misses)\n",
+           identical ? "✓" : "✗", (unsigned long)stats.hits, (unsigned long)stats.misses);
+    int deduplicated = stats.hits == (uint64_t)(BENCH_DOWNLOADS - distinct) &&
+                       stats.entries == (uint64_t)distinct;
+    printf("%s Duplicates extracted once (%lu entries, %.1f KB on disk)\n",
+           deduplicated ? "✓" : "✗", (unsigned long)stats.entries, stats.bytes / 1e3);
+    
+    // A second pass is all hits, and survives reopening the directory
+    extraction_cache_close(cache);
+    cache = extraction_cache_open(cache_dir, 0);
+    extraction_cache_set_default(cache);
+    start = now_seconds();
+    for (int i = 0; i < BENCH_DOWNLOADS; i++) {
+        int bytes = process_file_by_type(downloads[i], FILE_TYPE_MARKDOWN, text, BENCH_TEXT_SIZE);
+        if (bytes <= 0 || !expected[i] || strcmp(text, expected[i]) != 0) identical = 0;
+    }
+    double warm = now_seconds() - start;
+    extraction_cache_get_stats(cache, &stats);
+    int reopened = identical && stats.hits == BENCH_DOWNLOADS && stats.misses == 0;
+    printf("%s Reopened cache serves every download (%.2f ms/download)\n",
+           reopened ? "✓" : "✗", warm * 1000.0 / BENCH_DOWNLOADS);
+    extraction_cache_set_default(NULL);
+    extraction_cache_close(cache);
+    
+    // Size limit: entries beyond it evict the least recently used
+    char small_dir[600];
+    snprintf(small_dir, sizeof(small_dir), "%s/small", dir);
+    ExtractionCache* small = extraction_cache_open(small_dir, 64 * 1024);
+    ExtractionCacheKey keys[BENCH_DOWNLOADS];
+    for (int i = 0; i < BENCH_DOWNLOADS; i++) {
+        extraction_cache_key_file(downloads[i], "markdown", &keys[i]);
+        if (expected[i]) extraction_cache_put(small, &keys[i], "markdown", expected[i], strlen(expected[i]));
+        // Keep the first document in use
+        free(extraction_cache_get(small, &keys[0], "markdown", NULL));
+    }
+    ExtractionCacheStats small_stats;
+    extraction_cache_get_stats(small, &small_stats);
+    char* first = extraction_cache_get(small, &keys[0], "markdown", NULL);
+    char* oldest = extraction_cache_get(small, &keys[1], "markdown", NULL);
+    char* other = extraction_cache_get(small, &keys[0], "pdftotext", NULL);
+    int bounded = small_stats.bytes <= small_stats.max_bytes && small_stats.evictions > 0 &&
+                  first != NULL && oldest == NULL && other == NULL;
+    printf("%s Size limit held by LRU eviction (%lu entries, %lu evictions, %.1f KB)\n",
+           bounded ? "✓" : "✗", (unsigned long)small_stats.entries,
+           (unsigned long)small_stats.evictions, small_stats.bytes / 1e3);
+    free(first);
+    free(oldest);
+    free(other);
+    
+    // Keys: SHA-256 of the document bytes (FIPS 180-4 test vectors)
+    static const char* vectors[][2] = {
+        { "", "e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855" },
+        { "abc", "ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad" },
+        { "abcdbcdecdefdefgefghfghighijhijkijkljklmklmnlmnomnopnopq",
+          "248d6a61d20638b8e5c026930c3e6039a33ce45964ff2167f6ecedd419db06c1" },
+    };
+    char vector_path[600];
+    snprintf(vector_path, sizeof(vector_path), "%s/vector.bin", dir);
+    int digests_ok = 1;
+    for (size_t v = 0; v < sizeof(vectors) / sizeof(vectors[0]); v++) {
+        FILE* f = fopen(vector_path, "wb");
+        fputs(vectors[v][0], f);
+        fclose(f);
+        ExtractionCacheKey key;
+        char hex[65];
+        if (extraction_cache_key_file(vector_path, "markdown", &key) != 0) {
+            digests_ok = 0;
+            continue;
+        }
+        for (int i = 0; i < 32; i++) snprintf(hex + i * 2, 3, "%02x", key.digest[i]);
+        if (strcmp(hex, vectors[v][1]) != 0 || key.source_size != strlen(vectors[v][0])) digests_ok = 0;
+    }
+    
+    // A key with the right address but another document's digest or size misses,
+    // and leaves the real entry in place
+    ExtractionCacheKey forged = keys[BENCH_DOWNLOADS - 1];
+    forged.digest[31] ^= 1;
+    char* forged_text = extraction_cache_get(small, &forged, "markdown", NULL);
+    forged = keys[BENCH_DOWNLOADS - 1];
+    forged.source_size++;
+    char* resized_text = extraction_cache_get(small, &forged, "markdown", NULL);
+    char* genuine = extraction_cache_get(small, &keys[BENCH_DOWNLOADS - 1], "markdown", NULL);
+    int verified = digests_ok && forged_text == NULL && resized_text == NULL && genuine != NULL;
+    printf("%s Keys are SHA-256 digests; hits require the stored digest and size to match\n",
+           verified ? "✓" : "✗");
+    free(forged_text);
+    free(resized_text);
+    free(genuine);
+    extraction_cache_close(small);
+    
+    for (int i = 0; i < BENCH_DOWNLOADS; i++) free(expected[i]);
+    free(expected);
+    free(text);
+    
+    char cmd[1100];
+    snprintf(cmd, sizeof(cmd), "rm -rf %s", dir);
+    system(cmd);
+    
+    printf("\n");
+    printf("═══════════════════════════════════════════════════════════\n");
+    printf("Benchmark Complete\n");
+    printf("═══════════════════════════════════════════════════════════\n");
+    
+    return (before_ok && identical && deduplicated && reopened && bounded && verified) ? 0 : 1;
+}
@@ -0,0 +1,288 @@
+/**
+ * Performance Benchmark: Crawler Fetch Engine
+ *
+ * Serves pages from a local keep-alive HTTP stand-in (one listener per
+ * simulated host, fixed response latency) and compares the previous
+ * one-easy-handle-per-page sequential download against the multi-handle
+ * fetch engine. Also checks per-host politeness spacing and that bodies
+ * land on disk intact.
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+#include <unistd.h>
+#include <pthread.h>
+#include <stdatomic.h>
+#include <sys/stat.h>
+#include <arpa/inet.h>
+#include <netinet/in.h>
+#include <sys/socket.h>
+#include <curl/curl.h>
+#include "../../src/crawler/fetch_engine.h"
+
+#define BENCH_HOSTS 4
+#define BENCH_PAGES 160
+#define BENCH_BODY_SIZE 16384
+#define BENCH_LATENCY_US 20000
+#define BENCH_DIR "/tmp/benchmark_fetch_engine"
+
+static int g_ports[BENCH_HOSTS];
+static atomic_int g_connections;
+static char g_body[BENCH_BODY_SIZE];
+
+// Request start times per host, for the politeness check
+static double g_arrivals[BENCH_HOSTS][64];
+static atomic_int g_num_arrivals[BENCH_HOSTS];
+
+// Helper: Wall clock in seconds
+static double now_seconds(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return ts.tv_sec + ts.tv_nsec / 1e9;
+}
+
+typedef struct {
+    int fd;
+    int host;
+} Connection;
+
+// Stand-in server: one thread per keep-alive connection
+static void* serve_connection(void* arg) {
+    Connection conn = *(Connection*)arg;
+    free(arg);
+    
+    char request[8192];
+    size_t used = 0;
+    for (;;) {
+        ssize_t n = recv(conn.fd, request + used, sizeof(request) - used - 1, 0);
+        if (n <= 0) break;
+        used += (size_t)n;
+        request[used] = '\0';
+        
+        char* end;
+        while ((end = strstr(request, "\r\n\r\n")) != NULL) {
+            int slot = atomic_fetch_add(&g_num_arrivals[conn.host], 1);
+            if (slot < 64) g_arrivals[conn.host][slot] = now_seconds();
+            
+            usleep(BENCH_LATENCY_US);
+            
+            char header[256];
+            int header_len = snprintf(header, sizeof(header),
+                                      "HTTP/1.1 200 OK\r\nContent-Type: text/html\r\n"
+                                      "Content-Length: %d\r\nConnection: keep-alive\r\n\r\n",
+                                      BENCH_BODY_SIZE);
+            if (send(conn.fd, header, header_len, MSG_NOSIGNAL) < 0 ||
+                send(conn.fd, g_body, BENCH_BODY_SIZE, MSG_NOSIGNAL) < 0) {
+                close(conn.fd);
+                return NULL;
+            }
+            
+            size_t consumed = (size_t)(end + 4 - request);
+            memmove(request, end + 4, used - consumed + 1);
+            used -= consumed;
+        }
+    }
+    
+    close(conn.fd);
+    return NULL;
+}
+
+static void* accept_loop(void* arg) {
+    int host = (int)(intptr_t)arg;
+    int listener = socket(AF_INET, SOCK_STREAM, 0);
+    int one = 1;
+    setsockopt(listener, SOL_SOCKET, SO_REUSEADDR, &one, sizeof(one));
+    
+    struct sockaddr_in addr;
+    memset(&addr, 0, sizeof(addr));
+    addr.sin_family = AF_INET;
+    addr.sin_addr.s_addr = htonl(INADDR_LOOPBACK);
+    addr.sin_port = 0;
+    bind(listener, (struct sockaddr*)&addr, sizeof(addr));
+    listen(listener, 128);
+    
+    socklen_t len = sizeof(addr);
+    getsockname(listener, (struct sockaddr*)&addr, &len);
+    g_ports[host] = ntohs(addr.sin_port);
+    
+    for (;;) {
+        int fd = accept(listener, NULL, NULL);
+        if (fd < 0) continue;
+        atomic_fetch_add(&g_connections, 1);
+        
+        Connection* conn = (Connection*)malloc(sizeof(Connection));
+        conn->fd = fd;
+        conn->host = host;
+        pthread_t thread;
+        pthread_create(&thread, NULL, serve_connection, conn);
+        pthread_detach(thread);
+    }
+    return NULL;
+}
+
+// Helper: URL of page i (hosts differ by port)
+static void page_url(int i, char* url, size_t size) {
+    snprintf(url, size, "http://127.0.0.1:%d/page/%d", g_ports[i % BENCH_HOSTS], i);
+}
+
+static size_t discard(void* contents, size_t size, size_t nmemb, void* userp) {
+    (void)contents;
+    *(size_t*)userp += size * nmemb;
+    return size * nmemb;
+}
+
+// Reference: Previous crawler download (new easy handle per page, sequential)
+static double benchmark_sequential(int pages) {
+    double start = now_seconds();
+    for (int i = 0; i < pages; i++) {
+        char url[256];
+        page_url(i, url, sizeof(url));
+        size_t bytes = 0;
+        CURL* curl = curl_easy_init();
+        curl_easy_setopt(curl, CURLOPT_URL, url);
+        curl_easy_setopt(curl, CURLOPT_WRITEFUNCTION, discard);
+        curl_easy_setopt(curl, CURLOPT_WRITEDATA, &bytes);
+        curl_easy_setopt(curl, CURLOPT_NOSIGNAL, 1L);
+        curl_easy_perform(curl);
+        curl_easy_cleanup(curl);
+    }
+    return now_seconds() - start;
+}
+
+typedef struct {
+    int ok;
+    int failed;
+} Tally;
+
+static void count_result(const FetchResult* result, void* data) {
+    Tally* tally = (Tally*)data;
+    if (result->error == 0 && result->bytes == BENCH_BODY_SIZE) {
+        tally->ok++;
+    } else {
+        tally->failed++;
+    }
+}
+
+// Helper: Submit pages and run the engine until drained
+static double run_engine(FetchEngine* engine, int first, int pages, int stride) {
+    double start = now_seconds();
+    for (int i = 0; i < pages; i++) {
+        char url[256], path[256];
+        page_url(first + i * stride, url, sizeof(url));
+        snprintf(path, sizeof(path), "%s/page_%d.html", BENCH_DIR, first + i * stride);
+        fetch_engine_submit(engine, url, path, "<!-- URL: bench -->\n", NULL);
+    }
+    while (fetch_engine_run(engine, 1000) > 0) {}
+    return now_seconds() - start;
+}
+
+// Helper: Files are prefix + body, no temp files left behind
+static int check_files(int pages) {
+    for (int i = 0; i < pages; i++) {
+        char path[256];
+        snprintf(path, sizeof(path), "%s/page_%d.html", BENCH_DIR, i);
+        struct stat st;
+        if (stat(path, &st) != 0 || st.st_size != (off_t)(strlen("<!-- URL: bench -->\n") + BENCH_BODY_SIZE)) {
+            return 0;
+        }
+        unlink(path);
+        snprintf(path, sizeof(path), "%s/.page_%d.html.part", BENCH_DIR, i);
+        if (access(path, F_OK) == 0) return 0;
+    }
+    return 1;
+}
+
+int main() {
+    printf("\n");
+    printf("╔══════════════════════════════════════════════════════════╗\n");
+    printf("║     Crawler Fetch Engine Benchmark                      ║\n");
+    printf("╚══════════════════════════════════════════════════════════╝\n");
+    
+    memset(g_body, 'x', sizeof(g_body));
+    mkdir(BENCH_DIR, 0755);
+    curl_global_init(CURL_GLOBAL_DEFAULT);
+    
+    for (int h = 0; h < BENCH_HOSTS; h++) {
+        pthread_t thread;
+        pthread_create(&thread, NULL, accept_loop, (void*)(intptr_t)h);
+        pthread_detach(thread);
+    }
+    for (int h = 0; h < BENCH_HOSTS; h++) {
+        while (g_ports[h] == 0) usleep(1000);
+    }
+    
+    printf("\n%d pages across %d hosts, %d KB each, %d ms server latency\n",
+           BENCH_PAGES, BENCH_HOSTS, BENCH_BODY_SIZE / 1024, BENCH_LATENCY_US / 1000);
+    printf("─────────────────────────────────────\n");
+    
+    // Before: sequential, new connection per page
+    atomic_store(&g_connections, 0);
+    double before = benchmark_sequential(BENCH_PAGES);
+    int before_connections = atomic_load(&g_connections);
+    
+    // After: multi handle with reused connections
+    atomic_store(&g_connections, 0);
+    Tally tally = {0};
+    FetchEngineConfig config = { .max_in_flight = 16, .max_per_host = 4 };
+    FetchEngine* engine = fetch_engine_create(&config, count_result, &tally);
+    double after = run_engine(engine, 0, BENCH_PAGES, 1);
+    FetchEngineStats stats;
+    fetch_engine_get_stats(engine, &stats);
+    fetch_engine_destroy(engine);
+    int after_connections = atomic_load(&g_connections);
+    
+    printf("  Before (easy per page):  %7.1f pages/s, %d connections\n",
+           BENCH_PAGES / before, before_connections);
+    printf("  After  (fetch engine):   %7.1f pages/s, %d connections\n",
+           BENCH_PAGES / after, after_connections);
+    printf("  Speedup: %.1fx\n", before / after);
+    
+    int ok = tally.ok == BENCH_PAGES && tally.failed == 0 && stats.completed == BENCH_PAGES;
+    printf("%s All %d downloads succeeded\n", ok ? "✓" : "✗", BENCH_PAGES);
+    
+    int reused = after_connections <= BENCH_HOSTS * config.max_per_host;
+    printf("%s Connections reused (%d opened, limit %d)\n", reused ? "✓" : "✗",
+           after_connections, BENCH_HOSTS * config.max_per_host);
+    
+    int files = check_files(BENCH_PAGES);
+    printf("%s Bodies streamed to disk intact, no partial files\n", files ? "✓" : "✗");
+    
+    // Politeness: requests to one host start at least the delay apart
+    for (int h = 0; h < BENCH_HOSTS; h++) atomic_store(&g_num_arrivals[h], 0);
+    config.host_delay_min_ms = 50;
+    config.host_delay_max_ms = 50;
+    engine = fetch_engine_create(&config, count_result, &tally);
+    double polite = run_engine(engine, 0, 20, BENCH_HOSTS / 2);
+    fetch_engine_destroy(engine);
+    
+    double min_gap = 1e9;
+    int hosts_hit = 0;
+    for (int h = 0; h < BENCH_HOSTS; h++) {
+        int n = atomic_load(&g_num_arrivals[h]);
+        if (n > 0) hosts_hit++;
+        for (int i = 1; i < n && i < 64; i++) {
+            double gap = g_arrivals[h][i] - g_arrivals[h][i - 1];
+            if (gap < min_gap) min_gap = gap;
+        }
+    }
+    int spaced = min_gap >= 0.045 && hosts_hit == 2 && polite < 20 * 0.050;
+    printf("%s Per-host delay held (min gap %.0f ms, 20 pages on 2 hosts in %.2f s)\n",
+           spaced ? "✓" : "✗", min_gap * 1000, polite);
+    for (int i = 0; i < 20; i++) {
+        char path[256];
+        snprintf(path, sizeof(path), "%s/page_%d.html", BENCH_DIR, i * (BENCH_HOSTS / 2));
+        unlink(path);
+    }
+    rmdir(BENCH_DIR);
+    
+    curl_global_cleanup();
+    
+    printf("\n");
+    printf("═══════════════════════════════════════════════════════════\n");
+    printf("Benchmark Complete\n");
+    printf("═══════════════════════════════════════════════════════════\n");
+    
+    return (ok && reused && files && spaced) ? 0 : 1;
+}
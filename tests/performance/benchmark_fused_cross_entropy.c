@@ -0,0 +1,171 @@
+/**
+ * Performance Benchmark: Fused Cross-Entropy
+ *
+ * Compares the previous training loss path - full [rows x vocab] logits,
+ * a zeroed [rows x vocab] gradient, softmax per row, then the two
+ * projection gradients - against cllm_fused_cross_entropy, which works
+ * through the vocabulary in chunks and never stores the logits. Checks
+ * that the loss and both gradients match and that positions without a
+ * valid target contribute nothing.
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <math.h>
+#include <time.h>
+#include "../../include/cllm_training.h"
+#include "../../include/cllm_gemm.h"
+#include "../../include/prime_float_math.h"
+
+#define BENCH_ROWS 256
+#define BENCH_VOCAB 32000
+#define BENCH_EMBED 128
+
+// Helper: Wall clock in seconds
+static double now_seconds(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return ts.tv_sec + ts.tv_nsec / 1e9;
+}
+
+static void fill_random(float* x, size_t n, float scale) {
+    for (size_t i = 0; i < n; i++) x[i] = ((float)rand() / RAND_MAX - 0.5f) * scale;
+}
+
+static float max_abs_diff(const float* a, const float* b, size_t n) {
+    float diff = 0.0f;
+    for (size_t i = 0; i < n; i++) {
+        float d = fabsf(a[i] - b[i]);
+        if (d > diff) diff = d;
+    }
+    return diff;
+}
+
+// Helper: The previous path with materialized logits and logit gradients
+static float materialized_cross_entropy(const float* hidden, const float* embeddings, const uint32_t* targets,
+                                        float* logits, float* grad_logits,
+                                        float* grad_hidden, float* grad_embeddings) {
+    cllm_gemm(false, true, BENCH_ROWS, BENCH_VOCAB, BENCH_EMBED, 1.0f, hidden, BENCH_EMBED,
+              embeddings, BENCH_EMBED, 0.0f, logits, BENCH_VOCAB);
+    memset(grad_logits, 0, (size_t)BENCH_ROWS * BENCH_VOCAB * sizeof(float));
+    
+    float total_loss = 0.0f;
+    int counted = 0;
+    for (int r = 0; r < BENCH_ROWS; r++) {
+        uint32_t target = targets[r];
+        if (target >= BENCH_VOCAB) continue;
+        float* row = &logits[(size_t)r * BENCH_VOCAB];
+        float* grad = &grad_logits[(size_t)r * BENCH_VOCAB];
+        
+        float max_logit = row[0];
+        for (int v = 1; v < BENCH_VOCAB; v++) {
+            if (row[v] > max_logit) max_logit = row[v];
+        }
+        float sum_exp = 0.0f;
+        for (int v = 0; v < BENCH_VOCAB; v++) sum_exp += prime_expf(row[v] - max_logit);
+        for (int v = 0; v < BENCH_VOCAB; v++) {
+            grad[v] = prime_expf(row[v] - max_logit) / sum_exp - (v == (int)target ? 1.0f : 0.0f);
+        }
+        total_loss += max_logit + prime_logf(sum_exp) - row[target];
+        counted++;
+    }
+    
+    cllm_gemm(true, false, BENCH_VOCAB, BENCH_EMBED, BENCH_ROWS, 1.0f, grad_logits, BENCH_VOCAB,
+              hidden, BENCH_EMBED, 1.0f, grad_embeddings, BENCH_EMBED);
+    cllm_gemm(false, false, BENCH_ROWS, BENCH_EMBED, BENCH_VOCAB, 1.0f, grad_logits, BENCH_VOCAB,
+              embeddings, BENCH_EMBED, 0.0f, grad_hidden, BENCH_EMBED);
+    return counted > 0 ? total_loss / counted : 0.0f;
+}
+
+int main() {
+    printf("\n");
+    printf("╔══════════════════════════════════════════════════════════╗\n");
+    printf("║     Fused Cross-Entropy Benchmark                       ║\n");
+    printf("╚══════════════════════════════════════════════════════════╝\n");
+    
+    size_t embed_floats = (size_t)BENCH_VOCAB * BENCH_EMBED;
+    size_t hidden_floats = (size_t)BENCH_ROWS * BENCH_EMBED;
+    size_t logit_floats = (size_t)BENCH_ROWS * BENCH_VOCAB;
+    
+    srand(42);
+    float* embeddings = (float*)malloc(embed_floats * sizeof(float));
+    float* hidden = (float*)malloc(hidden_floats * sizeof(float));
+    uint32_t* targets = (uint32_t*)malloc(BENCH_ROWS * sizeof(uint32_t));
+    fill_random(embeddings, embed_floats, 0.2f);
+    fill_random(hidden, hidden_floats, 2.0f);
+    for (int r = 0; r < BENCH_ROWS; r++) targets[r] = (uint32_t)(rand() % BENCH_VOCAB);
+    targets[7] = BENCH_VOCAB;  // Padding position
+    
+    float* logits = (float*)malloc(logit_floats * sizeof(float));
+    float* grad_logits = (float*)malloc(logit_floats * sizeof(float));
+    float* grad_hidden_old = (float*)malloc(hidden_floats * sizeof(float));
+    float* grad_hidden_new = (float*)malloc(hidden_floats * sizeof(float));
+    float* grad_embed_old = (float*)calloc(embed_floats, sizeof(float));
+    float* grad_embed_new = (float*)calloc(embed_floats, sizeof(float));
+    
+    printf("\n%d positions, vocabulary %d, embedding %d\n", BENCH_ROWS, BENCH_VOCAB, BENCH_EMBED);
+    printf("─────────────────────────────────────\n");
+    
+    // Warm up (page faults on the logit buffers, packing buffers)
+    materialized_cross_entropy(hidden, embeddings, targets, logits, grad_logits,
+                               grad_hidden_old, grad_embed_old);
+    memset(grad_embed_old, 0, embed_floats * sizeof(float));
+    
+    // Before: materialized logits
+    double start = now_seconds();
+    float loss_old = materialized_cross_entropy(hidden, embeddings, targets, logits, grad_logits,
+                                                grad_hidden_old, grad_embed_old);
+    double before = now_seconds() - start;
+    
+    // After: fused, chunked over the vocabulary
+    start = now_seconds();
+    float loss_new = cllm_fused_cross_entropy(hidden, embeddings, targets, BENCH_ROWS, BENCH_EMBED,
+                                              BENCH_VOCAB, 1.0f, grad_hidden_new, grad_embed_new);
+    double after = now_seconds() - start;
+    
+    printf("  Before (materialized logits): %8.1f ms, %.1f MB of logits and logit gradients\n",
+           before * 1000.0, 2.0 * logit_floats * sizeof(float) / 1e6);
+    printf("  After  (fused, chunked):      %8.1f ms, no full logits\n", after * 1000.0);
+    printf("  Speedup: %.1fx\n", before / after);
+    
+    int same_loss = fabsf(loss_old - loss_new) < 1e-3f * fabsf(loss_old) + 1e-4f;
+    printf("%s Same loss (%.5f vs %.5f)\n", same_loss ? "✓" : "✗", loss_old, loss_new);
+    float hidden_diff = max_abs_diff(grad_hidden_old, grad_hidden_new, hidden_floats);
+    float embed_diff = max_abs_diff(grad_embed_old, grad_embed_new, embed_floats);
+    int same_grads = hidden_diff < 1e-4f && embed_diff < 1e-4f;
+    printf("%s Same gradients (max difference %.2e hidden, %.2e embeddings)\n",
+           same_grads ? "✓" : "✗", hidden_diff, embed_diff);
+    
+    int padding_zero = 1;
+    for (int d = 0; d < BENCH_EMBED; d++) {
+        if (grad_hidden_new[7 * BENCH_EMBED + d] != 0.0f) padding_zero = 0;
+    }
+    printf("%s Position without a valid target has zero gradient\n", padding_zero ? "✓" : "✗");
+    
+    // Gradient scale and accumulation into an existing buffer
+    float* grad_embed_twice = (float*)malloc(embed_floats * sizeof(float));
+    memcpy(grad_embed_twice, grad_embed_new, embed_floats * sizeof(float));
+    cllm_fused_cross_entropy(hidden, embeddings, targets, BENCH_ROWS, BENCH_EMBED,
+                             BENCH_VOCAB, 0.5f, NULL, grad_embed_twice);
+    int accumulated = 1;
+    for (size_t i = 0; i < embed_floats; i++) {
+        if (fabsf(grad_embed_twice[i] - 1.5f * grad_embed_new[i]) > 1e-5f) {
+            accumulated = 0;
+            break;
+        }
+    }
+    printf("%s Embedding gradients accumulate with grad_scale\n", accumulated ? "✓" : "✗");
+    
+    free(embeddings); free(hidden); free(targets);
+    free(logits); free(grad_logits);
+    free(grad_hidden_old); free(grad_hidden_new);
+    free(grad_embed_old); free(grad_embed_new); free(grad_embed_twice);
+    
+    printf("\n");
+    printf("═══════════════════════════════════════════════════════════\n");
+    printf("Benchmark Complete\n");
+    printf("═══════════════════════════════════════════════════════════\n");
+    
+    return (same_loss && same_grads && padding_zero && accumulated) ? 0 : 1;
+}
\ No newline at end of file
@@ -0,0 +1,267 @@
+/**
+ * Performance Benchmark: GEMM
+ *
+ * Compares the previous simd_matrix_multiply (32x32 blocking with C
+ * loaded and stored for every k) against the packed, register-blocked
+ * cllm_gemm on the shapes of the model's projections, and checks every
+ * supported microkernel against a reference on odd sizes, transposed
+ * operands and beta accumulation. Also checks that products split over
+ * the thread pool, including products issued by several threads at
+ * once and by threads marked serial, match the single-threaded result.
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <math.h>
+#include <time.h>
+#include <pthread.h>
+#include <immintrin.h>
+#include "../../include/cllm_gemm.h"
+#include "../../include/cllm_simd_utils.h"
+
+#define BENCH_RUNS 3
+
+// Helper: Wall clock in seconds
+static double now_seconds(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return ts.tv_sec + ts.tv_nsec / 1e9;
+}
+
+// Helper: The previous simd_matrix_multiply (C = A * B), optimized as the library is
+__attribute__((optimize("O2")))
+static void old_matrix_multiply(float* C, const float* A, const float* B, int m, int n, int p) {
+    memset(C, 0, (size_t)m * p * sizeof(float));
+    const int BLOCK_SIZE = 32;
+    for (int i0 = 0; i0 < m; i0 += BLOCK_SIZE) {
+        for (int j0 = 0; j0 < p; j0 += BLOCK_SIZE) {
+            for (int k0 = 0; k0 < n; k0 += BLOCK_SIZE) {
+                int i_max = (i0 + BLOCK_SIZE < m) ? i0 + BLOCK_SIZE : m;
+                int j_max = (j0 + BLOCK_SIZE < p) ? j0 + BLOCK_SIZE : p;
+                int k_max = (k0 + BLOCK_SIZE < n) ? k0 + BLOCK_SIZE : n;
+                for (int i = i0; i < i_max; i++) {
+                    for (int k = k0; k < k_max; k++) {
+                        __m256 va = _mm256_set1_ps(A[i * n + k]);
+                        int j = j0;
+                        int j_vec = j0 + ((j_max - j0) / 8) * 8;
+                        for (; j < j_vec; j += 8) {
+                            __m256 vc = _mm256_loadu_ps(&C[i * p + j]);
+                            vc = _mm256_fmadd_ps(va, _mm256_loadu_ps(&B[k * p + j]), vc);
+                            _mm256_storeu_ps(&C[i * p + j], vc);
+                        }
+                        for (; j < j_max; j++) C[i * p + j] += A[i * n + k] * B[k * p + j];
+                    }
+                }
+            }
+        }
+    }
+}
+
+// Helper: Reference C = alpha * op(A) * op(B) + beta * C in double precision
+static void reference_gemm(int ta, int tb, int m, int n, int k, float alpha, const float* A, int lda,
+                           const float* B, int ldb, float beta, float* C, int ldc) {
+    for (int i = 0; i < m; i++) {
+        for (int j = 0; j < n; j++) {
+            double sum = 0.0;
+            for (int p = 0; p < k; p++) {
+                double a = ta ? A[p * lda + i] : A[i * lda + p];
+                double b = tb ? B[j * ldb + p] : B[p * ldb + j];
+                sum += a * b;
+            }
+            C[i * ldc + j] = (float)(alpha * sum + (beta == 0.0f ? 0.0 : beta * C[i * ldc + j]));
+        }
+    }
+}
+
+static void fill_random(float* x, size_t n) {
+    for (size_t i = 0; i < n; i++) x[i] = (float)rand() / RAND_MAX - 0.5f;
+}
+
+static float max_abs_diff(const float* a, const float* b, size_t n) {
+    float diff = 0.0f;
+    for (size_t i = 0; i < n; i++) {
+        float d = fabsf(a[i] - b[i]);
+        if (d > diff) diff = d;
+    }
+    return diff;
+}
+
+// Helper: Check one ISA on odd shapes, transposes and beta
+static int check_isa(void) {
+    static const int shapes[][3] = { {1, 1, 1}, {7, 13, 5}, {37, 70, 300}, {130, 33, 517}, {6, 16, 256} };
+    int ok = 1;
+    for (size_t s = 0; s < sizeof(shapes) / sizeof(shapes[0]); s++) {
+        int m = shapes[s][0], n = shapes[s][1], k = shapes[s][2];
+        for (int ta = 0; ta < 2; ta++) {
+            for (int tb = 0; tb < 2; tb++) {
+                int lda = (ta ? m : k) + 3, ldb = (tb ? k : n) + 1, ldc = n + 2;
+                float* A = (float*)malloc((size_t)(ta ? k : m) * lda * sizeof(float));
+                float* B = (float*)malloc((size_t)(tb ? n : k) * ldb * sizeof(float));
+                float* C = (float*)malloc((size_t)m * ldc * sizeof(float));
+                float* R = (float*)malloc((size_t)m * ldc * sizeof(float));
+                fill_random(A, (size_t)(ta ? k : m) * lda);
+                fill_random(B, (size_t)(tb ? n : k) * ldb);
+                fill_random(C, (size_t)m * ldc);
+                memcpy(R, C, (size_t)m * ldc * sizeof(float));
+                float beta = (ta + tb) % 2 ? 0.5f : 0.0f;
+                cllm_gemm(ta, tb, m, n, k, 0.75f, A, lda, B, ldb, beta, C, ldc);
+                reference_gemm(ta, tb, m, n, k, 0.75f, A, lda, B, ldb, beta, R, ldc);
+                if (max_abs_diff(C, R, (size_t)m * ldc) > 1e-3f) ok = 0;
+                free(A); free(B); free(C); free(R);
+            }
+        }
+    }
+    
+    // GEMV in both orientations and a rank-1 update
+    int m = 45, n = 67;
+    float* A = (float*)malloc(m * n * sizeof(float));
+    float* x = (float*)malloc(n * sizeof(float));
+    float* y = (float*)calloc(n, sizeof(float));
+    float* R = (float*)malloc(m * n * sizeof(float));
+    fill_random(A, m * n);
+    fill_random(x, n);
+    cllm_gemv(false, m, n, 1.0f, A, n, x, 0.0f, y);
+    reference_gemm(0, 0, m, 1, n, 1.0f, A, n, x, 1, 0.0f, R, 1);
+    if (max_abs_diff(y, R, m) > 1e-4f) ok = 0;
+    cllm_gemv(true, m, n, 1.0f, A, n, x, 0.0f, y);
+    reference_gemm(1, 0, n, 1, m, 1.0f, A, n, x, 1, 0.0f, R, 1);
+    if (max_abs_diff(y, R, n) > 1e-4f) ok = 0;
+    memcpy(R, A, m * n * sizeof(float));
+    cllm_ger(m, n, 2.0f, x, y, A, n);
+    for (int i = 0; i < m; i++) {
+        for (int j = 0; j < n; j++) {
+            if (fabsf(A[i * n + j] - (R[i * n + j] + 2.0f * x[i] * y[j])) > 1e-5f) ok = 0;
+        }
+    }
+    free(A); free(x); free(y); free(R);
+    return ok;
+}
+
+// Helper: A thread issuing products while others do the same
+typedef struct {
+    const float* A;
+    const float* B;
+    const float* expected;
+    int m, n, k;
+    bool serial;
+    bool ok;
+} CallerArgs;
+
+#define CALLER_THREADS 4
+#define CALLER_PRODUCTS 20
+
+static void* caller_thread(void* arg) {
+    CallerArgs* args = (CallerArgs*)arg;
+    cllm_gemm_set_thread_serial(args->serial);
+    float* C = (float*)malloc((size_t)args->m * args->n * sizeof(float));
+    args->ok = true;
+    for (int i = 0; i < CALLER_PRODUCTS; i++) {
+        cllm_gemm(false, true, args->m, args->n, args->k, 1.0f, args->A, args->k,
+                  args->B, args->k, 0.0f, C, args->n);
+        if (memcmp(C, args->expected, (size_t)args->m * args->n * sizeof(float)) != 0) args->ok = false;
+    }
+    free(C);
+    return NULL;
+}
+
+int main() {
+    printf("\n");
+    printf("╔══════════════════════════════════════════════════════════╗\n");
+    printf("║     GEMM Benchmark                                      ║\n");
+    printf("╚══════════════════════════════════════════════════════════╝\n");
+    
+    CLLMGemmIsa best = cllm_gemm_get_isa();
+    printf("\nMicrokernel: %s\n", cllm_gemm_isa_name(best));
+    printf("─────────────────────────────────────\n");
+    
+    // Projection shapes: FFN up/down over a batch of tokens, vocab logits
+    static const int shapes[][3] = { {256, 1024, 256}, {256, 256, 1024}, {128, 8000, 256} };
+    srand(42);
+    int same = 1;
+    double total_before = 0.0, total_after = 0.0;
+    for (size_t s = 0; s < sizeof(shapes) / sizeof(shapes[0]); s++) {
+        int m = shapes[s][0], p = shapes[s][1], n = shapes[s][2];
+        float* A = (float*)malloc((size_t)m * n * sizeof(float));
+        float* B = (float*)malloc((size_t)n * p * sizeof(float));
+        float* C_old = (float*)malloc((size_t)m * p * sizeof(float));
+        float* C_new = (float*)malloc((size_t)m * p * sizeof(float));
+        fill_random(A, (size_t)m * n);
+        fill_random(B, (size_t)n * p);
+        
+        // Warm up (page faults, packing buffers)
+        old_matrix_multiply(C_old, A, B, m, n, p);
+        simd_matrix_multiply(C_new, A, B, m, n, p);
+        
+        double start = now_seconds();
+        for (int r = 0; r < BENCH_RUNS; r++) old_matrix_multiply(C_old, A, B, m, n, p);
+        double before = (now_seconds() - start) / BENCH_RUNS;
+        
+        start = now_seconds();
+        for (int r = 0; r < BENCH_RUNS; r++) simd_matrix_multiply(C_new, A, B, m, n, p);
+        double after = (now_seconds() - start) / BENCH_RUNS;
+        
+        if (max_abs_diff(C_old, C_new, (size_t)m * p) > 1e-3f) same = 0;
+        double gflop = 2.0 * m * n * p / 1e9;
+        printf("  %4d x %4d x %4d: before %6.2f GFLOP/s, after %6.2f GFLOP/s (%.1fx)\n",
+               m, p, n, gflop / before, gflop / after, before / after);
+        total_before += before;
+        total_after += after;
+        free(A); free(B); free(C_old); free(C_new);
+    }
+    printf("  Speedup: %.1fx\n", total_before / total_after);
+    printf("%s Same products as the previous implementation\n", same ? "✓" : "✗");
+    
+    int all_ok = same;
+    for (int isa = CLLM_GEMM_ISA_SCALAR; isa <= CLLM_GEMM_ISA_AVX512; isa++) {
+        if (cllm_gemm_set_isa((CLLMGemmIsa)isa) != 0) {
+            printf("- %s microkernel not supported on this CPU\n", cllm_gemm_isa_name((CLLMGemmIsa)isa));
+            continue;
+        }
+        int ok = check_isa();
+        printf("%s %s microkernel matches the reference (odd shapes, transposes, beta, gemv, ger)\n",
+               ok ? "✓" : "✗", cllm_gemm_isa_name((CLLMGemmIsa)isa));
+        all_ok = all_ok && ok;
+    }
+    cllm_gemm_set_isa(best);
+    
+    // Split across threads gives the same result as one thread
+    int m = 300, n = 500, k = 200;
+    float* A = (float*)malloc((size_t)m * k * sizeof(float));
+    float* B = (float*)malloc((size_t)k * n * sizeof(float));
+    float* C1 = (float*)malloc((size_t)m * n * sizeof(float));
+    float* C4 = (float*)malloc((size_t)m * n * sizeof(float));
+    fill_random(A, (size_t)m * k);
+    fill_random(B, (size_t)k * n);
+    cllm_gemm_set_threads(1);
+    cllm_gemm(false, true, m, n, k, 1.0f, A, k, B, k, 0.0f, C1, n);
+    cllm_gemm_set_threads(4);
+    cllm_gemm(false, true, m, n, k, 1.0f, A, k, B, k, 0.0f, C4, n);
+    int threaded = max_abs_diff(C1, C4, (size_t)m * n) == 0.0f;
+    printf("%s Multithreaded split matches single-threaded result\n", threaded ? "✓" : "✗");
+    
+    // Several callers share the pool (one splits, the rest run on their own thread)
+    pthread_t callers[CALLER_THREADS];
+    CallerArgs caller_args[CALLER_THREADS];
+    for (int t = 0; t < CALLER_THREADS; t++) {
+        caller_args[t] = (CallerArgs){ A, B, C1, m, n, k, t % 2 == 1, false };
+        pthread_create(&callers[t], NULL, caller_thread, &caller_args[t]);
+    }
+    int concurrent = 1;
+    for (int t = 0; t < CALLER_THREADS; t++) {
+        pthread_join(callers[t], NULL);
+        if (!caller_args[t].ok) concurrent = 0;
+    }
+    cllm_gemm_set_threads(0);
+    printf("%s Concurrent and serial callers match single-threaded result (%d threads x %d products)\n",
+           concurrent ? "✓" : "✗", CALLER_THREADS, CALLER_PRODUCTS);
+    threaded = threaded && concurrent;
+    free(A); free(B); free(C1); free(C4);
+    
+    printf("\n");
+    printf("═══════════════════════════════════════════════════════════\n");
+    printf("Benchmark Complete\n");
+    printf("═══════════════════════════════════════════════════════════\n");
+    
+    return (all_ok && threaded) ? 0 : 1;
+}
\ No newline at end of file
@@ -0,0 +1,273 @@
+/**
+ * Performance Benchmark: HTML Preprocessing Passes
+ *
+ * Compares the previous preprocessing of a page - separate passes for tag
+ * removal, text cleaning, href extraction and the base URL comment -
+ * against the streaming HtmlScanner fed 64 KB chunks. Also checks that
+ * the scanner's output does not depend on how the input is chunked.
+ */
+
+#define _GNU_SOURCE
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <strings.h>
+#include <ctype.h>
+#include <time.h>
+#include <stdbool.h>
+#include "../../src/crawler/html_scanner.h"
+
+#define BENCH_BLOCKS 20000
+#define BENCH_ROUNDS 5
+
+// Helper: Wall clock in seconds
+static double now_seconds(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return ts.tv_sec + ts.tv_nsec / 1e9;
+}
+
+// Reference: Previous passes from preprocessor.c
+static void reference_remove_tags(const char* html, char* text, size_t text_size) {
+    const char* p = html;
+    char* out = text;
+    char* out_end = text + text_size - 1;
+    int in_tag = 0, in_script = 0, in_style = 0;
+    
+    while (*p && out < out_end) {
+        if (strncasecmp(p, "<script", 7) == 0) {
+            in_script = 1;
+            in_tag = 1;
+        } else if (strncasecmp(p, "</script>", 9) == 0) {
+            in_script = 0;
+            p += 9;
+            continue;
+        } else if (strncasecmp(p, "<style", 6) == 0) {
+            in_style = 1;
+            in_tag = 1;
+        } else if (strncasecmp(p, "</style>", 8) == 0) {
+            in_style = 0;
+            p += 8;
+            continue;
+        }
+        if (in_script || in_style) {
+            p++;
+            continue;
+        }
+        if (*p == '<') {
+            in_tag = 1;
+            p++;
+            continue;
+        } else if (*p == '>') {
+            in_tag = 0;
+            p++;
+            if (out > text && *(out-1) != ' ' && *(out-1) != '\n') *out++ = ' ';
+            continue;
+        }
+        if (in_tag) {
+            p++;
+            continue;
+        }
+        *out++ = *p++;
+    }
+    *out = '\0';
+}
+
+static void reference_clean_text(char* text) {
+    char* src = text;
+    char* dst = text;
+    int last_was_space = 1;
+    static const char* entities[][2] = {
+        {"&nbsp;", " "}, {"&lt;", "<"}, {"&gt;", ">"}, {"&amp;", "&"}, {"&quot;", "\""}
+    };
+    
+    while (*src) {
+        int matched = 0;
+        for (int i = 0; i < 5; i++) {
+            size_t n = strlen(entities[i][0]);
+            if (strncmp(src, entities[i][0], n) == 0) {
+                *dst++ = entities[i][1][0];
+                src += n;
+                last_was_space = 0;
+                matched = 1;
+                break;
+            }
+        }
+        if (matched) continue;
+        if (isspace((unsigned char)*src)) {
+            if (!last_was_space) {
+                *dst++ = ' ';
+                last_was_space = 1;
+            }
+            src++;
+        } else {
+            *dst++ = *src++;
+            last_was_space = 0;
+        }
+    }
+    *dst = '\0';
+}
+
+static int reference_links(const char* html) {
+    int count = 0;
+    const char* p = html;
+    while ((p = strstr(p, "href=")) != NULL) {
+        p += 5;
+        char quote = (*p == '"' || *p == '\'') ? *p++ : 0;
+        const char* end = quote ? strchr(p, quote) : p + strcspn(p, " >");
+        if (!end) break;
+        char url[2048];
+        size_t len = (size_t)(end - p);
+        if (len > 0 && len < sizeof(url)) {
+            memcpy(url, p, len);
+            url[len] = '\0';
+            if (url[0] == '/' || strncmp(url, "http", 4) == 0) count++;
+        }
+        p = end + 1;
+    }
+    return count;
+}
+
+static void reference_base_url(const char* html, char* base, size_t size) {
+    base[0] = '\0';
+    const char* p = strstr(html, "<!-- URL: ");
+    if (!p) return;
+    p += 10;
+    const char* end = strstr(p, " -->");
+    if (end && (size_t)(end - p) < size) {
+        memcpy(base, p, end - p);
+        base[end - p] = '\0';
+    }
+}
+
+// Links reported by the scanner
+typedef struct {
+    int count;
+    unsigned long checksum;
+} LinkTally;
+
+static void tally_link(const char* url, HtmlLinkKind kind, void* user_data) {
+    LinkTally* tally = (LinkTally*)user_data;
+    if (kind != HTML_LINK_HREF) return;
+    if (url[0] != '/' && strncmp(url, "http", 4) != 0) return;
+    tally->count++;
+    for (const char* p = url; *p; p++) tally->checksum = tally->checksum * 31 + (unsigned char)*p;
+}
+
+// Helper: Scan html in pieces of `chunk` bytes
+static HtmlScanner* scan(const char* html, size_t length, size_t chunk, ExtractionMode mode, LinkTally* tally) {
+    HtmlScanner* scanner = html_scanner_create(mode, 5 * 1024 * 1024);
+    html_scanner_set_link_callback(scanner, tally_link, tally);
+    for (size_t off = 0; off < length; off += chunk) {
+        size_t n = length - off < chunk ? length - off : chunk;
+        html_scanner_feed(scanner, html + off, n);
+    }
+    html_scanner_finish(scanner);
+    return scanner;
+}
+
+int main() {
+    printf("\n");
+    printf("╔══════════════════════════════════════════════════════════╗\n");
+    printf("║     HTML Preprocessing Benchmark                        ║\n");
+    printf("╚══════════════════════════════════════════════════════════╝\n");
+    
+    // Synthetic page: crawler header, navigation, articles, scripts
+    size_t capacity = (size_t)BENCH_BLOCKS * 512 + 4096;
+    char* html = (char*)malloc(capacity);
+    size_t len = (size_t)snprintf(html, capacity,
+        "<!-- URL: https://example.org/wiki/Page -->\n<!-- Timestamp: 0 -->\n"
+        "<!DOCTYPE html><html><head><title>Page</title>"
+        "<style>body { color: red; }</style></head><body>"
+        "<nav class=\"site-nav\"><a href=\"/home\">Home</a> <a href='/about'>About</a></nav>\n");
+    for (int i = 0; i < BENCH_BLOCKS; i++) {
+        len += (size_t)snprintf(html + len, capacity - len,
+            "<div class=\"content\"><p>Paragraph %d talks about &quot;lattices&quot; &amp; primes,\n"
+            "   see <a href=\"https://other%d.example.com/doc?id=%d\">this   doc</a>"
+            " or <a href=\"/wiki/Topic_%d\" title=\"x\">topic</a>.</p>"
+            "<script>var s = '<b>not text</b>';</script></div>\n",
+            i, i % 97, i, i);
+    }
+    len += (size_t)snprintf(html + len, capacity - len,
+        "<footer id=\"footer\">Copyright notice</footer></body></html>\n");
+    
+    printf("\nPage: %.1f MB, %d paragraphs, %d rounds\n", len / 1e6, BENCH_BLOCKS, BENCH_ROUNDS);
+    printf("─────────────────────────────────────\n");
+    
+    // Before: four passes over a fully loaded page
+    char* text = (char*)malloc(5 * 1024 * 1024);
+    char base[2048];
+    int reference_count = 0;
+    double start = now_seconds();
+    for (int r = 0; r < BENCH_ROUNDS; r++) {
+        reference_base_url(html, base, sizeof(base));
+        reference_count = reference_links(html);
+        reference_remove_tags(html, text, 5 * 1024 * 1024);
+        reference_clean_text(text);
+    }
+    double before = now_seconds() - start;
+    
+    // After: one streaming pass in 64 KB chunks
+    LinkTally tally = {0};
+    HtmlScanner* scanner = NULL;
+    start = now_seconds();
+    for (int r = 0; r < BENCH_ROUNDS; r++) {
+        if (scanner) html_scanner_destroy(scanner);
+        memset(&tally, 0, sizeof(tally));
+        scanner = scan(html, len, HTML_SCANNER_CHUNK_SIZE, EXTRACT_ALL, &tally);
+    }
+    double after = now_seconds() - start;
+    
+    printf("  Before (4 passes):      %7.1f MB/s\n", BENCH_ROUNDS * len / 1e6 / before);
+    printf("  After  (single stream): %7.1f MB/s\n", BENCH_ROUNDS * len / 1e6 / after);
+    printf("  Speedup: %.1fx\n", before / after);
+    
+    size_t text_length;
+    const char* scanned = html_scanner_text(scanner, &text_length);
+    int same_links = tally.count == reference_count;
+    int same_base = strcmp(html_scanner_base_url(scanner), base) == 0 &&
+                    strcmp(base, "https://example.org/wiki/Page") == 0;
+    int clean = strstr(scanned, "not text") == NULL && strstr(scanned, "color") == NULL &&
+                strstr(scanned, "Paragraph 7 talks about \"lattices\" & primes, see this doc or topic.") != NULL &&
+                strstr(scanned, "  ") == NULL && scanned[0] == 'P' && scanned[text_length - 1] != ' ';
+    printf("%s Same links as href pass (%d) and base URL\n", same_links && same_base ? "✓" : "✗", tally.count);
+    printf("%s Text cleaned in the same pass (%zu chars)\n", clean ? "✓" : "✗", text_length);
+    
+    // Output must not depend on chunk boundaries
+    int invariant = 1;
+    size_t piece_len = len < 200000 ? len : 200000;
+    LinkTally w = {0};
+    HtmlScanner* whole = scan(html, piece_len, piece_len, EXTRACT_ALL, &w);
+    size_t chunks[] = {1, 7, 4093};
+    for (int c = 0; c < 3; c++) {
+        LinkTally t = {0};
+        HtmlScanner* pieces = scan(html, piece_len, chunks[c], EXTRACT_ALL, &t);
+        invariant = invariant &&
+                    strcmp(html_scanner_text(whole, NULL), html_scanner_text(pieces, NULL)) == 0 &&
+                    w.count == t.count && w.checksum == t.checksum;
+        html_scanner_destroy(pieces);
+    }
+    html_scanner_destroy(whole);
+    printf("%s Same output for 1, 7 and 4093 byte chunks\n", invariant ? "✓" : "✗");
+    
+    // Boilerplate classification in the same pass
+    LinkTally t = {0};
+    HtmlScanner* human = scan(html, len, HTML_SCANNER_CHUNK_SIZE, EXTRACT_HUMAN_TEXT, &t);
+    const char* human_text = html_scanner_text(human, NULL);
+    int boilerplate = strstr(human_text, "Copyright") == NULL && strstr(human_text, "About") == NULL &&
+                      strstr(human_text, "Paragraph 3 ") != NULL && strstr(scanned, "Copyright") != NULL &&
+                      t.count == tally.count;
+    printf("%s Navigation and footer dropped in human-text mode\n", boilerplate ? "✓" : "✗");
+    html_scanner_destroy(human);
+    
+    html_scanner_destroy(scanner);
+    free(text);
+    free(html);
+    
+    printf("\n");
+    printf("═══════════════════════════════════════════════════════════\n");
+    printf("Benchmark Complete\n");
+    printf("═══════════════════════════════════════════════════════════\n");
+    
+    return (same_links && same_base && clean && invariant && boilerplate) ? 0 : 1;
+}
@@ -0,0 +1,193 @@
+/**
+ * Performance Benchmark: Model Load
+ *
+ * Compares the previous load path - create a fully initialized model
+ * (random and lattice embedding init) and then read the file over it -
+ * against cllm_read_model, which allocates without initializing, and
+ * cllm_read_model_mapped, which maps the tensor-table weights read-only.
+ * Checks that all paths produce the same weights and logits, that
+ * version 1 files still load, and that mapped weights can be made
+ * writable.
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+#include <unistd.h>
+#include "../../include/cllm.h"
+#include "../../include/cllm_format.h"
+#include "../../include/cllm_inference.h"
+#include "../../include/cllm_utils.h"
+
+#define BENCH_VOCAB 20000
+#define BENCH_DIM 256
+#define BENCH_LAYERS 4
+#define BENCH_RUNS 3
+
+// Helper: Wall clock in seconds
+static double now_seconds(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return ts.tv_sec + ts.tv_nsec / 1e9;
+}
+
+// Helper: Logits for a short prompt
+static float* prompt_logits(CLLMModel* model) {
+    CLLMInference* inference = cllm_inference_init(model);
+    if (!inference) return NULL;
+    uint32_t prompt[] = { 5, 17, 42, 7 };
+    cllm_prefill(inference, prompt, 4);
+    float* logits = (float*)malloc(model->vocab_size * sizeof(float));
+    memcpy(logits, inference->logits, model->vocab_size * sizeof(float));
+    cllm_inference_cleanup(inference);
+    return logits;
+}
+
+// Helper: Write a version 1 file (header and raw tensors, no layer norms)
+static int write_version1(const CLLMModel* model, const char* path) {
+    FILE* f = fopen(path, "wb");
+    if (!f) return 0;
+    CLLMHeader header;
+    memset(&header, 0, sizeof(header));
+    memcpy(header.magic, "CLLM\x01\x00\x00\x00", 8);
+    header.version = 1;
+    header.vocab_size = model->vocab_size;
+    header.embedding_dim = model->embedding_dim;
+    header.num_layers = model->num_layers;
+    header.num_heads = model->attention_layers[0].num_heads;
+    header.context_length = 512;
+    fwrite(&header, sizeof(header), 1, f);
+    size_t norms = (size_t)model->num_layers * 4 * model->embedding_dim;
+    fwrite(model->weights, sizeof(float), model->num_weights - norms, f);
+    return fclose(f) == 0;
+}
+
+int main() {
+    printf("\n");
+    printf("╔══════════════════════════════════════════════════════════╗\n");
+    printf("║     Model Load Benchmark                                ║\n");
+    printf("╚══════════════════════════════════════════════════════════╝\n");
+    
+    CLLMConfig config = {
+        .vocab_size = BENCH_VOCAB,
+        .embedding_dim = BENCH_DIM,
+        .num_layers = BENCH_LAYERS,
+        .num_heads = 8,
+        .ff_dim = BENCH_DIM * 4,
+        .max_seq_len = 256,
+        .dropout = 0.1f
+    };
+    
+    char path[] = "/tmp/bench_model_load_XXXXXX";
+    int fd = mkstemp(path);
+    if (fd < 0) return 1;
+    close(fd);
+    char v1_path[64];
+    snprintf(v1_path, sizeof(v1_path), "%s.v1", path);
+    
+    srand(42);
+    CLLMModel* original = cllm_create_model(&config);
+    if (!original) return 1;
+    // Non-identity layer norms, which version 2 files now keep
+    for (uint32_t i = 0; i < original->num_layers * 2; i++) {
+        original->layer_norms[i].gamma[0] = 1.5f;
+    }
+    int saved = cllm_write_model(original, path) == 0;
+    
+    // Before: initialize everything, then read over it
+    double before = 0.0;
+    for (int r = 0; r < BENCH_RUNS; r++) {
+        double start = now_seconds();
+        CLLMModel* model = cllm_create_model(&config);
+        FILE* f = fopen(path, "rb");
+        CLLMTensorTable table;
+        fseek(f, sizeof(CLLMHeader), SEEK_SET);
+        fread(&table, sizeof(table), 1, f);
+        fseek(f, (long)table.data_offset, SEEK_SET);
+        fread(model->weights, sizeof(float), model->num_weights, f);
+        fclose(f);
+        before += now_seconds() - start;
+        cllm_free_model(model);
+    }
+    
+    // After: allocate without initializing, then read
+    double after_read = 0.0;
+    CLLMModel* read = NULL;
+    for (int r = 0; r < BENCH_RUNS; r++) {
+        if (read) cllm_free_model(read);
+        double start = now_seconds();
+        read = cllm_read_model(path);
+        after_read += now_seconds() - start;
+    }
+    
+    // After: map the weights
+    double after_map = 0.0;
+    CLLMModel* mapped = NULL;
+    for (int r = 0; r < BENCH_RUNS; r++) {
+        if (mapped) cllm_free_model(mapped);
+        double start = now_seconds();
+        mapped = cllm_read_model_mapped(path);
+        after_map += now_seconds() - start;
+    }
+    
+    printf("\nVocab %d, dim %d, %d layers (%.1f MB of weights)\n",
+           BENCH_VOCAB, BENCH_DIM, BENCH_LAYERS, original->num_weights * 4.0 / 1e6);
+    printf("─────────────────────────────────────\n");
+    printf("  Before (create + read over):  %8.1f ms\n", before * 1000.0 / BENCH_RUNS);
+    printf("  After  (cllm_read_model):     %8.1f ms\n", after_read * 1000.0 / BENCH_RUNS);
+    printf("  After  (mapped):              %8.1f ms\n", after_map * 1000.0 / BENCH_RUNS);
+    printf("  Speedup: %.1fx read, %.1fx mapped\n", before / after_read, before / after_map);
+    
+    size_t bytes = original->num_weights * sizeof(float);
+    int same = saved && read && mapped &&
+               memcmp(read->weights, original->weights, bytes) == 0 &&
+               memcmp(mapped->weights, original->weights, bytes) == 0;
+    printf("%s Read and mapped weights match the saved model\n", same ? "✓" : "✗");
+    
+    int is_mapped = mapped && mapped->weights_map != NULL &&
+                    (char*)mapped->weights >= (char*)mapped->weights_map &&
+                    ((uintptr_t)mapped->weights % CLLM_TENSOR_ALIGNMENT) == 0;
+    printf("%s Weights mapped on a page boundary\n", is_mapped ? "✓" : "✗");
+    
+    // Inference runs on the read-only mapping
+    float* expected = prompt_logits(original);
+    float* got_mapped = mapped ? prompt_logits(mapped) : NULL;
+    int same_logits = expected && got_mapped &&
+                      memcmp(expected, got_mapped, original->vocab_size * sizeof(float)) == 0;
+    printf("%s Inference on mapped weights gives the same logits\n", same_logits ? "✓" : "✗");
+    
+    // Mapped weights become a private, writable copy
+    int writable = mapped && cllm_model_make_writable(mapped) == 0 && !mapped->weights_map &&
+                   memcmp(mapped->weights, original->weights, bytes) == 0;
+    if (writable) mapped->attention_layers[0].query_lattice[0] += 1.0f;
+    printf("%s Mapped model made writable\n", writable ? "✓" : "✗");
+    
+    // Version 1 files: no layer norms stored, ff_dim recovered from the size
+    int legacy = 0;
+    if (write_version1(original, v1_path)) {
+        CLLMModel* v1 = cllm_read_model(v1_path);
+        size_t norms = (size_t)original->num_layers * 4 * original->embedding_dim;
+        legacy = v1 && v1->num_weights == original->num_weights &&
+                 v1->ff_layers[0].hidden_dim == config.ff_dim &&
+                 memcmp(v1->weights, original->weights, (original->num_weights - norms) * sizeof(float)) == 0 &&
+                 v1->layer_norms[0].gamma[0] == 1.0f && v1->layer_norms[0].beta[0] == 0.0f;
+        cllm_free_model(v1);
+    }
+    printf("%s Version 1 file still loads\n", legacy ? "✓" : "✗");
+    
+    free(expected);
+    free(got_mapped);
+    cllm_free_model(read);
+    cllm_free_model(mapped);
+    cllm_free_model(original);
+    unlink(path);
+    unlink(v1_path);
+    
+    printf("\n");
+    printf("═══════════════════════════════════════════════════════════\n");
+    printf("Benchmark Complete\n");
+    printf("═══════════════════════════════════════════════════════════\n");
+    
+    return (same && is_mapped && same_logits && writable && legacy) ? 0 : 1;
+}
\ No newline at end of file
@@ -0,0 +1,201 @@
+/**
+ * Performance Benchmark: Subprocess Pool
+ * 
+ * Compares the per-document cost of the old way of running extraction
+ * tools - a `which` probe through system() and the tool itself through
+ * popen(), each going via /bin/sh - against the subprocess pool, which
+ * resolves the tool once and spawns it directly - and against reading the
+ * DOCX member in-process through zip_utils, which needs no child at all.
+ * Checks that DOCX and archive extraction produce the expected text
+ * without temp files, that the slot limit bounds concurrent children, and
+ * that timeouts kill.
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+#include <unistd.h>
+#include <pthread.h>
+#include "../../src/crawler/file_processor.h"
+#include "../../src/docproc/utils/subprocess_pool.h"
+#include "../../src/docproc/utils/zip_utils.h"
+
+extern int process_office_file(const char* input_path, const char* output_path);
+
+#define BENCH_RUNS 200
+#define BENCH_THREADS 8
+#define BENCH_SLOTS 2
+#define BENCH_TEXT_SIZE (1024 * 1024)
+
+// Helper: Wall clock in seconds
+static double now_seconds(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return ts.tv_sec + ts.tv_nsec / 1e9;
+}
+
+// Helper: Read a whole file
+static char* read_file(const char* path) {
+    FILE* f = fopen(path, "rb");
+    if (!f) return NULL;
+    char* data = (char*)calloc(BENCH_TEXT_SIZE, 1);
+    fread(data, 1, BENCH_TEXT_SIZE - 1, f);
+    fclose(f);
+    return data;
+}
+
+// Worker: one short-lived child
+static void* sleep_worker(void* arg) {
+    (void)arg;
+    const char* args[] = { "0.2", NULL };
+    char output[16];
+    subprocess_run("sleep", args, output, sizeof(output), 0, NULL);
+    return NULL;
+}
+
+int main() {
+    printf("\n");
+    printf("╔══════════════════════════════════════════════════════════╗\n");
+    printf("║     Subprocess Pool Benchmark                           ║\n");
+    printf("╚══════════════════════════════════════════════════════════╝\n");
+    
+    if (!subprocess_tool_available("unzip") || !subprocess_tool_available("tar")) {
+        printf("⚠ unzip/tar not installed, skipping\n");
+        return 0;
+    }
+    
+    char dir[] = "/tmp/bench_subprocess_pool_XXXXXX";
+    if (!mkdtemp(dir)) return 1;
+    
+    // A DOCX and two archives holding text members
+    char cmd[2048];
+    snprintf(cmd, sizeof(cmd),
+             "cd %s && python3 -c \"import zipfile\n"
+             "body = ''.join('<w:p><w:r><w:t xml:space=\\\"preserve\\\">Paragraph %%d &amp; more </w:t></w:r>"
+             "<w:r><w:tab/><w:t>text</w:t></w:r></w:p>' %% i for i in range(50))\n"
+             "z = zipfile.ZipFile('doc.docx', 'w', zipfile.ZIP_DEFLATED)\n"
+             "z.writestr('[Content_Types].xml', '<Types/>')\n"
+             "ns = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'\n"
+             "z.writestr('word/document.xml', '<w:document xmlns:w=\\\"' + ns + '\\\"><w:body>' + body +"
+             " '</w:body></w:document>')\n"
+             "z.close()\" && mkdir -p src && echo 'archive notes' > src/notes.txt && "
+             "echo 'int x;' > src/x.c && echo 'binary' > src/skip.bin && "
+             "zip -qr docs.zip src && tar -czf docs.tar.gz src", dir);
+    if (system(cmd) != 0) {
+        printf("✗ Could not create test documents\n");
+        return 1;
+    }
+    
+    char docx[600], zip_path[600], tar_path[600];
+    snprintf(docx, sizeof(docx), "%s/doc.docx", dir);
+    snprintf(zip_path, sizeof(zip_path), "%s/docs.zip", dir);
+    snprintf(tar_path, sizeof(tar_path), "%s/docs.tar.gz", dir);
+    
+    char* text = (char*)malloc(BENCH_TEXT_SIZE);
+    
+    printf("\n%d runs of unzip -p on a DOCX\n", BENCH_RUNS);
+    printf("─────────────────────────────────────\n");
+    
+    // Before: which probe + popen through the shell
+    size_t before_bytes = 0;
+    double start = now_seconds();
+    for (int i = 0; i < BENCH_RUNS; i++) {
+        if (system("which unzip > /dev/null 2>&1") != 0) break;
+        snprintf(cmd, sizeof(cmd), "unzip -p '%s' word/document.xml", docx);
+        FILE* fp = popen(cmd, "r");
+        if (!fp) break;
+        before_bytes = fread(text, 1, BENCH_TEXT_SIZE - 1, fp);
+        pclose(fp);
+    }
+    double before = now_seconds() - start;
+    
+    // After: the subprocess pool
+    int after_bytes = 0;
+    const char* args[] = { "-p", docx, "word/document.xml", NULL };
+    start = now_seconds();
+    for (int i = 0; i < BENCH_RUNS; i++) {
+        after_bytes = subprocess_run("unzip", args, text, BENCH_TEXT_SIZE, 0, NULL);
+    }
+    double after = now_seconds() - start;
+    
+    // In-process: what the crawler does for DOCX now
+    size_t inprocess_bytes = 0;
+    start = now_seconds();
+    for (int i = 0; i < BENCH_RUNS; i++) {
+        ZipArchive* archive = zip_archive_open(docx);
+        char* xml = archive ? zip_archive_read(archive, "word/document.xml", &inprocess_bytes) : NULL;
+        zip_archive_close(archive);
+        free(xml);
+    }
+    double inprocess = now_seconds() - start;
+    
+    printf("  Before (which + popen via sh): %8.2f ms/document\n", before * 1000.0 / BENCH_RUNS);
+    printf("  After  (subprocess pool):      %8.2f ms/document\n", after * 1000.0 / BENCH_RUNS);
+    printf("  In-process (zip_utils):        %8.2f ms/document\n", inprocess * 1000.0 / BENCH_RUNS);
+    printf("  Speedup: %.1fx (pool), %.1fx (in-process)\n", before / after, before / inprocess);
+    
+    int same_output = before_bytes > 0 && (size_t)after_bytes == before_bytes &&
+                      inprocess_bytes == before_bytes;
+    printf("%s Same output (%d bytes)\n", same_output ? "✓" : "✗", after_bytes);
+    
+    // DOCX: text runs, one paragraph per line, entities decoded
+    char out_path[600];
+    snprintf(out_path, sizeof(out_path), "%s/doc.txt", dir);
+    int docx_ok = process_office_file(docx, out_path) == 0;
+    char* docx_text = docx_ok ? read_file(out_path) : NULL;
+    docx_ok = docx_text && strstr(docx_text, "Paragraph 0 & more text\n") &&
+              strstr(docx_text, "Paragraph 49 & more text\n") && !strchr(docx_text, '<');
+    free(docx_text);
+    int docx_bytes = process_file_by_type(docx, FILE_TYPE_DOCX, text, BENCH_TEXT_SIZE);
+    docx_ok = docx_ok && docx_bytes > 0 && strstr(text, "Paragraph 49 & more text");
+    printf("%s DOCX text read through zip_utils (no unzip child)\n", docx_ok ? "✓" : "✗");
+    
+    // Archives: text members only, nothing unpacked to disk
+    int zip_bytes = process_file_by_type(zip_path, FILE_TYPE_ARCHIVE, text, BENCH_TEXT_SIZE);
+    int archives_ok = zip_bytes > 0 && strstr(text, "archive notes") && strstr(text, "int x;") &&
+                      !strstr(text, "binary");
+    int tar_bytes = process_file_by_type(tar_path, FILE_TYPE_ARCHIVE, text, BENCH_TEXT_SIZE);
+    archives_ok = archives_ok && tar_bytes > 0 && strstr(text, "archive notes") &&
+                  strstr(text, "int x;") && !strstr(text, "binary");
+    printf("%s ZIP and tar.gz members read in-process (%d, %d bytes)\n",
+           archives_ok ? "✓" : "✗", zip_bytes, tar_bytes);
+    
+    // Missing tools fail fast
+    const char* none[] = { NULL };
+    int missing_ok = !subprocess_tool_available("no-such-extractor") &&
+                     subprocess_run("no-such-extractor", none, text, BENCH_TEXT_SIZE, 0, NULL) == -1;
+    printf("%s Missing tool reported without spawning\n", missing_ok ? "✓" : "✗");
+    
+    // Slots bound the children running at once
+    subprocess_pool_init(BENCH_SLOTS);
+    pthread_t threads[BENCH_THREADS];
+    start = now_seconds();
+    for (int i = 0; i < BENCH_THREADS; i++) pthread_create(&threads[i], NULL, sleep_worker, NULL);
+    for (int i = 0; i < BENCH_THREADS; i++) pthread_join(threads[i], NULL);
+    double bounded_time = now_seconds() - start;
+    double expected = 0.2 * BENCH_THREADS / BENCH_SLOTS;
+    int bounded = bounded_time >= expected * 0.95;
+    printf("%s %d children through %d slots in %.2f s (>= %.2f s)\n",
+           bounded ? "✓" : "✗", BENCH_THREADS, BENCH_SLOTS, bounded_time, expected);
+    subprocess_pool_init(0);
+    
+    // Timeouts kill the child
+    const char* long_sleep[] = { "10", NULL };
+    start = now_seconds();
+    int timed_out = subprocess_run("sleep", long_sleep, text, BENCH_TEXT_SIZE, 100, NULL) == -1;
+    double timeout_time = now_seconds() - start;
+    timed_out = timed_out && timeout_time < 2.0;
+    printf("%s Timeout kills the child (%.2f s)\n", timed_out ? "✓" : "✗", timeout_time);
+    
+    free(text);
+    snprintf(cmd, sizeof(cmd), "rm -rf %s", dir);
+    system(cmd);
+    
+    printf("\n");
+    printf("═══════════════════════════════════════════════════════════\n");
+    printf("Benchmark Complete\n");
+    printf("═══════════════════════════════════════════════════════════\n");
+    
+    return (same_output && docx_ok && archives_ok && missing_ok && bounded && timed_out) ? 0 : 1;
+}
\ No newline at end of file
@@ -0,0 +1,269 @@
+/**
+ * Performance Benchmark: Crawler Token Files
+ *
+ * Runs the crawler tokenizer stage over generated documents and compares
+ * how training loads its output: the previous text format (header lines
+ * plus space-separated words, re-hashed to IDs) against mapping the
+ * binary token files the tokenizer now writes. Also checks that IDs are
+ * real vocabulary IDs, that long documents are not cut, and that the
+ * vocabulary survives a restart.
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+#include <unistd.h>
+#include <pthread.h>
+#include <sys/stat.h>
+#include "../../include/crawler.h"
+#include "../../include/cllm_tokenizer.h"
+#include "../../include/cllm_data_loader.h"
+#include "../../src/crawler/stage_queue.h"
+
+#define BENCH_DOCS 40
+#define BENCH_WORDS_PER_DOC 40000
+#define BENCH_DISTINCT_WORDS 8000
+#define BENCH_ROUNDS 5
+
+// Helper: Wall clock in seconds
+static double now_seconds(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return ts.tv_sec + ts.tv_nsec / 1e9;
+}
+
+// Reference: Previous training-side loader, reading the whole token line
+static size_t reference_load(const char* path, uint32_t* tokens, size_t max_tokens) {
+    FILE* f = fopen(path, "r");
+    if (!f) return 0;
+    
+    fseek(f, 0, SEEK_END);
+    long size = ftell(f);
+    fseek(f, 0, SEEK_SET);
+    char* text = (char*)malloc(size + 1);
+    size_t length = fread(text, 1, size, f);
+    text[length] = '\0';
+    fclose(f);
+    
+    // Skip header lines
+    char* p = text;
+    while (*p == '#') {
+        p = strchr(p, '\n');
+        if (!p) break;
+        p++;
+    }
+    
+    size_t count = 0;
+    while (p && *p && count < max_tokens) {
+        while (*p == ' ' || *p == '\n') p++;
+        if (!*p) break;
+        unsigned long hash = 5381;
+        while (*p && *p != ' ' && *p != '\n') {
+            hash = ((hash << 5) + hash) + *p++;
+        }
+        tokens[count++] = (uint32_t)(hash % 10000);
+    }
+    
+    free(text);
+    return count;
+}
+
+// Run the tokenizer stage over a list of text files
+static int run_tokenizer(TokenizerState* tokenizer, char paths[][512], int count, char outputs[][512]) {
+    StageQueue* input = stage_queue_create(count + 1);
+    StageQueue* output = stage_queue_create(count + 1);
+    tokenizer_set_queues(tokenizer, input, output);
+    
+    pthread_t thread;
+    pthread_create(&thread, NULL, tokenizer_thread_func, tokenizer);
+    for (int i = 0; i < count; i++) {
+        stage_queue_push(input, stage_doc_create(paths[i]), -1);
+    }
+    
+    // Closed queues are not drained: wait for every token file first
+    double deadline = now_seconds() + 120.0;
+    while (stage_queue_depth(output) < (size_t)count && now_seconds() < deadline) {
+        usleep(10000);
+    }
+    stage_queue_close(input);
+    pthread_join(thread, NULL);
+    
+    int produced = 0;
+    StageDoc* doc;
+    while ((doc = stage_queue_pop(output, 0)) != NULL) {
+        // Token files keep the text file's base name
+        for (int i = 0; i < count; i++) {
+            const char* name = strrchr(paths[i], '/') + 1;
+            const char* out_name = strrchr(doc->path, '/') + 1;
+            if (strncmp(name, out_name, strlen(out_name) - 4) == 0) {
+                snprintf(outputs[i], 512, "%.511s", doc->path);
+                produced++;
+            }
+        }
+        stage_doc_free(doc);
+    }
+    
+    stage_queue_destroy(input);
+    stage_queue_destroy(output);
+    return produced;
+}
+
+int main() {
+    printf("\n");
+    printf("╔══════════════════════════════════════════════════════════╗\n");
+    printf("║     Crawler Token File Benchmark                        ║\n");
+    printf("╚══════════════════════════════════════════════════════════╝\n");
+    
+    char dir[] = "/tmp/bench_token_stream_XXXXXX";
+    if (!mkdtemp(dir)) return 1;
+    char sub[1024];
+    snprintf(sub, sizeof(sub), "%s/preprocessed", dir);
+    mkdir(sub, 0755);
+    snprintf(sub, sizeof(sub), "%s/training_queue", dir);
+    mkdir(sub, 0755);
+    
+    // Generated documents, and the same words in the previous text format
+    static char paths[BENCH_DOCS][512];
+    static char outputs[BENCH_DOCS][512];
+    static char legacy[BENCH_DOCS][512];
+    srand(42);
+    for (int d = 0; d < BENCH_DOCS; d++) {
+        snprintf(paths[d], sizeof(paths[d]), "%s/preprocessed/doc%03d.txt", dir, d);
+        snprintf(legacy[d], sizeof(legacy[d]), "%s/doc%03d.legacy", dir, d);
+        FILE* f = fopen(paths[d], "w");
+        FILE* l = fopen(legacy[d], "w");
+        fprintf(l, "# Source: %s\n# Token count: %d\n", paths[d], BENCH_WORDS_PER_DOC);
+        for (int w = 0; w < BENCH_WORDS_PER_DOC; w++) {
+            int k = rand() % BENCH_DISTINCT_WORDS;
+            fprintf(f, "%sWord%d%s", w % 13 == 0 ? "The " : "", k, w % 17 == 0 ? ".\n" : " ");
+            if (w % 13 == 0) fprintf(l, "the ");
+            fprintf(l, "word%d ", k);
+        }
+        fprintf(l, "\n");
+        fclose(f);
+        fclose(l);
+    }
+    
+    TokenizerState* tokenizer = tokenizer_init(dir);
+    int produced = run_tokenizer(tokenizer, paths, BENCH_DOCS, outputs);
+    
+    printf("\n%d documents, %d words each\n", BENCH_DOCS, BENCH_WORDS_PER_DOC);
+    printf("─────────────────────────────────────\n");
+    
+    // Before: parse text and re-hash every word
+    size_t max_tokens = BENCH_WORDS_PER_DOC * 2;
+    uint32_t* ids = (uint32_t*)malloc(max_tokens * sizeof(uint32_t));
+    uint64_t reference_sum = 0;
+    double start = now_seconds();
+    for (int r = 0; r < BENCH_ROUNDS; r++) {
+        for (int d = 0; d < BENCH_DOCS; d++) {
+            size_t n = reference_load(legacy[d], ids, max_tokens);
+            for (size_t i = 0; i < n; i++) reference_sum += ids[i];
+        }
+    }
+    double before = now_seconds() - start;
+    
+    // After: map the binary token files
+    uint64_t sum = 0;
+    size_t total_tokens = 0;
+    start = now_seconds();
+    for (int r = 0; r < BENCH_ROUNDS; r++) {
+        for (int d = 0; d < BENCH_DOCS; d++) {
+            TokenDataset* ds = cllm_token_dataset_mmap(outputs[d]);
+            if (!ds) continue;
+            for (size_t i = 0; i < ds->num_tokens; i++) sum += cllm_token_dataset_get(ds, i);
+            total_tokens += ds->num_tokens;
+            cllm_token_dataset_free(ds);
+        }
+    }
+    double after = now_seconds() - start;
+    (void)reference_sum;
+    
+    double tokens = (double)BENCH_ROUNDS * BENCH_DOCS * (BENCH_WORDS_PER_DOC + BENCH_WORDS_PER_DOC / 13 + 1);
+    printf("  Before (text + re-hash):  %7.1f M tokens/s\n", tokens / before / 1e6);
+    printf("  After  (mapped binary):   %7.1f M tokens/s\n", tokens / after / 1e6);
+    printf("  Speedup: %.1fx\n", before / after);
+    
+    off_t text_size = 0, binary_size = 0;
+    struct stat st;
+    for (int d = 0; d < BENCH_DOCS; d++) {
+        if (stat(legacy[d], &st) == 0) text_size += st.st_size;
+        if (stat(outputs[d], &st) == 0) binary_size += st.st_size;
+    }
+    printf("  Size: %.1f MB text, %.1f MB binary\n", text_size / 1e6, binary_size / 1e6);
+    
+    // Every document arrives whole
+    size_t expected = (size_t)BENCH_ROUNDS * BENCH_DOCS * (BENCH_WORDS_PER_DOC + (BENCH_WORDS_PER_DOC + 12) / 13);
+    int complete = produced == BENCH_DOCS && total_tokens == expected;
+    printf("%s All %d documents complete (%zu tokens per round)\n",
+           complete ? "✓" : "✗", produced, total_tokens / BENCH_ROUNDS);
+    
+    // IDs decode to the document's words through the saved vocabulary
+    char vocab_path[1024];
+    snprintf(vocab_path, sizeof(vocab_path), "%s/vocab.txt", dir);
+    CLLMTokenizer* vocab = cllm_create_tokenizer(50000);
+    cllm_load_vocab(vocab, vocab_path);
+    TokenDataset* first = cllm_token_dataset_mmap(outputs[0]);
+    FILE* l = fopen(legacy[0], "r");
+    char line[256];
+    fgets(line, sizeof(line), l);
+    fgets(line, sizeof(line), l);
+    int decoded = first != NULL && first->token_width == 2;
+    char word[64];
+    for (size_t i = 0; decoded && i < first->num_tokens; i++) {
+        if (fscanf(l, "%63s", word) != 1) decoded = 0;
+        uint32_t id = cllm_token_dataset_get(first, i);
+        if (id >= vocab->vocab_size || strcmp(vocab->vocab[id], word) != 0) decoded = 0;
+    }
+    fclose(l);
+    printf("%s IDs are vocabulary IDs (%u words in vocab.txt, 16-bit storage)\n",
+           decoded ? "✓" : "✗", vocab->vocab_size);
+    
+    // The fingerprint is recognized, unknown ones are not
+    uint32_t match = first ? tokenizer_vocab_match(tokenizer, first->vocab_hash) : 0;
+    int fingerprint_ok = match > 0 && match <= vocab->vocab_size &&
+                         tokenizer_vocab_match(tokenizer, first->vocab_hash ^ 0x5a5a5a5a) == 0;
+    printf("%s Vocabulary fingerprint recognized (covers %u entries)\n",
+           fingerprint_ok ? "✓" : "✗", match);
+    tokenizer_cleanup(tokenizer);
+    
+    // A restarted tokenizer continues the same vocabulary
+    char again[1][512];
+    char again_out[1][512];
+    snprintf(again[0], sizeof(again[0]), "%s/preprocessed/again.txt", dir);
+    FILE* src = fopen(paths[0], "r");
+    FILE* dst = fopen(again[0], "w");
+    size_t n;
+    char buffer[4096];
+    while ((n = fread(buffer, 1, sizeof(buffer), src)) > 0) fwrite(buffer, 1, n, dst);
+    fclose(src);
+    fclose(dst);
+    
+    tokenizer = tokenizer_init(dir);
+    int restarted = run_tokenizer(tokenizer, again, 1, again_out) == 1;
+    TokenDataset* second = restarted ? cllm_token_dataset_mmap(again_out[0]) : NULL;
+    restarted = second && first && second->num_tokens == first->num_tokens &&
+                tokenizer_vocab_match(tokenizer, first->vocab_hash) == match;
+    for (size_t i = 0; restarted && i < first->num_tokens; i++) {
+        if (cllm_token_dataset_get(first, i) != cllm_token_dataset_get(second, i)) restarted = 0;
+    }
+    printf("%s Same IDs after a restart\n", restarted ? "✓" : "✗");
+    
+    cllm_token_dataset_free(first);
+    cllm_token_dataset_free(second);
+    cllm_free_tokenizer(vocab);
+    tokenizer_cleanup(tokenizer);
+    free(ids);
+    
+    char cmd[1100];
+    snprintf(cmd, sizeof(cmd), "rm -rf %s", dir);
+    system(cmd);
+    
+    printf("\n");
+    printf("═══════════════════════════════════════════════════════════\n");
+    printf("Benchmark Complete\n");
+    printf("═══════════════════════════════════════════════════════════\n");
+    
+    return (complete && decoded && fingerprint_ok && restarted) ? 0 : 1;
+}
@@ -0,0 +1,156 @@
+/**
+ * Performance Benchmark: Tokenizer Vocabulary Lookup
+ *
+ * Compares the hash-indexed tokenizer against the previous linear
+ * strcmp scan for vocabulary building and encoding throughput.
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <ctype.h>
+#include <time.h>
+#include "../../include/cllm_tokenizer.h"
+
+#define BENCH_VOCAB_WORDS 50000
+#define BENCH_CORPUS_BYTES (8 * 1024 * 1024)
+#define BENCH_LINEAR_BYTES (256 * 1024)
+
+// Helper: Wall clock in seconds
+static double now_seconds(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return ts.tv_sec + ts.tv_nsec / 1e9;
+}
+
+// Helper: Generate synthetic corpus with a skewed word distribution
+static char* create_corpus(size_t target_bytes, size_t* out_len) {
+    char* text = (char*)malloc(target_bytes + 64);
+    if (!text) return NULL;
+    
+    size_t pos = 0;
+    while (pos < target_bytes) {
+        // Squaring a uniform value favours low word IDs (roughly Zipfian)
+        double u = (double)rand() / RAND_MAX;
+        int word_id = (int)(u * u * BENCH_VOCAB_WORDS);
+        pos += snprintf(text + pos, 64, "w%dx%c ", word_id, 'a' + word_id % 26);
+    }
+    
+    text[pos] = '\0';
+    *out_len = pos;
+    return text;
+}
+
+// Reference: Previous linear-scan encoder
+static uint32_t linear_find(CLLMTokenizer* tokenizer, const char* token) {
+    for (uint32_t i = 0; i < tokenizer->vocab_size; i++) {
+        if (strcmp(tokenizer->vocab[i], token) == 0) return i;
+    }
+    return 1;  // <UNK>
+}
+
+static uint32_t linear_encode(CLLMTokenizer* tokenizer, const char* text, uint32_t* tokens) {
+    char* copy = strdup(text);
+    uint32_t count = 0;
+    
+    char* token = strtok(copy, " \t\n\r");
+    while (token) {
+        for (char* p = token; *p; p++) *p = tolower(*p);
+        tokens[count++] = linear_find(tokenizer, token);
+        token = strtok(NULL, " \t\n\r");
+    }
+    
+    free(copy);
+    return count;
+}
+
+// Benchmark: Vocabulary construction
+static CLLMTokenizer* benchmark_build_vocab(const char* corpus, size_t len) {
+    printf("\n");
+    printf("Benchmark 1: Vocabulary Construction\n");
+    printf("─────────────────────────────────────\n");
+    
+    CLLMTokenizer* tokenizer = cllm_create_tokenizer(BENCH_VOCAB_WORDS + 100);
+    if (!tokenizer) {
+        printf("FAIL: Could not create tokenizer\n");
+        return NULL;
+    }
+    
+    double start = now_seconds();
+    cllm_build_vocab(tokenizer, corpus);
+    double elapsed = now_seconds() - start;
+    
+    printf("✓ Vocabulary size: %u\n", tokenizer->vocab_size);
+    printf("  Time: %.3f s (%.2f MB/s)\n", elapsed, len / (1024.0 * 1024.0) / elapsed);
+    
+    return tokenizer;
+}
+
+// Benchmark: Encode throughput, hashed vs linear
+static int benchmark_encode(CLLMTokenizer* tokenizer, const char* corpus, size_t len) {
+    printf("\n");
+    printf("Benchmark 2: Encode Throughput\n");
+    printf("─────────────────────────────────────\n");
+    
+    // Linear scan on a prefix (full corpus would take minutes)
+    char* prefix = strndup(corpus, BENCH_LINEAR_BYTES);
+    uint32_t* ref_tokens = (uint32_t*)malloc(BENCH_LINEAR_BYTES * sizeof(uint32_t));
+    
+    double start = now_seconds();
+    uint32_t ref_count = linear_encode(tokenizer, prefix, ref_tokens);
+    double linear_time = now_seconds() - start;
+    double linear_mbps = BENCH_LINEAR_BYTES / (1024.0 * 1024.0) / linear_time;
+    
+    // Hashed encoder on the same prefix for a correctness check
+    uint32_t hash_count = 0;
+    uint32_t* hash_tokens = cllm_tokenizer_encode(tokenizer, prefix, &hash_count);
+    int match = hash_tokens && hash_count == ref_count &&
+                memcmp(hash_tokens, ref_tokens, ref_count * sizeof(uint32_t)) == 0;
+    free(hash_tokens);
+    
+    // Hashed encoder on the full corpus
+    uint32_t num_tokens = 0;
+    start = now_seconds();
+    uint32_t* tokens = cllm_tokenizer_encode(tokenizer, corpus, &num_tokens);
+    double hash_time = now_seconds() - start;
+    double hash_mbps = len / (1024.0 * 1024.0) / hash_time;
+    free(tokens);
+    
+    printf("  Before (linear scan): %8.2f MB/s\n", linear_mbps);
+    printf("  After  (hash index):  %8.2f MB/s (%u tokens)\n", hash_mbps, num_tokens);
+    printf("  Speedup: %.1fx\n", hash_mbps / linear_mbps);
+    printf("%s Token IDs identical to linear scan\n", match ? "✓" : "✗");
+    
+    free(prefix);
+    free(ref_tokens);
+    return match;
+}
+
+int main() {
+    printf("\n");
+    printf("╔══════════════════════════════════════════════════════════╗\n");
+    printf("║     Tokenizer Encode Benchmark                          ║\n");
+    printf("╚══════════════════════════════════════════════════════════╝\n");
+    
+    srand(42);
+    
+    size_t len = 0;
+    char* corpus = create_corpus(BENCH_CORPUS_BYTES, &len);
+    if (!corpus) {
+        printf("FAIL: Could not create corpus\n");
+        return 1;
+    }
+    
+    CLLMTokenizer* tokenizer = benchmark_build_vocab(corpus, len);
+    int ok = tokenizer && benchmark_encode(tokenizer, corpus, len);
+    
+    cllm_free_tokenizer(tokenizer);
+    free(corpus);
+    
+    printf("\n");
+    printf("═══════════════════════════════════════════════════════════\n");
+    printf("Benchmark Complete\n");
+    printf("═══════════════════════════════════════════════════════════\n");
+    
+    return ok ? 0 : 1;
+}
@@ -0,0 +1,167 @@
+/**
+ * Performance Benchmark: Persistent Training System
+ *
+ * Trains a small model on a stream of short documents, as continuous
+ * training sees them from crawled pages. Compares the previous approach -
+ * a new ThreadedTrainingSystem (threads, barriers, per-thread buffers)
+ * for every document - against one system kept alive and pointed at each
+ * new batch iterator with threaded_training_set_batch_iterator. Also
+ * checks that the persistent system's threads sleep between rounds.
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+#include <math.h>
+#include <unistd.h>
+#include "../../include/cllm.h"
+#include "../../include/cllm_utils.h"
+#include "../../include/cllm_training.h"
+#include "../../include/cllm_training_threaded.h"
+#include "../../include/cllm_batch.h"
+
+#define BENCH_DOCS 12
+#define BENCH_DOC_TOKENS 256
+#define BENCH_EPOCHS 2
+#define BENCH_THREADS 4
+
+#define BENCH_IDLE_MS 300
+
+// Helper: Wall clock in seconds
+static double now_seconds(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return ts.tv_sec + ts.tv_nsec / 1e9;
+}
+
+// Helper: CPU time of all threads in seconds
+static double cpu_seconds(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_PROCESS_CPUTIME_ID, &ts);
+    return ts.tv_sec + ts.tv_nsec / 1e9;
+}
+
+static CLLMTraining* create_training(CLLMModel* model) {
+    CLLMTrainingConfig config = {
+        .learning_rate = 0.001f,
+        .batch_size = 2,
+        .sequence_length = 16,
+        .num_epochs = 1,
+        .max_steps = 100000,
+        .warmup_steps = 10,
+        .gradient_accumulation_steps = 1,
+        .optimizer = "adam",
+        .lr_scheduler = "none"
+    };
+    return cllm_training_init(model, &config);
+}
+
+int main() {
+    printf("\n");
+    printf("╔══════════════════════════════════════════════════════════╗\n");
+    printf("║     Persistent Training System Benchmark                ║\n");
+    printf("╚══════════════════════════════════════════════════════════╝\n");
+    
+    CLLMConfig model_config = {
+        .vocab_size = 200,
+        .embedding_dim = 32,
+        .num_layers = 1,
+        .num_heads = 2,
+        .ff_dim = 64,
+        .max_seq_len = 32,
+        .dropout = 0.0f
+    };
+    
+    // Short documents
+    uint32_t* docs[BENCH_DOCS];
+    srand(42);
+    for (int d = 0; d < BENCH_DOCS; d++) {
+        docs[d] = (uint32_t*)malloc(BENCH_DOC_TOKENS * sizeof(uint32_t));
+        for (int i = 0; i < BENCH_DOC_TOKENS; i++) {
+            docs[d][i] = (uint32_t)(rand() % model_config.vocab_size);
+        }
+    }
+    
+    // Before: one system per document
+    CLLMModel* model = cllm_create_model(&model_config);
+    CLLMTraining* training = create_training(model);
+    int before_ok = model && training;
+    double start = now_seconds();
+    for (int d = 0; d < BENCH_DOCS && before_ok; d++) {
+        CLLMBatchIterator* iterator = cllm_batch_iterator_create(docs[d], BENCH_DOC_TOKENS,
+                                                                 training->config.batch_size,
+                                                                 training->config.sequence_length, 0, 0);
+        ThreadedTrainingSystem* system = threaded_training_create(training, iterator, BENCH_THREADS);
+        if (!system) before_ok = 0;
+        for (int e = 0; e < BENCH_EPOCHS && system; e++) {
+            float loss = threaded_train_epoch_lockfree(system, e);
+            if (!isfinite(loss)) before_ok = 0;
+        }
+        threaded_training_free(system);
+        cllm_batch_iterator_free(iterator);
+    }
+    double before = now_seconds() - start;
+    cllm_training_free(training);
+    cllm_free_model(model);
+    
+    // After: one system for all documents
+    model = cllm_create_model(&model_config);
+    training = create_training(model);
+    int after_ok = model && training;
+    ThreadedTrainingSystem* system = NULL;
+    int epochs_run = 0;
+    start = now_seconds();
+    for (int d = 0; d < BENCH_DOCS && after_ok; d++) {
+        CLLMBatchIterator* iterator = cllm_batch_iterator_create(docs[d], BENCH_DOC_TOKENS,
+                                                                 training->config.batch_size,
+                                                                 training->config.sequence_length, 0, 0);
+        if (!system) {
+            system = threaded_training_create(training, iterator, BENCH_THREADS);
+            if (!system) after_ok = 0;
+        } else {
+            threaded_training_set_batch_iterator(system, iterator);
+        }
+        for (int e = 0; e < BENCH_EPOCHS && system; e++) {
+            float loss = threaded_train_epoch_lockfree(system, e);
+            if (!isfinite(loss)) after_ok = 0;
+            epochs_run++;
+        }
+        threaded_training_set_batch_iterator(system, NULL);
+        cllm_batch_iterator_free(iterator);
+    }
+    double after = now_seconds() - start;
+    
+    // Between rounds the workers and Node Zero should be blocked, not polling
+    double idle_cpu_start = cpu_seconds();
+    usleep(BENCH_IDLE_MS * 1000);
+    double idle_cpu = cpu_seconds() - idle_cpu_start;
+    float skipped = threaded_train_epoch_lockfree(system, 0);
+    threaded_training_free(system);
+    cllm_training_free(training);
+    cllm_free_model(model);
+    
+    printf("\n%d documents of %d tokens, %d epochs each, %d threads\n",
+           BENCH_DOCS, BENCH_DOC_TOKENS, BENCH_EPOCHS, BENCH_THREADS);
+    printf("─────────────────────────────────────\n");
+    printf("  Before (system per document): %8.1f ms/document\n", before * 1000.0 / BENCH_DOCS);
+    printf("  After  (persistent system):   %8.1f ms/document\n", after * 1000.0 / BENCH_DOCS);
+    printf("  Speedup: %.1fx\n", before / after);
+    
+    printf("%s Per-document systems trained every document\n", before_ok ? "✓" : "✗");
+    int persistent_ok = after_ok && epochs_run == BENCH_DOCS * BENCH_EPOCHS;
+    printf("%s Persistent system trained every document (%d epochs)\n",
+           persistent_ok ? "✓" : "✗", epochs_run);
+    int idle_ok = idle_cpu * 1000.0 < BENCH_IDLE_MS * 0.01 && skipped == 0.0f;
+    printf("%s Idle between rounds: %.2f ms CPU over %d ms; no epoch without an iterator\n",
+           idle_ok ? "✓" : "✗", idle_cpu * 1000.0, BENCH_IDLE_MS);
+    
+    for (int d = 0; d < BENCH_DOCS; d++) free(docs[d]);
+    
+    printf("\n");
+    printf("═══════════════════════════════════════════════════════════\n");
+    printf("Benchmark Complete\n");
+    printf("═══════════════════════════════════════════════════════════\n");
+    
+    return (before_ok && persistent_ok && idle_ok) ? 0 : 1;
+}
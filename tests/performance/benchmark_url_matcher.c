@@ -0,0 +1,213 @@
+/**
+ * Performance Benchmark: URL Blocker Rule Matching
+ *
+ * Loads a few thousand block rules (domains, path prefixes, exact URLs,
+ * regexes) and compares the previous per-pattern loop - which re-parsed
+ * the URL and ran every regex for each check - against the compiled
+ * URLMatcher behind url_blocker_is_blocked. Both must agree on every URL.
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+#include <regex.h>
+#include <stdbool.h>
+#include "../../src/crawler/url_blocker.h"
+
+#define BENCH_DOMAINS 1500
+#define BENCH_PREFIXES 1000
+#define BENCH_EXACT 1000
+#define BENCH_REGEXES 500
+#define BENCH_URLS 20000
+
+// Helper: Wall clock in seconds
+static double now_seconds(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return ts.tv_sec + ts.tv_nsec / 1e9;
+}
+
+typedef struct {
+    BlockPatternType type;
+    char pattern[256];
+    regex_t re;
+} Rule;
+
+static Rule g_rules[BENCH_DOMAINS + BENCH_PREFIXES + BENCH_EXACT + BENCH_REGEXES];
+static int g_num_rules = 0;
+
+// Reference: Previous matching, one pattern at a time
+static void extract_domain(const char* url, char* domain, size_t size) {
+    domain[0] = '\0';
+    const char* start = strstr(url, "://");
+    if (!start) return;
+    start += 3;
+    size_t len = strcspn(start, "/");
+    if (len >= size) len = size - 1;
+    memcpy(domain, start, len);
+    domain[len] = '\0';
+}
+
+static void extract_path(const char* url, char* path, size_t size) {
+    path[0] = '\0';
+    const char* start = strstr(url, "://");
+    if (!start) return;
+    start = strchr(start + 3, '/');
+    if (!start) return;
+    size_t len = strcspn(start, "?");
+    if (len >= size) len = size - 1;
+    memcpy(path, start, len);
+    path[len] = '\0';
+}
+
+static bool reference_is_blocked(const char* url) {
+    for (int i = 0; i < g_num_rules; i++) {
+        Rule* r = &g_rules[i];
+        switch (r->type) {
+            case BLOCK_EXACT_URL:
+                if (strcmp(url, r->pattern) == 0) return true;
+                break;
+            case BLOCK_DOMAIN: {
+                char domain[256];
+                extract_domain(url, domain, sizeof(domain));
+                size_t dl = strlen(domain), pl = strlen(r->pattern);
+                // Same domain or a subdomain of it
+                if (dl >= pl && strcmp(domain + dl - pl, r->pattern) == 0 &&
+                    (dl == pl || domain[dl - pl - 1] == '.')) return true;
+                break;
+            }
+            case BLOCK_PATH_PREFIX: {
+                char path[2048];
+                extract_path(url, path, sizeof(path));
+                if (strncmp(path, r->pattern, strlen(r->pattern)) == 0) return true;
+                break;
+            }
+            case BLOCK_REGEX_PATTERN:
+                if (regexec(&r->re, url, 0, NULL, 0) == 0) return true;
+                break;
+        }
+    }
+    return false;
+}
+
+static void add_rule(URLBlocker* blocker, BlockPatternType type, const char* pattern) {
+    Rule* r = &g_rules[g_num_rules++];
+    r->type = type;
+    snprintf(r->pattern, sizeof(r->pattern), "%s", pattern);
+    if (type == BLOCK_REGEX_PATTERN) {
+        regcomp(&r->re, pattern, REG_EXTENDED | REG_NOSUB);
+    }
+    url_blocker_add_pattern(blocker, type, pattern, NULL);
+}
+
+int main() {
+    printf("\n");
+    printf("╔══════════════════════════════════════════════════════════╗\n");
+    printf("║     URL Blocker Rule Matching Benchmark                 ║\n");
+    printf("╚══════════════════════════════════════════════════════════╝\n");
+    
+    URLBlocker* blocker = url_blocker_create(NULL);
+    char pattern[256];
+    
+    for (int i = 0; i < BENCH_DOMAINS; i++) {
+        snprintf(pattern, sizeof(pattern), "ads%d.example.com", i);
+        add_rule(blocker, BLOCK_DOMAIN, pattern);
+    }
+    for (int i = 0; i < BENCH_PREFIXES; i++) {
+        snprintf(pattern, sizeof(pattern), "/private/area%d/", i);
+        add_rule(blocker, BLOCK_PATH_PREFIX, pattern);
+    }
+    for (int i = 0; i < BENCH_EXACT; i++) {
+        snprintf(pattern, sizeof(pattern), "https://site%d.org/login", i);
+        add_rule(blocker, BLOCK_EXACT_URL, pattern);
+    }
+    for (int i = 0; i < BENCH_REGEXES; i++) {
+        if (i % 10 == 0) {
+            // No usable literal: always evaluated
+            snprintf(pattern, sizeof(pattern), "^https?://[a-z]+%d\\.net/", i);
+        } else {
+            snprintf(pattern, sizeof(pattern), "/session%d/[0-9]+/track", i);
+        }
+        add_rule(blocker, BLOCK_REGEX_PATTERN, pattern);
+    }
+    
+    // Mostly allowed URLs with a share of each blocked kind
+    char** urls = (char**)malloc(BENCH_URLS * sizeof(char*));
+    srand(42);
+    for (int i = 0; i < BENCH_URLS; i++) {
+        char url[512];
+        int r = rand() % 100;
+        int k = rand();
+        if (r < 5) {
+            snprintf(url, sizeof(url), "http://cdn.ads%d.example.com/banner.js", k % (2 * BENCH_DOMAINS));
+        } else if (r < 10) {
+            snprintf(url, sizeof(url), "https://host%d.com/private/area%d/page", k % 50, k % (2 * BENCH_PREFIXES));
+        } else if (r < 13) {
+            snprintf(url, sizeof(url), "https://site%d.org/login", k % (2 * BENCH_EXACT));
+        } else if (r < 18) {
+            snprintf(url, sizeof(url), "https://t.co/session%d/%d/track", k % (2 * BENCH_REGEXES), k % 1000);
+        } else {
+            snprintf(url, sizeof(url), "https://en.wikipedia.org/wiki/Article_%d?section=%d", k, k % 7);
+        }
+        urls[i] = strdup(url);
+    }
+    
+    printf("\n%d rules (%d domain, %d prefix, %d exact, %d regex), %d URLs\n",
+           g_num_rules, BENCH_DOMAINS, BENCH_PREFIXES, BENCH_EXACT, BENCH_REGEXES, BENCH_URLS);
+    printf("─────────────────────────────────────\n");
+    
+    // Before: loop over every rule
+    int reference_blocked = 0;
+    bool* expected = (bool*)malloc(BENCH_URLS * sizeof(bool));
+    double start = now_seconds();
+    for (int i = 0; i < BENCH_URLS; i++) {
+        expected[i] = reference_is_blocked(urls[i]);
+        reference_blocked += expected[i];
+    }
+    double before = now_seconds() - start;
+    
+    // After: compiled rule set
+    int blocked = 0;
+    int mismatches = 0;
+    start = now_seconds();
+    for (int i = 0; i < BENCH_URLS; i++) {
+        bool b = url_blocker_is_blocked(blocker, urls[i]);
+        blocked += b;
+        if (b != expected[i]) mismatches++;
+    }
+    double after = now_seconds() - start;
+    
+    printf("  Before (per-pattern loop): %9.0f checks/s\n", BENCH_URLS / before);
+    printf("  After  (compiled rules):   %9.0f checks/s\n", BENCH_URLS / after);
+    printf("  Speedup: %.1fx\n", before / after);
+    
+    int agree = mismatches == 0 && blocked == reference_blocked && blocked > 0;
+    printf("%s Same verdict on every URL (%d blocked, %d mismatches)\n",
+           agree ? "✓" : "✗", blocked, mismatches);
+    
+    // Removing and disabling rules takes effect
+    int removed = url_blocker_add_pattern(blocker, BLOCK_DOMAIN, "wikipedia.org", NULL);
+    int toggled = url_blocker_is_blocked(blocker, "https://en.wikipedia.org/wiki/X");
+    url_blocker_set_pattern_enabled(blocker, removed, false);
+    toggled = toggled && !url_blocker_is_blocked(blocker, "https://en.wikipedia.org/wiki/X");
+    url_blocker_set_pattern_enabled(blocker, removed, true);
+    url_blocker_remove_pattern(blocker, removed);
+    toggled = toggled && !url_blocker_is_blocked(blocker, "https://en.wikipedia.org/wiki/X");
+    printf("%s Enable/disable/remove update the compiled set\n", toggled ? "✓" : "✗");
+    
+    for (int i = 0; i < BENCH_URLS; i++) free(urls[i]);
+    free(urls);
+    free(expected);
+    for (int i = 0; i < g_num_rules; i++) {
+        if (g_rules[i].type == BLOCK_REGEX_PATTERN) regfree(&g_rules[i].re);
+    }
+    url_blocker_destroy(blocker);
+    
+    printf("\n");
+    printf("═══════════════════════════════════════════════════════════\n");
+    printf("Benchmark Complete\n");
+    printf("═══════════════════════════════════════════════════════════\n");
+    
+    return (agree && toggled) ? 0 : 1;
+}
@@ -0,0 +1,145 @@
+/**
+ * Performance Benchmark: URL Priority Domain Statistics
+ *
+ * Scores URLs spread over tens of thousands of domains. The previous
+ * implementation found a domain's statistics by scanning every tracked
+ * domain (and stopped tracking new ones at 10000); URLPriority now keeps
+ * them in a hash table and caches each domain's score. Also checks the
+ * per-domain crawl budgets.
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+#include <stdbool.h>
+#include "../../src/crawler/url_priority.h"
+
+#define BENCH_DOMAINS 30000
+#define BENCH_URLS 60000
+#define OLD_MAX_DOMAINS 10000
+
+// Helper: Wall clock in seconds
+static double now_seconds(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return ts.tv_sec + ts.tv_nsec / 1e9;
+}
+
+// Reference: Previous lookup, one linear scan per URL
+typedef struct {
+    char domain[256];
+    int crawl_count;
+} OldDomainStats;
+
+static OldDomainStats* g_old_stats;
+static int g_old_count = 0;
+
+static OldDomainStats* old_get_or_create(const char* domain) {
+    for (int i = 0; i < g_old_count; i++) {
+        if (strcmp(g_old_stats[i].domain, domain) == 0) return &g_old_stats[i];
+    }
+    if (g_old_count >= OLD_MAX_DOMAINS) return NULL;
+    OldDomainStats* stats = &g_old_stats[g_old_count++];
+    snprintf(stats->domain, sizeof(stats->domain), "%s", domain);
+    stats->crawl_count = 0;
+    return stats;
+}
+
+int main() {
+    printf("\n");
+    printf("╔══════════════════════════════════════════════════════════╗\n");
+    printf("║     URL Priority Domain Statistics Benchmark            ║\n");
+    printf("╚══════════════════════════════════════════════════════════╝\n");
+    
+    URLPriority* priority = url_priority_create(NULL);
+    g_old_stats = (OldDomainStats*)calloc(OLD_MAX_DOMAINS, sizeof(OldDomainStats));
+    
+    URLEntry* entries = (URLEntry*)calloc(BENCH_URLS, sizeof(URLEntry));
+    srand(42);
+    for (int i = 0; i < BENCH_URLS; i++) {
+        int d = rand() % BENCH_DOMAINS;
+        snprintf(entries[i].domain, sizeof(entries[i].domain), "site%d.example.org", d);
+        snprintf(entries[i].url, sizeof(entries[i].url), "https://site%d.example.org/a/page%d", d, i);
+    }
+    
+    printf("\n%d URLs over %d domains\n", BENCH_URLS, BENCH_DOMAINS);
+    printf("─────────────────────────────────────\n");
+    
+    // Before: linear scan per URL
+    volatile int sink = 0;
+    double start = now_seconds();
+    for (int i = 0; i < BENCH_URLS; i++) {
+        OldDomainStats* stats = old_get_or_create(entries[i].domain);
+        if (stats) sink += stats->crawl_count;
+    }
+    double before = now_seconds() - start;
+    
+    // After: full score, hashed domain lookup
+    start = now_seconds();
+    for (int i = 0; i < BENCH_URLS; i++) {
+        sink += url_priority_calculate(priority, &entries[i], BENCH_DOMAINS);
+    }
+    double after = now_seconds() - start;
+    (void)sink;
+    
+    printf("  Before (linear domain scan): %9.0f URLs/s (%d domains tracked)\n",
+           BENCH_URLS / before, g_old_count);
+    printf("  After  (hashed, full score): %9.0f URLs/s (%d domains tracked)\n",
+           BENCH_URLS / after, url_priority_get_domain_count(priority));
+    printf("  Speedup: %.1fx\n", before / after);
+    
+    // Every domain is tracked and stats land on the right one
+    for (int i = 0; i < 3; i++) url_priority_update_domain_stats(priority, "site7.example.org");
+    url_priority_update_domain_stats(priority, "site29999.example.org");
+    DomainStats* seven = url_priority_get_domain_stats(priority, "site7.example.org");
+    DomainStats* last = url_priority_get_domain_stats(priority, "site29999.example.org");
+    int tracked = url_priority_get_domain_count(priority) > OLD_MAX_DOMAINS &&
+                  seven && seven->crawl_count == 3 && seven->recent_crawls > 2.99 &&
+                  last && last->crawl_count == 1 &&
+                  !url_priority_get_domain_stats(priority, "unknown.example.org");
+    printf("%s Stats tracked past the old %d domain cap\n", tracked ? "✓" : "✗", OLD_MAX_DOMAINS);
+    
+    // Crawled domains score lower than fresh ones
+    URLEntry probe;
+    memset(&probe, 0, sizeof(probe));
+    PriorityFactors factors = *url_priority_get_factors(priority);
+    factors.prime_randomization = 0.0f;
+    url_priority_set_factors(priority, &factors);
+    snprintf(probe.domain, sizeof(probe.domain), "site7.example.org");
+    snprintf(probe.url, sizeof(probe.url), "https://site7.example.org/x");
+    int crawled_score = url_priority_calculate(priority, &probe, 4);
+    snprintf(probe.domain, sizeof(probe.domain), "site8.example.org");
+    snprintf(probe.url, sizeof(probe.url), "https://site8.example.org/x");
+    int fresh_score = url_priority_calculate(priority, &probe, 4);
+    int diversity = crawled_score < fresh_score;
+    printf("%s Diversity score updates with domain stats (%d < %d)\n",
+           diversity ? "✓" : "✗", crawled_score, fresh_score);
+    
+    // Budgets: burst of 2, then the domain waits; other domains unaffected
+    url_priority_set_domain_budget(priority, 0.001, 2);
+    int budget = url_priority_consume_budget(priority, "site1.example.org") &&
+                 url_priority_consume_budget(priority, "site1.example.org") &&
+                 !url_priority_has_budget(priority, "site1.example.org") &&
+                 !url_priority_consume_budget(priority, "site1.example.org") &&
+                 url_priority_has_budget(priority, "site2.example.org");
+    url_priority_set_domain_budget(priority, 0, 1);
+    budget = budget && url_priority_has_budget(priority, "site1.example.org");
+    printf("%s Per-domain budgets limit bursts\n", budget ? "✓" : "✗");
+    
+    url_priority_reset_stats(priority);
+    int reset = url_priority_get_domain_count(priority) == 0 &&
+                !url_priority_get_domain_stats(priority, "site7.example.org");
+    printf("%s Reset clears domain table\n", reset ? "✓" : "✗");
+    
+    free(entries);
+    free(g_old_stats);
+    url_priority_destroy(priority);
+    
+    printf("\n");
+    printf("═══════════════════════════════════════════════════════════\n");
+    printf("Benchmark Complete\n");
+    printf("═══════════════════════════════════════════════════════════\n");
+    
+    return (tracked && diversity && budget && reset) ? 0 : 1;
+}
@@ -0,0 +1,354 @@
+/**
+ * Unit Test: In-Process ZIP Document Extraction
+ *
+ * Builds small DOCX, XLSX, PPTX, ODT and EPUB containers in memory (stored
+ * and deflated members, as real documents have), then checks that libdocproc
+ * extracts their text both from a file and from the buffer, and that a
+ * damaged member is rejected instead of returning garbage.
+ */
+
+#define _GNU_SOURCE
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <stdint.h>
+#include <stdbool.h>
+#include <unistd.h>
+#include <zlib.h>
+#include "../../src/docproc/docproc.h"
+
+#define TEST_PATH_FORMAT "/tmp/test_docproc_zip.%s"
+
+// Helper: Default options without the minimum length (test documents are small)
+static DocProcOptions test_options(void) {
+    DocProcOptions options;
+    docproc_default_options(&options);
+    options.min_text_length = 0;
+    return options;
+}
+
+// Helper: ZIP archive written to memory
+typedef struct {
+    unsigned char* data;
+    size_t size;
+    size_t capacity;
+    unsigned char* central;
+    size_t central_size;
+    int count;
+} ZipWriter;
+
+typedef struct {
+    const char* name;
+    const char* content;
+    bool deflate;
+} TestMember;
+
+static void put_bytes(unsigned char** buf, size_t* size, const void* data, size_t len) {
+    *buf = (unsigned char*)realloc(*buf, *size + len);
+    memcpy(*buf + *size, data, len);
+    *size += len;
+}
+
+static void put_u16(unsigned char** buf, size_t* size, uint16_t v) {
+    unsigned char b[2] = { (unsigned char)v, (unsigned char)(v >> 8) };
+    put_bytes(buf, size, b, 2);
+}
+
+static void put_u32(unsigned char** buf, size_t* size, uint32_t v) {
+    unsigned char b[4] = { (unsigned char)v, (unsigned char)(v >> 8),
+                           (unsigned char)(v >> 16), (unsigned char)(v >> 24) };
+    put_bytes(buf, size, b, 4);
+}
+
+// Helper: Append a member (local header + data) and its central record
+static void zip_add(ZipWriter* zip, const TestMember* member) {
+    size_t len = strlen(member->content);
+    uint32_t crc = (uint32_t)crc32(0L, (const Bytef*)member->content, (uInt)len);
+    
+    unsigned char* body = (unsigned char*)member->content;
+    size_t body_len = len;
+    unsigned char* packed = NULL;
+    if (member->deflate) {
+        // Raw deflate, as ZIP stores it
+        packed = (unsigned char*)malloc(compressBound(len) + 64);
+        z_stream stream;
+        memset(&stream, 0, sizeof(stream));
+        deflateInit2(&stream, Z_BEST_COMPRESSION, Z_DEFLATED, -MAX_WBITS, 8, Z_DEFAULT_STRATEGY);
+        stream.next_in = (Bytef*)member->content;
+        stream.avail_in = (uInt)len;
+        stream.next_out = packed;
+        stream.avail_out = (uInt)(compressBound(len) + 64);
+        deflate(&stream, Z_FINISH);
+        body = packed;
+        body_len = stream.total_out;
+        deflateEnd(&stream);
+    }
+    
+    uint16_t method = member->deflate ? 8 : 0;
+    uint16_t name_len = (uint16_t)strlen(member->name);
+    uint32_t offset = (uint32_t)zip->size;
+    
+    put_u32(&zip->data, &zip->size, 0x04034b50u);
+    put_u16(&zip->data, &zip->size, 20);
+    put_u16(&zip->data, &zip->size, 0);
+    put_u16(&zip->data, &zip->size, method);
+    put_u32(&zip->data, &zip->size, 0);
+    put_u32(&zip->data, &zip->size, crc);
+    put_u32(&zip->data, &zip->size, (uint32_t)body_len);
+    put_u32(&zip->data, &zip->size, (uint32_t)len);
+    put_u16(&zip->data, &zip->size, name_len);
+    put_u16(&zip->data, &zip->size, 0);
+    put_bytes(&zip->data, &zip->size, member->name, name_len);
+    put_bytes(&zip->data, &zip->size, body, body_len);
+    
+    put_u32(&zip->central, &zip->central_size, 0x02014b50u);
+    put_u16(&zip->central, &zip->central_size, 20);
+    put_u16(&zip->central, &zip->central_size, 20);
+    put_u16(&zip->central, &zip->central_size, 0);
+    put_u16(&zip->central, &zip->central_size, method);
+    put_u32(&zip->central, &zip->central_size, 0);
+    put_u32(&zip->central, &zip->central_size, crc);
+    put_u32(&zip->central, &zip->central_size, (uint32_t)body_len);
+    put_u32(&zip->central, &zip->central_size, (uint32_t)len);
+    put_u16(&zip->central, &zip->central_size, name_len);
+    put_u32(&zip->central, &zip->central_size, 0);  // extra, comment length
+    put_u32(&zip->central, &zip->central_size, 0);  // disk, internal attributes
+    put_u32(&zip->central, &zip->central_size, 0);  // external attributes
+    put_u32(&zip->central, &zip->central_size, offset);
+    put_bytes(&zip->central, &zip->central_size, member->name, name_len);
+    
+    zip->count++;
+    free(packed);
+}
+
+// Helper: Build a complete archive; caller frees the returned bytes
+static unsigned char* build_zip(const TestMember* members, int count, size_t* size) {
+    ZipWriter zip;
+    memset(&zip, 0, sizeof(zip));
+    for (int i = 0; i < count; i++) {
+        zip_add(&zip, &members[i]);
+    }
+    
+    uint32_t dir_offset = (uint32_t)zip.size;
+    put_bytes(&zip.data, &zip.size, zip.central, zip.central_size);
+    put_u32(&zip.data, &zip.size, 0x06054b50u);
+    put_u32(&zip.data, &zip.size, 0);
+    put_u16(&zip.data, &zip.size, (uint16_t)zip.count);
+    put_u16(&zip.data, &zip.size, (uint16_t)zip.count);
+    put_u32(&zip.data, &zip.size, (uint32_t)zip.central_size);
+    put_u32(&zip.data, &zip.size, dir_offset);
+    put_u16(&zip.data, &zip.size, 0);
+    
+    free(zip.central);
+    *size = zip.size;
+    return zip.data;
+}
+
+// Helper: Extract from a file and from the buffer; both must contain every
+// expected string, in order
+static int check_document(const char* extension, DocProcFormat format,
+                          const TestMember* members, int count,
+                          const char* const* expected, int num_expected) {
+    size_t size;
+    unsigned char* data = build_zip(members, count, &size);
+    
+    char path[256];
+    snprintf(path, sizeof(path), TEST_PATH_FORMAT, extension);
+    FILE* f = fopen(path, "wb");
+    if (!f) {
+        free(data);
+        return 0;
+    }
+    fwrite(data, 1, size, f);
+    fclose(f);
+    
+    DocProcOptions options = test_options();
+    int ok = 1;
+    for (int pass = 0; pass < 2 && ok; pass++) {
+        DocProcResult result;
+        DocProcStatus status = pass == 0
+            ? docproc_extract(path, &options, &result)
+            : docproc_extract_buffer(data, size, format, &options, &result);
+        
+        ok = status == DOCPROC_SUCCESS && result.text;
+        const char* cursor = ok ? result.text : NULL;
+        for (int i = 0; ok && i < num_expected; i++) {
+            cursor = strstr(cursor, expected[i]);
+            ok = cursor != NULL;
+        }
+        if (!ok) {
+            printf("[%s: \"%s\"] ", pass == 0 ? "file" : "buffer",
+                   result.text ? result.text : result.error_message);
+        }
+        docproc_free_result(&result);
+    }
+    
+    unlink(path);
+    free(data);
+    return ok;
+}
+
+static const TestMember DOCX_MEMBERS[] = {
+    { "[Content_Types].xml", "<?xml version=\"1.0\"?><Types xmlns=\"http://schemas.openxmlformats.org/package/2006/content-types\"/>", true },
+    { "word/document.xml",
+      "<?xml version=\"1.0\" encoding=\"UTF-8\"?>"
+      "<w:document xmlns:w=\"http://schemas.openxmlformats.org/wordprocessingml/2006/main\"><w:body>"
+      "<w:p><w:r><w:t>Crystalline lattice</w:t></w:r></w:p>"
+      "<w:p><w:r><w:t>second paragraph</w:t></w:r></w:p>"
+      "</w:body></w:document>", true }
+};
+
+static const TestMember XLSX_MEMBERS[] = {
+    { "xl/sharedStrings.xml",
+      "<?xml version=\"1.0\" encoding=\"UTF-8\"?>"
+      "<sst xmlns=\"http://schemas.openxmlformats.org/spreadsheetml/2006/main\">"
+      "<si><t>Prime header</t></si></sst>", true },
+    // Sheet 10 precedes sheet 2 in the archive; extraction orders by number
+    { "xl/worksheets/sheet10.xml",
+      "<worksheet xmlns=\"http://schemas.openxmlformats.org/spreadsheetml/2006/main\">"
+      "<sheetData><row><c><v>1009</v></c></row></sheetData></worksheet>", true },
+    { "xl/worksheets/sheet2.xml",
+      "<worksheet xmlns=\"http://schemas.openxmlformats.org/spreadsheetml/2006/main\">"
+      "<sheetData><row><c><v>7919</v></c></row></sheetData></worksheet>", false }
+};
+
+static const TestMember PPTX_MEMBERS[] = {
+    { "ppt/slides/slide1.xml",
+      "<p:sld xmlns:p=\"http://schemas.openxmlformats.org/presentationml/2006/main\" "
+      "xmlns:a=\"http://schemas.openxmlformats.org/drawingml/2006/main\"><p:cSld><p:spTree>"
+      "<p:sp><p:txBody><a:p><a:r><a:t>Opening slide</a:t></a:r></a:p></p:txBody></p:sp>"
+      "</p:spTree></p:cSld></p:sld>", true },
+    { "ppt/slides/slide2.xml",
+      "<p:sld xmlns:p=\"http://schemas.openxmlformats.org/presentationml/2006/main\" "
+      "xmlns:a=\"http://schemas.openxmlformats.org/drawingml/2006/main\"><p:cSld><p:spTree>"
+      "<p:sp><p:txBody><a:p><a:r><a:t>Closing slide</a:t></a:r></a:p></p:txBody></p:sp>"
+      "</p:spTree></p:cSld></p:sld>", true }
+};
+
+static const TestMember ODT_MEMBERS[] = {
+    { "mimetype", "application/vnd.oasis.opendocument.text", false },
+    { "content.xml",
+      "<?xml version=\"1.0\" encoding=\"UTF-8\"?>"
+      "<office:document-content xmlns:office=\"urn:oasis:names:tc:opendocument:xmlns:office:1.0\" "
+      "xmlns:text=\"urn:oasis:names:tc:opendocument:xmlns:text:1.0\"><office:body><office:text>"
+      "<text:p>Open document body</text:p></office:text></office:body></office:document-content>", true }
+};
+
+static const TestMember EPUB_MEMBERS[] = {
+    { "mimetype", "application/epub+zip", false },
+    { "META-INF/container.xml", "<container version=\"1.0\"/>", true },
+    { "OEBPS/chapter1.xhtml",
+      "<html xmlns=\"http://www.w3.org/1999/xhtml\"><body><h1>Chapter One</h1>"
+      "<p>The first chapter.</p></body></html>", true },
+    { "OEBPS/chapter2.xhtml",
+      "<html xmlns=\"http://www.w3.org/1999/xhtml\"><body><p>The second chapter.</p></body></html>", true }
+};
+
+#define NUM_MEMBERS(m) ((int)(sizeof(m) / sizeof(m[0])))
+
+// Test 1: DOCX paragraphs
+int test_docx(void) {
+    printf("Test 1: DOCX text from file and buffer... ");
+    const char* expected[] = { "Crystalline lattice", "second paragraph" };
+    int ok = check_document("docx", DOCPROC_FORMAT_DOCX, DOCX_MEMBERS, NUM_MEMBERS(DOCX_MEMBERS), expected, 2);
+    printf("%s\n", ok ? "PASS" : "FAIL");
+    return ok;
+}
+
+// Test 2: XLSX shared strings, then sheets in numeric order
+int test_xlsx(void) {
+    printf("Test 2: XLSX shared strings and sheets in order... ");
+    const char* expected[] = { "Prime header", "=== Sheet 1 ===", "7919", "=== Sheet 2 ===", "1009" };
+    int ok = check_document("xlsx", DOCPROC_FORMAT_XLSX, XLSX_MEMBERS, NUM_MEMBERS(XLSX_MEMBERS), expected, 5);
+    printf("%s\n", ok ? "PASS" : "FAIL");
+    return ok;
+}
+
+// Test 3: PPTX slides
+int test_pptx(void) {
+    printf("Test 3: PPTX slides in order... ");
+    const char* expected[] = { "=== Slide 1 ===", "Opening slide", "=== Slide 2 ===", "Closing slide" };
+    int ok = check_document("pptx", DOCPROC_FORMAT_PPTX, PPTX_MEMBERS, NUM_MEMBERS(PPTX_MEMBERS), expected, 4);
+    printf("%s\n", ok ? "PASS" : "FAIL");
+    return ok;
+}
+
+// Test 4: ODT content.xml next to a stored mimetype
+int test_odt(void) {
+    printf("Test 4: ODT content... ");
+    const char* expected[] = { "Open document body" };
+    int ok = check_document("odt", DOCPROC_FORMAT_ODT, ODT_MEMBERS, NUM_MEMBERS(ODT_MEMBERS), expected, 1);
+    printf("%s\n", ok ? "PASS" : "FAIL");
+    return ok;
+}
+
+// Test 5: EPUB chapters
+int test_epub(void) {
+    printf("Test 5: EPUB chapters... ");
+    const char* expected[] = { "Chapter One", "The first chapter.", "The second chapter." };
+    int ok = check_document("epub", DOCPROC_FORMAT_EPUB, EPUB_MEMBERS, NUM_MEMBERS(EPUB_MEMBERS), expected, 3);
+    printf("%s\n", ok ? "PASS" : "FAIL");
+    return ok;
+}
+
+// Test 6: A damaged member or a truncated archive fails cleanly
+int test_damaged(void) {
+    printf("Test 6: Damaged and truncated archives are rejected... ");
+    
+    size_t size;
+    unsigned char* data = build_zip(DOCX_MEMBERS, NUM_MEMBERS(DOCX_MEMBERS), &size);
+    
+    DocProcOptions options = test_options();
+    DocProcResult result;
+    int ok = docproc_extract_buffer(data, size, DOCPROC_FORMAT_DOCX, &options, &result) == DOCPROC_SUCCESS;
+    docproc_free_result(&result);
+    
+    ok = ok && docproc_extract_buffer(data, size / 2, DOCPROC_FORMAT_DOCX, &options, &result) != DOCPROC_SUCCESS;
+    docproc_free_result(&result);
+    
+    // Flip a byte inside word/document.xml's compressed data
+    unsigned char* member = (unsigned char*)memmem(data, size, "word/document.xml", 17);
+    if (ok && member) {
+        member[17 + 10] ^= 0x55;
+        ok = docproc_extract_buffer(data, size, DOCPROC_FORMAT_DOCX, &options, &result) != DOCPROC_SUCCESS;
+        docproc_free_result(&result);
+    }
+    
+    free(data);
+    printf("%s\n", ok && member ? "PASS" : "FAIL");
+    return ok && member;
+}
+
+int main() {
+    printf("\n");
+    printf("╔══════════════════════════════════════════════════════════╗\n");
+    printf("║     In-Process ZIP Document Extraction Unit Tests       ║\n");
+    printf("╚══════════════════════════════════════════════════════════╝\n");
+    printf("\n");
+    
+    if (docproc_init() != DOCPROC_SUCCESS) {
+        printf("Failed to initialize libdocproc\n");
+        return 1;
+    }
+    
+    int passed = 0;
+    int total = 6;
+    
+    passed += test_docx();
+    passed += test_xlsx();
+    passed += test_pptx();
+    passed += test_odt();
+    passed += test_epub();
+    passed += test_damaged();
+    
+    docproc_cleanup();
+    
+    printf("\n");
+    printf("═══════════════════════════════════════════════════════════\n");
+    printf("Results: %d/%d tests passed (%.1f%%)\n", passed, total,
+           (float)passed / total * 100.0f);
+    printf("═══════════════════════════════════════════════════════════\n");
+    printf("\n");
+    
+    return (passed == total) ? 0 : 1;
+}
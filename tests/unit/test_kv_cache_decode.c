@@ -0,0 +1,301 @@
+/**
+ * Unit Test: KV Cache Incremental Decoding
+ *
+ * Tests that cached single-token decode steps produce the same logits
+ * as a naive full-prefix forward pass computed here (causal attention over
+ * every position, recomputed layer by layer), that the cache bounds are
+ * enforced, and that generation slides its window once the cache is full.
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <math.h>
+#include "../../include/cllm.h"
+#include "../../include/cllm_utils.h"
+#include "../../include/cllm_inference.h"
+
+#define TEST_SEQ_LEN 24
+
+static float max_abs_diff(const float* a, const float* b, uint32_t n) {
+    float diff = 0.0f;
+    for (uint32_t i = 0; i < n; i++) {
+        float d = fabsf(a[i] - b[i]);
+        if (d > diff) diff = d;
+    }
+    return diff;
+}
+
+// Test 1: Single-token prefill matches the stateless forward pass
+int test_single_token_matches_forward(CLLMInference* inf, uint32_t* tokens) {
+    printf("Test 1: Single-token prefill matches cllm_forward... ");
+    
+    uint32_t vocab_size = inf->model->vocab_size;
+    float* expected = malloc(vocab_size * sizeof(float));
+    
+    cllm_forward(inf, tokens, 1);
+    memcpy(expected, inf->logits, vocab_size * sizeof(float));
+    
+    int rc = cllm_prefill(inf, tokens, 1);
+    float diff = max_abs_diff(expected, inf->logits, vocab_size);
+    free(expected);
+    
+    if (rc == 0 && diff < 1e-5f) {
+        printf("PASS\n");
+        return 1;
+    }
+    printf("FAIL (rc=%d, max diff=%g)\n", rc, diff);
+    return 0;
+}
+
+// Helper: Layer norm over one position
+static void ref_layer_norm(float* x, const CLLMLayerNorm* ln, uint32_t dim) {
+    float mean = 0.0f, var = 0.0f;
+    for (uint32_t i = 0; i < dim; i++) mean += x[i];
+    mean /= dim;
+    for (uint32_t i = 0; i < dim; i++) var += (x[i] - mean) * (x[i] - mean);
+    var /= dim;
+    float std = sqrtf(var + ln->epsilon);
+    for (uint32_t i = 0; i < dim; i++) {
+        x[i] = (x[i] - mean) / std;
+        if (ln->gamma && ln->beta) x[i] = x[i] * ln->gamma[i] + ln->beta[i];
+    }
+}
+
+// Helper: Per-head projection out[h*hd+d] = sum_i W[h][d][i] * in[h*hd+i]
+static void ref_project(const float* w, const float* in, float* out, uint32_t heads, uint32_t hd) {
+    for (uint32_t h = 0; h < heads; h++) {
+        for (uint32_t d = 0; d < hd; d++) {
+            float sum = 0.0f;
+            for (uint32_t i = 0; i < hd; i++) {
+                sum += w[(size_t)h * hd * hd + d * hd + i] * in[h * hd + i];
+            }
+            out[h * hd + d] = sum;
+        }
+    }
+}
+
+// Helper: ReLU feed-forward, W1 is [input][hidden] and W2 is [hidden][input]
+static void ref_feed_forward(float* x, const FeedForwardLayer* ff) {
+    float* hidden = calloc(ff->hidden_dim, sizeof(float));
+    for (uint32_t j = 0; j < ff->hidden_dim; j++) {
+        float sum = ff->bias1[j];
+        for (uint32_t i = 0; i < ff->input_dim; i++) sum += x[i] * ff->w1_lattice[(size_t)i * ff->hidden_dim + j];
+        hidden[j] = sum > 0.0f ? sum : 0.0f;
+    }
+    for (uint32_t i = 0; i < ff->input_dim; i++) {
+        float sum = ff->bias2[i];
+        for (uint32_t j = 0; j < ff->hidden_dim; j++) sum += hidden[j] * ff->w2_lattice[(size_t)j * ff->input_dim + i];
+        x[i] = sum;
+    }
+    free(hidden);
+}
+
+/**
+ * Reference forward pass over a whole prefix, without the KV cache
+ * 
+ * Every layer recomputes queries, keys and values for all positions and
+ * runs causal softmax attention; logits are for the last position.
+ */
+static void reference_logits(CLLMInference* inf, const uint32_t* tokens, int n, float* logits) {
+    CLLMModel* model = inf->model;
+    uint32_t dim = model->embeddings.embedding_dim;
+    float* hidden = calloc((size_t)n * dim, sizeof(float));
+    float* q = calloc((size_t)n * dim, sizeof(float));
+    float* k = calloc((size_t)n * dim, sizeof(float));
+    float* v = calloc((size_t)n * dim, sizeof(float));
+    float* scores = calloc((size_t)n, sizeof(float));
+    
+    for (int t = 0; t < n; t++) {
+        cllm_get_embedding(inf, tokens[t], &hidden[(size_t)t * dim]);
+        cllm_apply_positional_encoding(inf, &hidden[(size_t)t * dim], t);
+    }
+    
+    for (uint32_t layer = 0; layer < model->num_layers; layer++) {
+        AttentionLayer* attn = &model->attention_layers[layer];
+        uint32_t heads = attn->num_heads, hd = attn->head_dim;
+        
+        for (int t = 0; t < n; t++) {
+            float* x = &hidden[(size_t)t * dim];
+            ref_layer_norm(x, &model->layer_norms[layer], dim);
+            ref_project(attn->query_lattice, x, &q[(size_t)t * dim], heads, hd);
+            ref_project(attn->key_lattice, x, &k[(size_t)t * dim], heads, hd);
+            ref_project(attn->value_lattice, x, &v[(size_t)t * dim], heads, hd);
+        }
+        
+        for (int t = 0; t < n; t++) {
+            float* x = &hidden[(size_t)t * dim];
+            for (uint32_t h = 0; h < heads; h++) {
+                float max_score = -1e30f, sum = 0.0f;
+                for (int s = 0; s <= t; s++) {
+                    float dot = 0.0f;
+                    for (uint32_t d = 0; d < hd; d++) {
+                        dot += q[(size_t)t * dim + h * hd + d] * k[(size_t)s * dim + h * hd + d];
+                    }
+                    scores[s] = dot / sqrtf((float)hd);
+                    if (scores[s] > max_score) max_score = scores[s];
+                }
+                for (int s = 0; s <= t; s++) {
+                    scores[s] = expf(scores[s] - max_score);
+                    sum += scores[s];
+                }
+                for (uint32_t d = 0; d < hd; d++) {
+                    float out = 0.0f;
+                    for (int s = 0; s <= t; s++) out += scores[s] / sum * v[(size_t)s * dim + h * hd + d];
+                    x[h * hd + d] = out;
+                }
+            }
+            ref_feed_forward(x, &model->ff_layers[layer]);
+        }
+    }
+    
+    float* last = &hidden[(size_t)(n - 1) * dim];
+    ref_layer_norm(last, &model->layer_norms[model->num_layers - 1], dim);
+    for (uint32_t i = 0; i < model->vocab_size; i++) {
+        float sum = 0.0f;
+        for (uint32_t d = 0; d < dim; d++) sum += model->embeddings.embeddings[(size_t)i * dim + d] * last[d];
+        logits[i] = sum;
+    }
+    
+    free(hidden);
+    free(q);
+    free(k);
+    free(v);
+    free(scores);
+}
+
+// Test 2: Incremental decode matches a naive full-prefix forward pass
+int test_incremental_matches_reference(CLLMInference* inf, uint32_t* tokens) {
+    printf("Test 2: Incremental decode matches full-prefix reference... ");
+    
+    uint32_t vocab_size = inf->model->vocab_size;
+    float* expected = malloc(vocab_size * sizeof(float));
+    float worst = 0.0f;
+    
+    int rc = cllm_prefill(inf, tokens, 4);
+    for (int i = 4; i <= TEST_SEQ_LEN && rc == 0; i++) {
+        // Logits after i tokens, then feed token i
+        reference_logits(inf, tokens, i, expected);
+        float scale = 1.0f;
+        for (uint32_t j = 0; j < vocab_size; j++) {
+            if (fabsf(expected[j]) > scale) scale = fabsf(expected[j]);
+        }
+        float diff = max_abs_diff(expected, inf->logits, vocab_size) / scale;
+        if (diff > worst || !isfinite(diff)) worst = isfinite(diff) ? diff : INFINITY;
+        if (i < TEST_SEQ_LEN) rc = cllm_forward_cached(inf, tokens[i], true);
+    }
+    int used = inf->kv_cache_used;
+    free(expected);
+    
+    if (rc == 0 && used == TEST_SEQ_LEN && worst < 1e-3f) {
+        printf("PASS (max rel diff %.2g)\n", worst);
+        return 1;
+    }
+    printf("FAIL (rc=%d, used=%d, max rel diff=%g)\n", rc, used, worst);
+    return 0;
+}
+
+// Test 3: A full cache rejects further tokens
+int test_cache_full(CLLMInference* inf, uint32_t* tokens) {
+    printf("Test 3: Full cache rejects further tokens... ");
+    
+    cllm_inference_reset_cache(inf);
+    inf->kv_cache_used = inf->kv_cache_size;
+    int rc = cllm_forward_cached(inf, tokens[0], true);
+    cllm_inference_reset_cache(inf);
+    
+    if (rc == -1 && inf->kv_cache_used == 0) {
+        printf("PASS\n");
+        return 1;
+    }
+    printf("FAIL (rc=%d)\n", rc);
+    return 0;
+}
+
+// Test 4: Generation runs on the cached path
+int test_generate(CLLMInference* inf) {
+    printf("Test 4: cllm_generate produces max_tokens tokens... ");
+    
+    char output[4096];
+    cllm_set_max_tokens(inf, 16);
+    int generated = cllm_generate(inf, "the quick brown fox", output, sizeof(output));
+    
+    if (generated == 16) {
+        printf("PASS\n");
+        return 1;
+    }
+    printf("FAIL (generated=%d)\n", generated);
+    return 0;
+}
+
+// Test 5: Generation slides its window instead of stopping at a full cache
+int test_generate_past_cache(CLLMInference* inf) {
+    printf("Test 5: cllm_generate continues past a full cache... ");
+    
+    char output[8192];
+    int cache_size = inf->kv_cache_size;
+    inf->kv_cache_size = 16;
+    cllm_set_max_tokens(inf, 60);
+    int generated = cllm_generate(inf, "the quick brown fox", output, sizeof(output));
+    int used = inf->kv_cache_used;
+    inf->kv_cache_size = cache_size;
+    cllm_inference_reset_cache(inf);
+    
+    if (generated == 60 && used <= 16) {
+        printf("PASS\n");
+        return 1;
+    }
+    printf("FAIL (generated=%d, cache used=%d)\n", generated, used);
+    return 0;
+}
+
+int main() {
+    printf("\n");
+    printf("╔══════════════════════════════════════════════════════════╗\n");
+    printf("║     KV Cache Decoding Unit Tests                        ║\n");
+    printf("╚══════════════════════════════════════════════════════════╝\n");
+    printf("\n");
+    
+    CLLMConfig config = {
+        .vocab_size = 500,
+        .embedding_dim = 64,
+        .num_layers = 2,
+        .num_heads = 4,
+        .ff_dim = 128,
+        .max_seq_len = 128,
+        .dropout = 0.0f
+    };
+    
+    CLLMModel* model = cllm_create_model(&config);
+    CLLMInference* inf = model ? cllm_inference_init(model) : NULL;
+    if (!inf) {
+        printf("FAIL: Could not create model/inference context\n");
+        return 1;
+    }
+    
+    uint32_t tokens[TEST_SEQ_LEN];
+    for (int i = 0; i < TEST_SEQ_LEN; i++) {
+        tokens[i] = (uint32_t)(i * 37 + 5) % model->vocab_size;
+    }
+    
+    int passed = 0;
+    int total = 5;
+    
+    passed += test_single_token_matches_forward(inf, tokens);
+    passed += test_incremental_matches_reference(inf, tokens);
+    passed += test_cache_full(inf, tokens);
+    passed += test_generate(inf);
+    passed += test_generate_past_cache(inf);
+    
+    cllm_inference_cleanup(inf);
+    cllm_free_model(model);
+    
+    printf("\n");
+    printf("═══════════════════════════════════════════════════════════\n");
+    printf("Results: %d/%d tests passed (%.1f%%)\n", passed, total,
+           (float)passed / total * 100.0f);
+    printf("═══════════════════════════════════════════════════════════\n");
+    printf("\n");
+    
+    return (passed == total) ? 0 : 1;
+}
@@ -0,0 +1,168 @@
+/**
+ * Unit Test: Training a Model Loaded Through the Model Manager
+ *
+ * The model manager maps weights read-only. Tests that training a model
+ * obtained with model_manager_acquire_read (as the LLM tab and the crawler
+ * do) gets a private, writable copy instead of faulting on the mapping,
+ * and that the file on disk is left untouched.
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <unistd.h>
+#include <sys/stat.h>
+#include "../../include/cllm.h"
+#include "../../include/cllm_format.h"
+#include "../../include/cllm_training.h"
+#include "../../include/cllm_utils.h"
+#include "../../include/cllm_model_manager.h"
+
+#define TEST_MODELS_DIR "/tmp/test_model_manager_training"
+#define TEST_MODEL_PATH TEST_MODELS_DIR "/tiny.cllm"
+#define TEST_MODEL_NAME "tiny"
+#define TEST_NUM_TOKENS 512
+
+// Helper: Write a small model for the manager to load
+static int write_test_model(void) {
+    CLLMConfig config = {
+        .vocab_size = 64,
+        .embedding_dim = 32,
+        .num_layers = 1,
+        .num_heads = 4,
+        .ff_dim = 64,
+        .max_seq_len = 64,
+        .dropout = 0.0f
+    };
+    CLLMModel* model = cllm_create_model(&config);
+    if (!model) return 0;
+    int ok = cllm_write_model(model, TEST_MODEL_PATH) == 0;
+    cllm_free_model(model);
+    return ok;
+}
+
+// Test 1: The manager hands out mapped weights
+int test_loaded_mapped(CLLMModel* model) {
+    printf("Test 1: Manager loads weights as a read-only mapping... ");
+
+    if (model && model->weights_map) {
+        printf("PASS\n");
+        return 1;
+    }
+    printf("FAIL (model=%p, mapped=%d)\n", (void*)model, model && model->weights_map);
+    return 0;
+}
+
+// Test 2: Training init copies the mapped weights
+int test_training_init_writable(CLLMModel* model, CLLMTraining** out) {
+    printf("Test 2: Training init makes the weights writable... ");
+
+    CLLMTrainingConfig config = {
+        .learning_rate = 0.01f,
+        .batch_size = 2,
+        .sequence_length = 8,
+        .num_epochs = 1,
+        .max_steps = 100,
+        .weight_decay = 0.0f,
+        .gradient_clip = 1.0f,
+        .gradient_accumulation_steps = 1,
+        .optimizer = "adam",
+        .lr_scheduler = "none"
+    };
+
+    CLLMTraining* training = cllm_training_init(model, &config);
+    *out = training;
+
+    if (training && !model->weights_map) {
+        printf("PASS\n");
+        return 1;
+    }
+    printf("FAIL (training=%p, still mapped=%d)\n", (void*)training, model->weights_map != NULL);
+    return 0;
+}
+
+// Test 3: An epoch updates the weights in memory, not the file
+int test_train_epoch(CLLMModel* model, CLLMTraining* training) {
+    printf("Test 3: Training an epoch updates the weights... ");
+
+    if (!training) {
+        printf("FAIL (no training context)\n");
+        return 0;
+    }
+
+    size_t bytes = model->num_weights * sizeof(float);
+    float* before = (float*)malloc(bytes);
+    memcpy(before, model->weights, bytes);
+
+    uint32_t* tokens = (uint32_t*)malloc(TEST_NUM_TOKENS * sizeof(uint32_t));
+    for (int i = 0; i < TEST_NUM_TOKENS; i++) {
+        tokens[i] = 1 + (uint32_t)(i * 7) % (model->vocab_size - 1);
+    }
+    training->tokens = tokens;
+    training->num_tokens = TEST_NUM_TOKENS;
+
+    cllm_train_epoch(training);
+    int changed = memcmp(before, model->weights, bytes) != 0;
+
+    // The saved file still holds the original weights
+    CLLMModel* on_disk = cllm_read_model(TEST_MODEL_PATH);
+    int file_intact = on_disk && memcmp(before, on_disk->weights, bytes) == 0;
+    cllm_free_model(on_disk);
+
+    training->tokens = NULL;
+    training->num_tokens = 0;
+    free(tokens);
+    free(before);
+
+    if (changed && file_intact) {
+        printf("PASS\n");
+        return 1;
+    }
+    printf("FAIL (weights changed=%d, file intact=%d)\n", changed, file_intact);
+    return 0;
+}
+
+int main() {
+    printf("\n");
+    printf("╔══════════════════════════════════════════════════════════╗\n");
+    printf("║     Model Manager Training Unit Tests                   ║\n");
+    printf("╚══════════════════════════════════════════════════════════╝\n");
+    printf("\n");
+
+    // The manager loads every model in its directory on init
+    mkdir(TEST_MODELS_DIR, 0755);
+    if (!write_test_model() || !model_manager_init(TEST_MODELS_DIR) ||
+        !model_manager_exists(TEST_MODEL_NAME)) {
+        printf("FAIL: could not set up the model manager\n");
+        unlink(TEST_MODEL_PATH);
+        rmdir(TEST_MODELS_DIR);
+        return 1;
+    }
+
+    // Borrow the model the way the LLM tab does
+    CLLMModel* model = model_manager_acquire_read(TEST_MODEL_NAME);
+
+    int passed = 0;
+    int total = 3;
+    CLLMTraining* training = NULL;
+
+    passed += test_loaded_mapped(model);
+    if (model) {
+        passed += test_training_init_writable(model, &training);
+        passed += test_train_epoch(model, training);
+    }
+
+    if (training) cllm_training_cleanup(training);
+    if (model) model_manager_release_read(TEST_MODEL_NAME);
+    model_manager_cleanup();
+    unlink(TEST_MODEL_PATH);
+    rmdir(TEST_MODELS_DIR);
+
+    printf("\n");
+    printf("═══════════════════════════════════════════════════════════\n");
+    printf("Results: %d/%d tests passed (%.1f%%)\n", passed, total,
+           (float)passed / total * 100.0f);
+    printf("═══════════════════════════════════════════════════════════\n");
+
+    return passed == total ? 0 : 1;
+}
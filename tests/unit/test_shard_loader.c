@@ -0,0 +1,293 @@
+/**
+ * Unit Test: Sharded Streaming Data Loader
+ *
+ * Tests that a corpus streamed through the shard pipeline produces the same
+ * token stream as the in-memory loader, that shards are bounded in size, and
+ * that an interrupted run resumes from its manifest.
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <unistd.h>
+#include <sys/stat.h>
+#include "../../include/cllm_data_loader.h"
+#include "../../include/cllm_tokenizer.h"
+
+#define TEST_CORPUS_DIR "/tmp/test_shard_corpus"
+#define TEST_SHARD_DIR "/tmp/test_shard_output"
+#define TEST_NUM_FILES 12
+#define TEST_SHARD_TOKENS 500
+
+// Helper: Write a small corpus in nested directories
+static void create_corpus(void) {
+    mkdir(TEST_CORPUS_DIR, 0755);
+    mkdir(TEST_CORPUS_DIR "/sub", 0755);
+    
+    for (int i = 0; i < TEST_NUM_FILES; i++) {
+        char path[256];
+        snprintf(path, sizeof(path), "%s/%sdoc_%02d.txt", TEST_CORPUS_DIR, i % 3 == 0 ? "sub/" : "", i);
+        FILE* f = fopen(path, "w");
+        if (!f) continue;
+        for (int j = 0; j < 40 + i * 13; j++) {
+            fprintf(f, "word%d token%d shard%d ", (i * 7 + j) % 50, j % 11, i);
+        }
+        fclose(f);
+    }
+}
+
+// Helper: Remove the shard output directory
+static void clear_shards(void) {
+    char path[256];
+    for (int i = 0; i < 64; i++) {
+        snprintf(path, sizeof(path), "%s/shard_%06d.bin", TEST_SHARD_DIR, i);
+        unlink(path);
+    }
+    unlink(TEST_SHARD_DIR "/" CLLM_SHARD_MANIFEST);
+    rmdir(TEST_SHARD_DIR);
+    mkdir(TEST_SHARD_DIR, 0755);
+}
+
+static void remove_corpus(void) {
+    char path[256];
+    for (int i = 0; i < TEST_NUM_FILES; i++) {
+        snprintf(path, sizeof(path), "%s/%sdoc_%02d.txt", TEST_CORPUS_DIR, i % 3 == 0 ? "sub/" : "", i);
+        unlink(path);
+    }
+    rmdir(TEST_CORPUS_DIR "/sub");
+    rmdir(TEST_CORPUS_DIR);
+    clear_shards();
+    rmdir(TEST_SHARD_DIR);
+}
+
+// Helper: Concatenate every shard in the output directory
+static uint32_t* read_shards(size_t* out_tokens, size_t* out_shards, size_t* out_docs, int* bounded) {
+    uint32_t* all = NULL;
+    size_t total = 0, docs = 0, shards = 0;
+    *bounded = 1;
+    
+    for (;; shards++) {
+        char path[256];
+        snprintf(path, sizeof(path), "%s/shard_%06zu.bin", TEST_SHARD_DIR, shards);
+        if (access(path, F_OK) != 0) break;
+        
+        TokenDataset* shard = cllm_token_dataset_mmap(path);
+        if (!shard) break;
+        if (shard->num_tokens > TEST_SHARD_TOKENS) *bounded = 0;
+        
+        all = (uint32_t*)realloc(all, (total + shard->num_tokens) * sizeof(uint32_t));
+        for (size_t i = 0; i < shard->num_tokens; i++) {
+            all[total++] = cllm_token_dataset_get(shard, i);
+        }
+        docs += shard->num_documents;
+        cllm_token_dataset_free(shard);
+    }
+    
+    *out_tokens = total;
+    *out_shards = shards;
+    *out_docs = docs;
+    return all;
+}
+
+// Helper: Build the reference token stream with the in-memory loader
+static TokenDataset* reference_dataset(CLLMTokenizer* tokenizer) {
+    CLLMDataLoader* loader = cllm_data_loader_create(tokenizer);
+    cllm_data_loader_load_directory(loader, TEST_CORPUS_DIR);
+    TokenDataset* dataset = cllm_data_loader_create_dataset(loader);
+    cllm_data_loader_free(loader);
+    return dataset;
+}
+
+// Helper: Multiset comparison (reference loader order follows readdir)
+static int compare_u32(const void* a, const void* b) {
+    uint32_t x = *(const uint32_t*)a, y = *(const uint32_t*)b;
+    return (x > y) - (x < y);
+}
+
+static int shard_stream(CLLMTokenizer* tokenizer, int workers, CLLMShardStats* stats) {
+    CLLMDataLoader* loader = cllm_data_loader_create(tokenizer);
+    CLLMShardOptions options = {
+        .shard_tokens = TEST_SHARD_TOKENS,
+        .num_workers = workers,
+        .max_in_flight = 3
+    };
+    int rc = cllm_data_loader_shard_directory(loader, TEST_CORPUS_DIR, TEST_SHARD_DIR, &options, stats);
+    cllm_data_loader_free(loader);
+    return rc;
+}
+
+// Test 1: Shards contain the same tokens as the in-memory loader
+int test_matches_in_memory(CLLMTokenizer* tokenizer) {
+    printf("Test 1: Shards match the in-memory dataset... ");
+    
+    clear_shards();
+    CLLMShardStats stats;
+    int rc = shard_stream(tokenizer, 4, &stats);
+    
+    size_t num_tokens = 0, num_shards = 0, num_docs = 0;
+    int bounded = 0;
+    uint32_t* tokens = read_shards(&num_tokens, &num_shards, &num_docs, &bounded);
+    TokenDataset* expected = reference_dataset(tokenizer);
+    
+    int ok = rc == 0 && tokens && expected && num_tokens == expected->num_tokens &&
+             stats.files_processed == TEST_NUM_FILES && stats.tokens_written == num_tokens &&
+             num_shards == stats.shards_written && num_shards > 1 && bounded &&
+             num_docs >= TEST_NUM_FILES;
+    if (ok) {
+        uint32_t* sorted = (uint32_t*)malloc(num_tokens * sizeof(uint32_t));
+        memcpy(sorted, expected->tokens, num_tokens * sizeof(uint32_t));
+        qsort(sorted, num_tokens, sizeof(uint32_t), compare_u32);
+        qsort(tokens, num_tokens, sizeof(uint32_t), compare_u32);
+        ok = memcmp(sorted, tokens, num_tokens * sizeof(uint32_t)) == 0;
+        free(sorted);
+    }
+    
+    free(tokens);
+    cllm_token_dataset_free(expected);
+    
+    if (ok) {
+        printf("PASS (%zu tokens, %zu shards)\n", num_tokens, num_shards);
+        return 1;
+    }
+    printf("FAIL (rc=%d)\n", rc);
+    return 0;
+}
+
+// Test 2: Output is identical regardless of worker count
+int test_deterministic(CLLMTokenizer* tokenizer) {
+    printf("Test 2: Output independent of worker count... ");
+    
+    clear_shards();
+    shard_stream(tokenizer, 1, NULL);
+    size_t n1 = 0, s1 = 0, d1 = 0;
+    int bounded = 0;
+    uint32_t* single = read_shards(&n1, &s1, &d1, &bounded);
+    
+    clear_shards();
+    shard_stream(tokenizer, 8, NULL);
+    size_t n8 = 0, s8 = 0, d8 = 0;
+    uint32_t* multi = read_shards(&n8, &s8, &d8, &bounded);
+    
+    int ok = single && multi && n1 == n8 && s1 == s8 && d1 == d8 &&
+             memcmp(single, multi, n1 * sizeof(uint32_t)) == 0;
+    
+    free(single);
+    free(multi);
+    
+    printf("%s\n", ok ? "PASS" : "FAIL");
+    return ok;
+}
+
+// Test 3: An interrupted run resumes from the manifest
+int test_resume(CLLMTokenizer* tokenizer) {
+    printf("Test 3: Interrupted run resumes from manifest... ");
+    
+    clear_shards();
+    shard_stream(tokenizer, 4, NULL);
+    size_t n_full = 0, s_full = 0, d_full = 0;
+    int bounded = 0;
+    uint32_t* full = read_shards(&n_full, &s_full, &d_full, &bounded);
+    
+    // Simulate a crash after the third shard: keep the config and 3 shard lines
+    FILE* f = fopen(TEST_SHARD_DIR "/" CLLM_SHARD_MANIFEST, "r");
+    char lines[4][512];
+    int kept = 0;
+    while (f && kept < 4 && fgets(lines[kept], sizeof(lines[kept]), f)) kept++;
+    if (f) fclose(f);
+    
+    f = fopen(TEST_SHARD_DIR "/" CLLM_SHARD_MANIFEST, "w");
+    for (int i = 0; f && i < kept; i++) fputs(lines[i], f);
+    if (f) fclose(f);
+    for (size_t i = 3; i < s_full; i++) {
+        char path[256];
+        snprintf(path, sizeof(path), "%s/shard_%06zu.bin", TEST_SHARD_DIR, i);
+        unlink(path);
+    }
+    
+    CLLMShardStats stats;
+    int rc = shard_stream(tokenizer, 4, &stats);
+    size_t n = 0, s = 0, d = 0;
+    uint32_t* resumed = read_shards(&n, &s, &d, &bounded);
+    
+    int ok = kept == 4 && rc == 0 && full && resumed && n == n_full && s == s_full &&
+             stats.shards_written == s_full - 3 && stats.resumed_files > 0 &&
+             memcmp(full, resumed, n * sizeof(uint32_t)) == 0;
+    
+    free(full);
+    free(resumed);
+    
+    if (ok) {
+        printf("PASS (resumed at file %zu)\n", stats.resumed_files);
+        return 1;
+    }
+    printf("FAIL (rc=%d)\n", rc);
+    return 0;
+}
+
+// Test 4: Completed runs are not redone; mismatched vocabularies are refused
+int test_complete_and_mismatch(CLLMTokenizer* tokenizer) {
+    printf("Test 4: Complete manifest skips work, vocab mismatch refused... ");
+    
+    CLLMShardStats stats;
+    int rc_complete = shard_stream(tokenizer, 2, &stats);
+    int skipped = rc_complete == 0 && stats.shards_written == 0;
+    
+    // Truncate to the config line only, then resume with a different vocabulary
+    FILE* f = fopen(TEST_SHARD_DIR "/" CLLM_SHARD_MANIFEST, "r");
+    char config[512] = {0};
+    if (f) {
+        if (!fgets(config, sizeof(config), f)) config[0] = '\0';
+        fclose(f);
+    }
+    f = fopen(TEST_SHARD_DIR "/" CLLM_SHARD_MANIFEST, "w");
+    if (f) {
+        fputs(config, f);
+        fclose(f);
+    }
+    
+    CLLMTokenizer* other = cllm_create_tokenizer(1000);
+    cllm_build_vocab(other, "an entirely different vocabulary");
+    int rc_mismatch = shard_stream(other, 2, NULL);
+    cllm_free_tokenizer(other);
+    
+    int ok = skipped && rc_mismatch == -1;
+    printf("%s\n", ok ? "PASS" : "FAIL");
+    return ok;
+}
+
+int main() {
+    printf("\n");
+    printf("╔══════════════════════════════════════════════════════════╗\n");
+    printf("║     Sharded Data Loader Unit Tests                      ║\n");
+    printf("╚══════════════════════════════════════════════════════════╝\n");
+    printf("\n");
+    
+    create_corpus();
+    
+    // Vocabulary from the whole corpus via the in-memory path
+    CLLMTokenizer* tokenizer = cllm_create_tokenizer(1000);
+    CLLMDataLoader* loader = cllm_data_loader_create(tokenizer);
+    cllm_data_loader_load_directory(loader, TEST_CORPUS_DIR);
+    cllm_data_loader_build_vocab(loader);
+    cllm_data_loader_free(loader);
+    
+    int passed = 0;
+    int total = 4;
+    
+    passed += test_matches_in_memory(tokenizer);
+    passed += test_deterministic(tokenizer);
+    passed += test_resume(tokenizer);
+    passed += test_complete_and_mismatch(tokenizer);
+    
+    cllm_free_tokenizer(tokenizer);
+    remove_corpus();
+    
+    printf("\n");
+    printf("═══════════════════════════════════════════════════════════\n");
+    printf("Results: %d/%d tests passed (%.1f%%)\n", passed, total,
+           (float)passed / total * 100.0f);
+    printf("═══════════════════════════════════════════════════════════\n");
+    printf("\n");
+    
+    return (passed == total) ? 0 : 1;
+}
@@ -0,0 +1,278 @@
+/**
+ * Unit Test: Crawler Pipeline Stage Queues
+ *
+ * Tests that a stage queue shared by several producer and consumer threads
+ * delivers every document exactly once within its bound, that close wakes
+ * blocked threads, that timeouts are honoured, and that recovery requeues
+ * (or processes inline) the documents left on disk.
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <unistd.h>
+#include <pthread.h>
+#include <stdatomic.h>
+#include <time.h>
+#include <utime.h>
+#include <sys/stat.h>
+#include "../../src/crawler/stage_queue.h"
+
+#define TEST_PRODUCERS 4
+#define TEST_CONSUMERS 4
+#define TEST_DOCS_PER_PRODUCER 5000
+#define TEST_CAPACITY 16
+#define TEST_TOTAL_DOCS (TEST_PRODUCERS * TEST_DOCS_PER_PRODUCER)
+#define TEST_RECOVER_DIR "/tmp/test_stage_queue"
+#define TEST_RECOVER_FILES 10
+
+typedef struct {
+    StageQueue* queue;
+    int id;
+    atomic_int* seen;       // Times each document was popped
+    atomic_int* popped;
+    int failed;
+} WorkerArgs;
+
+static double now_ms(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return ts.tv_sec * 1000.0 + ts.tv_nsec / 1e6;
+}
+
+static void* producer(void* arg) {
+    WorkerArgs* args = (WorkerArgs*)arg;
+    for (int i = 0; i < TEST_DOCS_PER_PRODUCER; i++) {
+        char path[64];
+        snprintf(path, sizeof(path), "doc/%d", args->id * TEST_DOCS_PER_PRODUCER + i);
+        StageDoc* doc = stage_doc_create(path);
+        if (!doc || stage_queue_push(args->queue, doc, -1) != 0) {
+            stage_doc_free(doc);
+            args->failed = 1;
+            break;
+        }
+    }
+    return NULL;
+}
+
+static void* consumer(void* arg) {
+    WorkerArgs* args = (WorkerArgs*)arg;
+    StageDoc* doc;
+    while ((doc = stage_queue_pop(args->queue, -1)) != NULL) {
+        int index = atoi(doc->path + 4);
+        if (index < 0 || index >= TEST_TOTAL_DOCS) {
+            args->failed = 1;
+        } else {
+            atomic_fetch_add(&args->seen[index], 1);
+        }
+        atomic_fetch_add(args->popped, 1);
+        stage_doc_free(doc);
+    }
+    return NULL;
+}
+
+// Test 1: Many producers and consumers, every document delivered once
+int test_mpmc(void) {
+    printf("Test 1: Multi-producer/multi-consumer delivery... ");
+
+    StageQueue* queue = stage_queue_create(TEST_CAPACITY);
+    atomic_int* seen = (atomic_int*)calloc(TEST_TOTAL_DOCS, sizeof(atomic_int));
+    atomic_int popped = 0;
+
+    pthread_t producers[TEST_PRODUCERS], consumers[TEST_CONSUMERS];
+    WorkerArgs pargs[TEST_PRODUCERS], cargs[TEST_CONSUMERS];
+    for (int i = 0; i < TEST_CONSUMERS; i++) {
+        cargs[i] = (WorkerArgs){ queue, i, seen, &popped, 0 };
+        pthread_create(&consumers[i], NULL, consumer, &cargs[i]);
+    }
+    for (int i = 0; i < TEST_PRODUCERS; i++) {
+        pargs[i] = (WorkerArgs){ queue, i, seen, &popped, 0 };
+        pthread_create(&producers[i], NULL, producer, &pargs[i]);
+    }
+    for (int i = 0; i < TEST_PRODUCERS; i++) pthread_join(producers[i], NULL);
+
+    // Closed queues are not drained, so wait for the consumers first
+    double deadline = now_ms() + 10000.0;
+    while (atomic_load(&popped) < TEST_TOTAL_DOCS && now_ms() < deadline) usleep(1000);
+    stage_queue_close(queue);
+    for (int i = 0; i < TEST_CONSUMERS; i++) pthread_join(consumers[i], NULL);
+
+    int ok = atomic_load(&popped) == TEST_TOTAL_DOCS;
+    for (int i = 0; i < TEST_PRODUCERS; i++) ok = ok && !pargs[i].failed;
+    for (int i = 0; i < TEST_CONSUMERS; i++) ok = ok && !cargs[i].failed;
+    int duplicates = 0, missing = 0;
+    for (int i = 0; i < TEST_TOTAL_DOCS; i++) {
+        if (atomic_load(&seen[i]) == 0) missing++;
+        if (atomic_load(&seen[i]) > 1) duplicates++;
+    }
+
+    StageQueueStats stats;
+    stage_queue_get_stats(queue, &stats);
+    ok = ok && missing == 0 && duplicates == 0 && stats.pushed == TEST_TOTAL_DOCS &&
+         stats.popped == TEST_TOTAL_DOCS && stats.depth == 0 && stats.max_depth <= TEST_CAPACITY;
+
+    free(seen);
+    stage_queue_destroy(queue);
+
+    if (ok) {
+        printf("PASS (%d docs, max depth %zu)\n", TEST_TOTAL_DOCS, stats.max_depth);
+        return 1;
+    }
+    printf("FAIL (popped=%d, missing=%d, duplicates=%d, max_depth=%zu)\n",
+           atomic_load(&popped), missing, duplicates, stats.max_depth);
+    return 0;
+}
+
+static void* blocked_push(void* arg) {
+    StageQueue* queue = (StageQueue*)arg;
+    StageDoc* doc = stage_doc_create("blocked");
+    int rc = stage_queue_push(queue, doc, -1);
+    if (rc != 0) stage_doc_free(doc);
+    return (void*)(intptr_t)rc;
+}
+
+// Test 2: Close wakes a producer blocked on a full queue
+int test_close_wakes(void) {
+    printf("Test 2: Close wakes blocked producers... ");
+
+    StageQueue* queue = stage_queue_create(1);
+    stage_queue_push(queue, stage_doc_create("first"), -1);
+
+    pthread_t thread;
+    pthread_create(&thread, NULL, blocked_push, queue);
+    usleep(50000);
+    double start = now_ms();
+    stage_queue_close(queue);
+    void* result;
+    pthread_join(thread, &result);
+    double woke_ms = now_ms() - start;
+
+    StageDoc* doc = stage_queue_pop(queue, 0);
+    int ok = (intptr_t)result == -1 && woke_ms < 500.0 && doc == NULL &&
+             stage_queue_is_closed(queue);
+
+    stage_doc_free(doc);
+    stage_queue_destroy(queue);  // Frees "first"
+
+    if (ok) {
+        printf("PASS (woke in %.1f ms)\n", woke_ms);
+        return 1;
+    }
+    printf("FAIL (rc=%d, woke in %.1f ms)\n", (int)(intptr_t)result, woke_ms);
+    return 0;
+}
+
+// Test 3: Timed push and pop give up after their timeout
+int test_timeouts(void) {
+    printf("Test 3: Push and pop timeouts... ");
+
+    StageQueue* queue = stage_queue_create(1);
+
+    double start = now_ms();
+    StageDoc* none = stage_queue_pop(queue, 50);
+    double pop_ms = now_ms() - start;
+
+    stage_queue_push(queue, stage_doc_create("fill"), 0);
+    StageDoc* extra = stage_doc_create("extra");
+    start = now_ms();
+    int rc = stage_queue_push(queue, extra, 50);
+    double push_ms = now_ms() - start;
+
+    int ok = none == NULL && pop_ms >= 45.0 && pop_ms < 500.0 &&
+             rc == -1 && push_ms >= 45.0 && push_ms < 500.0 &&
+             stage_queue_space(queue) == 0 && stage_queue_depth(queue) == 1;
+
+    stage_doc_free(extra);
+    stage_queue_destroy(queue);
+
+    if (ok) {
+        printf("PASS\n");
+        return 1;
+    }
+    printf("FAIL (pop %.1f ms, push rc=%d in %.1f ms)\n", pop_ms, rc, push_ms);
+    return 0;
+}
+
+static bool skip_first(const char* path, void* user_data) {
+    (void)user_data;
+    return strstr(path, "/doc_0.txt") == NULL;
+}
+
+static void count_inline(StageDoc* doc, void* user_data) {
+    (*(int*)user_data)++;
+    stage_doc_free(doc);
+}
+
+// Test 4: Recovery requeues old files and processes the overflow inline
+int test_recover(void) {
+    printf("Test 4: Recovery of documents left on disk... ");
+
+    mkdir(TEST_RECOVER_DIR, 0755);
+    struct utimbuf old_time = { .actime = time(NULL) - 60, .modtime = time(NULL) - 60 };
+    for (int i = 0; i < TEST_RECOVER_FILES; i++) {
+        char path[256];
+        snprintf(path, sizeof(path), "%s/doc_%d.txt", TEST_RECOVER_DIR, i);
+        FILE* f = fopen(path, "w");
+        if (f) {
+            fputs("text", f);
+            fclose(f);
+        }
+        utime(path, &old_time);
+    }
+    // Newer than the cutoff and wrong extension: both left alone
+    FILE* f = fopen(TEST_RECOVER_DIR "/fresh.txt", "w");
+    if (f) fclose(f);
+    f = fopen(TEST_RECOVER_DIR "/other.tok", "w");
+    if (f) fclose(f);
+    utime(TEST_RECOVER_DIR "/other.tok", &old_time);
+
+    StageQueue* queue = stage_queue_create(4);
+    int handled = 0;
+    int recovered = stage_queue_recover(queue, TEST_RECOVER_DIR, ".txt", time(NULL) - 1,
+                                        skip_first, count_inline, &handled);
+    size_t queued = stage_queue_depth(queue);
+
+    int ok = recovered == TEST_RECOVER_FILES - 1 && queued == 4 &&
+             (size_t)handled + queued == (size_t)recovered;
+
+    stage_queue_destroy(queue);
+    for (int i = 0; i < TEST_RECOVER_FILES; i++) {
+        char path[256];
+        snprintf(path, sizeof(path), "%s/doc_%d.txt", TEST_RECOVER_DIR, i);
+        unlink(path);
+    }
+    unlink(TEST_RECOVER_DIR "/fresh.txt");
+    unlink(TEST_RECOVER_DIR "/other.tok");
+    rmdir(TEST_RECOVER_DIR);
+
+    if (ok) {
+        printf("PASS (%d recovered, %d processed inline)\n", recovered, handled);
+        return 1;
+    }
+    printf("FAIL (recovered=%d, queued=%zu, handled=%d)\n", recovered, queued, handled);
+    return 0;
+}
+
+int main() {
+    printf("\n");
+    printf("╔══════════════════════════════════════════════════════════╗\n");
+    printf("║     Stage Queue Unit Tests                              ║\n");
+    printf("╚══════════════════════════════════════════════════════════╝\n");
+    printf("\n");
+
+    int passed = 0;
+    int total = 4;
+
+    passed += test_mpmc();
+    passed += test_close_wakes();
+    passed += test_timeouts();
+    passed += test_recover();
+
+    printf("\n");
+    printf("═══════════════════════════════════════════════════════════\n");
+    printf("Results: %d/%d tests passed (%.1f%%)\n", passed, total,
+           (float)passed / total * 100.0f);
+    printf("═══════════════════════════════════════════════════════════\n");
+
+    return passed == total ? 0 : 1;
+}
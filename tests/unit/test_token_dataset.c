@@ -0,0 +1,299 @@
+/**
+ * Unit Test: Token Dataset File Format
+ *
+ * Tests the versioned dataset format: save/load round trips at both token
+ * widths, zero-copy mmap, batch iteration over mapped data, the legacy
+ * headerless format and rejection of damaged files.
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <unistd.h>
+#include <sys/stat.h>
+#include "../../include/cllm_data_loader.h"
+#include "../../include/cllm_batch.h"
+
+#define TEST_NUM_TOKENS 10000
+#define TEST_NUM_DOCS 7
+#define TEST_FILE "/tmp/test_token_dataset.bin"
+
+// Helper: Build an owned dataset with document boundaries
+static TokenDataset* create_test_dataset(uint32_t max_token) {
+    TokenDataset* dataset = (TokenDataset*)calloc(1, sizeof(TokenDataset));
+    dataset->num_tokens = TEST_NUM_TOKENS;
+    dataset->capacity = TEST_NUM_TOKENS;
+    dataset->tokens = (uint32_t*)malloc(TEST_NUM_TOKENS * sizeof(uint32_t));
+    for (size_t i = 0; i < TEST_NUM_TOKENS; i++) {
+        dataset->tokens[i] = (uint32_t)((i * 2654435761u) % max_token);
+    }
+    
+    dataset->num_documents = TEST_NUM_DOCS;
+    dataset->doc_offsets = (uint64_t*)malloc((TEST_NUM_DOCS + 1) * sizeof(uint64_t));
+    for (size_t i = 0; i <= TEST_NUM_DOCS; i++) {
+        dataset->doc_offsets[i] = i * TEST_NUM_TOKENS / TEST_NUM_DOCS;
+    }
+    dataset->vocab_hash = 0xC0FFEE;
+    dataset->token_width = 4;
+    return dataset;
+}
+
+// Helper: Compare token streams and doc index
+static int datasets_equal(const TokenDataset* a, const TokenDataset* b) {
+    if (a->num_tokens != b->num_tokens || a->vocab_hash != b->vocab_hash) return 0;
+    if (a->num_documents != b->num_documents) return 0;
+    for (size_t i = 0; i < a->num_tokens; i++) {
+        if (cllm_token_dataset_get(a, i) != cllm_token_dataset_get(b, i)) return 0;
+    }
+    for (size_t i = 0; a->doc_offsets && i <= a->num_documents; i++) {
+        if (!b->doc_offsets || a->doc_offsets[i] != b->doc_offsets[i]) return 0;
+    }
+    return 1;
+}
+
+// Test 1: 32-bit save/load round trip
+int test_roundtrip_32() {
+    printf("Test 1: 32-bit save/load round trip... ");
+    
+    TokenDataset* original = create_test_dataset(1000000);
+    int saved = cllm_token_dataset_save(original, TEST_FILE);
+    TokenDataset* loaded = cllm_token_dataset_load(TEST_FILE);
+    int ok = saved && loaded && datasets_equal(original, loaded);
+    
+    cllm_token_dataset_free(original);
+    cllm_token_dataset_free(loaded);
+    
+    printf("%s\n", ok ? "PASS" : "FAIL");
+    return ok;
+}
+
+// Test 2: 16-bit storage, loaded and mapped
+int test_roundtrip_16() {
+    printf("Test 2: 16-bit save, load and mmap... ");
+    
+    TokenDataset* original = create_test_dataset(50000);
+    int saved = cllm_token_dataset_save_ex(original, TEST_FILE, 2);
+    long file_size = 0;
+    FILE* f = fopen(TEST_FILE, "rb");
+    if (f) {
+        fseek(f, 0, SEEK_END);
+        file_size = ftell(f);
+        fclose(f);
+    }
+    
+    TokenDataset* loaded = cllm_token_dataset_load(TEST_FILE);
+    TokenDataset* mapped = cllm_token_dataset_mmap(TEST_FILE);
+    int ok = saved && loaded && mapped &&
+             datasets_equal(original, loaded) && datasets_equal(original, mapped) &&
+             mapped->tokens == NULL && mapped->tokens16 != NULL &&
+             file_size < (long)(TEST_NUM_TOKENS * sizeof(uint32_t));
+    
+    cllm_token_dataset_free(original);
+    cllm_token_dataset_free(loaded);
+    cllm_token_dataset_free(mapped);
+    
+    printf("%s\n", ok ? "PASS" : "FAIL");
+    return ok;
+}
+
+// Test 3: 16-bit save rejects large token IDs
+int test_width_overflow() {
+    printf("Test 3: 16-bit save rejects token IDs >= 65536... ");
+    
+    TokenDataset* original = create_test_dataset(1000000);
+    int saved = cllm_token_dataset_save_ex(original, TEST_FILE, 2);
+    cllm_token_dataset_free(original);
+    
+    printf("%s\n", !saved ? "PASS" : "FAIL");
+    return !saved;
+}
+
+// Test 4: Batches from a mapped dataset match the in-memory source
+int test_mapped_batches() {
+    printf("Test 4: Mapped dataset feeds batch iterator... ");
+    
+    TokenDataset* original = create_test_dataset(1000000);
+    cllm_token_dataset_save(original, TEST_FILE);
+    TokenDataset* mapped = cllm_token_dataset_mmap(TEST_FILE);
+    
+    CLLMBatchIterator* expected = cllm_batch_iterator_create(original->tokens, original->num_tokens,
+                                                             4, 32, 0, 0);
+    CLLMBatchIterator* actual = mapped ? cllm_batch_iterator_create_from_dataset(mapped, 4, 32, 0, 0) : NULL;
+    
+    int ok = expected && actual;
+    int batches = 0;
+    while (ok) {
+        CLLMBatch* a = cllm_batch_iterator_next(expected);
+        CLLMBatch* b = cllm_batch_iterator_next(actual);
+        if (!a || !b) {
+            ok = (a == NULL && b == NULL);
+            cllm_batch_free(a);
+            cllm_batch_free(b);
+            break;
+        }
+        size_t n = (size_t)a->batch_size * a->seq_len;
+        ok = a->num_valid_tokens == b->num_valid_tokens &&
+             memcmp(a->input_ids, b->input_ids, n * sizeof(uint32_t)) == 0 &&
+             memcmp(a->target_ids, b->target_ids, n * sizeof(uint32_t)) == 0;
+        cllm_batch_free(a);
+        cllm_batch_free(b);
+        batches++;
+    }
+    
+    cllm_batch_iterator_free(expected);
+    cllm_batch_iterator_free(actual);
+    cllm_token_dataset_free(mapped);
+    cllm_token_dataset_free(original);
+    
+    if (ok && batches > 0) {
+        printf("PASS (%d batches)\n", batches);
+        return 1;
+    }
+    printf("FAIL\n");
+    return 0;
+}
+
+// Test 5: Legacy headerless files still load and map
+int test_legacy_format() {
+    printf("Test 5: Legacy format load and mmap... ");
+    
+    TokenDataset* original = create_test_dataset(1000000);
+    FILE* f = fopen(TEST_FILE, "wb");
+    if (!f) {
+        printf("FAIL (cannot write file)\n");
+        cllm_token_dataset_free(original);
+        return 0;
+    }
+    fwrite(&original->num_tokens, sizeof(size_t), 1, f);
+    fwrite(original->tokens, sizeof(uint32_t), original->num_tokens, f);
+    fclose(f);
+    
+    TokenDataset* loaded = cllm_token_dataset_load(TEST_FILE);
+    TokenDataset* mapped = cllm_token_dataset_mmap(TEST_FILE);
+    
+    int ok = loaded && mapped && loaded->num_tokens == original->num_tokens &&
+             mapped->num_tokens == original->num_tokens &&
+             memcmp(loaded->tokens, original->tokens, original->num_tokens * sizeof(uint32_t)) == 0 &&
+             memcmp(mapped->tokens, original->tokens, original->num_tokens * sizeof(uint32_t)) == 0;
+    
+    cllm_token_dataset_free(original);
+    cllm_token_dataset_free(loaded);
+    cllm_token_dataset_free(mapped);
+    
+    printf("%s\n", ok ? "PASS" : "FAIL");
+    return ok;
+}
+
+// Test 6: Truncated files are rejected
+int test_truncated_file() {
+    printf("Test 6: Truncated file is rejected... ");
+    
+    TokenDataset* original = create_test_dataset(1000000);
+    cllm_token_dataset_save(original, TEST_FILE);
+    cllm_token_dataset_free(original);
+    
+    int ok = truncate(TEST_FILE, 4096) == 0;
+    TokenDataset* loaded = cllm_token_dataset_load(TEST_FILE);
+    TokenDataset* mapped = cllm_token_dataset_mmap(TEST_FILE);
+    ok = ok && !loaded && !mapped;
+    
+    cllm_token_dataset_free(loaded);
+    cllm_token_dataset_free(mapped);
+    
+    printf("%s\n", ok ? "PASS" : "FAIL");
+    return ok;
+}
+
+// Test 7: Doc indexes that decrease or run past the tokens are rejected
+int test_invalid_doc_index() {
+    printf("Test 7: Invalid doc index is rejected... ");
+    
+    TokenDataset* original = create_test_dataset(1000000);
+    int ok = 1;
+    for (int variant = 0; ok && variant < 2; variant++) {
+        if (variant == 0) {
+            original->doc_offsets[3] = original->doc_offsets[1];  // Goes backwards
+        } else {
+            original->doc_offsets[3] = original->doc_offsets[2];  // Restore order
+            original->doc_offsets[TEST_NUM_DOCS] = TEST_NUM_TOKENS + 1;
+        }
+        ok = cllm_token_dataset_save(original, TEST_FILE);
+        
+        TokenDataset* loaded = cllm_token_dataset_load(TEST_FILE);
+        TokenDataset* mapped = cllm_token_dataset_mmap(TEST_FILE);
+        ok = ok && !loaded && !mapped;
+        cllm_token_dataset_free(loaded);
+        cllm_token_dataset_free(mapped);
+    }
+    cllm_token_dataset_free(original);
+    
+    printf("%s\n", ok ? "PASS" : "FAIL");
+    return ok;
+}
+
+// Test 8: Paths with no room for the temporary file suffix are rejected
+int test_long_path() {
+    printf("Test 8: Path too long for the temporary file is rejected... ");
+    
+    // Nested directories keep every component under NAME_MAX
+    char dir[900] = "/tmp";
+    char component[201];
+    memset(component, 'd', 200);
+    component[200] = '\0';
+    for (int i = 0; i < 4; i++) {
+        strcat(dir, "/");
+        strcat(dir, component);
+        mkdir(dir, 0755);
+    }
+    
+    // Fits in the save buffer, but not with ".tmp" appended
+    char path[1024];
+    snprintf(path, sizeof(path), "%s/", dir);
+    size_t len = strlen(path);
+    memset(path + len, 'f', sizeof(path) - 2 - len);
+    path[sizeof(path) - 2] = '\0';
+    
+    TokenDataset* original = create_test_dataset(1000000);
+    int ok = !cllm_token_dataset_save(original, path) && access(path, F_OK) != 0;
+    cllm_token_dataset_free(original);
+    
+    unlink(path);
+    for (int i = 0; i < 4; i++) {
+        rmdir(dir);
+        *strrchr(dir, '/') = '\0';
+    }
+    
+    printf("%s\n", ok ? "PASS" : "FAIL");
+    return ok;
+}
+
+int main() {
+    printf("\n");
+    printf("╔══════════════════════════════════════════════════════════╗\n");
+    printf("║     Token Dataset Format Unit Tests                     ║\n");
+    printf("╚══════════════════════════════════════════════════════════╝\n");
+    printf("\n");
+    
+    int passed = 0;
+    int total = 8;
+    
+    passed += test_roundtrip_32();
+    passed += test_roundtrip_16();
+    passed += test_width_overflow();
+    passed += test_mapped_batches();
+    passed += test_legacy_format();
+    passed += test_truncated_file();
+    passed += test_invalid_doc_index();
+    passed += test_long_path();
+    
+    unlink(TEST_FILE);
+    
+    printf("\n");
+    printf("═══════════════════════════════════════════════════════════\n");
+    printf("Results: %d/%d tests passed (%.1f%%)\n", passed, total,
+           (float)passed / total * 100.0f);
+    printf("═══════════════════════════════════════════════════════════\n");
+    printf("\n");
+    
+    return (passed == total) ? 0 : 1;
+}
@@ -0,0 +1,227 @@
+/**
+ * Unit Test: Crawler URL Frontier
+ *
+ * Tests that crawler_url_manager_get_next keeps handing out URLs from other
+ * domains when one domain dominates the frontier and is over its crawl
+ * budget, that leased URLs are buffered instead of being returned to the
+ * database on every pick, that unpicked leases go back to pending when
+ * the manager is destroyed, that a new run releases the URLs an earlier
+ * one left 'crawling', and that batch adds report which URLs went in.
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <unistd.h>
+#include <sys/stat.h>
+#include "../../src/crawler/crawler_url_manager.h"
+
+#define TEST_DATA_DIR "/tmp/test_url_frontier"
+#define TEST_DOMINANT_URLS 300
+#define TEST_OTHER_URLS 3
+#define TEST_BURST 2
+
+static const char* OTHER_DOMAINS[] = { "a.example.org", "b.example.net" };
+
+// Helper: Remove everything the manager writes to its data directory
+static void clear_data_dir(void) {
+    const char* files[] = { "urls.db", "urls.db-wal", "urls.db-shm",
+                            "url_filter.conf", "url_blocker.txt" };
+    char path[256];
+    for (size_t i = 0; i < sizeof(files) / sizeof(files[0]); i++) {
+        snprintf(path, sizeof(path), "%s/%s", TEST_DATA_DIR, files[i]);
+        unlink(path);
+    }
+    rmdir(TEST_DATA_DIR);
+}
+
+// Helper: Queue the dominant domain first, so it fills the head of the frontier
+static int fill_frontier(CrawlerURLManager* manager) {
+    char* urls[TEST_DOMINANT_URLS];
+    for (int i = 0; i < TEST_DOMINANT_URLS; i++) {
+        urls[i] = (char*)malloc(128);
+        snprintf(urls[i], 128, "https://big.example.com/page/%d", i);
+    }
+    int added = crawler_url_manager_add_batch(manager, urls, TEST_DOMINANT_URLS, "https://big.example.com/", NULL);
+    for (int i = 0; i < TEST_DOMINANT_URLS; i++) free(urls[i]);
+
+    for (int d = 0; d < 2; d++) {
+        for (int i = 0; i < TEST_OTHER_URLS; i++) {
+            char url[128];
+            snprintf(url, sizeof(url), "https://%s/article/%d", OTHER_DOMAINS[d], i);
+            if (crawler_url_manager_add(manager, url, "https://big.example.com/") == 0) added++;
+        }
+    }
+
+    return added;
+}
+
+static int count_status(URLDatabase* db, const char* status) {
+    char filter[64];
+    snprintf(filter, sizeof(filter), "status = '%s'", status);
+    int count = 0;
+    URLEntry** entries = url_db_query(db, filter, &count);
+    if (entries) url_db_free_entries(entries, count);
+    return count;
+}
+
+// Test 1: Other domains are reached while the dominant one is over budget
+int test_dominant_domain(CrawlerURLManager* manager) {
+    printf("Test 1: Dominant domain does not starve the frontier... ");
+
+    // Effectively no refill during the test: each domain gets its burst
+    url_priority_set_domain_budget(crawler_url_manager_get_priority(manager), 0.0001, TEST_BURST);
+
+    int dominant = 0;
+    int other[2] = {0, 0};
+    int picked = 0;
+    URLEntry* entry;
+    while (picked < 100 && (entry = crawler_url_manager_get_next(manager)) != NULL) {
+        if (strcmp(entry->domain, "big.example.com") == 0) dominant++;
+        for (int d = 0; d < 2; d++) {
+            if (strcmp(entry->domain, OTHER_DOMAINS[d]) == 0) other[d]++;
+        }
+        url_db_free_entry(entry);
+        picked++;
+    }
+
+    int ok = dominant == TEST_BURST && other[0] == TEST_BURST && other[1] == TEST_BURST;
+    if (ok) {
+        printf("PASS (%d picks before every domain ran out of budget)\n", picked);
+        return 1;
+    }
+    printf("FAIL (dominant=%d, %s=%d, %s=%d)\n", dominant,
+           OTHER_DOMAINS[0], other[0], OTHER_DOMAINS[1], other[1]);
+    return 0;
+}
+
+// Test 2: Unpicked leases stay buffered, not bounced back to pending
+int test_leases_buffered(CrawlerURLManager* manager, URLDatabase* observer) {
+    printf("Test 2: Leased URLs are buffered between picks... ");
+
+    url_priority_set_domain_budget(crawler_url_manager_get_priority(manager), 0.0, 1.0);
+
+    int before = count_status(observer, "pending");
+    URLEntry* first = crawler_url_manager_get_next(manager);
+    int after_first = count_status(observer, "pending");
+    URLEntry* second = crawler_url_manager_get_next(manager);
+    int after_second = count_status(observer, "pending");
+
+    // Both picks come from URLs leased during test 1: no row changes state
+    int ok = first && second && first->id != second->id &&
+             after_first == before && after_second == before;
+
+    if (first) url_db_free_entry(first);
+    if (second) url_db_free_entry(second);
+
+    if (ok) {
+        printf("PASS\n");
+        return 1;
+    }
+    printf("FAIL (pending %d -> %d -> %d)\n", before, after_first, after_second);
+    return 0;
+}
+
+// Test 3: Destroying the manager returns its buffered leases
+int test_release_on_destroy(CrawlerURLManager* manager, URLDatabase* observer, int picked) {
+    printf("Test 3: Buffered leases return to pending on destroy... ");
+
+    int total = url_db_count_total(observer);
+    crawler_url_manager_destroy(manager);
+
+    int pending = count_status(observer, "pending");
+    int crawling = count_status(observer, "crawling");
+
+    if (pending == total - picked && crawling == picked) {
+        printf("PASS\n");
+        return 1;
+    }
+    printf("FAIL (pending=%d, crawling=%d, picked=%d)\n", pending, crawling, picked);
+    return 0;
+}
+
+// Test 4: A new run releases the leases the previous one never finished
+int test_release_stale_leases(URLDatabase* observer, int total) {
+    printf("Test 4: Stale leases are released on the next run... ");
+
+    CrawlerURLManager* manager = crawler_url_manager_create(TEST_DATA_DIR);
+    int released = crawler_url_manager_release_leases(manager);
+    int pending = count_status(observer, "pending");
+    crawler_url_manager_destroy(manager);
+
+    if (released > 0 && pending == total) {
+        printf("PASS (%d released)\n", released);
+        return 1;
+    }
+    printf("FAIL (released=%d, pending=%d of %d)\n", released, pending, total);
+    return 0;
+}
+
+// Test 5: Batch adds flag only the URLs actually inserted
+int test_batch_inserted(void) {
+    printf("Test 5: Batch add reports inserted URLs... ");
+
+    CrawlerURLManager* manager = crawler_url_manager_create(TEST_DATA_DIR);
+    url_filter_add_domain_blacklist(crawler_url_manager_get_filter(manager), "blocked.example.com");
+
+    char* urls[] = { "https://new.example.com/page",          // Inserted
+                     "https://big.example.com/page/0",        // Already queued
+                     "https://blocked.example.com/page" };    // Filtered out
+    bool inserted[3] = { false, true, true };
+    int added = crawler_url_manager_add_batch(manager, urls, 3, NULL, inserted);
+    crawler_url_manager_destroy(manager);
+
+    if (added == 1 && inserted[0] && !inserted[1] && !inserted[2]) {
+        printf("PASS\n");
+        return 1;
+    }
+    printf("FAIL (added=%d, inserted=%d%d%d)\n", added, inserted[0], inserted[1], inserted[2]);
+    return 0;
+}
+
+int main() {
+    printf("\n");
+    printf("╔══════════════════════════════════════════════════════════╗\n");
+    printf("║     Crawler URL Frontier Unit Tests                     ║\n");
+    printf("╚══════════════════════════════════════════════════════════╝\n");
+    printf("\n");
+
+    clear_data_dir();
+
+    CrawlerURLManager* manager = crawler_url_manager_create(TEST_DATA_DIR);
+    if (!manager) {
+        printf("FAIL: could not create URL manager\n");
+        return 1;
+    }
+
+    int total = fill_frontier(manager);
+    if (total != TEST_DOMINANT_URLS + 2 * TEST_OTHER_URLS) {
+        printf("FAIL: only %d URLs queued\n", total);
+        crawler_url_manager_destroy(manager);
+        clear_data_dir();
+        return 1;
+    }
+
+    // Second connection to watch the database from outside the manager
+    URLDatabase* observer = url_db_open(TEST_DATA_DIR "/urls.db");
+
+    int passed = 0;
+    int tests = 5;
+
+    passed += test_dominant_domain(manager);
+    passed += test_leases_buffered(manager, observer);
+    passed += test_release_on_destroy(manager, observer, 3 * TEST_BURST + 2);
+    passed += test_release_stale_leases(observer, total);
+    passed += test_batch_inserted();
+
+    url_db_close(observer);
+    clear_data_dir();
+
+    printf("\n");
+    printf("═══════════════════════════════════════════════════════════\n");
+    printf("Results: %d/%d tests passed (%.1f%%)\n", passed, tests,
+           (float)passed / tests * 100.0f);
+    printf("═══════════════════════════════════════════════════════════\n");
+
+    return passed == tests ? 0 : 1;
+}
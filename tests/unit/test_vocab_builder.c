@@ -0,0 +1,198 @@
+/**
+ * Unit Test: Parallel Vocabulary Builder
+ *
+ * Tests that map-reduce counting matches the serial builder, that token IDs
+ * do not depend on the thread count, that pruning keeps the most frequent
+ * tokens, and that file input matches text input.
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <unistd.h>
+#include "../../include/cllm_tokenizer.h"
+#include "../../include/cllm_vocab_builder.h"
+
+#define TEST_NUM_DOCS 16
+#define TEST_WORDS_PER_DOC 20000
+#define TEST_FILE "/tmp/test_vocab_builder.txt"
+
+// Helper: Generate documents with a skewed word distribution and mixed case
+static char** create_documents(void) {
+    char** docs = (char**)malloc(TEST_NUM_DOCS * sizeof(char*));
+    for (int d = 0; d < TEST_NUM_DOCS; d++) {
+        docs[d] = (char*)malloc(TEST_WORDS_PER_DOC * 16 + 1);
+        size_t pos = 0;
+        for (int i = 0; i < TEST_WORDS_PER_DOC; i++) {
+            double u = (double)rand() / RAND_MAX;
+            int word_id = (int)(u * u * 5000);
+            const char* sep = (i % 17 == 0) ? "\n" : (i % 5 == 0) ? "\t" : " ";
+            pos += sprintf(docs[d] + pos, "%s%d%s", word_id % 3 == 0 ? "Tok" : "tok", word_id, sep);
+        }
+        docs[d][pos] = '\0';
+    }
+    return docs;
+}
+
+static void free_documents(char** docs) {
+    for (int d = 0; d < TEST_NUM_DOCS; d++) free(docs[d]);
+    free(docs);
+}
+
+// Helper: Parallel build into a fresh tokenizer
+static CLLMTokenizer* build_parallel(char** docs, uint32_t max_vocab, int threads) {
+    CLLMTokenizer* tokenizer = cllm_create_tokenizer(max_vocab);
+    cllm_build_vocab_parallel(tokenizer, (const char* const*)docs, TEST_NUM_DOCS, threads);
+    return tokenizer;
+}
+
+// Helper: Identical token strings, IDs and counts
+static int tokenizers_equal(CLLMTokenizer* a, CLLMTokenizer* b) {
+    if (a->vocab_size != b->vocab_size) return 0;
+    for (uint32_t i = 0; i < a->vocab_size; i++) {
+        if (strcmp(a->vocab[i], b->vocab[i]) != 0) return 0;
+        if (a->token_counts[i] != b->token_counts[i]) return 0;
+    }
+    return 1;
+}
+
+// Test 1: Same tokens and counts as the serial builder
+int test_matches_serial(char** docs) {
+    printf("Test 1: Counts match serial cllm_build_vocab... ");
+    
+    CLLMTokenizer* serial = cllm_create_tokenizer(100000);
+    for (int d = 0; d < TEST_NUM_DOCS; d++) cllm_build_vocab(serial, docs[d]);
+    CLLMTokenizer* parallel = build_parallel(docs, 100000, 4);
+    
+    int ok = serial->vocab_size == parallel->vocab_size;
+    for (uint32_t i = 5; ok && i < serial->vocab_size; i++) {
+        uint32_t id = cllm_find_token(parallel, serial->vocab[i]);
+        ok = id >= 5 && parallel->token_counts[id] == serial->token_counts[i];
+    }
+    
+    uint32_t vocab_size = parallel->vocab_size;
+    cllm_free_tokenizer(serial);
+    cllm_free_tokenizer(parallel);
+    
+    if (ok) {
+        printf("PASS (%u tokens)\n", vocab_size);
+        return 1;
+    }
+    printf("FAIL\n");
+    return 0;
+}
+
+// Test 2: Token IDs are independent of the thread count
+int test_deterministic(char** docs) {
+    printf("Test 2: Token IDs identical for 1, 3 and 8 threads... ");
+    
+    CLLMTokenizer* one = build_parallel(docs, 100000, 1);
+    CLLMTokenizer* three = build_parallel(docs, 100000, 3);
+    CLLMTokenizer* eight = build_parallel(docs, 100000, 8);
+    
+    int ok = tokenizers_equal(one, three) && tokenizers_equal(one, eight);
+    
+    cllm_free_tokenizer(one);
+    cllm_free_tokenizer(three);
+    cllm_free_tokenizer(eight);
+    
+    printf("%s\n", ok ? "PASS" : "FAIL");
+    return ok;
+}
+
+// Test 3: Pruning keeps the most frequent tokens in descending order
+int test_pruning(char** docs) {
+    printf("Test 3: Pruned vocabulary keeps most frequent tokens... ");
+    
+    CLLMTokenizer* full = build_parallel(docs, 100000, 4);
+    CLLMTokenizer* pruned = build_parallel(docs, 505, 4);
+    
+    int ok = pruned->vocab_size == 505;
+    for (uint32_t i = 5; ok && i < pruned->vocab_size; i++) {
+        // Prefix of the full ordering, counts non-increasing
+        ok = strcmp(pruned->vocab[i], full->vocab[i]) == 0 &&
+             (i == 5 || pruned->token_counts[i] <= pruned->token_counts[i - 1]);
+    }
+    
+    uint32_t min_kept = pruned->token_counts[pruned->vocab_size - 1];
+    for (uint32_t i = pruned->vocab_size; ok && i < full->vocab_size; i++) {
+        ok = full->token_counts[i] <= min_kept;
+    }
+    
+    cllm_free_tokenizer(full);
+    cllm_free_tokenizer(pruned);
+    
+    printf("%s\n", ok ? "PASS" : "FAIL");
+    return ok;
+}
+
+// Test 4: Files match texts; existing tokens keep their IDs
+int test_files_and_existing(char** docs) {
+    printf("Test 4: File input matches text input, existing IDs kept... ");
+    
+    FILE* f = fopen(TEST_FILE, "w");
+    if (!f) {
+        printf("FAIL (cannot write file)\n");
+        return 0;
+    }
+    for (int d = 0; d < TEST_NUM_DOCS; d++) {
+        fputs(docs[d], f);
+        fputc('\n', f);
+    }
+    fclose(f);
+    
+    CLLMTokenizer* from_texts = build_parallel(docs, 100000, 4);
+    
+    CLLMTokenizer* from_file = cllm_create_tokenizer(100000);
+    uint32_t seeded = cllm_add_token(from_file, "tok42");
+    CLLMVocabBuilder* builder = cllm_vocab_builder_create(4);
+    const char* paths[1] = { TEST_FILE };
+    int files = cllm_vocab_builder_add_files(builder, paths, 1);
+    cllm_vocab_builder_finish(builder, from_file);
+    cllm_vocab_builder_free(builder);
+    
+    int ok = files == 1 && from_file->vocab_size == from_texts->vocab_size &&
+             cllm_find_token(from_file, "tok42") == seeded &&
+             from_file->token_counts[seeded] == from_texts->token_counts[cllm_find_token(from_texts, "tok42")] + 1;
+    for (uint32_t i = 5; ok && i < from_texts->vocab_size; i++) {
+        uint32_t id = cllm_find_token(from_file, from_texts->vocab[i]);
+        ok = id >= 5 && (id == seeded || from_file->token_counts[id] == from_texts->token_counts[i]);
+    }
+    
+    cllm_free_tokenizer(from_texts);
+    cllm_free_tokenizer(from_file);
+    unlink(TEST_FILE);
+    
+    printf("%s\n", ok ? "PASS" : "FAIL");
+    return ok;
+}
+
+int main() {
+    printf("\n");
+    printf("╔══════════════════════════════════════════════════════════╗\n");
+    printf("║     Parallel Vocabulary Builder Unit Tests              ║\n");
+    printf("╚══════════════════════════════════════════════════════════╝\n");
+    printf("\n");
+    
+    srand(42);
+    char** docs = create_documents();
+    
+    int passed = 0;
+    int total = 4;
+    
+    passed += test_matches_serial(docs);
+    passed += test_deterministic(docs);
+    passed += test_pruning(docs);
+    passed += test_files_and_existing(docs);
+    
+    free_documents(docs);
+    
+    printf("\n");
+    printf("═══════════════════════════════════════════════════════════\n");
+    printf("Results: %d/%d tests passed (%.1f%%)\n", passed, total,
+           (float)passed / total * 100.0f);
+    printf("═══════════════════════════════════════════════════════════\n");
+    printf("\n");
+    
+    return (passed == total) ? 0 : 1;
+}
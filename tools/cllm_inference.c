@@ -8,6 +8,7 @@
 #include "../include/cllm_inference.h"
 #include "../include/cllm_format.h"
 #include "../include/cllm_model_manager.h"
+#include "../include/cllm_utils.h"
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
@@ -16,15 +17,19 @@
 #include "../include/prime_float_math.h"
 
 // Forward declarations from cllm_inference.c
-void cllm_forward(CLLMInference* inference, uint32_t* tokens, int num_tokens);
-void cllm_apply_temperature(float* logits, int vocab_size, float temperature);
-void cllm_softmax(float* logits, int size);
-uint32_t cllm_sample_top_k(float* logits, int vocab_size, int k);
+int cllm_prefill(CLLMInference* inference, uint32_t* tokens, int num_tokens);
+int cllm_forward_cached(CLLMInference* inference, uint32_t token, bool compute_logits);
+uint32_t cllm_sample_logits(CLLMInference* inference, const float* logits);
 
 static void print_usage(const char* program_name) {
-    printf("Usage: %s [OPTIONS] <model_name>\n\n", program_name);
-    printf("Generate text using a trained CLLM model from model manager.\n\n");
+    printf("Usage: %s [OPTIONS] <model_name>\n", program_name);
+    printf("       %s [OPTIONS] -f <model_file>\n\n", program_name);
+    printf("Generate text using a trained CLLM model from model manager.\n");
+    printf("Model weights are memory-mapped, so concurrent inference processes\n");
+    printf("share one copy.\n\n");
     printf("Options:\n");
+    printf("  -d, --models-dir DIR  Model manager directory (default: ./models)\n");
+    printf("  -f, --file PATH       Load a model file directly instead of by name\n");
     printf("  -p, --prompt TEXT     Input prompt for generation\n");
     printf("  -n, --tokens NUM      Number of tokens to generate (default: 50)\n");
     printf("  -t, --temperature T   Sampling temperature (default: 0.8)\n");
@@ -80,11 +85,25 @@ static void generate_text_proper(CLLMInference* inference, const char* prompt,
     printf("Generated: ");
     fflush(stdout);
     
+    struct timespec start_time, end_time;
+    clock_gettime(CLOCK_MONOTONIC, &start_time);
+    
+    // Prefill the KV cache with the prompt; later steps only process the newest token
+    if (cllm_prefill(inference, tokens, num_tokens) != 0) {
+        fprintf(stderr, "\nError: Prompt prefill failed\n");
+        return;
+    }
+    
     // Generate tokens
     int generated_count = 0;
     for (int i = 0; i < max_tokens; i++) {
-        // Run forward pass through the model
-        cllm_forward(inference, tokens, num_tokens);
+        // Incremental forward pass over the token sampled last step
+        if (i > 0 && cllm_forward_cached(inference, tokens[num_tokens - 1], true) != 0) {
+            if (verbose) {
+                fprintf(stderr, "\nWarning: KV cache full, stopping generation\n");
+            }
+            break;
+        }
         
         // Check if logits were computed
         if (!inference->logits) {
@@ -92,22 +111,8 @@ static void generate_text_proper(CLLMInference* inference, const char* prompt,
             break;
         }
         
-        // Apply temperature
-        if (temperature > 0.0f && temperature != 1.0f) {
-            cllm_apply_temperature(inference->logits, model->vocab_size, temperature);
-        }
-        
-        // Apply softmax
-        cllm_softmax(inference->logits, model->vocab_size);
-        
-        // Sample next token
-        uint32_t next_token;
-        if (top_k > 1 && temperature > 0.0f) {
-            next_token = cllm_sample_top_k(inference->logits, model->vocab_size, top_k);
-        } else {
-            // Greedy sampling - pick highest probability
-            next_token = (uint32_t)cllm_sample_token(inference, inference->logits);
-        }
+        // Sample next token: temperature, top-k and top-p fused in one pass
+        uint32_t next_token = cllm_sample_logits(inference, inference->logits);
         
         // Check validity
         if (next_token >= model->vocab_size) {
@@ -142,6 +147,12 @@ static void generate_text_proper(CLLMInference* inference, const char* prompt,
     
     printf("\n");
     
+    clock_gettime(CLOCK_MONOTONIC, &end_time);
+    double elapsed = (end_time.tv_sec - start_time.tv_sec) +
+                     (end_time.tv_nsec - start_time.tv_nsec) / 1e9;
+    printf("Speed: %d tokens in %.3f s (%.1f tokens/sec)\n", generated_count, elapsed,
+           elapsed > 0.0 ? generated_count / elapsed : 0.0);
+    
     if (verbose) {
         fprintf(stderr, "\n\n=== Generation Complete ===\n");
         fprintf(stderr, "Total tokens generated: %d\n", generated_count);
@@ -158,6 +169,8 @@ int main(int argc, char** argv) {
     int top_k = 40;
     int seed = -1;
     bool verbose = false;
+    const char* models_dir = NULL;
+    const char* model_file = NULL;
     
     // Parse command line options
     static struct option long_options[] = {
@@ -167,6 +180,8 @@ int main(int argc, char** argv) {
         {"top-k", required_argument, 0, 'k'},
         {"seed", required_argument, 0, 's'},
         {"verbose", no_argument, 0, 'v'},
+        {"models-dir", required_argument, 0, 'd'},
+        {"file", required_argument, 0, 'f'},
         {"help", no_argument, 0, 'h'},
         {0, 0, 0, 0}
     };
@@ -174,7 +189,7 @@ int main(int argc, char** argv) {
     int opt;
     int option_index = 0;
     
-    while ((opt = getopt_long(argc, argv, "p:n:t:k:s:vh", long_options, &option_index)) != -1) {
+    while ((opt = getopt_long(argc, argv, "p:n:t:k:s:vd:f:h", long_options, &option_index)) != -1) {
         switch (opt) {
             case 'p':
                 prompt = optarg;
@@ -194,6 +209,12 @@ int main(int argc, char** argv) {
             case 'v':
                 verbose = true;
                 break;
+            case 'd':
+                models_dir = optarg;
+                break;
+            case 'f':
+                model_file = optarg;
+                break;
             case 'h':
                 print_usage(argv[0]);
                 return 0;
@@ -204,20 +225,13 @@ int main(int argc, char** argv) {
     }
     
     // Get positional arguments
-    if (optind + 1 > argc) {
+    if (!model_file && optind + 1 > argc) {
         fprintf(stderr, "Error: Missing required model name\n\n");
         print_usage(argv[0]);
         return 1;
     }
     
-    const char* model_name = argv[optind];
-    
-    // Set random seed
-    if (seed >= 0) {
-        srand(seed);
-    } else {
-        srand(time(NULL));
-    }
+    const char* model_name = model_file ? model_file : argv[optind];
     
     printf("\n╔══════════════════════════════════════════════════════════╗\n");
     printf("║    CLLM Inference Engine v2.0 (Proper Forward Pass)     ║\n");
@@ -229,7 +243,12 @@ int main(int argc, char** argv) {
         printf("Acquiring model '%s' from model manager...\n", model_name);
     }
     
-    CLLMModel* model = model_manager_acquire_read(model_name);
+    CLLMModel* model = NULL;
+    if (model_file) {
+        model = cllm_read_model_mapped(model_file);
+    } else if (model_manager_init(models_dir)) {
+        model = model_manager_acquire_read(model_name);
+    }
     if (!model) {
         fprintf(stderr, "Error: Model '%s' not found in model manager\n", model_name);
         fprintf(stderr, "Please create the model first using the training tool or model manager\n");
@@ -249,13 +268,24 @@ int main(int argc, char** argv) {
     CLLMInference* inference = cllm_inference_init(model);
     if (!inference) {
         fprintf(stderr, "Error: Failed to initialize inference engine\n");
-        cllm_free(model);
+        if (model_file) {
+            cllm_free_model(model);
+        } else {
+            model_manager_release_read(model_name);
+            model_manager_cleanup();
+        }
         return 1;
     }
     
+    // Per-inference RNG; seeded from the clock unless -s is given
+    if (seed >= 0) {
+        cllm_set_seed(inference, (uint64_t)seed);
+    }
+    
     // Set inference parameters
     inference->temperature = temperature;
-    inference->top_k = top_k;
+    inference->top_k = top_k > 1 ? top_k : 0;
+    inference->top_p = 1.0f;
     inference->max_tokens = max_tokens;
     
     if (verbose) {
@@ -269,7 +299,12 @@ int main(int argc, char** argv) {
     cllm_inference_cleanup(inference);
     
     // Release model back to model manager
-    model_manager_release_read(model_name);
+    if (model_file) {
+        cllm_free_model(model);
+    } else {
+        model_manager_release_read(model_name);
+        model_manager_cleanup();
+    }
     
     if (verbose) {
         printf("\n✓ Model released back to model manager\n");
@@ -6,11 +6,14 @@
  */
 
 #include "../include/cllm_tokenizer.h"
+#include "../include/cllm_data_loader.h"
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
 #include <stdbool.h>
 #include <getopt.h>
+#include <errno.h>
+#include <sys/stat.h>
 
 static void print_usage(const char* program_name) {
     printf("Usage: %s [OPTIONS] [text]\n\n", program_name);
@@ -23,11 +26,55 @@ static void print_usage(const char* program_name) {
     printf("  -v, --vocab FILE      Load vocabulary file (required)\n");
     printf("  -j, --json            Output in JSON format\n");
     printf("  -h, --help            Show this help message\n\n");
+    printf("Shard mode (streams a corpus into token shards in the -o directory):\n");
+    printf("  --shard DIR           Tokenize every file under DIR\n");
+    printf("  --shard-list FILE     Tokenize the files listed in FILE (one per line)\n");
+    printf("  --workers NUM         Tokenizer threads (default: all CPUs)\n");
+    printf("  --shard-tokens NUM    Tokens per shard (default: %u)\n\n", CLLM_SHARD_DEFAULT_TOKENS);
     printf("Examples:\n");
     printf("  %s -v vocab.txt &quot;Hello, world!&quot;\n", program_name);
     printf("  %s -v vocab.txt -f input.txt -o tokens.txt\n", program_name);
     printf("  %s -v vocab.txt -d &quot;42 123 456&quot;\n", program_name);
     printf("  %s -v vocab.txt -f input.txt -s -j\n", program_name);
+    printf("  %s -v vocab.txt --shard corpus/ -o shards/\n", program_name);
+}
+
+static int shard_corpus(CLLMTokenizer* tokenizer, const char* shard_dir, const char* shard_list,
+                        const char* output_dir, int workers, size_t shard_tokens) {
+    if (!output_dir) {
+        fprintf(stderr, "Error: Output directory required for shard mode (use -o)\n");
+        return 1;
+    }
+    if (mkdir(output_dir, 0755) != 0 && errno != EEXIST) {
+        fprintf(stderr, "Error: Failed to create output directory: %s\n", output_dir);
+        return 1;
+    }
+    
+    CLLMDataLoader* loader = cllm_data_loader_create(tokenizer);
+    if (!loader) {
+        fprintf(stderr, "Error: Failed to create data loader\n");
+        return 1;
+    }
+    
+    CLLMShardOptions options = {
+        .shard_tokens = shard_tokens,
+        .num_workers = workers,
+        .file_list = shard_list,
+        .verbose = 1
+    };
+    CLLMShardStats stats;
+    int rc = cllm_data_loader_shard_directory(loader, shard_dir, output_dir, &options, &stats);
+    
+    if (rc == 0) {
+        printf("Files: %zu processed, %zu skipped, %zu resumed\n",
+               stats.files_processed, stats.files_skipped, stats.resumed_files);
+        printf("Input: %.2f MB\n", stats.bytes_read / (1024.0 * 1024.0));
+    } else {
+        fprintf(stderr, "Error: Sharding failed (rerun to resume)\n");
+    }
+    
+    cllm_data_loader_free(loader);
+    return rc == 0 ? 0 : 1;
 }
 
 static char* read_file(const char* path) {
@@ -178,6 +225,10 @@ int main(int argc, char** argv) {
     bool decode_mode = false;
     bool show_stats = false;
     bool json_output = false;
+    const char* shard_dir = NULL;
+    const char* shard_list = NULL;
+    int workers = 0;
+    size_t shard_tokens = 0;
 
     // Parse command-line options
     static struct option long_options[] = {
@@ -188,6 +239,10 @@ int main(int argc, char** argv) {
         {"vocab", required_argument, 0, 'v'},
         {"json", no_argument, 0, 'j'},
         {"help", no_argument, 0, 'h'},
+        {"shard", required_argument, 0, 1000},
+        {"shard-list", required_argument, 0, 1001},
+        {"workers", required_argument, 0, 1002},
+        {"shard-tokens", required_argument, 0, 1003},
         {0, 0, 0, 0}
     };
 
@@ -215,6 +270,18 @@ int main(int argc, char** argv) {
             case 'h':
                 print_usage(argv[0]);
                 return 0;
+            case 1000:
+                shard_dir = optarg;
+                break;
+            case 1001:
+                shard_list = optarg;
+                break;
+            case 1002:
+                workers = atoi(optarg);
+                break;
+            case 1003:
+                shard_tokens = (size_t)strtoull(optarg, NULL, 10);
+                break;
             default:
                 print_usage(argv[0]);
                 return 1;
@@ -226,8 +293,10 @@ int main(int argc, char** argv) {
         text = argv[optind];
     }
 
+    bool shard_mode = shard_dir || shard_list;
+    
     // Validate input
-    if (!input_file && !text) {
+    if (!input_file && !text && !shard_mode) {
         fprintf(stderr, "Error: Input text required (use -f or provide text)\n\n");
         print_usage(argv[0]);
         return 1;
@@ -252,6 +321,12 @@ int main(int argc, char** argv) {
         cllm_free_tokenizer(tokenizer);
         return 1;
     }
+    
+    if (shard_mode) {
+        int rc = shard_corpus(tokenizer, shard_dir, shard_list, output_path, workers, shard_tokens);
+        cllm_free_tokenizer(tokenizer);
+        return rc;
+    }
 
     // Read input file if specified
     char* input_text = NULL;
@@ -2,10 +2,12 @@
  * CLLM Vocabulary Builder Tool
  * 
  * Builds vocabulary from text corpus using CLLMTokenizer.
- * Updated to use current API.
+ * Input files are collected first, then counted in parallel by the
+ * map-reduce vocabulary builder.
  */
 
 #include "../include/cllm_tokenizer.h"
+#include "../include/cllm_vocab_builder.h"
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
@@ -22,12 +24,15 @@ static void print_usage(const char* program_name) {
     printf("  -s, --size NUM        Maximum vocabulary size (default: 50000)\n");
     printf("  -r, --recursive       Process directories recursively\n");
     printf("  -e, --ext EXT         File extension filter (e.g., .txt)\n");
+    printf("  -l, --list FILE       Read input paths from FILE (one per line)\n");
+    printf("  -j, --threads NUM     Counting threads (default: all CPUs)\n");
     printf("  -v, --verbose         Show processing details\n");
     printf("  -h, --help            Show this help message\n\n");
     printf("Input can be:\n");
     printf("  - Single text file\n");
     printf("  - Directory of text files\n");
-    printf("  - Multiple files (space-separated)\n\n");
+    printf("  - Multiple files (space-separated)\n");
+    printf("  - A list file given with -l\n\n");
     printf("Examples:\n");
     printf("  %s corpus.txt\n", program_name);
     printf("  %s -r -e .txt data/ -o vocab.txt\n", program_name);
@@ -51,45 +56,39 @@ static bool is_text_file(const char* path, const char* ext_filter) {
     return true;
 }
 
-static int process_file(const char* path, CLLMTokenizer* tokenizer, bool verbose) {
-    if (verbose) {
-        printf("Processing: %s\n", path);
-    }
-    
-    FILE* f = fopen(path, "r");
-    if (!f) {
-        fprintf(stderr, "Warning: Failed to open %s\n", path);
-        return -1;
-    }
-    
-    // Read entire file
-    fseek(f, 0, SEEK_END);
-    long size = ftell(f);
-    fseek(f, 0, SEEK_SET);
-    
-    char* content = malloc(size + 1);
-    if (!content) {
-        fclose(f);
-        return -1;
+typedef struct {
+    char** paths;
+    size_t count;
+    size_t capacity;
+} PathList;
+
+static int add_path(PathList* list, const char* path, bool verbose) {
+    if (list->count == list->capacity) {
+        size_t new_capacity = list->capacity ? list->capacity * 2 : 256;
+        char** new_paths = realloc(list->paths, new_capacity * sizeof(char*));
+        if (!new_paths) return -1;
+        list->paths = new_paths;
+        list->capacity = new_capacity;
     }
     
-    size_t read = fread(content, 1, size, f);
-    content[read] = '\0';
-    fclose(f);
-    
-    // Build vocabulary from this text
-    cllm_build_vocab(tokenizer, content);
-    
-    free(content);
+    list->paths[list->count] = strdup(path);
+    if (!list->paths[list->count]) return -1;
+    list->count++;
     
     if (verbose) {
-        printf("  Processed %ld bytes\n", size);
+        printf("Queued: %s\n", path);
     }
-    
     return 0;
 }
 
-static int process_directory(const char* path, CLLMTokenizer* tokenizer,
+static void free_paths(PathList* list) {
+    for (size_t i = 0; i < list->count; i++) {
+        free(list->paths[i]);
+    }
+    free(list->paths);
+}
+
+static int process_directory(const char* path, PathList* files,
                             bool recursive, const char* ext_filter, bool verbose) {
     DIR* dir = opendir(path);
     if (!dir) {
@@ -113,12 +112,12 @@ static int process_directory(const char* path, CLLMTokenizer* tokenizer,
         
         if (S_ISDIR(st.st_mode)) {
             if (recursive) {
-                int count = process_directory(full_path, tokenizer, recursive, ext_filter, verbose);
+                int count = process_directory(full_path, files, recursive, ext_filter, verbose);
                 if (count > 0) file_count += count;
             }
         } else if (S_ISREG(st.st_mode)) {
             if (is_text_file(full_path, ext_filter)) {
-                if (process_file(full_path, tokenizer, verbose) == 0) {
+                if (add_path(files, full_path, verbose) == 0) {
                     file_count++;
                 }
             }
@@ -132,9 +131,11 @@ static int process_directory(const char* path, CLLMTokenizer* tokenizer,
 int main(int argc, char* argv[]) {
     const char* output_path = "vocab.txt";
     const char* ext_filter = NULL;
+    const char* list_path = NULL;
     uint32_t vocab_size = 50000;
     bool recursive = false;
     bool verbose = false;
+    int num_threads = 0;
 
     // Parse command-line options
     static struct option long_options[] = {
@@ -142,13 +143,15 @@ int main(int argc, char* argv[]) {
         {"size", required_argument, 0, 's'},
         {"recursive", no_argument, 0, 'r'},
         {"ext", required_argument, 0, 'e'},
+        {"list", required_argument, 0, 'l'},
+        {"threads", required_argument, 0, 'j'},
         {"verbose", no_argument, 0, 'v'},
         {"help", no_argument, 0, 'h'},
         {0, 0, 0, 0}
     };
 
     int opt;
-    while ((opt = getopt_long(argc, argv, "o:s:re:vh", long_options, NULL)) != -1) {
+    while ((opt = getopt_long(argc, argv, "o:s:re:l:j:vh", long_options, NULL)) != -1) {
         switch (opt) {
             case 'o':
                 output_path = optarg;
@@ -162,6 +165,12 @@ int main(int argc, char* argv[]) {
             case 'e':
                 ext_filter = optarg;
                 break;
+            case 'l':
+                list_path = optarg;
+                break;
+            case 'j':
+                num_threads = atoi(optarg);
+                break;
             case 'v':
                 verbose = true;
                 break;
@@ -175,7 +184,7 @@ int main(int argc, char* argv[]) {
     }
 
     // Validate input
-    if (optind >= argc) {
+    if (optind >= argc && !list_path) {
         fprintf(stderr, "Error: Input path required\n\n");
         print_usage(argv[0]);
         return 1;
@@ -193,8 +202,8 @@ int main(int argc, char* argv[]) {
         printf("Output: %s\n\n", output_path);
     }
 
-    // Process all input paths
-    int total_files = 0;
+    // Collect all input paths
+    PathList files = {0};
     for (int i = optind; i < argc; i++) {
         const char* input_path = argv[i];
         
@@ -205,16 +214,46 @@ int main(int argc, char* argv[]) {
         }
         
         if (S_ISDIR(st.st_mode)) {
-            int count = process_directory(input_path, tokenizer, recursive, ext_filter, verbose);
-            if (count > 0) total_files += count;
+            process_directory(input_path, &files, recursive, ext_filter, verbose);
         } else if (S_ISREG(st.st_mode)) {
-            if (process_file(input_path, tokenizer, verbose) == 0) {
-                total_files++;
-            }
+            add_path(&files, input_path, verbose);
         }
     }
 
-    if (total_files == 0) {
+    // Process paths from the list file
+    if (list_path) {
+        FILE* list = fopen(list_path, "r");
+        if (!list) {
+            fprintf(stderr, "Error: Cannot open list file %s\n", list_path);
+        } else {
+            char* line = NULL;
+            size_t line_cap = 0;
+            ssize_t len;
+            while ((len = getline(&line, &line_cap, list)) > 0) {
+                while (len > 0 && (line[len - 1] == '\n' || line[len - 1] == '\r')) line[--len] = '\0';
+                if (len == 0) continue;
+                if (is_text_file(line, ext_filter)) {
+                    add_path(&files, line, verbose);
+                }
+            }
+            free(line);
+            fclose(list);
+        }
+    }
+    
+    // Count in parallel, then merge into the tokenizer
+    int total_files = 0;
+    CLLMVocabBuilder* builder = cllm_vocab_builder_create(num_threads);
+    if (builder) {
+        total_files = cllm_vocab_builder_add_files(builder, (const char* const*)files.paths, files.count);
+        if (total_files > 0) {
+            cllm_vocab_builder_finish(builder, tokenizer);
+        }
+        cllm_vocab_builder_free(builder);
+    }
+    free_paths(&files);
+    
+    if (total_files <= 0) {
         fprintf(stderr, "Error: No files processed\n");
         cllm_free_tokenizer(tokenizer);
         return 1;
@@ -30,43 +30,44 @@ def collect_training_files(base_path="/workspace"):
     print(f"✓ Found {len(files)} training files")
     return files
 
-def prepare_training_data(files, output_dir="training_data"):
-    """Prepare training data by concatenating files"""
+def prepare_training_data(files, output_dir="training_data", tools_dir="tools"):
+    """Prepare training data as resumable token shards"""
     print(f"\n📝 Preparing training data...")
     
     os.makedirs(output_dir, exist_ok=True)
     
-    # Create a single large training file
-    output_file = os.path.join(output_dir, "repo_code.txt")
-    
-    total_lines = 0
-    total_bytes = 0
-    
-    with open(output_file, 'w', encoding='utf-8', errors='ignore') as outf:
-        for i, filepath in enumerate(files):
-            if i % 50 == 0:
-                print(f"  Processing file {i+1}/{len(files)}...")
-            
-            try:
-                with open(filepath, 'r', encoding='utf-8', errors='ignore') as inf:
-                    content = inf.read()
-                    
-                    # Add file marker
-                    outf.write(f"\n\n// ===== FILE: {filepath} =====\n\n")
-                    outf.write(content)
-                    
-                    lines = content.count('\n')
-                    total_lines += lines
-                    total_bytes += len(content)
-            except Exception as e:
-                print(f"  ⚠️  Error reading {filepath}: {e}")
+    # The shard pipeline reads files in place; only the file list is written
+    file_list = os.path.join(output_dir, "files.txt")
+    with open(file_list, 'w', encoding='utf-8') as f:
+        for filepath in files:
+            f.write(filepath + "\n")
+    
+    total_bytes = sum(os.path.getsize(p) for p in files if os.path.exists(p))
+    
+    vocab_file = os.path.join(output_dir, "vocab.txt")
+    shard_dir = os.path.join(output_dir, "shards")
+    os.makedirs(shard_dir, exist_ok=True)
+    
+    try:
+        # Reuse an existing vocabulary so an interrupted run can resume
+        if not os.path.exists(vocab_file):
+            subprocess.run([os.path.join(tools_dir, "cllm_vocab_build"),
+                            "-l", file_list, "-o", vocab_file], check=True)
+        
+        subprocess.run([os.path.join(tools_dir, "cllm_tokenize"),
+                        "-v", vocab_file, "--shard-list", file_list,
+                        "-o", shard_dir], check=True)
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"  ⚠️  Sharding failed: {e}")
+        return None
     
     print(f"✓ Training data prepared:")
-    print(f"  - Output file: {output_file}")
-    print(f"  - Total lines: {total_lines:,}")
+    print(f"  - Shard directory: {shard_dir}")
+    print(f"  - Vocabulary: {vocab_file}")
+    print(f"  - Total files: {len(files):,}")
     print(f"  - Total size: {total_bytes:,} bytes ({total_bytes/1024/1024:.2f} MB)")
     
-    return output_file
+    return shard_dir
 
 def create_training_config():
     """Create training configuration"""
@@ -108,6 +109,8 @@ def main():
     
     # Step 2: Prepare training data
     training_file = prepare_training_data(files)
+    if training_file is None:
+        return 1
     
     # Step 3: Create configuration
     config = create_training_config()